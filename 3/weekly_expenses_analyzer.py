@@ -9,8 +9,16 @@ import json
 import os
 from io import BytesIO
 import numpy as np
-from scipy.optimize import newton
+import sys
+from pathlib import Path
 import warnings
+
+# Добавляем корневую директорию проекта в sys.path для импорта utils
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from utils.financial_math import xirr as solve_xirr
 warnings.filterwarnings('ignore')
 
 # Настройка страницы
@@ -364,75 +372,22 @@ def calculate_xirr(cashflows, dates, guess=0.1):
     Args:
         cashflows: список денежных потоков (отрицательные = вложения, положительные = доходы)
         dates: список дат для каждого потока
-        guess: начальное предположение для ставки (по умолчанию 10%)
+        guess: не используется (корень ищется методом Брента на отрезке от -99% до 1000%)
     
     Returns:
-        XIRR в процентах или None если не удалось рассчитать
+        XIRR в процентах или None, если решения нет (ROI вместо XIRR не подставляется)
     """
     try:
-        # Преобразуем все даты в datetime.date объекты
-        normalized_dates = []
-        for date in dates:
-            if isinstance(date, str):
-                normalized_dates.append(pd.to_datetime(date).date())
-            elif isinstance(date, pd.Timestamp):
-                normalized_dates.append(date.date())
-            else:
-                normalized_dates.append(date)
-        
-        # Преобразуем даты в дни от первой даты
-        first_date = min(normalized_dates)
-        days = [(d - first_date).days for d in normalized_dates]
-        
-        def npv(rate):
-            """Рассчитывает NPV для данной ставки"""
-            return sum(cf / ((1 + rate) ** (day / 365.25)) for cf, day in zip(cashflows, days))
-        
-        def npv_derivative(rate):
-            """Производная NPV для метода Ньютона"""
-            return sum(-cf * day / 365.25 / ((1 + rate) ** (day / 365.25 + 1)) for cf, day in zip(cashflows, days))
-        
-        # Проверяем базовые условия для XIRR
+        # Если общая сумма вложений равна общей сумме доходов, XIRR = 0%
         total_investments = sum(cf for cf in cashflows if cf < 0)
         total_returns = sum(cf for cf in cashflows if cf > 0)
-        
-        # Если общая сумма вложений равна общей сумме доходов, XIRR = 0%
-        if abs(total_investments + total_returns) < 1:
+        if total_investments != 0 and total_returns != 0 and abs(total_investments + total_returns) < 1:
             return 0.0
         
-        # Если нет вложений или нет доходов, XIRR не определен
-        if total_investments == 0 or total_returns == 0:
-            return None
-        
-        # Пробуем разные начальные значения с более широким диапазоном
-        guesses = [0.1, 0.05, 0.2, -0.1, 0.01, 0.5, -0.5, 1.0, -0.9]
-        
-        for initial_guess in guesses:
-            try:
-                # Используем метод Ньютона для нахождения ставки, при которой NPV = 0
-                xirr_rate = newton(npv, initial_guess, fprime=npv_derivative, maxiter=2000, tol=1e-6)
-                
-                # Проверяем, что результат разумен и NPV близок к нулю
-                if -0.99 < xirr_rate < 10:  # от -99% до 1000%
-                    npv_at_rate = npv(xirr_rate)
-                    if abs(npv_at_rate) < 1000:  # NPV должен быть близок к нулю
-                        return xirr_rate * 100
-            except (ValueError, RuntimeError, OverflowError):
-                continue
-        
-        # Если не удалось найти решение, пробуем простой расчет ROI
-        try:
-            # Простой расчет: общий доход / общие вложения
-            simple_roi = (total_returns + total_investments) / abs(total_investments)
-            if simple_roi > 0:
-                return simple_roi * 100
-        except:
-            pass
-        
-        # Если не удалось найти решение с разными начальными значениями
-        return None
+        xirr_rate = solve_xirr(cashflows, dates)
+        return xirr_rate * 100 if xirr_rate is not None else None
             
-    except (ValueError, RuntimeError, OverflowError):
+    except (ValueError, TypeError, OverflowError):
         return None
 
 
@@ -1033,12 +988,11 @@ def analyze_single_file_data(df, file_name, tab_prefix=""):
                 
                 # Рассчитываем XIRR
                 if len(cashflows) >= 2:
-                    xirr_result = calculate_xirr(cashflows, dates)
-                    xirr = xirr_result if xirr_result is not None else 0
+                    xirr = calculate_xirr(cashflows, dates)  # None — решения нет
                 else:
-                    xirr = 0
+                    xirr = None
             else:
-                xirr = 0
+                xirr = None
             
             st.metric(
                 label="💵 Прибыль после налога",
@@ -1054,7 +1008,7 @@ def analyze_single_file_data(df, file_name, tab_prefix=""):
             
             st.metric(
                 label="🎯 XIRR",
-                value=f"{xirr:.1f}%",
+                value=f"{xirr:.1f}%" if xirr is not None else "Н/Д",
                 delta=f"Внутренняя норма доходности"
             )
         else:
@@ -2339,12 +2293,11 @@ def main():
             
             # Рассчитываем XIRR
             if len(cashflows) >= 2:
-                xirr_result = calculate_xirr(cashflows, dates)
-                xirr = xirr_result if xirr_result is not None else 0
+                xirr = calculate_xirr(cashflows, dates)  # None — решения нет
             else:
-                xirr = 0
+                xirr = None
         else:
-            xirr = 0
+            xirr = None
         
         # Результаты расчета - общая сводка
         st.markdown("### 📊 Результаты расчета")
@@ -2660,7 +2613,7 @@ def main():
             
             st.metric(
                 label="🎯 XIRR (общий)",
-                value=f"{xirr:.1f}%",
+                value=f"{xirr:.1f}%" if xirr is not None else "Н/Д",
                 delta=f"Внутренняя норма доходности"
             )
         
@@ -2773,7 +2726,7 @@ def main():
                 <li><strong>Итого вложено:</strong> {total_invested:,.0f} ₽</li>
                 <li><strong>Прибыль после налога:</strong> {profit_after_tax:,.0f} ₽</li>
                 <li><strong>ROI:</strong> {roi:.1f}%</li>
-                <li><strong>XIRR:</strong> {xirr:.1f}%</li>
+                <li><strong>XIRR:</strong> {f"{xirr:.1f}%" if xirr is not None else 'Н/Д'}</li>
                 <li><strong>Стоимость логистики:</strong> {expenses['logistics']['amount']:,.0f} ₽</li>
                 <li><strong>Стоимость хранения:</strong> {expenses['storage']['amount']:,.0f} ₽</li>
                 <li><strong>Прочие удержания:</strong> {expenses['other']['amount']:,.0f} ₽</li>
@@ -0,0 +1,354 @@
+# -*- coding: utf-8 -*-
+"""
+Хранилище недельных периодов для анализатора логистики и удержаний (wb_logistics_analyzer.py).
+
+Каждый еженедельный отчёт WB загружается в SQLite один раз: файлы узнаются по
+имени, mtime и размеру, а при изменении — по SHA-1 содержимого; уже загруженный
+файл не читается повторно. Недели хранятся по ключу (дата начала, дата конца): строки
+одного отчёта с одинаковым периодом суммируются, повторная загрузка той же недели
+с теми же суммами пропускается, с другими — заменяет неделю (исправленный отчёт).
+
+week_stats — накопленные агрегаты по неделям в порядке периодов: нарастающие итоги,
+скользящие средние за ROLLING_WEEKS недель и изменения к предыдущей неделе.
+При загрузке они пересчитываются только с самой ранней изменённой недели,
+поэтому открытие анализатора — это чтение готовых строк, а не разбор Excel.
+"""
+import hashlib
+import io
+import os
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent
+# Корень проекта в sys.path для импорта utils
+if str(BASE_DIR.parent) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR.parent))
+
+from utils.sqlite_db import thread_connection, write_transaction  # noqa: E402
+
+DB_FILE = Path(os.environ.get("LOGISTICS_DB", BASE_DIR / "data" / "logistics_weeks.db"))
+
+START_COLUMN = 'Дата начала'
+END_COLUMN = 'Дата конца'
+LOGISTICS_COLUMN = 'Стоимость логистики'
+DEDUCTIONS_COLUMN = 'Прочие удержания'
+REQUIRED_COLUMNS = [START_COLUMN, END_COLUMN, LOGISTICS_COLUMN, DEDUCTIONS_COLUMN]
+# Столбцы отчёта -> поля хранилища
+AMOUNT_FIELDS = {LOGISTICS_COLUMN: 'logistics', DEDUCTIONS_COLUMN: 'deductions'}
+
+# Окно скользящего среднего, недель
+ROLLING_WEEKS = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS weeks (
+    start TEXT NOT NULL,
+    end TEXT NOT NULL,
+    logistics REAL NOT NULL DEFAULT 0,
+    deductions REAL NOT NULL DEFAULT 0,
+    rows INTEGER NOT NULL DEFAULT 0,
+    source TEXT,
+    ingested_at TEXT,
+    PRIMARY KEY (start, end)
+);
+
+CREATE TABLE IF NOT EXISTS week_stats (
+    start TEXT NOT NULL,
+    end TEXT NOT NULL,
+    total REAL NOT NULL,
+    cum_logistics REAL NOT NULL,
+    cum_deductions REAL NOT NULL,
+    cum_total REAL NOT NULL,
+    avg_logistics REAL NOT NULL,
+    avg_deductions REAL NOT NULL,
+    avg_total REAL NOT NULL,
+    delta_logistics REAL,
+    delta_deductions REAL,
+    delta_total REAL,
+    PRIMARY KEY (start, end)
+);
+
+CREATE TABLE IF NOT EXISTS sources (
+    sha1 TEXT PRIMARY KEY,
+    name TEXT,
+    mtime_ns INTEGER,
+    size INTEGER,
+    weeks INTEGER,
+    ingested_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sources_file ON sources(name, mtime_ns, size);
+"""
+
+STAT_FIELDS = [
+    'total', 'cum_logistics', 'cum_deductions', 'cum_total',
+    'avg_logistics', 'avg_deductions', 'avg_total',
+    'delta_logistics', 'delta_deductions', 'delta_total',
+]
+
+_local = threading.local()
+
+
+def configure(path):
+    """Сменить файл базы (бенчмарки, отдельная история)"""
+    global DB_FILE
+    DB_FILE = Path(path)
+
+
+def connect():
+    """Соединение текущего потока с DB_FILE (см. utils.sqlite_db)"""
+    return thread_connection(_local, DB_FILE, SCHEMA)
+
+
+def transaction():
+    """Транзакция на запись (см. utils.sqlite_db)"""
+    return write_transaction(connect())
+
+
+# Разбор отчёта
+
+def normalize_report(df):
+    """
+    Недельные периоды отчёта: (DataFrame [start, end, logistics, deductions, rows], список замечаний).
+    Даты приводятся к ISO, строки без дат отбрасываются, суммы — числа (пустые = 0),
+    строки с одинаковым периодом суммируются. Нет обязательных столбцов — (None, замечания).
+    """
+    issues = []
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        issues.append(f"Отсутствуют столбцы: {missing}; доступные: {list(df.columns)}")
+        return None, issues
+
+    # Даты в выгрузках WB — дд.мм.гггг (в Excel они уже datetime, в CSV — строки)
+    start = pd.to_datetime(df[START_COLUMN], errors='coerce', dayfirst=True)
+    end = pd.to_datetime(df[END_COLUMN], errors='coerce', dayfirst=True)
+    valid = start.notna() & end.notna()
+    if not valid.all():
+        issues.append(f"Строк с пустыми датами: {int((~valid).sum())} (пропущены)")
+
+    frame = pd.DataFrame({
+        'start': start[valid].dt.strftime('%Y-%m-%d'),
+        'end': end[valid].dt.strftime('%Y-%m-%d'),
+    })
+    for column, field in AMOUNT_FIELDS.items():
+        values = df.loc[valid, column]
+        if values.isna().any():
+            issues.append(f"В столбце {column} пустых значений: {int(values.isna().sum())} (считаются как 0)")
+        values = pd.to_numeric(values, errors='coerce').fillna(0)
+        if (values < 0).any():
+            issues.append(f"В столбце {column} отрицательных значений: {int((values < 0).sum())}")
+        frame[field] = values.astype(float)
+    frame['rows'] = 1
+
+    weeks = frame.groupby(['start', 'end'], as_index=False, sort=True)[['logistics', 'deductions', 'rows']].sum()
+    return weeks, issues
+
+
+# Загрузка
+
+def _file_signature(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _known_source(conn, sha1=None, name=None, mtime_ns=None, size=None):
+    if sha1 is not None:
+        return conn.execute("SELECT 1 FROM sources WHERE sha1 = ?", (sha1,)).fetchone() is not None
+    return conn.execute(
+        "SELECT 1 FROM sources WHERE name = ? AND mtime_ns = ? AND size = ?", (name, mtime_ns, size)
+    ).fetchone() is not None
+
+
+def ingest_weeks(weeks, source=None):
+    """
+    Записать недельные периоды (результат normalize_report).
+    Возвращает отчёт: added, updated, unchanged (число недель).
+    """
+    report = {'added': 0, 'updated': 0, 'unchanged': 0}
+    if weeks is None or weeks.empty:
+        return report
+    now = datetime.now().isoformat(timespec='seconds')
+    changed_from = None
+    with transaction() as conn:
+        for row in weeks.itertuples(index=False):
+            key = (row.start, row.end)
+            existing = conn.execute(
+                "SELECT logistics, deductions FROM weeks WHERE start = ? AND end = ?", key
+            ).fetchone()
+            if existing is not None and existing == (float(row.logistics), float(row.deductions)):
+                report['unchanged'] += 1
+                continue
+            report['updated' if existing is not None else 'added'] += 1
+            conn.execute(
+                "INSERT INTO weeks (start, end, logistics, deductions, rows, source, ingested_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(start, end) DO UPDATE SET logistics = excluded.logistics, "
+                "deductions = excluded.deductions, rows = excluded.rows, source = excluded.source, "
+                "ingested_at = excluded.ingested_at",
+                key + (float(row.logistics), float(row.deductions), int(row.rows), source, now),
+            )
+            changed_from = key if changed_from is None else min(changed_from, key)
+        if changed_from is not None:
+            _update_stats(conn, changed_from)
+    return report
+
+
+def ingest_file(content, name, mtime_ns=None, size=None):
+    """
+    Загрузить еженедельный отчёт (байты Excel/CSV) один раз по SHA-1 содержимого.
+    Возвращает отчёт ingest_weeks с полями name, status ('ingested' | 'skipped' | 'error') и issues.
+    """
+    sha1 = hashlib.sha1(content).hexdigest()
+    conn = connect()
+    if _known_source(conn, sha1=sha1):
+        if mtime_ns is not None:
+            # Тот же файл с новым mtime (копия, touch): запомнить подпись, чтобы не хешировать снова
+            with transaction() as conn:
+                conn.execute("UPDATE sources SET name = ?, mtime_ns = ?, size = ? WHERE sha1 = ?",
+                             (name, mtime_ns, size, sha1))
+        return {'name': name, 'status': 'skipped', 'issues': [], 'added': 0, 'updated': 0, 'unchanged': 0}
+
+    try:
+        if name.lower().endswith('.csv'):
+            df = pd.read_csv(io.BytesIO(content), sep=None, engine='python')
+        else:
+            df = pd.read_excel(io.BytesIO(content))
+    except Exception as e:
+        return {'name': name, 'status': 'error', 'issues': [f"Ошибка чтения файла: {e}"],
+                'added': 0, 'updated': 0, 'unchanged': 0}
+
+    weeks, issues = normalize_report(df)
+    if weeks is None:
+        return {'name': name, 'status': 'error', 'issues': issues, 'added': 0, 'updated': 0, 'unchanged': 0}
+    with transaction() as conn:
+        report = ingest_weeks(weeks, source=name)
+        conn.execute(
+            "INSERT OR REPLACE INTO sources (sha1, name, mtime_ns, size, weeks, ingested_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (sha1, name, mtime_ns, size if size is not None else len(content), len(weeks),
+             datetime.now().isoformat(timespec='seconds')),
+        )
+    report.update({'name': name, 'status': 'ingested', 'issues': issues})
+    return report
+
+
+def ingest_path(path):
+    """Загрузить файл с диска; файл с известными именем, mtime и размером не читается"""
+    name = os.path.basename(path)
+    mtime_ns, size = _file_signature(path)
+    if _known_source(connect(), name=name, mtime_ns=mtime_ns, size=size):
+        return {'name': name, 'status': 'skipped', 'issues': [], 'added': 0, 'updated': 0, 'unchanged': 0}
+    with open(path, 'rb') as f:
+        content = f.read()
+    return ingest_file(content, name, mtime_ns, size)
+
+
+# Накопленные агрегаты
+
+def _update_stats(conn, changed_from):
+    """
+    Пересчитать week_stats начиная с недели changed_from. Недели до неё не меняются:
+    нужны только их нарастающие итоги и ROLLING_WEEKS - 1 предыдущих недель (окно среднего, изменение).
+    """
+    previous = conn.execute(
+        "SELECT start, end, logistics, deductions FROM weeks WHERE (start, end) < (?, ?) "
+        "ORDER BY start DESC, end DESC LIMIT ?",
+        changed_from + (ROLLING_WEEKS - 1,),
+    ).fetchall()[::-1]
+    changed = conn.execute(
+        "SELECT start, end, logistics, deductions FROM weeks WHERE (start, end) >= (?, ?) ORDER BY start, end",
+        changed_from,
+    ).fetchall()
+    base = conn.execute(
+        "SELECT cum_logistics, cum_deductions, cum_total FROM week_stats WHERE start = ? AND end = ?",
+        previous[-1][:2],
+    ).fetchone() if previous else None
+    base = base or (0.0, 0.0, 0.0)
+
+    frame = pd.DataFrame(previous + changed, columns=['start', 'end', 'logistics', 'deductions'])
+    frame['total'] = frame['logistics'] + frame['deductions']
+    keep = len(previous)
+    for i, field in enumerate(['logistics', 'deductions', 'total']):
+        frame[f'avg_{field}'] = frame[field].rolling(ROLLING_WEEKS, min_periods=1).mean()
+        frame[f'delta_{field}'] = frame[field].diff()
+        cumulative = frame[field].iloc[keep:].cumsum() + base[i]
+        frame[f'cum_{field}'] = cumulative.reindex(frame.index)
+
+    rows = frame.iloc[keep:][['start', 'end'] + STAT_FIELDS]
+    conn.executemany(
+        f"INSERT OR REPLACE INTO week_stats (start, end, {', '.join(STAT_FIELDS)}) "
+        f"VALUES ({', '.join('?' * (len(STAT_FIELDS) + 2))})",
+        [
+            tuple(row[:2]) + tuple(None if pd.isna(v) else float(v) for v in row[2:])
+            for row in rows.itertuples(index=False, name=None)
+        ],
+    )
+
+
+def rebuild_stats():
+    """Пересчитать week_stats по всей истории (после ручной правки базы)"""
+    with transaction() as conn:
+        conn.execute("DELETE FROM week_stats")
+        first = conn.execute("SELECT start, end FROM weeks ORDER BY start, end LIMIT 1").fetchone()
+        if first:
+            _update_stats(conn, tuple(first))
+
+
+# Чтение
+
+def load_weeks(start=None, end=None):
+    """
+    Недели с накопленными агрегатами в порядке периодов (start/end — ISO-даты, фильтр по дате начала).
+    Столбцы: start, end (datetime), logistics, deductions, rows, source и поля STAT_FIELDS.
+    """
+    where, params = [], []
+    if start:
+        where.append("w.start >= ?")
+        params.append(start)
+    if end:
+        where.append("w.start <= ?")
+        params.append(end)
+    frame = pd.read_sql_query(
+        "SELECT w.start, w.end, w.logistics, w.deductions, w.rows, w.source, "
+        + ", ".join(f"s.{field}" for field in STAT_FIELDS)
+        + " FROM weeks w LEFT JOIN week_stats s ON s.start = w.start AND s.end = w.end"
+        + (" WHERE " + " AND ".join(where) if where else "")
+        + " ORDER BY w.start, w.end",
+        connect(), params=params,
+    )
+    frame['start'] = pd.to_datetime(frame['start'])
+    frame['end'] = pd.to_datetime(frame['end'])
+    return frame
+
+
+def metrics():
+    """
+    Итоги по всей истории одним запросом, в формате прежнего calculate_metrics:
+    {столбец: {total, average, max, min, count}, total_all, period, total_periods}.
+    """
+    row = connect().execute(
+        "SELECT COUNT(*), MIN(start), MAX(end), "
+        "SUM(logistics), AVG(logistics), MAX(logistics), MIN(logistics), "
+        "SUM(deductions), AVG(deductions), MAX(deductions), MIN(deductions) FROM weeks"
+    ).fetchone()
+    count = row[0]
+    if not count:
+        return {}
+    result = {}
+    for offset, column in ((3, LOGISTICS_COLUMN), (7, DEDUCTIONS_COLUMN)):
+        total, average, maximum, minimum = row[offset:offset + 4]
+        result[column] = {'total': total, 'average': average, 'max': maximum, 'min': minimum, 'count': count}
+    result['total_all'] = result[LOGISTICS_COLUMN]['total'] + result[DEDUCTIONS_COLUMN]['total']
+    first = datetime.strptime(row[1], '%Y-%m-%d')
+    last = datetime.strptime(row[2], '%Y-%m-%d')
+    result['period'] = f"{first.strftime('%d.%m.%Y')} - {last.strftime('%d.%m.%Y')}"
+    result['total_periods'] = count
+    return result
+
+
+def sources():
+    """Загруженные отчёты (новые сверху)"""
+    return pd.read_sql_query(
+        "SELECT name, weeks, ingested_at FROM sources ORDER BY ingested_at DESC, rowid DESC", connect()
+    )
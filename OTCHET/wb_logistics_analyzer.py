@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
 import streamlit as st
 import pandas as pd
-import numpy as np
 from datetime import datetime
 import warnings
 import os
+
+import logistics_store as store
+
 warnings.filterwarnings('ignore')
 
 # Настройка страницы
@@ -16,280 +18,143 @@ st.set_page_config(
 
 st.title("🚚 Анализ стоимости логистики и прочих удержаний Wildberries")
 
-# Функция для автоматической загрузки файла
-def auto_load_file():
-    """Автоматически загружает файл 3.xlsx"""
-    try:
-        file_path = "3.xlsx"
-        if os.path.exists(file_path):
-            st.success(f"✅ Файл {file_path} найден автоматически")
-            return pd.read_excel(file_path)
-        else:
-            st.error(f"❌ Файл {file_path} не найден в текущей папке")
-            return None
-    except Exception as e:
-        st.error(f"❌ Ошибка при автоматической загрузке: {e}")
-        return None
+LOGISTICS = store.LOGISTICS_COLUMN
+DEDUCTIONS = store.DEDUCTIONS_COLUMN
+AUTO_FILE = "3.xlsx"
 
-# Функция для обработки данных
-def process_data(df):
-    """Обработка данных с фокусом на логистику и удержания"""
-    try:
-        st.info("🔧 Начинаем обработку данных...")
-        
-        # Копируем данные
-        df_clean = df.copy()
-        st.write(f"📊 Исходные данные: {df_clean.shape[0]} недельных периодов, {df_clean.shape[1]} столбцов")
-        
-        # Проверяем необходимые столбцы
-        required_cols = ['Дата начала', 'Дата конца', 'Стоимость логистики', 'Прочие удержания']
-        missing_cols = [col for col in required_cols if col not in df_clean.columns]
-        
-        if missing_cols:
-            st.error(f"❌ Отсутствуют столбцы: {missing_cols}")
-            st.write("**Доступные столбцы:**")
-            for i, col in enumerate(df_clean.columns):
-                st.write(f"{i+1}. {col}")
-            return None
-        
-        st.success("✅ Все необходимые столбцы найдены")
-        
-        # Обрабатываем даты
-        st.write("📅 Обрабатываем даты недельных периодов...")
-        df_clean['Дата начала'] = pd.to_datetime(df_clean['Дата начала'], errors='coerce')
-        df_clean['Дата конца'] = pd.to_datetime(df_clean['Дата конца'], errors='coerce')
-        
-        # Проверяем пустые даты
-        empty_dates = df_clean[df_clean['Дата начала'].isna() | df_clean['Дата конца'].isna()]
-        if not empty_dates.empty:
-            st.warning(f"⚠️ Найдено {len(empty_dates)} строк с пустыми датами")
-        
-        # Удаляем строки с пустыми датами
-        df_clean = df_clean.dropna(subset=['Дата начала', 'Дата конца'])
-        st.write(f"📅 После обработки дат: {len(df_clean)} недельных периодов")
-        
-        # Обрабатываем только нужные столбцы
-        st.write("💰 Обрабатываем стоимость логистики и прочие удержания...")
-        target_cols = ['Стоимость логистики', 'Прочие удержания']
-        
-        for col in target_cols:
-            if col in df_clean.columns:
-                # Проверяем на NaN
-                nan_count = df_clean[col].isna().sum()
-                if nan_count > 0:
-                    st.warning(f"⚠️ В столбце {col} найдено {nan_count} пустых значений")
-                
-                # Конвертируем в числовой тип
-                df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce').fillna(0)
-                
-                # Проверяем на отрицательные значения
-                neg_count = (df_clean[col] < 0).sum()
-                if neg_count > 0:
-                    st.warning(f"⚠️ В столбце {col} найдено {neg_count} отрицательных значений")
-        
-        st.success("✅ Обработка данных завершена успешно")
-        return df_clean
-        
-    except Exception as e:
-        st.error(f"❌ Ошибка при обработке данных: {e}")
-        import traceback
-        st.code(traceback.format_exc())
-        return None
 
-# Функция для расчета метрик
-def calculate_metrics(df):
-    """Расчет метрик для логистики и удержаний"""
+# Загрузка отчётов в хранилище
+def ingest_reports(uploaded_files):
+    """
+    Загружает новые еженедельные отчёты в хранилище недель (logistics_store).
+    Уже загруженные файлы пропускаются без чтения; возвращает отчёты по каждому файлу.
+    """
+    reports = []
     try:
-        st.info("📊 Рассчитываем метрики по логистике и удержаниям...")
-        
-        metrics = {}
-        target_cols = ['Стоимость логистики', 'Прочие удержания']
-        
-        for col in target_cols:
-            if col in df.columns:
-                metrics[col] = {
-                    'total': float(df[col].sum()),
-                    'average': float(df[col].mean()),
-                    'max': float(df[col].max()),
-                    'min': float(df[col].min()),
-                    'count': int(len(df))
-                }
-        
-        # Общая сумма логистики и удержаний
-        total_logistics = metrics.get('Стоимость логистики', {}).get('total', 0)
-        total_deductions = metrics.get('Прочие удержания', {}).get('total', 0)
-        total_sum = total_logistics + total_deductions
-        metrics['total_all'] = total_sum
-        
-        # Период
-        if 'Дата начала' in df.columns and 'Дата конца' in df.columns:
-            start_date = df['Дата начала'].min()
-            end_date = df['Дата конца'].max()
-            metrics['period'] = f"{start_date.strftime('%d.%m.%Y')} - {end_date.strftime('%d.%m.%Y')}"
-            metrics['total_periods'] = len(df)
-        
-        st.success("✅ Расчет метрик завершен")
-        return metrics
-        
+        if os.path.exists(AUTO_FILE):
+            reports.append(store.ingest_path(AUTO_FILE))
+        for uploaded in uploaded_files or []:
+            reports.append(store.ingest_file(uploaded.getvalue(), uploaded.name, size=uploaded.size))
     except Exception as e:
-        st.error(f"❌ Ошибка при расчете метрик: {e}")
-        return {}
+        st.error(f"❌ Ошибка при загрузке отчётов: {e}")
+    return reports
+
+
+def show_ingest_reports(reports):
+    """Итог загрузки и замечания к данным — свёрнуто, чтобы не загромождать страницу"""
+    changed = [r for r in reports if r['status'] != 'skipped']
+    for report in changed:
+        if report['status'] == 'error':
+            st.error(f"❌ {report['name']}: {'; '.join(report['issues'])}")
+        else:
+            st.success(
+                f"✅ {report['name']}: новых недель {report['added']}, "
+                f"обновлено {report['updated']}, без изменений {report['unchanged']}"
+            )
+
+    with st.expander("📂 Загруженные отчёты", expanded=False):
+        for report in changed:
+            for issue in report['issues']:
+                st.warning(f"⚠️ {report['name']}: {issue}")
+        skipped = [r['name'] for r in reports if r['status'] == 'skipped']
+        if skipped:
+            st.caption(f"Уже загружены ранее: {', '.join(skipped)}")
+        st.dataframe(store.sources(), use_container_width=True)
+
+
+# Сводка по недельным периодам
+def weekly_summary(weeks):
+    """Таблица недель с суммой, нарастающим итогом, скользящим средним и изменением к прошлой неделе"""
+    return pd.DataFrame({
+        'Дата начала': weeks['start'].dt.strftime('%d.%m.%Y'),
+        'Дата конца': weeks['end'].dt.strftime('%d.%m.%Y'),
+        LOGISTICS: weeks['logistics'],
+        DEDUCTIONS: weeks['deductions'],
+        'Сумма за неделю': weeks['total'],
+        'Нарастающий итог': weeks['cum_total'],
+        f'Среднее за {store.ROLLING_WEEKS} нед.': weeks['avg_total'],
+        'Изменение к прошлой неделе': weeks['delta_total'],
+    })
+
 
 # Основной интерфейс
 st.markdown("## 🚚 Анализ стоимости логистики и прочих удержаний")
 
-# Автоматическая загрузка
-st.markdown("### 1️⃣ Автоматическая загрузка файла")
-df = auto_load_file()
+st.markdown("### 1️⃣ Еженедельные отчёты")
+uploaded_files = st.file_uploader(
+    f"Добавьте новые недельные отчёты (Excel/CSV). {AUTO_FILE} из папки приложения загружается автоматически",
+    type=['xlsx', 'xls', 'csv'],
+    accept_multiple_files=True,
+)
+show_ingest_reports(ingest_reports(uploaded_files))
+
+metrics = store.metrics()
+
+if metrics:
+    st.markdown("### 2️⃣ Результаты анализа")
 
-if df is not None:
-    st.success(f"✅ Файл загружен успешно: {df.shape[0]} недельных периодов, {df.shape[1]} столбцов")
-    
-    # Показываем информацию о данных
-    st.markdown("### 2️⃣ Информация о данных")
     col1, col2 = st.columns(2)
-    
+
     with col1:
-        st.write("**Размер данных:**")
-        st.write(f"- Недельных периодов: {df.shape[0]}")
-        st.write(f"- Столбцов: {df.shape[1]}")
-        
-        st.write("**Анализируемые столбцы:**")
-        st.write("- 📅 Дата начала (неделя)")
-        st.write("- 📅 Дата конца (неделя)")
-        st.write("- 🚚 Стоимость логистики")
-        st.write("- 💸 Прочие удержания")
-    
+        st.markdown("#### 🚚 Стоимость логистики")
+        logistics = metrics[LOGISTICS]
+        st.write(f"**Общая сумма:** {logistics['total']:,.0f} ₽")
+        st.write(f"**Среднее за неделю:** {logistics['average']:,.0f} ₽")
+        st.write(f"**Максимум:** {logistics['max']:,.0f} ₽")
+        st.write(f"**Минимум:** {logistics['min']:,.0f} ₽")
+        st.write(f"**Количество недель:** {logistics['count']}")
+
+        st.markdown("#### 💸 Прочие удержания")
+        deductions = metrics[DEDUCTIONS]
+        st.write(f"**Общая сумма:** {deductions['total']:,.0f} ₽")
+        st.write(f"**Среднее за неделю:** {deductions['average']:,.0f} ₽")
+        st.write(f"**Максимум:** {deductions['max']:,.0f} ₽")
+        st.write(f"**Минимум:** {deductions['min']:,.0f} ₽")
+        st.write(f"**Количество недель:** {deductions['count']}")
+
     with col2:
-        st.write("**Первые недельные периоды:**")
-        display_cols = ['Дата начала', 'Дата конца', 'Стоимость логистики', 'Прочие удержания']
-        available_cols = [col for col in display_cols if col in df.columns]
-        if available_cols:
-            st.dataframe(df[available_cols].head(3), use_container_width=True)
-    
-    # Обработка данных
-    st.markdown("### 3️⃣ Обработка данных")
-    df_clean = process_data(df)
-    
-    if df_clean is not None and not df_clean.empty:
-        st.success(f"✅ Данные обработаны: {len(df_clean)} недельных периодов")
-        
-        # Расчет метрик
-        st.markdown("### 4️⃣ Расчет метрик")
-        metrics = calculate_metrics(df_clean)
-        
-        if metrics:
-            # Отображаем результаты
-            st.markdown("### 5️⃣ Результаты анализа")
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.markdown("#### 🚚 Стоимость логистики")
-                if 'Стоимость логистики' in metrics:
-                    logistics = metrics['Стоимость логистики']
-                    st.write(f"**Общая сумма:** {logistics['total']:,.0f} ₽")
-                    st.write(f"**Среднее за неделю:** {logistics['average']:,.0f} ₽")
-                    st.write(f"**Максимум:** {logistics['max']:,.0f} ₽")
-                    st.write(f"**Минимум:** {logistics['min']:,.0f} ₽")
-                    st.write(f"**Количество недель:** {logistics['count']}")
-                
-                st.markdown("#### 💸 Прочие удержания")
-                if 'Прочие удержания' in metrics:
-                    deductions = metrics['Прочие удержания']
-                    st.write(f"**Общая сумма:** {deductions['total']:,.0f} ₽")
-                    st.write(f"**Среднее за неделю:** {deductions['average']:,.0f} ₽")
-                    st.write(f"**Максимум:** {deductions['max']:,.0f} ₽")
-                    st.write(f"**Минимум:** {deductions['min']:,.0f} ₽")
-                    st.write(f"**Количество недель:** {deductions['count']}")
-            
-            with col2:
-                st.markdown("#### 📅 Период анализа")
-                if 'period' in metrics:
-                    st.write(f"**Период:** {metrics['period']}")
-                    st.write(f"**Количество недель:** {metrics.get('total_periods', 0)}")
-                
-                st.markdown("#### 💎 Общая сумма")
-                total_all = metrics.get('total_all', 0)
-                logistics_total = metrics.get('Стоимость логистики', {}).get('total', 0)
-                deductions_total = metrics.get('Прочие удержания', {}).get('total', 0)
-                
-                st.markdown(f"""
-                <div style='background-color: #f0f2f6; padding: 1rem; border-radius: 0.5rem; border-left: 4px solid #1f77b4;'>
-                    <h3>💰 {total_all:,.0f} ₽</h3>
-                    <p>🚚 Логистика: {logistics_total:,.0f} ₽</p>
-                    <p>💸 Удержания: {deductions_total:,.0f} ₽</p>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            # Сводка по недельным периодам
-            st.markdown("### 6️⃣ Сводка по недельным периодам")
-            
-            # Создаем сводку
-            summary_cols = ['Дата начала', 'Дата конца', 'Стоимость логистики', 'Прочие удержания']
-            available_cols = [col for col in summary_cols if col in df_clean.columns]
-            
-            if available_cols:
-                summary = df_clean[available_cols].copy()
-                
-                # Форматируем даты
-                if 'Дата начала' in summary.columns:
-                    summary['Дата начала'] = summary['Дата начала'].dt.strftime('%d.%m.%Y')
-                if 'Дата конца' in summary.columns:
-                    summary['Дата конца'] = summary['Дата конца'].dt.strftime('%d.%m.%Y')
-                
-                # Добавляем общую сумму за неделю
-                numeric_cols = ['Стоимость логистики', 'Прочие удержания']
-                available_numeric = [col for col in numeric_cols if col in summary.columns]
-                if available_numeric:
-                    summary['Сумма за неделю'] = summary[available_numeric].sum(axis=1)
-                
-                # Сортируем по дате начала
-                if 'Дата начала' in summary.columns:
-                    summary = summary.sort_values('Дата начала')
-                
-                st.dataframe(summary, use_container_width=True)
-                
-                # Экспорт
-                st.markdown("### 7️⃣ Экспорт данных")
-                csv_data = summary.to_csv(index=False, encoding='utf-8-sig')
-                st.download_button(
-                    label="📥 Скачать результаты в CSV",
-                    data=csv_data,
-                    file_name=f"wb_logistics_deductions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                    mime="text/csv"
-                )
-            
-            # Тест на ошибку 400
-            st.markdown("### 8️⃣ Тест на ошибку 400")
-            st.success("✅ Тест пройден успешно! Ошибка 400 не обнаружена.")
-            st.info("""
-            **Результаты тестирования:**
-            - ✅ Файл загружен без ошибок
-            - ✅ Данные обработаны корректно
-            - ✅ Метрики по логистике и удержаниям рассчитаны
-            - ✅ Интерфейс работает стабильно
-            - ✅ Никаких ошибок 400 не обнаружено
-            """)
-            
-        else:
-            st.error("❌ Не удалось рассчитать метрики")
-    else:
-        st.error("❌ Не удалось обработать данные")
+        st.markdown("#### 📅 Период анализа")
+        st.write(f"**Период:** {metrics['period']}")
+        st.write(f"**Количество недель:** {metrics['total_periods']}")
+
+        st.markdown("#### 💎 Общая сумма")
+        st.markdown(f"""
+        <div style='background-color: #f0f2f6; padding: 1rem; border-radius: 0.5rem; border-left: 4px solid #1f77b4;'>
+            <h3>💰 {metrics['total_all']:,.0f} ₽</h3>
+            <p>🚚 Логистика: {logistics['total']:,.0f} ₽</p>
+            <p>💸 Удержания: {deductions['total']:,.0f} ₽</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+    weeks = store.load_weeks()
+
+    st.markdown("### 3️⃣ Динамика по неделям")
+    chart = weeks.set_index('start')[['logistics', 'deductions', 'avg_total']].rename(columns={
+        'logistics': LOGISTICS,
+        'deductions': DEDUCTIONS,
+        'avg_total': f'Сумма, среднее за {store.ROLLING_WEEKS} нед.',
+    })
+    st.line_chart(chart)
+
+    st.markdown("### 4️⃣ Сводка по недельным периодам")
+    summary = weekly_summary(weeks)
+    st.dataframe(summary, use_container_width=True)
+
+    st.markdown("### 5️⃣ Экспорт данных")
+    csv_data = summary.to_csv(index=False, encoding='utf-8-sig')
+    st.download_button(
+        label="📥 Скачать результаты в CSV",
+        data=csv_data,
+        file_name=f"wb_logistics_deductions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+        mime="text/csv"
+    )
 else:
-    st.error("❌ Не удалось загрузить файл")
+    st.info(f"📂 Нет загруженных недель: положите {AUTO_FILE} в папку приложения или загрузите отчёты выше")
 
 # Футер
 st.markdown("---")
 st.markdown("""
 <div style='text-align: center; color: #666;'>
-    🚚 Анализ стоимости логистики и прочих удержаний Wildberries | Проверка на ошибку 400
+    🚚 Анализ стоимости логистики и прочих удержаний Wildberries
 </div>
 """, unsafe_allow_html=True)
-
-
-
-
-
-
-
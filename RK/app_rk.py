@@ -16,6 +16,8 @@ RK_DIR = os.path.dirname(os.path.abspath(__file__))
 UPLOADS_DIR = os.path.join(RK_DIR, "uploads")
 LAST_UPLOAD_PATH = os.path.join(UPLOADS_DIR, "last_upload.xlsx")
 
+CAMPAIGNS_DIR = os.path.join(UPLOADS_DIR, "campaigns")
+
 from calc import (
     parse_excel,
     calculate_period,
@@ -30,16 +32,28 @@ from calc import (
     aggregate_for_calculator,
     day_for_calculator,
 )
+from campaign_store import (
+    CampaignStore,
+    breakeven_targets,
+    evaluate,
+    filter_period,
+    group_kpis,
+    kpis as campaign_kpis,
+    records,
+)
 
 st.set_page_config(page_title="Реклама маркетплейса RK", layout="wide", initial_sidebar_state="expanded")
 
 # Session state для загруженных данных
 if "rk_days" not in st.session_state:
     st.session_state.rk_days = []
-if "rk_details" not in st.session_state:
-    st.session_state.rk_details = {}
 if "rk_filename" not in st.session_state:
     st.session_state.rk_filename = None
+# Хранилище кампаний пересобирается только при смене набора загруженных файлов
+if "rk_store" not in st.session_state:
+    st.session_state.rk_store = CampaignStore()
+if "rk_files" not in st.session_state:
+    st.session_state.rk_files = None
 
 # Загрузка сохранённого состояния калькулятора (для аналитики и дефолтов виджетов)
 CALC_STATE_PATH = os.path.join(UPLOADS_DIR, "calculator_state.json")
@@ -81,61 +95,88 @@ def _fmt_num(v, decimals=0):
     return f"{v:,.{decimals}f}".replace(",", " ")
 
 
-# --- Сайдбар: загрузка файла ---
+# --- Сайдбар: загрузка файлов ---
 st.sidebar.header("📁 Данные")
-uploaded = st.sidebar.file_uploader(
-    "Загрузить Excel отчёт (раздел «По дням»)",
+uploaded_files = st.sidebar.file_uploader(
+    "Загрузить Excel отчёты (раздел «По дням»), по файлу на кампанию",
     type=["xlsx", "xls"],
     key="rk_upload",
+    accept_multiple_files=True,
 )
-if uploaded:
-    try:
-        days, details = parse_excel(uploaded)
-        st.session_state.rk_days = days
-        st.session_state.rk_details = details
-        st.session_state.rk_filename = uploaded.name
-        # Сохраняем файл на диск
-        os.makedirs(UPLOADS_DIR, exist_ok=True)
-        ext = ".xlsx" if (uploaded.name or "").lower().endswith(".xlsx") else ".xls"
-        path = os.path.join(UPLOADS_DIR, "last_upload" + ext)
-        with open(path, "wb") as f:
-            f.write(uploaded.getvalue())
-        st.sidebar.success(f"Загружено: {uploaded.name}, дней: {len(days)}")
-    except Exception as e:
-        st.sidebar.error(f"Ошибка: {e}")
-        st.session_state.rk_days = []
-        st.session_state.rk_details = {}
-        st.session_state.rk_filename = None
+if uploaded_files:
+    signature = tuple((f.name, f.size) for f in uploaded_files)
+    if signature != st.session_state.rk_files:
+        store = CampaignStore()
+        errors = []
+        # Сохраняем файлы на диск (прежний набор кампаний заменяется)
+        os.makedirs(CAMPAIGNS_DIR, exist_ok=True)
+        for name in os.listdir(CAMPAIGNS_DIR):
+            os.remove(os.path.join(CAMPAIGNS_DIR, name))
+        for f in uploaded_files:
+            try:
+                days, details = parse_excel(f)
+                store.add(f.name, days, details)
+                with open(os.path.join(CAMPAIGNS_DIR, os.path.basename(f.name)), "wb") as out:
+                    out.write(f.getvalue())
+            except Exception as e:
+                errors.append(f"{f.name}: {e}")
+        st.session_state.rk_store = store
+        st.session_state.rk_files = signature
+        st.session_state.rk_upload_errors = errors
+    for err in st.session_state.get("rk_upload_errors", []):
+        st.sidebar.error(f"Ошибка: {err}")
+    if st.session_state.rk_store.campaigns:
+        st.sidebar.success(
+            f"Загружено кампаний: {len(st.session_state.rk_store.campaigns)}, дней: {len(st.session_state.rk_store.days)}"
+        )
 else:
-    # Подгрузка последнего сохранённого файла, если нет новой загрузки
-    if not st.session_state.rk_days and os.path.isdir(UPLOADS_DIR):
-        for name in ("last_upload.xlsx", "last_upload.xls"):
-            path = os.path.join(UPLOADS_DIR, name)
-            if os.path.isfile(path):
-                try:
-                    with open(path, "rb") as f:
-                        days, details = parse_excel(f)
-                    st.session_state.rk_days = days
-                    st.session_state.rk_details = details
-                    st.session_state.rk_filename = name
-                    break
-                except Exception:
-                    pass
-    if st.session_state.rk_filename:
-        st.sidebar.info(f"Текущий файл: {st.session_state.rk_filename}")
-    else:
+    # Подгрузка последних сохранённых файлов, если нет новой загрузки
+    if not st.session_state.rk_store.campaigns and os.path.isdir(UPLOADS_DIR):
+        paths = []
+        if os.path.isdir(CAMPAIGNS_DIR):
+            paths = [os.path.join(CAMPAIGNS_DIR, name) for name in sorted(os.listdir(CAMPAIGNS_DIR))]
+        if not paths:
+            # Файл из прежней версии приложения (одна кампания)
+            paths = [p for p in (os.path.join(UPLOADS_DIR, "last_upload.xlsx"), os.path.join(UPLOADS_DIR, "last_upload.xls")) if os.path.isfile(p)][:1]
+        for path in paths:
+            try:
+                with open(path, "rb") as f:
+                    days, details = parse_excel(f)
+                st.session_state.rk_store.add(os.path.basename(path), days, details)
+            except Exception:
+                pass
+    if not st.session_state.rk_store.campaigns:
         st.sidebar.info("Загрузите xlsx/xls с отчётом WB «По дням»")
 
+campaigns_all = st.session_state.rk_store.campaigns
+selected_campaigns = campaigns_all
+if len(campaigns_all) > 1:
+    selected_campaigns = st.sidebar.multiselect(
+        "Кампании", campaigns_all, default=campaigns_all, key="rk_campaigns",
+        help="Несколько кампаний объединяются по дате: показы, расходы, корзины и заказы суммируются.",
+    ) or campaigns_all
+# Одна кампания считается словарями calc.py: на сотнях дней DataFrame медленнее прямого прохода.
+# Хранилище нужно, когда кампаний несколько (объединение по дате, KPI по кампаниям).
+single_campaign = len(selected_campaigns) == 1
+if single_campaign:
+    days_one, details_one = st.session_state.rk_store.report(selected_campaigns[0])
+    st.session_state.rk_days = days_one
+elif selected_campaigns:
+    days_frame_all = st.session_state.rk_store.daily(selected_campaigns)
+    st.session_state.rk_days = st.session_state.rk_store.daily_records(selected_campaigns)
+else:
+    st.session_state.rk_days = []
+st.session_state.rk_filename = ", ".join(selected_campaigns) or None
+if st.session_state.rk_filename and not uploaded_files:
+    st.sidebar.info(f"Текущие файлы: {st.session_state.rk_filename}")
+
 # --- Табы ---
 tab_analytics, tab_calc, tab_planner = st.tabs(["📊 Аналитика по дням", "🧮 Калькулятор метрик", "🎯 Планировщик продаж"])
 
 # ========== Вкладка: Аналитика по дням ==========
 with tab_analytics:
     st.header("Аналитика по дням")
-    days_all = st.session_state.rk_days
-    details_all = st.session_state.rk_details
-
-    if not days_all:
+    if not st.session_state.rk_days:
         st.info("Загрузите Excel-отчёт в боковой панели, чтобы увидеть аналитику по дням.")
     else:
         period_options = {"all": "Весь период", "last7": "Последние 7 дней", "last14": "Последние 14 дней", "last30": "Последние 30 дней", "custom": "Произвольный"}
@@ -148,7 +189,6 @@ with tab_analytics:
             start_date = start_date.strftime("%Y-%m-%d")
             end_date = end_date.strftime("%Y-%m-%d")
 
-        filtered = filter_days_by_period(days_all, period=period_select, start_date=start_date, end_date=end_date)
         # Галочки: исключить ближайший день и/или дни без рекламы из расчёта
         col_ex1, col_ex2 = st.columns(2)
         with col_ex1:
@@ -163,22 +203,6 @@ with tab_analytics:
                 value=False,
                 key="rk_exclude_no_ad_days",
             )
-        if exclude_last_day and filtered:
-            def _parse_date(d):
-                s = (d.get("date") or "")
-                parts = s.split(".")
-                if len(parts) != 3:
-                    return None
-                try:
-                    return datetime(int(parts[2]), int(parts[1]), int(parts[0])).date()
-                except (ValueError, IndexError):
-                    return None
-            dates_parsed = [(d, _parse_date(d)) for d in filtered]
-            max_dt = max((dt for _, dt in dates_parsed if dt is not None), default=None)
-            if max_dt is not None:
-                filtered = [d for d, dt in dates_parsed if dt != max_dt]
-        if exclude_no_ad_days and filtered:
-            filtered = [d for d in filtered if (d.get("cost") or 0) > 0]
         # Тумблер: за последние 7 дней заказы подгружаются с задержкой — конверсия корзина→заказ и доли РК/органика по заказам неверные. Можно не использовать их и брать параметры из калькулятора.
         use_conversions_last7 = st.checkbox(
             "Учитывать фактические конверсии за последние 7 дней (данные по заказам могут быть неполными)",
@@ -196,48 +220,65 @@ with tab_analytics:
         # Целевой CPL с органикой = прибыль × (корзина→заказ) × (выкуп) × (ad_carts_share/ad_share). По каждому дню — конверсии и доли из данных дня (или из параметров для последних 7 дней).
         profit = st.session_state.get("rk_calc_profit_now", 500)
         purchase_rate = st.session_state.get("rk_calc_purchase_rate", 20)
-        targets = []
-        for d in filtered:
-            s = (d.get("date") or "")
-            parts = s.split(".")
-            dt_day = None
-            if len(parts) == 3:
-                try:
-                    dt_day = datetime(int(parts[2]), int(parts[1]), int(parts[0])).date()
-                except (ValueError, IndexError):
-                    pass
-            is_last7 = dt_day and (today - dt_day).days <= 7
-            use_params = is_last7 and not use_conversions_last7
-            carts_total = d.get("carts_total") or 0
-            carts_rk = d.get("carts_rk") or 0
-            orders = d.get("orders") or 0
-            orders_rk = d.get("orders_rk") or 0
-            if use_params:
-                # Для последних 7 дней при выключенном тумблере — конверсии и доли из параметров (калькулятор).
-                if carts_total > 0:
-                    cart_to_order_total_d = param_cart_to_order
-                    ad_carts_share_d = param_ad_carts_share
-                    ad_share_d = param_ad_share
-                    targets.append(breakeven_cpl(profit, cart_to_order_total_d, purchase_rate, ad_carts_share_d, ad_share_d))
+
+        def _day_targets(frame):
+            # Для последних 7 дней при выключенном тумблере — конверсии и доли из параметров (калькулятор)
+            days_ago = (pd.Timestamp(today) - frame["dt"]).dt.days
+            use_params = (days_ago <= 7).to_numpy() & (not use_conversions_last7)
+            return breakeven_targets(
+                frame, target_cpl, profit, purchase_rate, use_params,
+                cart_to_order=param_cart_to_order, ad_carts_share=param_ad_carts_share, ad_share=param_ad_share,
+            )
+
+        def _parse_date(d):
+            parts = (d.get("date") or "").split(".")
+            if len(parts) != 3:
+                return None
+            try:
+                return datetime(int(parts[2]), int(parts[1]), int(parts[0])).date()
+            except (ValueError, IndexError):
+                return None
+
+        if single_campaign:
+            filtered = filter_days_by_period(days_one, period=period_select, start_date=start_date, end_date=end_date)
+            dates_parsed = [(d, _parse_date(d)) for d in filtered]
+            if exclude_last_day and filtered:
+                max_dt = max((dt for _, dt in dates_parsed if dt is not None), default=None)
+                if max_dt is not None:
+                    dates_parsed = [(d, dt) for d, dt in dates_parsed if dt != max_dt]
+            if exclude_no_ad_days:
+                dates_parsed = [(d, dt) for d, dt in dates_parsed if (d.get("cost") or 0) > 0]
+            targets = []
+            for d, dt_day in dates_parsed:
+                use_params = dt_day is not None and (today - dt_day).days <= 7 and not use_conversions_last7
+                carts_total = d.get("carts_total") or 0
+                orders = d.get("orders") or 0
+                if use_params and carts_total > 0:
+                    # Для последних 7 дней при выключенном тумблере — конверсии и доли из параметров (калькулятор)
+                    targets.append(breakeven_cpl(profit, param_cart_to_order, purchase_rate, param_ad_carts_share, param_ad_share))
+                elif not use_params and carts_total > 0 and orders > 0:
+                    targets.append(breakeven_cpl(
+                        profit, orders / carts_total * 100, purchase_rate,
+                        (d.get("carts_rk") or 0) / carts_total * 100, (d.get("orders_rk") or 0) / orders * 100,
+                    ))
                 else:
                     targets.append(target_cpl)
-            elif carts_total > 0 and orders > 0:
-                cart_to_order_total_d = orders / carts_total * 100
-                ad_carts_share_d = carts_rk / carts_total * 100
-                ad_share_d = orders_rk / orders * 100
-                targets.append(breakeven_cpl(profit, cart_to_order_total_d, purchase_rate, ad_carts_share_d, ad_share_d))
-            else:
-                targets.append(target_cpl)
-        filtered = [evaluate_day(d, t) for d, t in zip(filtered, targets)]
-        avg_target_cpl = (sum(targets) / len(targets)) if targets else target_cpl
-        # Сортировка по дате (новые сверху)
-        def _sort_key(d):
-            s = d.get("date") or "00.00.0000"
-            parts = s.split(".")
-            if len(parts) != 3:
-                return (0, 0, 0)
-            return (int(parts[2]), int(parts[1]), int(parts[0]))
-        filtered.sort(key=_sort_key, reverse=True)
+            filtered = [evaluate_day(d, t) for (d, _), t in zip(dates_parsed, targets)]
+            avg_target_cpl = (sum(targets) / len(targets)) if targets else target_cpl
+            # Сортировка по дате (новые сверху)
+            filtered.sort(key=lambda d: _parse_date(d) or datetime.min.date(), reverse=True)
+        else:
+            period_frame = filter_period(days_frame_all, period_select, start_date, end_date)
+            if exclude_last_day and not period_frame.empty:
+                period_frame = period_frame[period_frame["dt"] != period_frame["dt"].max()]
+            if exclude_no_ad_days and not period_frame.empty:
+                period_frame = period_frame[period_frame["cost"] > 0]
+            targets = _day_targets(period_frame)
+            evaluated = evaluate(period_frame, targets)
+            avg_target_cpl = float(targets.mean()) if len(targets) else target_cpl
+            # Сортировка по дате (новые сверху)
+            evaluated = evaluated.sort_values("dt", ascending=False, kind="stable", na_position="last")
+            filtered = records(evaluated)
 
         st.caption(f"Показано дней: {len(filtered)} ({period_options.get(period_select, period_select)})")
         with st.expander("Как считается целевой CPL по каждому дню"):
@@ -268,7 +309,7 @@ with tab_analytics:
 """)
 
         if filtered:
-            kpis = aggregate_daily_kpis(filtered, avg_target_cpl)
+            kpis = aggregate_daily_kpis(filtered, avg_target_cpl) if single_campaign else campaign_kpis(evaluated)
             st.subheader("KPI: реклама и органика")
             trans_ratio = (kpis.get("totalTransitions", 0) / kpis.get("totalTransitionsAll", 1) * 100) if kpis.get("totalTransitionsAll") else 0
             total_orders_all_kpi = kpis.get("totalOrders", 0) or (kpis.get("totalOrdersRk", 0) + kpis.get("totalOrdersOrganic", 0))
@@ -292,6 +333,27 @@ with tab_analytics:
             kpi_df = pd.DataFrame(kpi_rows, columns=["Метрика", "Реклама (РК)", "Органика", "Соотношение"])
             st.table(kpi_df)
 
+            if not single_campaign:
+                # KPI каждой кампании за те же даты — одной групповой агрегацией
+                st.subheader("KPI по кампаниям")
+                campaign_days = st.session_state.rk_store.days
+                campaign_days = campaign_days[
+                    campaign_days["campaign"].isin(selected_campaigns) & campaign_days["date"].isin(evaluated["date"])
+                ]
+                by_campaign = group_kpis(evaluate(campaign_days, _day_targets(campaign_days)), by="campaign")
+                st.dataframe(pd.DataFrame({
+                    "Кампания": by_campaign.index,
+                    "Бюджет ₽": by_campaign["totalCost"].round().astype(int).to_numpy(),
+                    "Показы РК": by_campaign["totalShows"].astype(int).to_numpy(),
+                    "Корзины РК": by_campaign["totalCartsRk"].astype(int).to_numpy(),
+                    "Заказы РК": by_campaign["totalOrdersRk"].astype(int).to_numpy(),
+                    "CPM ₽": by_campaign["avgCpm"].round().astype(int).to_numpy(),
+                    "CPC ₽": by_campaign["avgCpc"].round(1).to_numpy(),
+                    "CPL общий ₽": by_campaign["avgCplTotal"].round(1).to_numpy(),
+                    "Эфф.% (CPL)": by_campaign["totalEfficiency"].round().astype(int).to_numpy(),
+                    "Рейтинг (0–100)": by_campaign["avgRatingScore"].round().astype(int).to_numpy(),
+                }), use_container_width=True, hide_index=True)
+
             # Окупаемость рекламы с учётом органики: заказы РК + органика, прибыль, ROMI
             st.subheader("Окупаемость рекламы")
             total_cost = kpis.get("totalCost") or 0
@@ -539,8 +601,10 @@ with tab_analytics:
                 st.caption("Нет общих рекомендаций по периоду.")
 
             # Сравнение типов рекламы (ниже рекомендаций)
-            dates_in_period = [d["date"] for d in filtered]
-            by_type = aggregate_by_type(details_all, dates_in_period=dates_in_period)
+            if single_campaign:
+                by_type = aggregate_by_type(details_one, dates_in_period=[d["date"] for d in filtered])
+            else:
+                by_type = st.session_state.rk_store.by_type(evaluated["date"], selected_campaigns)
             st.subheader("Сравнение типов рекламы")
             type_cols = st.columns(max(len(by_type), 1))
             for idx, (tkey, t) in enumerate(by_type.items()):
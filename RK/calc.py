@@ -4,7 +4,10 @@
 Парсинг Excel, формулы калькулятора, оценка по дням. Без UI.
 """
 from __future__ import division
+import hashlib
+import io
 import re
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional, Tuple
 
@@ -80,19 +83,52 @@ def _parse_excel_date(value) -> str:
     return s
 
 
+# Кеш разбора отчётов по хешу содержимого файла (повторные запуски скрипта Streamlit не читают Excel заново)
+PARSE_CACHE_SIZE = 32
+_PARSE_CACHE = OrderedDict()
+
+
+def _read_bytes(file_or_path) -> bytes:
+    if hasattr(file_or_path, "getvalue"):
+        return file_or_path.getvalue()
+    if hasattr(file_or_path, "read"):
+        data = file_or_path.read()
+        if hasattr(file_or_path, "seek"):
+            file_or_path.seek(0)
+        return data
+    with open(file_or_path, "rb") as f:
+        return f.read()
+
+
 def parse_excel(file_or_path) -> Tuple[List[Dict[str, Any]], Dict[str, List[Dict]]]:
     """
     Парсит Excel-отчёт WB с разделом «По дням».
+    Результат кешируется по SHA-1 содержимого файла.
     :return: (список дней [{"date", "shows", "cpm", ...}], details по дате -> список по типам рекламы)
     """
     if pd is None:
         raise ImportError("pandas required for parse_excel")
-    if hasattr(file_or_path, "read"):
-        df_raw = pd.read_excel(file_or_path, header=None)
+    data = _read_bytes(file_or_path)
+    key = hashlib.sha1(data).hexdigest()
+    if key in _PARSE_CACHE:
+        _PARSE_CACHE.move_to_end(key)
+        parsed, details = _PARSE_CACHE[key]
     else:
-        df_raw = pd.read_excel(file_or_path, header=None)
-    rows = df_raw.values.tolist()
+        parsed, details = _parse_report_rows(pd.read_excel(io.BytesIO(data), header=None).values.tolist())
+        _PARSE_CACHE[key] = (parsed, details)
+        if len(_PARSE_CACHE) > PARSE_CACHE_SIZE:
+            _PARSE_CACHE.popitem(last=False)
+    # Копии, чтобы правки вызывающего кода не портили кеш
+    return [dict(d) for d in parsed], {date: [dict(r) for r in rows] for date, rows in details.items()}
+
+
+def clear_parse_cache() -> None:
+    """Очистить кеш разобранных отчётов"""
+    _PARSE_CACHE.clear()
+
 
+def _parse_report_rows(rows) -> Tuple[List[Dict[str, Any]], Dict[str, List[Dict]]]:
+    """Разбор строк листа отчёта (pd.read_excel(..., header=None).values.tolist())"""
     start_row = -1
     for i, row in enumerate(rows):
         if row is None or len(row) == 0:
@@ -0,0 +1,451 @@
+# -*- coding: utf-8 -*-
+"""
+Колоночное хранилище рекламных кампаний RK (кампания × дата × тип рекламы).
+
+Дни всех загруженных отчётов лежат в одном DataFrame (строка — кампания и дата),
+детализация по типам рекламы — во втором (строка — кампания, дата и тип).
+Даты разбираются один раз при добавлении кампании, тип рекламы («поиск», «полки»,
+«каталог») определяется векторно тоже один раз.
+
+Фильтр периода, оценка дней, KPI-карточки и сравнение типов рекламы считаются
+групповыми агрегатами pandas/NumPy и дают те же числа, что filter_days_by_period,
+evaluate_day, aggregate_daily_kpis и aggregate_by_type из calc.py
+(сверка — scripts/bench/bench_rk_campaign_store.py).
+
+Таблицы собираются лениво: add только запоминает разобранный отчёт, а DataFrame
+всех кампаний строится одним проходом при первом обращении. KPI по группам
+считаются через np.bincount, а сравнение типов для небольших выборок (до
+DIRECT_MAX_ROWS строк) — прямым проходом по строкам, как в calc.py: на сотнях
+дней накладные расходы groupby больше самого расчёта. Одну кампанию app_rk.py
+считает словарями calc.py, хранилище нужно для нескольких.
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Поля дня из parse_excel (порядок как в отчёте)
+DAY_FIELDS = [
+    "shows", "totalShows", "cpm", "cpc", "cost", "carts_rk", "carts_total", "orders_rk", "orders",
+    "cpl_rk", "transitions", "totalTransitions", "drr_rk", "drr1", "drr2",
+]
+# Поля, которые при объединении кампаний по дате суммируются
+ADDITIVE_FIELDS = [
+    "shows", "totalShows", "cost", "carts_rk", "carts_total", "orders_rk", "orders",
+    "transitions", "totalTransitions",
+]
+# Поля, которые добавляет evaluate_day (порядок как в calc.evaluate_day)
+EVALUATED_FIELDS = [
+    "cplTotal", "targetCpl", "efficiency", "score", "rating",
+    "ctrRk", "showToCartRk", "clickToCartRk", "cartToOrderRk",
+    "ctrTotal", "showToCartTotal", "clickToCartTotal", "cartToOrderTotal",
+    "organicShows", "organicTransitions", "organicCarts", "organicOrders",
+    "ctrOrganic", "clickToCartOrganic", "cartToOrderOrganic",
+]
+DETAIL_FIELDS = ["shows", "cost", "carts", "transitions"]
+TYPE_KEYS = [("поиск", "search"), ("полки", "shelf"), ("каталог", "catalog")]
+# Оценка дня по баллам: [0, 20) — «Критично», [20, 40) — «Плохо» … [80, 100] — «Отлично»
+RATING_BOUNDS = np.array([20, 40, 60, 80])
+RATINGS = np.array(["Критично", "Плохо", "Средне", "Хорошо", "Отлично"], dtype=object)
+LAST_N_PERIODS = {"last7": 7, "last14": 14, "last30": 30}
+
+# До скольких строк детализации сравнение типов считается прямым проходом (как calc.py), а не groupby
+DIRECT_MAX_ROWS = 2000
+
+
+def _ratio(num, den, scale=1.0):
+    """num / den × scale там, где den > 0, иначе 0"""
+    num = np.asarray(num, dtype="float64")
+    den = np.asarray(den, dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den > 0, num / np.where(den > 0, den, 1.0) * scale, 0.0)
+
+
+def days_frame(days, campaign=""):
+    """
+    DataFrame дней из списка словарей parse_excel; dt — разобранная дата (NaT, если формат не dd.mm.yyyy).
+    campaign — имя кампании или массив имён по строкам.
+    """
+    frame = pd.DataFrame(list(days), columns=["date"] + DAY_FIELDS)
+    frame[DAY_FIELDS] = frame[DAY_FIELDS].apply(pd.to_numeric, errors="coerce").fillna(0.0).astype("float64")
+    frame["date"] = frame["date"].fillna("").astype(str)
+    frame.insert(0, "campaign", campaign)
+    frame.insert(2, "dt", pd.to_datetime(frame["date"], format="%d.%m.%Y", errors="coerce"))
+    return frame
+
+
+def details_frame(details, campaign=""):
+    """DataFrame детализации {дата: [строки по типам]} с ключом типа рекламы type_key"""
+    rows = [(date_key, r) for date_key, date_rows in details.items() for r in date_rows]
+    return _details_rows_frame(rows, campaign)
+
+
+def _details_rows_frame(rows, campaign=""):
+    """DataFrame детализации из пар (дата, строка типа); campaign — имя или массив имён по строкам"""
+    frame = pd.DataFrame([r for _, r in rows], columns=["type"] + DETAIL_FIELDS)
+    frame[DETAIL_FIELDS] = frame[DETAIL_FIELDS].apply(pd.to_numeric, errors="coerce").fillna(0.0).astype("float64")
+    typ = frame["type"].fillna("").astype(str).str.lower()
+    frame["type_key"] = np.select(
+        [typ.str.contains(word, regex=False) for word, _ in TYPE_KEYS],
+        [key for _, key in TYPE_KEYS],
+        default=typ.where(typ != "", "other"),
+    )
+    frame.insert(0, "campaign", campaign)
+    frame.insert(1, "date", [date_key for date_key, _ in rows])
+    return frame
+
+
+class CampaignStore:
+    """
+    Дни и детализация нескольких кампаний в двух DataFrame; кампания — имя файла отчёта.
+    Таблицы days и details строятся при первом обращении после add/remove.
+    """
+
+    def __init__(self):
+        self._reports = {}
+        self._frames = None
+        self._daily = {}
+
+    def add(self, campaign, days, details):
+        """Добавить (или заменить) кампанию по результату parse_excel"""
+        self._reports.pop(campaign, None)
+        self._reports[campaign] = (list(days), details)
+        self._frames = None
+        self._daily = {}
+
+    def remove(self, campaign):
+        if self._reports.pop(campaign, None) is not None:
+            self._frames = None
+            self._daily = {}
+
+    def report(self, campaign):
+        """Дни и детализация кампании в том виде, в каком их вернул parse_excel"""
+        return self._reports[campaign]
+
+    def _build(self):
+        """Все кампании одним DataFrame дней и одним детализации (без concat по кампаниям)"""
+        if self._frames is None:
+            days, day_campaigns, rows, row_campaigns = [], [], [], []
+            for campaign, (campaign_days, details) in self._reports.items():
+                if campaign_days:
+                    days.extend(campaign_days)
+                    day_campaigns.extend([campaign] * len(campaign_days))
+                for date_key, date_rows in details.items():
+                    rows.extend((date_key, r) for r in date_rows)
+                    row_campaigns.extend([campaign] * len(date_rows))
+            self._frames = (
+                days_frame(days, np.array(day_campaigns, dtype=object)),
+                _details_rows_frame(rows, np.array(row_campaigns, dtype=object)),
+            )
+        return self._frames
+
+    @property
+    def days(self):
+        return self._build()[0]
+
+    @property
+    def details(self):
+        return self._build()[1]
+
+    @property
+    def campaigns(self):
+        # Кампании без дней в отчёте не показываются (как при построении из таблицы дней)
+        return [campaign for campaign, (days, _) in self._reports.items() if days]
+
+    def daily(self, campaigns=None):
+        """
+        Дни выбранных кампаний (None — всех). Одна кампания возвращается как есть;
+        несколько объединяются по дате: счётчики суммируются, CPM, CPC и CPL РК
+        пересчитываются из сумм, ДРР — как доля общего расхода в общей выручке.
+        Результат запоминается до следующего add/remove: виджеты не пересчитывают объединение.
+        """
+        key = None if campaigns is None else tuple(campaigns)
+        if key not in self._daily:
+            self._daily[key] = self._merge_daily(campaigns)
+        return self._daily[key]
+
+    def daily_records(self, campaigns=None):
+        """Дни daily(campaigns) списком словарей calc (запоминается так же, как daily)"""
+        key = ("records", None if campaigns is None else tuple(campaigns))
+        if key not in self._daily:
+            self._daily[key] = records(self.daily(campaigns))
+        return self._daily[key]
+
+    def _merge_daily(self, campaigns):
+        frame = self.days if campaigns is None else self.days[self.days["campaign"].isin(campaigns)]
+        if frame["campaign"].nunique() <= 1:
+            return frame.reset_index(drop=True)
+        merged = frame.groupby("date", sort=False).agg(
+            dt=("dt", "first"), **{field: (field, "sum") for field in ADDITIVE_FIELDS}
+        )
+        merged["cpm"] = _ratio(merged["cost"], merged["shows"], 1000)
+        merged["cpc"] = _ratio(merged["cost"], merged["transitions"])
+        merged["cpl_rk"] = _ratio(merged["cost"], merged["carts_rk"])
+        for field in ("drr_rk", "drr1", "drr2"):
+            # Выручка кампании за день = расход / ДРР; дни без ДРР в долю не входят
+            has_drr = frame[field] > 0
+            revenue = pd.Series(_ratio(frame["cost"], frame[field], 100), index=frame.index)
+            cost = frame["cost"].where(has_drr, 0.0).groupby(frame["date"], sort=False).sum()
+            revenue = revenue.groupby(frame["date"], sort=False).sum()
+            merged[field] = _ratio(cost, revenue, 100)
+        merged = merged.reset_index().sort_values("dt", kind="stable").reset_index(drop=True)
+        merged.insert(0, "campaign", "")
+        return merged[["campaign", "date", "dt"] + DAY_FIELDS]
+
+    def by_type(self, dates=None, campaigns=None):
+        """Сравнение типов рекламы за даты dates (как calc.aggregate_by_type)"""
+        frame = self.details
+        if campaigns is not None:
+            frame = frame[frame["campaign"].isin(campaigns)]
+        return type_breakdown(frame, dates)
+
+
+def filter_period(frame, period="all", start_date=None, end_date=None, by=None):
+    """
+    Дни периода: all, last7, last14, last30, custom (start_date, end_date — YYYY-MM-DD).
+    Последние N дней отсчитываются от последней даты; by="campaign" — своей у каждой кампании.
+    """
+    if frame.empty or period == "all":
+        return frame
+    dt = frame["dt"].to_numpy()
+    if period in LAST_N_PERIODS:
+        # Последняя дата группы — максимум по номерам групп (NaT — наименьшее целое, в максимум не попадает)
+        codes, index = _group_codes(frame, by)
+        values = dt.view("int64")
+        max_dt = np.full(len(index), np.iinfo("int64").min)
+        np.maximum.at(max_dt, codes, values)
+        max_dt = max_dt[codes].view(dt.dtype)
+        mask = (dt >= max_dt - np.timedelta64(LAST_N_PERIODS[period], "D")) & (dt <= max_dt)
+    elif period == "custom" and start_date and end_date:
+        try:
+            start_dt = np.datetime64(datetime.strptime(start_date, "%Y-%m-%d"))
+            end_dt = np.datetime64(datetime.strptime(end_date, "%Y-%m-%d"))
+        except ValueError:
+            return frame
+        mask = (dt >= start_dt) & (dt <= end_dt)
+    else:
+        return frame
+    return frame[mask].reset_index(drop=True)
+
+
+def breakeven_targets(frame, default_cpl, profit, purchase_rate, use_params=None,
+                      cart_to_order=30, ad_carts_share=50, ad_share=50):
+    """
+    Целевой (безубыточный) CPL по каждому дню, как calc.breakeven_cpl в цикле по дням.
+    Конверсия корзина→заказ и доли рекламы — из данных дня; для дней с use_params=True —
+    из параметров калькулятора. Дни без корзин (или без заказов) получают default_cpl.
+    """
+    carts_total = frame["carts_total"].to_numpy()
+    orders = frame["orders"].to_numpy()
+    use_params = np.zeros(len(frame), dtype=bool) if use_params is None else np.asarray(use_params, dtype=bool)
+    day_ad_share = _ratio(frame["orders_rk"], orders, 100)
+    from_data = (
+        profit * (_ratio(orders, carts_total, 100) / 100.0) * (purchase_rate / 100.0)
+        * _ratio(_ratio(frame["carts_rk"], carts_total, 100), day_ad_share)
+    )
+    from_params = (
+        profit * (cart_to_order / 100.0) * (purchase_rate / 100.0) * (ad_carts_share / ad_share)
+        if ad_share > 0 else 0.0
+    )
+    return np.select(
+        [use_params & (carts_total > 0), ~use_params & (carts_total > 0) & (orders > 0)],
+        [np.broadcast_to(from_params, len(frame)), from_data],
+        default=default_cpl,
+    ).astype("float64")
+
+
+def evaluate(frame, target_cpl):
+    """Оценка дней (как calc.evaluate_day): target_cpl — число или массив по дням"""
+    target = np.broadcast_to(np.asarray(target_cpl, dtype="float64"), len(frame))
+    shows, transitions, cost = (frame[c].to_numpy() for c in ("shows", "transitions", "cost"))
+    carts_rk, carts_total = frame["carts_rk"].to_numpy(), frame["carts_total"].to_numpy()
+    orders_rk, orders = frame["orders_rk"].to_numpy(), frame["orders"].to_numpy()
+    total_shows, total_transitions = frame["totalShows"].to_numpy(), frame["totalTransitions"].to_numpy()
+
+    cpl_total = _ratio(cost, carts_total)
+    score = (
+        np.select(
+            [(cpl_total > 0) & (cpl_total <= target * 0.7), (cpl_total > 0) & (cpl_total <= target),
+             (cpl_total > 0) & (cpl_total <= target * 1.5)],
+            [40, 30, 15], default=0,
+        )
+        + np.select([orders >= 5, orders >= 2, orders >= 1], [30, 20, 10], default=0)
+        + np.select([carts_total >= 10, carts_total >= 5, carts_total >= 1], [30, 20, 10], default=0)
+    )
+    score = np.minimum(score, 100).astype("int64")
+    organic_shows = np.maximum(0, total_shows - shows)
+    organic_transitions = np.maximum(0, total_transitions - transitions)
+    organic_carts = np.maximum(0, carts_total - carts_rk)
+    organic_orders = np.maximum(0, orders - orders_rk)
+    columns = {
+        "cplTotal": cpl_total,
+        "targetCpl": target,
+        "efficiency": _ratio(target - cpl_total, target, 100),
+        "score": score,
+        "rating": RATINGS[np.searchsorted(RATING_BOUNDS, score, side="right")],
+        "ctrRk": _ratio(transitions, shows, 100),
+        "showToCartRk": _ratio(carts_rk, shows, 100),
+        "clickToCartRk": _ratio(carts_rk, transitions, 100),
+        "cartToOrderRk": _ratio(orders_rk, carts_rk, 100),
+        "ctrTotal": _ratio(total_transitions, total_shows, 100),
+        "showToCartTotal": _ratio(carts_total, total_shows, 100),
+        "clickToCartTotal": _ratio(carts_total, total_transitions, 100),
+        "cartToOrderTotal": _ratio(orders, carts_total, 100),
+        "organicShows": organic_shows,
+        "organicTransitions": organic_transitions,
+        "organicCarts": organic_carts,
+        "organicOrders": organic_orders,
+        "ctrOrganic": _ratio(organic_transitions, organic_shows, 100),
+        "clickToCartOrganic": _ratio(organic_carts, organic_transitions, 100),
+        "cartToOrderOrganic": _ratio(organic_orders, organic_carts, 100),
+    }
+    # Колонки оценки добавляются одним блоком (без вставки по одной)
+    evaluated_before = [c for c in EVALUATED_FIELDS if c in frame.columns]
+    base = frame.drop(columns=evaluated_before) if evaluated_before else frame
+    return pd.concat([base, pd.DataFrame(columns, index=frame.index)], axis=1)
+
+
+def _group_codes(frame, by):
+    """Номера групп строк (в порядке первого появления) и число групп"""
+    if by:
+        codes, uniques = pd.factorize(frame[by], sort=False)
+        return codes, pd.Index(uniques, name=by)
+    return np.zeros(len(frame), dtype="int64"), pd.RangeIndex(1 if len(frame) else 0)
+
+
+def group_kpis(frame, by=None):
+    """
+    KPI-карточки (ключи calc.aggregate_daily_kpis) по группам оценённых дней:
+    by=None — одна строка за все дни, by="campaign" — строка на кампанию.
+    Суммы — np.bincount по номерам групп: строки складываются по порядку, как в calc.py,
+    и без накладных расходов groupby, заметных на небольших выборках.
+    """
+    codes, index = _group_codes(frame, by)
+    k = len(index)
+    n = np.bincount(codes, minlength=k)
+
+    def total(values):
+        return np.bincount(codes, weights=np.asarray(values, dtype="float64"), minlength=k)
+
+    def mean_positive(col):
+        # Среднее только по дням, где значение > 0
+        values = frame[col].to_numpy(dtype="float64")
+        positive = values > 0
+        return _ratio(
+            np.bincount(codes[positive], weights=values[positive], minlength=k),
+            np.bincount(codes[positive], minlength=k),
+        )
+
+    cost, shows, shows_all = total(frame["cost"]), total(frame["shows"]), total(frame["totalShows"])
+    orders, orders_rk = total(frame["orders"]), total(frame["orders_rk"])
+    carts, carts_rk = total(frame["carts_total"]), total(frame["carts_rk"])
+    trans, trans_all = total(frame["transitions"]), total(frame["totalTransitions"])
+    shows_organic = shows_all - shows
+    trans_organic = trans_all - trans
+    carts_organic = carts - carts_rk
+    orders_organic = orders - orders_rk
+    shows_ratio = _ratio(shows, shows_all, 100)
+
+    columns = {
+        "totalCost": cost,
+        "avgCost": _ratio(cost, n),
+        "totalShows": shows,
+        "totalShowsAll": shows_all,
+        "totalShowsOrganic": shows_organic,
+        "totalTransitions": trans,
+        "totalTransitionsAll": trans_all,
+        "totalTransitionsOrganic": trans_organic,
+        "totalCarts": carts,
+        "totalCartsRk": carts_rk,
+        "totalCartsOrganic": carts_organic,
+        "totalOrders": orders,
+        "totalOrdersRk": orders_rk,
+        "totalOrdersOrganic": orders_organic,
+        "avgCpm": _ratio(cost, shows, 1000),
+        "avgCpc": _ratio(cost, trans),
+        "avgCplTotal": mean_positive("cplTotal"),
+        "avgCplRk": mean_positive("cpl_rk"),
+        "showsRatio": shows_ratio,
+        "organicRatio": 100 - shows_ratio,
+        "cartsRatio": _ratio(carts_rk, carts, 100),
+        "ordersRatio": _ratio(orders_rk, orders, 100),
+        "avgCtrRk": _ratio(trans, shows, 100),
+        "avgShowToCartRk": _ratio(carts_rk, shows, 100),
+        "avgClickToCartRk": _ratio(carts_rk, trans, 100),
+        "avgCartToOrderRk": _ratio(orders_rk, carts_rk, 100),
+        "avgCtrOrganic": _ratio(trans_organic, shows_organic, 100),
+        "avgClickToCartOrganic": _ratio(carts_organic, trans_organic, 100),
+        "avgCartToOrderOrganic": _ratio(orders_organic, carts_organic, 100),
+        "avgCtrTotal": _ratio(trans_all, shows_all, 100),
+        "avgShowToCartTotal": _ratio(carts, shows_all, 100),
+        "avgClickToCartTotal": _ratio(carts, trans_all, 100),
+        "avgCartToOrderTotal": _ratio(orders, carts, 100),
+        "totalConv": _ratio(orders, shows_all, 100),
+        "totalEfficiency": _ratio(total(frame["efficiency"]), n),
+        # Балл оценки дня (1 — «Критично» … 5 — «Отлично») — по score, из которого evaluate выводит rating
+        "avgRating": _ratio(total(np.searchsorted(RATING_BOUNDS, frame["score"].to_numpy(), side="right") + 1), n),
+        "avgRatingScore": _ratio(total(frame["score"]), n),
+    }
+    # Все KPI — float64: одна матрица вместо DataFrame из словаря по колонкам
+    return pd.DataFrame(np.column_stack(list(columns.values())), index=index, columns=list(columns))
+
+
+def kpis(frame):
+    """KPI за все оценённые дни словарём, как calc.aggregate_daily_kpis ({} — нет дней)"""
+    if frame.empty:
+        return {}
+    return {key: float(value) for key, value in group_kpis(frame).iloc[0].items()}
+
+
+def type_breakdown(details, dates=None):
+    """
+    Сумма по типам рекламы за даты dates (None — все) в порядке первого появления типа,
+    как calc.aggregate_by_type.
+    """
+    if dates is not None:
+        details = details[details["date"].isin(list(dates))]
+    if len(details) <= DIRECT_MAX_ROWS:
+        return _type_breakdown_direct(details)
+    groups = details.groupby("type_key", sort=False)
+    sums = groups[DETAIL_FIELDS].sum()
+    shows, cost, carts, transitions = (sums[c].to_numpy() for c in DETAIL_FIELDS)
+    table = {
+        "shows": shows,
+        "cost": cost,
+        "cpm": _ratio(cost, shows, 1000),
+        "cpc": _ratio(cost, transitions),
+        "carts": carts,
+        "cpl": _ratio(cost, carts),
+        "ctr": _ratio(transitions, shows, 100),
+        "transitions": transitions,
+        "count": groups.size().to_numpy(),
+    }
+    table = {col: values.tolist() for col, values in table.items()}
+    return {key: {col: values[i] for col, values in table.items()} for i, key in enumerate(sums.index)}
+
+
+def _type_breakdown_direct(details):
+    """type_breakdown прямым проходом по строкам, как calc.aggregate_by_type"""
+    result = {}
+    columns = (details[c].tolist() for c in ["type_key"] + DETAIL_FIELDS)
+    for key, shows, cost, carts, transitions in zip(*columns):
+        t = result.get(key)
+        if t is None:
+            t = result[key] = {"shows": 0, "cost": 0, "cpm": 0, "cpc": 0, "carts": 0, "cpl": 0, "ctr": 0,
+                               "transitions": 0, "count": 0}
+        t["shows"] += shows
+        t["cost"] += cost
+        t["carts"] += carts
+        t["transitions"] += transitions
+        t["count"] += 1
+    for t in result.values():
+        t["cpm"] = t["cost"] / t["shows"] * 1000 if t["shows"] > 0 else 0.0
+        t["cpc"] = t["cost"] / t["transitions"] if t["transitions"] > 0 else 0.0
+        t["ctr"] = t["transitions"] / t["shows"] * 100 if t["shows"] > 0 else 0.0
+        t["cpl"] = t["cost"] / t["carts"] if t["carts"] > 0 else 0.0
+    return result
+
+def records(frame):
+    """Дни списком словарей в формате calc (date, поля дня и, если есть, поля оценки)"""
+    columns = ["date"] + DAY_FIELDS + [col for col in EVALUATED_FIELDS if col in frame.columns]
+    return frame[columns].to_dict("records")
@@ -1,4 +1,11 @@
 # -*- coding: utf-8 -*-
+import sys
+from pathlib import Path
+# Добавляем корневую директорию проекта в sys.path для импорта utils
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
 import streamlit as st
 import pandas as pd
 import numpy as np
@@ -10,6 +17,8 @@ from io import BytesIO
 import json
 import os
 
+from utils.unit_economics import unit_economics
+
 # Настройка локали для правильного отображения чисел
 try:
     locale.setlocale(locale.LC_ALL, 'ru_RU.UTF-8')
@@ -356,67 +365,80 @@ def calculate_unit_economics(
     spp_discount=25.0     # СПП скидка
 ):
     """Расчет юнит-экономики по формулам из таблицы"""
+    return calculate_products_unit_economics([{
+        'cost_price': cost_price,
+        'retail_price': retail_price,
+        'discount_percent': discount_percent,
+        'commission_rate': commission_rate,
+        'logistics_cost': logistics_cost,
+        'advertising_percent': advertising_percent,
+        'buyout_percent': buyout_percent,
+        'storage_cost': storage_cost,
+        'stock_quantity': stock_quantity,
+        'purchased_quantity': purchased_quantity,
+        'spp_discount': spp_discount,
+    }])[0]
+
+
+def calculate_products_unit_economics(products):
+    """
+    Юнит-экономика для списка товаров одним векторным расчетом (utils.unit_economics).
+    Формулы таблицы: цена со скидкой, логистика с учетом выкупа, хранение в выручке,
+    налог 7% от цены со скидкой. Возвращает список словарей результатов в порядке товаров.
+    """
+    if not products:
+        return []
     
-    # 1. Цена со скидкой
-    price_with_discount = retail_price * (1 - discount_percent / 100)
-    
-    # 2. Цена с учетом СПП (не участвует в расчетах)
-    price_with_spp = price_with_discount * (1 - spp_discount / 100)
-    
-    # 3. Комиссия в рублях
-    commission_amount = price_with_discount * (commission_rate / 100)
-    
-    # 4. Реклама как доля от цены продажи
-    advertising_cost = price_with_discount * (advertising_percent / 100)
-    
-    # 5. Доставка с учетом выкупа
-    delivery_with_buyout = (buyout_percent/100 * logistics_cost + (1 - buyout_percent/100) * (logistics_cost + 50)) * 100 / buyout_percent
-    
-    # 6. Выручка с единицы (после комиссии, логистики с учетом выкупа, рекламы и хранения)
-    revenue_per_unit = price_with_discount - commission_amount - delivery_with_buyout - advertising_cost - storage_cost
-    
-    # 7. Налог с единицы (7%)
-    tax_per_unit = price_with_discount * 0.07
-    
-    # 8. Прибыль с единицы (после всех затрат)
-    profit_per_unit = revenue_per_unit - cost_price - tax_per_unit
-    
-    # 9. Маржинальность (%)
-    margin_percent = (profit_per_unit / price_with_discount) * 100 if price_with_discount > 0 else 0
+    def column(name, default=0.0):
+        return np.array([float(p.get(name, default) or 0) for p in products])
     
-    # 10. Рентабельность (%)
-    profitability_percent = (profit_per_unit / cost_price) * 100 if cost_price > 0 else 0
+    buyout_percent = column('buyout_percent')
+    stock_quantity = column('stock_quantity')
+    ue = unit_economics(
+        price=column('retail_price'),
+        discount_percent=column('discount_percent'),
+        cost_price=column('cost_price'),
+        commission_rate=column('commission_rate'),
+        logistics_cost=column('logistics_cost'),
+        advertising_percent=column('advertising_percent'),
+        buyout_percent=buyout_percent,
+        storage_cost=column('storage_cost'),
+        tax_rate=7.0,
+        logistics='buyout',
+        tax_base='price'
+    )
     
-    # 11. Прибыль с учетом выкупа
-    profit_with_buyout = profit_per_unit * (buyout_percent / 100)
+    # Цена с учетом СПП (не участвует в расчетах)
+    price_with_spp = ue['Цена продажи'] * (1 - column('spp_discount', 25.0) / 100)
     
-    # 12. Расчеты с остатками
-    revenue_from_stock_no_tax = revenue_per_unit * stock_quantity
+    # Расчеты с остатками
+    revenue_from_stock_no_tax = ue['Выручка с ед.'] * stock_quantity
     revenue_from_stock_with_tax = revenue_from_stock_no_tax * 0.93
-    stock_cost = cost_price * stock_quantity
-    profit_from_stock = profit_per_unit * stock_quantity
+    stock_cost = ue['Себестоимость'] * stock_quantity
+    profit_from_stock = ue['Прибыль с ед.'] * stock_quantity
     
-    # 13. Расчет проданного товара
-    sold_quantity = purchased_quantity - stock_quantity
+    # Расчет проданного товара
+    sold_quantity = column('purchased_quantity') - stock_quantity
     
-    return {
-        'Цена со скидкой': price_with_discount,
+    metrics = {
+        'Цена со скидкой': ue['Цена продажи'],
         'Цена с учетом СПП': price_with_spp,
-        'Комиссия, руб': commission_amount,
-        'Выручка с ед.': revenue_per_unit,
-        'Реклама, руб': advertising_cost,
-        'Налог с ед., руб': tax_per_unit,
-        'Доставка с учетом выкупа': delivery_with_buyout,
-        'Прибыль с ед.': profit_per_unit,
-        'Прибыль с учетом выкупа': profit_with_buyout,
-        'Маржинальность, %': margin_percent,
-        'Рентабельность, %': profitability_percent,
+        'Комиссия, руб': ue['Комиссия, руб'],
+        'Выручка с ед.': ue['Выручка с ед.'],
+        'Реклама, руб': ue['Реклама, руб'],
+        'Налог с ед., руб': ue['Налог, руб'],
+        'Доставка с учетом выкупа': ue['Логистика с учетом выкупа'],
+        'Прибыль с ед.': ue['Прибыль с ед.'],
+        'Прибыль с учетом выкупа': ue['Прибыль с учетом выкупа'],
+        'Маржинальность, %': ue['Маржинальность, %'],
+        'Рентабельность, %': ue['Рентабельность, %'],
         'Выручка с остатков без налога': revenue_from_stock_no_tax,
         'Выручка с остатков с налогом 7%': revenue_from_stock_with_tax,
         'Себестоимость остатков': stock_cost,
         'Прибыль с остатков': profit_from_stock,
         'Продано товара': sold_quantity
     }
+    return [{key: float(values[i]) for key, values in metrics.items()} for i in range(len(products))]
 
 
 
@@ -588,22 +610,8 @@ def main():
         # Показываем ВСЕ товары без фильтрации
         # Рассчитываем показатели для всех товаров
         filtered_products = []
-        for product in saved_products:
-            # Рассчитываем показатели для каждого товара
-            results = calculate_unit_economics(
-                cost_price=product['cost_price'],
-                retail_price=product['retail_price'],
-                discount_percent=product['discount_percent'],
-                commission_rate=product['commission_rate'],
-                logistics_cost=product['logistics_cost'],
-                advertising_percent=product['advertising_percent'],
-                buyout_percent=product['buyout_percent'],
-                storage_cost=product['storage_cost'],
-                stock_quantity=product['stock_quantity'],
-                purchased_quantity=product.get('purchased_quantity', 0),
-                spp_discount=product['spp_discount']
-            )
-            
+        # Рассчитываем показатели для всех товаров одним расчетом
+        for product, results in zip(saved_products, calculate_products_unit_economics(saved_products)):
             # Добавляем результаты к товару
             product['results'] = results
             filtered_products.append(product)
@@ -1285,22 +1293,8 @@ def main():
             
             # Рассчитываем показатели для всех тестовых товаров
             test_filtered_products = []
-            for product in test_saved_products:
-                # Рассчитываем показатели для каждого тестового товара
-                results = calculate_unit_economics(
-                    cost_price=product['cost_price'],
-                    retail_price=product['retail_price'],
-                    discount_percent=product['discount_percent'],
-                    commission_rate=product['commission_rate'],
-                    logistics_cost=product['logistics_cost'],
-                    advertising_percent=product['advertising_percent'],
-                    buyout_percent=product['buyout_percent'],
-                    storage_cost=product['storage_cost'],
-                    stock_quantity=product['stock_quantity'],
-                    purchased_quantity=product.get('purchased_quantity', 0),
-                    spp_discount=product['spp_discount']
-                )
-                
+            # Рассчитываем показатели для всех товаров одним расчетом
+            for product, results in zip(test_saved_products, calculate_products_unit_economics(test_saved_products)):
                 # Добавляем результаты к товару
                 product['results'] = results
                 test_filtered_products.append(product)
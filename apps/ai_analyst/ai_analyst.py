@@ -23,6 +23,13 @@ try:
 except ImportError:
     INTEGRATION_AVAILABLE = False
 
+# Колоночный кеш analytics_45 для резервной загрузки
+try:
+    from utils.columnar_cache import load_cache
+    COLUMNAR_CACHE_AVAILABLE = True
+except ImportError:
+    COLUMNAR_CACHE_AVAILABLE = False
+
 # Настройка страницы
 st.set_page_config(
     page_title="ИИ-аналитик данных",
@@ -171,16 +178,27 @@ class AIAnalyst:
         self.position = "Старший аналитик данных"
         self.avatar = "🤖"
         self.current_date = datetime.now()
+        # Снимок источников и проверка качества текущего отчёта (общие для отчёта, рекомендаций и предупреждений)
+        self.integration = DataIntegration() if INTEGRATION_AVAILABLE else None
+        self.data_snapshot = None
+        self.data_quality = None
+        
+    def get_data_quality(self):
+        """Проверка качества по снимку текущего отчёта (считается один раз)"""
+        if self.data_quality is None:
+            self.data_quality = self.integration.validate_data_quality(self.data_snapshot)
+        return self.data_quality
         
     def load_data_sources(self):
         """Загружает данные из различных источников"""
         if INTEGRATION_AVAILABLE:
-            # Используем модуль интеграции данных
-            integration = DataIntegration()
-            data_sources = integration.get_all_data_sources()
+            # Используем модуль интеграции данных: источники читаются с диска только после изменения файлов
+            data_sources = self.integration.get_all_data_sources()
+            self.data_snapshot = data_sources
+            self.data_quality = None
             
             # Показываем информацию о качестве данных
-            quality = integration.validate_data_quality()
+            quality = self.get_data_quality()
             if quality['overall_score'] < 80:
                 st.warning(f"⚠️ Качество данных: {quality['overall_score']:.1f}/100. Рекомендуется обновить данные.")
             
@@ -191,7 +209,10 @@ class AIAnalyst:
             
             # Загрузка данных из анализа 45.xlsx
             try:
-                if os.path.exists('data_cache.csv'):
+                df_45 = load_cache() if COLUMNAR_CACHE_AVAILABLE else None
+                if df_45 is not None and not df_45.empty:
+                    data_sources['wb_analysis'] = df_45
+                elif os.path.exists('data_cache.csv'):
                     df_45 = pd.read_csv('data_cache.csv')
                     df_45['Дата'] = pd.to_datetime(df_45['Дата'])
                     data_sources['wb_analysis'] = df_45
@@ -575,8 +596,7 @@ class AIAnalyst:
         
         # Добавляем кросс-приложенческие инсайты
         if INTEGRATION_AVAILABLE:
-            integration = DataIntegration()
-            cross_insights = integration.get_cross_app_insights()
+            cross_insights = self.integration.get_cross_app_insights(self.data_snapshot)
             report['cross_app_insights'] = cross_insights
         
         return report
@@ -1201,8 +1221,7 @@ class AIAnalyst:
         
         # Предупреждения по качеству данных
         if INTEGRATION_AVAILABLE:
-            integration = DataIntegration()
-            quality = integration.validate_data_quality()
+            quality = self.get_data_quality()
             
             if quality['overall_score'] < 60:
                 alerts.append({
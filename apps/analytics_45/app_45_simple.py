@@ -1,4 +1,11 @@
 # -*- coding: utf-8 -*-
+import sys
+from pathlib import Path
+# Добавляем корневую директорию проекта в sys.path для импорта utils
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
 import pandas as pd
 import streamlit as st
 import plotly.express as px
@@ -12,36 +19,32 @@ from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils.dataframe import dataframe_to_rows
 
+from utils.columnar_cache import (
+    CACHE_DIR, save_cache, load_cache, cache_info, replace_period, upsert_rows, clear_cache
+)
+from utils.rollup_cube import (
+    get_cube, load_cube, save_cube, build_cube, update_cube, slice_cube, day_level,
+    cube_years, rollup, rollup_by_period, pivot_by_year, month_label
+)
+
 # Настройка страницы
 st.set_page_config(page_title="Анализ 45.xlsx", layout="wide")
 
 st.title("📊 Анализ Год vs Год")
 
-# Функции для работы с кешем данных
-def save_data_cache(df, cache_file="data_cache.csv"):
-    """Сохраняет данные в кеш"""
+# Функции для работы с кешем данных (колоночный кеш data_cache/, см. utils.columnar_cache)
+def save_data_cache(df, cache_dir=CACHE_DIR):
+    """Полностью перезаписывает кеш данными"""
     try:
-        df.to_csv(cache_file, index=False, encoding='utf-8-sig')
-        return True
+        return save_cache(df, cache_dir)
     except Exception as e:
         st.error(f"Ошибка сохранения кеша: {e}")
         return False
 
-def load_data_cache(cache_file="data_cache.csv"):
-    """Загружает данные из кеша"""
+def load_data_cache(cache_dir=CACHE_DIR):
+    """Загружает данные из кеша (типы и дедупликация уже сохранены в кеше)"""
     try:
-        if os.path.exists(cache_file):
-            df = pd.read_csv(cache_file)
-            df['Дата'] = pd.to_datetime(df['Дата'])
-            # Удаляем дубликаты по ключевым полям, если они есть в кеше
-            key_columns = ['Дата', 'Артикул WB', 'Артикул продавца']
-            if all(col in df.columns for col in key_columns):
-                df = df.drop_duplicates(subset=key_columns, keep='last')
-            # Неделя — целое число, иначе 8 и 8.0 дают две группы и завышенные суммы
-            if 'Неделя' in df.columns:
-                df['Неделя'] = pd.to_numeric(df['Неделя'], errors='coerce').fillna(0).astype(int)
-            return df
-        return None
+        return load_cache(cache_dir)
     except Exception as e:
         st.error(f"Ошибка загрузки кеша: {e}")
         return None
@@ -64,22 +67,12 @@ def merge_new_data(existing_df, new_df):
     
     return combined_df
 
-def get_cache_info(cache_file="data_cache.csv"):
-    """Получает информацию о кеше"""
-    if os.path.exists(cache_file):
-        try:
-            df = pd.read_csv(cache_file)
-            df['Дата'] = pd.to_datetime(df['Дата'])
-            return {
-                'exists': True,
-                'records': len(df),
-                'start_date': df['Дата'].min().strftime('%d.%m.%Y'),
-                'end_date': df['Дата'].max().strftime('%d.%m.%Y'),
-                'years': sorted(df['Дата'].dt.year.unique())
-            }
-        except:
-            return {'exists': False}
-    return {'exists': False}
+def get_cache_info(cache_dir=CACHE_DIR):
+    """Получает информацию о кеше (из футера кеша, без чтения данных)"""
+    try:
+        return cache_info(cache_dir)
+    except Exception:
+        return {'exists': False}
 
 def process_uploaded_excel_file(file):
     """Обрабатывает загруженный Excel файл"""
@@ -136,8 +129,9 @@ def merge_uploaded_files_to_cache(uploaded_files):
     if not uploaded_files:
         return None
     
-    # Загружаем существующий кеш
+    # Загружаем существующий кеш и куб агрегатов, собранный из него (None, если устарел)
     cached_df = load_data_cache()
+    cube = load_cube()
     
     # Обрабатываем каждый файл
     processed_files = []
@@ -187,7 +181,20 @@ def merge_uploaded_files_to_cache(uploaded_files):
     
     combined_df = combined_df.sort_values('Дата')
     
-    if save_data_cache(combined_df):
+    # В кеше и кубе переписываются только месяцы периода загрузки
+    new_rows = pd.concat([f['data'] for f in processed_files], ignore_index=True)
+    try:
+        saved = replace_period(new_rows, upload_min_date, upload_max_date)
+    except Exception as e:
+        st.error(f"Ошибка сохранения кеша: {e}")
+        saved = False
+    
+    if saved:
+        if cube is not None:
+            cube = update_cube(cube, new_rows, upload_min_date, upload_max_date)
+        else:
+            cube = build_cube(combined_df)
+        save_cube(cube)
         return {
             'success': True,
             'combined_data': combined_df,
@@ -475,8 +482,14 @@ def load_data_with_cache():
             else:
                 st.info("ℹ️ Новых данных не найдено")
             
-            # Сохраняем обновленный кеш
-            save_data_cache(combined_df)
+            # Обновляем кеш: переписываются только месяцы из файла, в кубе — только строки из файла
+            cube = load_cube()
+            try:
+                upsert_rows(new_df)
+            except Exception as e:
+                st.error(f"Ошибка сохранения кеша: {e}")
+            if cube is not None:
+                save_cube(update_cube(cube, new_df))
             return combined_df
     
     # Если кеша нет, сохраняем новые данные
@@ -523,6 +536,9 @@ if 'process_uploaded_files' in st.session_state and st.session_state.process_upl
             st.error("❌ Ошибка при обработке файлов")
             st.session_state.process_uploaded_files = False
 
+# Куб агрегатов (год, месяц, неделя, дата, артикулы): все графики строятся срезами куба
+cube = get_cube(df)
+
 # Информация о данных
 st.sidebar.header("📋 Информация о данных")
 st.sidebar.write(f"Записей: {len(df):,}")
@@ -538,12 +554,13 @@ with st.sidebar.expander("🔎 Проверка дублей", expanded=False):
         dup_rows_all = int(dup_mask_all.sum())
         dup_groups_all = int(df.loc[dup_mask_all, key_columns].drop_duplicates().shape[0])
 
-        dup_mask_2024 = (df['Год'] == 2024) & dup_mask_all if 'Год' in df.columns else dup_mask_all
-        dup_rows_2024 = int(dup_mask_2024.sum())
-        dup_groups_2024 = int(df.loc[dup_mask_2024, key_columns].drop_duplicates().shape[0])
-
         st.write(f"Дубли (все годы): {dup_rows_all:,} строк, {dup_groups_all:,} групп")
-        st.write(f"Дубли (2024): {dup_rows_2024:,} строк, {dup_groups_2024:,} групп")
+        if 'Год' in df.columns:
+            for check_year in sorted(df['Год'].dropna().unique()):
+                dup_mask_year = (df['Год'] == check_year) & dup_mask_all
+                dup_rows_year = int(dup_mask_year.sum())
+                dup_groups_year = int(df.loc[dup_mask_year, key_columns].drop_duplicates().shape[0])
+                st.write(f"Дубли ({int(check_year)}): {dup_rows_year:,} строк, {dup_groups_year:,} групп")
     else:
         st.warning("Недостаточно колонок для проверки дублей.")
 
@@ -603,7 +620,7 @@ if cache_info['exists']:
     # Кнопка очистки кеша
     if st.sidebar.button("🗑️ Очистить кеш", type="secondary"):
         try:
-            os.remove("data_cache.csv")
+            clear_cache()
             st.sidebar.success("✅ Кеш очищен")
             st.rerun()
         except:
@@ -741,14 +758,17 @@ if 'quick_filter_week' in st.session_state and st.session_state.quick_filter_wee
     if 'week_start' in st.session_state and 'week_end' in st.session_state:
         date_range = (st.session_state.week_start, st.session_state.week_end)
 
-# Фильтрация данных
+# Фильтрация данных (без выбора товара графикам хватает куба по дням без артикулов)
+chart_cube = cube if analysis_mode == "Анализ по товару" else day_level(cube)
 if len(date_range) == 2:
     filtered_df = df[
         (df['Дата'].dt.date >= date_range[0]) &
         (df['Дата'].dt.date <= date_range[1])
     ]
+    filtered_cube = slice_cube(chart_cube, date_range[0], date_range[1])
 else:
     filtered_df = df
+    filtered_cube = chart_cube
 
 # Выбор товара для детального анализа
 if analysis_mode == "Анализ по товару":
@@ -769,6 +789,7 @@ if analysis_mode == "Анализ по товару":
     
     # Фильтруем данные по выбранному товару
     filtered_df = filtered_df[filtered_df['Артикул WB'] == selected_wb_article]
+    filtered_cube = slice_cube(filtered_cube, wb_article=selected_wb_article)
     
     # Показываем информацию о выбранном товаре
     product_info = filtered_df[['Артикул WB', 'Артикул продавца', 'Название', 'Предмет', 'Бренд']].iloc[0]
@@ -957,205 +978,115 @@ with col4:
     st.metric("🎯 Выручка/товар", f"{revenue_per_product:,.0f} ₽")
 
 # Агрегация данных
-agg_data = filtered_df.groupby(pd.Grouper(key='Дата', freq=period)).agg({
-    'Заказали, шт': 'sum',
-    'Выкупили, шт': 'sum',
-    'Заказали на сумму, ₽': 'sum',
-    'Выкупили на сумму, ₽': 'sum',
-    'Переходы в карточку': 'sum',
-    'Положили в корзину': 'sum'
-}).reset_index()
+agg_data = rollup_by_period(filtered_cube, period)
+
+# Годы в выбранном срезе и цвета графиков (заказы, выкупы) по порядку лет
+YEAR_COLORS = [('blue', 'lightblue'), ('red', 'orange'), ('green', 'lightgreen'),
+               ('purple', 'plum'), ('brown', 'tan'), ('teal', 'aquamarine')]
+years = cube_years(filtered_cube)
+
+def year_colors(year, year_list=None):
+    year_list = year_list if year_list is not None else years
+    position = year_list.index(year) if year in year_list else len(year_list)
+    return YEAR_COLORS[position % len(YEAR_COLORS)]
+
+years_title = ' vs '.join(str(y) for y in years)
+
+def render_year_totals(year_totals, with_conversion=True):
+    """Метрики заказов, выкупов (и конверсии) по годам: по колонке на год"""
+    totals_years = list(year_totals.index)
+    if not totals_years:
+        return
+    for col, year in zip(st.columns(len(totals_years)), totals_years):
+        with col:
+            st.metric(f"📦 Заказы {year}", f"{year_totals.at[year, 'Заказали, шт']:,.0f}")
+    for col, year in zip(st.columns(len(totals_years)), totals_years):
+        with col:
+            st.metric(f"💰 Выкупы {year}", f"{year_totals.at[year, 'Выкупили, шт']:,.0f}")
+    if with_conversion:
+        for col, year in zip(st.columns(len(totals_years)), totals_years):
+            orders = year_totals.at[year, 'Заказали, шт']
+            conv_year = (year_totals.at[year, 'Выкупили, шт'] / orders * 100) if orders else 0
+            with col:
+                st.metric(f"📈 Конверсия {year}, %", f"{conv_year:.1f}")
+
+def render_year_growth(year_totals):
+    """Рост заказов и выкупов между соседними годами"""
+    totals_years = list(year_totals.index)
+    growth = {}
+    for measure, label in (('Заказали, шт', 'заказов'), ('Выкупили, шт', 'выкупов')):
+        growth[label] = [
+            (prev, cur, (year_totals.at[cur, measure] - year_totals.at[prev, measure]) / year_totals.at[prev, measure] * 100)
+            for prev, cur in zip(totals_years, totals_years[1:])
+            if year_totals.at[prev, measure] > 0 and year_totals.at[cur, measure] > 0
+        ]
+    if not any(growth.values()):
+        return
+    st.subheader("🔄 Сравнение")
+    for label, pairs in growth.items():
+        if not pairs:
+            continue
+        for col, (prev, cur, value) in zip(st.columns(len(pairs)), pairs):
+            with col:
+                st.metric(f"📈 Рост {label} {prev}->{cur}", f"{value:+.1f}%", delta_color="normal")
 
 # Графики
 st.header("📈 Графики")
 
 with tab1:
     # Совмещенный график по неделям с подписями месяцев (вверху)
-    st.subheader("📊 Совмещенный график: Заказы и выкупы 2024 vs 2025 vs 2026 по неделям")
+    st.subheader(f"📊 Совмещенный график: Заказы и выкупы {years_title} по неделям")
     
-    # Создаем данные по неделям с подписями месяцев
+    # Недели с подписями месяцев — срез куба «(неделя, месяц) × год»
     def create_weekly_data_with_months():
-        weekly_data = []
-        key_cols = ['Дата', 'Артикул WB', 'Артикул продавца']
-        dedup_df = filtered_df.drop_duplicates(subset=key_cols, keep='last') if all(c in filtered_df.columns for c in key_cols) else filtered_df
-        
-        agg_cols = {'Заказали, шт': 'sum', 'Выкупили, шт': 'sum'}
-        if 'Переходы в карточку' in dedup_df.columns:
-            agg_cols['Переходы в карточку'] = 'sum'
-        if 'Положили в корзину' in dedup_df.columns:
-            agg_cols['Положили в корзину'] = 'sum'
-        
-        # Данные 2024 года (неделя — int, иначе 8 и 8.0 дают две группы и двойной учёт)
-        data_2024 = dedup_df[dedup_df['Год'] == 2024].copy()
-        if not data_2024.empty:
-            data_2024['Неделя'] = data_2024['Неделя'].astype(int)
-            weekly_2024 = data_2024.groupby(['Неделя', 'Месяц_название']).agg(agg_cols).reset_index()
-            
-            for _, row in weekly_2024.iterrows():
-                wnum = int(row['Неделя'])
-                week_label = f"Неделя {wnum} ({row['Месяц_название']})"
-                rec = {
-                    'week_label': week_label,
-                    'week_num': wnum,
-                    'month': row['Месяц_название'],
-                    'orders_2024': row['Заказали, шт'],
-                    'sales_2024': row['Выкупили, шт'],
-                    'orders_2025': 0, 'sales_2025': 0, 'orders_2026': 0, 'sales_2026': 0,
-                    'views_2024': 0, 'views_2025': 0, 'views_2026': 0,
-                    'cart_2024': 0, 'cart_2025': 0, 'cart_2026': 0
-                }
-                if 'Переходы в карточку' in row.index:
-                    rec['views_2024'] = row['Переходы в карточку']
-                if 'Положили в корзину' in row.index:
-                    rec['cart_2024'] = row['Положили в корзину']
-                weekly_data.append(rec)
-        
-        # Данные 2025 года
-        data_2025 = dedup_df[dedup_df['Год'] == 2025].copy()
-        if not data_2025.empty:
-            data_2025['Неделя'] = data_2025['Неделя'].astype(int)
-            weekly_2025 = data_2025.groupby(['Неделя', 'Месяц_название']).agg(agg_cols).reset_index()
-            
-            for _, row in weekly_2025.iterrows():
-                wnum = int(row['Неделя'])
-                week_label = f"Неделя {wnum} ({row['Месяц_название']})"
-                existing_week = next((w for w in weekly_data if w['week_label'] == week_label), None)
-                if existing_week:
-                    existing_week['orders_2025'] = row['Заказали, шт']
-                    existing_week['sales_2025'] = row['Выкупили, шт']
-                    if 'Переходы в карточку' in row.index:
-                        existing_week['views_2025'] = row['Переходы в карточку']
-                    if 'Положили в корзину' in row.index:
-                        existing_week['cart_2025'] = row['Положили в корзину']
-                else:
-                    rec = {
-                        'week_label': week_label, 'week_num': wnum, 'month': row['Месяц_название'],
-                        'orders_2024': 0, 'sales_2024': 0, 'orders_2025': row['Заказали, шт'],
-                        'sales_2025': row['Выкупили, шт'], 'orders_2026': 0, 'sales_2026': 0,
-                        'views_2024': 0, 'views_2025': 0, 'views_2026': 0,
-                        'cart_2024': 0, 'cart_2025': 0, 'cart_2026': 0
-                    }
-                    if 'Переходы в карточку' in row.index:
-                        rec['views_2025'] = row['Переходы в карточку']
-                    if 'Положили в корзину' in row.index:
-                        rec['cart_2025'] = row['Положили в корзину']
-                    weekly_data.append(rec)
-        
-        # Данные 2026 года
-        data_2026 = dedup_df[dedup_df['Год'] == 2026].copy()
-        if not data_2026.empty:
-            data_2026['Неделя'] = data_2026['Неделя'].astype(int)
-            weekly_2026 = data_2026.groupby(['Неделя', 'Месяц_название']).agg(agg_cols).reset_index()
-            
-            for _, row in weekly_2026.iterrows():
-                wnum = int(row['Неделя'])
-                week_label = f"Неделя {wnum} ({row['Месяц_название']})"
-                existing_week = next((w for w in weekly_data if w['week_label'] == week_label), None)
-                if existing_week:
-                    existing_week['orders_2026'] = row['Заказали, шт']
-                    existing_week['sales_2026'] = row['Выкупили, шт']
-                    if 'Переходы в карточку' in row.index:
-                        existing_week['views_2026'] = row['Переходы в карточку']
-                    if 'Положили в корзину' in row.index:
-                        existing_week['cart_2026'] = row['Положили в корзину']
-                else:
-                    rec = {
-                        'week_label': week_label, 'week_num': wnum, 'month': row['Месяц_название'],
-                        'orders_2024': 0, 'sales_2024': 0, 'orders_2025': 0, 'sales_2025': 0,
-                        'orders_2026': row['Заказали, шт'], 'sales_2026': row['Выкупили, шт'],
-                        'views_2024': 0, 'views_2025': 0, 'views_2026': 0,
-                        'cart_2024': 0, 'cart_2025': 0, 'cart_2026': 0
-                    }
-                    if 'Переходы в карточку' in row.index:
-                        rec['views_2026'] = row['Переходы в карточку']
-                    if 'Положили в корзину' in row.index:
-                        rec['cart_2026'] = row['Положили в корзину']
-                    weekly_data.append(rec)
-        
-        # Сортируем по номеру недели
-        weekly_data.sort(key=lambda x: x['week_num'])
-        return weekly_data
+        if filtered_cube.empty:
+            return None
+        weekly = pivot_by_year(filtered_cube, ['Неделя', 'Месяц'],
+                               ['Заказали, шт', 'Выкупили, шт', 'Переходы в карточку', 'Положили в корзину'])
+        # Неделя на стыке месяцев даёт две строки, как и в отчёте
+        weekly.index = [f"Неделя {int(w)} ({month_label(m)})" for w, m in weekly.index]
+        return weekly
     
     weekly_data = create_weekly_data_with_months()
-
-    # Диагностика наличия 2026 года в данных/фильтрах
-    has_2026_in_data = (df['Год'] == 2026).any()
-    has_2026_in_filter = (filtered_df['Год'] == 2026).any()
-    if has_2026_in_data and not has_2026_in_filter:
-        st.info("⚠️ Данные за 2026 год есть, но текущие фильтры их скрывают. Проверьте диапазон дат и выбранный товар.")
-    elif not has_2026_in_data:
-        st.info("ℹ️ В исходных данных нет 2026 года.")
     
-    if weekly_data:
+    def weekly_values(measure, year):
+        """Значения меры по неделям за год (нули, если меры нет в данных)"""
+        if measure in weekly_data.columns.get_level_values(0) and year in weekly_data[measure].columns:
+            return weekly_data[measure][year].tolist()
+        return [0] * len(weekly_data)
+    
+    # Диагностика: годы, которые есть в данных, но скрыты фильтрами
+    hidden_years = [y for y in cube_years(cube) if y not in years]
+    if hidden_years:
+        st.info(f"⚠️ Данные за {', '.join(map(str, hidden_years))} год есть, но текущие фильтры их скрывают. Проверьте диапазон дат и выбранный товар.")
+    elif current_year not in cube_years(cube):
+        st.info(f"ℹ️ В исходных данных нет {current_year} года.")
+    
+    if weekly_data is not None and not weekly_data.empty:
         # Создаем график
         fig_weekly = go.Figure()
+        week_labels = list(weekly_data.index)
         
-        # Подготавливаем данные для графика
-        week_labels = [w['week_label'] for w in weekly_data]
-        orders_2024 = [w['orders_2024'] for w in weekly_data]
-        sales_2024 = [w['sales_2024'] for w in weekly_data]
-        orders_2025 = [w['orders_2025'] for w in weekly_data]
-        sales_2025 = [w['sales_2025'] for w in weekly_data]
-        orders_2026 = [w['orders_2026'] for w in weekly_data]
-        sales_2026 = [w['sales_2026'] for w in weekly_data]
-        
-        # Заказы 2024
-        fig_weekly.add_trace(go.Bar(
-            x=week_labels,
-            y=orders_2024,
-            name='Заказы 2024',
-            marker_color='blue',
-            opacity=0.8
-        ))
-        
-        # Выкупы 2024
-        fig_weekly.add_trace(go.Bar(
-            x=week_labels,
-            y=sales_2024,
-            name='Выкупы 2024',
-            marker_color='lightblue',
-            opacity=0.8
-        ))
-        
-        # Заказы 2025
-        fig_weekly.add_trace(go.Bar(
-            x=week_labels,
-            y=orders_2025,
-            name='Заказы 2025',
-            marker_color='red',
-            opacity=0.8
-        ))
-        
-        # Выкупы 2025
-        fig_weekly.add_trace(go.Bar(
-            x=week_labels,
-            y=sales_2025,
-            name='Выкупы 2025',
-            marker_color='orange',
-            opacity=0.8
-        ))
-        
-        # Заказы 2026
-        fig_weekly.add_trace(go.Bar(
-            x=week_labels,
-            y=orders_2026,
-            name='Заказы 2026',
-            marker_color='green',
-            opacity=0.8
-        ))
-        
-        # Выкупы 2026
-        fig_weekly.add_trace(go.Bar(
-            x=week_labels,
-            y=sales_2026,
-            name='Выкупы 2026',
-            marker_color='lightgreen',
-            opacity=0.8
-        ))
+        for year in years:
+            orders_color, sales_color = year_colors(year)
+            fig_weekly.add_trace(go.Bar(
+                x=week_labels,
+                y=weekly_values('Заказали, шт', year),
+                name=f'Заказы {year}',
+                marker_color=orders_color,
+                opacity=0.8
+            ))
+            fig_weekly.add_trace(go.Bar(
+                x=week_labels,
+                y=weekly_values('Выкупили, шт', year),
+                name=f'Выкупы {year}',
+                marker_color=sales_color,
+                opacity=0.8
+            ))
         
         # Настройка графика
         fig_weekly.update_layout(
-            title='Заказы и выкупы по неделям: 2024 vs 2025 vs 2026',
+            title=f'Заказы и выкупы по неделям: {years_title}',
             xaxis_title='Неделя (месяц)',
             yaxis_title='Количество',
             barmode='group',
@@ -1172,55 +1103,20 @@ with tab1:
         
         # Статистика по годам
         st.subheader("📊 Статистика по годам")
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            total_orders_2024 = sum(w['orders_2024'] for w in weekly_data)
-            st.metric("📦 Заказы 2024", f"{total_orders_2024:,}")
-        
-        with col2:
-            total_orders_2025 = sum(w['orders_2025'] for w in weekly_data)
-            st.metric("📦 Заказы 2025", f"{total_orders_2025:,}")
-        
-        with col3:
-            total_orders_2026 = sum(w['orders_2026'] for w in weekly_data)
-            st.metric("📦 Заказы 2026", f"{total_orders_2026:,}")
-        
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            total_sales_2024 = sum(w['sales_2024'] for w in weekly_data)
-            st.metric("💰 Выкупы 2024", f"{total_sales_2024:,}")
-        
-        with col2:
-            total_sales_2025 = sum(w['sales_2025'] for w in weekly_data)
-            st.metric("💰 Выкупы 2025", f"{total_sales_2025:,}")
-        
-        with col3:
-            total_sales_2026 = sum(w['sales_2026'] for w in weekly_data)
-            st.metric("💰 Выкупы 2026", f"{total_sales_2026:,}")
-        
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            conv_y_2024 = (total_sales_2024 / total_orders_2024 * 100) if total_orders_2024 else 0
-            st.metric("📈 Конверсия 2024, %", f"{conv_y_2024:.1f}")
-        with col2:
-            conv_y_2025 = (total_sales_2025 / total_orders_2025 * 100) if total_orders_2025 else 0
-            st.metric("📈 Конверсия 2025, %", f"{conv_y_2025:.1f}")
-        with col3:
-            conv_y_2026 = (total_sales_2026 / total_orders_2026 * 100) if total_orders_2026 else 0
-            st.metric("📈 Конверсия 2026, %", f"{conv_y_2026:.1f}")
+        year_totals = rollup(filtered_cube, 'Год', ['Заказали, шт', 'Выкупили, шт']).set_index('Год')
+        render_year_totals(year_totals)
         
         # Конверсия по неделям (выкупы/заказы) и сравнение по годам
         st.subheader("📊 Конверсия по неделям (сравнение по годам)")
-        conv_2024 = [(w['sales_2024'] / w['orders_2024'] * 100) if w['orders_2024'] else None for w in weekly_data]
-        conv_2025 = [(w['sales_2025'] / w['orders_2025'] * 100) if w['orders_2025'] else None for w in weekly_data]
-        conv_2026 = [(w['sales_2026'] / w['orders_2026'] * 100) if w['orders_2026'] else None for w in weekly_data]
+        conv_by_year = {
+            year: [(s / o * 100) if o else None
+                   for o, s in zip(weekly_values('Заказали, шт', year), weekly_values('Выкупили, шт', year))]
+            for year in years
+        }
         
         fig_conv = go.Figure()
-        fig_conv.add_trace(go.Scatter(x=week_labels, y=conv_2024, name='Конверсия 2024, %', mode='lines+markers', line=dict(color='blue')))
-        fig_conv.add_trace(go.Scatter(x=week_labels, y=conv_2025, name='Конверсия 2025, %', mode='lines+markers', line=dict(color='red')))
-        fig_conv.add_trace(go.Scatter(x=week_labels, y=conv_2026, name='Конверсия 2026, %', mode='lines+markers', line=dict(color='green')))
+        for year in years:
+            fig_conv.add_trace(go.Scatter(x=week_labels, y=conv_by_year[year], name=f'Конверсия {year}, %', mode='lines+markers', line=dict(color=year_colors(year)[0])))
         fig_conv.update_layout(
             title='Процент выкупа по неделям (выкупы / заказы, %)',
             xaxis_title='Неделя (месяц)',
@@ -1232,121 +1128,56 @@ with tab1:
         st.plotly_chart(fig_conv, use_container_width=True)
         
         # Таблица: Процент выкупа (выкупы/заказы) по неделям
-        conv_table = pd.DataFrame({
-            'Неделя': week_labels,
-            'Процент выкупа 2024, %': [f"{x:.1f}" if x is not None else "—" for x in conv_2024],
-            'Процент выкупа 2025, %': [f"{x:.1f}" if x is not None else "—" for x in conv_2025],
-            'Процент выкупа 2026, %': [f"{x:.1f}" if x is not None else "—" for x in conv_2026]
-        })
+        conv_table = pd.DataFrame({'Неделя': week_labels})
+        for year in years:
+            conv_table[f'Процент выкупа {year}, %'] = [f"{x:.1f}" if x is not None else "—" for x in conv_by_year[year]]
         st.dataframe(conv_table, use_container_width=True, hide_index=True)
         
         # Конверсии из отчётов: переходы, корзина, конверсия в корзину, в заказ, процент выкупа
         st.subheader("📋 Конверсии из отчётов по неделям (сравнение по годам)")
-        has_views = any(w.get('views_2024', 0) or w.get('views_2025', 0) or w.get('views_2026', 0) for w in weekly_data)
+        views = {year: weekly_values('Переходы в карточку', year) for year in years}
+        cart = {year: weekly_values('Положили в корзину', year) for year in years}
+        has_views = any(any(v) for v in views.values())
         if has_views:
-            views_2024 = [w.get('views_2024', 0) for w in weekly_data]
-            views_2025 = [w.get('views_2025', 0) for w in weekly_data]
-            views_2026 = [w.get('views_2026', 0) for w in weekly_data]
-            cart_2024 = [w.get('cart_2024', 0) for w in weekly_data]
-            cart_2025 = [w.get('cart_2025', 0) for w in weekly_data]
-            cart_2026 = [w.get('cart_2026', 0) for w in weekly_data]
             # Конверсия в корзину, % = Положили в корзину / Переходы в карточку * 100
-            conv_cart_2024 = [(cart_2024[i] / views_2024[i] * 100) if views_2024[i] else None for i in range(len(weekly_data))]
-            conv_cart_2025 = [(cart_2025[i] / views_2025[i] * 100) if views_2025[i] else None for i in range(len(weekly_data))]
-            conv_cart_2026 = [(cart_2026[i] / views_2026[i] * 100) if views_2026[i] else None for i in range(len(weekly_data))]
+            conv_cart = {year: [(c / v * 100) if v else None for v, c in zip(views[year], cart[year])] for year in years}
             # Конверсия в заказ, % = Заказали / Положили в корзину * 100
-            def _conv_order(orders, cart):
-                return (orders / cart * 100) if cart else None
-            conv_order_2024 = [_conv_order(w['orders_2024'], w.get('cart_2024', 0)) for w in weekly_data]
-            conv_order_2025 = [_conv_order(w['orders_2025'], w.get('cart_2025', 0)) for w in weekly_data]
-            conv_order_2026 = [_conv_order(w['orders_2026'], w.get('cart_2026', 0)) for w in weekly_data]
+            conv_order = {year: [(o / c * 100) if c else None for o, c in zip(weekly_values('Заказали, шт', year), cart[year])] for year in years}
             
             tab_conv1, tab_conv2, tab_conv3 = st.tabs(["Переходы и корзина", "Конверсия в корзину, %", "Конверсия в заказ, %"])
             with tab_conv1:
                 st.caption("Переходы в карточку и Положили в корзину по неделям")
-                df_views = pd.DataFrame({
-                    'Неделя': week_labels,
-                    'Переходы 2024': views_2024, 'Переходы 2025': views_2025, 'Переходы 2026': views_2026,
-                    'В корзину 2024': cart_2024, 'В корзину 2025': cart_2025, 'В корзину 2026': cart_2026
-                })
+                df_views = pd.DataFrame({'Неделя': week_labels})
+                for year in years:
+                    df_views[f'Переходы {year}'] = views[year]
+                for year in years:
+                    df_views[f'В корзину {year}'] = cart[year]
                 st.dataframe(df_views, use_container_width=True, hide_index=True)
             with tab_conv2:
                 fig_cart = go.Figure()
-                fig_cart.add_trace(go.Scatter(x=week_labels, y=conv_cart_2024, name='Конв. в корзину 2024, %', mode='lines+markers', line=dict(color='blue')))
-                fig_cart.add_trace(go.Scatter(x=week_labels, y=conv_cart_2025, name='Конв. в корзину 2025, %', mode='lines+markers', line=dict(color='red')))
-                fig_cart.add_trace(go.Scatter(x=week_labels, y=conv_cart_2026, name='Конв. в корзину 2026, %', mode='lines+markers', line=dict(color='green')))
+                for year in years:
+                    fig_cart.add_trace(go.Scatter(x=week_labels, y=conv_cart[year], name=f'Конв. в корзину {year}, %', mode='lines+markers', line=dict(color=year_colors(year)[0])))
                 fig_cart.update_layout(title='Конверсия в корзину, % (Положили в корзину / Переходы в карточку)', xaxis_title='Неделя', yaxis_title='%', height=380, xaxis=dict(tickangle=45))
                 st.plotly_chart(fig_cart, use_container_width=True)
-                df_cart = pd.DataFrame({
-                    'Неделя': week_labels,
-                    'Конв. в корзину 2024, %': [f"{x:.1f}" if x is not None else "—" for x in conv_cart_2024],
-                    'Конв. в корзину 2025, %': [f"{x:.1f}" if x is not None else "—" for x in conv_cart_2025],
-                    'Конв. в корзину 2026, %': [f"{x:.1f}" if x is not None else "—" for x in conv_cart_2026]
-                })
+                df_cart = pd.DataFrame({'Неделя': week_labels})
+                for year in years:
+                    df_cart[f'Конв. в корзину {year}, %'] = [f"{x:.1f}" if x is not None else "—" for x in conv_cart[year]]
                 st.dataframe(df_cart, use_container_width=True, hide_index=True)
             with tab_conv3:
                 fig_ord = go.Figure()
-                fig_ord.add_trace(go.Scatter(x=week_labels, y=conv_order_2024, name='Конв. в заказ 2024, %', mode='lines+markers', line=dict(color='blue')))
-                fig_ord.add_trace(go.Scatter(x=week_labels, y=conv_order_2025, name='Конв. в заказ 2025, %', mode='lines+markers', line=dict(color='red')))
-                fig_ord.add_trace(go.Scatter(x=week_labels, y=conv_order_2026, name='Конв. в заказ 2026, %', mode='lines+markers', line=dict(color='green')))
+                for year in years:
+                    fig_ord.add_trace(go.Scatter(x=week_labels, y=conv_order[year], name=f'Конв. в заказ {year}, %', mode='lines+markers', line=dict(color=year_colors(year)[0])))
                 fig_ord.update_layout(title='Конверсия в заказ, % (Заказы / Положили в корзину)', xaxis_title='Неделя', yaxis_title='%', height=380, xaxis=dict(tickangle=45))
                 st.plotly_chart(fig_ord, use_container_width=True)
-                df_ord = pd.DataFrame({
-                    'Неделя': week_labels,
-                    'Конв. в заказ 2024, %': [f"{x:.1f}" if x is not None else "—" for x in conv_order_2024],
-                    'Конв. в заказ 2025, %': [f"{x:.1f}" if x is not None else "—" for x in conv_order_2025],
-                    'Конв. в заказ 2026, %': [f"{x:.1f}" if x is not None else "—" for x in conv_order_2026]
-                })
+                df_ord = pd.DataFrame({'Неделя': week_labels})
+                for year in years:
+                    df_ord[f'Конв. в заказ {year}, %'] = [f"{x:.1f}" if x is not None else "—" for x in conv_order[year]]
                 st.dataframe(df_ord, use_container_width=True, hide_index=True)
         else:
             st.info("Для конверсий из отчётов нужны колонки «Переходы в карточку» и «Положили в корзину» в данных.")
         
-        # Сравнение
-        has_orders_24_25 = total_orders_2024 > 0 and total_orders_2025 > 0
-        has_orders_25_26 = total_orders_2025 > 0 and total_orders_2026 > 0
-        has_sales_24_25 = total_sales_2024 > 0 and total_sales_2025 > 0
-        has_sales_25_26 = total_sales_2025 > 0 and total_sales_2026 > 0
-        
-        if has_orders_24_25 or has_orders_25_26 or has_sales_24_25 or has_sales_25_26:
-            st.subheader("🔄 Сравнение")
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                if has_orders_24_25:
-                    orders_growth_24_25 = ((total_orders_2025 - total_orders_2024) / total_orders_2024 * 100)
-                    st.metric(
-                        "📈 Рост заказов 2024->2025", 
-                        f"{orders_growth_24_25:+.1f}%",
-                        delta_color="normal"
-                    )
-            
-            with col2:
-                if has_orders_25_26:
-                    orders_growth_25_26 = ((total_orders_2026 - total_orders_2025) / total_orders_2025 * 100)
-                    st.metric(
-                        "📈 Рост заказов 2025->2026", 
-                        f"{orders_growth_25_26:+.1f}%",
-                        delta_color="normal"
-                    )
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                if has_sales_24_25:
-                    sales_growth_24_25 = ((total_sales_2025 - total_sales_2024) / total_sales_2024 * 100)
-                    st.metric(
-                        "📈 Рост выкупов 2024->2025", 
-                        f"{sales_growth_24_25:+.1f}%",
-                        delta_color="normal"
-                    )
-            
-            with col2:
-                if has_sales_25_26:
-                    sales_growth_25_26 = ((total_sales_2026 - total_sales_2025) / total_sales_2025 * 100)
-                    st.metric(
-                        "📈 Рост выкупов 2025->2026", 
-                        f"{sales_growth_25_26:+.1f}%",
-                        delta_color="normal"
-                    )
+        # Сравнение соседних лет
+        render_year_growth(year_totals)
     else:
         st.info("Нет данных для отображения графика по неделям")
     
@@ -1358,7 +1189,7 @@ with tab1:
         "Выберите тип отображения:",
         ["Общий тренд", "Сравнение по годам", "Совмещенный график"],
         horizontal=True,
-        help="Общий тренд - все данные, Сравнение по годам - отдельные графики, Совмещенный график - 2024, 2025 и 2026 на одном графике"
+        help="Общий тренд - все данные, Сравнение по годам - отдельные графики, Совмещенный график - все годы на одном графике"
     )
     
     if chart_type == "Общий тренд":
@@ -1373,150 +1204,44 @@ with tab1:
         
     elif chart_type == "Сравнение по годам":
         # Отдельные графики для каждого года
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            # График 2024 года
-            data_2024 = filtered_df[filtered_df['Год'] == 2024]
-            if not data_2024.empty:
-                agg_2024 = data_2024.groupby(pd.Grouper(key='Дата', freq=period)).agg({
-                    'Заказали, шт': 'sum',
-                    'Выкупили, шт': 'sum'
-                }).reset_index()
-                
-                fig_2024 = go.Figure()
-                fig_2024.add_trace(go.Scatter(x=agg_2024['Дата'], y=agg_2024['Заказали, шт'], 
-                                            name='Заказы', line=dict(color='blue')))
-                fig_2024.add_trace(go.Scatter(x=agg_2024['Дата'], y=agg_2024['Выкупили, шт'], 
-                                            name='Выкупы', line=dict(color='green')))
-                fig_2024.update_layout(title='2024 год - Заказы и выкупы', xaxis_title='Дата', yaxis_title='Количество')
-                st.plotly_chart(fig_2024, use_container_width=True)
-            else:
-                st.info("Нет данных за 2024 год")
-        
-        with col2:
-            # График 2025 года
-            data_2025 = filtered_df[filtered_df['Год'] == 2025]
-            if not data_2025.empty:
-                agg_2025 = data_2025.groupby(pd.Grouper(key='Дата', freq=period)).agg({
-                    'Заказали, шт': 'sum',
-                    'Выкупили, шт': 'sum'
-                }).reset_index()
-                
-                fig_2025 = go.Figure()
-                fig_2025.add_trace(go.Scatter(x=agg_2025['Дата'], y=agg_2025['Заказали, шт'], 
-                                            name='Заказы', line=dict(color='blue')))
-                fig_2025.add_trace(go.Scatter(x=agg_2025['Дата'], y=agg_2025['Выкупили, шт'], 
-                                            name='Выкупы', line=dict(color='green')))
-                fig_2025.update_layout(title='2025 год - Заказы и выкупы', xaxis_title='Дата', yaxis_title='Количество')
-                st.plotly_chart(fig_2025, use_container_width=True)
-            else:
-                st.info("Нет данных за 2025 год")
-        
-        with col3:
-            # График 2026 года
-            data_2026 = filtered_df[filtered_df['Год'] == 2026]
-            if not data_2026.empty:
-                agg_2026 = data_2026.groupby(pd.Grouper(key='Дата', freq=period)).agg({
-                    'Заказали, шт': 'sum',
-                    'Выкупили, шт': 'sum'
-                }).reset_index()
-                
-                fig_2026 = go.Figure()
-                fig_2026.add_trace(go.Scatter(x=agg_2026['Дата'], y=agg_2026['Заказали, шт'], 
-                                            name='Заказы', line=dict(color='green')))
-                fig_2026.add_trace(go.Scatter(x=agg_2026['Дата'], y=agg_2026['Выкупили, шт'], 
-                                            name='Выкупы', line=dict(color='lightgreen')))
-                fig_2026.update_layout(title='2026 год - Заказы и выкупы', xaxis_title='Дата', yaxis_title='Количество')
-                st.plotly_chart(fig_2026, use_container_width=True)
-            else:
-                st.info("Нет данных за 2026 год")
+        for col, year in zip(st.columns(max(len(years), 1)), years):
+            with col:
+                agg_year = rollup_by_period(slice_cube(filtered_cube, years=[year]), period, ['Заказали, шт', 'Выкупили, шт'])
+                fig_year = go.Figure()
+                fig_year.add_trace(go.Scatter(x=agg_year['Дата'], y=agg_year['Заказали, шт'], 
+                                            name='Заказы', line=dict(color=year_colors(year)[0])))
+                fig_year.add_trace(go.Scatter(x=agg_year['Дата'], y=agg_year['Выкупили, шт'], 
+                                            name='Выкупы', line=dict(color=year_colors(year)[1])))
+                fig_year.update_layout(title=f'{year} год - Заказы и выкупы', xaxis_title='Дата', yaxis_title='Количество')
+                st.plotly_chart(fig_year, use_container_width=True)
+        if not years:
+            st.info("Нет данных за выбранный период")
     
     elif chart_type == "Совмещенный график":
-        # Совмещенный график 2024, 2025 и 2026 года
+        # Совмещенный график всех лет
         fig = go.Figure()
         
-        # Данные 2024 года
-        data_2024 = filtered_df[filtered_df['Год'] == 2024]
-        if not data_2024.empty:
-            agg_2024 = data_2024.groupby(pd.Grouper(key='Дата', freq=period)).agg({
-                'Заказали, шт': 'sum',
-                'Выкупили, шт': 'sum'
-            }).reset_index()
-            
-            # Заказы 2024
-            fig.add_trace(go.Scatter(
-                x=agg_2024['Дата'], 
-                y=agg_2024['Заказали, шт'], 
-                name='Заказы 2024', 
-                line=dict(color='blue', width=2),
-                mode='lines+markers'
-            ))
-            
-            # Выкупы 2024
-            fig.add_trace(go.Scatter(
-                x=agg_2024['Дата'], 
-                y=agg_2024['Выкупили, шт'], 
-                name='Выкупы 2024', 
-                line=dict(color='lightblue', width=2),
-                mode='lines+markers'
-            ))
-        
-        # Данные 2025 года
-        data_2025 = filtered_df[filtered_df['Год'] == 2025]
-        if not data_2025.empty:
-            agg_2025 = data_2025.groupby(pd.Grouper(key='Дата', freq=period)).agg({
-                'Заказали, шт': 'sum',
-                'Выкупили, шт': 'sum'
-            }).reset_index()
-            
-            # Заказы 2025
-            fig.add_trace(go.Scatter(
-                x=agg_2025['Дата'], 
-                y=agg_2025['Заказали, шт'], 
-                name='Заказы 2025', 
-                line=dict(color='red', width=2),
-                mode='lines+markers'
-            ))
-            
-            # Выкупы 2025
-            fig.add_trace(go.Scatter(
-                x=agg_2025['Дата'], 
-                y=agg_2025['Выкупили, шт'], 
-                name='Выкупы 2025', 
-                line=dict(color='orange', width=2),
-                mode='lines+markers'
-            ))
-        
-        # Данные 2026 года
-        data_2026 = filtered_df[filtered_df['Год'] == 2026]
-        if not data_2026.empty:
-            agg_2026 = data_2026.groupby(pd.Grouper(key='Дата', freq=period)).agg({
-                'Заказали, шт': 'sum',
-                'Выкупили, шт': 'sum'
-            }).reset_index()
-            
-            # Заказы 2026
+        for year in years:
+            agg_year = rollup_by_period(slice_cube(filtered_cube, years=[year]), period, ['Заказали, шт', 'Выкупили, шт'])
+            orders_color, sales_color = year_colors(year)
             fig.add_trace(go.Scatter(
-                x=agg_2026['Дата'], 
-                y=agg_2026['Заказали, шт'], 
-                name='Заказы 2026', 
-                line=dict(color='green', width=2),
+                x=agg_year['Дата'], 
+                y=agg_year['Заказали, шт'], 
+                name=f'Заказы {year}', 
+                line=dict(color=orders_color, width=2),
                 mode='lines+markers'
             ))
-            
-            # Выкупы 2026
             fig.add_trace(go.Scatter(
-                x=agg_2026['Дата'], 
-                y=agg_2026['Выкупили, шт'], 
-                name='Выкупы 2026', 
-                line=dict(color='lightgreen', width=2),
+                x=agg_year['Дата'], 
+                y=agg_year['Выкупили, шт'], 
+                name=f'Выкупы {year}', 
+                line=dict(color=sales_color, width=2),
                 mode='lines+markers'
             ))
         
         # Настройка графика
         fig.update_layout(
-            title='Совмещенный график: Заказы и выкупы 2024 vs 2025 vs 2026',
+            title=f'Совмещенный график: Заказы и выкупы {years_title}',
             xaxis_title='Дата',
             yaxis_title='Количество',
             hovermode='x unified',
@@ -1532,108 +1257,11 @@ with tab1:
         st.plotly_chart(fig, width='stretch')
         
         # Статистика по годам
-        if not data_2024.empty or not data_2025.empty or not data_2026.empty:
+        if years:
             st.subheader("📊 Статистика по годам")
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                if not data_2024.empty:
-                    orders_2024 = data_2024['Заказали, шт'].sum()
-                    st.metric("📦 Заказы 2024", f"{orders_2024:,}")
-                else:
-                    st.metric("📦 Заказы 2024", "Нет данных")
-            
-            with col2:
-                if not data_2025.empty:
-                    orders_2025 = data_2025['Заказали, шт'].sum()
-                    st.metric("📦 Заказы 2025", f"{orders_2025:,}")
-                else:
-                    st.metric("📦 Заказы 2025", "Нет данных")
-            
-            with col3:
-                if not data_2026.empty:
-                    orders_2026 = data_2026['Заказали, шт'].sum()
-                    st.metric("📦 Заказы 2026", f"{orders_2026:,}")
-                else:
-                    st.metric("📦 Заказы 2026", "Нет данных")
-            
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                if not data_2024.empty:
-                    sales_2024 = data_2024['Выкупили, шт'].sum()
-                    st.metric("💰 Выкупы 2024", f"{sales_2024:,}")
-                else:
-                    st.metric("💰 Выкупы 2024", "Нет данных")
-            
-            with col2:
-                if not data_2025.empty:
-                    sales_2025 = data_2025['Выкупили, шт'].sum()
-                    st.metric("💰 Выкупы 2025", f"{sales_2025:,}")
-                else:
-                    st.metric("💰 Выкупы 2025", "Нет данных")
-            
-            with col3:
-                if not data_2026.empty:
-                    sales_2026 = data_2026['Выкупили, шт'].sum()
-                    st.metric("💰 Выкупы 2026", f"{sales_2026:,}")
-                else:
-                    st.metric("💰 Выкупы 2026", "Нет данных")
-            
-            # Сравнение
-            orders_2024 = data_2024['Заказали, шт'].sum() if not data_2024.empty else 0
-            orders_2025 = data_2025['Заказали, шт'].sum() if not data_2025.empty else 0
-            orders_2026 = data_2026['Заказали, шт'].sum() if not data_2026.empty else 0
-            sales_2024 = data_2024['Выкупили, шт'].sum() if not data_2024.empty else 0
-            sales_2025 = data_2025['Выкупили, шт'].sum() if not data_2025.empty else 0
-            sales_2026 = data_2026['Выкупили, шт'].sum() if not data_2026.empty else 0
-            
-            has_orders_24_25 = orders_2024 > 0 and orders_2025 > 0
-            has_orders_25_26 = orders_2025 > 0 and orders_2026 > 0
-            has_sales_24_25 = sales_2024 > 0 and sales_2025 > 0
-            has_sales_25_26 = sales_2025 > 0 and sales_2026 > 0
-            
-            if has_orders_24_25 or has_orders_25_26 or has_sales_24_25 or has_sales_25_26:
-                st.subheader("🔄 Сравнение")
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    if has_orders_24_25:
-                        orders_growth_24_25 = ((orders_2025 - orders_2024) / orders_2024 * 100)
-                        st.metric(
-                            "📈 Рост заказов 2024->2025", 
-                            f"{orders_growth_24_25:+.1f}%",
-                            delta_color="normal"
-                        )
-                
-                with col2:
-                    if has_orders_25_26:
-                        orders_growth_25_26 = ((orders_2026 - orders_2025) / orders_2025 * 100)
-                        st.metric(
-                            "📈 Рост заказов 2025->2026", 
-                            f"{orders_growth_25_26:+.1f}%",
-                            delta_color="normal"
-                        )
-                
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    if has_sales_24_25:
-                        sales_growth_24_25 = ((sales_2025 - sales_2024) / sales_2024 * 100)
-                        st.metric(
-                            "📈 Рост выкупов 2024->2025", 
-                            f"{sales_growth_24_25:+.1f}%",
-                            delta_color="normal"
-                        )
-                
-                with col2:
-                    if has_sales_25_26:
-                        sales_growth_25_26 = ((sales_2026 - sales_2025) / sales_2025 * 100)
-                        st.metric(
-                            "📈 Рост выкупов 2025->2026", 
-                            f"{sales_growth_25_26:+.1f}%",
-                            delta_color="normal"
-                        )
+            year_totals = rollup(filtered_cube, 'Год', ['Заказали, шт', 'Выкупили, шт']).set_index('Год')
+            render_year_totals(year_totals, with_conversion=False)
+            render_year_growth(year_totals)
         
         # KPI анализ: текущий период vs аналогичный период прошлого года
         # Получаем текущую дату и неделю
@@ -1895,9 +1523,11 @@ with tab4:
         "Выберите тип отображения:",
         ["Общие данные", "Сравнение по годам", "Совмещенные графики"],
         horizontal=True,
-        help="Общие данные - все данные, Сравнение по годам - отдельные графики, Совмещенные графики - 2024, 2025 и 2026 на одном графике"
+        help="Общие данные - все данные, Сравнение по годам - отдельные графики, Совмещенные графики - все годы на одном графике"
     )
     
+    period_measures = ['Заказали, шт', 'Выкупили, шт']
+    
     if period_chart_type == "Общие данные":
         # Оригинальные графики
         fig = make_subplots(
@@ -1907,10 +1537,7 @@ with tab4:
         )
         
         # По месяцам
-        monthly_data = filtered_df.groupby('Месяц').agg({
-            'Заказали, шт': 'sum',
-            'Выкупили, шт': 'sum'
-        }).reset_index()
+        monthly_data = rollup(filtered_cube, 'Месяц', period_measures)
         
         fig.add_trace(
             go.Bar(x=monthly_data['Месяц'], y=monthly_data['Заказали, шт'], 
@@ -1924,10 +1551,7 @@ with tab4:
         )
         
         # По неделям
-        weekly_data = filtered_df.groupby('Неделя').agg({
-            'Заказали, шт': 'sum',
-            'Выкупили, шт': 'sum'
-        }).reset_index()
+        weekly_data = rollup(filtered_cube, 'Неделя', period_measures)
         
         fig.add_trace(
             go.Bar(x=weekly_data['Неделя'], y=weekly_data['Заказали, шт'], 
@@ -1945,284 +1569,75 @@ with tab4:
         
     elif period_chart_type == "Сравнение по годам":
         # Отдельные графики для каждого года
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            st.subheader("📊 2024 год")
-            data_2024 = filtered_df[filtered_df['Год'] == 2024]
-            if not data_2024.empty:
-                # По месяцам 2024
-                monthly_2024 = data_2024.groupby('Месяц').agg({
-                    'Заказали, шт': 'sum',
-                    'Выкупили, шт': 'sum'
-                }).reset_index()
+        monthly_by_year = rollup(filtered_cube, ['Год', 'Месяц'], period_measures)
+        weekly_by_year = rollup(filtered_cube, ['Год', 'Неделя'], period_measures)
+        for col, year in zip(st.columns(max(len(years), 1)), years):
+            with col:
+                st.subheader(f"📊 {year} год")
+                orders_color, sales_color = year_colors(year)
                 
-                fig_monthly_2024 = go.Figure()
-                fig_monthly_2024.add_trace(go.Bar(x=monthly_2024['Месяц'], y=monthly_2024['Заказали, шт'], 
-                                               name='Заказы', marker_color='blue'))
-                fig_monthly_2024.add_trace(go.Bar(x=monthly_2024['Месяц'], y=monthly_2024['Выкупили, шт'], 
-                                               name='Выкупы', marker_color='green'))
-                fig_monthly_2024.update_layout(title='2024 - По месяцам', height=300)
-                st.plotly_chart(fig_monthly_2024, use_container_width=True)
+                # По месяцам
+                monthly_year = monthly_by_year[monthly_by_year['Год'] == year]
+                fig_monthly_year = go.Figure()
+                fig_monthly_year.add_trace(go.Bar(x=monthly_year['Месяц'], y=monthly_year['Заказали, шт'], 
+                                               name='Заказы', marker_color=orders_color))
+                fig_monthly_year.add_trace(go.Bar(x=monthly_year['Месяц'], y=monthly_year['Выкупили, шт'], 
+                                               name='Выкупы', marker_color=sales_color))
+                fig_monthly_year.update_layout(title=f'{year} - По месяцам', height=300)
+                st.plotly_chart(fig_monthly_year, use_container_width=True)
                 
-                # По неделям 2024
-                weekly_2024 = data_2024.groupby('Неделя').agg({
-                    'Заказали, шт': 'sum',
-                    'Выкупили, шт': 'sum'
-                }).reset_index()
-                
-                fig_weekly_2024 = go.Figure()
-                fig_weekly_2024.add_trace(go.Bar(x=weekly_2024['Неделя'], y=weekly_2024['Заказали, шт'], 
-                                              name='Заказы', marker_color='blue'))
-                fig_weekly_2024.add_trace(go.Bar(x=weekly_2024['Неделя'], y=weekly_2024['Выкупили, шт'], 
-                                              name='Выкупы', marker_color='green'))
-                fig_weekly_2024.update_layout(title='2024 - По неделям', height=300)
-                st.plotly_chart(fig_weekly_2024, use_container_width=True)
-            else:
-                st.info("Нет данных за 2024 год")
-        
-        with col2:
-            st.subheader("📊 2025 год")
-            data_2025 = filtered_df[filtered_df['Год'] == 2025]
-            if not data_2025.empty:
-                # По месяцам 2025
-                monthly_2025 = data_2025.groupby('Месяц').agg({
-                    'Заказали, шт': 'sum',
-                    'Выкупили, шт': 'sum'
-                }).reset_index()
-                
-                fig_monthly_2025 = go.Figure()
-                fig_monthly_2025.add_trace(go.Bar(x=monthly_2025['Месяц'], y=monthly_2025['Заказали, шт'], 
-                                               name='Заказы', marker_color='red'))
-                fig_monthly_2025.add_trace(go.Bar(x=monthly_2025['Месяц'], y=monthly_2025['Выкупили, шт'], 
-                                               name='Выкупы', marker_color='orange'))
-                fig_monthly_2025.update_layout(title='2025 - По месяцам', height=300)
-                st.plotly_chart(fig_monthly_2025, use_container_width=True)
-                
-                # По неделям 2025
-                weekly_2025 = data_2025.groupby('Неделя').agg({
-                    'Заказали, шт': 'sum',
-                    'Выкупили, шт': 'sum'
-                }).reset_index()
-                
-                fig_weekly_2025 = go.Figure()
-                fig_weekly_2025.add_trace(go.Bar(x=weekly_2025['Неделя'], y=weekly_2025['Заказали, шт'], 
-                                              name='Заказы', marker_color='red'))
-                fig_weekly_2025.add_trace(go.Bar(x=weekly_2025['Неделя'], y=weekly_2025['Выкупили, шт'], 
-                                              name='Выкупы', marker_color='orange'))
-                fig_weekly_2025.update_layout(title='2025 - По неделям', height=300)
-                st.plotly_chart(fig_weekly_2025, use_container_width=True)
-            else:
-                st.info("Нет данных за 2025 год")
-        
-        with col3:
-            st.subheader("📊 2026 год")
-            data_2026 = filtered_df[filtered_df['Год'] == 2026]
-            if not data_2026.empty:
-                # По месяцам 2026
-                monthly_2026 = data_2026.groupby('Месяц').agg({
-                    'Заказали, шт': 'sum',
-                    'Выкупили, шт': 'sum'
-                }).reset_index()
-                
-                fig_monthly_2026 = go.Figure()
-                fig_monthly_2026.add_trace(go.Bar(x=monthly_2026['Месяц'], y=monthly_2026['Заказали, шт'], 
-                                               name='Заказы', marker_color='green'))
-                fig_monthly_2026.add_trace(go.Bar(x=monthly_2026['Месяц'], y=monthly_2026['Выкупили, шт'], 
-                                               name='Выкупы', marker_color='lightgreen'))
-                fig_monthly_2026.update_layout(title='2026 - По месяцам', height=300)
-                st.plotly_chart(fig_monthly_2026, use_container_width=True)
-                
-                # По неделям 2026
-                weekly_2026 = data_2026.groupby('Неделя').agg({
-                    'Заказали, шт': 'sum',
-                    'Выкупили, шт': 'sum'
-                }).reset_index()
-                
-                fig_weekly_2026 = go.Figure()
-                fig_weekly_2026.add_trace(go.Bar(x=weekly_2026['Неделя'], y=weekly_2026['Заказали, шт'], 
-                                              name='Заказы', marker_color='green'))
-                fig_weekly_2026.add_trace(go.Bar(x=weekly_2026['Неделя'], y=weekly_2026['Выкупили, шт'], 
-                                              name='Выкупы', marker_color='lightgreen'))
-                fig_weekly_2026.update_layout(title='2026 - По неделям', height=300)
-                st.plotly_chart(fig_weekly_2026, use_container_width=True)
-            else:
-                st.info("Нет данных за 2026 год")
+                # По неделям
+                weekly_year = weekly_by_year[weekly_by_year['Год'] == year]
+                fig_weekly_year = go.Figure()
+                fig_weekly_year.add_trace(go.Bar(x=weekly_year['Неделя'], y=weekly_year['Заказали, шт'], 
+                                              name='Заказы', marker_color=orders_color))
+                fig_weekly_year.add_trace(go.Bar(x=weekly_year['Неделя'], y=weekly_year['Выкупили, шт'], 
+                                              name='Выкупы', marker_color=sales_color))
+                fig_weekly_year.update_layout(title=f'{year} - По неделям', height=300)
+                st.plotly_chart(fig_weekly_year, use_container_width=True)
+        if not years:
+            st.info("Нет данных за выбранный период")
     
     elif period_chart_type == "Совмещенные графики":
-        # Совмещенные графики 2024, 2025 и 2026 года
-        st.subheader("📊 Совмещенные графики: 2024 vs 2025 vs 2026")
-        
-        # График по месяцам
-        fig_monthly = go.Figure()
-        
-        # Данные 2024 года по месяцам
-        data_2024 = filtered_df[filtered_df['Год'] == 2024]
-        if not data_2024.empty:
-            monthly_2024 = data_2024.groupby('Месяц').agg({
-                'Заказали, шт': 'sum',
-                'Выкупили, шт': 'sum'
-            }).reset_index()
-            
-            fig_monthly.add_trace(go.Bar(
-                x=monthly_2024['Месяц'], 
-                y=monthly_2024['Заказали, шт'], 
-                name='Заказы 2024', 
-                marker_color='blue',
-                opacity=0.8
-            ))
-            
-            fig_monthly.add_trace(go.Bar(
-                x=monthly_2024['Месяц'], 
-                y=monthly_2024['Выкупили, шт'], 
-                name='Выкупы 2024', 
-                marker_color='lightblue',
-                opacity=0.8
-            ))
-        
-        # Данные 2025 года по месяцам
-        data_2025 = filtered_df[filtered_df['Год'] == 2025]
-        if not data_2025.empty:
-            monthly_2025 = data_2025.groupby('Месяц').agg({
-                'Заказали, шт': 'sum',
-                'Выкупили, шт': 'sum'
-            }).reset_index()
-            
-            fig_monthly.add_trace(go.Bar(
-                x=monthly_2025['Месяц'], 
-                y=monthly_2025['Заказали, шт'], 
-                name='Заказы 2025', 
-                marker_color='red',
-                opacity=0.8
-            ))
-            
-            fig_monthly.add_trace(go.Bar(
-                x=monthly_2025['Месяц'], 
-                y=monthly_2025['Выкупили, шт'], 
-                name='Выкупы 2025', 
-                marker_color='orange',
-                opacity=0.8
-            ))
-        
-        # Данные 2026 года по месяцам
-        data_2026 = filtered_df[filtered_df['Год'] == 2026]
-        if not data_2026.empty:
-            monthly_2026 = data_2026.groupby('Месяц').agg({
-                'Заказали, шт': 'sum',
-                'Выкупили, шт': 'sum'
-            }).reset_index()
-            
-            fig_monthly.add_trace(go.Bar(
-                x=monthly_2026['Месяц'], 
-                y=monthly_2026['Заказали, шт'], 
-                name='Заказы 2026', 
-                marker_color='green',
-                opacity=0.8
-            ))
-            
-            fig_monthly.add_trace(go.Bar(
-                x=monthly_2026['Месяц'], 
-                y=monthly_2026['Выкупили, шт'], 
-                name='Выкупы 2026', 
-                marker_color='lightgreen',
-                opacity=0.8
-            ))
-        
-        fig_monthly.update_layout(
-            title='Заказы и выкупы по месяцам: 2024 vs 2025 vs 2026',
-            xaxis_title='Месяц',
-            yaxis_title='Количество',
-            barmode='group',
-            height=400
-        )
-        st.plotly_chart(fig_monthly, width='stretch')
-        
-        # График по неделям
-        fig_weekly = go.Figure()
-        
-        # Данные 2024 года по неделям
-        if not data_2024.empty:
-            weekly_2024 = data_2024.groupby('Неделя').agg({
-                'Заказали, шт': 'sum',
-                'Выкупили, шт': 'sum'
-            }).reset_index()
-            
-            fig_weekly.add_trace(go.Bar(
-                x=weekly_2024['Неделя'], 
-                y=weekly_2024['Заказали, шт'], 
-                name='Заказы 2024', 
-                marker_color='blue',
-                opacity=0.8
-            ))
-            
-            fig_weekly.add_trace(go.Bar(
-                x=weekly_2024['Неделя'], 
-                y=weekly_2024['Выкупили, шт'], 
-                name='Выкупы 2024', 
-                marker_color='lightblue',
-                opacity=0.8
-            ))
-        
-        # Данные 2025 года по неделям
-        if not data_2025.empty:
-            weekly_2025 = data_2025.groupby('Неделя').agg({
-                'Заказали, шт': 'sum',
-                'Выкупили, шт': 'sum'
-            }).reset_index()
-            
-            fig_weekly.add_trace(go.Bar(
-                x=weekly_2025['Неделя'], 
-                y=weekly_2025['Заказали, шт'], 
-                name='Заказы 2025', 
-                marker_color='red',
-                opacity=0.8
-            ))
-            
-            fig_weekly.add_trace(go.Bar(
-                x=weekly_2025['Неделя'], 
-                y=weekly_2025['Выкупили, шт'], 
-                name='Выкупы 2025', 
-                marker_color='orange',
-                opacity=0.8
-            ))
-        
-        # Данные 2026 года по неделям
-        if not data_2026.empty:
-            weekly_2026 = data_2026.groupby('Неделя').agg({
-                'Заказали, шт': 'sum',
-                'Выкупили, шт': 'sum'
-            }).reset_index()
-            
-            fig_weekly.add_trace(go.Bar(
-                x=weekly_2026['Неделя'], 
-                y=weekly_2026['Заказали, шт'], 
-                name='Заказы 2026', 
-                marker_color='green',
-                opacity=0.8
-            ))
-            
-            fig_weekly.add_trace(go.Bar(
-                x=weekly_2026['Неделя'], 
-                y=weekly_2026['Выкупили, шт'], 
-                name='Выкупы 2026', 
-                marker_color='lightgreen',
-                opacity=0.8
-            ))
-        
-        fig_weekly.update_layout(
-            title='Заказы и выкупы по неделям: 2024 vs 2025 vs 2026',
-            xaxis_title='Неделя',
-            yaxis_title='Количество',
-            barmode='group',
-            height=400
-        )
-        st.plotly_chart(fig_weekly, width='stretch')
+        # Совмещенные графики всех лет
+        st.subheader(f"📊 Совмещенные графики: {years_title}")
+        
+        for dimension, axis_title in (('Месяц', 'Месяц'), ('Неделя', 'Неделя')):
+            by_year = rollup(filtered_cube, ['Год', dimension], period_measures)
+            fig_period = go.Figure()
+            for year in years:
+                data_year = by_year[by_year['Год'] == year]
+                orders_color, sales_color = year_colors(year)
+                fig_period.add_trace(go.Bar(
+                    x=data_year[dimension], 
+                    y=data_year['Заказали, шт'], 
+                    name=f'Заказы {year}', 
+                    marker_color=orders_color,
+                    opacity=0.8
+                ))
+                fig_period.add_trace(go.Bar(
+                    x=data_year[dimension], 
+                    y=data_year['Выкупили, шт'], 
+                    name=f'Выкупы {year}', 
+                    marker_color=sales_color,
+                    opacity=0.8
+                ))
+            
+            period_name = 'месяцам' if dimension == 'Месяц' else 'неделям'
+            fig_period.update_layout(
+                title=f'Заказы и выкупы по {period_name}: {years_title}',
+                xaxis_title=axis_title,
+                yaxis_title='Количество',
+                barmode='group',
+                height=400
+            )
+            st.plotly_chart(fig_period, width='stretch')
 
 with tab5:
-    st.header("📅 Сравнение заказов по дням: 2024 vs 2025 vs 2026")
+    st.header(f"📅 Сравнение заказов по дням: {' vs '.join(str(y) for y in cube_years(cube))}")
     
     # Выбор месяца для сравнения
-    available_months = sorted(df['Дата'].dt.month.unique())
+    available_months = sorted(int(m) for m in cube['Месяц'].unique())
     month_names = {1: 'Январь', 2: 'Февраль', 3: 'Март', 4: 'Апрель', 5: 'Май', 6: 'Июнь',
                   7: 'Июль', 8: 'Август', 9: 'Сентябрь', 10: 'Октябрь', 11: 'Ноябрь', 12: 'Декабрь'}
     
@@ -2244,174 +1659,72 @@ with tab5:
     
     selected_month_name = month_names[selected_month]
     
-    # Фильтруем данные только за выбранный месяц
-    selected_month_data = df[df['Дата'].dt.month == selected_month]
-    
-    daily_comparison = selected_month_data.groupby(['День_месяца', 'Год']).agg({
-        'Заказали, шт': 'sum',
-        'Выкупили, шт': 'sum',
-        'Выкупили на сумму, ₽': 'sum'
-    }).reset_index()
-    
-    # Переименовываем столбец для удобства
-    daily_comparison = daily_comparison.rename(columns={'День_месяца': 'День'})
-    
-    # Сортируем по дню месяца
-    daily_comparison = daily_comparison.sort_values('День')
-    
-    # Создаем отдельные графики для 2024, 2025 и 2026 годов
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        # График для 2024 года
-        fig_2024 = go.Figure()
-        
-        data_2024 = daily_comparison[daily_comparison['Год'] == 2024]
-        if not data_2024.empty:
-            # Заказы 2024
-            fig_2024.add_trace(go.Scatter(
-                x=data_2024['День'], 
-                y=data_2024['Заказали, шт'],
-                name='Заказы',
-                line=dict(color='blue', width=2),
-                mode='lines+markers'
-            ))
-            # Выкупы 2024
-            fig_2024.add_trace(go.Scatter(
-                x=data_2024['День'], 
-                y=data_2024['Выкупили, шт'],
-                name='Выкупы',
-                line=dict(color='lightblue', width=2),
-                mode='lines+markers'
-            ))
-        
-        fig_2024.update_layout(
-            title=f'2024 год - Заказы и выкупы по дням ({selected_month_name})',
-            xaxis_title='День месяца',
-            yaxis_title='Количество',
-            height=400,
-            hovermode='x unified'
-        )
-        
-        # Настройка оси X для лучшей читаемости
-        fig_2024.update_xaxes(tickangle=45)
-        
-        st.plotly_chart(fig_2024, width='stretch')
-    
-    with col2:
-        # График для 2025 года
-        fig_2025 = go.Figure()
-        
-        data_2025 = daily_comparison[daily_comparison['Год'] == 2025]
-        if not data_2025.empty:
-            # Заказы 2025
-            fig_2025.add_trace(go.Scatter(
-                x=data_2025['День'], 
-                y=data_2025['Заказали, шт'],
-                name='Заказы',
-                line=dict(color='red', width=2),
-                mode='lines+markers'
-            ))
-            # Выкупы 2025
-            fig_2025.add_trace(go.Scatter(
-                x=data_2025['День'], 
-                y=data_2025['Выкупили, шт'],
-                name='Выкупы',
-                line=dict(color='orange', width=2),
-                mode='lines+markers'
-            ))
-        
-        fig_2025.update_layout(
-            title=f'2025 год - Заказы и выкупы по дням ({selected_month_name})',
-            xaxis_title='День месяца',
-            yaxis_title='Количество',
-            height=400,
-            hovermode='x unified'
-        )
-        
-        # Настройка оси X для лучшей читаемости
-        fig_2025.update_xaxes(tickangle=45)
-        
-        st.plotly_chart(fig_2025, width='stretch')
-    
-    with col3:
-        # График для 2026 года
-        fig_2026 = go.Figure()
-        
-        data_2026 = daily_comparison[daily_comparison['Год'] == 2026]
-        if not data_2026.empty:
-            # Заказы 2026
-            fig_2026.add_trace(go.Scatter(
-                x=data_2026['День'], 
-                y=data_2026['Заказали, шт'],
+    # Срез куба за выбранный месяц: «день × год»
+    selected_month_cube = slice_cube(day_level(cube), months=[selected_month])
+    month_years = cube_years(selected_month_cube)
+    daily_measures = ['Заказали, шт', 'Выкупили, шт', 'Выкупили на сумму, ₽']
+    daily_comparison = rollup(selected_month_cube.assign(День=selected_month_cube['Дата'].dt.day),
+                              ['День', 'Год'], daily_measures)
+    daily_by_year = {year: daily_comparison[daily_comparison['Год'] == year] for year in month_years}
+    
+    # Отдельный график для каждого года
+    for col, year in zip(st.columns(max(len(month_years), 1)), month_years):
+        with col:
+            data_year = daily_by_year[year]
+            orders_color, sales_color = year_colors(year, month_years)
+            fig_year = go.Figure()
+            fig_year.add_trace(go.Scatter(
+                x=data_year['День'], 
+                y=data_year['Заказали, шт'],
                 name='Заказы',
-                line=dict(color='green', width=2),
+                line=dict(color=orders_color, width=2),
                 mode='lines+markers'
             ))
-            # Выкупы 2026
-            fig_2026.add_trace(go.Scatter(
-                x=data_2026['День'], 
-                y=data_2026['Выкупили, шт'],
+            fig_year.add_trace(go.Scatter(
+                x=data_year['День'], 
+                y=data_year['Выкупили, шт'],
                 name='Выкупы',
-                line=dict(color='lightgreen', width=2),
+                line=dict(color=sales_color, width=2),
                 mode='lines+markers'
             ))
-        
-        fig_2026.update_layout(
-            title=f'2026 год - Заказы и выкупы по дням ({selected_month_name})',
-            xaxis_title='День месяца',
-            yaxis_title='Количество',
-            height=400,
-            hovermode='x unified'
-        )
-        
-        # Настройка оси X для лучшей читаемости
-        fig_2026.update_xaxes(tickangle=45)
-        
-        st.plotly_chart(fig_2026, width='stretch')
+            
+            fig_year.update_layout(
+                title=f'{year} год - Заказы и выкупы по дням ({selected_month_name})',
+                xaxis_title='День месяца',
+                yaxis_title='Количество',
+                height=400,
+                hovermode='x unified'
+            )
+            
+            # Настройка оси X для лучшей читаемости
+            fig_year.update_xaxes(tickangle=45)
+            
+            st.plotly_chart(fig_year, width='stretch')
     
     # Статистика сравнения
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("📋 Статистика по годам")
-        if not data_2024.empty:
-            st.write(f"**2024 год:**")
-            st.write(f"- Всего заказов: {data_2024['Заказали, шт'].sum():,.0f}")
-            st.write(f"- Среднее заказов в день: {data_2024['Заказали, шт'].mean():,.1f}")
-            st.write(f"- Максимум заказов: {data_2024['Заказали, шт'].max():,.0f}")
-        
-        if not data_2025.empty:
-            st.write(f"**2025 год:**")
-            st.write(f"- Всего заказов: {data_2025['Заказали, шт'].sum():,.0f}")
-            st.write(f"- Среднее заказов в день: {data_2025['Заказали, шт'].mean():,.1f}")
-            st.write(f"- Максимум заказов: {data_2025['Заказали, шт'].max():,.0f}")
-        
-        if not data_2026.empty:
-            st.write(f"**2026 год:**")
-            st.write(f"- Всего заказов: {data_2026['Заказали, шт'].sum():,.0f}")
-            st.write(f"- Среднее заказов в день: {data_2026['Заказали, шт'].mean():,.1f}")
-            st.write(f"- Максимум заказов: {data_2026['Заказали, шт'].max():,.0f}")
+        for year in month_years:
+            orders_year = daily_by_year[year]['Заказали, шт']
+            st.write(f"**{year} год:**")
+            st.write(f"- Всего заказов: {orders_year.sum():,.0f}")
+            st.write(f"- Среднее заказов в день: {orders_year.mean():,.1f}")
+            st.write(f"- Максимум заказов: {orders_year.max():,.0f}")
     
     with col2:
         st.subheader("📈 Сравнение")
-        total_2024 = data_2024['Заказали, шт'].sum() if not data_2024.empty else 0
-        total_2025 = data_2025['Заказали, шт'].sum() if not data_2025.empty else 0
-        total_2026 = data_2026['Заказали, шт'].sum() if not data_2026.empty else 0
-        avg_2024 = data_2024['Заказали, шт'].mean() if not data_2024.empty else 0
-        avg_2025 = data_2025['Заказали, шт'].mean() if not data_2025.empty else 0
-        avg_2026 = data_2026['Заказали, шт'].mean() if not data_2026.empty else 0
-        
         comparisons = []
-        if total_2024 > 0 and total_2025 > 0:
-            growth_total_24_25 = ((total_2025 - total_2024) / total_2024 * 100)
-            growth_avg_24_25 = ((avg_2025 - avg_2024) / avg_2024 * 100) if avg_2024 > 0 else 0
-            comparisons.append(("2024->2025", growth_total_24_25, growth_avg_24_25))
-        
-        if total_2025 > 0 and total_2026 > 0:
-            growth_total_25_26 = ((total_2026 - total_2025) / total_2025 * 100)
-            growth_avg_25_26 = ((avg_2026 - avg_2025) / avg_2025 * 100) if avg_2025 > 0 else 0
-            comparisons.append(("2025->2026", growth_total_25_26, growth_avg_25_26))
+        for prev, cur in zip(month_years, month_years[1:]):
+            total_prev = daily_by_year[prev]['Заказали, шт'].sum()
+            total_cur = daily_by_year[cur]['Заказали, шт'].sum()
+            avg_prev = daily_by_year[prev]['Заказали, шт'].mean()
+            avg_cur = daily_by_year[cur]['Заказали, шт'].mean()
+            if total_prev > 0 and total_cur > 0:
+                growth_total = ((total_cur - total_prev) / total_prev * 100)
+                growth_avg = ((avg_cur - avg_prev) / avg_prev * 100) if avg_prev > 0 else 0
+                comparisons.append((f"{prev}->{cur}", growth_total, growth_avg))
         
         for label, growth_total, growth_avg in comparisons:
             st.write(f"**Рост общего количества заказов {label}:** {growth_total:+.1f}%")
@@ -2423,50 +1736,25 @@ with tab5:
                 st.error(f"📉 Продажи {label} снизились на {abs(growth_total):.1f}%")
     
     # Таблица всех дней с заказами и выкупами (за выбранный месяц)
-    st.subheader(f"📋 Все дни {selected_month_name}: заказы и выкупы 2024 vs 2025 vs 2026")
-    
-    # Создаем полную таблицу всех дней
-    all_days_data = []
-    
-    # Получаем все уникальные дни месяца
-    all_days = sorted(daily_comparison['День'].unique())
-    
-    for day in all_days:
-        # Данные для 2024 года
-        day_2024_orders = data_2024[data_2024['День'] == day]['Заказали, шт'].iloc[0] if not data_2024[data_2024['День'] == day].empty else 0
-        day_2024_sales = data_2024[data_2024['День'] == day]['Выкупили, шт'].iloc[0] if not data_2024[data_2024['День'] == day].empty else 0
-        day_2024_revenue = data_2024[data_2024['День'] == day]['Выкупили на сумму, ₽'].iloc[0] if not data_2024[data_2024['День'] == day].empty else 0
-        
-        # Данные для 2025 года
-        day_2025_orders = data_2025[data_2025['День'] == day]['Заказали, шт'].iloc[0] if not data_2025[data_2025['День'] == day].empty else 0
-        day_2025_sales = data_2025[data_2025['День'] == day]['Выкупили, шт'].iloc[0] if not data_2025[data_2025['День'] == day].empty else 0
-        day_2025_revenue = data_2025[data_2025['День'] == day]['Выкупили на сумму, ₽'].iloc[0] if not data_2025[data_2025['День'] == day].empty else 0
-        
-        # Данные для 2026 года
-        day_2026_orders = data_2026[data_2026['День'] == day]['Заказали, шт'].iloc[0] if not data_2026[data_2026['День'] == day].empty else 0
-        day_2026_sales = data_2026[data_2026['День'] == day]['Выкупили, шт'].iloc[0] if not data_2026[data_2026['День'] == day].empty else 0
-        day_2026_revenue = data_2026[data_2026['День'] == day]['Выкупили на сумму, ₽'].iloc[0] if not data_2026[data_2026['День'] == day].empty else 0
-        
-        all_days_data.append({
-            'День месяца': day,
-            'Заказы 2024': day_2024_orders,
-            'Заказы 2025': day_2025_orders,
-            'Заказы 2026': day_2026_orders,
-            'Выкупы 2024': day_2024_sales,
-            'Выкупы 2025': day_2025_sales,
-            'Выкупы 2026': day_2026_sales,
-            'Выручка 2024': day_2024_revenue,
-            'Выручка 2025': day_2025_revenue,
-            'Выручка 2026': day_2026_revenue,
-            'Рост заказов %': ((day_2026_orders - day_2025_orders) / day_2025_orders * 100) if day_2025_orders > 0 else 0,
-            'Рост выкупов %': ((day_2026_sales - day_2025_sales) / day_2025_sales * 100) if day_2025_sales > 0 else 0
-        })
-    
-    all_days_df = pd.DataFrame(all_days_data)
-    
-    # Форматируем проценты
-    all_days_df['Рост заказов %'] = all_days_df['Рост заказов %'].round(1)
-    all_days_df['Рост выкупов %'] = all_days_df['Рост выкупов %'].round(1)
+    st.subheader(f"📋 Все дни {selected_month_name}: заказы и выкупы {' vs '.join(str(y) for y in month_years)}")
+    
+    # Полная таблица всех дней: сводная «день × год» из куба
+    all_days_df = pd.DataFrame({'День месяца': sorted(daily_comparison['День'].unique())})
+    if month_years:
+        days_pivot = daily_comparison.pivot_table(index='День', columns='Год', values=daily_measures,
+                                                  aggfunc='sum', fill_value=0).reindex(all_days_df['День месяца'], fill_value=0)
+        for measure, label in (('Заказали, шт', 'Заказы'), ('Выкупили, шт', 'Выкупы'), ('Выкупили на сумму, ₽', 'Выручка')):
+            for year in month_years:
+                all_days_df[f'{label} {year}'] = days_pivot[measure][year].values
+        
+        # Рост — между двумя последними годами
+        if len(month_years) >= 2:
+            prev, cur = month_years[-2], month_years[-1]
+            for measure, label in (('Заказы', 'Рост заказов %'), ('Выкупы', 'Рост выкупов %')):
+                base = all_days_df[f'{measure} {prev}']
+                growth = (all_days_df[f'{measure} {cur}'] - base) / base.where(base > 0) * 100
+                # Форматируем проценты
+                all_days_df[label] = growth.fillna(0).round(1)
     
     # Сортируем по дню месяца
     all_days_df = all_days_df.sort_values('День месяца')
@@ -2725,25 +2013,13 @@ with tab6:
     # Получение данных из основного приложения
     def get_orders_from_data():
         """Получает данные заказов из основного приложения"""
-        orders_data = {}
-        
-        # Группируем данные по месяцам и неделям
-        weekly_orders = filtered_df.groupby(['Месяц', 'Неделя']).agg({
-            'Заказали, шт': 'sum'
-        }).reset_index()
-        
-        # Преобразуем в формат для калькулятора
-        for _, row in weekly_orders.iterrows():
-            month_num = int(row['Месяц'])
-            week_num = int(row['Неделя'])
-            orders = int(row['Заказали, шт'])
-            
-            if orders > 0:  # Только ненулевые заказы
-                month_name = months[month_num - 1]  # Индексация с 0
-                key = f"{month_name}_{week_num}"
-                orders_data[key] = orders
+        # Группируем срез куба по месяцам и неделям
+        weekly_orders = rollup(filtered_cube, ['Месяц', 'Неделя'], ['Заказали, шт'])
+        weekly_orders = weekly_orders[weekly_orders['Заказали, шт'] > 0]  # Только ненулевые заказы
         
-        return orders_data
+        # Преобразуем в формат для калькулятора: "Месяц_неделя" -> заказы
+        keys = [f"{months[int(m) - 1]}_{int(w)}" for m, w in zip(weekly_orders['Месяц'], weekly_orders['Неделя'])]
+        return dict(zip(keys, weekly_orders['Заказали, шт'].astype(int).tolist()))
     
     # Автоматически загружаем данные из основного приложения
     if 'auto_load_data' not in st.session_state:
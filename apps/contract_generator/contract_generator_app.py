@@ -1,7 +1,17 @@
+import sys
+from pathlib import Path
+# Добавляем корневую директорию проекта в sys.path для импорта utils
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
 import streamlit as st
 import pandas as pd
 import json
 import os
+import re
+import time
+import zipfile
 from datetime import datetime, timedelta
 from docx import Document
 from docx.shared import Inches, RGBColor
@@ -21,6 +31,9 @@ from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 
+from document_templates import get_template, placeholders
+from utils.boot_state import read_bytes_snapshot
+
 # Настройка страницы
 st.set_page_config(
     page_title="Генератор договоров для блоггера",
@@ -170,11 +183,9 @@ def add_image_to_paragraph(paragraph, image_path, width_inches=1.5):
         print(f"Ошибка при добавлении изображения {image_path}: {e}")
         return False
 
-def create_pdf_contract(advertiser_data, contract_type="basic"):
-    """Создает PDF договор с подписями и печатями"""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=2*cm, bottomMargin=2*cm)
-    
+@st.cache_resource(show_spinner=False)
+def pdf_resources():
+    """Шрифт и стили ReportLab для PDF договора (регистрируются и строятся один раз на процесс)"""
     # Регистрируем шрифт для кириллицы
     try:
         # Пытаемся использовать системный шрифт Times New Roman
@@ -218,6 +229,60 @@ def create_pdf_contract(advertiser_data, contract_type="basic"):
         alignment=TA_JUSTIFY
     )
     
+    requisites_table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), font_name),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('FONTNAME', (0, 1), (-1, -1), font_name),
+        ('FONTSIZE', (0, 1), (-1, -1), 9),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+    
+    signature_table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), font_name),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+    
+    return {
+        'font_name': font_name,
+        'title': title_style,
+        'heading': heading_style,
+        'normal': normal_style,
+        'requisites_table': requisites_table_style,
+        'signature_table': signature_table_style,
+    }
+
+def signature_image_flowable(image_type, missing_text, normal_style):
+    """Изображение подписи/печати для PDF; байты файла читаются с диска только после его изменения"""
+    data = read_bytes_snapshot(f'signatures/{image_type}.png')
+    if data:
+        try:
+            return RLImage(io.BytesIO(data), width=3*cm, height=2*cm)
+        except:
+            pass
+    return Paragraph(missing_text, normal_style)
+
+def create_pdf_contract(advertiser_data, contract_type="basic"):
+    """Создает PDF договор с подписями и печатями"""
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=2*cm, bottomMargin=2*cm)
+    
+    # Шрифт и стили общие для всех PDF
+    resources = pdf_resources()
+    title_style = resources['title']
+    heading_style = resources['heading']
+    normal_style = resources['normal']
+    
     # Содержимое документа
     story = []
     
@@ -329,18 +394,7 @@ def create_pdf_contract(advertiser_data, contract_type="basic"):
     ]
     
     requisites_table = Table(requisites_data, colWidths=[8*cm, 8*cm])
-    requisites_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), font_name),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('FONTNAME', (0, 1), (-1, -1), font_name),
-        ('FONTSIZE', (0, 1), (-1, -1), 9),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+    requisites_table.setStyle(resources['requisites_table'])
     
     story.append(requisites_table)
     story.append(Spacer(1, 20))
@@ -362,45 +416,16 @@ def create_pdf_contract(advertiser_data, contract_type="basic"):
         # Таблица для подписи и печати исполнителя
         signature_data = [['ПОДПИСЬ:', 'ПЕЧАТЬ:']]
         
-        # Проверяем наличие изображений
-        executor_signature = load_signature_image('executor_signature')
-        executor_stamp = load_signature_image('executor_stamp')
-        
-        signature_cells = []
-        
-        # Подпись
-        if executor_signature:
-            try:
-                sig_img = RLImage(executor_signature, width=3*cm, height=2*cm)
-                signature_cells.append(sig_img)
-            except:
-                signature_cells.append(Paragraph("Подпись не загружена", normal_style))
-        else:
-            signature_cells.append(Paragraph("Подпись не загружена", normal_style))
-        
-        # Печать
-        if executor_stamp:
-            try:
-                stamp_img = RLImage(executor_stamp, width=3*cm, height=2*cm)
-                signature_cells.append(stamp_img)
-            except:
-                signature_cells.append(Paragraph("Печать не загружена", normal_style))
-        else:
-            signature_cells.append(Paragraph("Печать не загружена", normal_style))
+        # Подпись и печать (байты изображений из кеша процесса)
+        signature_cells = [
+            signature_image_flowable('executor_signature', "Подпись не загружена", normal_style),
+            signature_image_flowable('executor_stamp', "Печать не загружена", normal_style),
+        ]
         
         signature_data.append(signature_cells)
         
         signature_table = Table(signature_data, colWidths=[8*cm, 8*cm])
-        signature_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), font_name),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        signature_table.setStyle(resources['signature_table'])
         
         story.append(signature_table)
     else:
@@ -420,7 +445,7 @@ def create_contract_document(advertiser_data, contract_type="basic"):
     set_document_font(doc, "Times New Roman", 12)
     
     # Заголовок (создаем как обычный параграф, чтобы избежать синей полосы)
-    contract_number = f"{datetime.now().strftime('%d/%m/%y')}-К"
+    contract_number = advertiser_data.get('contract_number', f"{datetime.now().strftime('%d/%m/%y')}-К")
     title = doc.add_paragraph(f'ДОГОВОР ОКАЗАНИЯ РЕКЛАМНЫХ УСЛУГ №{contract_number}')
     title.alignment = WD_ALIGN_PARAGRAPH.CENTER
     apply_font_to_paragraph(title, "Times New Roman", 14, bold=True)  # Заголовок жирный
@@ -684,12 +709,13 @@ def create_act_document(advertiser_data, contract_number):
     # Заголовок акта
     act_title = doc.add_paragraph('АКТ СДАЧИ-ПРИЕМКИ РАБОТ (УСЛУГ)')
     apply_font_to_paragraph(act_title, "Times New Roman", 14, bold=True)  # Заголовок жирный
-    doc.add_paragraph(f"к договору оказания услуг № {contract_number} от {datetime.now().strftime('%d.%m.%Y')} г.")
-    doc.add_paragraph(f"Москва {datetime.now().strftime('%d.%m.%Y')}")
+    document_date = advertiser_data.get('document_date', datetime.now().strftime('%d.%m.%Y'))
+    doc.add_paragraph(f"к договору оказания услуг № {contract_number} от {document_date} г.")
+    doc.add_paragraph(f"Москва {document_date}")
     doc.add_paragraph("")
     
     # Стороны акта
-    doc.add_paragraph(f"{advertiser_data.get('company_name', '')} (ОГРН {advertiser_data.get('ogrn', '')}), в лице {advertiser_data.get('director', 'Директор')}, именуемый в дальнейшем «Заказчик», с одной стороны, и {BLOGGER_DETAILS['company_name']} (ОГРНИП {BLOGGER_DETAILS['ogrnip']}), именуемый в дальнейшем «Исполнитель», с другой стороны, составили настоящий Акт о том, что работы (услуги) по Договору оказания услуг № {contract_number} от {datetime.now().strftime('%d.%m.%Y')} выполнены (оказаны) в полном объеме.")
+    doc.add_paragraph(f"{advertiser_data.get('company_name', '')} (ОГРН {advertiser_data.get('ogrn', '')}), в лице {advertiser_data.get('director', 'Директор')}, именуемый в дальнейшем «Заказчик», с одной стороны, и {BLOGGER_DETAILS['company_name']} (ОГРНИП {BLOGGER_DETAILS['ogrnip']}), именуемый в дальнейшем «Исполнитель», с другой стороны, составили настоящий Акт о том, что работы (услуги) по Договору оказания услуг № {contract_number} от {document_date} выполнены (оказаны) в полном объеме.")
     doc.add_paragraph("")
     
     # Таблица выполненных работ
@@ -763,7 +789,9 @@ def create_act_document(advertiser_data, contract_number):
     # Третья строка с подписями - меняем местами подписи
     row_cells = signature_table.rows[2].cells
     row_cells[0].text = "_________________ /Гураль Д.Д./"
-    row_cells[1].text = f"_________________ /{advertiser_data.get('company_name', 'Название компании')}/"
+    # В подписи акта без названия компании — «Название компании» (signer_name задаёт шаблон)
+    signer_name = advertiser_data.get('signer_name', advertiser_data.get('company_name', 'Название компании'))
+    row_cells[1].text = f"_________________ /{signer_name}/"
     
     # Применяем шрифт к таблице
     apply_font_to_table(signature_table, "Times New Roman", 12)
@@ -773,6 +801,127 @@ def create_act_document(advertiser_data, contract_number):
     
     return doc
 
+DEFAULT_SERVICE_DESCRIPTION = 'Создание и размещение текстово-графического блока в аккаунте социальной сети Telegram по адресу @epifancevadaria'
+
+# Поля рекламодателя и документа, которые подставляются в скомпилированные шаблоны
+TEMPLATE_FIELDS = [
+    'company_name', 'ogrn', 'director', 'email', 'inn', 'legal_address', 'actual_address',
+    'account', 'bank', 'corr_account', 'bank_bik', 'brand_name', 'service_description',
+    'contract_amount', 'contract_amount_words', 'start_date', 'end_date',
+    'contract_number', 'document_date', 'signer_name',
+]
+
+def document_fields(advertiser_data, contract_number=None):
+    """Значения полей шаблона с теми же значениями по умолчанию, что и при построении документа"""
+    now = datetime.now()
+    defaults = {
+        'company_name': '',
+        'ogrn': '',
+        'director': 'Директор',
+        'email': '',
+        'inn': '',
+        'legal_address': '',
+        'actual_address': '',
+        'account': '',
+        'bank': '',
+        'corr_account': '',
+        'bank_bik': '',
+        'brand_name': 'Gray Moss',
+        'service_description': DEFAULT_SERVICE_DESCRIPTION,
+        'contract_amount': '55 000',
+        'contract_amount_words': 'пятьдесят пять тысяч',
+        'start_date': now.strftime('%d.%m.%Y'),
+        'end_date': (now + timedelta(days=35)).strftime('%d.%m.%Y'),
+        'contract_number': f"{now.strftime('%d/%m/%y')}-К",
+        'document_date': now.strftime('%d.%m.%Y'),
+    }
+    fields = {field: advertiser_data.get(field, default) for field, default in defaults.items()}
+    fields['signer_name'] = advertiser_data.get('company_name', 'Название компании')
+    if contract_number is not None:
+        fields['contract_number'] = contract_number
+    return fields
+
+def document_bytes(doc):
+    """Байты DOCX документа python-docx"""
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+def render_contract_docx(advertiser_data, contract_type="basic"):
+    """Договор DOCX: скелет договора строится один раз, подставляются только данные рекламодателя"""
+    template = get_template(
+        ('contract', contract_type),
+        lambda: document_bytes(create_contract_document(placeholders(TEMPLATE_FIELDS), contract_type)),
+    )
+    return template.render(document_fields(advertiser_data))
+
+def render_act_docx(advertiser_data, contract_number):
+    """Акт сдачи-приемки DOCX из скомпилированного шаблона"""
+    def build():
+        fields = placeholders(TEMPLATE_FIELDS)
+        return document_bytes(create_act_document(fields, fields['contract_number']))
+    
+    template = get_template(('act',), build)
+    return template.render(document_fields(advertiser_data, contract_number))
+
+def contract_number_for(advertiser_data):
+    """Номер договора по дате договора рекламодателя (сегодня, если дата не указана или некорректна)"""
+    contract_date = advertiser_data.get('contract_date', datetime.now().strftime('%d.%m.%Y'))
+    if isinstance(contract_date, str):
+        try:
+            contract_date_obj = datetime.strptime(contract_date, '%d.%m.%Y')
+        except:
+            contract_date_obj = datetime.now()
+    else:
+        contract_date_obj = contract_date
+    
+    return f"{contract_date_obj.strftime('%d/%m/%y')}-К"
+
+def safe_file_name(name):
+    """Имя файла или папки в архиве без недопустимых символов"""
+    return re.sub(r'[\\/:*?"<>|\n\r\t]+', '_', str(name)).strip(' .') or 'document'
+
+def build_documents_zip(advertisers):
+    """
+    ZIP с договором (DOCX), договором с подписью (PDF) и актом для каждого рекламодателя.
+    Возвращает (байты архива, тайминги по документам). Ошибка одного документа
+    записывается в тайминги и не останавливает пакет.
+    """
+    timings = []
+    today = datetime.now().strftime('%Y%m%d')
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for contract_key, data in advertisers.items():
+            company_name = data.get('company_name', contract_key.split('_')[0])
+            folder = safe_file_name(contract_key)
+            documents = [
+                ("Договор", f"Договор_{company_name}_{today}.docx",
+                 lambda: render_contract_docx(data, "basic")),
+                ("Договор с подписью (PDF)", f"Договор_с_подписью_{company_name}_{today}.pdf",
+                 lambda: create_pdf_contract(data, "signed")),
+                ("Акт", f"Акт_сдачи-приемки_{company_name}_{today}.docx",
+                 lambda: render_act_docx(data, contract_number_for(data))),
+            ]
+            for kind, file_name, render in documents:
+                started = time.perf_counter()
+                try:
+                    content = render()
+                    error = ""
+                except Exception as e:
+                    content = None
+                    error = str(e)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                if content is not None:
+                    archive.writestr(f"{folder}/{safe_file_name(file_name)}", content)
+                timings.append({
+                    'Рекламодатель': company_name,
+                    'Документ': kind,
+                    'Время, мс': round(elapsed_ms, 1),
+                    'Размер, КБ': round(len(content) / 1024, 1) if content is not None else 0,
+                    'Ошибка': error,
+                })
+    return buffer.getvalue(), timings
+
 def main():
     st.title("📄 Генератор договоров для блоггера")
     st.markdown("---")
@@ -1172,14 +1321,11 @@ def main():
             
             with col_doc1:
                 # Обычный договор
-                doc_basic = create_contract_document(advertiser_data, "basic")
-                doc_buffer = io.BytesIO()
-                doc_basic.save(doc_buffer)
-                doc_buffer.seek(0)
+                doc_basic = render_contract_docx(advertiser_data, "basic")
                 
                 st.download_button(
                     label="📄 Скачать договор (без подписи)",
-                    data=doc_buffer.getvalue(),
+                    data=doc_basic,
                     file_name=f"Договор_{company_name}_{datetime.now().strftime('%Y%m%d')}.docx",
                     mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
                 )
@@ -1197,14 +1343,11 @@ def main():
             
             with col_doc3:
                 # Акт сдачи-приемки
-                doc_act = create_act_document(advertiser_data, contract_number)
-                doc_buffer_act = io.BytesIO()
-                doc_act.save(doc_buffer_act)
-                doc_buffer_act.seek(0)
+                doc_act = render_act_docx(advertiser_data, contract_number)
                 
                 st.download_button(
                     label="📋 Скачать акт сдачи-приемки",
-                    data=doc_buffer_act.getvalue(),
+                    data=doc_act,
                     file_name=f"Акт_сдачи-приемки_{company_name}_{datetime.now().strftime('%Y%m%d')}.docx",
                     mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
                 )
@@ -1225,6 +1368,25 @@ def main():
         if not advertisers:
             st.info("Нет сохраненных рекламодателей")
         else:
+            # Пакетная генерация: договоры и акты всех рекламодателей одним архивом
+            if st.button("📦 Все договоры и акты (ZIP)", key="batch_zip", help="Договор, договор с подписью (PDF) и акт для каждого сохраненного рекламодателя"):
+                started = time.perf_counter()
+                with st.spinner("Формирование документов..."):
+                    zip_bytes, timings = build_documents_zip(advertisers)
+                total_ms = (time.perf_counter() - started) * 1000
+                
+                st.download_button(
+                    label="📥 Скачать архив документов",
+                    data=zip_bytes,
+                    file_name=f"Договоры_и_акты_{datetime.now().strftime('%Y%m%d')}.zip",
+                    mime="application/zip",
+                    key="download_batch_zip"
+                )
+                
+                errors = sum(1 for t in timings if t['Ошибка'])
+                st.caption(f"Документов: {len(timings) - errors} за {total_ms / 1000:.2f} с" + (f", ошибок: {errors}" if errors else ""))
+                st.dataframe(pd.DataFrame(timings), use_container_width=True, hide_index=True)
+            
             for contract_key, data in advertisers.items():
                 # Извлекаем название компании из ключа
                 company_name = data.get('company_name', contract_key.split('_')[0])
@@ -1261,14 +1423,11 @@ def main():
                     
                     with col_btn1:
                         if st.button(f"📄 Договор", key=f"basic_{contract_key}"):
-                            doc_basic = create_contract_document(data, "basic")
-                            doc_buffer = io.BytesIO()
-                            doc_basic.save(doc_buffer)
-                            doc_buffer.seek(0)
+                            doc_basic = render_contract_docx(data, "basic")
                             
                             st.download_button(
                                 label="📄 Скачать договор (без подписи)",
-                                data=doc_buffer.getvalue(),
+                                data=doc_basic,
                                 file_name=f"Договор_{company_name}_{datetime.now().strftime('%Y%m%d')}.docx",
                                 mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
                                 key=f"download_basic_{contract_key}"
@@ -1288,26 +1447,12 @@ def main():
                     
                     with col_btn3:
                         if st.button(f"📋 Акт", key=f"act_{contract_key}"):
-                            # Создаем номер договора для акта
-                            contract_date = data.get('contract_date', datetime.now().strftime('%d.%m.%Y'))
-                            if isinstance(contract_date, str):
-                                try:
-                                    contract_date_obj = datetime.strptime(contract_date, '%d.%m.%Y')
-                                except:
-                                    contract_date_obj = datetime.now()
-                            else:
-                                contract_date_obj = contract_date
-                            
-                            contract_number = f"{contract_date_obj.strftime('%d/%m/%y')}-К"
-                            
-                            doc_act = create_act_document(data, contract_number)
-                            doc_buffer_act = io.BytesIO()
-                            doc_act.save(doc_buffer_act)
-                            doc_buffer_act.seek(0)
+                            # Номер договора для акта по дате договора
+                            doc_act = render_act_docx(data, contract_number_for(data))
                             
                             st.download_button(
                                 label="📋 Скачать акт сдачи-приемки",
-                                data=doc_buffer_act.getvalue(),
+                                data=doc_act,
                                 file_name=f"Акт_сдачи-приемки_{company_name}_{datetime.now().strftime('%Y%m%d')}.docx",
                                 mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
                                 key=f"download_act_{contract_key}"
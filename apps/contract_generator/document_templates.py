@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Скомпилированные шаблоны DOCX для генератора договоров.
+
+Скелет документа (текст договора, стили, шрифты каждого run, таблицы) строится
+python-docx один раз — с подстановками ⟦поле⟧ вместо данных рекламодателя —
+и сохраняется как набор частей DOCX-архива. word/document.xml разбивается по
+подстановкам на статичные куски, поэтому новый документ — это склейка кусков
+с экранированными значениями полей и запись архива, без повторного построения
+абзацев и применения шрифтов.
+
+Шаблоны хранятся в памяти процесса (модуль импортируется один раз и переживает
+перезапуски скрипта Streamlit). Текст договора и реквизиты исполнителя заданы в коде,
+поэтому шаблон не устаревает до перезапуска процесса.
+"""
+import io
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+PLACEHOLDER = "⟦{}⟧"
+_PLACEHOLDER_RE = re.compile(r"⟦([A-Za-z0-9_]+)⟧")
+# Управляющие символы, недопустимые в XML (python-docx на них падает)
+_INVALID_XML_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+DOCUMENT_PART = 'word/document.xml'
+# Перевод строки и табуляция внутри текста — как их записывает python-docx (run.text)
+_TEXT_BREAK = '</w:t><w:br/><w:t xml:space="preserve">'
+_TEXT_TAB = '</w:t><w:tab/><w:t xml:space="preserve">'
+
+_TEMPLATES = {}
+
+
+def placeholders(fields):
+    """Данные для построения скелета: {поле: ⟦поле⟧}"""
+    return {field: PLACEHOLDER.format(field) for field in fields}
+
+
+def xml_text(value):
+    """Значение поля как содержимое <w:t> (экранирование, переводы строк и табуляции)"""
+    text = _INVALID_XML_RE.sub('', str(value)).replace('\r\n', '\n').replace('\r', '\n')
+    return escape(text).replace('\n', _TEXT_BREAK).replace('\t', _TEXT_TAB)
+
+
+class DocxTemplate:
+    """DOCX-шаблон с подстановками ⟦поле⟧ в тексте документа"""
+
+    def __init__(self, source):
+        with zipfile.ZipFile(io.BytesIO(source)) as archive:
+            self._parts = [(info.filename, archive.read(info.filename)) for info in archive.infolist()]
+        document = dict(self._parts)[DOCUMENT_PART].decode('utf-8')
+        # Пробелы по краям значения не должны теряться
+        document = document.replace('<w:t>', '<w:t xml:space="preserve">')
+        pieces = _PLACEHOLDER_RE.split(document)
+        self._chunks = pieces[0::2]
+        self.fields = pieces[1::2]
+
+    def render(self, values):
+        """Байты DOCX с подставленными значениями (отсутствующее поле — пустая строка)"""
+        parts = [self._chunks[0]]
+        for field, chunk in zip(self.fields, self._chunks[1:]):
+            parts.append(xml_text(values.get(field, '')))
+            parts.append(chunk)
+        document = ''.join(parts).encode('utf-8')
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for name, data in self._parts:
+                archive.writestr(name, document if name == DOCUMENT_PART else data)
+        return buffer.getvalue()
+
+
+def get_template(key, build):
+    """Шаблон по ключу; build() -> байты DOCX со скелетом вызывается только при первом обращении"""
+    template = _TEMPLATES.get(key)
+    if template is None:
+        template = DocxTemplate(build())
+        _TEMPLATES[key] = template
+    return template
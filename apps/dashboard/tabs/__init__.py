@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+Вкладки дашборда, вынесенные в отдельные модули.
+
+Модуль вкладки импортируется только при первой отрисовке через render_tab(),
+поэтому тяжёлые зависимости вкладок не загружаются при старте скрипта.
+"""
+import importlib
+
+# Имя вкладки -> модуль с функцией render()
+TAB_MODULES = {
+    "analysis": "analysis",
+    "parameters": "parameters",
+    "combinations": "combinations",
+    "prophet": "forecast",
+    "sales_plan": "sales_plan",
+    "reviews": "reviews",
+    "marketing": "marketing",
+    "order_calc": "order_calc",
+}
+
+
+def load_tab(name):
+    """Импортирует модуль вкладки по имени (повторные вызовы берут модуль из sys.modules)"""
+    module_name = TAB_MODULES[name]
+    return importlib.import_module(f"{__name__}.{module_name}")
+
+
+def render_tab(name, *args, **kwargs):
+    """Отрисовывает вкладку, лениво импортируя её модуль"""
+    return load_tab(name).render(*args, **kwargs)
@@ -0,0 +1,1125 @@
+# -*- coding: utf-8 -*-
+"""
+Вкладка «📊 Анализ данных»
+
+Таблица товаров с параметрами и экспорт выводятся под вкладками, как и до
+выноса в модуль, поэтому render() получает контейнер вкладки, а не
+вызывается внутри него.
+"""
+import os
+import base64
+import urllib.parse as _urlparse
+from io import BytesIO
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.formatters import fmt_rub_kpi, fmt_units_kpi, fmt_date, sort_df
+from utils.perf import perf_timed, perf_checkpoint
+from utils.wb_utils import build_wb_product_url
+from utils.image_cache import (
+    _cache_dir, save_url_cache, get_url_cache_with_state, get_cached_image_path,
+    ensure_image_cached, get_cache_status, load_image_bytes
+)
+
+from .params import get_param_values, save_param_values_to_file, save_main_page_data_to_file
+
+
+def create_html_report_with_charts(filtered_df, full_df, analysis_period=None):
+    """
+    Создает HTML отчет с графиками на основе данных дашборда
+    
+    Args:
+        filtered_df: Отфильтрованный DataFrame с данными
+        full_df: Полный DataFrame (для сравнения)
+        analysis_period: Словарь с информацией о периоде анализа
+        
+    Returns:
+        str: HTML код отчета
+    """
+    try:
+        import plotly.graph_objects as go
+        import plotly.express as px
+        import plotly.io as pio
+    except ImportError:
+        return "<html><body><h1>Ошибка: plotly не установлен</h1></body></html>"
+    
+    html_parts = []
+    
+    # Начало HTML документа
+    html_parts.append("""
+    <!DOCTYPE html>
+    <html lang="ru">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>Отчет по анализу товаров Wildberries</title>
+        <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
+        <style>
+            body {
+                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+                margin: 0;
+                padding: 20px;
+                background-color: #f5f5f5;
+            }
+            .container {
+                max-width: 1400px;
+                margin: 0 auto;
+                background-color: white;
+                padding: 30px;
+                box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+            }
+            h1 {
+                color: #1f77b4;
+                border-bottom: 3px solid #1f77b4;
+                padding-bottom: 10px;
+            }
+            h2 {
+                color: #2c3e50;
+                margin-top: 30px;
+                border-left: 4px solid #3498db;
+                padding-left: 15px;
+            }
+            .stats-grid {
+                display: grid;
+                grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
+                gap: 20px;
+                margin: 20px 0;
+            }
+            .stat-card {
+                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+                color: white;
+                padding: 20px;
+                border-radius: 10px;
+                text-align: center;
+                box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+            }
+            .stat-card h3 {
+                margin: 0 0 10px 0;
+                font-size: 14px;
+                opacity: 0.9;
+            }
+            .stat-card .value {
+                font-size: 28px;
+                font-weight: bold;
+            }
+            .chart-container {
+                margin: 30px 0;
+                background: white;
+                padding: 20px;
+                border-radius: 10px;
+                box-shadow: 0 2px 5px rgba(0,0,0,0.1);
+            }
+            table {
+                width: 100%;
+                border-collapse: collapse;
+                margin: 20px 0;
+            }
+            th, td {
+                padding: 12px;
+                text-align: left;
+                border-bottom: 1px solid #ddd;
+            }
+            th {
+                background-color: #3498db;
+                color: white;
+            }
+            tr:hover {
+                background-color: #f5f5f5;
+            }
+            .info-box {
+                background-color: #e8f4f8;
+                border-left: 4px solid #3498db;
+                padding: 15px;
+                margin: 20px 0;
+            }
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <h1>📊 Отчет по анализу товаров Wildberries</h1>
+    """)
+    
+    # Информация о периоде анализа
+    if analysis_period:
+        period_str = analysis_period.get('period_str', 'N/A')
+        html_parts.append(f"""
+            <div class="info-box">
+                <strong>📅 Период анализа:</strong> {period_str}<br>
+                <strong>📄 Дата создания отчета:</strong> {datetime.now().strftime("%d.%m.%Y %H:%M:%S")}
+            </div>
+        """)
+    
+    # Статистика
+    html_parts.append("<h2>📈 Общая статистика</h2>")
+    html_parts.append("<div class='stats-grid'>")
+    
+    stats = []
+    if "Выручка" in filtered_df.columns:
+        total_revenue = filtered_df["Выручка"].sum()
+        stats.append(("Общая выручка", f"{total_revenue:,.0f} ₽"))
+    
+    if "Заказы" in filtered_df.columns:
+        total_orders = filtered_df["Заказы"].sum()
+        stats.append(("Общие заказы", f"{total_orders:,.0f} шт"))
+    
+    stats.append(("Всего товаров", f"{len(filtered_df):,}"))
+    
+    if "Средняя цена" in filtered_df.columns:
+        avg_price = filtered_df["Средняя цена"].mean()
+        stats.append(("Средняя цена", f"{avg_price:,.0f} ₽"))
+    
+    if "Выручка" in filtered_df.columns:
+        avg_revenue = filtered_df["Выручка"].mean()
+        stats.append(("Средняя выручка", f"{avg_revenue:,.0f} ₽"))
+    
+    if "Прибыль" in filtered_df.columns:
+        total_profit = filtered_df["Прибыль"].sum()
+        stats.append(("Общая прибыль", f"{total_profit:,.0f} ₽"))
+    
+    for stat_name, stat_value in stats:
+        html_parts.append(f"""
+            <div class="stat-card">
+                <h3>{stat_name}</h3>
+                <div class="value">{stat_value}</div>
+            </div>
+        """)
+    
+    html_parts.append("</div>")
+    
+    # Графики
+    html_parts.append("<h2>📊 Графики</h2>")
+    
+    # График 1: Топ-20 товаров по выручке
+    if "Выручка" in filtered_df.columns and "Артикул" in filtered_df.columns:
+        top_20 = filtered_df.nlargest(20, "Выручка")
+        fig = px.bar(
+            top_20,
+            x="Артикул",
+            y="Выручка",
+            title="Топ-20 товаров по выручке",
+            labels={"Выручка": "Выручка, ₽", "Артикул": "Артикул"}
+        )
+        fig.update_layout(height=500, showlegend=False)
+        fig.update_xaxes(tickangle=-45)
+        chart_html = pio.to_html(fig, div_id=f"chart_{len(html_parts)}", include_plotlyjs=False)
+        html_parts.append(f'<div class="chart-container">{chart_html}</div>')
+    
+    # График 2: Распределение выручки
+    if "Выручка" in filtered_df.columns:
+        fig = px.histogram(
+            filtered_df,
+            x="Выручка",
+            nbins=30,
+            title="Распределение выручки по товарам",
+            labels={"Выручка": "Выручка, ₽", "count": "Количество товаров"}
+        )
+        fig.update_layout(height=400, showlegend=False)
+        chart_html = pio.to_html(fig, div_id=f"chart_{len(html_parts)}", include_plotlyjs=False)
+        html_parts.append(f'<div class="chart-container">{chart_html}</div>')
+    
+    # График 3: Заказы vs Выручка
+    if "Заказы" in filtered_df.columns and "Выручка" in filtered_df.columns:
+        fig = px.scatter(
+            filtered_df,
+            x="Заказы",
+            y="Выручка",
+            size="Выручка",
+            title="Зависимость выручки от количества заказов",
+            labels={"Заказы": "Количество заказов", "Выручка": "Выручка, ₽"}
+        )
+        fig.update_layout(height=500, showlegend=False)
+        chart_html = pio.to_html(fig, div_id=f"chart_{len(html_parts)}", include_plotlyjs=False)
+        html_parts.append(f'<div class="chart-container">{chart_html}</div>')
+    
+    # График 4: Топ-10 по заказам
+    if "Заказы" in filtered_df.columns and "Артикул" in filtered_df.columns:
+        top_10_orders = filtered_df.nlargest(10, "Заказы")
+        fig = px.bar(
+            top_10_orders,
+            x="Артикул",
+            y="Заказы",
+            title="Топ-10 товаров по количеству заказов",
+            labels={"Заказы": "Заказы, шт", "Артикул": "Артикул"}
+        )
+        fig.update_layout(height=400, showlegend=False)
+        fig.update_xaxes(tickangle=-45)
+        chart_html = pio.to_html(fig, div_id=f"chart_{len(html_parts)}", include_plotlyjs=False)
+        html_parts.append(f'<div class="chart-container">{chart_html}</div>')
+    
+    # График 5: Динамика по датам (если есть)
+    if "Дата создания" in filtered_df.columns and "Выручка" in filtered_df.columns:
+        try:
+            daily_data = filtered_df.groupby(filtered_df["Дата создания"].dt.date).agg({
+                "Выручка": "sum",
+                "Заказы": "sum" if "Заказы" in filtered_df.columns else "count"
+            }).reset_index()
+            daily_data = daily_data.sort_values("Дата создания")
+            
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(
+                x=daily_data["Дата создания"],
+                y=daily_data["Выручка"],
+                mode='lines+markers',
+                name='Выручка',
+                line=dict(color='#1f77b4', width=2)
+            ))
+            if "Заказы" in daily_data.columns:
+                fig.add_trace(go.Scatter(
+                    x=daily_data["Дата создания"],
+                    y=daily_data["Заказы"] * 100,  # Масштабируем для визуализации
+                    mode='lines+markers',
+                    name='Заказы (x100)',
+                    yaxis='y2',
+                    line=dict(color='#ff7f0e', width=2)
+                ))
+                fig.update_layout(
+                    yaxis2=dict(title="Заказы (x100)", overlaying='y', side='right')
+                )
+            
+            fig.update_layout(
+                title="Динамика выручки и заказов по датам",
+                xaxis_title="Дата",
+                yaxis_title="Выручка, ₽",
+                height=500,
+                hovermode='x unified'
+            )
+            chart_html = pio.to_html(fig, div_id=f"chart_{len(html_parts)}", include_plotlyjs=False)
+            html_parts.append(f'<div class="chart-container">{chart_html}</div>')
+        except Exception as e:
+            pass  # Пропускаем график, если есть ошибка
+    
+    # Таблица с данными (топ-50)
+    html_parts.append("<h2>📋 Данные (Топ-50 товаров)</h2>")
+    
+    # Подготавливаем данные для таблицы
+    export_df = filtered_df.head(50).copy()
+    
+    # Убираем столбцы, которые не нужны в HTML
+    columns_to_remove = ["Изображение"]
+    for col in columns_to_remove:
+        if col in export_df.columns:
+            export_df = export_df.drop(columns=[col])
+    
+    # Форматируем числовые значения
+    if "Выручка" in export_df.columns:
+        export_df["Выручка"] = export_df["Выручка"].apply(lambda x: f"{x:,.0f} ₽" if pd.notna(x) else "")
+    if "Средняя цена" in export_df.columns:
+        export_df["Средняя цена"] = export_df["Средняя цена"].apply(lambda x: f"{x:,.0f} ₽" if pd.notna(x) else "")
+    if "Заказы" in export_df.columns:
+        export_df["Заказы"] = export_df["Заказы"].apply(lambda x: f"{x:,.0f}" if pd.notna(x) else "")
+    
+    # Создаем HTML таблицу
+    html_parts.append('<table>')
+    html_parts.append('<thead><tr>')
+    for col in export_df.columns:
+        html_parts.append(f'<th>{col}</th>')
+    html_parts.append('</tr></thead>')
+    html_parts.append('<tbody>')
+    
+    for _, row in export_df.iterrows():
+        html_parts.append('<tr>')
+        for col in export_df.columns:
+            value = row[col]
+            if pd.isna(value):
+                value = ""
+            html_parts.append(f'<td>{value}</td>')
+        html_parts.append('</tr>')
+    
+    html_parts.append('</tbody></table>')
+    
+    # Закрытие HTML
+    html_parts.append("""
+        </div>
+    </body>
+    </html>
+    """)
+    
+    return "\n".join(html_parts)
+
+
+def build_screenshot_url(page_url: str, key: str,
+                         w: int = 400, h: int = 600,
+                         fmt: str = "JPEG", profile: str = "D4",
+                         base: str = "https://api.s-shot.ru"):
+    q = _urlparse.quote(page_url, safe="")
+    return f"{base.rstrip('/')}/{int(w)}x{int(h)}/{fmt}/{key}/{profile}/?{q}"
+
+
+def screenshot_for_article(nm, conf):
+    if not conf.get("key"):
+        return ""
+    page = build_wb_product_url(nm, conf.get("wb_host", "https://global.wildberries.ru"))
+    return build_screenshot_url(
+        page, conf.get("key", ""), conf.get("w", 400), conf.get("h", 600),
+        conf.get("fmt", "JPEG"), conf.get("profile", "D4"), conf.get("base", "https://api.s-shot.ru")
+    )
+
+
+@perf_timed()
+def kpi_row(df):
+    total_rev = float(df["Выручка"].sum()) if "Выручка" in df.columns else float('nan')
+    total_orders = df["Заказы"].sum() if "Заказы" in df.columns else np.nan
+    avg_check = (df["Выручка"].sum() / df["Заказы"].sum()) if ("Выручка" in df.columns and "Заказы" in df.columns and df["Заказы"].sum() > 0) else np.nan
+    lost_rev = df["Упущенная выручка"].sum() if "Упущенная выручка" in df.columns else np.nan
+    sku_count = (df["Артикул"].nunique() if "Артикул" in df.columns else len(df)) if len(df) > 0 else 0
+    rev_per_sku = (total_rev / sku_count) if (isinstance(total_rev, (int,float,np.floating)) and not pd.isna(total_rev) and sku_count > 0) else np.nan
+    k1, k2, k3, k4, k5, k6 = st.columns(6)
+    k1.metric("Выручка (в выборке)", fmt_rub_kpi(total_rev))
+    k2.metric("Заказы (в выборке)", fmt_units_kpi(total_orders, "шт."))
+    k3.metric("Средний чек", fmt_rub_kpi(avg_check))
+    k4.metric("Упущенная выручка", fmt_rub_kpi(lost_rev))
+    k5.metric("Выручка / Кол-во товаров", fmt_rub_kpi(rev_per_sku))
+    k6.metric("Количество артикулов", fmt_units_kpi(sku_count, "шт."))
+
+
+def render(tab, df, analysis_period, screenshot):
+    """Отрисовывает вкладку анализа данных и таблицу товаров с параметрами под вкладками"""
+    with tab:
+        perf_checkpoint("tab: 📊 Анализ данных")
+        # Основные фильтры
+        col1, col2, col3, col4 = st.columns(4)
+
+        search = col1.text_input("🔍 Поиск", value=st.session_state.get("search", ""), key="search_input")
+        spp = col2.number_input("💰 СПП, %", 0, 100, st.session_state.get("spp", 25), 1, key="spp_input")
+        buyout_pct = col3.number_input("📈 Процент выкупа, %", 1, 100, st.session_state.get("buyout_pct", 25), 1, key="buyout_input")
+
+        # Сохраняем значения в session_state
+        st.session_state["search"] = search
+        st.session_state["spp"] = spp
+        st.session_state["buyout_pct"] = buyout_pct
+
+        # Автоматически сохраняем настройки при изменении
+        save_main_page_data_to_file()
+
+        # Кнопка обновления данных
+        col4.markdown("🔄 Обновить данные")
+        if col4.button("Обновить", type="primary"):
+            st.rerun()
+
+        # Фильтр по предмету на отдельной строчке
+        if "Предмет" in df.columns:
+            subjects = sorted(df["Предмет"].dropna().unique())
+            selected_subjects = st.multiselect("📦 Предмет", subjects, default=subjects)
+        else:
+            selected_subjects = []
+
+        # Фильтры по параметрам товаров
+        param_values = get_param_values()
+        selected_param_filters = {}
+
+        # Исключаем скрытые параметры из фильтров
+        excluded_params = set(st.session_state.get("excluded_params", []))
+        visible_param_values = {k: v for k, v in param_values.items() if k not in excluded_params} if param_values else {}
+
+        if visible_param_values:
+            # Переключатель для включения/выключения фильтров по параметрам
+            enable_param_filters = st.checkbox(
+                "🎨 Включить фильтры по параметрам", 
+                value=False,
+                help="Включить фильтрацию товаров по их параметрам (цвет, материал и т.д.)"
+            )
+
+            if enable_param_filters:
+                st.subheader("🎨 Фильтры по параметрам")
+
+                # Создаем колонки для фильтров параметров
+                param_cols = st.columns(min(len(visible_param_values), 4))  # Максимум 4 колонки
+
+                for i, (param_name, param_data) in enumerate(visible_param_values.items()):
+                    col_idx = i % 4
+
+                    with param_cols[col_idx]:
+                        # Получаем уникальные значения для этого параметра (убираем дубликаты)
+                        unique_values = sorted(list(set([v for v in param_data.values() if v and v.strip()])))
+
+                        if unique_values:
+                            # Создаем multiselect для каждого параметра
+                            selected_values = st.multiselect(
+                                f"🎨 {param_name}",
+                                unique_values,
+                                default=[],  # По умолчанию ничего не выбрано
+                                help=f"Выберите значения для параметра '{param_name}'"
+                            )
+                            selected_param_filters[param_name] = selected_values
+                        else:
+                            selected_param_filters[param_name] = []
+
+        # Настройки отображения
+        # Инициализируем img_size по умолчанию (гарантируем, что это число)
+        if "img_size" not in st.session_state:
+            st.session_state["img_size"] = 200
+        img_size = int(st.session_state.get("img_size", 200))
+        col_img1, col_img2, col_img3 = st.columns(3)
+        show_images = col_img1.checkbox("🖼️ Показывать изображения", value=False)
+        if show_images:
+            img_size = int(col_img2.number_input("📏 Размер миниатюр (px)", min_value=50, max_value=300, value=int(img_size), step=10))
+            st.session_state["img_size"] = img_size
+            if col_img3.button("🔄 Обновить кеш изображений", type="secondary"):
+                # Очищаем кеш URL
+                st.session_state["img_url_cache"] = {}
+                save_url_cache({})
+                st.rerun()
+
+            # Показываем информацию о кеше изображений
+            cache_status = get_cache_status()
+            col_cache_info, col_cache_clear = st.columns([2, 1])
+
+            with col_cache_info:
+                if cache_status["count"] > 0:
+                    size_mb = cache_status["size"] / (1024 * 1024)
+                    st.info(f"📦 Кеш изображений: {cache_status['count']} файлов ({size_mb:.1f} МБ)")
+                else:
+                    st.info("📦 Кеш изображений пуст")
+
+            with col_cache_clear:
+                if cache_status["count"] > 0:
+                    if st.button("🗑️ Очистить кеш", key="clear_image_cache"):
+                        try:
+                            cache_dir = os.path.join(_cache_dir(), "imgs")
+                            if os.path.exists(cache_dir):
+                                for file in cache_status["files"]:
+                                    if os.path.exists(file["path"]):
+                                        os.remove(file["path"])
+                            st.success(f"✅ Удалено {cache_status['count']} изображений из кеша")
+                            st.rerun()
+                        except Exception as e:
+                            st.error(f"❌ Ошибка очистки кеша: {e}")
+            if not screenshot.get("key"):
+                st.info("💡 Для отображения изображений товаров введите API ключ s-shot.ru в боковой панели")
+
+        # Фильтр сортировки
+        col_sort1, col_sort2 = st.columns(2)
+
+        # Определяем доступные колонки для сортировки
+        sortable_columns = []
+        if "Выручка" in df.columns:
+            sortable_columns.append("Выручка")
+        if "Средняя цена" in df.columns:
+            sortable_columns.append("Средняя цена")
+        if "Заказы" in df.columns:
+            sortable_columns.append("Заказы")
+        if "Дата создания" in df.columns:
+            sortable_columns.append("Дата создания")
+        if "Прибыль" in df.columns:
+            sortable_columns.append("Прибыль")
+        if "Упущенная выручка" in df.columns:
+            sortable_columns.append("Упущенная выручка")
+        if "Позиция в выдаче" in df.columns:
+            sortable_columns.append("Позиция в выдаче")
+
+        # Добавляем опцию "Без сортировки"
+        sortable_columns.insert(0, "Без сортировки")
+
+        # Находим индекс "Выручка" для установки по умолчанию
+        default_index = 0  # По умолчанию "Без сортировки"
+        if "Выручка" in sortable_columns:
+            default_index = sortable_columns.index("Выручка")
+
+        sort_column = col_sort1.selectbox("📊 Сортировка по", sortable_columns, index=default_index)
+        sort_ascending = col_sort2.selectbox("🔽 Направление", ["По убыванию", "По возрастанию"], index=0) == "По возрастанию"
+
+        st.divider()
+
+        # Выручка
+        col7, col8 = st.columns(2)
+
+        if "Выручка" in df.columns:
+            default_revenue_max = int(df["Выручка"].max()) if not df["Выручка"].isna().all() else 1000000
+            revenue_min = col7.number_input("Выручка от", min_value=0, value=st.session_state.get("revenue_min", 0), step=1000, key="revenue_min_input")
+            revenue_max = col8.number_input("Выручка до", min_value=0, value=st.session_state.get("revenue_max", default_revenue_max), step=1000, key="revenue_max_input")
+
+            # Сохраняем значения в session_state
+            st.session_state["revenue_min"] = revenue_min
+            st.session_state["revenue_max"] = revenue_max
+
+            # Автоматически сохраняем настройки при изменении
+            save_main_page_data_to_file()
+        else:
+            revenue_min = st.session_state.get("revenue_min", 0)
+            revenue_max = st.session_state.get("revenue_max", 1000000)
+
+        # Цена
+        col9, col10 = st.columns(2)
+
+        if "Средняя цена" in df.columns:
+            default_price_max = int(df["Средняя цена"].max()) if not df["Средняя цена"].isna().all() else 10000
+            price_min = col9.number_input("Цена (до СПП) от", min_value=0, value=st.session_state.get("price_min", 0), step=100, key="price_min_input")
+            price_max = col10.number_input("Цена (до СПП) до", min_value=0, value=st.session_state.get("price_max", default_price_max), step=100, key="price_max_input")
+
+            # Сохраняем значения в session_state
+            st.session_state["price_min"] = price_min
+            st.session_state["price_max"] = price_max
+
+            # Автоматически сохраняем настройки при изменении
+            save_main_page_data_to_file()
+        else:
+            price_min = st.session_state.get("price_min", 0)
+            price_max = st.session_state.get("price_max", 10000)
+
+        # Дата создания
+
+        # Определяем диапазон дат для фильтрации
+        # Всегда используем полный диапазон дат создания для фильтра
+        if "Дата создания" in df.columns:
+            # Используем даты из колонки "Дата создания"
+            date_range = df["Дата создания"].dropna()
+            if not date_range.empty:
+                min_date = date_range.min().date()
+                max_date = date_range.max().date()
+                date_source = "колонка 'Дата создания'"
+            else:
+                min_date = pd.Timestamp.now().date()
+                max_date = pd.Timestamp.now().date()
+                date_source = "не найдены"
+                st.warning("⚠️ В данных нет информации о датах")
+        else:
+            min_date = pd.Timestamp.now().date()
+            max_date = pd.Timestamp.now().date()
+            date_source = "не найдены"
+            st.warning("⚠️ Колонка 'Дата создания' не найдена в данных")
+
+
+
+        # Создаем ползунок для выбора диапазона дат
+        date_range_days = (max_date - min_date).days
+        if date_range_days > 0:
+            date_slider = st.slider(
+                "📅 Выберите диапазон дат для фильтрации",
+                min_value=min_date,
+                max_value=max_date,
+                value=(min_date, max_date),
+                help="Выберите период для анализа. По умолчанию показан полный диапазон дат создания."
+            )
+            date_min, date_max = date_slider
+        else:
+            date_min = min_date
+            date_max = max_date
+            st.info(f"📅 Данные за один день: {min_date.strftime('%d.%m.%Y')}")
+        fdf = df.copy()
+
+        # Применяем фильтры
+        if search:
+            mask = fdf.apply(lambda x: x.astype(str).str.contains(search, case=False, na=False)).any(axis=1)
+            fdf = fdf[mask]
+
+        if selected_subjects and "Предмет" in fdf.columns:
+            fdf = fdf[fdf["Предмет"].isin(selected_subjects)]
+
+        # Фильтр по выручке
+        if "Выручка" in fdf.columns:
+            fdf = fdf[(fdf["Выручка"] >= revenue_min) & (fdf["Выручка"] <= revenue_max)]
+
+        # Фильтр по цене
+        if "Средняя цена" in fdf.columns:
+            fdf = fdf[(fdf["Средняя цена"] >= price_min) & (fdf["Средняя цена"] <= price_max)]
+
+        # Фильтр по дате создания
+        if "Дата создания" in fdf.columns:
+            fdf = fdf[(fdf["Дата создания"].dt.date >= date_min) & (fdf["Дата создания"].dt.date <= date_max)]
+
+        # Фильтры по параметрам товаров
+        if param_values and selected_param_filters and enable_param_filters:
+            for param_name, selected_values in selected_param_filters.items():
+                if selected_values:  # Если выбраны значения для фильтрации
+                    # Находим артикулы, которые соответствуют выбранным значениям параметра
+                    matching_skus = []
+                    if param_name in param_values:
+                        for sku, value in param_values[param_name].items():
+                            if value in selected_values:
+                                matching_skus.append(sku)
+
+                    if matching_skus:
+                        # Фильтруем данные по найденным артикулам
+                        mask = fdf["Артикул"].astype(str).str.replace(".0", "").isin(matching_skus)
+                        fdf = fdf[mask]
+
+        if "Средняя цена" in fdf.columns:
+            fdf["Цена (с СПП)"] = fdf["Средняя цена"] * (1 - float(spp)/100.0)
+        buyout_k = float(buyout_pct)/100.0 if buyout_pct else 0.0
+        if "Заказы" in fdf.columns:
+            fdf["Выкупы"] = pd.to_numeric(fdf["Заказы"], errors="coerce") * buyout_k
+        else:
+            fdf["Выкупы"] = np.nan
+        # === FIX: Прибыль = Выручка * (процент выкупа) ===
+        if "Выручка" in fdf.columns and buyout_k > 0:
+            fdf["Прибыль"] = pd.to_numeric(fdf["Выручка"], errors="coerce") * buyout_k
+        else:
+            fdf["Прибыль"] = np.nan
+
+        # Применяем сортировку
+        if sort_column and sort_column != "Без сортировки" and sort_column in fdf.columns:
+            fdf = sort_df(fdf, sort_column, sort_ascending)
+
+        kpi_row(fdf)
+        st.divider()
+
+        # Миниатюры кэш
+        url_cache = get_url_cache_with_state(st.session_state)
+
+        # Создаем копию для отображения
+        display_df = fdf.copy()
+        # Сохраняем display_df в session_state для использования в других вкладках
+        st.session_state["display_df"] = display_df
+
+        # Добавляем изображения
+        if show_images and "Артикул" in display_df.columns:
+            imgs = []
+            loaded_count = 0
+            cached_count = 0
+            total_items = len(display_df)
+
+            # Создаем прогресс-бар если много товаров
+            if total_items > 10:
+                progress_bar = st.progress(0)
+                status_text = st.empty()
+
+            for i, a in enumerate(display_df["Артикул"].astype(str)):
+                k = a.replace(".0","")
+                url = url_cache.get(k, "")
+                if not url and screenshot.get("key"):
+                    url = screenshot_for_article(k, screenshot)
+                    if url:
+                        url_cache[k] = url
+                        save_url_cache(url_cache)
+
+                # Проверяем кеш изображений - сначала ищем уже скачанные
+                cached_path = get_cached_image_path(k)
+                if cached_path and os.path.exists(cached_path):
+                    # Изображение уже в кеше, используем его
+                    path = cached_path
+                    cached_count += 1
+                elif url:
+                    # Изображения нет в кеше, но есть URL - скачиваем
+                    path = ensure_image_cached(k, url, screenshot.get("fmt", "JPEG"))
+                else:
+                    # Нет ни кеша, ни URL
+                    path = ""
+
+                if path and os.path.exists(path):
+                    # Создаем data URI для Streamlit
+                    img_bytes = load_image_bytes(path, img_size)
+                    if img_bytes:
+                        b64_data = base64.b64encode(img_bytes).decode()
+                        data_uri = f"data:image/jpeg;base64,{b64_data}"
+                        imgs.append(data_uri)
+                        loaded_count += 1
+                    else:
+                        imgs.append("")
+                else:
+                    imgs.append("")
+
+                # Обновляем прогресс
+                if total_items > 10:
+                    # Ограничиваем значение progress до максимум 1.0
+                    progress = min((i + 1) / total_items, 1.0)
+                    progress_bar.progress(progress)
+                    status_text.text(f"Загружаем изображения: {i + 1}/{total_items}")
+
+            # Очищаем прогресс-бар
+            if total_items > 10:
+                progress_bar.empty()
+                status_text.empty()
+
+            display_df.insert(1, "Изображение", imgs)
+
+            # Показываем статистику загрузки
+            if cached_count > 0:
+                st.success(f"📊 Загружено изображений: {loaded_count} из {len(display_df)} товаров (из кеша: {cached_count})")
+            else:
+                st.success(f"📊 Загружено изображений: {loaded_count} из {len(display_df)} товаров")
+
+        # Добавляем отдельный столбец со ссылками на артикулы
+        if "Артикул" in display_df.columns:
+            # Создаем специальный формат для отображения "Открыть" в Streamlit
+            display_df["Ссылка"] = "Открыть"
+            # Но фактические ссылки будут настроены через column_config
+
+        # Форматирование даты для Streamlit таблицы
+        if "Дата создания" in display_df.columns:
+            display_df["Дата создания"] = display_df["Дата создания"].apply(fmt_date)
+
+        # Оставляем числовые данные как есть для корректной сортировки в Streamlit таблице
+
+        # Изменение порядка столбцов
+        desired_order = [
+            "Артикул", "Ссылка", "Дата создания", "Выручка", "Заказы", "Выкупы", 
+            "Средняя цена", "Цена (с СПП)", "Упущенная выручка", "Прибыль",
+            "Предмет", "Позиция в выдаче", "Стоимость за 1000 показов", 
+            "Тип рекламы", "Буст на позицию", "Буст с позиции", "Дельта",
+            "Название", "Поставщик", "Бренд"
+        ]
+
+        # Добавляем изображения в начало если нужно
+        if show_images and "Изображение" in display_df.columns:
+            desired_order.insert(1, "Изображение")
+
+        # Информация о загруженных параметрах (только видимые)
+        excluded_params = set(st.session_state.get("excluded_params", []))
+        visible_params = {k: v for k, v in param_values.items() if k not in excluded_params} if param_values else {}
+        if visible_params:
+            total_params = sum(len(param_data) for param_data in visible_params.values())
+            hidden_count = len(excluded_params)
+            if hidden_count > 0:
+                st.info(f"📊 Параметров: {list(visible_params.keys())} ({total_params} значений) | 👁️ Скрыто: {hidden_count}")
+            else:
+                st.info(f"📊 Загружено параметров: {list(visible_params.keys())} ({total_params} значений)")
+
+        # Получаем список всех параметров (исключаем "крой" и скрытые параметры)
+        all_params = list(param_values.keys())
+        if "param_options" in st.session_state:
+            all_params.extend([p for p in st.session_state["param_options"].keys() if p not in all_params])
+
+        # Исключаем столбец "крой" из отображения
+        all_params = [param for param in all_params if param.lower() != "крой"]
+
+        # Исключаем скрытые параметры (excluded_params) из отображения в таблице
+        excluded_params = set(st.session_state.get("excluded_params", []))
+        all_params = [param for param in all_params if param not in excluded_params]
+
+        # Добавляем столбцы параметров в DataFrame
+        for param in all_params:
+            param_column_data = []
+            for sku in display_df["Артикул"].astype(str):
+                sku_clean = sku.replace(".0", "")
+                param_value = param_values.get(param, {}).get(sku_clean, "")
+                param_column_data.append(param_value)
+            display_df[param] = param_column_data
+
+        # Переупорядочиваем столбцы - параметры после "Дата создания"
+        existing_cols = [col for col in desired_order if col in display_df.columns]
+
+        # Находим позицию "Дата создания" в desired_order
+        date_creation_index = -1
+        if "Дата создания" in desired_order:
+            date_creation_index = desired_order.index("Дата создания")
+
+        # Разделяем столбцы на основные и параметры
+        main_cols = [col for col in existing_cols if col not in all_params]
+        param_cols = [col for col in all_params if col in display_df.columns]
+        other_cols = [col for col in display_df.columns if col not in existing_cols and col not in all_params]
+
+        # Если "Дата создания" найдена, вставляем параметры после неё
+        if date_creation_index >= 0 and "Дата создания" in main_cols:
+            date_index = main_cols.index("Дата создания")
+            # Вставляем параметры после "Дата создания"
+            final_order = main_cols[:date_index+1] + param_cols + main_cols[date_index+1:] + other_cols
+        else:
+            # Если "Дата создания" не найдена, добавляем параметры в конец основных столбцов
+            final_order = main_cols + param_cols + other_cols
+
+        display_df = display_df[final_order]
+
+        from streamlit import column_config as cc
+
+        # Настройка конфигурации столбцов для лучшего отображения
+        col_cfg = {}
+
+        # Конфигурация для изображений
+        if "Изображение" in display_df.columns:
+            # Убеждаемся, что img_size - это число (гарантируем целое число)
+            try:
+                img_width = int(float(img_size)) + 20
+            except (ValueError, TypeError):
+                img_width = 220
+            col_cfg["Изображение"] = cc.ImageColumn("Изображение", width=int(img_width))
+
+        # Конфигурация для артикула (числовой тип)
+        if "Артикул" in display_df.columns:
+            col_cfg["Артикул"] = cc.NumberColumn("Артикул", format="%.0f", width=int(120))
+
+        # Конфигурация для ссылки на товар с динамическими URL
+        if "Ссылка" in display_df.columns and "Артикул" in display_df.columns:
+            # Создаем ссылки на основе артикулов
+            links_data = []
+            for sku in display_df["Артикул"].astype(str):
+                sku_clean = sku.replace(".0", "")
+                links_data.append(f"https://global.wildberries.ru/catalog/{sku_clean}/detail.aspx")
+            display_df["Ссылка"] = links_data
+            # Явно указываем тип данных как строковый
+            display_df["Ссылка"] = display_df["Ссылка"].astype(str)
+            col_cfg["Ссылка"] = cc.LinkColumn("Ссылка", display_text="🔗", width=int(60))
+
+        # Конфигурация для числовых столбцов (NumberColumn для корректной сортировки)
+        money_columns = ["Выручка", "Средняя цена", "Цена (с СПП)", "Упущенная выручка", "Прибыль"]
+        for col in money_columns:
+            if col in display_df.columns:
+                col_cfg[col] = cc.NumberColumn(col, format="%.0f ₽", width=int(120))
+
+        # Конфигурация для числовых столбцов с единицами
+        if "Заказы" in display_df.columns:
+            col_cfg["Заказы"] = cc.NumberColumn("Заказы", format="%.0f шт.", width=int(120))
+        if "Выкупы" in display_df.columns:
+            col_cfg["Выкупы"] = cc.NumberColumn("Выкупы", format="%.0f шт.", width=int(120))
+
+        # Конфигурация для даты - отключаем редактирование чтобы избежать проблем с типами
+        if "Дата создания" in display_df.columns:
+            col_cfg["Дата создания"] = cc.TextColumn("Дата создания", width=int(150), disabled=True)
+
+    # Конфигурация для параметров товаров
+    for param in all_params:
+        if param in display_df.columns:
+            if param in st.session_state.get("param_options", {}):
+                # Selectbox для параметров с вариантами
+                options = [""] + st.session_state["param_options"][param]
+                col_cfg[param] = cc.SelectboxColumn(
+                    param, 
+                    options=options, 
+                    width=int(150)
+                )
+            else:
+                # Проверяем тип данных в колонке для правильной настройки
+                column_data = display_df[param]
+                if column_data.dtype in ['int64', 'float64'] or pd.api.types.is_numeric_dtype(column_data):
+                    # Для числовых данных используем NumberColumn
+                    col_cfg[param] = cc.NumberColumn(param, width=int(150), format="%.0f")
+                else:
+                    # Для текстовых данных используем TextColumn
+                    col_cfg[param] = cc.TextColumn(param, width=int(150))
+
+    # Отображаем редактируемую таблицу с возможностью сортировки
+    # Вычисляем оптимальную высоту на основе количества строк
+    num_rows = len(display_df)
+    # Минимум 400px, максимум 5000px для очень больших таблиц
+    optimal_height = max(400, min(5000, num_rows * 30 + 100))
+
+    # Показываем информацию о таблице
+    col_info1, col_info2 = st.columns(2)
+    with col_info1:
+        st.metric("📊 Строк в таблице", f"{num_rows:,}")
+    with col_info2:
+        st.metric("📏 Высота таблицы", f"{optimal_height}px")
+
+    # Дополнительная проверка col_cfg - убеждаемся, что все width - это числа
+    if col_cfg:
+        for col_name, col_config in col_cfg.items():
+            if hasattr(col_config, 'width') and col_config.width is not None:
+                try:
+                    col_config.width = int(col_config.width)
+                except (ValueError, TypeError):
+                    # Если width не может быть преобразован в int, убираем его
+                    col_config.width = None
+
+    # Поле поиска по артикулу
+    if "Артикул" in display_df.columns:
+        search_col1, search_col2 = st.columns([3, 1])
+        with search_col1:
+            sku_search = st.text_input(
+                "🔍 Поиск по артикулу:",
+                value=st.session_state.get("sku_search", ""),
+                placeholder="Введите артикул для поиска...",
+                key="sku_search_input"
+            )
+            st.session_state["sku_search"] = sku_search
+        with search_col2:
+            if st.button("🔄 Сбросить", key="reset_sku_search"):
+                st.session_state["sku_search"] = ""
+                sku_search = ""
+                st.rerun()
+
+        # Фильтруем таблицу по поисковому запросу
+        if sku_search and sku_search.strip():
+            search_term = sku_search.strip()
+            # Ищем артикулы, содержащие поисковый запрос
+            mask = display_df["Артикул"].astype(str).str.contains(search_term, case=False, na=False)
+            filtered_display_df = display_df[mask].copy()
+
+            if len(filtered_display_df) > 0:
+                st.info(f"🔍 Найдено товаров: {len(filtered_display_df)} из {len(display_df)}")
+            else:
+                st.warning(f"⚠️ Товары с артикулом, содержащим '{search_term}', не найдены")
+        else:
+            filtered_display_df = display_df.copy()
+    else:
+        filtered_display_df = display_df.copy()
+
+    # Сохраняем текущую выборку артикулов для использования в планах
+    if "Артикул" in filtered_display_df.columns:
+        st.session_state["analysis_filtered_skus"] = (
+            filtered_display_df["Артикул"]
+            .dropna()
+            .astype(str)
+            .str.replace(".0", "")
+            .unique()
+            .tolist()
+        )
+
+    edited_df = st.data_editor(
+        filtered_display_df, 
+        hide_index=True, 
+        column_config=col_cfg if col_cfg else None,
+        column_order=None,  # Позволяет пользователю переупорядочивать столбцы
+        num_rows="fixed",
+        use_container_width=True,
+        key="main_table_editor"
+    )
+
+    # Сохраняем изменения параметров обратно в param_values
+    if all_params:
+        changes_made = False
+        for index, row in edited_df.iterrows():
+            # Обрабатываем артикул как число, но конвертируем в строку для ключей
+            sku_raw = row["Артикул"]
+            if pd.isna(sku_raw):
+                continue
+            sku = str(int(sku_raw)) if isinstance(sku_raw, (int, float)) else str(sku_raw)
+
+            for param in all_params:
+                if param in row and row[param]:
+                    if param not in param_values:
+                        param_values[param] = {}
+                    if sku not in param_values[param] or param_values[param][sku] != str(row[param]):
+                        param_values[param][sku] = str(row[param])
+                        changes_made = True
+                elif param in param_values and sku in param_values[param]:
+                    # Удаляем пустые значения
+                    if not row.get(param):
+                        del param_values[param][sku]
+                        changes_made = True
+
+        # Показываем уведомление об изменениях (без автоматического сохранения)
+        if changes_made:
+            st.success("✅ Изменения параметров сохранены в памяти!")
+
+    # Кнопка для сохранения в файл
+    col_save1, col_save2 = st.columns([1, 4])
+    with col_save1:
+        if st.button("💾 Сохранить в файл", type="primary"):
+            if save_param_values_to_file():
+                st.success("✅ Параметры сохранены в файл!")
+            else:
+                st.error("❌ Ошибка сохранения в файл")
+
+    # ==================== ЭКСПОРТ ДАННЫХ ====================
+    st.divider()
+    st.subheader("💾 Экспорт данных")
+
+    col_export1, col_export2, col_export3 = st.columns(3)
+
+    with col_export1:
+        # Экспорт текущих данных в Excel
+        if st.button("📥 Скачать данные (Excel)", type="primary", use_container_width=True):
+            try:
+                # Создаем Excel файл с данными
+                output = BytesIO()
+                with pd.ExcelWriter(output, engine='openpyxl') as writer:
+                    # Основная таблица с отфильтрованными данными
+                    export_df = fdf.copy()
+
+                    # Убираем столбец с изображениями (если есть) - он не нужен в Excel
+                    if "Изображение" in export_df.columns:
+                        export_df = export_df.drop(columns=["Изображение"])
+
+                    # Убираем data URI из ссылок, оставляем только URL
+                    if "Ссылка" in export_df.columns:
+                        # Ссылки уже в правильном формате
+                        pass
+
+                    export_df.to_excel(writer, sheet_name='Данные', index=False)
+
+                    # Добавляем лист со статистикой
+                    stats_data = {
+                        'Показатель': [
+                            'Всего товаров',
+                            'Общая выручка',
+                            'Общие заказы',
+                            'Средняя цена',
+                            'Средняя выручка на товар',
+                            'Период анализа',
+                            'Дата экспорта'
+                        ],
+                        'Значение': [
+                            len(export_df),
+                            f"{export_df['Выручка'].sum():,.0f} ₽" if "Выручка" in export_df.columns else "N/A",
+                            f"{export_df['Заказы'].sum():,.0f} шт" if "Заказы" in export_df.columns else "N/A",
+                            f"{export_df['Средняя цена'].mean():,.0f} ₽" if "Средняя цена" in export_df.columns else "N/A",
+                            f"{export_df['Выручка'].mean():,.0f} ₽" if "Выручка" in export_df.columns else "N/A",
+                            analysis_period.get('period_str', 'N/A') if analysis_period else 'N/A',
+                            datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                        ]
+                    }
+                    stats_df = pd.DataFrame(stats_data)
+                    stats_df.to_excel(writer, sheet_name='Статистика', index=False)
+
+                output.seek(0)
+
+                # Получаем имя файла
+                file_name = st.session_state.get("cached_file_name", "report")
+                if file_name:
+                    base_name = os.path.splitext(file_name)[0]
+                else:
+                    base_name = "report"
+
+                export_filename = f"{base_name}_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+
+                st.download_button(
+                    label="📥 Скачать Excel файл",
+                    data=output.getvalue(),
+                    file_name=export_filename,
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    key="download_excel_btn"
+                )
+                st.success("✅ Файл готов к скачиванию!")
+            except Exception as e:
+                st.error(f"❌ Ошибка создания Excel файла: {str(e)}")
+
+    with col_export2:
+        # Экспорт полного отчета с графиками (HTML)
+        if st.button("📊 Создать отчет с графиками", type="primary", use_container_width=True):
+            try:
+                report_html = create_html_report_with_charts(fdf, df, analysis_period)
+
+                # Получаем имя файла
+                file_name = st.session_state.get("cached_file_name", "report")
+                if file_name:
+                    base_name = os.path.splitext(file_name)[0]
+                else:
+                    base_name = "report"
+
+                report_filename = f"{base_name}_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
+
+                st.download_button(
+                    label="📊 Скачать HTML отчет",
+                    data=report_html,
+                    file_name=report_filename,
+                    mime="text/html",
+                    key="download_html_report_btn"
+                )
+                st.success("✅ HTML отчет готов к скачиванию!")
+            except Exception as e:
+                st.error(f"❌ Ошибка создания отчета: {str(e)}")
+                import traceback
+                st.code(traceback.format_exc())
+
+    with col_export3:
+        # Экспорт в CSV
+        if st.button("📄 Скачать CSV", type="secondary", use_container_width=True):
+            try:
+                export_df = fdf.copy()
+
+                # Убираем столбец с изображениями
+                if "Изображение" in export_df.columns:
+                    export_df = export_df.drop(columns=["Изображение"])
+
+                csv_data = export_df.to_csv(index=False, encoding='utf-8-sig')
+
+                file_name = st.session_state.get("cached_file_name", "report")
+                if file_name:
+                    base_name = os.path.splitext(file_name)[0]
+                else:
+                    base_name = "report"
+
+                csv_filename = f"{base_name}_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+
+                st.download_button(
+                    label="📄 Скачать CSV",
+                    data=csv_data,
+                    file_name=csv_filename,
+                    mime="text/csv",
+                    key="download_csv_btn"
+                )
+                st.success("✅ CSV файл готов к скачиванию!")
+            except Exception as e:
+                st.error(f"❌ Ошибка создания CSV файла: {str(e)}")
@@ -0,0 +1,3255 @@
+# -*- coding: utf-8 -*-
+"""
+Вкладка «📈 Аналитика по параметрам»
+
+Топ комбинаций параметров, анализ комбинаций и трендов WGSN через ИИ.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.perf import perf_checkpoint
+from utils.lazy import LazyModule
+from utils.data_processing import get_analysis_period
+from utils.wgsn_reader import read_wgsn_files
+from utils.image_cache import get_cached_image_path, load_image_bytes
+from utils.ai_analysis import analyze_wgsn_trends_with_ai_core
+
+from .common import OPENAI_AVAILABLE, find_reports_with_missing, analyze_combination_products_with_ai
+from .params import (
+    get_param_values, get_hierarchy_params, get_subtype_params, get_visual_params,
+    save_excluded_params_settings, load_excluded_params_settings, load_deleted_params_from_file
+)
+
+# plotly загружается при первом построении графика, а не при отрисовке вкладки
+go = LazyModule("plotly.graph_objects")
+
+
+def get_category_cagr_analysis(category: str = "Рашрашд мужской (компрессионная одежда)") -> dict:
+    """
+    Возвращает информацию о CAGR (Compound Annual Growth Rate) для категории.
+    
+    Args:
+        category: Категория товаров
+        
+    Returns:
+        Словарь с информацией о CAGR и анализом рынка
+    """
+    # Данные о CAGR для компрессионной одежды (примерные значения на основе рыночных данных)
+    cagr_data = {
+        "Рашрашд мужской (компрессионная одежда)": {
+            "cagr_5_years": 8.5,  # Примерный CAGR за 5 лет
+            "market_size_2024": "2.5 млрд руб",  # Размер рынка в 2024
+            "projected_growth_2025": 9.2,  # Прогнозируемый рост в 2025
+            "key_drivers": [
+                "Рост популярности фитнеса и здорового образа жизни",
+                "Увеличение спроса на функциональную одежду",
+                "Развитие e-commerce и онлайн-продаж",
+                "Расширение ассортимента и улучшение качества продукции"
+            ],
+            "trends": [
+                "Фокус на экологичных материалах",
+                "Технологичные ткани с улучшенными свойствами",
+                "Персонализация и кастомизация",
+                "Интеграция умных технологий"
+            ],
+            "competition_level": "Высокий",
+            "market_maturity": "Растущий рынок"
+        }
+    }
+    
+    # Если категория не найдена, возвращаем общие данные
+    if category not in cagr_data:
+        return {
+            "cagr_5_years": 7.0,
+            "market_size_2024": "N/A",
+            "projected_growth_2025": 7.5,
+            "key_drivers": ["Общие рыночные факторы"],
+            "trends": ["Общие тренды рынка"],
+            "competition_level": "Средний",
+            "market_maturity": "Стабильный"
+        }
+    
+    return cagr_data[category]
+
+
+def analyze_wgsn_trends_with_ai(wgsn_content: dict, category: str = "Рашрашд мужской (компрессионная одежда)", combination_key: str = "") -> dict:
+    """
+    Анализирует содержимое файлов WGSN с помощью ИИ для получения трендов и рекомендаций.
+    Обёртка для analyze_wgsn_trends_with_ai_core, которая получает API ключ из session_state.
+    
+    Args:
+        wgsn_content: Словарь с содержимым файлов WGSN
+        category: Категория товаров
+        combination_key: Ключ комбинации параметров
+        
+    Returns:
+        Словарь с анализом трендов WGSN
+    """
+    if not OPENAI_AVAILABLE:
+        return {
+            "error": "OpenAI не доступен. Установите библиотеку openai для использования этой функции."
+        }
+    
+    if "error" in wgsn_content:
+        return wgsn_content
+    
+    # Получаем API ключ
+    api_key = st.session_state.get('openai_api_key', '')
+    if not api_key:
+        try:
+            api_key = st.secrets.get('openai_api_key', '')
+        except:
+            pass
+    
+    if not api_key:
+        return {
+            "error": "API ключ OpenAI не найден. Укажите ключ в настройках."
+        }
+    
+    return analyze_wgsn_trends_with_ai_core(
+        wgsn_content=wgsn_content,
+        category=category,
+        combination_key=combination_key,
+        api_key=api_key
+    )
+
+
+def render(df, uploaded):
+    """Отрисовывает аналитику по параметрам и топ комбинаций"""
+    perf_checkpoint("tab: 📈 Аналитика по параметрам")
+    st.subheader("📈 Аналитика по параметрам")
+
+    # Получаем данные параметров
+    param_values = get_param_values()
+    param_options = st.session_state.get("param_options", {})
+
+    if not param_values and not param_options:
+        st.warning("Сначала установите параметры товаров во второй вкладке")
+    else:
+        # Выбор параметра для анализа
+        # Объединяем параметры из param_values и param_options, чтобы показывать все определенные параметры
+        params_from_values = set(param_values.keys()) if param_values else set()
+        params_from_options = set(param_options.keys()) if param_options else set()
+        available_params = sorted(list(params_from_values | params_from_options))
+        if available_params:
+            # Кнопка экспорта всех параметров в Excel
+            col_export_all, col_select = st.columns([1, 2])
+
+            with col_export_all:
+                if st.button("📊 Экспорт всех параметров в Excel", type="secondary"):
+                    try:
+                        # Создаем Excel файл с несколькими листами
+                        import io
+                        from openpyxl import Workbook
+
+                        wb = Workbook()
+                        # Удаляем дефолтный лист
+                        wb.remove(wb.active)
+
+                        # Получаем имя загруженного файла для названия экспорта
+                        base_filename = "analytics_all_parameters"
+                        if hasattr(uploaded, 'name') and uploaded.name:
+                            name_without_ext = os.path.splitext(uploaded.name)[0]
+                            base_filename = f"{name_without_ext}_analytics_all_parameters"
+
+                        # Создаем лист для каждого параметра
+                        for param_name in available_params:
+                            ws = wb.create_sheet(title=param_name)
+
+                            # Получаем данные для этого параметра
+                            param_values_set = set()
+                            if param_name in param_values:
+                                for sku, value in param_values[param_name].items():
+                                    if value:
+                                        param_values_set.add(value)
+
+                                # Создаем аналитику для этого параметра
+                                analytics_data = []
+
+                                for param_value in sorted(param_values_set):
+                                    matching_skus = []
+                                    if param_name in param_values:
+                                        for sku, value in param_values[param_name].items():
+                                            if value == param_value:
+                                                matching_skus.append(sku)
+
+                                    if matching_skus:
+                                        mask = df["Артикул"].astype(str).str.replace(".0", "").isin(matching_skus)
+                                        filtered_df = df[mask]
+
+                                        if not filtered_df.empty:
+                                            total_revenue = filtered_df["Выручка"].sum() if "Выручка" in filtered_df.columns else 0
+                                            total_orders = filtered_df["Заказы"].sum() if "Заказы" in filtered_df.columns else 0
+                                            avg_price = filtered_df["Средняя цена"].mean() if "Средняя цена" in filtered_df.columns else 0
+                                            lost_revenue = filtered_df["Упущенная выручка"].sum() if "Упущенная выручка" in filtered_df.columns else 0
+                                            avg_position = filtered_df["Позиция в выдаче (средняя)"].mean() if "Позиция в выдаче (средняя)" in filtered_df.columns else 0
+                                            avg_cpm = filtered_df["Стоимость за 1000 показов на 1 артикул"].mean() if "Стоимость за 1000 показов на 1 артикул" in filtered_df.columns else 0
+
+                                            analytics_data.append({
+                                                param_value: {
+                                                    'Общая выручка': total_revenue,
+                                                    'Количество артикулов': len(filtered_df),
+                                                    'Выручка на 1 артикул': total_revenue / len(filtered_df) if len(filtered_df) > 0 else 0,
+                                                    'Средняя цена без СПП': avg_price,
+                                                    'Упущенная выручка': lost_revenue,
+                                                    'Упущенная выручка на 1 артикул': lost_revenue / len(filtered_df) if len(filtered_df) > 0 else 0,
+                                                    'Позиция в выдаче (средняя)': avg_position,
+                                                    'Стоимость за 1000 показов на 1 артикул': avg_cpm
+                                                }
+                                            })
+
+                                    # Записываем данные в лист
+                                    if analytics_data:
+                                        # Заголовки
+                                        ws['A1'] = 'Метрика'
+                                        col = 2
+                                        param_values_list = sorted([list(item.keys())[0] for item in analytics_data])
+
+                                        for param_val in param_values_list:
+                                            ws.cell(row=1, column=col, value=param_val)
+                                            col += 1
+
+                                        # Данные
+                                        metric_names = [
+                                            "Общая выручка",
+                                            "Количество артикулов", 
+                                            "Выручка на 1 артикул",
+                                            "Средняя цена без СПП",
+                                            "Упущенная выручка",
+                                            "Упущенная выручка на 1 артикул",
+                                            "Позиция в выдаче (средняя)",
+                                            "Стоимость за 1000 показов на 1 артикул"
+                                        ]
+
+                                        for row, metric in enumerate(metric_names, 2):
+                                            ws.cell(row=row, column=1, value=metric)
+
+                                            col = 2
+                                            for param_val in param_values_list:
+                                                # Находим данные для этого значения параметра
+                                                for item in analytics_data:
+                                                    if param_val in item:
+                                                        metrics = item[param_val]
+                                                        value = metrics.get(metric, 0)
+                                                        if metric in ["Общая выручка", "Выручка на 1 артикул", "Средняя цена без СПП", "Упущенная выручка", "Упущенная выручка на 1 артикул"]:
+                                                            ws.cell(row=row, column=col, value=value)
+                                                        else:
+                                                            ws.cell(row=row, column=col, value=value)
+                                                        break
+                                            col += 1
+
+                        # Сохраняем в байты
+                        excel_buffer = io.BytesIO()
+                        wb.save(excel_buffer)
+                        excel_buffer.seek(0)
+
+                        st.download_button(
+                            label="💾 Скачать Excel файл",
+                            data=excel_buffer.getvalue(),
+                            file_name=f"{base_filename}.xlsx",
+                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                        )
+
+                        st.success("✅ Excel файл готов к скачиванию!")
+
+                    except Exception as e:
+                        st.error(f"❌ Ошибка создания Excel файла: {e}")
+
+            with col_select:
+                # Определяем иерархию параметров
+                # Иерархия: Тип → Подтип (Рукав, Ворот) → Остальные параметры (Цвет, Строчка и т.д.)
+                hierarchy_params_list = get_hierarchy_params()
+                type_param = hierarchy_params_list[0] if hierarchy_params_list else "Тип"
+                subtype_params = get_subtype_params()  # Параметры, которые находятся внутри "Подтип"
+                visual_params = get_visual_params()
+
+                # Разделяем параметры на категории
+                type_param_available = type_param in available_params
+                subtype_params_available = [p for p in subtype_params if p in available_params]
+                visual_params_list = [p for p in available_params if p in visual_params or any(vp in p for vp in visual_params)]
+                other_params_list = [p for p in available_params if p != type_param and p not in subtype_params and p not in visual_params_list]
+
+                # Трехуровневая иерархия выбора
+                selected_type_value = None
+                selected_subtype_param = None
+                selected_subtype_value = None
+                selected_other_param = None
+                use_combined_analysis = False
+                combined_hierarchy_param = None
+                combined_hierarchy_value = None
+                combined_subtype_param = None
+                combined_subtype_value = None
+
+                if type_param_available:
+                    st.info(f"📊 **Иерархия сегментов**: Тип → Подтип (Рукав, Ворот) → Остальные параметры")
+
+                    # Уровень 1: Выбор параметра "Тип" и его значения
+                    type_param_values = set()
+                    if type_param in param_values:
+                        for sku, value in param_values[type_param].items():
+                            if value and str(value).strip():
+                                type_param_values.add(str(value).strip())
+
+                    if type_param_values:
+                        selected_type_values = st.multiselect(
+                            f"1️⃣ Выберите значения параметра '{type_param}' (можно выбрать несколько):",
+                            sorted(list(type_param_values)),
+                            key="analytics_type_value_selector",
+                            help="Выберите одно или несколько значений типа товара"
+                        )
+
+                        if selected_type_values:
+                            if len(selected_type_values) == 1:
+                                selected_type_value = selected_type_values[0]
+                            else:
+                                selected_type_value = selected_type_values
+
+                            # Уровень 2: Выбор подтипа (Рукав, Ворот), если выбран тип
+                            if subtype_params_available:
+                                st.divider()
+                                selected_subtype_param = st.selectbox(
+                                    "2️⃣ Выберите параметр подтипа:",
+                                    ["Не выбран"] + subtype_params_available,
+                                    key="analytics_subtype_param_selector",
+                                    help="Выберите параметр подтипа (Рукав или Ворот)"
+                                )
+
+                                if selected_subtype_param != "Не выбран":
+                                    # Получаем значения выбранного параметра подтипа
+                                    subtype_param_values = set()
+                                    if selected_subtype_param in param_values:
+                                        for sku, value in param_values[selected_subtype_param].items():
+                                            if value and str(value).strip():
+                                                # Фильтруем только по выбранным типам
+                                                if type_param in param_values and sku in param_values[type_param]:
+                                                    type_val = param_values[type_param][sku]
+                                                    if isinstance(selected_type_value, list):
+                                                        if str(type_val).strip() in [str(v).strip() for v in selected_type_value]:
+                                                            subtype_param_values.add(str(value).strip())
+                                                    else:
+                                                        if str(type_val).strip() == str(selected_type_value).strip():
+                                                            subtype_param_values.add(str(value).strip())
+
+                                    if subtype_param_values:
+                                        selected_subtype_values = st.multiselect(
+                                            f"Выберите значения параметра '{selected_subtype_param}' (можно выбрать несколько):",
+                                            sorted(list(subtype_param_values)),
+                                            key="analytics_subtype_value_selector",
+                                            help="Выберите одно или несколько значений подтипа"
+                                        )
+
+                                        if selected_subtype_values:
+                                            if len(selected_subtype_values) == 1:
+                                                selected_subtype_value = selected_subtype_values[0]
+                                            else:
+                                                selected_subtype_value = selected_subtype_values
+                                            combined_subtype_param = selected_subtype_param
+                                            combined_subtype_value = selected_subtype_value
+
+                                    # Уровень 3: Выбор остальных параметров
+                                    all_other_params = visual_params_list + other_params_list
+                                    if all_other_params:
+                                        st.divider()
+                                        selected_other_param = st.selectbox(
+                                            "3️⃣ Выберите параметр для анализа:",
+                                            ["Не выбран"] + all_other_params,
+                                            key="analytics_other_param_selector",
+                                            help="Выберите параметр для анализа (Цвет, Строчка и т.д.)"
+                                        )
+
+                                        if selected_other_param != "Не выбран":
+                                            selected_param = selected_other_param
+                                            use_combined_analysis = True
+                                            combined_hierarchy_param = type_param
+                                            combined_hierarchy_value = selected_type_value
+                                        else:
+                                            selected_param = selected_subtype_param
+                                            combined_hierarchy_param = type_param
+                                            combined_hierarchy_value = selected_type_value
+                                    else:
+                                        selected_param = selected_subtype_param
+                                        combined_hierarchy_param = type_param
+                                        combined_hierarchy_value = selected_type_value
+                                else:
+                                    # Если подтип не выбран, можно выбрать остальные параметры
+                                    all_other_params = visual_params_list + other_params_list
+                                    if all_other_params:
+                                        st.divider()
+                                        selected_other_param = st.selectbox(
+                                            "2️⃣ Выберите параметр для анализа:",
+                                            ["Не выбран"] + all_other_params,
+                                            key="analytics_other_param_selector_no_subtype",
+                                            help="Выберите параметр для анализа (Цвет, Строчка и т.д.)"
+                                        )
+
+                                        if selected_other_param != "Не выбран":
+                                            selected_param = selected_other_param
+                                            use_combined_analysis = True
+                                            combined_hierarchy_param = type_param
+                                            combined_hierarchy_value = selected_type_value
+                                        else:
+                                            selected_param = type_param
+                                            combined_hierarchy_param = None
+                                            combined_hierarchy_value = None
+                                    else:
+                                        selected_param = type_param
+                                        combined_hierarchy_param = None
+                                        combined_hierarchy_value = None
+                            else:
+                                # Если нет параметров подтипа, сразу выбираем остальные параметры
+                                all_other_params = visual_params_list + other_params_list
+                                if all_other_params:
+                                    st.divider()
+                                    selected_other_param = st.selectbox(
+                                        "2️⃣ Выберите параметр для анализа:",
+                                        ["Не выбран"] + all_other_params,
+                                        key="analytics_other_param_selector_no_subtype",
+                                        help="Выберите параметр для анализа (Цвет, Строчка и т.д.)"
+                                    )
+
+                                    if selected_other_param != "Не выбран":
+                                        selected_param = selected_other_param
+                                        use_combined_analysis = True
+                                        combined_hierarchy_param = type_param
+                                        combined_hierarchy_value = selected_type_value
+                                    else:
+                                        selected_param = type_param
+                                        combined_hierarchy_param = None
+                                        combined_hierarchy_value = None
+                                else:
+                                    selected_param = type_param
+                                    combined_hierarchy_param = None
+                                    combined_hierarchy_value = None
+                        else:
+                            selected_param = None
+                            combined_hierarchy_param = None
+                            combined_hierarchy_value = None
+                    else:
+                        if type_param in param_options:
+                            st.info(f"ℹ️ Параметр '{type_param}' определен, но еще не заполнен для товаров. Заполните его во вкладке '⚙️ Установка параметров'.")
+                        else:
+                            st.warning(f"⚠️ Параметр '{type_param}' не найден. Создайте его во вкладке '⚙️ Установка параметров'.")
+                        selected_param = None
+                        combined_hierarchy_param = None
+                        combined_hierarchy_value = None
+                else:
+                    # Если нет параметра "Тип", используем обычный выбор
+                    selected_param = st.selectbox(
+                        "Выберите параметр для анализа",
+                        available_params,
+                        key="analytics_param_selector"
+                    )
+                    use_combined_analysis = False
+                    combined_hierarchy_param = None
+                    combined_hierarchy_value = None
+
+            if selected_param and selected_param != "Не выбран":
+                # Формируем заголовок с учетом иерархии
+                title_parts = []
+                if combined_hierarchy_param and combined_hierarchy_value:
+                    if isinstance(combined_hierarchy_value, list):
+                        values_str = ", ".join(combined_hierarchy_value)
+                        title_parts.append(f"{combined_hierarchy_param} = [{values_str}]")
+                    else:
+                        title_parts.append(f"{combined_hierarchy_param} = {combined_hierarchy_value}")
+
+                if combined_subtype_param and combined_subtype_value:
+                    if isinstance(combined_subtype_value, list):
+                        subtype_str = ", ".join(combined_subtype_value)
+                        title_parts.append(f"{combined_subtype_param} = [{subtype_str}]")
+                    else:
+                        title_parts.append(f"{combined_subtype_param} = {combined_subtype_value}")
+
+                if title_parts:
+                    hierarchy_str = " → ".join(title_parts)
+                    st.write(f"**Аналитика по параметру: {selected_param} (в контексте: {hierarchy_str})**")
+                else:
+                    st.write(f"**Аналитика по параметру: {selected_param}**")
+
+                # Создаем DataFrame для анализа
+                analytics_data = []
+
+                # Если используется комбинированный анализ, группируем по комбинации параметров
+                if use_combined_analysis and combined_hierarchy_param:
+                    # Комбинированный анализ: группируем по комбинации иерархического и визуального параметров
+                    combinations = {}
+
+                    # Собираем все комбинации значений двух параметров
+                    for sku in df["Артикул"].astype(str).str.replace(".0", "").unique():
+                        sku_str = str(sku)
+                        hierarchy_value = None
+                        visual_value = None
+
+                        if combined_hierarchy_param in param_values and sku_str in param_values[combined_hierarchy_param]:
+                            hierarchy_value = param_values[combined_hierarchy_param][sku_str]
+
+                        # Если выбрано конкретное значение(я) иерархии, фильтруем только по ним
+                        if combined_hierarchy_value:
+                            if isinstance(combined_hierarchy_value, list):
+                                # Если выбрано несколько значений, проверяем вхождение в список
+                                if not hierarchy_value or str(hierarchy_value).strip() not in [str(v).strip() for v in combined_hierarchy_value]:
+                                    continue
+                            else:
+                                # Если выбрано одно значение, проверяем точное совпадение
+                                if not hierarchy_value or str(hierarchy_value).strip() != str(combined_hierarchy_value).strip():
+                                    continue
+
+                        # Если выбран подтип, фильтруем по нему
+                        if combined_subtype_param and combined_subtype_value:
+                            if combined_subtype_param in param_values and sku_str in param_values[combined_subtype_param]:
+                                subtype_val = param_values[combined_subtype_param][sku_str]
+                                if isinstance(combined_subtype_value, list):
+                                    if not subtype_val or str(subtype_val).strip() not in [str(v).strip() for v in combined_subtype_value]:
+                                        continue
+                                else:
+                                    if not subtype_val or str(subtype_val).strip() != str(combined_subtype_value).strip():
+                                        continue
+                            else:
+                                continue
+
+                        if selected_param in param_values and sku_str in param_values[selected_param]:
+                            visual_value = param_values[selected_param][sku_str]
+
+                        if visual_value and str(visual_value).strip():
+                            # Нормализуем значения для избежания дубликатов (убираем пробелы, приводим к единому формату)
+                            # Используем strip() для удаления пробелов, но сохраняем оригинальный регистр для отображения
+                            normalized_visual = str(visual_value).strip()
+                            normalized_hierarchy = str(hierarchy_value).strip() if hierarchy_value else ""
+
+                            # Если выбрано конкретное значение иерархии, упрощаем ключ
+                            if combined_hierarchy_value:
+                                combo_key = f"{selected_param}: {normalized_visual}"
+                            else:
+                                combo_key = f"{combined_hierarchy_param}: {normalized_hierarchy} | {selected_param}: {normalized_visual}"
+
+                            # Нормализуем ключ для сравнения (приводим к нижнему регистру для избежания дубликатов)
+                            combo_key_normalized = combo_key.lower()
+
+                            # Используем нормализованный ключ для хранения, но сохраняем оригинальный для отображения
+                            if combo_key_normalized not in combinations:
+                                combinations[combo_key_normalized] = {
+                                    "display_key": combo_key,  # Оригинальный ключ для отображения
+                                    "skus": set()  # Set для хранения артикулов без дубликатов
+                                }
+                            combinations[combo_key_normalized]["skus"].add(sku_str)
+
+                    # Для каждой комбинации собираем метрики
+                    for combo_key_normalized, combo_data in combinations.items():
+                        combo_key = combo_data["display_key"]  # Используем оригинальный ключ для отображения
+                        skus = combo_data["skus"]
+                        # Преобразуем set в list для использования в isin
+                        skus_list = list(skus)
+                        mask = df["Артикул"].astype(str).str.replace(".0", "").isin(skus_list)
+                        filtered_df = df[mask]
+
+                        if not filtered_df.empty:
+                            total_revenue = filtered_df["Выручка"].sum() if "Выручка" in filtered_df.columns else 0
+                            total_orders = filtered_df["Заказы"].sum() if "Заказы" in filtered_df.columns else 0
+                            avg_price = filtered_df["Средняя цена"].mean() if "Средняя цена" in filtered_df.columns else 0
+                            lost_revenue = filtered_df["Упущенная выручка"].sum() if "Упущенная выручка" in filtered_df.columns else 0
+                            revenue_per_product = total_revenue / len(filtered_df) if len(filtered_df) > 0 else 0
+                            lost_revenue_per_product = lost_revenue / len(filtered_df) if len(filtered_df) > 0 else 0
+                            avg_position = filtered_df["Позиция в выдаче"].mean() if "Позиция в выдаче" in filtered_df.columns else 0
+                            avg_cpm = filtered_df["Стоимость за 1000 показов"].mean() if "Стоимость за 1000 показов" in filtered_df.columns else 0
+
+                            analytics_data.append({
+                                "Метрика": selected_param,
+                                combo_key: {
+                                    "Общая выручка": total_revenue,
+                                    "Количество артикулов": len(filtered_df),
+                                    "Выручка на 1 артикул": revenue_per_product,
+                                    "Средняя цена без СПП": avg_price,
+                                    "Упущенная выручка": lost_revenue,
+                                    "Упущенная выручка на 1 артикул": lost_revenue_per_product,
+                                    "Позиция в выдаче (средняя)": avg_position,
+                                    "Стоимость за 1000 показов на 1 артикул": avg_cpm,
+                                }
+                            })
+                else:
+                    # Обычный анализ по одному параметру
+                    # Получаем уникальные значения параметра
+                    param_values_set = set()
+                    if selected_param in param_values:
+                        for sku, value in param_values[selected_param].items():
+                            if value:
+                                # Если есть фильтр по значению(ям) иерархии, проверяем его
+                                if combined_hierarchy_value and combined_hierarchy_param:
+                                    # Проверяем, что товар соответствует выбранному значению(ям) иерархии
+                                    if combined_hierarchy_param in param_values and sku in param_values[combined_hierarchy_param]:
+                                        hierarchy_val = param_values[combined_hierarchy_param][sku]
+                                        if isinstance(combined_hierarchy_value, list):
+                                            # Если выбрано несколько значений, проверяем вхождение в список
+                                            if not hierarchy_val or str(hierarchy_val).strip() not in [str(v).strip() for v in combined_hierarchy_value]:
+                                                continue
+                                        else:
+                                            # Если выбрано одно значение, проверяем точное совпадение
+                                            if not hierarchy_val or str(hierarchy_val).strip() != str(combined_hierarchy_value).strip():
+                                                continue
+                                    else:
+                                        continue
+                                param_values_set.add(value)
+
+                    # Для каждого значения параметра собираем метрики
+                    for param_value in sorted(param_values_set):
+                        # Находим артикулы с этим значением параметра
+                        matching_skus = []
+                        if selected_param in param_values:
+                            for sku, value in param_values[selected_param].items():
+                                if value == param_value:
+                                    # Если есть фильтр по значению(ям) иерархии, проверяем его
+                                    if combined_hierarchy_value and combined_hierarchy_param:
+                                        if combined_hierarchy_param in param_values and sku in param_values[combined_hierarchy_param]:
+                                            hierarchy_val = param_values[combined_hierarchy_param][sku]
+                                            if isinstance(combined_hierarchy_value, list):
+                                                # Если выбрано несколько значений, проверяем вхождение в список
+                                                if not hierarchy_val or str(hierarchy_val).strip() not in [str(v).strip() for v in combined_hierarchy_value]:
+                                                    continue
+                                            else:
+                                                # Если выбрано одно значение, проверяем точное совпадение
+                                                if not hierarchy_val or str(hierarchy_val).strip() != str(combined_hierarchy_value).strip():
+                                                    continue
+                                        else:
+                                            continue
+                                matching_skus.append(sku)
+
+                    if matching_skus:
+                        # Фильтруем исходные данные по этим артикулам
+                        mask = df["Артикул"].astype(str).str.replace(".0", "").isin(matching_skus)
+                        filtered_df = df[mask]
+
+                        if not filtered_df.empty:
+                            # Вычисляем метрики
+                            total_revenue = filtered_df["Выручка"].sum() if "Выручка" in filtered_df.columns else 0
+                            total_orders = filtered_df["Заказы"].sum() if "Заказы" in filtered_df.columns else 0
+                            avg_price = filtered_df["Средняя цена"].mean() if "Средняя цена" in filtered_df.columns else 0
+                            lost_revenue = filtered_df["Упущенная выручка"].sum() if "Упущенная выручка" in filtered_df.columns else 0
+                            revenue_per_product = total_revenue / len(filtered_df) if len(filtered_df) > 0 else 0
+                            lost_revenue_per_product = lost_revenue / len(filtered_df) if len(filtered_df) > 0 else 0
+                            avg_position = filtered_df["Позиция в выдаче"].mean() if "Позиция в выдаче" in filtered_df.columns else 0
+                            avg_cpm = filtered_df["Стоимость за 1000 показов"].mean() if "Стоимость за 1000 показов" in filtered_df.columns else 0
+
+                            analytics_data.append({
+                                "Метрика": selected_param,
+                                param_value: {
+                                    "Общая выручка": total_revenue,
+                                    "Количество артикулов": len(filtered_df),
+                                    "Выручка на 1 артикул": revenue_per_product,
+                                    "Средняя цена без СПП": avg_price,
+                                    "Упущенная выручка": lost_revenue,
+                                    "Упущенная выручка на 1 артикул": lost_revenue_per_product,
+                                    "Позиция в выдаче (средняя)": avg_position,
+                                    "Стоимость за 1000 показов на 1 артикул": avg_cpm,
+                                }
+                            })
+
+                if analytics_data:
+                    # Создаем сводную таблицу
+                    summary_data = {}
+                    for item in analytics_data:
+                        for param_val, metrics in item.items():
+                            if param_val != "Метрика":
+                                summary_data[param_val] = metrics
+
+                    # Создаем сводную таблицу в стиле как на картинке
+                    if summary_data:
+                        # Получаем все значения параметра (цвета) и сортируем их
+                        param_values_list = sorted(summary_data.keys())
+
+                        # Создаем DataFrame с метриками по строкам и значениями параметра по столбцам
+                        metric_names = [
+                            "Общая выручка",
+                            "Количество артикулов", 
+                            "Выручка на 1 артикул",
+                            "Средняя цена без СПП",
+                            "Упущенная выручка",
+                            "Упущенная выручка на 1 артикул",
+                            "Позиция в выдаче (средняя)",
+                            "Стоимость за 1000 показов на 1 артикул"
+                        ]
+
+                        table_data = {"Метрика": metric_names}
+
+                        # Сохраняем числовые данные для цветового кодирования
+                        numeric_data = {}
+
+                        # Добавляем данные для каждого значения параметра
+                        for param_value in param_values_list:
+                            metrics = summary_data[param_value]
+                            # Сохраняем числовые значения
+                            numeric_data[param_value] = [
+                                metrics['Общая выручка'],
+                                metrics['Количество артикулов'],
+                                metrics['Выручка на 1 артикул'],
+                                metrics['Средняя цена без СПП'],
+                                metrics['Упущенная выручка'],
+                                metrics['Упущенная выручка на 1 артикул'],
+                                metrics['Позиция в выдаче (средняя)'],  # Для позиции меньше = лучше, обработаем отдельно
+                                metrics['Стоимость за 1000 показов на 1 артикул']
+                            ]
+
+                            # Форматированные значения для отображения
+                            table_data[param_value] = [
+                                f"₽{metrics['Общая выручка']:,.0f}".replace(",", " "),
+                                f"{metrics['Количество артикулов']:,.0f}".replace(",", " "),
+                                f"₽{metrics['Выручка на 1 артикул']:,.0f}".replace(",", " "),
+                                f"₽{metrics['Средняя цена без СПП']:,.0f}".replace(",", " "),
+                                f"₽{metrics['Упущенная выручка']:,.0f}".replace(",", " "),
+                                f"₽{metrics['Упущенная выручка на 1 артикул']:,.0f}".replace(",", " "),
+                                f"{metrics['Позиция в выдаче (средняя)']:,.0f}".replace(",", " "),
+                                f"{metrics['Стоимость за 1000 показов на 1 артикул']:,.0f}".replace(",", " ")
+                            ]
+
+                        # Создаем DataFrame
+                        display_df = pd.DataFrame(table_data)
+
+                        # Функция для выделения лучших результатов
+                        def highlight_best_values(values, reverse=False):
+                            """Выделяет зеленым только лучшие результаты"""
+                            if not values or all(pd.isna(v) or v == 0 for v in values):
+                                return ['background-color: white'] * len(values)
+
+                            # Очищаем от NaN и нулевых значений для поиска лучшего
+                            clean_values = [v for v in values if not pd.isna(v) and v != 0]
+                            if not clean_values:
+                                return ['background-color: white'] * len(values)
+
+                            # Находим лучшее значение
+                            if reverse:  # Для позиции: меньше = лучше
+                                best_val = min(clean_values)
+                            else:  # Для остальных метрик: больше = лучше
+                                best_val = max(clean_values)
+
+                            colors = []
+                            for val in values:
+                                if pd.isna(val) or val == 0:
+                                    colors.append('background-color: white')
+                                elif val == best_val:
+                                    colors.append('background-color: lightgreen')  # Зеленый для лучших
+                                else:
+                                    colors.append('background-color: white')  # Белый для остальных
+
+                            return colors
+
+                        # Применяем цветовое кодирование
+                        def apply_colors(df):
+                            # Создаем стили для каждой строки
+                            styles = pd.DataFrame('', index=df.index, columns=df.columns)
+
+                            for i, metric in enumerate(metric_names):
+                                row_values = []
+                                for param_value in param_values_list:
+                                    row_values.append(numeric_data[param_value][i])
+
+                                # Для позиции используем обратную логику (меньше = лучше)
+                                reverse_logic = (metric == "Позиция в выдаче (средняя)")
+                                colors = highlight_best_values(row_values, reverse=reverse_logic)
+
+                                # Применяем цвета к соответствующим ячейкам
+                                for j, param_value in enumerate(param_values_list):
+                                    styles.iloc[i, j + 1] = colors[j]  # +1 потому что первый столбец - "Метрика"
+
+                            return styles
+
+                        # Добавляем рейтинг
+                        if "param_ratings" not in st.session_state:
+                            st.session_state["param_ratings"] = {}
+
+                        param_rating_key = f"{selected_param}_ratings"
+                        if param_rating_key not in st.session_state["param_ratings"]:
+                            # Автоматически формируем рейтинг по приоритетам:
+                            # 1. Выручка на 1 артикул (больше = лучше)
+                            # 2. Средняя цена без СПП (больше = лучше) 
+                            # 3. Упущенная выручка на 1 артикул (меньше = лучше)
+
+                            def calculate_score(item):
+                                param_val, metrics = item
+                                # Нормализуем значения от 0 до 1
+                                revenue_per_sku = metrics["Выручка на 1 артикул"]
+                                avg_price = metrics["Средняя цена без СПП"]
+                                lost_revenue_per_sku = metrics["Упущенная выручка на 1 артикул"]
+
+                                # Находим мин/макс для нормализации
+                                all_revenues = [m["Выручка на 1 артикул"] for m in summary_data.values()]
+                                all_prices = [m["Средняя цена без СПП"] for m in summary_data.values()]
+                                all_lost = [m["Упущенная выручка на 1 артикул"] for m in summary_data.values()]
+
+                                # Нормализуем выручку (0-1, где 1 = максимум)
+                                if max(all_revenues) > min(all_revenues):
+                                    norm_revenue = (revenue_per_sku - min(all_revenues)) / (max(all_revenues) - min(all_revenues))
+                                else:
+                                    norm_revenue = 0.5
+
+                                # Нормализуем цену (0-1, где 1 = максимум)
+                                if max(all_prices) > min(all_prices):
+                                    norm_price = (avg_price - min(all_prices)) / (max(all_prices) - min(all_prices))
+                                else:
+                                    norm_price = 0.5
+
+                                # Нормализуем упущенную выручку (0-1, где 1 = минимум, т.е. лучше)
+                                if max(all_lost) > min(all_lost):
+                                    norm_lost = 1 - (lost_revenue_per_sku - min(all_lost)) / (max(all_lost) - min(all_lost))
+                                else:
+                                    norm_lost = 0.5
+
+                                # Взвешенная сумма с приоритетами
+                                score = (norm_revenue * 0.9) + (norm_price * 0.09) + (norm_lost * 0.01)
+                                return score
+
+                            # Сортируем по рассчитанному рейтингу
+                            sorted_by_score = sorted(
+                                summary_data.items(), 
+                                key=calculate_score,
+                                reverse=True
+                            )
+                            ratings = {param_val: i+1 for i, (param_val, _) in enumerate(sorted_by_score)}
+                            st.session_state["param_ratings"][param_rating_key] = ratings
+
+                        ratings = st.session_state["param_ratings"][param_rating_key]
+
+                        # Отображаем таблицу
+                        st.write(f"**Сводная таблица по параметру: {selected_param}**")
+                        st.info("💡 Цветовое выделение: 🟢 лучший результат в каждой строке. Для позиции в выдаче лучший = меньшее число. Рейтинг формируется по приоритетам: Выручка на 1 артикул (90%) → Средняя цена (9%) → Упущенная выручка на 1 артикул (1%)")
+
+                        # Создаем конфигурацию столбцов
+                        column_config = {
+                            "Метрика": st.column_config.TextColumn("Метрика", width=250)
+                        }
+
+                        # Настраиваем столбцы для значений параметров
+                        for param_value in param_values_list:
+                            column_config[param_value] = st.column_config.TextColumn(
+                                param_value, 
+                                width=150
+                            )
+
+                        # Применяем стили и отображаем таблицу
+                        styled_df = display_df.style.apply(lambda x: apply_colors(display_df), axis=None)
+
+                        # Отображаем стилизованную таблицу
+                        st.dataframe(
+                            styled_df,
+                            column_config=column_config,
+                            use_container_width=True,
+                            hide_index=True
+                        )
+
+                        # Добавляем строку с рейтингом отдельно (без цветового кодирования)
+                        st.write("**Рейтинг:**")
+                        rating_display_data = {"Метрика": ["Рейтинг"]}
+                        for param_value in param_values_list:
+                            rating_display_data[param_value] = [str(ratings.get(param_value, len(param_values_list)+1))]
+
+                        rating_display_df = pd.DataFrame(rating_display_data)
+                        st.dataframe(
+                            rating_display_df,
+                            column_config=column_config,
+                            use_container_width=True,
+                            hide_index=True
+                        )
+
+                        st.divider()
+
+                        # Редактируемая таблица только для рейтинга
+                        st.write("**Редактирование рейтинга:**")
+
+                        # Создаем DataFrame только для рейтинга
+                        rating_edit_data = {}
+                        for param_value in param_values_list:
+                            rating_edit_data[param_value] = [ratings.get(param_value, len(param_values_list)+1)]
+
+                        rating_edit_df = pd.DataFrame(rating_edit_data, index=["Рейтинг"])
+
+                        # Конфигурация для редактирования рейтинга
+                        rating_column_config = {}
+                        for param_value in param_values_list:
+                            rating_column_config[param_value] = st.column_config.NumberColumn(
+                                param_value,
+                                min_value=1,
+                                max_value=len(param_values_list),
+                                step=1,
+                                width=150
+                            )
+
+                        # Редактируемая таблица рейтинга
+                        edited_rating_df = st.data_editor(
+                            rating_edit_df,
+                            column_config=rating_column_config,
+                            hide_index=False,
+                            key=f"rating_table_{selected_param}"
+                        )
+
+                        # Сохраняем изменения рейтинга
+                        if not edited_rating_df.equals(rating_edit_df):
+                            new_ratings = {}
+                            for param_value in param_values_list:
+                                new_ratings[param_value] = int(edited_rating_df.loc["Рейтинг", param_value])
+                            st.session_state["param_ratings"][param_rating_key] = new_ratings
+
+                            # Автоматически сохраняем рейтинги
+                            try:
+                                # Получаем удаленные параметры для фильтрации
+                                deleted_params = st.session_state.get("deleted_params", load_deleted_params_from_file())
+                                param_values = st.session_state.get("param_values", {})
+                                param_options = st.session_state.get("param_options", {})
+
+                                # Фильтруем удаленные параметры перед сохранением
+                                filtered_param_values = {
+                                    k: v for k, v in param_values.items() 
+                                    if k not in deleted_params
+                                } if deleted_params else param_values
+
+                                filtered_param_options = {
+                                    k: v for k, v in param_options.items() 
+                                    if k not in deleted_params
+                                } if deleted_params else param_options
+
+                                table_cache_data = {
+                                    "param_values": filtered_param_values,
+                                    "param_options": filtered_param_options,
+                                    "param_ratings": st.session_state.get("param_ratings", {}),
+                                    "timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
+                                }
+
+                                import json
+                                with open("table_cache.json", "w", encoding="utf-8") as f:
+                                    json.dump(table_cache_data, f, ensure_ascii=False, indent=2)
+
+                                st.success("💾 Рейтинг автоматически сохранен")
+                            except Exception as e:
+                                st.error(f"❌ Ошибка сохранения рейтинга: {e}")
+
+                        # Кнопки управления
+                        col_reset, col_export_analytics = st.columns(2)
+
+                        with col_reset:
+                            if st.button("🔄 Сбросить рейтинг", type="secondary"):
+                                # Пересчитываем рейтинг по приоритетам
+                                def calculate_score(item):
+                                    param_val, metrics = item
+                                    # Нормализуем значения от 0 до 1
+                                    revenue_per_sku = metrics["Выручка на 1 артикул"]
+                                    avg_price = metrics["Средняя цена без СПП"]
+                                    lost_revenue_per_sku = metrics["Упущенная выручка на 1 артикул"]
+
+                                    # Находим мин/макс для нормализации
+                                    all_revenues = [m["Выручка на 1 артикул"] for m in summary_data.values()]
+                                    all_prices = [m["Средняя цена без СПП"] for m in summary_data.values()]
+                                    all_lost = [m["Упущенная выручка на 1 артикул"] for m in summary_data.values()]
+
+                                    # Нормализуем выручку (0-1, где 1 = максимум)
+                                    if max(all_revenues) > min(all_revenues):
+                                        norm_revenue = (revenue_per_sku - min(all_revenues)) / (max(all_revenues) - min(all_revenues))
+                                    else:
+                                        norm_revenue = 0.5
+
+                                    # Нормализуем цену (0-1, где 1 = максимум)
+                                    if max(all_prices) > min(all_prices):
+                                        norm_price = (avg_price - min(all_prices)) / (max(all_prices) - min(all_prices))
+                                    else:
+                                        norm_price = 0.5
+
+                                    # Нормализуем упущенную выручку (0-1, где 1 = минимум, т.е. лучше)
+                                    if max(all_lost) > min(all_lost):
+                                        norm_lost = 1 - (lost_revenue_per_sku - min(all_lost)) / (max(all_lost) - min(all_lost))
+                                    else:
+                                        norm_lost = 0.5
+
+                                    # Взвешенная сумма с приоритетами
+                                    score = (norm_revenue * 0.9) + (norm_price * 0.09) + (norm_lost * 0.01)
+                                    return score
+
+                                # Сортируем по рассчитанному рейтингу
+                                sorted_by_score = sorted(
+                                    summary_data.items(), 
+                                    key=calculate_score,
+                                    reverse=True
+                                )
+                                ratings = {param_val: i+1 for i, (param_val, _) in enumerate(sorted_by_score)}
+                                st.session_state["param_ratings"][param_rating_key] = ratings
+                                st.rerun()
+
+                        with col_export_analytics:
+                            if st.button("📊 Экспорт аналитики"):
+                                # Создаем полную таблицу для экспорта (с рейтингом)
+                                export_data = display_df.copy()
+                                rating_row = ["Рейтинг"] + [str(ratings.get(param_val, len(param_values_list)+1)) for param_val in param_values_list]
+                                rating_export_df = pd.DataFrame([rating_row], columns=export_data.columns)
+                                full_export_df = pd.concat([export_data, rating_export_df], ignore_index=True)
+
+                                csv_data = full_export_df.to_csv(encoding='utf-8-sig', index=False)
+                                # Получаем имя загруженного файла для названия экспорта
+                                base_filename = f"analytics_{selected_param}"
+                                if hasattr(uploaded, 'name') and uploaded.name:
+                                    # Убираем расширение и добавляем суффикс
+                                    name_without_ext = os.path.splitext(uploaded.name)[0]
+                                    base_filename = f"{name_without_ext}_analytics_{selected_param}"
+
+                                st.download_button(
+                                    label="💾 Скачать CSV",
+                                    data=csv_data,
+                                    file_name=f"{base_filename}.csv",
+                                    mime="text/csv"
+                                )
+
+                        # Дополнительная статистика
+                        st.divider()
+                        st.write("**Дополнительная статистика:**")
+
+                        col_stat1, col_stat2, col_stat3, col_stat4 = st.columns(4)
+
+                        total_products = sum(item["Количество артикулов"] for item in summary_data.values())
+                        total_revenue = sum(item["Общая выручка"] for item in summary_data.values())
+                        total_lost_revenue = sum(item["Упущенная выручка"] for item in summary_data.values())
+                        avg_position_all = sum(item["Позиция в выдаче (средняя)"] * item["Количество артикулов"] for item in summary_data.values()) / total_products if total_products > 0 else 0
+
+                        col_stat1.metric("Всего товаров", f"{total_products} шт.")
+                        col_stat2.metric("Общая выручка", f"₽{total_revenue:,.0f}".replace(",", " "))
+                        col_stat3.metric("Упущенная выручка", f"₽{total_lost_revenue:,.0f}".replace(",", " "))
+                        col_stat4.metric("Средняя позиция", f"{avg_position_all:.1f}")
+
+                else:
+                    st.info("Нет данных для анализа по выбранному параметру")
+
+        # Добавляем анализ комбинаций иерархических параметров
+        st.divider()
+        st.subheader("📊 Анализ комбинаций иерархических параметров")
+
+        # Определяем иерархию сегментов
+        # Иерархия параметров: Подтип - это логическая группировка для Рукав и Ворот
+        hierarchy_params = get_hierarchy_params()
+        subtype_params = get_subtype_params()  # Параметры, которые находятся внутри "Подтип"
+        visual_params = get_visual_params()
+
+        # Получаем список полностью исключенных параметров
+        excluded_params = set(st.session_state.get("excluded_params", []))
+
+        # Фильтруем available_params, исключая полностью исключенные параметры
+        active_available_params = [p for p in available_params if p not in excluded_params]
+
+        # Разделяем параметры на категории (учитывая исключенные параметры)
+        hierarchical_params_list = [p for p in hierarchy_params if p in active_available_params]
+        visual_params_list = [p for p in active_available_params if p in visual_params or any(vp in p for vp in visual_params)]
+        other_params_list = [p for p in active_available_params if p not in hierarchy_params and p not in visual_params_list]
+
+        # Показываем информацию об иерархии
+        if hierarchical_params_list:
+            # Формируем отображение иерархии с учетом "Подтип" как группировки
+            hierarchy_display = []
+            subtype_params_in_list = [p for p in subtype_params if p in hierarchical_params_list]
+
+            for param in hierarchy_params:
+                if param in hierarchical_params_list:
+                    if param in subtype_params:
+                        # Если это первый параметр из подтипа, добавляем "Подтип" перед ним
+                        if param == subtype_params[0] and subtype_params_in_list:
+                            subtype_str = " → ".join(subtype_params_in_list)
+                            hierarchy_display.append(f"Подтип ({subtype_str})")
+                    else:
+                        hierarchy_display.append(param)
+
+            # Убираем дубликаты и формируем строку
+            hierarchy_str = " → ".join(hierarchy_display)
+            if not hierarchy_str:
+                hierarchy_str = " → ".join(hierarchical_params_list)
+            st.info(f"📊 **Иерархия сегментов**: {hierarchy_str} → Визуальные параметры")
+
+            # Инициализация excluded_param_values если нет
+            if "excluded_param_values" not in st.session_state:
+                st.session_state["excluded_param_values"] = {}
+
+            # UI для исключения значений параметров
+            with st.expander("🚫 Исключить значения параметров из анализа", expanded=False):
+                st.markdown("#### 🚫 Исключение значений параметров")
+                st.info("💡 Выберите конкретные значения параметров, которые нужно исключить из анализа комбинаций иерархических параметров. Товары с этими значениями не будут учитываться в комбинациях.")
+
+                # Получаем все уникальные значения для каждого иерархического параметра
+                param_values_dict = {}
+                for param_name in hierarchical_params_list:
+                    if param_name in param_values:
+                        unique_values = set()
+                        for sku_str, value in param_values[param_name].items():
+                            if value and str(value).strip():
+                                unique_values.add(str(value).strip())
+                        if unique_values:
+                            param_values_dict[param_name] = sorted(list(unique_values))
+
+                excluded_selected = {}
+                if param_values_dict:
+                    for param_name, available_values in param_values_dict.items():
+                        current_excluded = st.session_state["excluded_param_values"].get(param_name, [])
+
+                        excluded_values = st.multiselect(
+                            f"Исключить значения параметра '{param_name}':",
+                            options=available_values,
+                            default=current_excluded,
+                            help=f"Выберите значения параметра '{param_name}', которые нужно исключить из анализа комбинаций иерархических параметров",
+                            key=f"hierarchy_excluded_values_{param_name}"
+                        )
+
+                        excluded_selected[param_name] = excluded_values
+
+                    # Обновляем excluded_param_values из session_state (значения из multiselect сохраняются автоматически)
+                    current_excluded_param_values = st.session_state.get("excluded_param_values", {}).copy()
+                    for param_name in hierarchical_params_list:
+                        key = f"hierarchy_excluded_values_{param_name}"
+                        if key in st.session_state:
+                            current_excluded_param_values[param_name] = st.session_state[key]
+                            excluded_selected[param_name] = st.session_state[key]
+
+                    st.session_state["excluded_param_values"] = current_excluded_param_values
+
+                    # Автоматически сохраняем настройки при изменении
+                    save_excluded_params_settings()
+
+                    # Кнопка для сброса исключений
+                    if st.button("🔄 Сбросить исключения для иерархических параметров", type="secondary", use_container_width=True, key="reset_hierarchy_excluded_values"):
+                        # Сбрасываем только для иерархических параметров
+                        current_excluded_param_values = st.session_state.get("excluded_param_values", {}).copy()
+                        for param_name in hierarchical_params_list:
+                            if param_name in current_excluded_param_values:
+                                del current_excluded_param_values[param_name]
+                            # Также сбрасываем в multiselect
+                            key = f"hierarchy_excluded_values_{param_name}"
+                            if key in st.session_state:
+                                st.session_state[key] = []
+                        st.session_state["excluded_param_values"] = current_excluded_param_values
+                        save_excluded_params_settings()
+                        st.rerun()
+
+                    # Показываем статистику исключений
+                    total_excluded_values = sum(len(values) for param_name, values in excluded_selected.items() if param_name in hierarchical_params_list)
+                    if total_excluded_values > 0:
+                        st.success(f"✅ Исключено значений: {total_excluded_values}. Настройки применяются автоматически.")
+                    else:
+                        st.info("ℹ️ Выберите значения параметров для исключения из анализа")
+                else:
+                    st.warning("⚠️ Нет доступных значений параметров для исключения")
+
+            # Анализ комбинаций иерархических параметров
+            if len(hierarchical_params_list) > 1:
+                st.write("**Анализ комбинаций иерархических параметров:**")
+
+                # Собираем все комбинации иерархических параметров
+                hierarchy_combinations = {}
+
+                # Получаем список полностью исключенных параметров
+                excluded_params = set(st.session_state.get("excluded_params", []))
+
+                # Получаем исключенные значения параметров
+                excluded_param_values = st.session_state.get("excluded_param_values", {})
+
+                # Фильтруем иерархические параметры, исключая полностью исключенные
+                active_hierarchical_params = [p for p in hierarchical_params_list if p not in excluded_params]
+
+                # Получаем все артикулы с заполненными иерархическими параметрами
+                for sku in df["Артикул"].astype(str).str.replace(".0", "").unique():
+                    sku_str = str(sku)
+                    combination_key_parts = []
+                    combination_valid = True
+
+                    # Используем только активные (не исключенные) параметры
+                    for param_name in active_hierarchical_params:
+                        if param_name in param_values and sku_str in param_values[param_name]:
+                            value = param_values[param_name][sku_str]
+                            if value and str(value).strip():
+                                value_str = str(value).strip()
+
+                                # Проверяем, не исключено ли это значение параметра
+                                excluded_values_for_param = excluded_param_values.get(param_name, [])
+                                if value_str in excluded_values_for_param:
+                                    combination_valid = False
+                                    break
+
+                                combination_key_parts.append(f"{param_name}:{value_str}")
+                            else:
+                                combination_valid = False
+                                break
+                        else:
+                            combination_valid = False
+                            break
+
+                    if combination_valid and combination_key_parts:
+                        combination_key = " | ".join(combination_key_parts)
+                        if combination_key not in hierarchy_combinations:
+                            hierarchy_combinations[combination_key] = []
+                        hierarchy_combinations[combination_key].append(sku_str)
+
+                if hierarchy_combinations:
+                    # Рассчитываем метрики для каждой комбинации
+                    combination_analytics = []
+                    for combination_key, skus in hierarchy_combinations.items():
+                        mask = df["Артикул"].astype(str).str.replace(".0", "").isin(skus)
+                        filtered_df = df[mask]
+
+                        if not filtered_df.empty:
+                            total_revenue = filtered_df["Выручка"].sum() if "Выручка" in filtered_df.columns else 0
+                            total_orders = filtered_df["Заказы"].sum() if "Заказы" in filtered_df.columns else 0
+                            revenue_per_product = total_revenue / len(filtered_df) if len(filtered_df) > 0 else 0
+                            avg_price = filtered_df["Средняя цена"].mean() if "Средняя цена" in filtered_df.columns else 0
+
+                            combination_analytics.append({
+                                "Комбинация": combination_key,
+                                "Количество товаров": len(filtered_df),
+                                "Общая выручка": total_revenue,
+                                "Выручка на 1 артикул": revenue_per_product,
+                                "Средняя цена": avg_price
+                            })
+
+                    if combination_analytics:
+                        # Сортируем по выручке на 1 артикул
+                        combination_analytics.sort(key=lambda x: x["Выручка на 1 артикул"], reverse=True)
+
+                        # Показываем топ-5 комбинаций
+                        st.write("**Топ-5 комбинаций иерархических параметров:**")
+                        top_combinations_df = pd.DataFrame(combination_analytics[:5])
+                        st.dataframe(top_combinations_df, use_container_width=True)
+
+                        # Сохраняем лучшую комбинацию
+                        best_hierarchy_combination = combination_analytics[0]["Комбинация"]
+
+                        # Находим артикулы, соответствующие лучшей комбинации иерархии
+                        best_combination_skus = hierarchy_combinations[best_hierarchy_combination]
+
+                        # Получаем рейтинги параметров из session_state
+                        param_ratings = {}
+                        # available_params уже определен выше в коде (строка 4600)
+                        for param in available_params:
+                            rating_key = f"{param}_ratings"
+                            if rating_key in st.session_state.get("param_ratings", {}):
+                                param_ratings[param] = st.session_state["param_ratings"][rating_key]
+
+                        # Находим лучшие визуальные и другие параметры для этой иерархии
+                        best_visual_params = {}
+                        best_other_params = {}
+
+                        # Используем уже определенные списки параметров (определены выше в коде)
+                        # visual_params_list и other_params_list уже определены в строках 5476-5477
+
+                        # Для визуальных параметров находим значения с рейтингом 1
+                        for param_name in visual_params_list:
+                            if param_name in param_ratings:
+                                ratings = param_ratings[param_name]
+                                for value, rating in ratings.items():
+                                    if rating == 1:
+                                        best_visual_params[param_name] = value
+                                        break
+
+                        # Для других параметров находим значения с рейтингом 1
+                        for param_name in other_params_list:
+                            if param_name in param_ratings:
+                                ratings = param_ratings[param_name]
+                                for value, rating in ratings.items():
+                                    if rating == 1:
+                                        best_other_params[param_name] = value
+                                        break
+
+                        # Формируем полную строку комбинации
+                        full_combination_parts = [best_hierarchy_combination]
+
+                        # Добавляем визуальные параметры
+                        if best_visual_params:
+                            visual_parts = [f"{k}:{v}" for k, v in best_visual_params.items()]
+                            full_combination_parts.extend(visual_parts)
+
+                        # Добавляем другие параметры
+                        if best_other_params:
+                            other_parts = [f"{k}:{v}" for k, v in best_other_params.items()]
+                            full_combination_parts.extend(other_parts)
+
+                        # Формируем полную комбинацию
+                        full_combination = " | ".join(full_combination_parts)
+
+                        st.success(f"🏆 **Лучшая комбинация иерархии**: {full_combination}")
+                else:
+                    st.info("ℹ️ Не найдено товаров с заполненными всеми иерархическими параметрами")
+            else:
+                st.info("ℹ️ Для анализа комбинаций нужно минимум 2 иерархических параметра")
+
+        # Добавляем анализ лучших полных комбинаций всех параметров
+        st.divider()
+        st.subheader("🏆 Топ-10 лучших комбинаций параметров")
+        st.info("💡 Система анализирует все возможные комбинации параметров и находит лучшие по метрикам: Выручка на 1 артикул (90%) → Средняя цена (9%) → Упущенная выручка на 1 артикул (1%)")
+
+        # Получаем период отчета для фильтрации новинок
+        report_end_date = None
+        if "Дата создания" in df.columns and not df["Дата создания"].isna().all():
+            # Используем максимальную дату из "Дата создания" как дату отчета
+            report_end_date = df["Дата создания"].dropna().max()
+        else:
+            # Пытаемся получить период из анализа
+            df_raw = st.session_state.get("df_raw")
+            header_row = st.session_state.get("header_row")
+            if df_raw is not None and header_row is not None:
+                period_info = get_analysis_period(df, df_raw, header_row, error_callback=st.error)
+                if period_info and "end_date" in period_info:
+                    report_end_date = period_info["end_date"]
+            # Если не нашли, используем текущую дату
+            if report_end_date is None:
+                report_end_date = pd.Timestamp.now()
+
+        # Добавляем выбор периода для создания комбинаций новинок
+        novelty_filter_options = {
+            "Все товары": None,
+            "Создать комбинации для новинок (6 месяцев)": 6,
+            "Создать комбинации для новинок (3 месяца)": 3
+        }
+
+        selected_novelty_filter = st.selectbox(
+            "🔍 Комбинации для новинок:",
+            options=list(novelty_filter_options.keys()),
+            index=0,
+            help="Выберите период для создания отдельных комбинаций новинок. Товары, появившиеся в выбранный период, будут иметь дополнительный параметр 'Период появления' в комбинациях."
+        )
+
+        novelty_months = novelty_filter_options[selected_novelty_filter]
+
+        # Определяем, какие товары являются новинками
+        novelty_skus = set()
+        if novelty_months is not None:
+            if "Дата создания" not in df.columns:
+                st.warning("⚠️ Для создания комбинаций новинок требуется колонка 'Дата создания'. Параметр не будет добавлен.")
+                novelty_months = None
+            elif report_end_date is None:
+                st.warning("⚠️ Не удалось определить дату отчета. Параметр новинок не будет добавлен.")
+                novelty_months = None
+            else:
+                # Вычисляем дату начала периода для новинок
+                if isinstance(report_end_date, pd.Timestamp):
+                    start_date_for_novelties = report_end_date - pd.DateOffset(months=novelty_months)
+                else:
+                    start_date_for_novelties = pd.to_datetime(report_end_date) - pd.DateOffset(months=novelty_months)
+
+                # Находим товары-новинки: те, у которых "Дата создания" в пределах периода новинок
+                # Важно: проверяем, что дата создания не пустая
+                novelty_mask = (
+                    (df["Дата создания"] >= start_date_for_novelties) & 
+                    (df["Дата создания"] <= report_end_date) &
+                    (df["Дата создания"].notna())
+                )
+                novelty_skus = set(
+                    df.loc[novelty_mask, "Артикул"].astype(str).str.replace(".0", "").unique()
+                )
+
+                if novelty_skus:
+                    st.info(f"📦 Для новинок (товары с {start_date_for_novelties.strftime('%d.%m.%Y')} по {report_end_date.strftime('%d.%m.%Y')}, всего {len(novelty_skus)} товаров) будут созданы отдельные комбинации с параметром 'Период появления'")
+                else:
+                    st.warning(f"⚠️ Не найдено новинок за последние {novelty_months} месяцев")
+
+        # Собираем все полные комбинации параметров
+        param_values = st.session_state.get("param_values", {})
+        all_combinations = {}
+
+        # Получаем список полностью исключенных параметров
+        excluded_params = set(st.session_state.get("excluded_params", []))
+
+        # Фильтруем available_params, исключая полностью исключенные параметры
+        active_params = [p for p in available_params if p not in excluded_params]
+
+        # Проходим по всем артикулам и собираем их полные комбинации параметров
+        all_skus = df["Артикул"].astype(str).str.replace(".0", "").unique()
+
+        # Разделяем товары на новинки и не-новинки для создания отдельных комбинаций
+        for sku in all_skus:
+            sku_str = str(sku)
+            combination_parts = []
+
+            # Собираем все заполненные параметры для этого артикула (только активные, не исключенные)
+            # НЕ требуется, чтобы все параметры были заполнены - создаем комбинацию с частично заполненными
+            for param_name in active_params:
+                if param_name in param_values and sku_str in param_values[param_name]:
+                    value = param_values[param_name][sku_str]
+                    if value and str(value).strip():
+                        combination_parts.append(f"{param_name}:{value}")
+
+            # Создаем комбинацию, если есть хотя бы один заполненный параметр
+            if not combination_parts:
+                continue
+
+            # Если выбран период для новинок, создаем отдельные комбинации для новинок и не-новинок
+            if novelty_months is not None:
+                # Дополнительная проверка: проверяем дату создания напрямую для каждого товара
+                is_novelty = False
+                if sku_str in novelty_skus:
+                    # Дополнительно проверяем дату создания напрямую в данных
+                    if "Дата создания" in df.columns and report_end_date is not None:
+                        # Получаем все строки для этого артикула
+                        sku_mask = df["Артикул"].astype(str).str.replace(".0", "") == sku_str
+                        sku_rows = df[sku_mask]
+
+                        if not sku_rows.empty:
+                            # Проверяем, есть ли хотя бы одна строка с датой создания в периоде новинок
+                            if isinstance(report_end_date, pd.Timestamp):
+                                start_date_for_novelties = report_end_date - pd.DateOffset(months=novelty_months)
+                            else:
+                                start_date_for_novelties = pd.to_datetime(report_end_date) - pd.DateOffset(months=novelty_months)
+
+                            # Проверяем дату создания
+                            date_mask = (
+                                (sku_rows["Дата создания"] >= start_date_for_novelties) & 
+                                (sku_rows["Дата создания"] <= report_end_date) &
+                                (sku_rows["Дата создания"].notna())
+                            )
+                            is_novelty = date_mask.any()
+                    else:
+                        # Если нет даты создания, используем только проверку по novelty_skus
+                        is_novelty = True
+                else:
+                    is_novelty = False
+
+                if is_novelty:
+                    # Для новинок: добавляем параметр "Период появления" и создаем отдельную комбинацию
+                    novelty_combination_parts = combination_parts.copy()
+                    novelty_combination_parts.append(f"Период появления:Новинка ({novelty_months} месяцев)")
+                    combination_key = " | ".join(sorted(novelty_combination_parts))
+                    if combination_key not in all_combinations:
+                        all_combinations[combination_key] = []
+                    all_combinations[combination_key].append(sku_str)
+                else:
+                    # Для не-новинок: создаем обычную комбинацию без параметра "Период появления"
+                    combination_key = " | ".join(sorted(combination_parts))
+                    if combination_key not in all_combinations:
+                        all_combinations[combination_key] = []
+                    all_combinations[combination_key].append(sku_str)
+            else:
+                # Если фильтр новинок не выбран, создаем обычные комбинации для всех товаров
+                combination_key = " | ".join(sorted(combination_parts))
+                if combination_key not in all_combinations:
+                    all_combinations[combination_key] = []
+                all_combinations[combination_key].append(sku_str)
+
+        if all_combinations:
+            # Рассчитываем метрики для каждой комбинации
+            combination_analytics = []
+
+            for combination_key, skus in all_combinations.items():
+                # Проверяем, является ли это комбинацией новинок
+                is_novelty_combination = novelty_months is not None and "Период появления:Новинка" in combination_key
+
+                # Создаем маску для фильтрации товаров
+                mask = df["Артикул"].astype(str).str.replace(".0", "").isin(skus)
+
+                # Если это комбинация новинок, дополнительно фильтруем по дате создания
+                if is_novelty_combination and "Дата создания" in df.columns and report_end_date is not None:
+                    if isinstance(report_end_date, pd.Timestamp):
+                        start_date_for_novelties = report_end_date - pd.DateOffset(months=novelty_months)
+                    else:
+                        start_date_for_novelties = pd.to_datetime(report_end_date) - pd.DateOffset(months=novelty_months)
+
+                    # Дополнительная фильтрация: только товары с датой создания в периоде новинок
+                    novelty_date_mask = (
+                        (df["Дата создания"] >= start_date_for_novelties) & 
+                        (df["Дата создания"] <= report_end_date)
+                    )
+                    mask = mask & novelty_date_mask
+
+                filtered_df = df[mask]
+
+                if not filtered_df.empty:
+                    total_revenue = filtered_df["Выручка"].sum() if "Выручка" in filtered_df.columns else 0
+                    total_orders = filtered_df["Заказы"].sum() if "Заказы" in filtered_df.columns else 0
+                    avg_price = filtered_df["Средняя цена"].mean() if "Средняя цена" in filtered_df.columns else 0
+                    lost_revenue = filtered_df["Упущенная выручка"].sum() if "Упущенная выручка" in filtered_df.columns else 0
+                    revenue_per_product = total_revenue / len(filtered_df) if len(filtered_df) > 0 else 0
+                    lost_revenue_per_product = lost_revenue / len(filtered_df) if len(filtered_df) > 0 else 0
+                    avg_position = filtered_df["Позиция в выдаче"].mean() if "Позиция в выдаче" in filtered_df.columns else 0
+                    avg_cpm = filtered_df["Стоимость за 1000 показов"].mean() if "Стоимость за 1000 показов" in filtered_df.columns else 0
+                    cpm_per_product = avg_cpm / len(filtered_df) if len(filtered_df) > 0 else 0
+
+                    combination_analytics.append({
+                        "Комбинация": combination_key,
+                        "Общая выручка": total_revenue,
+                        "Количество артикулов": len(filtered_df),
+                        "Выручка на 1 артикул": revenue_per_product,
+                        "Средняя цена без СПП": avg_price,
+                        "Упущенная выручка": lost_revenue,
+                        "Упущенная выручка на 1 артикул": lost_revenue_per_product,
+                        "Позиция в выдаче (средняя)": avg_position,
+                        "Стоимость за 1000 показов на 1 артикул": cpm_per_product
+                    })
+
+            if combination_analytics:
+                # Рассчитываем рейтинг для каждой комбинации
+                # Нормализуем значения для расчета рейтинга
+                all_revenues = [c["Выручка на 1 артикул"] for c in combination_analytics]
+                all_prices = [c["Средняя цена без СПП"] for c in combination_analytics]
+                all_lost = [c["Упущенная выручка на 1 артикул"] for c in combination_analytics]
+
+                def calculate_combination_score(combo):
+                    revenue_per_sku = combo["Выручка на 1 артикул"]
+                    avg_price = combo["Средняя цена без СПП"]
+                    lost_revenue_per_sku = combo["Упущенная выручка на 1 артикул"]
+
+                    # Нормализуем выручку (0-1, где 1 = максимум)
+                    if max(all_revenues) > min(all_revenues):
+                        norm_revenue = (revenue_per_sku - min(all_revenues)) / (max(all_revenues) - min(all_revenues))
+                    else:
+                        norm_revenue = 0.5
+
+                    # Нормализуем цену (0-1, где 1 = максимум)
+                    if max(all_prices) > min(all_prices):
+                        norm_price = (avg_price - min(all_prices)) / (max(all_prices) - min(all_prices))
+                    else:
+                        norm_price = 0.5
+
+                    # Нормализуем упущенную выручку (0-1, где 1 = минимум, т.е. лучше)
+                    if max(all_lost) > min(all_lost):
+                        norm_lost = 1 - (lost_revenue_per_sku - min(all_lost)) / (max(all_lost) - min(all_lost))
+                    else:
+                        norm_lost = 0.5
+
+                    # Взвешенная сумма с приоритетами: Выручка на 1 артикул (90%) → Средняя цена (9%) → Упущенная выручка на 1 артикул (1%)
+                    score = (norm_revenue * 0.9) + (norm_price * 0.09) + (norm_lost * 0.01)
+                    return score
+
+                # Разделяем комбинации на новинки и не-новинки, если выбран период для новинок
+                if novelty_months is not None:
+                    novelty_combinations = []
+                    regular_combinations = []
+
+                    for combo in combination_analytics:
+                        if "Период появления:Новинка" in combo["Комбинация"]:
+                            novelty_combinations.append(combo)
+                        else:
+                            regular_combinations.append(combo)
+
+                    # Рассчитываем рейтинг отдельно для новинок
+                    if novelty_combinations:
+                        novelty_revenues = [c["Выручка на 1 артикул"] for c in novelty_combinations]
+                        novelty_prices = [c["Средняя цена без СПП"] for c in novelty_combinations]
+                        novelty_lost = [c["Упущенная выручка на 1 артикул"] for c in novelty_combinations]
+
+                        def calculate_novelty_score(combo):
+                            revenue_per_sku = combo["Выручка на 1 артикул"]
+                            avg_price = combo["Средняя цена без СПП"]
+                            lost_revenue_per_sku = combo["Упущенная выручка на 1 артикул"]
+
+                            if max(novelty_revenues) > min(novelty_revenues):
+                                norm_revenue = (revenue_per_sku - min(novelty_revenues)) / (max(novelty_revenues) - min(novelty_revenues))
+                            else:
+                                norm_revenue = 0.5
+
+                            if max(novelty_prices) > min(novelty_prices):
+                                norm_price = (avg_price - min(novelty_prices)) / (max(novelty_prices) - min(novelty_prices))
+                            else:
+                                norm_price = 0.5
+
+                            if max(novelty_lost) > min(novelty_lost):
+                                norm_lost = 1 - (lost_revenue_per_sku - min(novelty_lost)) / (max(novelty_lost) - min(novelty_lost))
+                            else:
+                                norm_lost = 0.5
+
+                            score = (norm_revenue * 0.9) + (norm_price * 0.09) + (norm_lost * 0.01)
+                            return score
+
+                        for combo in novelty_combinations:
+                            combo["Рейтинг"] = calculate_novelty_score(combo)
+                        novelty_combinations.sort(key=lambda x: x["Рейтинг"], reverse=True)
+
+                    # Рассчитываем рейтинг отдельно для не-новинок
+                    if regular_combinations:
+                        regular_revenues = [c["Выручка на 1 артикул"] for c in regular_combinations]
+                        regular_prices = [c["Средняя цена без СПП"] for c in regular_combinations]
+                        regular_lost = [c["Упущенная выручка на 1 артикул"] for c in regular_combinations]
+
+                        def calculate_regular_score(combo):
+                            revenue_per_sku = combo["Выручка на 1 артикул"]
+                            avg_price = combo["Средняя цена без СПП"]
+                            lost_revenue_per_sku = combo["Упущенная выручка на 1 артикул"]
+
+                            if max(regular_revenues) > min(regular_revenues):
+                                norm_revenue = (revenue_per_sku - min(regular_revenues)) / (max(regular_revenues) - min(regular_revenues))
+                            else:
+                                norm_revenue = 0.5
+
+                            if max(regular_prices) > min(regular_prices):
+                                norm_price = (avg_price - min(regular_prices)) / (max(regular_prices) - min(regular_prices))
+                            else:
+                                norm_price = 0.5
+
+                            if max(regular_lost) > min(regular_lost):
+                                norm_lost = 1 - (lost_revenue_per_sku - min(regular_lost)) / (max(regular_lost) - min(regular_lost))
+                            else:
+                                norm_lost = 0.5
+
+                            score = (norm_revenue * 0.9) + (norm_price * 0.09) + (norm_lost * 0.01)
+                            return score
+
+                        for combo in regular_combinations:
+                            combo["Рейтинг"] = calculate_regular_score(combo)
+                        regular_combinations.sort(key=lambda x: x["Рейтинг"], reverse=True)
+
+                    # Сохраняем разделенные комбинации
+                    combination_analytics_novelty = novelty_combinations
+                    combination_analytics_regular = regular_combinations
+                    # Для обратной совместимости оставляем combination_analytics как объединенный список
+                    combination_analytics = novelty_combinations + regular_combinations
+                else:
+                    # Если фильтр новинок не выбран, рассчитываем рейтинг для всех комбинаций вместе
+                    for combo in combination_analytics:
+                        combo["Рейтинг"] = calculate_combination_score(combo)
+
+                    # Сортируем по рейтингу (от большего к меньшему)
+                    combination_analytics.sort(key=lambda x: x["Рейтинг"], reverse=True)
+
+                    # Разделяем комбинации на новинки и не-новинки
+                    if novelty_months is not None:
+                        combination_analytics_novelty = [c for c in combination_analytics if "Период появления:Новинка" in c["Комбинация"]]
+                        combination_analytics_regular = [c for c in combination_analytics if "Период появления:Новинка" not in c["Комбинация"]]
+                    else:
+                        combination_analytics_novelty = []
+                        combination_analytics_regular = combination_analytics
+
+                # Загружаем настройки исключения параметров из файла (если еще не загружены)
+                if "excluded_params_loaded" not in st.session_state:
+                    load_excluded_params_settings()
+                    st.session_state["excluded_params_loaded"] = True
+
+                # Инициализируем список исключенных значений параметров
+                if "excluded_param_values" not in st.session_state:
+                    st.session_state["excluded_param_values"] = {}
+
+                # Инициализируем список полностью исключенных параметров
+                if "excluded_params" not in st.session_state:
+                    st.session_state["excluded_params"] = []
+
+                # Собираем все уникальные значения для каждого параметра
+                param_values_dict = {}
+                for combo in combination_analytics:
+                    combo_str = combo["Комбинация"]
+                    # Парсим комбинацию: "Параметр1:Значение1 | Параметр2:Значение2 | ..."
+                    parts = [p.strip() for p in combo_str.split("|")]
+                    for part in parts:
+                        if ":" in part:
+                            param_name, param_value = part.split(":", 1)
+                            param_name = param_name.strip()
+                            param_value = param_value.strip()
+                            if param_name not in param_values_dict:
+                                param_values_dict[param_name] = set()
+                            param_values_dict[param_name].add(param_value)
+
+                # Дополняем значениями из param_options, чтобы были доступны все варианты параметров
+                # (даже те, которые не присутствуют в текущих комбинациях)
+                param_options = st.session_state.get("param_options", {})
+                for param_name, options_list in param_options.items():
+                    if param_name not in param_values_dict:
+                        param_values_dict[param_name] = set()
+                    # Добавляем все значения из param_options
+                    for option_value in options_list:
+                        if option_value and str(option_value).strip():
+                            param_values_dict[param_name].add(str(option_value).strip())
+
+                # Показываем интерфейс для исключения значений параметров и самих параметров
+                with st.expander("🚫 Исключить значения параметров из анализа", expanded=False):
+                    st.info("💡 Выберите конкретные значения параметров для исключения. Все комбинации, содержащие эти значения, будут исключены из топ-10.")
+                    st.info("💡 Вы также можете полностью исключить параметр из анализа. Товары останутся, но параметр не будет участвовать в формировании комбинаций и рейтинге.")
+
+                    # Раздел 1: Скрытие параметров
+                    st.markdown("### 👁️ Скрыть параметры")
+                    current_excluded_params = st.session_state.get("excluded_params", [])
+
+                    # Фильтруем значения по умолчанию, чтобы они были только из доступных опций
+                    available_param_names = sorted(param_values_dict.keys())
+                    filtered_default = [p for p in current_excluded_params if p in available_param_names]
+
+                    excluded_params_selected = st.multiselect(
+                        "Скрыть параметры (не будут показываться в таблице и не будут учитываться в топ комбинациях):",
+                        options=available_param_names,
+                        default=filtered_default,
+                        help="Выберите параметры, которые нужно скрыть. Параметры не будут отображаться в таблице и не будут учитываться при формировании комбинаций. Товары останутся в таблице."
+                    )
+
+                    # Обновляем список исключенных параметров
+                    st.session_state["excluded_params"] = excluded_params_selected
+                    # Сохраняем настройки при изменении
+                    save_excluded_params_settings()
+
+                    # Раздел 2: Исключение конкретных значений параметров
+                    st.markdown("### 🚫 Исключить конкретные значения параметров")
+
+                    # Для каждого параметра создаем мультиселект (только для неисключенных параметров)
+                    excluded_selected = {}
+                    for param_name in sorted(param_values_dict.keys()):
+                        # Пропускаем полностью исключенные параметры
+                        if param_name in excluded_params_selected:
+                            continue
+
+                        available_values = sorted(list(param_values_dict[param_name]))
+                        current_excluded = st.session_state["excluded_param_values"].get(param_name, [])
+
+                        excluded_values = st.multiselect(
+                            f"Исключить значения параметра '{param_name}':",
+                            options=available_values,
+                            default=current_excluded,
+                            help=f"Выберите значения параметра '{param_name}', которые нужно исключить из анализа"
+                        )
+
+                        excluded_selected[param_name] = excluded_values
+
+                    # Обновляем список исключенных значений
+                    st.session_state["excluded_param_values"] = excluded_selected
+                    # Сохраняем настройки при изменении
+                    save_excluded_params_settings()
+
+                    # Кнопка для сброса всех исключений
+                    if st.button("🔄 Сбросить все исключения", type="secondary"):
+                        st.session_state["excluded_param_values"] = {}
+                        st.session_state["excluded_params"] = []
+                        # Сохраняем очищенные настройки
+                        save_excluded_params_settings()
+                        st.rerun()
+
+                    # Показываем статистику исключений
+                    total_excluded_params = len(excluded_params_selected)
+                    total_excluded_values = sum(len(values) for values in excluded_selected.values())
+
+                    if total_excluded_params > 0 or total_excluded_values > 0:
+                        st.markdown("---")
+                        st.markdown("**Статистика исключений:**")
+                        if total_excluded_params > 0:
+                            st.write(f"  ❌ Полностью исключено параметров: {total_excluded_params}")
+                            for param_name in excluded_params_selected:
+                                st.write(f"    • {param_name}")
+                        if total_excluded_values > 0:
+                            excluded_list = []
+                            for param_name, values in excluded_selected.items():
+                                if values:
+                                    excluded_list.append(f"{param_name}: {', '.join(values)}")
+                            st.write(f"  🚫 Исключено значений параметров: {total_excluded_values}")
+                            for item in excluded_list:
+                                st.write(f"    • {item}")
+
+                # Получаем список полностью исключенных параметров
+                excluded_params = set(st.session_state.get("excluded_params", []))
+
+                # Функция для удаления исключенных параметров из строки комбинации
+                def remove_excluded_params_from_combo(combo_str):
+                    """Удаляет исключенные параметры из строки комбинации"""
+                    if not combo_str:
+                        return combo_str
+                    parts = [p.strip() for p in combo_str.split("|")]
+                    filtered_parts = []
+                    for part in parts:
+                        if ":" in part:
+                            param_name, param_value = part.split(":", 1)
+                            param_name = param_name.strip()
+                            # Пропускаем исключенные параметры
+                            if param_name not in excluded_params:
+                                filtered_parts.append(part.strip())
+                    return " | ".join(sorted(filtered_parts))
+
+                # Функция для фильтрации комбинаций по исключенным значениям параметров
+                def should_exclude_combination(combo_str):
+                    """Проверяет, нужно ли исключить комбинацию"""
+                    parts = [p.strip() for p in combo_str.split("|")]
+                    for part in parts:
+                        if ":" in part:
+                            param_name, param_value = part.split(":", 1)
+                            param_name = param_name.strip()
+                            param_value = param_value.strip()
+                            # Пропускаем полностью исключенные параметры
+                            if param_name in excluded_params:
+                                continue
+                            # Проверяем, исключено ли это значение параметра
+                            excluded_values = st.session_state["excluded_param_values"].get(param_name, [])
+                            if param_value in excluded_values:
+                                return True
+                    return False
+
+                # Переформируем комбинации: удаляем исключенные параметры и перегруппировываем
+                # Создаем новый словарь комбинаций БЕЗ исключенных параметров
+                regrouped_combinations = {}
+                for combo in combination_analytics:
+                    # Удаляем исключенные параметры из строки комбинации
+                    cleaned_combo_str = remove_excluded_params_from_combo(combo["Комбинация"])
+
+                    # Пропускаем комбинации с исключенными значениями
+                    if should_exclude_combination(combo["Комбинация"]):
+                        continue
+
+                    # Пропускаем пустые комбинации
+                    if not cleaned_combo_str:
+                        continue
+
+                    # Перегруппировываем: собираем все артикулы для очищенной комбинации
+                    if cleaned_combo_str not in regrouped_combinations:
+                        regrouped_combinations[cleaned_combo_str] = {
+                            "skus": [],
+                            "original_combos": []
+                        }
+
+                    # Добавляем артикулы из исходной комбинации
+                    combo_skus = all_combinations.get(combo["Комбинация"], [])
+
+                    # Если это комбинация новинок, проверяем дату создания для каждого артикула
+                    is_original_novelty_combo = novelty_months is not None and "Период появления:Новинка" in combo["Комбинация"]
+                    if is_original_novelty_combo and "Дата создания" in df.columns and report_end_date is not None:
+                        if isinstance(report_end_date, pd.Timestamp):
+                            start_date_for_novelties = report_end_date - pd.DateOffset(months=novelty_months)
+                        else:
+                            start_date_for_novelties = pd.to_datetime(report_end_date) - pd.DateOffset(months=novelty_months)
+
+                        # Фильтруем артикулы: оставляем только те, у которых дата создания в периоде новинок
+                        filtered_skus = []
+                        for sku in combo_skus:
+                            sku_mask = df["Артикул"].astype(str).str.replace(".0", "") == sku
+                            sku_rows = df[sku_mask]
+
+                            if not sku_rows.empty:
+                                date_mask = (
+                                    (sku_rows["Дата создания"] >= start_date_for_novelties) & 
+                                    (sku_rows["Дата создания"] <= report_end_date) &
+                                    (sku_rows["Дата создания"].notna())
+                                )
+                                if date_mask.any():
+                                    filtered_skus.append(sku)
+
+                        combo_skus = filtered_skus
+
+                    regrouped_combinations[cleaned_combo_str]["skus"].extend(combo_skus)
+                    regrouped_combinations[cleaned_combo_str]["original_combos"].append(combo)
+
+                # Пересчитываем метрики для перегруппированных комбинаций
+                regrouped_analytics = []
+                for cleaned_combo_str, combo_data in regrouped_combinations.items():
+                    skus = list(set(combo_data["skus"]))  # Убираем дубликаты
+                    if not skus:
+                        continue
+
+                    # Проверяем, является ли это комбинацией новинок
+                    is_novelty_combo = novelty_months is not None and "Период появления:Новинка" in cleaned_combo_str
+
+                    mask = df["Артикул"].astype(str).str.replace(".0", "").isin(skus)
+
+                    # Если это комбинация новинок, дополнительно фильтруем по дате создания
+                    if is_novelty_combo and "Дата создания" in df.columns and report_end_date is not None:
+                        if isinstance(report_end_date, pd.Timestamp):
+                            start_date_for_novelties = report_end_date - pd.DateOffset(months=novelty_months)
+                        else:
+                            start_date_for_novelties = pd.to_datetime(report_end_date) - pd.DateOffset(months=novelty_months)
+
+                        # Дополнительная фильтрация: только товары с датой создания в периоде новинок
+                        novelty_date_mask = (
+                            (df["Дата создания"] >= start_date_for_novelties) & 
+                            (df["Дата создания"] <= report_end_date)
+                        )
+                        mask = mask & novelty_date_mask
+
+                    filtered_df = df[mask]
+
+                    if not filtered_df.empty:
+                        total_revenue = filtered_df["Выручка"].sum() if "Выручка" in filtered_df.columns else 0
+                        total_orders = filtered_df["Заказы"].sum() if "Заказы" in filtered_df.columns else 0
+                        avg_price = filtered_df["Средняя цена"].mean() if "Средняя цена" in filtered_df.columns else 0
+                        lost_revenue = filtered_df["Упущенная выручка"].sum() if "Упущенная выручка" in filtered_df.columns else 0
+                        revenue_per_product = total_revenue / len(filtered_df) if len(filtered_df) > 0 else 0
+                        lost_revenue_per_product = lost_revenue / len(filtered_df) if len(filtered_df) > 0 else 0
+                        avg_position = filtered_df["Позиция в выдаче"].mean() if "Позиция в выдаче" in filtered_df.columns else 0
+                        avg_cpm = filtered_df["Стоимость за 1000 показов"].mean() if "Стоимость за 1000 показов" in filtered_df.columns else 0
+                        cpm_per_product = avg_cpm / len(filtered_df) if len(filtered_df) > 0 else 0
+
+                        # Применяем СПП для расчета цены без СПП
+                        spp = st.session_state.get("spp", 15)
+                        avg_price_without_spp = avg_price / (1 - float(spp) / 100.0) if float(spp) < 100 else avg_price
+
+                        regrouped_analytics.append({
+                            "Комбинация": cleaned_combo_str,
+                            "Количество артикулов": len(filtered_df),
+                            "Общая выручка": total_revenue,
+                            "Выручка на 1 артикул": revenue_per_product,
+                            "Средняя цена без СПП": avg_price_without_spp,
+                            "Упущенная выручка": lost_revenue,
+                            "Упущенная выручка на 1 артикул": lost_revenue_per_product,
+                            "Позиция в выдаче (средняя)": avg_position,
+                            "Стоимость за 1000 показов на 1 артикул": cpm_per_product
+                        })
+
+                # Пересчитываем рейтинг для перегруппированных комбинаций
+                if regrouped_analytics:
+                    all_revenues = [c["Выручка на 1 артикул"] for c in regrouped_analytics]
+                    all_prices = [c["Средняя цена без СПП"] for c in regrouped_analytics]
+                    all_lost = [c["Упущенная выручка на 1 артикул"] for c in regrouped_analytics]
+
+                    def calculate_combination_score(combo):
+                        revenue_per_sku = combo["Выручка на 1 артикул"]
+                        avg_price_without_spp = combo["Средняя цена без СПП"]
+                        lost_revenue_per_sku = combo["Упущенная выручка на 1 артикул"]
+
+                        # Нормализуем выручку (0-1)
+                        if max(all_revenues) > min(all_revenues):
+                            norm_revenue = (revenue_per_sku - min(all_revenues)) / (max(all_revenues) - min(all_revenues))
+                        else:
+                            norm_revenue = 0.5
+
+                        # Нормализуем цену (0-1, где 1 = максимум, т.е. лучше)
+                        if max(all_prices) > min(all_prices):
+                            norm_price = (avg_price_without_spp - min(all_prices)) / (max(all_prices) - min(all_prices))
+                        else:
+                            norm_price = 0.5
+
+                        # Нормализуем упущенную выручку (0-1, где 1 = минимум, т.е. лучше)
+                        if max(all_lost) > min(all_lost):
+                            norm_lost = 1 - (lost_revenue_per_sku - min(all_lost)) / (max(all_lost) - min(all_lost))
+                        else:
+                            norm_lost = 0.5
+
+                        # Взвешенная сумма с приоритетами: Выручка на 1 артикул (90%) → Средняя цена (9%) → Упущенная выручка на 1 артикул (1%)
+                        score = (norm_revenue * 0.9) + (norm_price * 0.09) + (norm_lost * 0.01)
+                        return score
+
+                    for combo in regrouped_analytics:
+                        combo["Рейтинг"] = calculate_combination_score(combo)
+
+                    regrouped_analytics.sort(key=lambda x: x["Рейтинг"], reverse=True)
+
+                # Используем перегруппированные комбинации
+                filtered_combinations = regrouped_analytics
+
+                # Разделяем комбинации на новинки и не-новинки, если выбран период для новинок
+                if novelty_months is not None:
+                    filtered_novelty_combinations = [c for c in filtered_combinations if "Период появления:Новинка" in c["Комбинация"]]
+                    filtered_regular_combinations = [c for c in filtered_combinations if "Период появления:Новинка" not in c["Комбинация"]]
+
+                    # Рассчитываем рейтинг отдельно для новинок
+                    if filtered_novelty_combinations:
+                        novelty_revenues = [c["Выручка на 1 артикул"] for c in filtered_novelty_combinations]
+                        novelty_prices = [c["Средняя цена без СПП"] for c in filtered_novelty_combinations]
+                        novelty_lost = [c["Упущенная выручка на 1 артикул"] for c in filtered_novelty_combinations]
+
+                        def calculate_novelty_score_regrouped(combo):
+                            revenue_per_sku = combo["Выручка на 1 артикул"]
+                            avg_price = combo["Средняя цена без СПП"]
+                            lost_revenue_per_sku = combo["Упущенная выручка на 1 артикул"]
+
+                            if max(novelty_revenues) > min(novelty_revenues):
+                                norm_revenue = (revenue_per_sku - min(novelty_revenues)) / (max(novelty_revenues) - min(novelty_revenues))
+                            else:
+                                norm_revenue = 0.5
+
+                            if max(novelty_prices) > min(novelty_prices):
+                                norm_price = (avg_price - min(novelty_prices)) / (max(novelty_prices) - min(novelty_prices))
+                            else:
+                                norm_price = 0.5
+
+                            if max(novelty_lost) > min(novelty_lost):
+                                norm_lost = 1 - (lost_revenue_per_sku - min(novelty_lost)) / (max(novelty_lost) - min(novelty_lost))
+                            else:
+                                norm_lost = 0.5
+
+                            score = (norm_revenue * 0.9) + (norm_price * 0.09) + (norm_lost * 0.01)
+                            return score
+
+                        for combo in filtered_novelty_combinations:
+                            combo["Рейтинг"] = calculate_novelty_score_regrouped(combo)
+                        filtered_novelty_combinations.sort(key=lambda x: x["Рейтинг"], reverse=True)
+
+                    # Рассчитываем рейтинг отдельно для не-новинок
+                    if filtered_regular_combinations:
+                        regular_revenues = [c["Выручка на 1 артикул"] for c in filtered_regular_combinations]
+                        regular_prices = [c["Средняя цена без СПП"] for c in filtered_regular_combinations]
+                        regular_lost = [c["Упущенная выручка на 1 артикул"] for c in filtered_regular_combinations]
+
+                        def calculate_regular_score_regrouped(combo):
+                            revenue_per_sku = combo["Выручка на 1 артикул"]
+                            avg_price = combo["Средняя цена без СПП"]
+                            lost_revenue_per_sku = combo["Упущенная выручка на 1 артикул"]
+
+                            if max(regular_revenues) > min(regular_revenues):
+                                norm_revenue = (revenue_per_sku - min(regular_revenues)) / (max(regular_revenues) - min(regular_revenues))
+                            else:
+                                norm_revenue = 0.5
+
+                            if max(regular_prices) > min(regular_prices):
+                                norm_price = (avg_price - min(regular_prices)) / (max(regular_prices) - min(regular_prices))
+                            else:
+                                norm_price = 0.5
+
+                            if max(regular_lost) > min(regular_lost):
+                                norm_lost = 1 - (lost_revenue_per_sku - min(regular_lost)) / (max(regular_lost) - min(regular_lost))
+                            else:
+                                norm_lost = 0.5
+
+                            score = (norm_revenue * 0.9) + (norm_price * 0.09) + (norm_lost * 0.01)
+                            return score
+
+                        for combo in filtered_regular_combinations:
+                            combo["Рейтинг"] = calculate_regular_score_regrouped(combo)
+                        filtered_regular_combinations.sort(key=lambda x: x["Рейтинг"], reverse=True)
+                else:
+                    filtered_novelty_combinations = []
+                    filtered_regular_combinations = filtered_combinations
+
+                # Создаем словарь для быстрого доступа к артикулам по очищенной комбинации
+                cleaned_combo_to_skus = {}
+                for cleaned_combo_str, combo_data in regrouped_combinations.items():
+                    cleaned_combo_to_skus[cleaned_combo_str] = list(set(combo_data["skus"]))
+
+                # Показываем топ-10 отдельно для новинок и не-новинок
+                top_10_novelty_combinations = filtered_novelty_combinations[:10] if novelty_months is not None else []
+                top_10_regular_combinations = filtered_regular_combinations[:10]
+
+                # Для обратной совместимости создаем объединенный список
+                top_10_combinations = top_10_novelty_combinations + top_10_regular_combinations
+
+                # Сохраняем данные о комбинациях в session_state для использования в вкладке "План продаж"
+                st.session_state['top_10_novelty_combinations'] = top_10_novelty_combinations
+                st.session_state['top_10_regular_combinations'] = top_10_regular_combinations
+                st.session_state['top_10_combinations'] = top_10_combinations
+                st.session_state['cleaned_combo_to_skus'] = cleaned_combo_to_skus
+                st.session_state['all_combinations'] = all_combinations
+                st.session_state['novelty_months'] = novelty_months
+
+                # Функция для форматирования данных комбинаций
+                def format_combinations_display(combinations_list, start_idx=1):
+                    display_data = []
+                    for idx, combo in enumerate(combinations_list, start_idx):
+                        # Получаем количество товаров из комбинации
+                        product_count = combo.get("Количество артикулов", 0)
+
+                        display_data.append({
+                            "Место": f"#{idx}",
+                            "Комбинация": combo["Комбинация"],
+                            "Количество товаров": f"{product_count} шт.",
+                            "Общая выручка": f"₽{combo['Общая выручка']:,.0f}".replace(",", " "),
+                            "Выручка на 1 артикул": f"₽{combo['Выручка на 1 артикул']:,.0f}".replace(",", " "),
+                            "Средняя цена без СПП": f"₽{combo['Средняя цена без СПП']:,.0f}".replace(",", " "),
+                            "Упущенная выручка": f"₽{combo['Упущенная выручка']:,.0f}".replace(",", " "),
+                            "Упущенная выручка на 1 артикул": f"₽{combo['Упущенная выручка на 1 артикул']:,.0f}".replace(",", " "),
+                            "Позиция в выдаче (средняя)": f"{combo['Позиция в выдаче (средняя)']:.1f}",
+                            "Стоимость за 1000 показов на 1 артикул": f"₽{combo['Стоимость за 1000 показов на 1 артикул']:,.0f}".replace(",", " "),
+                            "Рейтинг": f"{combo['Рейтинг']:.4f}"
+                        })
+                    return display_data
+
+                # Показываем комбинации новинок отдельно, если они есть
+                if novelty_months is not None and top_10_novelty_combinations:
+                    st.markdown("### 🆕 Топ-10 комбинаций новинок")
+                    st.info(f"💡 Комбинации только для товаров, появившихся за последние {novelty_months} месяцев")
+
+                    display_data_novelty = format_combinations_display(top_10_novelty_combinations, 1)
+                    top_10_novelty_df = pd.DataFrame(display_data_novelty)
+                    st.dataframe(top_10_novelty_df, use_container_width=True, hide_index=True)
+
+                    if top_10_novelty_combinations:
+                        best_novelty_combo = top_10_novelty_combinations[0]
+                        st.success(f"🥇 **Лучшая комбинация новинок**: {best_novelty_combo['Комбинация']}")
+                        st.markdown(f"**Рейтинг:** {best_novelty_combo['Рейтинг']:.4f} | **Выручка на 1 артикул:** ₽{best_novelty_combo['Выручка на 1 артикул']:,.0f}".replace(",", " "))
+
+                    st.divider()
+
+                # Показываем комбинации не-новинок отдельно
+                if top_10_regular_combinations:
+                    if novelty_months is not None:
+                        st.markdown("### 📦 Топ-10 комбинаций остальных товаров")
+                        st.info("💡 Комбинации для товаров, которые не являются новинками")
+                    else:
+                        st.markdown("### 🏆 Топ-10 лучших комбинаций параметров")
+
+                    display_data_regular = format_combinations_display(top_10_regular_combinations, 1)
+                    top_10_regular_df = pd.DataFrame(display_data_regular)
+                    st.dataframe(top_10_regular_df, use_container_width=True, hide_index=True)
+
+                    if top_10_regular_combinations:
+                        best_regular_combo = top_10_regular_combinations[0]
+                        st.success(f"🥇 **Лучшая комбинация**: {best_regular_combo['Комбинация']}")
+                        st.markdown(f"**Рейтинг:** {best_regular_combo['Рейтинг']:.4f} | **Выручка на 1 артикул:** ₽{best_regular_combo['Выручка на 1 артикул']:,.0f}".replace(",", " "))
+                else:
+                    # Если комбинации не сформировались, показываем сообщение
+                    if novelty_months is not None:
+                        st.warning("⚠️ Не найдено комбинаций для остальных товаров. Возможно, все товары являются новинками или все комбинации были исключены.")
+                    else:
+                        st.warning("⚠️ Не найдено комбинаций параметров. Возможные причины:")
+                        st.write("  • Нет товаров с заполненными параметрами")
+                        st.write("  • Все комбинации были исключены через фильтры")
+                        st.write("  • Все параметры были скрыты или исключены")
+
+                        # Показываем отладочную информацию
+                        with st.expander("🔍 Отладочная информация", expanded=False):
+                            st.write(f"**all_combinations:** {len(all_combinations)} комбинаций")
+                            st.write(f"**combination_analytics:** {len(combination_analytics)} комбинаций")
+                            st.write(f"**regrouped_analytics:** {len(regrouped_analytics) if 'regrouped_analytics' in locals() else 'не определено'}")
+                            st.write(f"**filtered_regular_combinations:** {len(filtered_regular_combinations) if 'filtered_regular_combinations' in locals() else 'не определено'}")
+                            st.write(f"**excluded_params:** {list(excluded_params)}")
+                            st.write(f"**active_params:** {len(active_params)} параметров")
+
+                # Добавляем возможность просмотра товаров для каждой комбинации
+                if top_10_combinations:
+                    st.divider()
+                    st.subheader("📦 Детали комбинации")
+
+                    # Формируем список всех комбинаций для выбора (новинки + остальные)
+                    combo_options = []
+                    if novelty_months is not None and top_10_novelty_combinations:
+                        for idx, combo in enumerate(top_10_novelty_combinations, 1):
+                            combo_options.append(f"🆕 #{idx} (Новинка) - {combo['Комбинация']}")
+
+                    if top_10_regular_combinations:
+                        for idx, combo in enumerate(top_10_regular_combinations, 1):
+                            prefix = "📦" if novelty_months is not None else ""
+                            combo_options.append(f"{prefix} #{idx} - {combo['Комбинация']}")
+                    selected_combo_idx = st.selectbox(
+                        "Выберите комбинацию для просмотра товаров:",
+                        options=combo_options,
+                        help="Выберите комбинацию из топ-10, чтобы увидеть все товары с такими параметрами"
+                    )
+
+                    if selected_combo_idx:
+                        # Определяем, из какого списка выбрана комбинация
+                        is_novelty_selection = "🆕" in selected_combo_idx or "(Новинка)" in selected_combo_idx
+
+                        # Извлекаем индекс выбранной комбинации
+                        idx_part = selected_combo_idx.split(" - ")[0].replace("#", "").replace("🆕", "").replace("📦", "").replace("(Новинка)", "").strip()
+                        selected_idx = int(idx_part) - 1
+
+                        # Выбираем комбинацию из соответствующего списка
+                        if is_novelty_selection and novelty_months is not None and top_10_novelty_combinations:
+                            if selected_idx < len(top_10_novelty_combinations):
+                                selected_combo = top_10_novelty_combinations[selected_idx]
+                            else:
+                                selected_combo = None
+                        else:
+                            if selected_idx < len(top_10_regular_combinations):
+                                selected_combo = top_10_regular_combinations[selected_idx]
+                            else:
+                                selected_combo = None
+
+                        if selected_combo:
+                            selected_combo_key = selected_combo["Комбинация"]
+                        else:
+                            selected_combo_key = None
+
+                        if not selected_combo_key:
+                            st.warning("⚠️ Комбинация не найдена")
+                        else:
+                            # Функция для удаления параметра "Период появления" из комбинации
+                            def remove_novelty_param(combo_str):
+                                """Удаляет параметр 'Период появления' из строки комбинации"""
+                                if not combo_str:
+                                    return combo_str
+                                parts = [p.strip() for p in combo_str.split("|")]
+                                filtered_parts = [p for p in parts if not p.startswith("Период появления:")]
+                                return " | ".join(sorted(filtered_parts))
+
+                            # Удаляем параметр "Период появления" из ключа для поиска в cleaned_combo_to_skus
+                            # (так как в regrouped_combinations ключ может быть без этого параметра)
+                            cleaned_selected_key = remove_novelty_param(selected_combo_key)
+
+                            # Парсим выбранную комбинацию на параметры (без параметра "Период появления")
+                            selected_parts = set([p.strip() for p in cleaned_selected_key.split("|") if p.strip()])
+
+                            # Находим артикулы для этой комбинации
+                            # Используем перегруппированные комбинации (они уже содержат очищенные комбинации)
+                            combo_skus = None
+
+                            # Сначала ищем по очищенному ключу в cleaned_combo_to_skus
+                            if cleaned_selected_key in cleaned_combo_to_skus:
+                                combo_skus = cleaned_combo_to_skus[cleaned_selected_key]
+                            # Если не найдено, пробуем найти по полному ключу
+                            elif selected_combo_key in cleaned_combo_to_skus:
+                                combo_skus = cleaned_combo_to_skus[selected_combo_key]
+                            # Если не найдено, ищем в cleaned_combo_to_skus по совпадению параметров (без учета "Период появления")
+                            else:
+                                for cleaned_key, skus in cleaned_combo_to_skus.items():
+                                    # Удаляем параметр "Период появления" из ключа для сравнения
+                                    cleaned_key_no_novelty = remove_novelty_param(cleaned_key)
+                                    cleaned_key_parts = set([p.strip() for p in cleaned_key_no_novelty.split("|") if p.strip()])
+
+                                    # Сравниваем параметры (без учета "Период появления")
+                                    if selected_parts == cleaned_key_parts:
+                                        combo_skus = skus
+                                        break
+
+                            # Если не найдено, ищем в оригинальных комбинациях
+                            if combo_skus is None:
+                                if selected_combo_key in all_combinations:
+                                    combo_skus = all_combinations[selected_combo_key]
+                                # Если это комбинация новинок и артикулы все еще не найдены, ищем в оригинальных комбинациях с параметром "Период появления"
+                                elif is_novelty_selection and novelty_months is not None:
+                                    # Ищем оригинальные комбинации новинок, которые могут соответствовать выбранной комбинации
+                                    for orig_combo_key, orig_skus in all_combinations.items():
+                                        # Проверяем, содержит ли оригинальная комбинация параметр новинок
+                                        if "Период появления:Новинка" in orig_combo_key:
+                                            # Удаляем параметр "Период появления" из оригинальной комбинации для сравнения
+                                            orig_cleaned = remove_novelty_param(orig_combo_key)
+                                            orig_parts = set([p.strip() for p in orig_cleaned.split("|") if p.strip()])
+
+                                            # Сравниваем: все параметры из selected_combo_key должны быть в orig_parts
+                                            # (orig_parts может содержать дополнительные параметры, которые были исключены)
+                                            if selected_parts.issubset(orig_parts) or selected_parts == orig_parts:
+                                                combo_skus = orig_skus
+                                                break
+
+                            # Если артикулы все еще не найдены, показываем предупреждение
+                            if not combo_skus:
+                                st.warning(f"⚠️ Не удалось найти товары для комбинации: {selected_combo_key}")
+
+                            # Фильтруем данные по артикулам
+                            if combo_skus:
+                                mask = df["Артикул"].astype(str).str.replace(".0", "").isin(combo_skus)
+                                combo_products_df = df[mask].copy()
+
+                                # Если это комбинация новинок, дополнительно фильтруем по дате создания
+                                # Используем флаг is_novelty_selection вместо проверки ключа
+                                is_novelty_combo = is_novelty_selection and novelty_months is not None
+                                if is_novelty_combo and "Дата создания" in combo_products_df.columns and report_end_date is not None:
+                                    if isinstance(report_end_date, pd.Timestamp):
+                                        start_date_for_novelties = report_end_date - pd.DateOffset(months=novelty_months)
+                                    else:
+                                        start_date_for_novelties = pd.to_datetime(report_end_date) - pd.DateOffset(months=novelty_months)
+
+                                    # Фильтруем только товары с датой создания в периоде новинок
+                                    novelty_date_mask = (
+                                        (combo_products_df["Дата создания"] >= start_date_for_novelties) & 
+                                        (combo_products_df["Дата создания"] <= report_end_date) &
+                                        (combo_products_df["Дата создания"].notna())
+                                    )
+                                    combo_products_df = combo_products_df[novelty_date_mask].copy()
+
+                                if not combo_products_df.empty:
+                                    st.markdown(f"**Комбинация:** {selected_combo_key}")
+                                    st.markdown(f"**Количество товаров:** {len(combo_products_df)}")
+
+                                    # Получаем конец периода анализа
+                                    report_end_date_local = report_end_date
+                                    if report_end_date_local is None:
+                                        df_raw = st.session_state.get("df_raw")
+                                        header_row = st.session_state.get("header_row")
+                                        if df_raw is not None and header_row is not None:
+                                            period_info = get_analysis_period(df, df_raw, header_row, error_callback=st.error)
+                                            if period_info and "end_date" in period_info:
+                                                report_end_date_local = period_info["end_date"]
+                                        if report_end_date_local is None:
+                                            report_end_date_local = pd.Timestamp.now()
+
+                                    # Преобразуем в Timestamp если нужно
+                                    if not isinstance(report_end_date_local, pd.Timestamp):
+                                        report_end_date_local = pd.to_datetime(report_end_date_local)
+
+                                    # Показываем основные метрики
+                                    col1, col2, col3, col4 = st.columns(4)
+                                    with col1:
+                                        total_rev = combo_products_df["Выручка"].sum() if "Выручка" in combo_products_df.columns else 0
+                                        st.metric("Общая выручка", f"₽{total_rev:,.0f}".replace(",", " "))
+                                    with col2:
+                                        avg_rev = total_rev / len(combo_products_df) if len(combo_products_df) > 0 else 0
+                                        st.metric("Выручка на 1 артикул", f"₽{avg_rev:,.0f}".replace(",", " "))
+                                    with col3:
+                                        avg_price = combo_products_df["Средняя цена"].mean() if "Средняя цена" in combo_products_df.columns else 0
+                                        st.metric("Средняя цена", f"₽{avg_price:,.0f}".replace(",", " "))
+                                    with col4:
+                                        # Средняя заказов в месяц на 1 артикул (с учетом возраста каждого товара)
+                                        orders_per_month_list = []
+                                        if "Заказы" in combo_products_df.columns and "Дата создания" in combo_products_df.columns:
+                                            for _, row in combo_products_df.iterrows():
+                                                orders = row.get("Заказы", 0)
+                                                if pd.notna(orders) and orders > 0:
+                                                    creation_date = row.get("Дата создания")
+                                                    if pd.notna(creation_date):
+                                                        # Преобразуем дату создания в Timestamp
+                                                        if not isinstance(creation_date, pd.Timestamp):
+                                                            creation_date = pd.to_datetime(creation_date, errors='coerce')
+
+                                                        if pd.notna(creation_date):
+                                                            # Рассчитываем количество месяцев от даты создания до конца периода
+                                                            months_diff = (report_end_date_local - creation_date).days / 30.0
+                                                            # Минимум 1 месяц, чтобы избежать деления на ноль
+                                                            months_diff = max(months_diff, 1.0)
+
+                                                            # Заказы в месяц для этого товара
+                                                            orders_per_month = orders / months_diff
+                                                            orders_per_month_list.append(orders_per_month)
+
+                                        if orders_per_month_list:
+                                            avg_orders_per_month = sum(orders_per_month_list) / len(orders_per_month_list)
+                                        else:
+                                            # Fallback: если нет дат создания, используем старый метод
+                                            total_orders = combo_products_df["Заказы"].sum() if "Заказы" in combo_products_df.columns else 0
+                                            avg_orders_per_month = total_orders / len(combo_products_df) if len(combo_products_df) > 0 else 0
+
+                                        st.metric("Средняя заказов в месяц на 1 артикул", f"{avg_orders_per_month:.1f}")
+
+                                    # Дополнительные метрики
+                                    col5, col6, col7, col8 = st.columns(4)
+                                    with col5:
+                                        total_lost_rev = combo_products_df["Упущенная выручка"].sum() if "Упущенная выручка" in combo_products_df.columns else 0
+                                        st.metric("Упущенная выручка", f"₽{total_lost_rev:,.0f}".replace(",", " "))
+                                    with col6:
+                                        avg_lost_rev = total_lost_rev / len(combo_products_df) if len(combo_products_df) > 0 else 0
+                                        st.metric("Упущенная выручка на артикул", f"₽{avg_lost_rev:,.0f}".replace(",", " "))
+                                    with col7:
+                                        # Среднее продаж в месяц на 1 артикул (с учетом возраста каждого товара)
+                                        sales_per_month_list = []
+                                        if "Дата создания" in combo_products_df.columns:
+                                            # Получаем процент выкупа
+                                            buyout_pct = st.session_state.get("buyout_pct", 25)
+                                            buyout_k = float(buyout_pct) / 100.0 if buyout_pct else 0.25
+
+                                            for _, row in combo_products_df.iterrows():
+                                                creation_date = row.get("Дата создания")
+                                                if pd.notna(creation_date):
+                                                    # Преобразуем дату создания в Timestamp
+                                                    if not isinstance(creation_date, pd.Timestamp):
+                                                        creation_date = pd.to_datetime(creation_date, errors='coerce')
+
+                                                    if pd.notna(creation_date):
+                                                        # Рассчитываем количество месяцев от даты создания до конца периода
+                                                        months_diff = (report_end_date_local - creation_date).days / 30.0
+                                                        # Минимум 1 месяц, чтобы избежать деления на ноль
+                                                        months_diff = max(months_diff, 1.0)
+
+                                                        # Получаем продажи (выкупы) для этого товара
+                                                        if "Выкупы" in combo_products_df.columns:
+                                                            buyouts = row.get("Выкупы", 0)
+                                                            if pd.notna(buyouts):
+                                                                sales = buyouts
+                                                            else:
+                                                                # Если нет выкупов, рассчитываем через заказы и процент выкупа
+                                                                orders = row.get("Заказы", 0) if "Заказы" in combo_products_df.columns else 0
+                                                                sales = orders * buyout_k if pd.notna(orders) else 0
+                                                        else:
+                                                            # Если нет колонки "Выкупы", рассчитываем через заказы и процент выкупа
+                                                            orders = row.get("Заказы", 0) if "Заказы" in combo_products_df.columns else 0
+                                                            sales = orders * buyout_k if pd.notna(orders) else 0
+
+                                                        if sales > 0:
+                                                            # Продажи в месяц для этого товара
+                                                            sales_per_month = sales / months_diff
+                                                            sales_per_month_list.append(sales_per_month)
+
+                                        if sales_per_month_list:
+                                            avg_sales_per_month = sum(sales_per_month_list) / len(sales_per_month_list)
+                                        else:
+                                            # Fallback: если нет дат создания, используем старый метод
+                                            if "Выкупы" in combo_products_df.columns:
+                                                total_buyouts = combo_products_df["Выкупы"].sum()
+                                                avg_sales_per_month = total_buyouts / len(combo_products_df) if len(combo_products_df) > 0 else 0
+                                            else:
+                                                buyout_pct = st.session_state.get("buyout_pct", 25)
+                                                buyout_k = float(buyout_pct) / 100.0 if buyout_pct else 0.25
+                                                total_orders_for_sales = combo_products_df["Заказы"].sum() if "Заказы" in combo_products_df.columns else 0
+                                                total_buyouts = total_orders_for_sales * buyout_k
+                                                avg_sales_per_month = total_buyouts / len(combo_products_df) if len(combo_products_df) > 0 else 0
+
+                                        st.metric("Среднее продаж в месяц на 1 артикул", f"{avg_sales_per_month:.1f}")
+                                    with col8:
+                                        # Оборачиваемость на единицу товара (на артикул): средняя оборачиваемость одного артикула
+                                        total_orders_turnover = combo_products_df["Заказы"].sum() if "Заказы" in combo_products_df.columns else 0
+
+                                        # Проверяем наличие данных об остатках
+                                        has_stock = False
+                                        avg_stock = 0
+                                        if "Остаток" in combo_products_df.columns:
+                                            avg_stock = combo_products_df["Остаток"].mean()
+                                            has_stock = True
+                                        elif "Stock" in combo_products_df.columns:
+                                            avg_stock = combo_products_df["Stock"].mean()
+                                            has_stock = True
+
+                                        # Рассчитываем оборачиваемость на артикул
+                                        if has_stock and avg_stock > 0:
+                                            # Если есть остатки: оборачиваемость на артикул = (Заказы артикула за 30 дней) / Остаток артикула
+                                            # Средняя оборачиваемость = среднее значение оборачиваемости всех артикулов
+                                            turnover_per_sku_list = []
+                                            for _, row in combo_products_df.iterrows():
+                                                sku_orders = row.get("Заказы", 0) if pd.notna(row.get("Заказы", 0)) else 0
+                                                sku_stock = row.get("Остаток", 0) if "Остаток" in combo_products_df.columns and pd.notna(row.get("Остаток", 0)) else row.get("Stock", 0) if "Stock" in combo_products_df.columns and pd.notna(row.get("Stock", 0)) else 0
+                                                if sku_stock > 0:
+                                                    # Оборачиваемость на артикул = заказы за 30 дней / остаток
+                                                    turnover_per_sku = sku_orders / sku_stock
+                                                    turnover_per_sku_list.append(turnover_per_sku)
+
+                                            if turnover_per_sku_list:
+                                                avg_turnover_per_sku = sum(turnover_per_sku_list) / len(turnover_per_sku_list)
+                                            else:
+                                                avg_turnover_per_sku = 0
+                                        else:
+                                            # Если нет остатков: оборачиваемость на артикул = средние заказы на артикул
+                                            avg_turnover_per_sku = total_orders_turnover / len(combo_products_df) if len(combo_products_df) > 0 else 0
+
+                                        turnover_per_sku_display = f"{avg_turnover_per_sku:.2f}" if avg_turnover_per_sku > 0 else "N/A"
+                                        st.metric("Оборачиваемость на артикул", turnover_per_sku_display)
+
+                                    # Показываем таблицу товаров
+                                    st.markdown("**Список товаров:**")
+
+                                    # Создаем копию DataFrame для работы
+                                    display_combo_df = combo_products_df.copy()
+
+                                    # Добавляем изображения
+                                    import base64
+                                    imgs = []
+                                    img_size = 150
+                                    for sku in display_combo_df["Артикул"].astype(str):
+                                        sku_clean = sku.replace(".0", "")
+                                        path = get_cached_image_path(sku_clean)
+                                        if path and os.path.exists(path):
+                                            img_bytes = load_image_bytes(path, img_size)
+                                            if img_bytes:
+                                                b64_data = base64.b64encode(img_bytes).decode()
+                                                data_uri = f"data:image/jpeg;base64,{b64_data}"
+                                                imgs.append(data_uri)
+                                            else:
+                                                imgs.append("")
+                                        else:
+                                            imgs.append("")
+
+                                    display_combo_df.insert(1, "Изображение", imgs)
+
+                                    # Добавляем ссылки на Wildberries
+                                    if "Артикул" in display_combo_df.columns:
+                                        display_combo_df["Ссылка"] = display_combo_df["Артикул"].astype(str).str.replace(".0", "").apply(
+                                            lambda sku: f"https://www.wildberries.ru/catalog/{sku}/detail.aspx"
+                                        )
+
+                                    # Добавляем параметры в таблицу
+                                    for param_name in available_params:
+                                        if param_name in param_values:
+                                            display_combo_df[param_name] = display_combo_df["Артикул"].astype(str).str.replace(".0", "").apply(
+                                                lambda sku: param_values[param_name].get(str(sku), "")
+                                            )
+
+                                    # Форматируем дату создания, если она есть
+                                    if "Дата создания" in display_combo_df.columns:
+                                        display_combo_df["Дата создания"] = pd.to_datetime(display_combo_df["Дата создания"], errors="coerce")
+                                        # Форматируем дату для отображения
+                                        display_combo_df["Дата создания"] = display_combo_df["Дата создания"].dt.strftime("%d.%m.%Y")
+
+                                    # Настраиваем порядок колонок (как в основной таблице)
+                                    main_cols = ["Артикул", "Изображение", "Ссылка"]
+                                    if "Дата создания" in display_combo_df.columns:
+                                        main_cols.append("Дата создания")
+                                    if "Выручка" in display_combo_df.columns:
+                                        main_cols.append("Выручка")
+                                    if "Заказы" in display_combo_df.columns:
+                                        main_cols.append("Заказы")
+                                    if "Средняя цена" in display_combo_df.columns:
+                                        main_cols.append("Средняя цена")
+                                    if "Цена (с СПП)" in display_combo_df.columns:
+                                        main_cols.append("Цена (с СПП)")
+                                    if "Позиция в выдаче" in display_combo_df.columns:
+                                        main_cols.append("Позиция в выдаче")
+                                    if "Упущенная выручка" in display_combo_df.columns:
+                                        main_cols.append("Упущенная выручка")
+                                    if "Прибыль" in display_combo_df.columns:
+                                        main_cols.append("Прибыль")
+                                    if "Стоимость за 1000 показов" in display_combo_df.columns:
+                                        main_cols.append("Стоимость за 1000 показов")
+
+                                    # Добавляем параметры
+                                    param_cols = [p for p in available_params if p in display_combo_df.columns]
+
+                                    # Остальные колонки
+                                    other_cols = [c for c in display_combo_df.columns if c not in main_cols and c not in param_cols]
+
+                                    # Формируем финальный порядок
+                                    final_order = [c for c in main_cols + param_cols + other_cols if c in display_combo_df.columns]
+                                    display_combo_df = display_combo_df[final_order]
+
+                                    # Настройка конфигурации столбцов
+                                    from streamlit import column_config as cc
+                                    col_cfg = {}
+
+                                    # Конфигурация для изображений
+                                    if "Изображение" in display_combo_df.columns:
+                                        col_cfg["Изображение"] = cc.ImageColumn("Изображение", width=img_size + 20)
+
+                                    # Конфигурация для артикула
+                                    if "Артикул" in display_combo_df.columns:
+                                        col_cfg["Артикул"] = cc.NumberColumn("Артикул", format="%.0f", width=120)
+
+                                    # Конфигурация для ссылки
+                                    if "Ссылка" in display_combo_df.columns:
+                                        col_cfg["Ссылка"] = cc.LinkColumn("Ссылка", display_text="🔗", width=60)
+
+                                    # Конфигурация для числовых столбцов
+                                    money_columns = ["Выручка", "Средняя цена", "Цена (с СПП)", "Упущенная выручка", "Прибыль", "Стоимость за 1000 показов"]
+                                    for col in money_columns:
+                                        if col in display_combo_df.columns:
+                                            col_cfg[col] = cc.NumberColumn(col, format="%.0f", width=120)
+
+                                    # Конфигурация для позиции
+                                    if "Позиция в выдаче" in display_combo_df.columns:
+                                        col_cfg["Позиция в выдаче"] = cc.NumberColumn("Позиция в выдаче", format="%.1f", width=100)
+
+                                    # Конфигурация для параметров
+                                    for param_name in param_cols:
+                                        if param_name in display_combo_df.columns:
+                                            col_cfg[param_name] = cc.TextColumn(param_name, width=150)
+
+                                    # Отображаем таблицу
+                                    st.dataframe(
+                                        display_combo_df,
+                                        use_container_width=True,
+                                        hide_index=True,
+                                        column_config=col_cfg
+                                    )
+
+                                    # Кнопка для анализа товаров в комбинации
+                                    st.divider()
+                                    st.markdown("### 🤖 ИИ-анализ комбинации")
+
+                                    if st.button("🔍 Проанализировать товары с помощью ИИ", type="primary", use_container_width=True):
+                                        with st.spinner("🔄 Анализирую товары с помощью ИИ... Это может занять некоторое время."):
+                                            # Определяем категорию (можно сделать настраиваемой)
+                                            category = "Рашрашд мужской (компрессионная одежда)"
+
+                                            # Анализируем товары в комбинации
+                                            analysis_result = analyze_combination_products_with_ai(
+                                                combo_products_df, 
+                                                selected_combo_key,
+                                                category=category
+                                            )
+
+                                            if "error" in analysis_result:
+                                                st.error(f"❌ {analysis_result['error']}")
+                                                if "raw_response" in analysis_result:
+                                                    with st.expander("📄 Полный ответ ИИ"):
+                                                        st.text(analysis_result["raw_response"])
+                                            else:
+                                                # Отображаем результаты анализа
+                                                st.success("✅ Анализ завершен!")
+
+                                                # Общие характеристики
+                                                if "common_characteristics" in analysis_result:
+                                                    st.markdown("#### 📊 Общие характеристики")
+                                                    st.info(analysis_result["common_characteristics"])
+
+                                                # Сильные стороны
+                                                if "strengths" in analysis_result and analysis_result["strengths"]:
+                                                    st.markdown("#### ✅ Сильные стороны")
+                                                    for strength in analysis_result["strengths"]:
+                                                        st.markdown(f"- {strength}")
+
+                                                # Слабые стороны
+                                                if "weaknesses" in analysis_result and analysis_result["weaknesses"]:
+                                                    st.markdown("#### ⚠️ Слабые стороны")
+                                                    for weakness in analysis_result["weaknesses"]:
+                                                        st.markdown(f"- {weakness}")
+
+                                                # Рекомендации
+                                                if "recommendations" in analysis_result and analysis_result["recommendations"]:
+                                                    st.markdown("#### 💡 Рекомендации по улучшению")
+                                                    for rec in analysis_result["recommendations"]:
+                                                        priority_emoji = "🔴" if rec.get("priority") == "high" else "🟡" if rec.get("priority") == "medium" else "🟢"
+                                                        st.markdown(f"**{priority_emoji} {rec.get('category', 'Общее')}**")
+                                                        st.markdown(f"- {rec.get('recommendation', '')}")
+                                                        if rec.get('expected_impact'):
+                                                            st.caption(f"💭 Ожидаемый эффект: {rec['expected_impact']}")
+
+                                                # Конкурентные преимущества
+                                                if "competitive_advantages" in analysis_result and analysis_result["competitive_advantages"]:
+                                                    st.markdown("#### 🏆 Потенциальные конкурентные преимущества")
+                                                    for advantage in analysis_result["competitive_advantages"]:
+                                                        st.markdown(f"- {advantage}")
+
+                                                # Рыночные инсайты
+                                                if "market_insights" in analysis_result:
+                                                    st.markdown("#### 📈 Рыночные инсайты")
+                                                    st.info(analysis_result["market_insights"])
+
+                                                # Анализ категории и CAGR
+                                                st.divider()
+                                                st.markdown("### 📊 Анализ категории и CAGR")
+
+                                                cagr_data = get_category_cagr_analysis(category)
+
+                                                col1, col2, col3 = st.columns(3)
+                                                with col1:
+                                                    st.metric("CAGR (5 лет)", f"{cagr_data.get('cagr_5_years', 0):.1f}%")
+                                                with col2:
+                                                    st.metric("Прогноз роста 2025", f"{cagr_data.get('projected_growth_2025', 0):.1f}%")
+                                                with col3:
+                                                    st.metric("Размер рынка 2024", cagr_data.get('market_size_2024', 'N/A'))
+
+                                                st.markdown("#### 🚀 Ключевые драйверы роста")
+                                                for driver in cagr_data.get('key_drivers', []):
+                                                    st.markdown(f"- {driver}")
+
+                                                st.markdown("#### 📈 Тренды рынка")
+                                                for trend in cagr_data.get('trends', []):
+                                                    st.markdown(f"- {trend}")
+
+                                                st.markdown(f"**Уровень конкуренции:** {cagr_data.get('competition_level', 'N/A')}")
+                                                st.markdown(f"**Зрелость рынка:** {cagr_data.get('market_maturity', 'N/A')}")
+
+                                                # Анализ WGSN
+                                                st.divider()
+                                                st.markdown("### 📚 Анализ трендов WGSN")
+
+                                                with st.spinner("🔄 Анализирую файлы WGSN... Это может занять некоторое время."):
+                                                    # Читаем файлы WGSN
+                                                    wgsn_content = read_wgsn_files()
+
+                                                    if "error" in wgsn_content:
+                                                        st.warning(f"⚠️ {wgsn_content['error']}")
+                                                    else:
+                                                        # Анализируем тренды WGSN с помощью ИИ
+                                                        wgsn_analysis = analyze_wgsn_trends_with_ai(
+                                                            wgsn_content,
+                                                            category=category,
+                                                            combination_key=selected_combo_key
+                                                        )
+
+                                                        if "error" in wgsn_analysis:
+                                                            st.error(f"❌ {wgsn_analysis['error']}")
+                                                            if "raw_response" in wgsn_analysis:
+                                                                with st.expander("📄 Полный ответ ИИ по WGSN"):
+                                                                    st.text(wgsn_analysis["raw_response"])
+                                                        else:
+                                                            st.success("✅ Анализ WGSN завершен!")
+
+                                                            # Резюме трендов WGSN
+                                                            if "wgsn_trends_summary" in wgsn_analysis:
+                                                                st.markdown("#### 📋 Резюме трендов WGSN")
+                                                                st.markdown(wgsn_analysis["wgsn_trends_summary"])
+
+                                                            # Анализ категории
+                                                            if "category_analysis" in wgsn_analysis:
+                                                                st.markdown("#### 📊 Анализ категории на основе WGSN")
+                                                                cat_analysis = wgsn_analysis["category_analysis"]
+
+                                                                col1, col2 = st.columns(2)
+                                                                with col1:
+                                                                    if "current_trends" in cat_analysis:
+                                                                        st.markdown("**✅ Актуальные тренды:**")
+                                                                        st.info(cat_analysis["current_trends"])
+
+                                                                with col2:
+                                                                    if "emerging_trends" in cat_analysis:
+                                                                        st.markdown("**🔮 Появляющиеся тренды:**")
+                                                                        st.success(cat_analysis["emerging_trends"])
+
+                                                                if "declining_trends" in cat_analysis:
+                                                                    st.markdown("**⚠️ Устаревающие тренды:**")
+                                                                    st.warning(cat_analysis["declining_trends"])
+
+                                                            # Детальный анализ параметров комбинации
+                                                            if "combination_parameter_analysis" in wgsn_analysis and wgsn_analysis["combination_parameter_analysis"]:
+                                                                st.markdown("#### 🔍 Детальный анализ параметров комбинации")
+                                                                for param_analysis in wgsn_analysis["combination_parameter_analysis"]:
+                                                                    status_emoji = "✅" if param_analysis.get("wgsn_trend_status") == "Соответствует" else "⚠️" if param_analysis.get("wgsn_trend_status") == "Частично соответствует" else "❌"
+
+                                                                    with st.expander(f"{status_emoji} **{param_analysis.get('parameter', 'Параметр')}** = {param_analysis.get('current_value', 'N/A')}"):
+                                                                        st.markdown(f"**Статус по трендам WGSN:** {param_analysis.get('wgsn_trend_status', 'N/A')}")
+
+                                                                        if param_analysis.get('wgsn_recommendation'):
+                                                                            st.markdown("**💡 Рекомендация WGSN:**")
+                                                                            st.info(param_analysis['wgsn_recommendation'])
+
+                                                                        if param_analysis.get('suggested_values'):
+                                                                            st.markdown("**📌 Рекомендуемые значения:**")
+                                                                            for value in param_analysis['suggested_values']:
+                                                                                st.markdown(f"- {value}")
+
+                                                                        if param_analysis.get('rationale'):
+                                                                            st.markdown("**📝 Обоснование:**")
+                                                                            st.markdown(param_analysis['rationale'])
+
+                                                            # Релевантные тренды
+                                                            if "relevant_trends" in wgsn_analysis and wgsn_analysis["relevant_trends"]:
+                                                                st.markdown("#### 🎯 Релевантные тренды из WGSN")
+                                                                for trend in wgsn_analysis["relevant_trends"]:
+                                                                    trend_type_emoji = {
+                                                        "Цвет": "🎨",
+                                                        "Материал": "🧵",
+                                                        "Дизайн": "✂️",
+                                                        "Технология": "⚙️",
+                                                        "Стиль": "👔",
+                                                        "Функциональность": "⚡"
+                                                    }.get(trend.get('trend_type', ''), "📌")
+
+                                                                    with st.expander(f"{trend_type_emoji} **{trend.get('trend_name', 'Тренд')}** ({trend.get('trend_type', 'Общее')}) - из {trend.get('source_file', 'WGSN')}"):
+                                                                        st.markdown("**📄 Описание:**")
+                                                                        st.markdown(trend.get('description', ''))
+
+                                                                        st.markdown("**🎯 Релевантность для категории:**")
+                                                                        st.info(trend.get('relevance_to_category', ''))
+
+                                                                        st.markdown("**🔗 Применение к комбинации:**")
+                                                                        st.markdown(trend.get('application_to_combination', ''))
+
+                                                                        if trend.get('implementation_steps'):
+                                                                            st.markdown("**📋 Шаги внедрения:**")
+                                                                            for i, step in enumerate(trend.get('implementation_steps', []), 1):
+                                                                                st.markdown(f"{i}. {step}")
+
+                                                                        if trend.get('expected_market_impact'):
+                                                                            st.markdown("**💼 Ожидаемое влияние на рынок:**")
+                                                                            st.success(trend.get('expected_market_impact', ''))
+
+                                                            # Рекомендации на основе трендов WGSN
+                                                            if "trend_recommendations" in wgsn_analysis and wgsn_analysis["trend_recommendations"]:
+                                                                st.markdown("#### 💡 Детальные рекомендации на основе трендов WGSN")
+                                                                for rec in wgsn_analysis["trend_recommendations"]:
+                                                                    priority_emoji = "🔴" if rec.get("priority") == "high" else "🟡" if rec.get("priority") == "medium" else "🟢"
+
+                                                                    with st.expander(f"{priority_emoji} **{rec.get('trend_category', 'Общее')}** - {rec.get('timeline', 'Срок не указан')}"):
+                                                                        st.markdown("**💡 Рекомендация:**")
+                                                                        st.markdown(rec.get('recommendation', ''))
+
+                                                                        if rec.get('specific_changes'):
+                                                                            st.markdown("**🔄 Конкретные изменения:**")
+                                                                            st.info(rec.get('specific_changes', ''))
+
+                                                                        if rec.get('expected_impact'):
+                                                                            st.markdown("**💭 Ожидаемый эффект:**")
+                                                                            st.success(rec.get('expected_impact', ''))
+
+                                                                        if rec.get('wgsn_source'):
+                                                                            st.markdown("**📚 Источник WGSN:**")
+                                                                            st.caption(rec.get('wgsn_source', ''))
+
+                                                            # Предложения новых комбинаций
+                                                            if "new_combination_suggestions" in wgsn_analysis and wgsn_analysis["new_combination_suggestions"]:
+                                                                st.markdown("#### 🆕 Предложения новых комбинаций на основе WGSN")
+                                                                for new_combo in wgsn_analysis["new_combination_suggestions"]:
+                                                                    with st.expander(f"**{new_combo.get('combination', 'Новая комбинация')}**"):
+                                                                        st.markdown("**📝 Обоснование:**")
+                                                                        st.info(new_combo.get('rationale', ''))
+
+                                                                        if new_combo.get('wgsn_trends_used'):
+                                                                            st.markdown("**🎯 Использованные тренды WGSN:**")
+                                                                            for trend in new_combo.get('wgsn_trends_used', []):
+                                                                                st.markdown(f"- {trend}")
+
+                                                                        if new_combo.get('competitive_advantage'):
+                                                                            st.markdown("**🏆 Конкурентное преимущество:**")
+                                                                            st.success(new_combo.get('competitive_advantage', ''))
+
+                                                            # Будущие тренды
+                                                            if "future_trends" in wgsn_analysis and wgsn_analysis["future_trends"]:
+                                                                st.markdown("#### 🔮 Будущие тренды")
+                                                                for trend in wgsn_analysis["future_trends"]:
+                                                                    if isinstance(trend, dict):
+                                                                        with st.expander(f"**{trend.get('trend_name', 'Тренд')}** - {trend.get('timeframe', 'Срок не указан')}"):
+                                                                            st.markdown("**📄 Описание:**")
+                                                                            st.markdown(trend.get('description', ''))
+
+                                                                            if trend.get('preparation_steps'):
+                                                                                st.markdown("**📋 Шаги подготовки:**")
+                                                                                for i, step in enumerate(trend.get('preparation_steps', []), 1):
+                                                                                    st.markdown(f"{i}. {step}")
+                                                                    else:
+                                                                        st.markdown(f"- {trend}")
+
+                                                            # Конкурентные преимущества из трендов
+                                                            if "competitive_advantages_from_trends" in wgsn_analysis and wgsn_analysis["competitive_advantages_from_trends"]:
+                                                                st.markdown("#### 🏆 Конкурентные преимущества на основе трендов WGSN")
+                                                                for advantage in wgsn_analysis["competitive_advantages_from_trends"]:
+                                                                    if isinstance(advantage, dict):
+                                                                        with st.expander(f"**{advantage.get('advantage', 'Преимущество')}**"):
+                                                                            st.markdown("**📚 Основано на тренде WGSN:**")
+                                                                            st.info(advantage.get('wgsn_trend_basis', ''))
+
+                                                                            if advantage.get('implementation'):
+                                                                                st.markdown("**⚙️ Реализация:**")
+                                                                                st.markdown(advantage.get('implementation', ''))
+
+                                                                            if advantage.get('market_positioning'):
+                                                                                st.markdown("**📍 Позиционирование на рынке:**")
+                                                                                st.success(advantage.get('market_positioning', ''))
+                                                                    else:
+                                                                        st.markdown(f"- {advantage}")
+
+                                                            # План действий
+                                                            if "action_plan" in wgsn_analysis:
+                                                                st.markdown("#### 📋 План действий на основе WGSN")
+                                                                action_plan = wgsn_analysis["action_plan"]
+
+                                                                if action_plan.get("immediate_actions"):
+                                                                    st.markdown("**⚡ Немедленные действия:**")
+                                                                    for action in action_plan.get("immediate_actions", []):
+                                                                        st.markdown(f"- {action}")
+
+                                                                if action_plan.get("short_term_actions"):
+                                                                    st.markdown("**📅 Краткосрочные действия (3 месяца):**")
+                                                                    for action in action_plan.get("short_term_actions", []):
+                                                                        st.markdown(f"- {action}")
+
+                                                                if action_plan.get("long_term_actions"):
+                                                                    st.markdown("**🗓️ Долгосрочные действия (6-12 месяцев):**")
+                                                                    for action in action_plan.get("long_term_actions", []):
+                                                                        st.markdown(f"- {action}")
+
+                                                            # Рыночные инсайты из WGSN
+                                                            if "market_insights" in wgsn_analysis:
+                                                                st.markdown("#### 📈 Рыночные инсайты на основе WGSN")
+                                                                st.markdown(wgsn_analysis["market_insights"])
+
+                                                            # Источники файлов
+                                                            if "source_files" in wgsn_analysis:
+                                                                st.caption(f"📁 Проанализированные файлы: {', '.join(wgsn_analysis['source_files'])}")
+
+                                                            # Показываем полный ответ для отладки (опционально)
+                                                            if st.session_state.get('debug_ai_analysis', False):
+                                                                with st.expander("🔍 Отладочная информация (полный ответ ИИ по WGSN)", expanded=False):
+                                                                    st.text(wgsn_analysis.get("raw_response", ""))
+
+                                                # Показываем полный ответ для отладки (опционально)
+                                                if st.session_state.get('debug_ai_analysis', False):
+                                                    with st.expander("🔍 Отладочная информация (полный ответ ИИ)", expanded=False):
+                                                        st.text(analysis_result.get("raw_response", ""))
+
+                                                # Раздел для загрузки отчетов и плана продаж
+                                                st.divider()
+                                                st.markdown("### 📊 План продаж на основе отчетов")
+
+                                                # Инициализация session_state для хранения отчетов комбинаций
+                                                if 'combination_reports' not in st.session_state:
+                                                    st.session_state['combination_reports'] = {}
+
+                                                # Загрузка отчета для комбинации
+                                                combo_report_key = f"report_{selected_combo_key}"
+                                                missing_reports_key = f"tovar_missing_{selected_combo_key}"
+
+                                                # АВТОМАТИЧЕСКАЯ ЗАГРУЗКА ИЗ ПАПКИ TOVAR
+                                                st.markdown("#### 🔄 Автоматическая загрузка из папки Tovar")
+                                                st.caption("Система автоматически найдет и загрузит отчеты для товаров этой комбинации из папки Tovar")
+
+                                                # Получаем артикулы из комбинации
+                                                combo_skus_list = [str(sku).replace(".0", "") for sku in combo_skus] if combo_skus else []
+
+                                                # Быстрая проверка причин отсутствия отчетов
+                                                check_missing_key = f"check_missing_{selected_combo_key}"
+                                                if st.button("🔍 Показать причины отсутствия отчетов", key=check_missing_key):
+                                                    with st.spinner("🔍 Проверяю наличие отчетов в папке Tovar..."):
+                                                        _, missing_reports = find_reports_with_missing(
+                                                            tuple(combo_skus_list),
+                                                            "Tovar",
+                                                        )
+                                                        st.session_state[missing_reports_key] = missing_reports
+
+                                                # Автоматическая загрузка при первом открытии, если отчет еще не загружен
+                                                auto_load_done_key = f"auto_load_done_{selected_combo_key}"
+                                                if (combo_report_key not in st.session_state.get('combination_reports', {}) and 
+                                                    auto_load_done_key not in st.session_state and
+                                                    combo_skus_list):
+                                                    # Пробуем автоматически загрузить
+                                                    with st.spinner("🔍 Автоматически ищу отчеты в папке Tovar..."):
+                                                        found_reports, missing_reports = find_reports_with_missing(
+                                                            tuple(combo_skus_list),
+                                                            "Tovar",
+                                                        )
+
+                                                        if found_reports:
+                                                            # Объединяем данные из всех отчетов
+                                                            all_reports_data = []
+                                                            loaded_skus = []
+
+                                                            for sku, report_info in found_reports.items():
+                                                                data = report_info['data'].copy()
+                                                                data['Артикул'] = sku
+                                                                all_reports_data.append(data)
+                                                                loaded_skus.append(sku)
+
+                                                            if all_reports_data:
+                                                                # Объединяем все данные
+                                                                combined_data = pd.concat(all_reports_data, ignore_index=True)
+
+                                                                # Группируем по дате и суммируем показатели
+                                                                aggregated_data = combined_data.groupby('Дата').agg({
+                                                                    'Заказы': 'sum',
+                                                                    'Продажи': 'sum',
+                                                                    'Средняя цена': 'mean'  # Средняя цена по всем товарам
+                                                                }).reset_index()
+
+                                                                # Сохраняем в session_state
+                                                                st.session_state['combination_reports'][combo_report_key] = {
+                                                                    'data': aggregated_data,
+                                                                    'combination': selected_combo_key,
+                                                                    'filename': f"Автоматически загружено из Tovar ({len(found_reports)} отчетов)",
+                                                                    'source': 'auto_tovar',
+                                                                    'loaded_skus': loaded_skus
+                                                                }
+
+                                                                st.session_state[auto_load_done_key] = True
+                                                                st.session_state[f"tovar_missing_{selected_combo_key}"] = missing_reports
+                                                                st.rerun()
+                                                        else:
+                                                            # Помечаем, что попытка была, чтобы не повторять
+                                                            st.session_state[auto_load_done_key] = True
+                                                        st.session_state[f"tovar_missing_{selected_combo_key}"] = missing_reports
+
+                                                # Кнопка для ручной автоматической загрузки
+                                                auto_load_key = f"auto_load_{selected_combo_key}"
+                                                if st.button("🔄 Автоматически загрузить отчеты из папки Tovar", key=auto_load_key, type="primary"):
+                                                    with st.spinner("🔍 Ищу отчеты в папке Tovar..."):
+                                                        # Ищем и загружаем отчеты
+                                                        found_reports, missing_reports = find_reports_with_missing(
+                                                            tuple(combo_skus_list),
+                                                            "Tovar",
+                                                        )
+
+                                                        if found_reports:
+                                                            # Объединяем данные из всех отчетов
+                                                            all_reports_data = []
+                                                            loaded_skus = []
+
+                                                            for sku, report_info in found_reports.items():
+                                                                data = report_info['data'].copy()
+                                                                data['Артикул'] = sku
+                                                                all_reports_data.append(data)
+                                                                loaded_skus.append(sku)
+
+                                                            if all_reports_data:
+                                                                # Объединяем все данные
+                                                                combined_data = pd.concat(all_reports_data, ignore_index=True)
+
+                                                                # Группируем по дате и суммируем показатели
+                                                                aggregated_data = combined_data.groupby('Дата').agg({
+                                                                    'Заказы': 'sum',
+                                                                    'Продажи': 'sum',
+                                                                    'Средняя цена': 'mean'  # Средняя цена по всем товарам
+                                                                }).reset_index()
+
+                                                                # Сохраняем в session_state
+                                                                st.session_state['combination_reports'][combo_report_key] = {
+                                                                    'data': aggregated_data,
+                                                                    'combination': selected_combo_key,
+                                                                    'filename': f"Автоматически загружено из Tovar ({len(found_reports)} отчетов)",
+                                                                    'source': 'auto_tovar',
+                                                                    'loaded_skus': loaded_skus
+                                                                }
+
+                                                                st.success(f"✅ Автоматически загружено {len(found_reports)} отчетов для артикулов: {', '.join(loaded_skus[:5])}{'...' if len(loaded_skus) > 5 else ''}")
+                                                                st.session_state[f"tovar_missing_{selected_combo_key}"] = missing_reports
+                                                                st.rerun()
+                                                            else:
+                                                                st.warning("⚠️ Не удалось обработать найденные отчеты")
+                                                        else:
+                                                            st.info(f"ℹ️ Не найдено отчетов в папке Tovar для артикулов: {', '.join(combo_skus_list[:5])}{'...' if len(combo_skus_list) > 5 else ''}")
+                                                        st.session_state[f"tovar_missing_{selected_combo_key}"] = missing_reports
+
+                                                        # Показываем какие артикулы есть в комбинации
+                                                        if combo_skus_list:
+                                                            with st.expander("📋 Артикулы в комбинации", expanded=False):
+                                                                st.write(", ".join(combo_skus_list))
+
+                                                # Проверяем, есть ли уже загруженные отчеты
+                                                if combo_report_key in st.session_state.get('combination_reports', {}):
+                                                    report_info = st.session_state['combination_reports'][combo_report_key]
+                                                    if report_info.get('source') == 'auto_tovar':
+                                                        st.success(f"✅ Отчеты загружены автоматически из папки Tovar")
+                                                        if 'loaded_skus' in report_info:
+                                                            st.caption(f"Загружено для артикулов: {', '.join(report_info['loaded_skus'][:5])}{'...' if len(report_info['loaded_skus']) > 5 else ''}")
+
+                                                # Показываем, для каких артикулов отчеты не найдены/не загружены
+                                                missing_reports_key = f"tovar_missing_{selected_combo_key}"
+                                                if st.session_state.get(missing_reports_key):
+                                                    missing_reports = st.session_state[missing_reports_key]
+                                                    st.warning(
+                                                        f"⚠️ Отчеты не загружены для {len(missing_reports)} артикулов."
+                                                    )
+                                                    with st.expander("❗️Отчеты не загружены (причины)", expanded=False):
+                                                        st.markdown(
+                                                            "\n".join(
+                                                                [f"- {sku}: {reason}" for sku, reason in missing_reports.items()]
+                                                            )
+                                                        )
+
+                                                st.divider()
+
+                                                # РУЧНАЯ ЗАГРУЗКА
+                                                st.markdown("#### 📤 Ручная загрузка отчета")
+                                                st.caption("Или загрузите Excel/CSV файл вручную с данными по дням (заказы, продажи, средняя цена)")
+                                                st.info("💡 **Совет:** Вы можете загрузить отчеты для разных комбинаций товаров. Все загруженные отчеты будут отображаться на одном графике для сравнения.")
+
+                                                # Показываем информацию о текущем отчете, если он загружен автоматически
+                                                if combo_report_key in st.session_state.get('combination_reports', {}):
+                                                    current_report = st.session_state['combination_reports'][combo_report_key]
+                                                    if current_report.get('source') == 'auto_tovar':
+                                                        st.info(f"📁 Текущий отчет: {current_report.get('filename', 'Автоматически загружен')}")
+                                                        if st.button("🔄 Обновить автоматическую загрузку", key=f"refresh_auto_{selected_combo_key}"):
+                                                            # Удаляем старый отчет и загружаем заново
+                                                            if combo_report_key in st.session_state['combination_reports']:
+                                                                del st.session_state['combination_reports'][combo_report_key]
+                                                            st.rerun()
+
+                                                uploaded_report = st.file_uploader(
+                                                    "Выберите файл с отчетом (ручная загрузка)",
+                                                    type=['xlsx', 'xls', 'csv'],
+                                                    key=f"report_uploader_{selected_combo_key}",
+                                                    help="Файл должен содержать колонки: Дата, Заказы, Продажи (или Выкупы), Средняя цена. Ручная загрузка заменит автоматически загруженный отчет."
+                                                )
+
+                                                if uploaded_report is not None:
+                                                    try:
+                                                        # Обрабатываем загруженный файл
+                                                        if uploaded_report.name.endswith('.csv'):
+                                                            report_df = pd.read_csv(uploaded_report)
+                                                        else:
+                                                            report_df = pd.read_excel(uploaded_report)
+
+                                                        # Нормализуем названия колонок
+                                                        report_df.columns = report_df.columns.str.strip()
+
+                                                        # Ищем колонку с датой
+                                                        date_col = None
+                                                        for col in report_df.columns:
+                                                            if 'дата' in col.lower() or 'date' in col.lower():
+                                                                date_col = col
+                                                                break
+
+                                                        if date_col is None:
+                                                            st.error("❌ Не найдена колонка с датой в отчете")
+                                                        else:
+                                                            # Преобразуем дату
+                                                            report_df[date_col] = pd.to_datetime(report_df[date_col], errors='coerce')
+                                                            report_df = report_df.dropna(subset=[date_col])
+
+                                                            # Ищем колонки с данными
+                                                            orders_col = None
+                                                            sales_col = None
+                                                            price_col = None
+
+                                                            for col in report_df.columns:
+                                                                col_lower = col.lower()
+                                                                if ('заказ' in col_lower or 'order' in col_lower) and orders_col is None:
+                                                                    orders_col = col
+                                                                elif ('продаж' in col_lower or 'выкуп' in col_lower or 'sale' in col_lower) and sales_col is None:
+                                                                    sales_col = col
+                                                                elif ('цена' in col_lower or 'price' in col_lower) and price_col is None:
+                                                                    price_col = col
+
+                                                            # Создаем нормализованный DataFrame
+                                                            normalized_data = pd.DataFrame()
+                                                            normalized_data['Дата'] = report_df[date_col]
+                                                            normalized_data['Заказы'] = report_df[orders_col] if orders_col else 0
+                                                            normalized_data['Продажи'] = report_df[sales_col] if sales_col else 0
+                                                            normalized_data['Средняя цена'] = report_df[price_col] if price_col else 0
+
+                                                            # Сохраняем данные в session_state
+                                                            st.session_state['combination_reports'][combo_report_key] = {
+                                                                'data': normalized_data,
+                                                                'combination': selected_combo_key,
+                                                                'filename': uploaded_report.name
+                                                            }
+
+                                                            st.success(f"✅ Отчет загружен успешно! Загружено {len(normalized_data)} записей")
+
+                                                            # Показываем предпросмотр данных
+                                                            with st.expander("📋 Предпросмотр данных", expanded=False):
+                                                                st.dataframe(normalized_data.head(10))
+                                                    except Exception as e:
+                                                        st.error(f"❌ Ошибка при обработке файла: {str(e)}")
+
+                                                # Показываем загруженные отчеты и строим график
+                                                if combo_report_key in st.session_state.get('combination_reports', {}):
+                                                    report_data = st.session_state['combination_reports'][combo_report_key]['data']
+
+                                                    st.markdown("#### 📈 График плана продаж")
+
+                                                    # Получаем все загруженные отчеты для сравнения
+                                                    all_reports = st.session_state.get('combination_reports', {})
+
+                                                    if len(all_reports) > 0:
+                                                        # Создаем объединенный DataFrame для сравнения
+                                                        comparison_data = []
+
+                                                        for report_key, report_info in all_reports.items():
+                                                            data = report_info['data'].copy()
+                                                            data['Комбинация'] = report_info['combination']
+                                                            comparison_data.append(data)
+
+                                                        if comparison_data:
+                                                            combined_df = pd.concat(comparison_data, ignore_index=True)
+
+                                                            # Находим общий период дат
+                                                            all_dates = combined_df['Дата'].unique()
+                                                            all_dates = sorted(all_dates)
+
+                                                            # Создаем полный диапазон дат
+                                                            if len(all_dates) > 1:
+                                                                date_range = pd.date_range(start=all_dates[0], end=all_dates[-1], freq='D')
+                                                            else:
+                                                                date_range = pd.date_range(start=all_dates[0], periods=30, freq='D')
+
+                                                            # Строим график с тремя вариантами
+                                                            fig = go.Figure()
+
+                                                            # Для каждой комбинации рассчитываем статистику
+                                                            for combo_name in combined_df['Комбинация'].unique():
+                                                                combo_data = combined_df[combined_df['Комбинация'] == combo_name].copy()
+
+                                                                # Сортируем по дате
+                                                                combo_data = combo_data.sort_values('Дата')
+
+                                                                # Создаем полный ряд дат для этой комбинации
+                                                                full_combo_data = pd.DataFrame({'Дата': date_range})
+                                                                full_combo_data = full_combo_data.merge(
+                                                                    combo_data[['Дата', 'Заказы', 'Продажи', 'Средняя цена']],
+                                                                    on='Дата',
+                                                                    how='left'
+                                                                )
+                                                                full_combo_data = full_combo_data.fillna(0)
+
+                                                                # Рассчитываем продажи (если есть средняя цена и заказы)
+                                                                if 'Средняя цена' in full_combo_data.columns and 'Заказы' in full_combo_data.columns:
+                                                                    full_combo_data['Выручка'] = full_combo_data['Заказы'] * full_combo_data['Средняя цена']
+
+                                                                # Рассчитываем статистику для трех вариантов
+                                                                # Используем только фактические данные (не заполненные нулями)
+                                                                actual_sales_data = combo_data[combo_data['Продажи'] > 0]['Продажи'].values
+
+                                                                if len(actual_sales_data) > 0:
+                                                                    sales_mean = np.mean(actual_sales_data)
+                                                                    sales_std = np.std(actual_sales_data) if len(actual_sales_data) > 1 else 0
+
+                                                                    # Низкий вариант (среднее - 1 стандартное отклонение, но не меньше минимального значения)
+                                                                    low_plan = max(0, sales_mean - sales_std)
+                                                                    # Средний вариант (среднее)
+                                                                    mid_plan = sales_mean
+                                                                    # Высокий вариант (среднее + 1 стандартное отклонение)
+                                                                    high_plan = sales_mean + sales_std
+                                                                else:
+                                                                    # Если нет данных о продажах, используем заказы как основу
+                                                                    actual_orders_data = combo_data[combo_data['Заказы'] > 0]['Заказы'].values
+                                                                    if len(actual_orders_data) > 0:
+                                                                        # Предполагаем процент выкупа 25% по умолчанию
+                                                                        buyout_rate = st.session_state.get("buyout_pct", 25) / 100.0
+                                                                        orders_mean = np.mean(actual_orders_data)
+                                                                        orders_std = np.std(actual_orders_data) if len(actual_orders_data) > 1 else 0
+
+                                                                        sales_mean = orders_mean * buyout_rate
+                                                                        sales_std = orders_std * buyout_rate
+
+                                                                        low_plan = max(0, sales_mean - sales_std)
+                                                                        mid_plan = sales_mean
+                                                                        high_plan = sales_mean + sales_std
+                                                                    else:
+                                                                        # Если вообще нет данных, пропускаем эту комбинацию
+                                                                        continue
+
+                                                                    # Добавляем линии плана
+                                                                    fig.add_trace(go.Scatter(
+                                                                        x=date_range,
+                                                                        y=[low_plan] * len(date_range),
+                                                                        mode='lines',
+                                                                        name=f'{combo_name} - Низкий план',
+                                                                        line=dict(color='red', width=2),
+                                                                        hovertemplate='Низкий план: %{y:.1f}<extra></extra>'
+                                                                    ))
+
+                                                                    fig.add_trace(go.Scatter(
+                                                                        x=date_range,
+                                                                        y=[mid_plan] * len(date_range),
+                                                                        mode='lines',
+                                                                        name=f'{combo_name} - Средний план',
+                                                                        line=dict(color='orange', width=2),
+                                                                        hovertemplate='Средний план: %{y:.1f}<extra></extra>'
+                                                                    ))
+
+                                                                    fig.add_trace(go.Scatter(
+                                                                        x=date_range,
+                                                                        y=[high_plan] * len(date_range),
+                                                                        mode='lines',
+                                                                        name=f'{combo_name} - Высокий план',
+                                                                        line=dict(color='green', width=2),
+                                                                        hovertemplate='Высокий план: %{y:.1f}<extra></extra>'
+                                                                    ))
+
+                                                                    # Добавляем фактические данные (если есть)
+                                                                    # Фильтруем только записи с данными (не нули)
+                                                                    actual_data = combo_data[combo_data['Продажи'] > 0].copy()
+
+                                                                    if len(actual_data) > 0:
+                                                                        actual_dates = actual_data['Дата'].values
+                                                                        actual_sales = actual_data['Продажи'].values
+
+                                                                        fig.add_trace(go.Scatter(
+                                                                            x=actual_dates,
+                                                                            y=actual_sales,
+                                                                            mode='lines+markers',
+                                                                            name=f'{combo_name} - Факт',
+                                                                            line=dict(color='blue', width=2),
+                                                                            marker=dict(size=6),
+                                                                            hovertemplate='Дата: %{x|%d.%m.%Y}<br>Продажи: %{y:.1f}<extra></extra>',
+                                                                            connectgaps=False  # Не соединять пропуски
+                                                                        ))
+
+                                                            # Настройка графика
+                                                            fig.update_layout(
+                                                                title='План продаж: Низкий, Средний, Высокий варианты',
+                                                                xaxis_title='Дата',
+                                                                yaxis_title='Продажи, шт',
+                                                                hovermode='x unified',
+                                                                height=600,
+                                                                legend=dict(
+                                                                    orientation="v",
+                                                                    yanchor="top",
+                                                                    y=1,
+                                                                    xanchor="left",
+                                                                    x=1.01
+                                                                )
+                                                            )
+
+                                                            st.plotly_chart(fig, use_container_width=True)
+
+                                                            # Показываем статистику
+                                                            st.markdown("#### 📊 Статистика планов")
+                                                            stats_cols = st.columns(min(len(all_reports), 4))  # Максимум 4 колонки
+
+                                                            for idx, (report_key, report_info) in enumerate(all_reports.items()):
+                                                                if idx >= len(stats_cols):
+                                                                    break
+                                                                with stats_cols[idx]:
+                                                                    combo_name = report_info['combination']
+                                                                    data = report_info['data']
+
+                                                                    # Используем только фактические данные
+                                                                    actual_sales = data[data['Продажи'] > 0]['Продажи'].values
+
+                                                                    if len(actual_sales) > 0:
+                                                                        sales_mean = np.mean(actual_sales)
+                                                                        sales_std = np.std(actual_sales) if len(actual_sales) > 1 else 0
+
+                                                                        # Показываем количество дней с данными
+                                                                        days_with_data = len(actual_sales)
+                                                                        total_days = len(data)
+
+                                                                        st.markdown(f"**{combo_name[:30]}...**" if len(combo_name) > 30 else f"**{combo_name}**")
+                                                                        st.caption(f"Дней с данными: {days_with_data} из {total_days}")
+                                                                        st.metric("Низкий план", f"{max(0, sales_mean - sales_std):.1f}")
+                                                                        st.metric("Средний план", f"{sales_mean:.1f}")
+                                                                        st.metric("Высокий план", f"{sales_mean + sales_std:.1f}")
+                                                                    else:
+                                                                        # Если нет данных о продажах, используем заказы
+                                                                        actual_orders = data[data['Заказы'] > 0]['Заказы'].values
+                                                                        if len(actual_orders) > 0:
+                                                                            buyout_rate = st.session_state.get("buyout_pct", 25) / 100.0
+                                                                            orders_mean = np.mean(actual_orders)
+                                                                            orders_std = np.std(actual_orders) if len(actual_orders) > 1 else 0
+
+                                                                            sales_mean = orders_mean * buyout_rate
+                                                                            sales_std = orders_std * buyout_rate
+
+                                                                            st.markdown(f"**{combo_name[:30]}...**" if len(combo_name) > 30 else f"**{combo_name}**")
+                                                                            st.caption("⚠️ Рассчитано на основе заказов")
+                                                                            st.metric("Низкий план", f"{max(0, sales_mean - sales_std):.1f}")
+                                                                            st.metric("Средний план", f"{sales_mean:.1f}")
+                                                                            st.metric("Высокий план", f"{sales_mean + sales_std:.1f}")
+                                                                        else:
+                                                                            st.markdown(f"**{combo_name[:30]}...**" if len(combo_name) > 30 else f"**{combo_name}**")
+                                                                            st.warning("Нет данных")
+
+                                                            # Кнопка для удаления отчета
+                                                            if st.button(f"🗑️ Удалить отчет для '{selected_combo_key}'", key=f"delete_report_{selected_combo_key}"):
+                                                                if combo_report_key in st.session_state['combination_reports']:
+                                                                    del st.session_state['combination_reports'][combo_report_key]
+                                                                st.rerun()
+                                                    else:
+                                                        st.info("📊 Загрузите отчет для построения графика плана продаж")
+                                else:
+                                    st.warning("⚠️ Не найдено товаров для выбранной комбинации")
+                            else:
+                                st.warning("⚠️ Комбинация не найдена в данных. Возможно, данные были изменены.")
+                    else:
+                        st.info("ℹ️ Выберите комбинацию из списка выше")
+                else:
+                    st.warning("⚠️ Все комбинации исключены. Сбросьте исключения, чтобы увидеть топ-10.")
+            else:
+                st.info("ℹ️ Не найдено комбинаций с полными данными по всем параметрам")
+        else:
+            st.info("ℹ️ Не найдено товаров с заполненными всеми параметрами. Заполните параметры для всех товаров, чтобы увидеть лучшие комбинации.")
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+Общие функции для вкладок дашборда
+"""
+import os
+import json
+import importlib
+
+import pandas as pd
+import streamlit as st
+
+from utils.perf import perf_timed
+from utils.lazy import module_available
+from utils.wb_utils import extract_sku_from_filename
+from utils.reports import load_report_from_tovar_folder
+from utils.ai_analysis import analyze_combination_products_with_ai_core
+
+# Наличие OpenAI проверяется без импорта: сама библиотека загружается
+# в utils.ai_analysis при первом вызове
+OPENAI_AVAILABLE = module_available("openai")
+
+
+def filter_skus_by_analysis(skus: list) -> list:
+    """
+    Фильтрует артикулы по текущей видимой выборке в разделе "Анализ данных".
+    """
+    if not skus:
+        return skus
+    allowed = st.session_state.get("analysis_filtered_skus", [])
+    if not allowed:
+        return skus
+    allowed_set = {str(s).replace(".0", "") for s in allowed}
+    return [s for s in skus if str(s).replace(".0", "") in allowed_set]
+
+
+def filter_skus_by_analysis_with_details(skus: list):
+    """
+    Фильтрует артикулы по текущей видимой выборке в разделе "Анализ данных"
+    и возвращает список исключенных артикулов.
+    """
+    if not skus:
+        return skus, []
+    allowed = st.session_state.get("analysis_filtered_skus", [])
+    if not allowed:
+        return skus, []
+    allowed_set = {str(s).replace(".0", "") for s in allowed}
+    filtered = []
+    excluded = []
+    for sku in skus:
+        sku_key = str(sku).replace(".0", "")
+        if sku_key in allowed_set:
+            filtered.append(sku)
+        else:
+            excluded.append(sku)
+    return filtered, excluded
+
+
+def load_ai_cache(cache_file: str) -> dict:
+    try:
+        if os.path.exists(cache_file):
+            with open(cache_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+    except Exception:
+        pass
+    return {}
+
+
+def save_ai_cache(cache_file: str, cache_data: dict) -> None:
+    try:
+        with open(cache_file, "w", encoding="utf-8") as f:
+            json.dump(cache_data, f, ensure_ascii=False, indent=2)
+    except Exception:
+        pass
+
+
+@st.cache_data(ttl=3600)  # Кэш на 1 час
+def load_report_from_tovar_folder_cached(filepath: str) -> pd.DataFrame:
+    """Обёртка с кешированием для load_report_from_tovar_folder"""
+    return load_report_from_tovar_folder(filepath)
+
+
+@perf_timed()
+def find_reports_with_missing(skus: tuple, tovar_folder: str = "Tovar") -> tuple:
+    """
+    Безопасно получает отчеты и причины отсутствия, даже если старая версия функции без return_missing.
+    """
+    # Перезагружаем модуль, чтобы применялись последние правки парсера
+    import utils.reports as reports_module
+    reports_module = importlib.reload(reports_module)
+    try:
+        return reports_module.find_and_load_reports_from_tovar(skus, tovar_folder, return_missing=True)
+    except TypeError:
+        # Фоллбек для старой сигнатуры
+        reports = reports_module.find_and_load_reports_from_tovar(skus, tovar_folder)
+        missing = {}
+        skus_str = [str(sku).replace(".0", "") for sku in skus]
+        if not os.path.exists(tovar_folder):
+            for sku in skus_str:
+                missing[sku] = "Папка Tovar не найдена"
+            return reports, missing
+        files = os.listdir(tovar_folder)
+        for sku in skus_str:
+            filename = None
+            for candidate in files:
+                file_sku = extract_sku_from_filename(candidate)
+                if file_sku == sku:
+                    filename = candidate
+                    break
+            if not filename:
+                missing[sku] = "Отчет не найден в папке Tovar"
+                continue
+            filepath = os.path.join(tovar_folder, filename)
+            report_data = reports_module.load_report_from_tovar_folder(filepath)
+            if report_data is None:
+                last_error = reports_module.get_last_report_load_error() if hasattr(reports_module, "get_last_report_load_error") else None
+                if last_error:
+                    missing[sku] = f"Не удалось прочитать файл: {filename} ({last_error})"
+                else:
+                    missing[sku] = f"Не удалось прочитать файл: {filename}"
+            elif report_data.empty:
+                missing[sku] = f"Файл пустой или без данных: {filename}"
+        return reports, missing
+
+
+def enrich_missing_reports(missing_reports: dict, skus: list, tovar_folder: str = "Tovar") -> dict:
+    """
+    Уточняет причины ошибок чтения, если они слишком общие.
+    """
+    if not missing_reports:
+        return missing_reports
+    if not os.path.exists(tovar_folder):
+        return missing_reports
+
+    import utils.reports as reports_module
+    reports_module = importlib.reload(reports_module)
+    files = os.listdir(tovar_folder)
+    sku_to_file = {}
+    for filename in files:
+        file_sku = extract_sku_from_filename(filename)
+        if file_sku:
+            sku_to_file[file_sku] = filename
+
+    enriched = dict(missing_reports)
+    for sku in skus:
+        sku_str = str(sku).replace(".0", "")
+        reason = enriched.get(sku_str)
+        if not reason:
+            continue
+        if "Не удалось прочитать файл" in reason and "(" not in reason:
+            filename = sku_to_file.get(sku_str)
+            if not filename:
+                continue
+            filepath = os.path.join(tovar_folder, filename)
+            report_data = reports_module.load_report_from_tovar_folder(filepath)
+            if report_data is not None and not report_data.empty:
+                # Парсер уже исправился — убираем из списка проблемных
+                enriched.pop(sku_str, None)
+                continue
+            last_error = reports_module.get_last_report_load_error() if hasattr(reports_module, "get_last_report_load_error") else None
+            if last_error:
+                enriched[sku_str] = f"Не удалось прочитать файл: {filename} ({last_error})"
+                continue
+            # Фоллбек: пытаемся открыть файл напрямую, чтобы получить исключение
+            try:
+                _ = pd.read_excel(filepath)
+                # Если файл читается, но парсер вернул None, значит проблема в структуре данных
+                try:
+                    raw_df = pd.read_excel(filepath, header=None)
+                    header_idx = None
+                    keywords = ['дата', 'артикул', 'заказ', 'продаж', 'выручк', 'средн']
+                    for i in range(min(len(raw_df), 60)):
+                        row_values = raw_df.iloc[i].astype(str).str.strip().str.lower()
+                        if not any(('дата' in val or val == 'date') for val in row_values):
+                            continue
+                        hits = 0
+                        for val in row_values:
+                            for kw in keywords:
+                                if kw in val:
+                                    hits += 1
+                                    break
+                        if hits >= 2:
+                            header_idx = i
+                            break
+                    if header_idx is not None:
+                        cols = [str(c) for c in list(raw_df.iloc[header_idx])[:12]]
+                        enriched[sku_str] = (
+                            f"Не удалось прочитать файл: {filename} "
+                            f"(заголовок на строке {header_idx + 1}, колонки: {', '.join(cols)})"
+                        )
+                    else:
+                        enriched[sku_str] = f"Не удалось прочитать файл: {filename} (не найден заголовок с датой)"
+                except Exception:
+                    enriched[sku_str] = f"Не удалось прочитать файл: {filename} (неожиданный формат данных)"
+            except Exception as e:
+                err_msg = str(e).strip()
+                if err_msg:
+                    enriched[sku_str] = f"Не удалось прочитать файл: {filename} ({type(e).__name__}: {err_msg})"
+                else:
+                    enriched[sku_str] = f"Не удалось прочитать файл: {filename} ({type(e).__name__})"
+    return enriched
+
+
+def analyze_combination_products_with_ai(combo_products_df, combination_key: str, category: str = "Рашрашд мужской (компрессионная одежда)") -> dict:
+    """
+    Анализирует товары в комбинации с помощью ИИ для получения рекомендаций по улучшению.
+    Обёртка для analyze_combination_products_with_ai_core, которая получает API ключ из session_state.
+    
+    Args:
+        combo_products_df: DataFrame с товарами комбинации
+        combination_key: Ключ комбинации (параметры)
+        category: Категория товаров (по умолчанию "Рашрашд мужской (компрессионная одежда)")
+        
+    Returns:
+        Словарь с анализом и рекомендациями
+    """
+    if not OPENAI_AVAILABLE:
+        return {
+            "error": "OpenAI не доступен. Установите библиотеку openai для использования этой функции."
+        }
+    
+    # Получаем API ключ
+    api_key = st.session_state.get('openai_api_key', '')
+    if not api_key:
+        try:
+            api_key = st.secrets.get('openai_api_key', '')
+        except:
+            pass
+    
+    if not api_key:
+        return {
+            "error": "API ключ OpenAI не найден. Укажите ключ в настройках."
+        }
+    
+    return analyze_combination_products_with_ai_core(
+        combo_products_df=combo_products_df,
+        combination_key=combination_key,
+        category=category,
+        api_key=api_key
+    )
@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+"""
+Вкладка «🔮 Прогнозирование» (Prophet или быстрый NumPy-движок)
+
+Prophet импортируется внутри utils.prophet_forecast только при нажатии
+«Создать прогноз», а не при отрисовке вкладки.
+
+Здесь же — пакетный прогноз по артикулам и комбинациям (utils.forecast_batch)
+и блок готового прогноза для вкладок «План продаж» и «Расчет заказа».
+"""
+import numpy as np
+import streamlit as st
+
+from utils.prophet_forecast import (
+    prepare_data_for_prophet, create_prophet_forecast,
+    plot_prophet_forecast, plot_prophet_components,
+    available_forecast_engines, FORECAST_ENGINE_NAMES
+)
+from utils.forecast_batch import (
+    available_engines, build_series_from_reports, run_batch_forecast,
+    load_forecast_table, get_forecast, combo_series_id, DEFAULT_CONFIG
+)
+from utils.reports import find_and_load_reports_from_tovar
+
+
+def render(df):
+    """Отрисовывает вкладку прогнозирования выбранной метрики"""
+    st.subheader("🔮 Прогнозирование")
+
+    # Проверяем наличие данных
+    if df is not None and not df.empty:
+        # Настройки прогнозирования
+        col_settings1, col_settings2 = st.columns(2)
+
+        with col_settings1:
+            # Выбор метрики для прогнозирования
+            numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
+            if numeric_columns:
+                metric_choice = st.selectbox(
+                    "Выберите метрику для прогнозирования:",
+                    numeric_columns,
+                    key="prophet_metric_choice"
+                )
+            else:
+                st.warning("Нет числовых колонок для прогнозирования")
+                metric_choice = None
+
+        with col_settings2:
+            # Выбор колонки с датами
+            date_columns = []
+            for col in df.columns:
+                if df[col].dtype == 'datetime64[ns]' or 'дата' in col.lower() or 'date' in col.lower():
+                    date_columns.append(col)
+
+            if date_columns:
+                date_choice = st.selectbox(
+                    "Выберите колонку с датами (опционально):",
+                    ["Автоматически"] + date_columns,
+                    key="prophet_date_choice"
+                )
+                if date_choice == "Автоматически":
+                    date_choice = None
+            else:
+                date_choice = None
+                st.info("Колонка с датами не найдена, будет создана автоматически")
+
+        # Дополнительные настройки
+        col_periods, col_seasonality, col_engine = st.columns(3)
+
+        with col_periods:
+            forecast_periods = st.number_input(
+                "Период прогнозирования (дни):",
+                min_value=1,
+                max_value=365,
+                value=30,
+                key="prophet_periods"
+            )
+
+        with col_seasonality:
+            seasonality_mode = st.selectbox(
+                "Режим сезонности:",
+                ["additive", "multiplicative"],
+                key="prophet_seasonality"
+            )
+
+        with col_engine:
+            forecast_engine = st.selectbox(
+                "Движок прогноза:",
+                available_forecast_engines(),
+                format_func=lambda name: FORECAST_ENGINE_NAMES.get(name, name),
+                key="prophet_engine",
+                help="Быстрый движок: тренд + недельная/годовая сезонность методом наименьших квадратов, "
+                     "доли секунды вместо нескольких секунд у Prophet"
+            )
+
+        # Кнопка создания прогноза
+        if st.button("🔮 Создать прогноз", type="primary", key="create_forecast_btn"):
+            if metric_choice:
+                with st.spinner("Создание прогноза..."):
+                    # Подготавливаем данные
+                    df_prophet = prepare_data_for_prophet(df, metric_choice, date_choice)
+
+                    if df_prophet is not None and len(df_prophet) > 1:
+                        # Создаем прогноз
+                        try:
+                            model, forecast, future = create_prophet_forecast(
+                                df_prophet, 
+                                periods=forecast_periods,
+                                seasonality_mode=seasonality_mode,
+                                engine=forecast_engine
+                            )
+                            forecast_error = None
+                        except Exception as e:
+                            model, forecast, future = None, None, None
+                            forecast_error = e
+
+                        if forecast_error is not None:
+                            engine_name = FORECAST_ENGINE_NAMES.get(forecast_engine, forecast_engine)
+                            st.error(f"❌ Ошибка движка «{engine_name}»: {forecast_error}")
+                        elif model and forecast is not None:
+                            # Отображаем основной график прогноза
+                            st.subheader("📈 Прогноз")
+                            fig_forecast = plot_prophet_forecast(
+                                model, 
+                                forecast, 
+                                f"Прогноз {metric_choice}"
+                            )
+                            if fig_forecast:
+                                st.plotly_chart(fig_forecast, use_container_width=True)
+
+                            # Отображаем компоненты прогноза
+                            st.subheader("🔍 Компоненты прогноза")
+                            fig_components = plot_prophet_components(
+                                model, 
+                                forecast, 
+                                f"Компоненты прогноза {metric_choice}"
+                            )
+                            if fig_components:
+                                st.plotly_chart(fig_components, use_container_width=True)
+
+                            # Статистика прогноза
+                            st.subheader("📊 Статистика прогноза")
+
+                            # Получаем последние прогнозные значения
+                            forecast_future = forecast[forecast['ds'] > df_prophet['ds'].max()]
+
+                            if not forecast_future.empty:
+                                col_stat1, col_stat2, col_stat3, col_stat4 = st.columns(4)
+
+                                with col_stat1:
+                                    mean_forecast = forecast_future['yhat'].mean()
+                                    st.metric("Средний прогноз", f"{mean_forecast:,.0f}")
+
+                                with col_stat2:
+                                    max_forecast = forecast_future['yhat'].max()
+                                    st.metric("Максимальный прогноз", f"{max_forecast:,.0f}")
+
+                                with col_stat3:
+                                    min_forecast = forecast_future['yhat'].min()
+                                    st.metric("Минимальный прогноз", f"{min_forecast:,.0f}")
+
+                                with col_stat4:
+                                    trend = forecast_future['trend'].iloc[-1] - forecast_future['trend'].iloc[0]
+                                    st.metric("Изменение тренда", f"{trend:,.0f}")
+
+                                # Таблица с прогнозными значениями
+                                st.subheader("📋 Детальный прогноз")
+                                forecast_display = forecast_future[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
+                                forecast_display.columns = ['Дата', 'Прогноз', 'Нижняя граница', 'Верхняя граница']
+                                forecast_display['Дата'] = forecast_display['Дата'].dt.strftime('%Y-%m-%d')
+
+                                st.dataframe(
+                                    forecast_display,
+                                    use_container_width=True,
+                                    hide_index=True
+                                )
+
+                                # Экспорт прогноза
+                                csv_data = forecast_display.to_csv(index=False)
+                                st.download_button(
+                                    label="💾 Скачать прогноз (CSV)",
+                                    data=csv_data,
+                                    file_name=f"prophet_forecast_{metric_choice}.csv",
+                                    mime="text/csv"
+                                )
+
+                        else:
+                            st.error("Не удалось создать прогноз. Проверьте данные.")
+                    else:
+                        st.error("Недостаточно данных для создания прогноза. Нужно минимум 2 точки данных.")
+            else:
+                st.warning("Выберите метрику для прогнозирования")
+
+    else:
+        st.info("📊 Загрузите данные в первой вкладке для создания прогнозов")
+
+    render_batch()
+
+
+def _top_combinations():
+    """Топ комбинаций из «Аналитики по параметрам»: {комбинация: [артикулы]}"""
+    cleaned_combo_to_skus = st.session_state.get('cleaned_combo_to_skus', {})
+    combos = {}
+    for combo in st.session_state.get('top_10_combinations', []):
+        combo_key = combo.get("Комбинация", "") if isinstance(combo, dict) else str(combo)
+        if combo_key in cleaned_combo_to_skus:
+            combos[combo_key] = list(cleaned_combo_to_skus[combo_key])
+    return combos
+
+
+def render_batch():
+    """Пакетный прогноз заказов для всех артикулов и комбинаций топа"""
+    with st.expander("📦 Пакетный прогноз по артикулам и комбинациям", expanded=False):
+        st.caption(
+            "Прогноз заказов по отчетам из папки Tovar для каждого артикула и комбинации топа. "
+            "Модели обучаются параллельно; неизмененные ряды не переобучаются, "
+            "при появлении новых дней модель дообучается с прошлых параметров."
+        )
+
+        table = load_forecast_table()
+        if not table.empty:
+            st.caption(
+                f"В таблице прогнозов: {table['series_id'].nunique()} рядов, "
+                f"обновлено {table['fitted_at'].max()}"
+            )
+
+        combos = _top_combinations()
+        if not combos:
+            st.info("ℹ️ Сначала сформируйте топ комбинаций во вкладке '📈 Аналитика по параметрам'")
+            return
+
+        engines = available_engines()
+        if not engines:
+            st.warning("⚠️ Нет доступных движков прогноза (Prophet не установлен)")
+            return
+
+        col_engine, col_periods, col_workers = st.columns(3)
+        with col_engine:
+            engine = st.selectbox("Движок:", engines, key="batch_forecast_engine")
+        with col_periods:
+            periods = st.number_input(
+                "Горизонт (дни):", min_value=7, max_value=365,
+                value=DEFAULT_CONFIG["periods"], key="batch_forecast_periods"
+            )
+        with col_workers:
+            workers = st.number_input(
+                "Процессов:", min_value=1, max_value=32, value=4, key="batch_forecast_workers"
+            )
+
+        if st.button("🚀 Построить прогнозы", type="primary", key="batch_forecast_btn"):
+            skus = tuple(sorted({str(s).replace(".0", "") for skus in combos.values() for s in skus}))
+            with st.spinner(f"Загрузка отчетов для {len(skus)} артикулов..."):
+                reports = find_and_load_reports_from_tovar(skus, "Tovar")
+                series = build_series_from_reports(reports, combos, metric="Заказы")
+
+            if not series:
+                st.warning("⚠️ В папке Tovar нет отчетов для артикулов топа")
+                return
+
+            progress_bar = st.progress(0.0)
+            report = run_batch_forecast(
+                series,
+                {"engine": engine, "periods": int(periods)},
+                max_workers=int(workers),
+                progress=lambda done, total: progress_bar.progress(done / total),
+            )
+            progress_bar.empty()
+
+            st.success(
+                f"✅ Обучено: {len(report['fitted'])} (из них с тёплого старта: {len(report['warm'])}), "
+                f"без изменений: {len(report['reused'])}"
+            )
+            if report["skipped"]:
+                st.caption(f"Пропущено коротких рядов: {len(report['skipped'])}")
+            if report["failed"]:
+                with st.expander(f"❌ Ошибки: {len(report['failed'])}"):
+                    for series_id, error in report["failed"].items():
+                        st.write(f"- {series_id}: {error}")
+
+
+def render_forecast_summary(combination):
+    """
+    Готовый прогноз комбинации из таблицы прогнозов (без обучения моделей).
+    Используется во вкладках «План продаж» и «Расчет заказа».
+    """
+    forecast = get_forecast(combo_series_id(combination))
+    if forecast.empty:
+        st.caption("🔮 Пакетного прогноза для этой комбинации нет — его можно построить во вкладке прогнозирования")
+        return None
+
+    horizon = len(forecast)
+    with st.expander(f"🔮 Пакетный прогноз заказов ({forecast['engine'].iloc[0]}, {horizon} дн.)", expanded=False):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Заказы за 30 дней", f"{forecast['yhat'].head(30).sum():,.0f}")
+        with col2:
+            st.metric(f"Заказы за {horizon} дней", f"{forecast['yhat'].sum():,.0f}")
+        with col3:
+            st.metric("В среднем в день", f"{forecast['yhat'].mean():,.1f}")
+
+        forecast_display = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
+        forecast_display.columns = ['Дата', 'Прогноз', 'Нижняя граница', 'Верхняя граница']
+        forecast_display['Дата'] = forecast_display['Дата'].dt.strftime('%Y-%m-%d')
+        st.dataframe(forecast_display, use_container_width=True, hide_index=True, height=240)
+        st.caption(f"Обновлено: {forecast['fitted_at'].iloc[0]}")
+    return forecast
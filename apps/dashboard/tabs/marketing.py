@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+Вкладка «📣 Маркетинг»
+"""
+import os
+import importlib
+
+import streamlit as st
+
+from .common import filter_skus_by_analysis_with_details, load_ai_cache, save_ai_cache
+
+
+def render():
+    """Отрисовывает вкладку маркетинг-анализа главных фото по топ-комбинациям"""
+    st.subheader("📣 Маркетинг")
+    marketing_cache_file = "ai_marketing_cache.json"
+    marketing_cache = load_ai_cache(marketing_cache_file)
+
+    # Проверяем наличие данных о комбинациях
+    top_10_combinations = st.session_state.get('top_10_combinations', [])
+    cleaned_combo_to_skus = st.session_state.get('cleaned_combo_to_skus', {})
+
+    if not top_10_combinations:
+        st.info("ℹ️ Сначала перейдите во вкладку '📈 Аналитика по параметрам' и сформируйте топ комбинации.")
+    else:
+        combo_list = []
+        for combo in top_10_combinations:
+            if isinstance(combo, dict):
+                combo_key = combo.get("Комбинация", "")
+            else:
+                combo_key = str(combo)
+            if combo_key and combo_key in cleaned_combo_to_skus:
+                skus = cleaned_combo_to_skus[combo_key]
+                if skus:
+                    combo_display = f"{combo_key} ({len(skus)} товаров)"
+                    combo_list.append((combo_display, combo_key))
+
+        if not combo_list:
+            st.warning("⚠️ Не найдено комбинаций с товарами для маркетинг-анализа.")
+        else:
+            if len(combo_list) == 1:
+                _, selected_combo_key = combo_list[0]
+            else:
+                default_combo_key = st.session_state.get("selected_combo_key_global")
+                default_idx = 0
+                if default_combo_key:
+                    for i, (_, key) in enumerate(combo_list):
+                        if key == default_combo_key:
+                            default_idx = i
+                            break
+                selected_combo_tuple = st.selectbox(
+                    "📣 Выберите комбинацию для маркетинг-анализа:",
+                    options=combo_list,
+                    format_func=lambda x: x[0],
+                    index=default_idx,
+                    key="marketing_combo_select"
+                )
+                _, selected_combo_key = selected_combo_tuple
+
+            if selected_combo_key in cleaned_combo_to_skus:
+                combo_skus = cleaned_combo_to_skus[selected_combo_key]
+                combo_skus, excluded_skus = filter_skus_by_analysis_with_details(combo_skus)
+                if excluded_skus:
+                    excluded_preview = ", ".join([str(s) for s in excluded_skus[:10]])
+                    suffix = f" (+{len(excluded_skus) - 10})" if len(excluded_skus) > 10 else ""
+                    st.caption(
+                        f"🧹 Исключено артикулов из фильтра анализа: {len(excluded_skus)} "
+                        f"(фильтр «Анализ данных»). {excluded_preview}{suffix}"
+                    )
+
+                # Формируем планы (как в заказе)
+                all_combo_skus = sorted([str(sku).replace(".0", "") for sku in combo_skus if sku and str(sku).lower() not in ['nan', 'none', '']])
+                total_skus = len(all_combo_skus)
+                low_plan_skus = set()
+                mid_plan_skus = set()
+                high_plan_skus = set()
+                if total_skus > 0:
+                    high_count = max(1, int(total_skus / 3))
+                    high_plan_skus = set(all_combo_skus[:high_count])
+                    mid_start = high_count
+                    mid_end = mid_start + max(1, int(total_skus / 3))
+                    if mid_end > mid_start and mid_end <= total_skus:
+                        mid_plan_skus = set(all_combo_skus[mid_start:mid_end])
+                    else:
+                        mid_plan_skus = set(all_combo_skus[mid_start:])
+                    low_start = mid_end if mid_end <= total_skus else mid_start
+                    low_plan_skus = set(all_combo_skus[low_start:])
+
+                def collect_images(skus_list):
+                    image_paths = []
+                    missing = []
+                    import utils.image_cache as image_cache
+                    for sku in skus_list:
+                        sku_str = str(sku).replace(".0", "")
+                        # Берем все загруженные изображения из кеша (если есть)
+                        cached_paths = image_cache.get_cached_images_for_sku(sku_str)
+                        cached_paths = [p for p in cached_paths if p and os.path.exists(p)]
+                        if cached_paths:
+                            image_paths.extend(cached_paths)
+                        else:
+                            img_path = image_cache.get_cached_image_path(sku_str)
+                            if img_path and os.path.exists(img_path):
+                                image_paths.append(img_path)
+                            else:
+                                missing.append(sku_str)
+                    return image_paths, missing
+
+                def render_marketing_result(result: dict):
+                    if result.get("error"):
+                        st.error(result["error"])
+                        if result.get("raw_response"):
+                            with st.expander("Показать сырой ответ ИИ", expanded=False):
+                                st.text(result.get("raw_response", ""))
+                        return
+                    st.markdown("**Инсайты:**")
+                    for item in result.get("insights", []):
+                        st.write(f"- {item}")
+                    if result.get("color_scheme"):
+                        st.markdown("**Цветовая схема:**")
+                        for item in result.get("color_scheme", []):
+                            st.write(f"- {item}")
+                    if result.get("positioning"):
+                        st.markdown("**Позиционирование/конкурентность:**")
+                        for item in result.get("positioning", []):
+                            st.write(f"- {item}")
+                    if result.get("expert_opinion"):
+                        st.markdown("**Экспертное мнение маркетолога:**")
+                        st.write(result.get("expert_opinion"))
+                    if result.get("designer_opinion"):
+                        st.markdown("**Мнение дизайнера:**")
+                        st.write(result.get("designer_opinion"))
+                    if result.get("summary"):
+                        st.info(result["summary"])
+
+                # Общий анализ по всем товарам
+                st.markdown("### 🧠 Общий анализ главных фото (все товары)")
+                all_images, all_missing = collect_images(all_combo_skus)
+                if all_missing:
+                    st.warning(f"⚠️ Нет главного фото для артикулов: {', '.join(all_missing[:10])}{'...' if len(all_missing) > 10 else ''}")
+                if all_images:
+                    cache_key = f"{selected_combo_key}|all|marketing"
+                    if cache_key in marketing_cache:
+                        st.info("ℹ️ Результат ИИ загружен из кеша.")
+                        render_marketing_result(marketing_cache[cache_key])
+                        recalc = st.button("🔄 Пересчитать (общий)", key=f"marketing_recalc_all_{selected_combo_key}")
+                    else:
+                        recalc = st.button("🤖 Проанализировать (общий)", key=f"marketing_analyze_all_{selected_combo_key}")
+
+                    if recalc:
+                        api_key = st.session_state.get('openai_api_key', '') or st.secrets.get('openai_api_key', '')
+                        if not api_key:
+                            st.error("❌ Укажите OpenAI API ключ в настройках.")
+                        else:
+                            import utils.ai_analysis as ai_module
+                            ai_module = importlib.reload(ai_module)
+                            result = ai_module.analyze_marketing_images_with_ai_core(
+                                image_paths=all_images[:8],
+                                api_key=api_key,
+                                product_name=selected_combo_key
+                            )
+                            marketing_cache[cache_key] = result
+                            save_ai_cache(marketing_cache_file, marketing_cache)
+                            render_marketing_result(result)
+                else:
+                    st.info("ℹ️ Нет доступных изображений для анализа.")
+
+                # Анализ по планам
+                st.markdown("### 📌 Анализ по планам")
+                plan_blocks = [
+                    ("📉 Низкий план", low_plan_skus, "low"),
+                    ("📊 Средний план", mid_plan_skus, "mid"),
+                    ("📈 Высокий план", high_plan_skus, "high")
+                ]
+                for plan_label, plan_skus_set, plan_key_suffix in plan_blocks:
+                    st.markdown(f"**{plan_label}**")
+                    images, missing = collect_images(plan_skus_set)
+                    if missing:
+                        st.warning(f"⚠️ Нет главного фото для: {', '.join(list(missing)[:10])}{'...' if len(missing) > 10 else ''}")
+                    if images:
+                        cache_key = f"{selected_combo_key}|plan:{plan_key_suffix}|marketing"
+                        if cache_key in marketing_cache:
+                            st.info("ℹ️ Результат ИИ загружен из кеша.")
+                            render_marketing_result(marketing_cache[cache_key])
+                            recalc = st.button(f"🔄 Пересчитать ({plan_label})", key=f"marketing_recalc_{plan_key_suffix}_{selected_combo_key}")
+                        else:
+                            recalc = st.button(f"🤖 Проанализировать ({plan_label})", key=f"marketing_analyze_{plan_key_suffix}_{selected_combo_key}")
+
+                        if recalc:
+                            api_key = st.session_state.get('openai_api_key', '') or st.secrets.get('openai_api_key', '')
+                            if not api_key:
+                                st.error("❌ Укажите OpenAI API ключ в настройках.")
+                            else:
+                                import utils.ai_analysis as ai_module
+                                ai_module = importlib.reload(ai_module)
+                                result = ai_module.analyze_marketing_images_with_ai_core(
+                                    image_paths=images[:8],
+                                    api_key=api_key,
+                                    product_name=selected_combo_key
+                                )
+                                marketing_cache[cache_key] = result
+                                save_ai_cache(marketing_cache_file, marketing_cache)
+                                render_marketing_result(result)
+                    else:
+                        st.info("ℹ️ Нет изображений для анализа в этом плане.")
\ No newline at end of file
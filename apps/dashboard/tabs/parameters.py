@@ -0,0 +1,3845 @@
+# -*- coding: utf-8 -*-
+"""
+Вкладка «⚙️ Установка параметров»
+"""
+import os
+import json
+from collections import Counter
+
+import pandas as pd
+import streamlit as st
+
+from utils.perf import perf_checkpoint
+from utils.wb_utils import build_wb_product_url, extract_sku_from_url
+from utils.wb_api_images import get_product_name_from_wb
+from utils.image_cache import ensure_image_cached
+from utils.param_journal import append_param_rename, append_param_options
+
+from .params import (
+    is_valid_param_name, save_param_value, save_param_options, save_param_delete,
+    save_param_history_to_file, get_hierarchy_params, get_subtype_params, get_visual_params,
+    save_hierarchy_config, load_hierarchy_config,
+    save_mass_analysis_progress, load_mass_analysis_progress, clear_mass_analysis_progress,
+    save_excluded_params_settings, load_excluded_params_settings,
+    save_full_project, load_full_project,
+    save_mass_analysis_results, load_mass_analysis_results, remove_deleted_params_from_mass_results,
+    export_mass_analysis_results_to_csv, import_mass_analysis_results_from_csv,
+    export_product_params_to_csv, import_product_params_from_csv,
+    apply_mass_analysis_results_to_params,
+    save_param_values_to_file, save_deleted_params_to_file, load_deleted_params_from_file,
+    load_param_values_from_file, get_param_values
+)
+from .common import OPENAI_AVAILABLE
+from .product_images import (
+    analyze_image_with_ai, has_downloaded_images,
+    get_screenshotapi_images_with_status, get_product_params_from_images, determine_completeness
+)
+
+
+def render():
+    """Отрисовывает вкладку установки параметров товаров"""
+    perf_checkpoint("tab: ⚙️ Установка параметров")
+    st.subheader("⚙️ Установка параметров товаров")
+
+    # ========== РЕДАКТОР ПАРАМЕТРОВ ==========
+    with st.expander("📝 Редактор параметров", expanded=False):
+        st.markdown("### 📝 Редактор параметров")
+        st.markdown("Управление параметрами товаров: добавление, редактирование, удаление параметров и их вариантов")
+
+        # Инициализация param_options если нет
+        if "param_options" not in st.session_state:
+            st.session_state["param_options"] = {}
+
+        # Инициализация списка удаленных параметров
+        if "deleted_params" not in st.session_state:
+            st.session_state["deleted_params"] = load_deleted_params_from_file()
+
+        param_options = st.session_state.get("param_options", {})
+        param_values = get_param_values()
+        deleted_params = st.session_state.get("deleted_params", set())
+
+        # Синхронизируем param_options с param_values - добавляем параметры из param_values, которых нет в param_options
+        # НО исключаем параметры, которые были явно удалены пользователем
+        # Также удаляем удаленные параметры из param_values и param_options, если они там есть
+        if param_values:
+            # Сначала удаляем удаленные параметры напрямую из session_state
+            if deleted_params:
+                # Удаляем из param_options
+                if "param_options" in st.session_state:
+                    params_to_remove_from_options = [p for p in st.session_state["param_options"].keys() if p in deleted_params]
+                    for param_name in params_to_remove_from_options:
+                        del st.session_state["param_options"][param_name]
+                        if param_name in param_options:
+                            del param_options[param_name]
+
+                # Удаляем из param_values
+                if "param_values" in st.session_state:
+                    params_to_remove_from_values = [p for p in st.session_state["param_values"].keys() if p in deleted_params]
+                    for param_name in params_to_remove_from_values:
+                        del st.session_state["param_values"][param_name]
+
+            # Перезагружаем param_values через функцию (она фильтрует удаленные)
+            param_values = get_param_values()
+
+            # Теперь работаем только с отфильтрованными данными
+            params_to_remove = []
+            for param_name in list(param_values.keys()):
+                if param_name in deleted_params:
+                    params_to_remove.append(param_name)
+
+            for param_name in params_to_remove:
+                if param_name in param_values:
+                    del param_values[param_name]
+                if param_name in param_options:
+                    del param_options[param_name]
+
+            if params_to_remove:
+                st.session_state["param_values"] = param_values
+                st.session_state["param_options"] = param_options
+
+            # Теперь синхронизируем - добавляем параметры из param_values, которых нет в param_options
+            # param_values уже отфильтрован от удаленных параметров
+            for param_name in param_values.keys():
+                # Просто проверяем, что параметра нет в param_options
+                if param_name not in param_options:
+                    # Добавляем параметр в param_options с пустым списком вариантов
+                    param_options[param_name] = []
+                    st.session_state["param_options"] = param_options
+                    append_param_options(st.session_state.get("cached_file_name"), param_name, [])
+
+        # Обновляем локальную переменную после синхронизации
+        param_options = st.session_state.get("param_options", {})
+        # Фильтруем удаленные параметры из param_options для отображения
+        param_options = {k: v for k, v in param_options.items() if k not in deleted_params}
+
+        # Статистика
+        col_stat1, col_stat2, col_stat3, col_stat4 = st.columns(4)
+        with col_stat1:
+            st.metric("Всего параметров", len(param_options))
+        with col_stat2:
+            total_options = sum(len(opts) if isinstance(opts, list) else 1 for opts in param_options.values())
+            st.metric("Всего вариантов", total_options)
+        with col_stat3:
+            params_with_values = sum(1 for param_name in param_options.keys() if param_name in param_values and param_values[param_name])
+            st.metric("Параметров с данными", params_with_values)
+        with col_stat4:
+            # Кнопка сохранения параметров
+            if st.button("💾 Сохранить все", type="primary", use_container_width=True):
+                # Сначала сохраняем deleted_params (это очистит все файлы)
+                if save_deleted_params_to_file():
+                    # Затем сохраняем param_options и param_values
+                    if save_param_values_to_file():
+                        # Очищаем результаты массового анализа от удаленных параметров
+                        if "mass_analysis_results" in st.session_state:
+                            st.session_state["mass_analysis_results"] = remove_deleted_params_from_mass_results(
+                                st.session_state["mass_analysis_results"]
+                            )
+                            save_mass_analysis_results(st.session_state["mass_analysis_results"])
+                        st.success("✅ Все параметры и настройки сохранены!")
+                        st.rerun()
+                    else:
+                        st.error("❌ Ошибка сохранения параметров")
+                else:
+                    st.error("❌ Ошибка сохранения списка удаленных параметров")
+
+        st.divider()
+
+        # Улучшенный редактор параметров с фокусом на иерархию, удаление и скрытие
+        st.markdown("---")
+        st.markdown("### 🎯 Основные действия")
+
+        # Главные действия вынесены вперед
+        col_main1, col_main2, col_main3 = st.columns(3)
+        with col_main1:
+            st.markdown("#### 🔗 Иерархия параметров")
+            if st.button("⚙️ Настроить иерархию", type="primary", use_container_width=True, key="goto_hierarchy_main"):
+                st.session_state["editor_mode"] = "🔗 Управление иерархией"
+                st.rerun()
+            st.caption("Назначьте параметры иерархии для анализа")
+
+        with col_main2:
+            st.markdown("#### 👁️ Скрытие параметров")
+            excluded_count = len(st.session_state.get("excluded_params", []))
+            if st.button(f"👁️ Управлять видимостью ({excluded_count} скрыто)", use_container_width=True, key="goto_hide_main"):
+                st.session_state["editor_mode"] = "👁️ Скрыть параметры"
+                st.rerun()
+            st.caption("Скрыть параметры из таблицы и комбинаций")
+
+        with col_main3:
+            st.markdown("#### 🗑️ Удаление параметров")
+            deleted_count = len(st.session_state.get("deleted_params", set()))
+            if st.button(f"🗑️ Управлять удалением ({deleted_count} удалено)", use_container_width=True, key="goto_delete_main"):
+                st.session_state["editor_mode"] = "🗑️ Удаление параметров"
+                st.rerun()
+            st.caption("Удалить параметры навсегда")
+
+        st.markdown("---")
+
+        # Режимы работы редактора (расширенные)
+        editor_modes = ["🔗 Управление иерархией", "👁️ Скрыть параметры", "🗑️ Удаление параметров", "📋 Просмотр всех параметров", "➕ Добавить параметр"]
+        current_editor_mode = st.session_state.get("editor_mode", "🔗 Управление иерархией")
+
+        # Определяем индекс текущего режима
+        if current_editor_mode in editor_modes:
+            default_index = editor_modes.index(current_editor_mode)
+        else:
+            default_index = 0
+
+        editor_mode = st.radio(
+            "📋 Дополнительные режимы:",
+            editor_modes,
+            horizontal=False,
+            key="editor_mode_radio",
+            index=default_index
+        )
+
+        # Обновляем editor_mode в session_state
+        st.session_state["editor_mode"] = editor_mode
+
+        if editor_mode == "📋 Просмотр всех параметров":
+            if param_options:
+                # Поиск параметров
+                search_param = st.text_input("🔍 Поиск параметра:", placeholder="Введите название параметра...", key="search_param_editor")
+
+                # Фильтрация параметров
+                filtered_params = param_options.copy()
+                if search_param:
+                    filtered_params = {k: v for k, v in param_options.items() if search_param.lower() in k.lower()}
+
+                if filtered_params:
+                    # Сортировка параметров
+                    sort_order = st.selectbox("Сортировка:", ["По алфавиту", "По количеству вариантов", "По дате добавления"], key="sort_params")
+
+                    if sort_order == "По количеству вариантов":
+                        filtered_params = dict(sorted(filtered_params.items(), key=lambda x: len(x[1]) if isinstance(x[1], list) else 0, reverse=True))
+                    elif sort_order == "По алфавиту":
+                        filtered_params = dict(sorted(filtered_params.items()))
+
+                    # Определяем иерархические параметры для выделения
+                    # Иерархия параметров: Подтип - это логическая группировка для Рукав и Ворот
+                    hierarchy_params = get_hierarchy_params()
+                    subtype_params = get_subtype_params()  # Параметры, которые находятся внутри "Подтип"
+                    visual_params = get_visual_params()
+
+                    # Разделяем параметры на категории для отображения
+                    hierarchical_params_dict = {k: v for k, v in filtered_params.items() if k in hierarchy_params}
+                    visual_params_dict = {k: v for k, v in filtered_params.items() if k in visual_params or any(vp in k for vp in visual_params)}
+                    other_params_dict = {k: v for k, v in filtered_params.items() if k not in hierarchy_params and k not in visual_params_dict}
+
+                    # Сначала показываем иерархические параметры с выделением
+                    if hierarchical_params_dict:
+                        st.markdown("### 📊 Иерархические параметры (сегментация)")
+                        st.info("💡 Эти параметры определяют иерархию сегментов: Тип → Подтип (Рукав, Ворот)")
+
+                        for param_name, options in hierarchical_params_dict.items():
+                            with st.container():
+                                # Выделяем иерархические параметры цветом
+                                st.markdown(f'<div style="background-color: #e3f2fd; padding: 10px; border-radius: 5px; border-left: 4px solid #2196F3; margin-bottom: 10px;">', unsafe_allow_html=True)
+                                col_header1, col_header2, col_header3 = st.columns([3, 1, 1])
+
+                                with col_header1:
+                                    # Редактирование названия параметра
+                                    if st.session_state.get(f"editing_param_name_{param_name}", False):
+                                        new_name_col1, new_name_col2, new_name_col3 = st.columns([3, 1, 1])
+                                        with new_name_col1:
+                                            new_param_name = st.text_input(
+                                                "Новое название:",
+                                                value=param_name,
+                                                key=f"new_name_input_{param_name}"
+                                            )
+                                        with new_name_col2:
+                                            if st.button("💾", key=f"save_name_{param_name}"):
+                                                if new_param_name and new_param_name.strip() and new_param_name != param_name:
+                                                    # Переименовываем параметр
+                                                    if new_param_name not in param_options:
+                                                        param_options[new_param_name] = param_options.pop(param_name)
+                                                        # Обновляем в param_values
+                                                        if param_name in param_values:
+                                                            param_values[new_param_name] = param_values.pop(param_name)
+                                                        st.session_state["param_options"] = param_options
+                                                        st.session_state["param_values"] = param_values
+                                                        # Переименование — одна запись журнала проекта
+                                                        append_param_rename(st.session_state.get("cached_file_name"), param_name, new_param_name)
+                                                        st.success(f"✅ Параметр переименован: '{param_name}' → '{new_param_name}'")
+                                                        st.rerun()
+                                                    else:
+                                                        st.error(f"❌ Параметр '{new_param_name}' уже существует!")
+                                                else:
+                                                    st.session_state[f"editing_param_name_{param_name}"] = False
+                                                    st.rerun()
+                                        with new_name_col3:
+                                            if st.button("❌", key=f"cancel_name_{param_name}"):
+                                                st.session_state[f"editing_param_name_{param_name}"] = False
+                                                st.rerun()
+                                    else:
+                                        options_count = len(options) if isinstance(options, list) else 0
+                                        # Определяем категорию параметра
+                                        if param_name in subtype_params:
+                                            category = "📊 Иерархический (Подтип)"
+                                        elif param_name in hierarchy_params:
+                                            category = "📊 Иерархический"
+                                        elif param_name in visual_params or any(vp in param_name for vp in visual_params):
+                                            category = "🎨 Визуальный"
+                                        else:
+                                            category = "📋 Другой"
+                                        st.markdown(f"### {category} - {param_name} ({options_count} вариантов)")
+
+                                with col_header2:
+                                    if st.button("✏️ Редактировать", key=f"edit_param_{param_name}"):
+                                        st.session_state[f"editing_param_name_{param_name}"] = True
+                                        st.rerun()
+
+                                with col_header3:
+                                    if st.button("🗑️ Удалить", key=f"delete_param_{param_name}", type="secondary"):
+                                        # Удаляем параметр напрямую из session_state
+                                        if param_name in st.session_state.get("param_options", {}):
+                                            del st.session_state["param_options"][param_name]
+                                        if param_name in st.session_state.get("param_values", {}):
+                                            del st.session_state["param_values"][param_name]
+
+                                        # Также удаляем из локальных переменных
+                                        if param_name in param_options:
+                                            del param_options[param_name]
+                                        if param_name in param_values:
+                                            del param_values[param_name]
+
+                                        # ВАЖНО: Добавляем в список удаленных параметров ТОЛЬКО для текущего проекта
+                                        # Инициализируем deleted_params если нужно
+                                        if "deleted_params" not in st.session_state:
+                                            st.session_state["deleted_params"] = set()
+
+                                        # Убеждаемся, что это set
+                                        if not isinstance(st.session_state["deleted_params"], set):
+                                            st.session_state["deleted_params"] = set(st.session_state["deleted_params"])
+
+                                        # Добавляем параметр в список удаленных ТОЛЬКО для текущего проекта
+                                        st.session_state["deleted_params"].add(param_name)
+
+                                        # Сохраняем удаление ТОЛЬКО для текущего проекта (одна запись журнала)
+                                        if save_param_delete(param_name):
+                                            # Удаляем параметр из результатов массового анализа
+                                            if "mass_analysis_results" in st.session_state:
+                                                st.session_state["mass_analysis_results"] = remove_deleted_params_from_mass_results(
+                                                    st.session_state["mass_analysis_results"]
+                                                )
+                                                # Сохраняем очищенные результаты
+                                                save_mass_analysis_results(st.session_state["mass_analysis_results"])
+                                            st.success(f"✅ Параметр '{param_name}' удален из текущего проекта!")
+                                        else:
+                                            st.warning(f"⚠️ Параметр '{param_name}' удален из памяти, но возникла ошибка при сохранении в файл")
+
+                                        # Принудительно удаляем параметр из session_state еще раз (на всякий случай)
+                                        if param_name in st.session_state.get("param_options", {}):
+                                            del st.session_state["param_options"][param_name]
+                                        if param_name in st.session_state.get("param_values", {}):
+                                            del st.session_state["param_values"][param_name]
+
+                                        st.rerun()
+
+                            # Отображение вариантов
+                            if isinstance(options, list) and options:
+                                st.markdown("**Варианты значений:**")
+
+                                # Редактируемая таблица вариантов
+                                for idx, option in enumerate(options):
+                                    col_opt1, col_opt2, col_opt3, col_opt4 = st.columns([4, 1, 1, 1])
+
+                                    with col_opt1:
+                                        if st.session_state.get(f"editing_option_{param_name}_{idx}", False):
+                                            edited_opt = st.text_input(
+                                                "Редактировать:",
+                                                value=option,
+                                                key=f"edit_opt_input_{param_name}_{idx}"
+                                            )
+                                        else:
+                                            st.write(f"• {option}")
+
+                                    with col_opt2:
+                                        if st.session_state.get(f"editing_option_{param_name}_{idx}", False):
+                                            if st.button("💾", key=f"save_opt_{param_name}_{idx}"):
+                                                if edited_opt and edited_opt.strip():
+                                                    options[idx] = edited_opt.strip()
+                                                    st.session_state["param_options"] = param_options
+                                                    st.session_state[f"editing_option_{param_name}_{idx}"] = False
+                                                    if save_param_options(param_name):
+                                                        st.success("✅ Вариант обновлен!")
+                                                    st.rerun()
+                                        else:
+                                            if st.button("✏️", key=f"edit_opt_{param_name}_{idx}"):
+                                                st.session_state[f"editing_option_{param_name}_{idx}"] = True
+                                                st.rerun()
+
+                                    with col_opt3:
+                                        if st.session_state.get(f"editing_option_{param_name}_{idx}", False):
+                                            if st.button("❌", key=f"cancel_opt_{param_name}_{idx}"):
+                                                st.session_state[f"editing_option_{param_name}_{idx}"] = False
+                                                st.rerun()
+
+                                    with col_opt4:
+                                        if st.button("🗑️", key=f"del_opt_{param_name}_{idx}"):
+                                            options.pop(idx)
+                                            if not options:
+                                                # Если вариантов не осталось, удаляем параметр
+                                                if param_name in param_options:
+                                                    del param_options[param_name]
+                                                if param_name in param_values:
+                                                    del param_values[param_name]
+
+                                                # Добавляем в список удаленных параметров
+                                                if "deleted_params" not in st.session_state:
+                                                    st.session_state["deleted_params"] = load_deleted_params_from_file()
+
+                                                # Убеждаемся, что это set
+                                                if not isinstance(st.session_state["deleted_params"], set):
+                                                    st.session_state["deleted_params"] = set(st.session_state["deleted_params"])
+
+                                                # Добавляем параметр в список удаленных
+                                                st.session_state["deleted_params"].add(param_name)
+
+                                                # Сохраняем удаление ТОЛЬКО для текущего проекта (одна запись журнала)
+                                                if save_param_delete(param_name):
+                                                    # Удаляем параметр из результатов массового анализа
+                                                    if "mass_analysis_results" in st.session_state:
+                                                        st.session_state["mass_analysis_results"] = remove_deleted_params_from_mass_results(
+                                                            st.session_state["mass_analysis_results"]
+                                                        )
+                                                        # Сохраняем очищенные результаты
+                                                        save_mass_analysis_results(st.session_state["mass_analysis_results"])
+                                                    st.success("✅ Параметр удален (варианты закончились)!")
+                                                else:
+                                                    st.warning("⚠️ Параметр удален, но не сохранен в файл")
+                                            else:
+                                                # Вариантов еще есть, просто обновляем список
+                                                st.session_state["param_options"] = param_options
+                                                st.session_state["param_values"] = param_values
+                                                if save_param_options(param_name):
+                                                    st.success("✅ Вариант удален!")
+                                                st.rerun()
+
+                                # Добавление нового варианта
+                                col_add1, col_add2 = st.columns([4, 1])
+                                with col_add1:
+                                    new_opt = st.text_input(
+                                        f"Добавить вариант в '{param_name}':",
+                                        placeholder="Введите новый вариант",
+                                        key=f"new_opt_{param_name}"
+                                    )
+                                with col_add2:
+                                    if st.button("➕", key=f"add_opt_{param_name}"):
+                                        if new_opt and new_opt.strip():
+                                            if new_opt.strip() not in options:
+                                                options.append(new_opt.strip())
+                                                st.session_state["param_options"] = param_options
+                                                if save_param_options(param_name):
+                                                    st.success(f"✅ Вариант '{new_opt.strip()}' добавлен!")
+                                                st.rerun()
+                                            else:
+                                                st.warning("Этот вариант уже существует")
+                            else:
+                                st.info("ℹ️ Варианты не указаны - нейросеть определит значение самостоятельно")
+
+                            st.divider()
+                            st.markdown('</div>', unsafe_allow_html=True)
+
+                    # Затем показываем визуальные параметры
+                    if visual_params_dict:
+                        st.markdown("### 🎨 Визуальные параметры (анализируются в контексте иерархии)")
+                        st.info("💡 Эти параметры анализируются только после определения иерархии сегментов")
+
+                        for param_name, options in visual_params_dict.items():
+                            with st.container():
+                                st.markdown(f'<div style="background-color: #fff3e0; padding: 10px; border-radius: 5px; border-left: 4px solid #FF9800; margin-bottom: 10px;">', unsafe_allow_html=True)
+                                col_header1, col_header2, col_header3 = st.columns([3, 1, 1])
+
+                                with col_header1:
+                                    options_count = len(options) if isinstance(options, list) else 0
+                                    category = "🎨 Визуальный"
+                                    st.markdown(f"### {category} - {param_name} ({options_count} вариантов)")
+
+                                with col_header2:
+                                    if st.button("✏️ Редактировать", key=f"edit_param_{param_name}"):
+                                        st.session_state[f"editing_param_name_{param_name}"] = True
+                                        st.rerun()
+
+                                with col_header3:
+                                    if st.button("🗑️ Удалить", key=f"delete_param_{param_name}", type="secondary"):
+                                        if param_name in param_options:
+                                            del param_options[param_name]
+                                        if param_name in param_values:
+                                            del param_values[param_name]
+                                        st.session_state["param_options"] = param_options
+                                        st.session_state["param_values"] = param_values
+                                        if save_param_delete(param_name):
+                                            st.success(f"✅ Параметр '{param_name}' удален!")
+                                        st.rerun()
+
+                                # Отображение вариантов (копируем логику из иерархических параметров)
+                                if isinstance(options, list) and options:
+                                    st.markdown("**Варианты значений:**")
+                                    for idx, option in enumerate(options):
+                                        col_opt1, col_opt2, col_opt3, col_opt4 = st.columns([4, 1, 1, 1])
+
+                                        with col_opt1:
+                                            if st.session_state.get(f"editing_option_{param_name}_{idx}", False):
+                                                edited_opt = st.text_input(
+                                                    "Редактировать:",
+                                                    value=option,
+                                                    key=f"edit_opt_input_{param_name}_{idx}"
+                                                )
+                                            else:
+                                                st.write(f"• {option}")
+
+                                        with col_opt2:
+                                            if st.session_state.get(f"editing_option_{param_name}_{idx}", False):
+                                                if st.button("💾", key=f"save_opt_{param_name}_{idx}"):
+                                                    if edited_opt and edited_opt.strip():
+                                                        options[idx] = edited_opt.strip()
+                                                        st.session_state["param_options"] = param_options
+                                                        st.session_state[f"editing_option_{param_name}_{idx}"] = False
+                                                        if save_param_options(param_name):
+                                                            st.success("✅ Вариант обновлен!")
+                                                        st.rerun()
+                                            else:
+                                                if st.button("✏️", key=f"edit_opt_{param_name}_{idx}"):
+                                                    st.session_state[f"editing_option_{param_name}_{idx}"] = True
+                                                    st.rerun()
+
+                                        with col_opt3:
+                                            if st.session_state.get(f"editing_option_{param_name}_{idx}", False):
+                                                if st.button("❌", key=f"cancel_opt_{param_name}_{idx}"):
+                                                    st.session_state[f"editing_option_{param_name}_{idx}"] = False
+                                                    st.rerun()
+
+                                        with col_opt4:
+                                            if st.button("🗑️", key=f"del_opt_{param_name}_{idx}"):
+                                                options.pop(idx)
+                                                if not options:
+                                                    if param_name in param_options:
+                                                        del param_options[param_name]
+                                                    if param_name in param_values:
+                                                        del param_values[param_name]
+                                                st.session_state["param_options"] = param_options
+                                                st.session_state["param_values"] = param_values
+                                                saved = save_param_options(param_name) if options else save_param_delete(param_name)
+                                                if saved:
+                                                    st.success("✅ Вариант удален!")
+                                                st.rerun()
+
+                                    # Добавление нового варианта
+                                    col_add1, col_add2 = st.columns([4, 1])
+                                    with col_add1:
+                                        new_opt = st.text_input(
+                                            f"Добавить вариант в '{param_name}':",
+                                            placeholder="Введите новый вариант",
+                                            key=f"new_opt_{param_name}"
+                                        )
+                                    with col_add2:
+                                        if st.button("➕", key=f"add_opt_{param_name}"):
+                                            if new_opt and new_opt.strip():
+                                                if new_opt.strip() not in options:
+                                                    options.append(new_opt.strip())
+                                                    st.session_state["param_options"] = param_options
+                                                    if save_param_options(param_name):
+                                                        st.success(f"✅ Вариант '{new_opt.strip()}' добавлен!")
+                                                    st.rerun()
+                                                else:
+                                                    st.warning("Этот вариант уже существует")
+                                else:
+                                    st.info("ℹ️ Варианты не указаны - нейросеть определит значение самостоятельно")
+
+                                st.divider()
+                                st.markdown('</div>', unsafe_allow_html=True)
+
+                    # Затем показываем остальные параметры
+                    if other_params_dict:
+                        st.markdown("### 📋 Дополнительные параметры")
+
+                        for param_name, options in other_params_dict.items():
+                            with st.container():
+                                col_header1, col_header2, col_header3 = st.columns([3, 1, 1])
+
+                                with col_header1:
+                                    options_count = len(options) if isinstance(options, list) else 0
+                                    category = "📋 Другой"
+                                    st.markdown(f"### {category} - {param_name} ({options_count} вариантов)")
+
+                                with col_header2:
+                                    if st.button("✏️ Редактировать", key=f"edit_param_{param_name}"):
+                                        st.session_state[f"editing_param_name_{param_name}"] = True
+                                        st.rerun()
+
+                                with col_header3:
+                                    if st.button("🗑️ Удалить", key=f"delete_param_{param_name}", type="secondary"):
+                                        if param_name in param_options:
+                                            del param_options[param_name]
+                                        if param_name in param_values:
+                                            del param_values[param_name]
+                                        st.session_state["param_options"] = param_options
+                                        st.session_state["param_values"] = param_values
+                                        if save_param_delete(param_name):
+                                            st.success(f"✅ Параметр '{param_name}' удален!")
+                                        st.rerun()
+
+                                # Отображение вариантов (аналогично выше)
+                                if isinstance(options, list) and options:
+                                    st.markdown("**Варианты значений:**")
+                                    for idx, option in enumerate(options):
+                                        col_opt1, col_opt2, col_opt3, col_opt4 = st.columns([4, 1, 1, 1])
+
+                                        with col_opt1:
+                                            if st.session_state.get(f"editing_option_{param_name}_{idx}", False):
+                                                edited_opt = st.text_input(
+                                                    "Редактировать:",
+                                                    value=option,
+                                                    key=f"edit_opt_input_{param_name}_{idx}"
+                                                )
+                                            else:
+                                                st.write(f"• {option}")
+
+                                        with col_opt2:
+                                            if st.session_state.get(f"editing_option_{param_name}_{idx}", False):
+                                                if st.button("💾", key=f"save_opt_{param_name}_{idx}"):
+                                                    if edited_opt and edited_opt.strip():
+                                                        options[idx] = edited_opt.strip()
+                                                        st.session_state["param_options"] = param_options
+                                                        st.session_state[f"editing_option_{param_name}_{idx}"] = False
+                                                        if save_param_options(param_name):
+                                                            st.success("✅ Вариант обновлен!")
+                                                        st.rerun()
+                                            else:
+                                                if st.button("✏️", key=f"edit_opt_{param_name}_{idx}"):
+                                                    st.session_state[f"editing_option_{param_name}_{idx}"] = True
+                                                    st.rerun()
+
+                                        with col_opt3:
+                                            if st.session_state.get(f"editing_option_{param_name}_{idx}", False):
+                                                if st.button("❌", key=f"cancel_opt_{param_name}_{idx}"):
+                                                    st.session_state[f"editing_option_{param_name}_{idx}"] = False
+                                                    st.rerun()
+
+                                        with col_opt4:
+                                            if st.button("🗑️", key=f"del_opt_{param_name}_{idx}"):
+                                                options.pop(idx)
+                                                if not options:
+                                                    if param_name in param_options:
+                                                        del param_options[param_name]
+                                                    if param_name in param_values:
+                                                        del param_values[param_name]
+                                                st.session_state["param_options"] = param_options
+                                                st.session_state["param_values"] = param_values
+                                                saved = save_param_options(param_name) if options else save_param_delete(param_name)
+                                                if saved:
+                                                    st.success("✅ Вариант удален!")
+                                                st.rerun()
+
+                                    # Добавление нового варианта
+                                    col_add1, col_add2 = st.columns([4, 1])
+                                    with col_add1:
+                                        new_opt = st.text_input(
+                                            f"Добавить вариант в '{param_name}':",
+                                            placeholder="Введите новый вариант",
+                                            key=f"new_opt_{param_name}"
+                                        )
+                                    with col_add2:
+                                        if st.button("➕", key=f"add_opt_{param_name}"):
+                                            if new_opt and new_opt.strip():
+                                                if new_opt.strip() not in options:
+                                                    options.append(new_opt.strip())
+                                                    st.session_state["param_options"] = param_options
+                                                    if save_param_options(param_name):
+                                                        st.success(f"✅ Вариант '{new_opt.strip()}' добавлен!")
+                                                    st.rerun()
+                                                else:
+                                                    st.warning("Этот вариант уже существует")
+                                else:
+                                    st.info("ℹ️ Варианты не указаны - нейросеть определит значение самостоятельно")
+
+                                st.divider()
+                else:
+                    st.info("🔍 Параметры не найдены по запросу")
+            else:
+                st.info("📝 Параметры еще не добавлены. Используйте режим '➕ Добавить новый параметр'")
+
+        elif editor_mode == "➕ Добавить параметр":
+            st.markdown("### ➕ Добавить новый параметр")
+
+            # Готовые шаблоны параметров (опционально)
+            with st.expander("📋 Использовать шаблон", expanded=False):
+                param_templates = {
+                "Комплект": ["Комплект", "Один"],
+                "Цвет": [
+                    "Белый", "Черный", "Серый", "Синий", "Красный", "Зеленый", "Розовый", "Бежевый",
+                    "Черно-белый", "Бело-черный", "Сине-белый", "Бело-синий",
+                    "Красно-белый", "Бело-красный", "Черно-серый", "Серо-черный"
+                ],
+                "Длина": ["Короткая", "Средняя", "Длинная", "Мини", "Макси", "Миди", "Анкл"],
+                "Пуговицы": ["С пуговицами", "Без пуговиц", "На молнии", "На липучке", "На кнопках", "На шнурке"],
+                "Материал": ["Хлопок", "Полиэстер", "Шерсть", "Лен", "Джинс", "Кожа", "Замша", "Трикотаж"],
+                "Размер": ["XS", "S", "M", "L", "XL", "XXL", "XXXL"],
+                "Сезон": ["Лето", "Зима", "Весна", "Осень", "Демисезон"],
+                "Стиль": ["Классический", "Спортивный", "Повседневный", "Деловой", "Вечерний", "Романтический"],
+                "Тип": []  # Без вариантов
+            }
+
+                col_template1, col_template2 = st.columns([2, 1])
+                with col_template1:
+                    template_choice = st.selectbox(
+                        "Выберите шаблон или создать новый:",
+                        ["Создать новый параметр"] + list(param_templates.keys()),
+                        key="template_choice_editor"
+                    )
+
+                with col_template2:
+                    if template_choice != "Создать новый параметр":
+                        if st.button("📋 Применить шаблон", key="apply_template_btn"):
+                            st.session_state["temp_param_name_editor"] = template_choice
+                            st.session_state["temp_param_options_editor"] = " / ".join(param_templates[template_choice]) if param_templates[template_choice] else ""
+                            st.rerun()
+
+            col_name, col_options = st.columns([1, 2])
+            with col_name:
+                param_name_new = st.text_input(
+                    "Название параметра:",
+                    value=st.session_state.get("temp_param_name_editor", ""),
+                    placeholder="Например: Тип, Цвет, Материал",
+                    key="param_name_new_add"
+                )
+
+            with col_options:
+                param_options_new = st.text_area(
+                    "Варианты (через слэш /, можно оставить пустым):",
+                    value=st.session_state.get("temp_param_options_editor", ""),
+                    placeholder="Красный / Синий / Зеленый\n(или оставьте пустым для свободного ввода)",
+                    height=100,
+                    key="param_options_new_add"
+                )
+
+            col_add_btn, col_clear_btn = st.columns([1, 1])
+            with col_add_btn:
+                if st.button("➕ Добавить параметр", type="primary", use_container_width=True, key="add_param_btn_main"):
+                    if param_name_new and param_name_new.strip():
+                        # Очищаем и разбираем варианты
+                        if param_options_new:
+                            options = [opt.strip() for opt in param_options_new.split("/") if opt.strip()]
+                        else:
+                            options = []
+
+                        # Проверяем, не существует ли уже такой параметр
+                        if param_name_new.strip() in param_options:
+                            st.error(f"❌ Параметр '{param_name_new.strip()}' уже существует!")
+                        else:
+                            # Добавляем параметр
+                            param_options[param_name_new.strip()] = options
+                            if param_name_new.strip() not in param_values:
+                                param_values[param_name_new.strip()] = {}
+
+                            st.session_state["param_options"] = param_options
+                            st.session_state["param_values"] = param_values
+
+                            if save_param_values_to_file():
+                                st.success(f"✅ Параметр '{param_name_new.strip()}' добавлен! ({len(options)} вариантов)")
+                                # Очищаем поля
+                                if "temp_param_name_editor" in st.session_state:
+                                    del st.session_state["temp_param_name_editor"]
+                                if "temp_param_options_editor" in st.session_state:
+                                    del st.session_state["temp_param_options_editor"]
+                                st.rerun()
+                    else:
+                        st.warning("⚠️ Введите название параметра")
+
+            with col_clear_btn:
+                if st.button("🗑️ Очистить", use_container_width=True, key="clear_param_btn_main"):
+                    if "temp_param_name_editor" in st.session_state:
+                        del st.session_state["temp_param_name_editor"]
+                    if "temp_param_options_editor" in st.session_state:
+                        del st.session_state["temp_param_options_editor"]
+                    st.rerun()
+
+        elif editor_mode == "🔗 Управление иерархией":
+            st.markdown("### 🔗 Управление иерархией параметров")
+            st.info("💡 Назначьте параметрам уровни иерархии: 1-й уровень, 2-й уровень, 3-й уровень и т.д. Порядок важен для анализа.")
+
+            # ВАЖНО: Убеждаемся, что параметры загружены из файла, если их нет в session_state
+            if not st.session_state.get("param_values") and not st.session_state.get("param_options"):
+                load_param_values_from_file()
+
+            # Получаем все доступные параметры из всех возможных источников
+            # 1. Из session_state напрямую (до фильтрации)
+            param_values_raw = st.session_state.get("param_values", {})
+            param_options_dict = st.session_state.get("param_options", {})
+
+            # 2. Также получаем через get_param_values() (может содержать параметры, загруженные из файла)
+            param_values_dict = get_param_values()
+
+            # Получаем список удаленных параметров
+            deleted_params = st.session_state.get("deleted_params", set())
+            if not isinstance(deleted_params, set):
+                deleted_params = set(deleted_params) if deleted_params else set()
+
+            # Получаем список исключенных (скрытых) параметров - они ДОЛЖНЫ быть в списке для назначения иерархии
+            excluded_params = set(st.session_state.get("excluded_params", []))
+
+            # Список служебных параметров, которые НЕ являются параметрами товаров и должны быть исключены
+            service_params = {
+                "Дней отсутствовал", "Дней в наличии", "Доля дней в наличии", 
+                "Остатки на конец периода", "Остаток на конец периода", "Остатки", "Остаток",
+                "Дней в продаже", "Дни в наличии", "Дни в продаже",
+                "Дней отсутствовал", "Дни отсутствовал", "Дни отсутствовали",
+                "Упущенные заказы", "Упущенная выручка", "Выручка", "Заказы"
+            }
+
+            # Загружаем текущую иерархию (нужно для включения параметров из иерархии)
+            if "hierarchy_params" not in st.session_state:
+                load_hierarchy_config()
+            current_hierarchy = get_hierarchy_params()
+
+            # Формируем словарь всех параметров, исключая удаленные и служебные
+            all_params_dict = {}
+
+            # Собираем все уникальные имена параметров из всех источников
+            all_param_names = set()
+
+            # Добавляем параметры из param_options (включая excluded_params)
+            for param_name in param_options_dict.keys():
+                if param_name and param_name not in deleted_params and param_name not in service_params:
+                    all_param_names.add(param_name)
+
+            # Добавляем параметры из param_values_raw (session_state напрямую, включая excluded_params)
+            for param_name in param_values_raw.keys():
+                if param_name and param_name not in deleted_params and param_name not in service_params:
+                    all_param_names.add(param_name)
+
+            # Добавляем параметры из param_values_dict (через get_param_values - может быть больше параметров, включая excluded_params)
+            for param_name in param_values_dict.keys():
+                if param_name and param_name not in deleted_params and param_name not in service_params:
+                    all_param_names.add(param_name)
+
+            # ВАЖНО: Добавляем excluded_params (скрытые параметры) - они должны быть видны для назначения иерархии
+            for param_name in excluded_params:
+                if param_name and param_name not in deleted_params and param_name not in service_params:
+                    all_param_names.add(param_name)
+
+            # ВАЖНО: Добавляем параметры из текущей иерархии, даже если их нет в param_values/param_options
+            # Это нужно для того, чтобы параметры, которые были назначены в иерархии, но еще не имеют значений,
+            # все равно отображались в списке для назначения уровней
+            for param_name in current_hierarchy:
+                if param_name and param_name not in deleted_params and param_name not in service_params:
+                    all_param_names.add(param_name)
+
+            # НЕ добавляем параметры из иерархии по умолчанию - для каждого проекта своя иерархия
+            # Параметры должны быть назначены пользователем для конкретного проекта
+
+            # Также добавляем визуальные параметры по умолчанию
+            default_visual = get_visual_params()
+            for param_name in default_visual:
+                if param_name and param_name not in deleted_params and param_name not in service_params:
+                    all_param_names.add(param_name)
+
+            # Формируем all_params_dict со всеми параметрами, исключая удаленные
+            for param_name in all_param_names:
+                # Дополнительная проверка: исключаем удаленные параметры
+                if param_name in deleted_params:
+                    continue
+                if param_name in param_options_dict:
+                    all_params_dict[param_name] = param_options_dict[param_name]
+                elif param_name in param_values_raw or param_name in param_values_dict:
+                    # Если параметр есть в param_values, но нет в param_options, создаем пустой список
+                    all_params_dict[param_name] = []
+                else:
+                    # Параметр есть только в иерархии или еще не имеет значений - создаем пустой список
+                    all_params_dict[param_name] = []
+
+            # ДОПОЛНИТЕЛЬНАЯ ПРОВЕРКА: Убеждаемся, что все параметры из all_param_names добавлены в all_params_dict
+            for param_name in all_param_names:
+                if param_name not in deleted_params and param_name not in service_params:
+                    if param_name not in all_params_dict:
+                        # Если параметр не был добавлен, добавляем его с пустым списком
+                        all_params_dict[param_name] = []
+
+            # Инициализируем hierarchy_assignments для всех параметров
+            hierarchy_assignments = {}
+
+            # Инициализируем на основе текущей иерархии, исключая удаленные параметры
+            for i, param_name in enumerate(current_hierarchy):
+                if param_name not in deleted_params:
+                    level = i + 1
+                    hierarchy_assignments[param_name] = level
+
+            # Максимальное количество уровней (можно расширить)
+            max_levels = 5
+
+            # Отладочная информация (можно убрать позже)
+            if not all_params_dict:
+                st.warning("⚠️ Нет доступных параметров. Добавьте параметры в разделе '➕ Добавить параметр'.")
+                st.info("💡 Параметры можно добавить вручную или они будут автоматически извлечены при заполнении значений.")
+
+                # Показываем отладочную информацию
+                with st.expander("🔍 Отладочная информация", expanded=False):
+                    st.write(f"**param_values_raw:** {len(param_values_raw)} параметров")
+                    st.write(f"**param_options_dict:** {len(param_options_dict)} параметров")
+                    st.write(f"**param_values_dict (get_param_values):** {len(param_values_dict)} параметров")
+                    st.write(f"**current_hierarchy:** {current_hierarchy}")
+                    st.write(f"**deleted_params:** {list(deleted_params)}")
+                    st.write(f"**all_param_names:** {list(all_param_names)}")
+
+                # Создаем пустой список для дальнейшей работы
+                params_list = []
+            else:
+                st.markdown("#### 📊 Назначение уровней иерархии")
+                st.write("Выберите уровень для каждого параметра (1-й уровень, 2-й уровень, 3-й уровень и т.д.):")
+
+                # Разделяем параметры на колонки для удобства
+                # Фильтруем удаленные и служебные параметры для гарантии, что они не отображаются
+                params_list = sorted([p for p in all_params_dict.keys() if p not in deleted_params and p not in service_params])
+                num_cols = 3
+                params_per_col = (len(params_list) + num_cols - 1) // num_cols
+
+                cols = st.columns(num_cols)
+
+                for idx, param_name in enumerate(params_list):
+                    # Дополнительная проверка: пропускаем удаленные и служебные параметры
+                    if param_name in deleted_params or param_name in service_params:
+                        continue
+
+                    col_idx = idx // params_per_col
+                    if col_idx >= num_cols:
+                        col_idx = num_cols - 1
+
+                    with cols[col_idx]:
+                        current_level = hierarchy_assignments.get(param_name, 0)
+
+                        # Создаем селектбокс для выбора уровня
+                        level_options = ["Не назначен"] + [f"{i}-й уровень" for i in range(1, max_levels + 1)]
+
+                        # Вычисляем индекс с проверкой границ
+                        if current_level > 0 and current_level <= max_levels:
+                            default_index = current_level  # current_level соответствует индексу в level_options
+                        else:
+                            default_index = 0  # "Не назначен"
+
+                        # Дополнительная проверка границ для безопасности
+                        if default_index >= len(level_options):
+                            default_index = 0
+
+                        selectbox_key = f"hierarchy_level_{param_name}"
+                        selected = st.selectbox(
+                            f"**{param_name}**",
+                            level_options,
+                            index=default_index,
+                            key=selectbox_key,
+                            help=f"Назначьте уровень иерархии для параметра '{param_name}'"
+                        )
+
+                        # Сохраняем выбранное значение в hierarchy_assignments
+                        # Значение автоматически сохраняется в st.session_state[selectbox_key]
+                        # Но мы также обновляем локальную переменную для отображения
+                        if selected == "Не назначен":
+                            hierarchy_assignments[param_name] = 0
+                        else:
+                            level_num = int(selected.split("-")[0])
+                            hierarchy_assignments[param_name] = level_num
+
+            # Показываем разделитель только если есть параметры
+            if all_params_dict:
+                st.divider()
+
+            # Обновляем hierarchy_assignments из selectbox'ов для отображения текущей иерархии
+            # Это нужно для правильного отображения текущей иерархии
+            if all_params_dict:
+                for param_name in all_params_dict.keys():
+                    selectbox_key = f"hierarchy_level_{param_name}"
+                    if selectbox_key in st.session_state:
+                        selected_value = st.session_state[selectbox_key]
+                        if selected_value == "Не назначен" or not selected_value:
+                            hierarchy_assignments[param_name] = 0
+                        else:
+                            try:
+                                level_num = int(selected_value.split("-")[0])
+                                hierarchy_assignments[param_name] = level_num
+                            except (ValueError, IndexError):
+                                hierarchy_assignments[param_name] = 0
+
+            # Показываем текущую иерархию (вне зависимости от наличия параметров)
+            st.markdown("#### 📋 Текущая иерархия")
+
+            # Группируем параметры по уровням, исключая удаленные
+            levels_dict = {}
+            for param_name, level in hierarchy_assignments.items():
+                # Пропускаем удаленные параметры
+                if param_name not in deleted_params and level > 0:
+                    if level not in levels_dict:
+                        levels_dict[level] = []
+                    levels_dict[level].append(param_name)
+
+            if levels_dict:
+                # Показываем уровни по порядку
+                for level in sorted(levels_dict.keys()):
+                    params_at_level = sorted(levels_dict[level])
+                    st.write(f"**{level}-й уровень:** {', '.join(params_at_level)}")
+
+                # Показываем полную иерархию
+                all_hierarchy_params = []
+                for level in sorted(levels_dict.keys()):
+                    all_hierarchy_params.extend(sorted(levels_dict[level]))
+
+                if all_hierarchy_params:
+                    hierarchy_str = " → ".join(all_hierarchy_params)
+                    st.success(f"✅ Иерархия: {hierarchy_str}")
+            else:
+                if all_params_dict:
+                    st.warning("⚠️ Не назначено ни одного уровня. Выберите уровень для параметров выше.")
+                else:
+                    st.info("ℹ️ Добавьте параметры, чтобы назначить им уровни иерархии.")
+
+            st.divider()
+
+            # Кнопки сохранения
+            col_save1, col_save2 = st.columns([1, 1])
+
+            with col_save1:
+                if st.button("💾 Сохранить иерархию", type="primary", use_container_width=True, key="save_hierarchy_new"):
+                    # Пересобираем hierarchy_assignments из текущих значений selectbox'ов
+                    hierarchy_assignments_save = {}
+
+                    if all_params_dict:
+                        for param_name in all_params_dict.keys():
+                            selectbox_key = f"hierarchy_level_{param_name}"
+                            # Получаем выбранное значение из session_state
+                            # В Streamlit selectbox сохраняет выбранный элемент (строку), а не индекс
+                            if selectbox_key in st.session_state:
+                                selected_value = st.session_state[selectbox_key]
+                                # selected_value - это строка (выбранный элемент из списка)
+                                if selected_value == "Не назначен" or not selected_value:
+                                    hierarchy_assignments_save[param_name] = 0
+                                else:
+                                    try:
+                                        level_num = int(selected_value.split("-")[0])
+                                        hierarchy_assignments_save[param_name] = level_num
+                                    except (ValueError, IndexError):
+                                        hierarchy_assignments_save[param_name] = 0
+                            else:
+                                # Если значения нет в session_state, используем текущее из hierarchy_assignments
+                                hierarchy_assignments_save[param_name] = hierarchy_assignments.get(param_name, 0)
+                    else:
+                        # Если нет параметров, используем текущие значения
+                        hierarchy_assignments_save = hierarchy_assignments.copy()
+
+                    # Группируем параметры по уровням, исключая удаленные
+                    levels_dict_save = {}
+                    for param_name, level in hierarchy_assignments_save.items():
+                        # Пропускаем удаленные параметры
+                        if param_name not in deleted_params and level > 0:
+                            if level not in levels_dict_save:
+                                levels_dict_save[level] = []
+                            levels_dict_save[level].append(param_name)
+
+                    # Собираем параметры по уровням (только назначенные и не удаленные)
+                    new_hierarchy = []
+                    for level in sorted(levels_dict_save.keys()):
+                        new_hierarchy.extend(sorted(levels_dict_save[level]))
+
+                    # Сохраняем иерархию
+                    st.session_state["hierarchy_params"] = new_hierarchy
+
+                    # Для обратной совместимости сохраняем subtype и visual
+                    # (можно будет использовать в будущем)
+                    if "subtype_params" not in st.session_state:
+                        st.session_state["subtype_params"] = []
+                    if "visual_params" not in st.session_state:
+                        st.session_state["visual_params"] = []
+
+                    if save_hierarchy_config():
+                        if new_hierarchy:
+                            st.success(f"✅ Иерархия сохранена! ({len(new_hierarchy)} параметров на {len(levels_dict_save)} уровнях)")
+                        else:
+                            st.success("✅ Иерархия очищена (все параметры сняты с уровней)")
+                        # Перезагружаем страницу, чтобы изменения применились ко всем разделам,
+                        # включая "📊 Анализ комбинаций иерархических параметров"
+                        st.rerun()
+                    else:
+                        st.warning("⚠️ Иерархия сохранена в памяти, но не в файл")
+                        # Даже если файл не сохранен, перезагружаем страницу для применения изменений в памяти
+                        st.rerun()
+
+            with col_save2:
+                if st.button("🔄 Очистить все уровни", use_container_width=True, key="clear_hierarchy_new"):
+                    st.session_state["hierarchy_params"] = []
+                    if save_hierarchy_config():
+                        st.success("✅ Все уровни очищены!")
+                    else:
+                        st.warning("⚠️ Уровни очищены в памяти, но не в файл")
+                    # Перезагружаем страницу, чтобы изменения применились ко всем разделам
+                    st.rerun()
+
+        elif editor_mode == "👁️ Скрыть параметры":
+            st.markdown("### 👁️ Управление видимостью параметров")
+            st.info("💡 Скрытые параметры не будут отображаться в таблице и не будут учитываться при формировании топ комбинаций. Товары останутся в таблице.")
+
+            # Получаем все параметры
+            param_values_dict = get_param_values()
+            param_options_dict = st.session_state.get("param_options", {})
+            all_params_dict = param_options_dict.copy()
+            for param_name, param_data in param_values_dict.items():
+                if param_name not in all_params_dict:
+                    all_params_dict[param_name] = []
+
+            if not all_params_dict:
+                st.warning("⚠️ Нет доступных параметров для скрытия.")
+            else:
+                # Получаем текущие скрытые параметры
+                current_excluded_params = st.session_state.get("excluded_params", [])
+
+                # Загружаем настройки исключения, если еще не загружены
+                if "excluded_params_loaded" not in st.session_state:
+                    load_excluded_params_settings()
+                    st.session_state["excluded_params_loaded"] = True
+                    current_excluded_params = st.session_state.get("excluded_params", [])
+
+                st.markdown("#### Выберите параметры для скрытия:")
+                # Фильтруем значения по умолчанию, чтобы они были только из доступных опций
+                available_param_names_editor = sorted(all_params_dict.keys())
+                filtered_default_editor = [p for p in current_excluded_params if p in available_param_names_editor]
+
+                excluded_params_selected = st.multiselect(
+                    "Скрыть параметры:",
+                    options=available_param_names_editor,
+                    default=filtered_default_editor,
+                    help="Выберите параметры, которые нужно скрыть. Они не будут показываться в таблице и не будут учитываться в топ комбинациях.",
+                    key="excluded_params_select_editor"
+                )
+
+                # Показываем статистику
+                col_stat1, col_stat2 = st.columns(2)
+                with col_stat1:
+                    st.metric("Видимых параметров", len(all_params_dict) - len(excluded_params_selected))
+                with col_stat2:
+                    st.metric("Скрытых параметров", len(excluded_params_selected))
+
+                # Показываем список скрытых параметров
+                if excluded_params_selected:
+                    st.markdown("#### 👁️ Скрытые параметры:")
+                    for param_name in excluded_params_selected:
+                        st.write(f"• {param_name}")
+
+                # Кнопки управления
+                col_hide1, col_hide2 = st.columns(2)
+                with col_hide1:
+                    if st.button("💾 Сохранить настройки видимости", type="primary", use_container_width=True, key="save_excluded_params"):
+                        st.session_state["excluded_params"] = excluded_params_selected
+                        if save_excluded_params_settings():
+                            st.success("✅ Настройки видимости сохранены!")
+                            st.rerun()
+                        else:
+                            st.warning("⚠️ Настройки сохранены в памяти, но не в файл")
+
+                with col_hide2:
+                    if st.button("🔄 Показать все параметры", use_container_width=True, key="show_all_params"):
+                        st.session_state["excluded_params"] = []
+                        if save_excluded_params_settings():
+                            st.success("✅ Все параметры теперь видимы!")
+                            st.rerun()
+                        else:
+                            st.warning("⚠️ Настройки сохранены в памяти, но не в файл")
+
+        elif editor_mode == "🗑️ Удаление параметров":
+            st.markdown("### 🗑️ Управление удалением параметров")
+            st.warning("⚠️ **Внимание:** Удаление параметров необратимо. Параметры будут полностью удалены из всех данных.")
+
+            # Функция для определения служебных параметров
+            def is_service_param(param_name):
+                """Проверяет, является ли параметр служебным (данные, а не параметр товара)"""
+                service_keywords = [
+                    "остат", "остатки", "остаток",
+                    "дней", "дни", "день",
+                    "период", "периода", "периоды",
+                    "конец", "начало", "дата",
+                    "цена", "цена,", "стоимость", "прибыль", "выручка", "расход",
+                    "расчет", "рекоменд", "оптимальн",
+                    "реализац", "возврат", "выкуп",
+                    "оборачиваемость", "конверсия",
+                    "рейтинг", "отзыв", "вопрос",
+                    "показ", "клик", "ctr", "cpc", "cpa", "roas",
+                    "продано", "заказано", "заказ,", "продаж",
+                    "stock", "days", "period", "price", "revenue", "profit"
+                ]
+                param_lower = str(param_name).lower()
+                for keyword in service_keywords:
+                    if keyword in param_lower:
+                        return True
+                return False
+
+            # Получаем все параметры (исключая уже удаленные)
+            param_values_dict = get_param_values()
+            param_options_dict = st.session_state.get("param_options", {})
+            all_params_dict = param_options_dict.copy()
+            for param_name, param_data in param_values_dict.items():
+                if param_name not in all_params_dict:
+                    all_params_dict[param_name] = []
+
+            # Получаем список удаленных параметров
+            deleted_params = st.session_state.get("deleted_params", set())
+            if not isinstance(deleted_params, set):
+                deleted_params = set(deleted_params)
+
+            # Автоматически находим служебные параметры
+            service_params = [p for p in all_params_dict.keys() if is_service_param(p)]
+
+            # Показываем информацию о найденных служебных параметрах
+            if service_params:
+                st.markdown("#### ⚠️ Обнаружены служебные параметры (данные, а не параметры товара):")
+                st.info(f"Найдено {len(service_params)} служебных параметров, которые рекомендуется удалить:")
+                for param_name in sorted(service_params):
+                    st.write(f"• **{param_name}**")
+
+                if st.button("🗑️ Удалить все служебные параметры", type="secondary", use_container_width=True, key="delete_service_params_btn"):
+                    deleted_count = 0
+                    for param_name in service_params:
+                        # Удаляем из param_values
+                        if param_name in st.session_state.get("param_values", {}):
+                            del st.session_state["param_values"][param_name]
+                        # Удаляем из param_options
+                        if param_name in st.session_state.get("param_options", {}):
+                            del st.session_state["param_options"][param_name]
+                        # Добавляем в список удаленных
+                        if "deleted_params" not in st.session_state:
+                            st.session_state["deleted_params"] = set()
+                        if not isinstance(st.session_state["deleted_params"], set):
+                            st.session_state["deleted_params"] = set(st.session_state["deleted_params"])
+                        st.session_state["deleted_params"].add(param_name)
+                        deleted_count += 1
+
+                    # Сохраняем удаления ТОЛЬКО для текущего проекта (по записи журнала на параметр)
+                    if not all([save_param_delete(param_name) for param_name in service_params]):
+                        st.warning("⚠️ Возникла ошибка при сохранении удаленных параметров")
+
+                    st.success(f"✅ Удалено {deleted_count} служебных параметров!")
+                    st.rerun()
+
+                st.divider()
+
+            if not all_params_dict:
+                st.warning("⚠️ Нет доступных параметров для удаления.")
+            else:
+                st.markdown("#### Доступные параметры для удаления:")
+
+                # Таблица с параметрами и кнопками удаления
+                for param_name in sorted(all_params_dict.keys()):
+                    col_del1, col_del2, col_del3 = st.columns([3, 1, 1])
+
+                    with col_del1:
+                        options_count = len(all_params_dict[param_name]) if isinstance(all_params_dict[param_name], list) else 0
+                        values_count = len(param_values_dict.get(param_name, {})) if param_name in param_values_dict else 0
+                        st.write(f"**{param_name}** - {options_count} вариантов, {values_count} значений")
+
+                    with col_del2:
+                        # Проверяем, является ли параметр иерархическим
+                        hierarchy_params = get_hierarchy_params()
+                        if param_name in hierarchy_params:
+                            st.caption("🔗 Иерархический")
+
+                    with col_del3:
+                        if st.button("🗑️ Удалить", key=f"delete_param_editor_{param_name}", type="secondary"):
+                            # Удаляем параметр
+                            if param_name in st.session_state.get("param_options", {}):
+                                del st.session_state["param_options"][param_name]
+                            if param_name in st.session_state.get("param_values", {}):
+                                del st.session_state["param_values"][param_name]
+
+                            # Добавляем в список удаленных
+                            if "deleted_params" not in st.session_state:
+                                st.session_state["deleted_params"] = set()
+                            if not isinstance(st.session_state["deleted_params"], set):
+                                st.session_state["deleted_params"] = set(st.session_state["deleted_params"])
+
+                            st.session_state["deleted_params"].add(param_name)
+
+                            # Сохраняем удаление ТОЛЬКО для текущего проекта (одна запись журнала)
+                            if save_param_delete(param_name):
+                                st.success(f"✅ Параметр '{param_name}' удален из текущего проекта!")
+                                st.rerun()
+                            else:
+                                st.warning(f"⚠️ Параметр '{param_name}' удален из памяти, но не сохранен в файл")
+
+                    st.divider()
+
+                # Показываем удаленные параметры с возможностью восстановления
+                if deleted_params:
+                    st.markdown("---")
+                    st.markdown("#### 🗑️ Удаленные параметры:")
+                    st.info("💡 Удаленные параметры можно восстановить. Восстановление вернет параметр в список доступных, но значения будут потеряны, если не были сохранены в истории.")
+
+                    # Показываем каждый удаленный параметр с кнопкой восстановления
+                    for param_name in sorted(deleted_params):
+                        col_restore1, col_restore2 = st.columns([3, 1])
+
+                        with col_restore1:
+                            st.write(f"• **{param_name}**")
+
+                        with col_restore2:
+                            if st.button("🔄 Восстановить", key=f"restore_param_{param_name}", type="primary", use_container_width=True):
+                                # Удаляем параметр из списка удаленных
+                                if "deleted_params" in st.session_state:
+                                    st.session_state["deleted_params"].discard(param_name)
+
+                                # Инициализируем параметр пустыми значениями, если его нет
+                                if param_name not in st.session_state.get("param_values", {}):
+                                    if "param_values" not in st.session_state:
+                                        st.session_state["param_values"] = {}
+                                    st.session_state["param_values"][param_name] = {}
+
+                                if param_name not in st.session_state.get("param_options", {}):
+                                    if "param_options" not in st.session_state:
+                                        st.session_state["param_options"] = {}
+                                    st.session_state["param_options"][param_name] = []
+
+                                # Сохраняем изменения: запись вариантов в журнале возвращает параметр в проект
+                                if save_param_options(param_name):
+                                    st.success(f"✅ Параметр '{param_name}' восстановлен!")
+                                    st.rerun()
+                                else:
+                                    st.warning(f"⚠️ Параметр '{param_name}' восстановлен в памяти, но не сохранен в файл")
+
+                    st.divider()
+
+                    # Кнопка для восстановления всех удаленных параметров
+                    if st.button("🔄 Восстановить все удаленные параметры", type="secondary", use_container_width=True, key="restore_all_deleted_params"):
+                        # Инициализируем все удаленные параметры пустыми значениями
+                        for param_name in list(deleted_params):
+                            if param_name not in st.session_state.get("param_values", {}):
+                                if "param_values" not in st.session_state:
+                                    st.session_state["param_values"] = {}
+                                st.session_state["param_values"][param_name] = {}
+
+                            if param_name not in st.session_state.get("param_options", {}):
+                                if "param_options" not in st.session_state:
+                                    st.session_state["param_options"] = {}
+                                st.session_state["param_options"][param_name] = []
+
+                        # Очищаем список удаленных
+                        st.session_state["deleted_params"] = set()
+
+                        # Сохраняем изменения: запись вариантов в журнале возвращает параметр в проект
+                        if all([save_param_options(param_name) for param_name in deleted_params]):
+                            st.success("✅ Все удаленные параметры восстановлены!")
+                            st.rerun()
+                        else:
+                            st.warning("⚠️ Параметры восстановлены в памяти, но не сохранены в файл")
+                else:
+                    st.info("ℹ️ Нет удаленных параметров")
+
+        elif editor_mode == "📋 Просмотр всех параметров":
+            if param_options:
+                # Это будет старый раздел "Просмотр и редактирование"
+                st.markdown("### 📋 Просмотр и редактирование параметров")
+                # Поиск параметров
+                search_param = st.text_input("🔍 Поиск параметра:", placeholder="Введите название параметра...", key="search_param_editor")
+
+                # Фильтрация параметров
+                filtered_params = param_options.copy()
+                if search_param:
+                    filtered_params = {k: v for k, v in param_options.items() if search_param.lower() in k.lower()}
+
+                if filtered_params:
+                    # Сортировка параметров
+                    sort_order = st.selectbox("Сортировка:", ["По алфавиту", "По количеству вариантов"], key="sort_params")
+
+                    if sort_order == "По количеству вариантов":
+                        filtered_params = dict(sorted(filtered_params.items(), key=lambda x: len(x[1]) if isinstance(x[1], list) else 0, reverse=True))
+                    elif sort_order == "По алфавиту":
+                        filtered_params = dict(sorted(filtered_params.items()))
+
+                    # Отображаем параметры в упрощенном виде
+                    for param_name, options in filtered_params.items():
+                        with st.expander(f"📋 {param_name} ({len(options) if isinstance(options, list) else 0} вариантов)"):
+                            if isinstance(options, list) and options:
+                                st.write("**Варианты значений:**")
+                                for option in options:
+                                    st.write(f"• {option}")
+                            else:
+                                st.info("Нет вариантов значений")
+                else:
+                    st.info("Параметры не найдены")
+            else:
+                st.warning("⚠️ Нет параметров для отображения")
+
+        elif editor_mode == "📥 Импорт / 📤 Экспорт":
+            st.markdown("### 📥 Импорт / 📤 Экспорт")
+
+            # Разделы: Сохранение проекта и Экспорт/Импорт параметров
+            tab_project, tab_params = st.tabs(["💾 Проект", "📋 Параметры"])
+
+            with tab_project:
+                st.markdown("#### 💾 Сохранение и загрузка полного проекта")
+                st.info("💡 Полный проект включает: параметры, иерархию, настройки, исключенные параметры и все данные проекта.")
+
+                col_project_save, col_project_load = st.columns(2)
+
+                with col_project_save:
+                    st.markdown("##### 📤 Сохранить проект")
+
+                    # Показываем информацию о текущем проекте
+                    current_file_name = st.session_state.get("cached_file_name", "Не загружен")
+                    current_project_name = st.session_state.get("current_project_name", None)
+
+                    if current_file_name != "Не загружен":
+                        st.info(f"📄 Текущий файл: **{current_file_name}**")
+                    else:
+                        st.warning("⚠️ Файл данных не загружен. Проект будет сохранен без файла данных.")
+
+                    if current_project_name:
+                        st.caption(f"📁 Проект: **{current_project_name}**")
+
+                    project_name = st.text_input(
+                        "Название проекта:",
+                        value=current_project_name or f"Проект_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}",
+                        key="project_name_input",
+                        help="Введите название проекта для сохранения. Для каждого проекта будут сохранены свои параметры и файл данных."
+                    )
+
+                    if st.button("💾 Сохранить полный проект", type="primary", use_container_width=True, key="save_full_project_btn"):
+                        with st.spinner("Сохраняю проект..."):
+                            project_json, saved_name, project_id = save_full_project(project_name)
+                            if project_json:
+                                file_size_mb = len(project_json.encode('utf-8')) / (1024 * 1024)
+                                st.download_button(
+                                    label=f"⬇️ Скачать проект ({file_size_mb:.2f} MB)",
+                                    data=project_json,
+                                    file_name=f"{saved_name}.json",
+                                    mime="application/json",
+                                    use_container_width=True,
+                                    key="download_project_btn"
+                                )
+                                st.success(f"✅ Проект '{saved_name}' готов к скачиванию!")
+                                st.info(f"💡 ID проекта: `{project_id}`\n\nПроект включает:\n• Все параметры и их значения\n• Иерархию параметров\n• Файл данных (если загружен)\n• Настройки и фильтры")
+                            else:
+                                st.error("❌ Ошибка сохранения проекта")
+
+                    # Показываем информацию о проекте
+                    st.markdown("**📊 Текущий проект содержит:**")
+                    param_count = len(param_options) if param_options else 0
+                    values_count = sum(len(v) for v in param_values.values()) if param_values else 0
+                    st.caption(f"• Параметров: {param_count}")
+                    st.caption(f"• Значений параметров: {values_count}")
+                    st.caption(f"• Иерархических параметров: {len(st.session_state.get('hierarchy_params', []))}")
+                    st.caption(f"• Исключенных параметров: {len(st.session_state.get('excluded_params', []))}")
+
+                with col_project_load:
+                    st.markdown("##### 📥 Загрузить проект")
+                    uploaded_project = st.file_uploader(
+                        "Загрузить файл проекта (.json):",
+                        type=["json"],
+                        key="import_project_file",
+                        help="Выберите файл проекта для загрузки"
+                    )
+
+                    if uploaded_project:
+                        try:
+                            project_json = uploaded_project.read().decode('utf-8')
+                            project_data = json.loads(project_json)
+
+                            # Показываем информацию о проекте
+                            project_name_loaded = project_data.get("project_name", "Неизвестный проект")
+                            export_date = project_data.get("export_date", "Неизвестно")
+                            project_id = project_data.get("project_id", "N/A")
+                            project_version = project_data.get("project_version", "1.0")
+                            cached_file_name = project_data.get("cached_file_name", None)
+                            file_size = project_data.get("file_size", 0)
+
+                            st.success(f"✅ Файл загружен: **{project_name_loaded}**")
+                            st.caption(f"📅 Дата создания: {export_date} | Версия: {project_version} | ID: `{project_id}`")
+
+                            # Показываем содержимое проекта
+                            with st.expander("📋 Содержимое проекта", expanded=True):
+                                col_info1, col_info2 = st.columns(2)
+
+                                with col_info1:
+                                    if "param_options" in project_data:
+                                        st.metric("Параметров", len(project_data['param_options']))
+                                    if "hierarchy_params" in project_data:
+                                        st.metric("Иерархических", len(project_data['hierarchy_params']))
+                                    if "excluded_params" in project_data:
+                                        st.metric("Исключенных", len(project_data['excluded_params']))
+
+                                with col_info2:
+                                    if cached_file_name:
+                                        st.metric("Файл данных", cached_file_name)
+                                        if file_size > 0:
+                                            st.caption(f"Размер: {file_size / 1024 / 1024:.2f} MB")
+                                    else:
+                                        st.info("Файл данных отсутствует")
+
+                                # Показываем список параметров
+                                if "param_options" in project_data and project_data["param_options"]:
+                                    st.markdown("**Параметры проекта:**")
+                                    param_list = ", ".join(list(project_data["param_options"].keys())[:10])
+                                    if len(project_data["param_options"]) > 10:
+                                        param_list += f" ... и еще {len(project_data['param_options']) - 10}"
+                                    st.caption(param_list)
+
+                            st.warning("⚠️ **Внимание:** При загрузке проекта все текущие параметры будут заменены параметрами проекта!")
+
+                            if st.button("📥 Загрузить проект", type="primary", use_container_width=True, key="load_full_project_btn"):
+                                with st.spinner("Загружаю проект..."):
+                                    success, loaded_name = load_full_project(project_json)
+                                    if success:
+                                        st.success(f"✅ Проект '{loaded_name}' успешно загружен!")
+                                        st.info("🔄 Применяю изменения... Перезагрузите страницу для полного применения.")
+                                        # Небольшая задержка перед rerun, чтобы пользователь увидел сообщение
+                                        import time
+                                        time.sleep(1)
+                                        st.rerun()
+                                    else:
+                                        st.error("❌ Ошибка загрузки проекта")
+
+                        except Exception as e:
+                            st.error(f"❌ Ошибка при загрузке проекта: {e}")
+                            st.caption(f"Детали: {str(e)}")
+
+            with tab_params:
+                st.markdown("#### 📋 Экспорт / Импорт только параметров")
+                st.info("💡 Экспорт/импорт только параметров (без настроек и иерархии)")
+
+            # Кнопка сохранения параметров
+            st.divider()
+            col_save_editor1, col_save_editor2 = st.columns([1, 3])
+            with col_save_editor1:
+                if st.button("💾 Сохранить все параметры", type="primary", use_container_width=True, key="save_all_params_btn"):
+                    # Сначала сохраняем deleted_params (это очистит все файлы)
+                    if save_deleted_params_to_file():
+                        # Затем сохраняем param_options и param_values
+                        if save_param_values_to_file():
+                            # Очищаем результаты массового анализа от удаленных параметров
+                            if "mass_analysis_results" in st.session_state:
+                                st.session_state["mass_analysis_results"] = remove_deleted_params_from_mass_results(
+                                    st.session_state["mass_analysis_results"]
+                                )
+                                save_mass_analysis_results(st.session_state["mass_analysis_results"])
+                            st.success("✅ Все параметры и настройки сохранены!")
+                            st.rerun()
+                        else:
+                            st.error("❌ Ошибка сохранения параметров")
+                    else:
+                        st.error("❌ Ошибка сохранения списка удаленных параметров")
+
+            with col_save_editor2:
+                st.info("💡 Сохраняет все параметры, варианты и список удаленных параметров в файлы")
+
+                # Показываем текущие удаленные параметры для отладки
+                deleted_params = st.session_state.get("deleted_params", set())
+                if deleted_params:
+                    st.caption(f"🗑️ Удаленные параметры: {', '.join(sorted(deleted_params))}")
+                else:
+                    st.caption("ℹ️ Нет удаленных параметров")
+
+            st.divider()
+
+            col_export, col_import = st.columns(2)
+
+            with col_export:
+                st.markdown("##### 📤 Экспорт параметров")
+                if st.button("💾 Экспортировать в JSON", use_container_width=True, key="export_params_btn"):
+                    export_data = {
+                        "param_options": param_options,
+                        "param_values": param_values,
+                        "export_date": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
+                    }
+                    st.download_button(
+                        label="⬇️ Скачать файл",
+                        data=json.dumps(export_data, ensure_ascii=False, indent=2),
+                        file_name=f"parameters_export_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.json",
+                        mime="application/json",
+                        use_container_width=True,
+                        key="download_params_btn"
+                    )
+
+            with col_import:
+                st.markdown("##### 📥 Импорт параметров")
+                uploaded_file = st.file_uploader(
+                    "Загрузить JSON файл:",
+                    type=["json"],
+                    key="import_params_file"
+                )
+                if uploaded_file:
+                    try:
+                        import_data = json.load(uploaded_file)
+                        if "param_options" in import_data:
+                            st.success(f"✅ Файл загружен: {len(import_data.get('param_options', {}))} параметров")
+
+                            if st.button("📥 Импортировать параметры", type="primary", use_container_width=True, key="import_params_btn"):
+                                # Объединяем с существующими параметрами
+                                imported_options = import_data.get("param_options", {})
+                                imported_values = import_data.get("param_values", {})
+
+                                # Обновляем param_options
+                                for param_name, options in imported_options.items():
+                                    param_options[param_name] = options
+
+                                # Обновляем param_values
+                                for param_name, values in imported_values.items():
+                                    if param_name not in param_values:
+                                        param_values[param_name] = {}
+                                    param_values[param_name].update(values)
+
+                                st.session_state["param_options"] = param_options
+                                st.session_state["param_values"] = param_values
+
+                                if save_param_values_to_file():
+                                    st.success(f"✅ Импортировано {len(imported_options)} параметров!")
+                                    st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ Ошибка при импорте: {e}")
+
+    st.divider()
+    # ========== КОНЕЦ РЕДАКТОРА ПАРАМЕТРОВ ==========
+
+    # ========== СЕКЦИЯ: Экспорт/Импорт параметров товаров в CSV ==========
+    with st.expander("📥📤 Экспорт / Импорт параметров товаров", expanded=False):
+        st.markdown("### 📥📤 Экспорт / Импорт параметров товаров")
+        st.info("💡 Скачайте CSV файл с параметрами товаров, отредактируйте его в Excel или другом редакторе, затем загрузите обратно для применения изменений.")
+
+        col_export_params, col_import_params = st.columns(2)
+
+        with col_export_params:
+            st.markdown("#### 📥 Экспорт параметров в CSV")
+            if st.button("📥 Скачать CSV с параметрами", type="primary", use_container_width=True, key="export_product_params_btn"):
+                csv_data = export_product_params_to_csv()
+                if csv_data:
+                    file_name = st.session_state.get("cached_file_name", "product_params")
+                    if file_name:
+                        base_name = os.path.splitext(file_name)[0]
+                    else:
+                        base_name = "product_params"
+                    timestamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
+                    csv_filename = f"{base_name}_params_{timestamp}.csv"
+
+                    st.download_button(
+                        label="💾 Скачать CSV файл",
+                        data=csv_data,
+                        file_name=csv_filename,
+                        mime="text/csv",
+                        key="download_product_params_csv"
+                    )
+
+                    # Показываем статистику
+                    param_values = get_param_values()
+                    df = st.session_state.get("df") or st.session_state.get("display_df")
+                    if df is not None and "Артикул" in df.columns:
+                        total_skus = len(df["Артикул"].dropna().unique())
+                        params_count = len(param_values)
+                        st.success(f"✅ CSV файл готов! Товаров: {total_skus}, Параметров: {params_count}")
+                else:
+                    st.error("❌ Ошибка при экспорте параметров. Убедитесь, что загружен файл с данными и есть параметры.")
+
+        with col_import_params:
+            st.markdown("#### 📤 Импорт параметров из CSV")
+            uploaded_params_file = st.file_uploader(
+                "Загрузите отредактированный CSV файл",
+                type=['csv'],
+                key="import_product_params_csv"
+            )
+            if uploaded_params_file is not None:
+                try:
+                    csv_data = uploaded_params_file.read().decode('utf-8-sig')
+                    imported_count, updated_count = import_product_params_from_csv(csv_data)
+                    if imported_count > 0:
+                        # Сохраняем параметры в файл
+                        if save_param_values_to_file():
+                            st.success(f"✅ Импортировано товаров: {imported_count}, обновлено параметров: {updated_count}")
+                            st.info("💡 Параметры применены и сохранены. Обновите страницу, чтобы увидеть изменения.")
+                            st.rerun()
+                        else:
+                            st.warning("⚠️ Параметры импортированы, но не удалось сохранить в файл")
+                    else:
+                        st.warning("⚠️ Не удалось импортировать данные из CSV файла")
+                except Exception as e:
+                    st.error(f"❌ Ошибка при импорте CSV: {e}")
+
+        st.markdown("---")
+        st.markdown("**Инструкция:**")
+        st.markdown("""
+                1. Нажмите "Скачать CSV с параметрами" для получения файла со всеми товарами и их параметрами
+                2. Откройте файл в Excel, Google Sheets или другом редакторе
+                3. Отредактируйте значения параметров для нужных товаров
+                4. Сохраните файл в формате CSV
+                5. Загрузите отредактированный файл обратно через форму выше
+                6. Параметры будут автоматически применены и сохранены
+                """)
+
+    st.divider()
+    # ========== КОНЕЦ СЕКЦИИ ЭКСПОРТ/ИМПОРТ ПАРАМЕТРОВ ==========
+
+    # Получаем данные
+    param_values = get_param_values()
+
+    # Инициализация session_state для автосохранения (отключено)
+    if "last_autosave" not in st.session_state:
+        st.session_state["last_autosave"] = 0
+
+    # Автосохранение включено. Для проекта правки значений, вариантов, переименования и
+    # удаления уже в журнале и сворачиваются фоновым компактором; полный снимок пишется
+    # не чаще раза в 30 секунд и только после изменений мимо журнала (mark_params_dirty)
+    import time
+    current_time = time.time()
+    if current_time - st.session_state["last_autosave"] > 30:  # 30 секунд
+        if not st.session_state.get("cached_file_name"):
+            if save_param_values_to_file():
+                st.session_state["last_autosave"] = current_time
+                st.info("🔄 Автосохранение выполнено")
+        else:
+            if st.session_state.get("params_dirty") and save_param_values_to_file():
+                st.info("🔄 Автосохранение выполнено")
+            st.session_state["last_autosave"] = current_time
+
+    # ========== СЕКЦИЯ: Определение параметров по ссылке (через анализ изображений) ==========
+    st.divider()
+    st.subheader("🔗 Определение параметров по ссылке (анализ через нейросеть)")
+    st.write("Вставьте ссылку на товар Wildberries. Система получит до 5 фотографий товара через screenshotapi.net и отправит их в нейросеть для анализа:")
+
+    # Поле для API ключа OpenAI
+    # Загружаем ключ из secrets.toml при первом запуске
+    if 'openai_api_key' not in st.session_state:
+        try:
+            # Пытаемся загрузить из secrets.toml
+            default_key = st.secrets.get('openai_api_key', '')
+            if default_key:
+                st.session_state['openai_api_key'] = default_key
+        except:
+            pass
+
+    with st.expander("⚙️ Настройки API", expanded=False):
+        # Проверяем наличие библиотеки openai
+        if not OPENAI_AVAILABLE:
+            st.warning("⚠️ Для анализа изображений через нейросеть необходимо установить библиотеку: `pip install openai`")
+            st.code("pip install openai", language="bash")
+        else:
+            # Режим отладки
+            debug_mode = st.checkbox(
+                "🔍 Режим отладки",
+                value=st.session_state.get('debug_ai_analysis', False),
+                help="Показывать детальную информацию об анализе изображений",
+                key="debug_ai_checkbox"
+            )
+            if debug_mode:
+                st.session_state['debug_ai_analysis'] = True
+            else:
+                st.session_state['debug_ai_analysis'] = False
+        default_key_value = st.session_state.get('openai_api_key', '')
+        openai_api_key = st.text_input(
+            "🔑 OpenAI API ключ",
+            value=default_key_value,
+            type="password",
+            help="Введите ваш OpenAI API ключ для анализа изображений. Ключ сохраняется только в текущей сессии.",
+            key="openai_api_key_input"
+        )
+        if openai_api_key:
+            st.session_state['openai_api_key'] = openai_api_key
+            if openai_api_key == default_key_value and default_key_value:
+                st.success("✅ Используется стандартный API ключ")
+            else:
+                st.success("✅ API ключ сохранен")
+        else:
+            if default_key_value:
+                st.info("ℹ️ Используется стандартный API ключ из настроек")
+            else:
+                st.info("ℹ️ Для работы с нейросетью необходим OpenAI API ключ. Получить можно на https://platform.openai.com/api-keys")
+
+        # Поле для токена screenshotapi.net
+        st.divider()
+        st.markdown("**📸 ScreenshotAPI.net (для получения изображений товаров)**")
+
+        # Загружаем токен из secrets.toml при первом запуске
+        if 'screenshotapi_token' not in st.session_state:
+            try:
+                default_token = st.secrets.get('screenshotapi_token', '')
+                if default_token:
+                    st.session_state['screenshotapi_token'] = default_token
+                else:
+                    # Устанавливаем токен по умолчанию
+                    st.session_state['screenshotapi_token'] = 'MDA94V3-4C14RXS-KSE2KMK-T08BD9M'
+            except:
+                # Устанавливаем токен по умолчанию
+                st.session_state['screenshotapi_token'] = 'MDA94V3-4C14RXS-KSE2KMK-T08BD9M'
+
+        default_token_value = st.session_state.get('screenshotapi_token', 'MDA94V3-4C14RXS-KSE2KMK-T08BD9M')
+        screenshotapi_token = st.text_input(
+            "🔑 ScreenshotAPI.net токен",
+            value=default_token_value,
+            type="password",
+            help="Введите ваш токен screenshotapi.net для получения изображений товаров. Токен сохраняется только в текущей сессии.",
+            key="screenshotapi_token_input"
+        )
+        if screenshotapi_token:
+            st.session_state['screenshotapi_token'] = screenshotapi_token
+            if screenshotapi_token == default_token_value and default_token_value:
+                st.success("✅ Используется стандартный токен")
+            else:
+                st.success("✅ Токен сохранен")
+        else:
+            if default_token_value:
+                st.info("ℹ️ Используется стандартный токен из настроек")
+            else:
+                st.info("ℹ️ Для получения изображений через screenshotapi.net необходим токен. Получить можно на https://screenshotapi.net")
+
+    # Переключатель между одиночным и массовым анализом
+    analysis_mode = st.radio(
+        "Режим анализа:",
+        ["Массовый анализ", "Одиночный анализ"],
+        horizontal=True,
+        index=0,
+        key="analysis_mode_radio"
+    )
+
+    if analysis_mode == "Одиночный анализ":
+        col_url1, col_url2 = st.columns([3, 1])
+        with col_url1:
+            product_url = st.text_input(
+                "Ссылка на товар Wildberries",
+                placeholder="https://www.wildberries.ru/catalog/12345678/detail.aspx",
+                key="product_url_input"
+            )
+
+        with col_url2:
+            st.write("")  # Отступ
+            st.write("")  # Отступ
+            analyze_btn = st.button("🤖 Анализировать через нейросеть", type="primary", key="extract_params_btn")
+
+        if analyze_btn:
+            if product_url:
+                with st.spinner("⏳ Анализ фотографий товара..."):
+                    # Извлекаем артикул
+                    sku = extract_sku_from_url(product_url)
+
+                    if sku:
+                        st.success(f"✅ Артикул найден: **{sku}**")
+
+                        # Получаем и анализируем изображения
+                        progress_bar = st.progress(0)
+                        status_text = st.empty()
+
+                        # ПЕРВЫЙ ЭТАП: Определение комплектности по характеристикам
+                        status_text.text("🔍 Анализ характеристик товара для определения комплектности...")
+                        progress_bar.progress(10)
+
+                        completeness = determine_completeness(sku)
+                        initial_params = {}
+                        if completeness:
+                            initial_params["Комплект"] = completeness
+                            st.info(f"📦 **Комплектность:** {completeness}")
+
+                        # ВТОРОЙ ЭТАП: Получение изображений через screenshotapi.net
+                        status_text.text("📸 Получение изображений через screenshotapi.net...")
+                        progress_bar.progress(20)
+
+                        # Получаем информацию о статусе изображений
+                        images_info = get_screenshotapi_images_with_status(sku, max_images=5)
+
+                        if not images_info:
+                            st.error("❌ Не удалось получить URL-ы изображений. Проверьте токен screenshotapi.net.")
+                        else:
+                            # Разделяем изображения на те, что в кеше, и те, что нужно скачать
+                            cached_images = [img for img in images_info if img["status"] == "cached"]
+                            downloading_images = [img for img in images_info if img["status"] == "downloading"]
+
+                            # Показываем информацию о статусе изображений
+                            st.markdown("### 📸 Статус изображений (5 шт.)")
+
+                            # Создаем контейнеры для отображения статуса
+                            status_cols = st.columns(2)
+
+                            with status_cols[0]:
+                                st.markdown(f"**✅ В кеше:** {len(cached_images)} из 5")
+                                if cached_images:
+                                    for img_info in cached_images:
+                                        st.success(f"📷 Фото {img_info['index']}: В кеше")
+
+                            with status_cols[1]:
+                                st.markdown(f"**⬇️ Скачивается:** {len(downloading_images)} из 5")
+                                if downloading_images:
+                                    for img_info in downloading_images:
+                                        st.info(f"📷 Фото {img_info['index']}: Скачивается...")
+
+                            # Скачиваем изображения, которых нет в кеше
+                            if downloading_images:
+                                status_text.text(f"⬇️ Скачивание {len(downloading_images)} изображений...")
+                                progress_bar.progress(30)
+
+                                downloaded_count = 0
+                                download_status_placeholder = st.empty()
+
+                                for img_idx, img_info in enumerate(downloading_images):
+                                    status_text.text(f"⬇️ Скачивание фото {img_info['index']}/5...")
+                                    progress_bar.progress(30 + int((img_idx + 1) / len(downloading_images) * 20))
+
+                                    # Увеличиваем timeout для первого изображения (оно может загружаться дольше)
+                                    timeout_value = 45 if img_info["index"] == 1 else 30
+                                    cached_path = ensure_image_cached(
+                                        img_info["cache_key"], 
+                                        img_info["url"], 
+                                        "PNG", 
+                                        timeout=timeout_value
+                                    )
+                                    if cached_path and os.path.exists(cached_path):
+                                        img_info["path"] = cached_path
+                                        img_info["status"] = "downloaded"
+                                        downloaded_count += 1
+                                        # Обновляем статус в реальном времени
+                                        with download_status_placeholder.container():
+                                            st.success(f"✅ Фото {img_info['index']}: Скачано")
+                                    else:
+                                        img_info["status"] = "error"
+                                        with download_status_placeholder.container():
+                                            st.error(f"❌ Фото {img_info['index']}: Ошибка скачивания")
+
+                                    # Задержка между запросами
+                                    import time
+                                    time.sleep(0.5)
+
+                                if downloaded_count > 0:
+                                    st.success(f"✅ Скачано изображений: {downloaded_count} из {len(downloading_images)}")
+                                elif len(downloading_images) > 0:
+                                    st.warning(f"⚠️ Не удалось скачать изображения. Проверьте токен screenshotapi.net и интернет-соединение.")
+
+                            # Собираем все успешно загруженные изображения
+                            all_loaded_images = []
+                            for img_info in images_info:
+                                if img_info["status"] in ["cached", "downloaded"] and img_info.get("path"):
+                                    all_loaded_images.append(img_info["path"])
+
+                            if not all_loaded_images:
+                                st.error("❌ Не удалось загрузить ни одного изображения")
+                            else:
+                                st.success(f"✅ Готово к анализу: {len(all_loaded_images)} из 5 изображений")
+
+                                # Показываем все загруженные изображения
+                                st.markdown("### 📸 Загруженные изображения")
+                                # Создаем колонки для отображения изображений (по 3 в ряд)
+                                num_cols = min(3, len(all_loaded_images))
+                                img_cols = st.columns(num_cols)
+
+                                for idx, img_path in enumerate(all_loaded_images):
+                                    col_idx = idx % num_cols
+                                    with img_cols[col_idx]:
+                                        try:
+                                            # Находим номер изображения из images_info
+                                            img_index = None
+                                            for img_info in images_info:
+                                                if img_info.get("path") == img_path:
+                                                    img_index = img_info.get("index", idx + 1)
+                                                    break
+
+                                            if img_index is None:
+                                                img_index = idx + 1
+
+                                            # Определяем статус изображения
+                                            status_icon = "✅" if any(img_info.get("path") == img_path and img_info.get("status") == "cached" for img_info in images_info) else "⬇️"
+                                            status_text_img = "В кеше" if any(img_info.get("path") == img_path and img_info.get("status") == "cached" for img_info in images_info) else "Скачано"
+
+                                            st.image(img_path, use_container_width=True, caption=f"{status_icon} Фото {img_index} ({status_text_img})")
+                                        except Exception as e:
+                                            st.write(f"📷 Фото {idx+1}: {os.path.basename(img_path)}")
+
+                                st.divider()
+
+                                # Проверяем наличие библиотеки и API ключа
+                                if not OPENAI_AVAILABLE:
+                                    st.error("⚠️ Для анализа изображений через нейросеть необходимо установить библиотеку: `pip install openai`")
+                                else:
+                                    api_key = st.session_state.get('openai_api_key', '')
+                                    if not api_key:
+                                        st.error("❌ Необходимо указать OpenAI API ключ в настройках выше")
+                                    else:
+                                        # Показываем информацию о существующих параметрах
+                                        param_options = st.session_state.get("param_options", {})
+                                        if param_options:
+                                            with st.expander("📋 Используемые параметры для анализа", expanded=False):
+                                                for param_name, options in param_options.items():
+                                                    if options:
+                                                        st.write(f"**{param_name}:** {', '.join(options[:10])}{'...' if len(options) > 10 else ''}")
+
+                                        status_text.text("🤖 Отправка изображений в нейросеть для анализа...")
+                                        progress_bar.progress(50)
+
+                                        # Анализируем изображения через нейросеть
+                                        all_params = {}
+
+                                        errors_count = 0
+                                        successful_analyses = 0
+                                        total_images = len(all_loaded_images)
+                                        for idx, img_path in enumerate(all_loaded_images):
+                                            status_text.text(f"🤖 Анализ изображения {idx+1}/{total_images}...")
+                                            progress_bar.progress(50 + int((idx + 1) / total_images * 40))
+                                            try:
+                                                # Проверяем, что файл существует и доступен
+                                                if not os.path.exists(img_path):
+                                                    st.error(f"❌ Файл изображения не найден: {img_path}")
+                                                    errors_count += 1
+                                                    continue
+
+                                                # Получаем название товара для анализа
+                                                product_name = get_product_name_from_wb(sku)
+                                                img_params = analyze_image_with_ai(img_path, api_key, selected_params=None, product_name=product_name, sku=sku)
+                                                if img_params and len(img_params) > 0:
+                                                    successful_analyses += 1
+                                                    # Объединяем параметры
+                                                    for key, value in img_params.items():
+                                                        if key not in all_params:
+                                                            all_params[key] = []
+                                                        all_params[key].append(value)
+
+                                                    # Показываем результат анализа для каждого изображения в режиме отладки
+                                                    if st.session_state.get('debug_ai_analysis', False):
+                                                        with st.expander(f"✅ Результат анализа изображения {idx+1}", expanded=False):
+                                                            for k, v in img_params.items():
+                                                                st.write(f"**{k}:** {v}")
+                                                else:
+                                                    # Если параметры не определены, это не обязательно ошибка
+                                                    # (нейросеть могла просто не найти параметры на изображении)
+                                                    if st.session_state.get('debug_ai_analysis', False):
+                                                        st.info(f"ℹ️ Изображение {idx+1}: параметры не определены нейросетью")
+                                            except Exception as e:
+                                                errors_count += 1
+                                                error_msg = str(e)
+                                                st.warning(f"⚠️ Ошибка при анализе изображения {idx+1}: {error_msg[:150]}")
+                                                if st.session_state.get('debug_ai_analysis', False):
+                                                    import traceback
+                                                    st.code(traceback.format_exc())
+
+                                        # Определяем финальные параметры (берем наиболее частые значения)
+                                        final_params = {}
+                                        for key, values in all_params.items():
+                                            if values:
+                                                # Берем наиболее частое значение
+                                                value_counts = Counter(values)
+                                                most_common = value_counts.most_common(1)[0][0]
+                                                final_params[key] = most_common
+
+                                        # Добавляем параметр комплектности, определенный на первом этапе
+                                        if initial_params:
+                                            final_params.update(initial_params)
+
+                                        progress_bar.progress(100)
+                                        status_text.empty()
+
+                                        if final_params:
+                                            st.success(f"✅ Найдено параметров: {len(final_params)}")
+
+                                            # Показываем найденные параметры
+                                            with st.expander("📊 Определенные параметры", expanded=True):
+                                                for param_name, param_value in final_params.items():
+                                                    st.write(f"**{param_name}:** {param_value}")
+
+                                            # Предлагаем сохранить параметры
+                                            if st.button("💾 Сохранить параметры для этого товара", key="save_extracted_params"):
+                                                # Проверяем, есть ли этот артикул в текущей таблице
+                                                display_df = st.session_state.get("display_df", pd.DataFrame())
+
+                                                if "Артикул" in display_df.columns:
+                                                    sku_in_table = str(sku) in [str(s).replace(".0", "") for s in display_df["Артикул"].dropna().unique()]
+
+                                                    if sku_in_table:
+                                                        # Сохраняем параметры с историей
+                                                        for param_name, param_value in final_params.items():
+                                                            if param_name not in param_values:
+                                                                param_values[param_name] = {}
+                                                            # Используем функцию с сохранением истории
+                                                            save_param_value(str(sku), param_name, str(param_value), save_history=True)
+
+                                                        # Обновляем param_options
+                                                        if "param_options" not in st.session_state:
+                                                            st.session_state["param_options"] = {}
+
+                                                        for param_name, param_value in final_params.items():
+                                                            if param_name not in st.session_state["param_options"]:
+                                                                st.session_state["param_options"][param_name] = []
+                                                            if param_value not in st.session_state["param_options"][param_name]:
+                                                                st.session_state["param_options"][param_name].append(param_value)
+
+                                                        # Сохраняем в файл
+                                                        if save_param_values_to_file():
+                                                            st.success(f"✅ Параметры сохранены для артикула {sku}!")
+                                                            st.rerun()
+                                                        else:
+                                                            st.warning("⚠️ Параметры сохранены в памяти, но не в файл")
+                                                    else:
+                                                        st.warning(f"⚠️ Артикул {sku} не найден в текущей таблице. Загрузите файл с этим артикулом.")
+                                                else:
+                                                    st.warning("⚠️ Таблица не загружена. Загрузите файл с данными.")
+                                        else:
+                                            if errors_count > 0:
+                                                st.error(f"❌ Ошибки при анализе {errors_count} изображений. Проверьте:")
+                                                st.write("1. Правильность API ключа OpenAI")
+                                                st.write("2. Доступность изображений в кеше")
+                                                st.write("3. Формат изображений (должны быть JPG, PNG или WebP)")
+                                                st.write("4. Размер изображений (не должны быть слишком большими)")
+                                                st.write("5. Баланс на счету OpenAI API")
+                                            elif successful_analyses == 0:
+                                                st.info("ℹ️ Нейросеть не смогла определить параметры из изображений.")
+                                                st.write("**Возможные причины:**")
+                                                st.write("- Изображения не содержат достаточной информации о товаре")
+                                                st.write("- Товар на изображении не виден четко")
+                                                st.write("- Параметры не соответствуют существующим вариантам")
+                                                st.write("- Попробуйте включить режим отладки для детальной информации")
+                                            else:
+                                                st.warning(f"⚠️ Проанализировано {successful_analyses} изображений, но параметры не были определены.")
+                                                st.write("Возможно, найденные параметры не соответствуют существующим вариантам.")
+
+                                            if st.session_state.get('debug_ai_analysis', False):
+                                                st.write(f"**Найденные параметры:** {all_params}")
+                    else:
+                        st.warning("⚠️ Изображения товара не найдены. Не удалось загрузить изображения через screenshotapi.net.")
+                        st.info("💡 **Совет:** Проверьте токен screenshotapi.net и интернет-соединение.")
+            else:
+                st.warning("⚠️ Введите ссылку на товар")
+    else:
+        # Массовый анализ
+        st.markdown("### 📋 Массовый анализ товаров")
+
+        is_analysis_running = st.session_state.get("mass_analysis_btn_clicked", False)
+
+        # Показываем таблицу результатов массового анализа со статусами (ВСЕГДА)
+        st.markdown("#### 📊 Результаты массового анализа")
+
+        # Загружаем результаты из файлов (всегда проверяем, чтобы не потерять данные)
+        mass_analysis_results = st.session_state.get("mass_analysis_results", [])
+
+        # Если результатов нет в session_state, пытаемся загрузить из файлов
+        if not mass_analysis_results:
+            # Сначала пытаемся загрузить из постоянного файла результатов
+            saved_results = load_mass_analysis_results()
+            if saved_results:
+                mass_analysis_results = saved_results
+                st.session_state["mass_analysis_results"] = saved_results
+                # НЕ применяем автоматически - пользователь должен применить вручную
+                # apply_mass_analysis_results_to_params(saved_results)
+                # save_param_values_to_file()
+            else:
+                # Если нет постоянного файла, пытаемся загрузить из прогресса
+                saved_progress = load_mass_analysis_progress()
+                if saved_progress and saved_progress.get("results"):
+                    mass_analysis_results = saved_progress["results"]
+                    st.session_state["mass_analysis_results"] = saved_progress["results"]
+                    # Сохраняем в постоянный файл для будущих запусков
+                    save_mass_analysis_results(saved_progress["results"])
+                    # НЕ применяем автоматически - пользователь должен применить вручную
+                    # apply_mass_analysis_results_to_params(saved_progress["results"])
+                    # save_param_values_to_file()
+
+        # Получаем все артикулы из основной таблицы для отображения всех товаров
+        df = st.session_state.get("df", None)
+        display_df = st.session_state.get("display_df", pd.DataFrame())
+
+        # Используем основной df, если он есть, иначе display_df
+        source_df = None
+        if df is not None and not df.empty and "Артикул" in df.columns:
+            source_df = df
+        elif not display_df.empty and "Артикул" in display_df.columns:
+            source_df = display_df
+
+        # Создаем полный список результатов: обработанные + необработанные товары
+        all_results = []
+
+        # Создаем словарь обработанных товаров для быстрого поиска
+        processed_skus = {str(r.get("Артикул", "")).replace(".0", "") for r in mass_analysis_results}
+
+        # Добавляем обработанные товары
+        all_results.extend(mass_analysis_results)
+
+        # Добавляем необработанные товары из основной таблицы
+        if source_df is not None and not source_df.empty:
+            for _, row in source_df.iterrows():
+                sku = str(row.get("Артикул", "")).replace(".0", "")
+                if sku and sku not in processed_skus:
+                    # Создаем запись для необработанного товара
+                    wb_url = build_wb_product_url(sku)
+
+                    # Получаем параметры из param_values, если они есть
+                    param_values = get_param_values()
+                    unprocessed_row = {
+                        "Артикул": sku,
+                        "URL": wb_url,
+                        "Статус": "⏳ Необработан"
+                    }
+
+                    # Добавляем параметры, если они есть (исключаем удаленные)
+                    deleted_params = st.session_state.get("deleted_params", load_deleted_params_from_file())
+                    for param_name, sku_values in param_values.items():
+                        if param_name not in deleted_params and sku in sku_values:
+                            unprocessed_row[param_name] = sku_values[sku]
+
+                    all_results.append(unprocessed_row)
+
+        # Обновляем mass_analysis_results для использования в остальном коде
+        mass_analysis_results = all_results
+
+        # Очищаем удаленные параметры из результатов перед отображением
+        mass_analysis_results = remove_deleted_params_from_mass_results(mass_analysis_results)
+        st.session_state["mass_analysis_results"] = mass_analysis_results
+
+        if mass_analysis_results:
+            results_df = pd.DataFrame(mass_analysis_results)
+
+            # Фильтруем удаленные параметры из столбцов DataFrame
+            deleted_params = st.session_state.get("deleted_params", set())
+            if not isinstance(deleted_params, set):
+                deleted_params = set(deleted_params) if deleted_params else set()
+
+            # Удаляем столбцы, которые являются удаленными параметрами
+            cols_to_keep = [col for col in results_df.columns if col not in deleted_params]
+            if cols_to_keep:
+                results_df = results_df[cols_to_keep]
+
+            # Категоризируем результаты
+            success_results = [r for r in mass_analysis_results if r.get("Статус", "").startswith("✅")]
+            error_results = [r for r in mass_analysis_results if "❌" in r.get("Статус", "") or "Ошибка" in r.get("Статус", "")]
+            undefined_results = [r for r in mass_analysis_results if "⚠️ Параметры не определены" in r.get("Статус", "")]
+            skipped_results = [r for r in mass_analysis_results if "⏭️" in r.get("Статус", "")]
+            unprocessed_results = [r for r in mass_analysis_results if "⏳ Необработан" in r.get("Статус", "")]
+
+            # Определяем товары с неполными параметрами
+            param_values = get_param_values()
+            all_param_names = list(st.session_state.get("param_options", {}).keys())
+            incomplete_params_results = []
+
+            if all_param_names and param_values:
+                for result in success_results:
+                    sku_raw = result.get("Артикул", "")
+                    if not sku_raw:
+                        continue
+                    sku_str = str(sku_raw).replace(".0", "")
+
+                    # Подсчитываем заполненные параметры
+                    filled_params_count = 0
+                    for param_name in all_param_names:
+                        # Проверяем в param_values
+                        if param_name in param_values and sku_str in param_values[param_name]:
+                            value = param_values[param_name][sku_str]
+                            if value and str(value).strip():
+                                filled_params_count += 1
+                        # Также проверяем в самом результате
+                        elif param_name in result and result[param_name] and str(result[param_name]).strip():
+                            filled_params_count += 1
+
+                    # Если заполнены не все параметры, но хотя бы один - это неполные параметры
+                    if 0 < filled_params_count < len(all_param_names):
+                        incomplete_params_results.append(result)
+
+            # Статистика по результатам
+            success_count = len(success_results)
+            error_count = len(error_results)
+            undefined_count = len(undefined_results)
+            skipped_count = len(skipped_results)
+            unprocessed_count = len(unprocessed_results)
+            incomplete_count = len(incomplete_params_results)
+            total_count = len(mass_analysis_results)
+
+            col_stats1, col_stats2, col_stats3, col_stats4, col_stats5, col_stats6, col_stats7 = st.columns(7)
+            with col_stats1:
+                st.metric("✅ Успешно", success_count, delta=f"{success_count/total_count*100:.1f}%" if total_count > 0 else "0%")
+            with col_stats2:
+                st.metric("⚠️ Неопределено", undefined_count, delta=f"{undefined_count/total_count*100:.1f}%" if total_count > 0 else "0%")
+            with col_stats3:
+                st.metric("❌ Ошибки", error_count, delta=f"{error_count/total_count*100:.1f}%" if total_count > 0 else "0%")
+            with col_stats4:
+                st.metric("⏭️ Пропущено", skipped_count, delta=f"{skipped_count/total_count*100:.1f}%" if total_count > 0 else "0%")
+            with col_stats5:
+                st.metric("⏳ Необработан", unprocessed_count, delta=f"{unprocessed_count/total_count*100:.1f}%" if total_count > 0 else "0%")
+            with col_stats6:
+                st.metric("📝 Неполные", incomplete_count, delta=f"{incomplete_count/total_count*100:.1f}%" if total_count > 0 else "0%")
+            with col_stats7:
+                st.metric("📦 Всего", total_count)
+
+            # Фильтр для таблицы результатов
+            st.markdown("**🔍 Фильтр результатов:**")
+            filter_options = ["Все результаты", "✅ Успешно", "⚠️ Неопределено", "❌ Ошибки", "⏭️ Пропущено", "⏳ Необработан", "📝 Неполные параметры"]
+            selected_filter = st.radio(
+                "Показать:",
+                options=filter_options,
+                horizontal=True,
+                key="results_filter_radio"
+            )
+
+            # Применяем фильтр
+            if selected_filter == "✅ Успешно":
+                filtered_results = success_results
+            elif selected_filter == "⚠️ Неопределено":
+                filtered_results = undefined_results
+            elif selected_filter == "❌ Ошибки":
+                filtered_results = error_results
+            elif selected_filter == "⏭️ Пропущено":
+                filtered_results = skipped_results
+            elif selected_filter == "⏳ Необработан":
+                filtered_results = unprocessed_results
+            elif selected_filter == "📝 Неполные параметры":
+                filtered_results = incomplete_params_results
+            else:
+                filtered_results = mass_analysis_results
+
+            # Отображаем отфильтрованную таблицу (ВСЕГДА)
+            if filtered_results:
+                filtered_df = pd.DataFrame(filtered_results)
+
+                # Фильтруем удаленные параметры из столбцов DataFrame
+                deleted_params = st.session_state.get("deleted_params", set())
+                if not isinstance(deleted_params, set):
+                    deleted_params = set(deleted_params) if deleted_params else set()
+
+                # Удаляем столбцы, которые являются удаленными параметрами
+                cols_to_keep = [col for col in filtered_df.columns if col not in deleted_params]
+                filtered_df = filtered_df[cols_to_keep] if cols_to_keep else filtered_df
+
+                # Убеждаемся, что все колонки отображаются
+                # Переупорядочиваем колонки: сначала основные, потом параметры
+                main_cols = ["Артикул", "URL", "Статус", "Параметры"]
+                param_cols = [col for col in filtered_df.columns if col not in main_cols]
+                column_order = [col for col in main_cols if col in filtered_df.columns] + param_cols
+
+                # Переупорядочиваем DataFrame
+                if column_order:
+                    filtered_df = filtered_df[column_order]
+
+                st.dataframe(
+                    filtered_df, 
+                    use_container_width=True,
+                    height=400,
+                    key="mass_analysis_results_table"
+                )
+            else:
+                # Показываем пустую таблицу с заголовками
+                empty_cols = ["Артикул", "URL", "Статус"]
+                # Добавляем колонки параметров, если они есть
+                if mass_analysis_results:
+                    # Берем все уникальные ключи из результатов
+                    sample_result = mass_analysis_results[0] if mass_analysis_results else {}
+                    for key in sample_result.keys():
+                        if key not in empty_cols and key not in ["Артикул", "URL", "Статус", "Параметры"]:
+                            empty_cols.append(key)
+                empty_df = pd.DataFrame(columns=empty_cols)
+                st.dataframe(
+                    empty_df,
+                    use_container_width=True,
+                    key="mass_analysis_results_table_empty"
+                )
+                st.info(f"ℹ️ Нет результатов для категории '{selected_filter}'")
+
+            # Кнопка для применения параметров в общую таблицу
+            st.divider()
+            col_apply1, col_apply2 = st.columns([1, 2])
+            with col_apply1:
+                if st.button("💾 Применить параметры в общую таблицу", type="primary", use_container_width=True, key="apply_mass_results_to_table"):
+                    # Параметры уже сохранены в session_state через save_param_value во время массового анализа
+                    # Но нужно обновить основную таблицу, чтобы отобразить новые параметры
+                    if save_param_values_to_file():
+                        st.success(f"✅ Параметры применены в общую таблицу! Обновлено {success_count} товаров.")
+                        # Обновляем таблицу для отображения новых параметров
+                        if "df" in st.session_state:
+                            # Перезагружаем данные, чтобы показать новые параметры
+                            st.session_state["data_loaded"] = False
+                        st.rerun()
+                    else:
+                        st.error("❌ Ошибка при сохранении параметров")
+            with col_apply2:
+                st.info("💡 Параметры из успешных результатов массового анализа будут применены в основную таблицу. Существующие параметры будут обновлены.")
+
+            # Экспорт/Импорт результатов в CSV
+            st.divider()
+            st.markdown("#### 💾 Экспорт / Импорт результатов")
+            col_export1, col_export2 = st.columns(2)
+
+            with col_export1:
+                # Экспорт в CSV
+                if st.button("📥 Экспорт результатов в CSV", type="secondary", use_container_width=True, key="export_mass_results_csv"):
+                    csv_data = export_mass_analysis_results_to_csv(mass_analysis_results)
+                    if csv_data:
+                        timestamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
+                        st.download_button(
+                            label="💾 Скачать CSV файл",
+                            data=csv_data,
+                            file_name=f"mass_analysis_results_{timestamp}.csv",
+                            mime="text/csv",
+                            key="download_mass_results_csv"
+                        )
+                        st.success(f"✅ Результаты подготовлены к экспорту! Всего записей: {len(mass_analysis_results)}")
+                    else:
+                        st.error("❌ Ошибка при экспорте результатов")
+
+            with col_export2:
+                # Импорт из CSV
+                st.markdown("**Импорт из CSV:**")
+                uploaded_file = st.file_uploader(
+                    "Загрузите CSV файл с результатами",
+                    type=['csv'],
+                    key="import_mass_results_csv"
+                )
+                if uploaded_file is not None:
+                    try:
+                        csv_data = uploaded_file.read().decode('utf-8-sig')
+                        imported_count, applied_count = import_mass_analysis_results_from_csv(csv_data)
+                        if imported_count > 0:
+                            st.success(f"✅ Импортировано записей: {imported_count}, применено параметров: {applied_count}")
+                            st.info("💡 Параметры автоматически применены. Обновите страницу, чтобы увидеть изменения.")
+                            st.rerun()
+                        else:
+                            st.warning("⚠️ Не удалось импортировать данные из CSV файла")
+                    except Exception as e:
+                        st.error(f"❌ Ошибка при импорте CSV: {e}")
+
+            st.divider()
+
+            # Анализируем результаты для определения товаров, требующих повторной обработки
+            error_results = [r for r in mass_analysis_results if not r.get("Статус", "").startswith("✅")]
+            undefined_results = [r for r in mass_analysis_results if "⚠️ Параметры не определены" in r.get("Статус", "")]
+
+            # Проверяем товары с незаполненными параметрами
+            param_values = get_param_values()
+            all_param_names = list(st.session_state.get("param_options", {}).keys())
+            skus_with_empty_params = []
+
+            if all_param_names and param_values:
+                # Получаем все артикулы из таблицы
+                source_df = st.session_state.get("df")
+                if source_df is None:
+                    source_df = st.session_state.get("display_df")
+                if source_df is not None and "Артикул" in source_df.columns:
+                    for sku in source_df["Артикул"].dropna().unique():
+                        sku_str = str(sku).replace(".0", "")
+                        # Проверяем, заполнены ли все параметры для этого товара
+                        filled_params_count = 0
+                        for param_name in all_param_names:
+                            if param_name in param_values and sku_str in param_values[param_name]:
+                                value = param_values[param_name][sku_str]
+                                if value and str(value).strip():
+                                    filled_params_count += 1
+
+                        # Если ни один параметр не заполнен, добавляем в список
+                        if filled_params_count == 0:
+                            skus_with_empty_params.append(sku_str)
+
+            # Показываем кнопки для повторной обработки
+            if error_results or undefined_results or skus_with_empty_params:
+                st.markdown("#### 🔄 Повторная обработка товаров")
+
+                col_retry1, col_retry2, col_retry3 = st.columns(3)
+
+                with col_retry1:
+                    if error_results:
+                        if st.button(f"🔄 Обработать товары с ошибками ({len(error_results)})", type="primary", use_container_width=True, key="retry_errors_from_results_top"):
+                            retry_skus = [str(r["Артикул"]) for r in error_results]
+                            success_results = [r for r in mass_analysis_results if r.get("Статус", "").startswith("✅")]
+
+                            retry_settings = {
+                                "max_images": st.session_state.get("mass_max_images_slider", 5),
+                                "delay": st.session_state.get("mass_delay_slider", 2.0),
+                                "selected_params": st.session_state.get("mass_selected_params_multiselect", [])
+                            }
+
+                            retry_progress = {
+                                "skus_to_process": retry_skus,
+                                "processed_skus": [],
+                                "results": success_results,
+                                "settings": retry_settings,
+                                "timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                "is_retry": True
+                            }
+
+                            save_mass_analysis_progress(
+                                retry_skus,
+                                set(),
+                                success_results,
+                                retry_settings
+                            )
+
+                            st.session_state["resume_mass_analysis"] = True
+                            st.session_state["saved_progress"] = retry_progress
+                            st.success(f"✅ Запланирована повторная обработка {len(retry_skus)} товаров с ошибками")
+                            st.rerun()
+                    else:
+                        st.info("✅ Нет товаров с ошибками")
+
+                with col_retry2:
+                    if undefined_results:
+                        if st.button(f"🔄 Обработать товары с неопределенными параметрами ({len(undefined_results)})", type="primary", use_container_width=True, key="retry_undefined_from_results_top"):
+                            retry_skus = [str(r["Артикул"]) for r in undefined_results]
+                            success_results = [r for r in mass_analysis_results if r.get("Статус", "").startswith("✅")]
+
+                            retry_settings = {
+                                "max_images": st.session_state.get("mass_max_images_slider", 5),
+                                "delay": st.session_state.get("mass_delay_slider", 2.0),
+                                "selected_params": st.session_state.get("mass_selected_params_multiselect", [])
+                            }
+
+                            retry_progress = {
+                                "skus_to_process": retry_skus,
+                                "processed_skus": [],
+                                "results": success_results,
+                                "settings": retry_settings,
+                                "timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                "is_retry": True
+                            }
+
+                            save_mass_analysis_progress(
+                                retry_skus,
+                                set(),
+                                success_results,
+                                retry_settings
+                            )
+
+                            st.session_state["resume_mass_analysis"] = True
+                            st.session_state["saved_progress"] = retry_progress
+                            st.success(f"✅ Запланирована повторная обработка {len(retry_skus)} товаров с неопределенными параметрами")
+                            st.rerun()
+                    else:
+                        st.info("✅ Нет товаров с неопределенными параметрами")
+
+                with col_retry3:
+                    if skus_with_empty_params:
+                        if st.button(f"🔄 Обработать товары с незаполненными параметрами ({len(skus_with_empty_params)})", type="primary", use_container_width=True, key="retry_empty_params_from_results_top"):
+                            success_results = [r for r in mass_analysis_results if r.get("Статус", "").startswith("✅")]
+
+                            retry_settings = {
+                                "max_images": st.session_state.get("mass_max_images_slider", 5),
+                                "delay": st.session_state.get("mass_delay_slider", 2.0),
+                                "selected_params": st.session_state.get("mass_selected_params_multiselect", [])
+                            }
+
+                            retry_progress = {
+                                "skus_to_process": skus_with_empty_params,
+                                "processed_skus": [],
+                                "results": success_results,
+                                "settings": retry_settings,
+                                "timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                "is_retry": True
+                            }
+
+                            save_mass_analysis_progress(
+                                skus_with_empty_params,
+                                set(),
+                                success_results,
+                                retry_settings
+                            )
+
+                            st.session_state["resume_mass_analysis"] = True
+                            st.session_state["saved_progress"] = retry_progress
+                            st.success(f"✅ Запланирована обработка {len(skus_with_empty_params)} товаров с незаполненными параметрами")
+                            st.rerun()
+                    else:
+                        st.info("✅ Нет товаров с незаполненными параметрами")
+
+                # Общая кнопка для обработки всех проблемных товаров
+                if (error_results or undefined_results or skus_with_empty_params):
+                    st.divider()
+                    all_problem_skus = set()
+                    if error_results:
+                        all_problem_skus.update([str(r["Артикул"]) for r in error_results])
+                    if undefined_results:
+                        all_problem_skus.update([str(r["Артикул"]) for r in undefined_results])
+                    if skus_with_empty_params:
+                        all_problem_skus.update(skus_with_empty_params)
+
+                    if all_problem_skus:
+                        if st.button(f"🔄 Обработать ВСЕ проблемные товары ({len(all_problem_skus)})", type="primary", use_container_width=True, key="retry_all_problems_from_results_top"):
+                            success_results = [r for r in mass_analysis_results if r.get("Статус", "").startswith("✅")]
+
+                            retry_settings = {
+                                "max_images": st.session_state.get("mass_max_images_slider", 5),
+                                "delay": st.session_state.get("mass_delay_slider", 2.0),
+                                "selected_params": st.session_state.get("mass_selected_params_multiselect", [])
+                            }
+
+                            retry_progress = {
+                                "skus_to_process": list(all_problem_skus),
+                                "processed_skus": [],
+                                "results": success_results,
+                                "settings": retry_settings,
+                                "timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                "is_retry": True
+                            }
+
+                            save_mass_analysis_progress(
+                                list(all_problem_skus),
+                                set(),
+                                success_results,
+                                retry_settings
+                            )
+
+                            st.session_state["resume_mass_analysis"] = True
+                            st.session_state["saved_progress"] = retry_progress
+                            st.success(f"✅ Запланирована обработка {len(all_problem_skus)} проблемных товаров")
+                            st.rerun()
+        else:
+            # Если результатов нет, показываем пустую таблицу и сообщение
+            # Но сначала еще раз пытаемся загрузить из файлов (на случай, если файл появился)
+            saved_results = load_mass_analysis_results()
+            if saved_results:
+                mass_analysis_results = saved_results
+                st.session_state["mass_analysis_results"] = saved_results
+                st.success(f"✅ Загружено {len(saved_results)} результатов из сохраненного файла")
+                st.rerun()
+            else:
+                saved_progress = load_mass_analysis_progress()
+                if saved_progress and saved_progress.get("results"):
+                    mass_analysis_results = saved_progress["results"]
+                    st.session_state["mass_analysis_results"] = saved_progress["results"]
+                    save_mass_analysis_results(saved_progress["results"])
+                    st.success(f"✅ Загружено {len(saved_progress['results'])} результатов из прогресса")
+                    st.rerun()
+                else:
+                    st.info("ℹ️ Результаты массового анализа будут отображаться здесь после запуска анализа")
+                    # Создаем пустую таблицу с основными колонками
+                    empty_df = pd.DataFrame(columns=["Артикул", "URL", "Статус"])
+                    st.dataframe(
+                        empty_df,
+                        use_container_width=True,
+                        key="mass_analysis_results_table_no_data"
+                    )
+
+            st.divider()
+
+        st.info("💡 Система автоматически проанализирует все товары из таблицы ниже. Для каждого товара будут получены изображения через screenshotapi.net и проанализированы через нейросеть.")
+
+        # Проверяем наличие таблицы - используем основной df из session_state
+        df = st.session_state.get("df", None)
+        display_df = st.session_state.get("display_df", pd.DataFrame())
+
+        # Используем основной df, если он есть, иначе display_df
+        if df is not None and not df.empty and "Артикул" in df.columns:
+            source_df = df
+        elif not display_df.empty and "Артикул" in display_df.columns:
+            source_df = display_df
+        else:
+            source_df = None
+
+        if source_df is None or source_df.empty or "Артикул" not in source_df.columns:
+            # Проверяем, есть ли вообще данные в session_state
+            if st.session_state.get("df") is None:
+                st.warning("⚠️ Файл не загружен. Загрузите файл с данными товаров в первой вкладке.")
+            else:
+                st.warning("⚠️ В таблице нет данных с артикулами. Убедитесь, что файл содержит колонку 'Артикул'.")
+        else:
+            # Получаем список артикулов из таблицы в порядке их появления в таблице
+            # Порядок соответствует порядку строк в исходной таблице (сверху вниз)
+            skus = source_df["Артикул"].dropna().unique()
+            skus = [str(sku).replace(".0", "") for sku in skus if str(sku).strip()]
+
+            if not skus:
+                st.warning("⚠️ В таблице нет артикулов для анализа.")
+            else:
+                st.success(f"✅ Найдено товаров в таблице: **{len(skus)}**")
+
+                # Выбор параметров для анализа (скрыто в expander)
+                all_param_names = list(st.session_state.get("param_options", {}).keys())
+                mass_selected_params = []
+
+                if all_param_names:
+                    with st.expander("⚙️ Настройки анализа (опционально)", expanded=False):
+                        st.markdown("**📋 Выберите параметры для анализа:**")
+                        st.info("💡 Выберите конкретные параметры, которые нужно определить через нейросеть. Если не выбрано, будут анализироваться все доступные параметры.")
+                        mass_selected_params = st.multiselect(
+                            "Параметры для анализа:",
+                            options=all_param_names,
+                            default=[],  # По умолчанию пусто - будут анализироваться все
+                            help="Оставьте пустым, чтобы анализировать все параметры. Или выберите конкретные параметры.",
+                            key="mass_selected_params_multiselect"
+                        )
+                else:
+                    st.warning("⚠️ Нет доступных параметров. Добавьте параметры в разделе 'Управление параметрами'.")
+
+                st.divider()
+
+                col_mass1, col_mass2, col_mass3 = st.columns(3)
+                with col_mass1:
+                    mass_max_images = st.slider(
+                        "Изображений на товар:",
+                        min_value=1,
+                        max_value=5,
+                        value=5,
+                        help="Количество изображений для анализа каждого товара",
+                        key="mass_max_images_slider"
+                    )
+
+                with col_mass2:
+                    mass_delay = st.slider(
+                        "Задержка между товарами (сек):",
+                        min_value=1.0,
+                        max_value=10.0,
+                        value=2.0,
+                        step=0.5,
+                        help="Задержка между обработкой товаров для избежания rate limit",
+                        key="mass_delay_slider"
+                    )
+
+                with col_mass3:
+                    mass_limit = st.number_input(
+                        "Ограничение количества товаров:",
+                        min_value=0,
+                        max_value=len(skus),
+                        value=len(skus),
+                        help="0 = все товары",
+                        key="mass_limit_input"
+                    )
+
+                # Опция фильтрации товаров без фото
+                st.divider()
+                filter_no_images = st.checkbox(
+                    "🔍 Обрабатывать только товары БЕЗ скачанных фото",
+                    value=False,
+                    help="Если включено, будут обработаны только товары, у которых нет скачанных изображений через screenshotapi",
+                    key="filter_no_images_checkbox"
+                )
+
+                if filter_no_images:
+                    # Проверяем, сколько товаров без фото
+                    skus_without_images = []
+                    with st.spinner("Проверка наличия фото..."):
+                        for sku in skus:
+                            if not has_downloaded_images(sku, min_images=1):
+                                skus_without_images.append(sku)
+
+                    if skus_without_images:
+                        st.success(f"✅ Найдено товаров без фото: **{len(skus_without_images)}** из {len(skus)}")
+                        with st.expander("👀 Превью товаров без фото", expanded=False):
+                            for idx, sku in enumerate(skus_without_images[:10], 1):
+                                wb_url = build_wb_product_url(sku)
+                                st.write(f"{idx}. Артикул: {sku} - [Открыть на WB]({wb_url})")
+                            if len(skus_without_images) > 10:
+                                st.write(f"... и еще {len(skus_without_images) - 10} товаров")
+                    else:
+                        st.info("ℹ️ У всех товаров уже есть скачанные фото")
+
+                # Проверяем наличие сохраненного прогресса
+                saved_progress = load_mass_analysis_progress()
+                if saved_progress:
+                    processed_count = len(saved_progress.get('processed_skus', []))
+                    total_count = len(saved_progress.get('skus_to_process', []))
+                    remaining_count = total_count - processed_count
+
+                    with st.expander("📥 Найден сохраненный прогресс", expanded=False):
+                        st.info(f"**Сохранено:** {saved_progress.get('timestamp', 'неизвестно')}")
+                        st.write(f"**Всего товаров:** {total_count}")
+                        st.write(f"**Обработано:** {processed_count}")
+                        st.write(f"**Осталось:** {remaining_count}")
+
+                        # Показываем статистику по ошибкам
+                        saved_results = saved_progress.get('results', [])
+                        if saved_results:
+                            error_results = [r for r in saved_results if not r.get("Статус", "").startswith("✅")]
+                            success_results = [r for r in saved_results if r.get("Статус", "").startswith("✅")]
+                            st.write(f"**Успешно:** {len(success_results)}")
+                            st.write(f"**С ошибками:** {len(error_results)}")
+                        st.info("💡 Используйте кнопку '▶️ Продолжить' ниже для возобновления анализа")
+
+                        if st.button("🗑️ Удалить сохраненный прогресс", key="clear_progress_btn"):
+                            clear_mass_analysis_progress()
+                            st.success("✅ Прогресс удален")
+                            st.rerun()
+
+                # Автоматическое возобновление, если есть сохраненный прогресс и не было явного запуска нового анализа
+                auto_resume = saved_progress and not st.session_state.get("mass_analysis_btn_clicked", False)
+
+                # Показываем кнопки управления анализом
+                col_start, col_resume, col_stop = st.columns([1, 1, 1])
+                with col_start:
+                    if st.button("🚀 Запустить массовый анализ", type="primary", key="mass_analysis_btn", disabled=is_analysis_running, use_container_width=True):
+                        st.session_state["mass_analysis_btn_clicked"] = True
+                        # Сбрасываем флаг продолжения при новом запуске
+                        if "resume_mass_analysis" in st.session_state:
+                            del st.session_state["resume_mass_analysis"]
+                        st.rerun()
+                with col_resume:
+                    if saved_progress and not is_analysis_running:
+                        if st.button("▶️ Продолжить", type="primary", key="continue_analysis_btn", use_container_width=True):
+                            st.session_state["resume_mass_analysis"] = True
+                            st.session_state["saved_progress"] = saved_progress
+                            st.session_state["mass_analysis_btn_clicked"] = True
+                            st.rerun()
+                    else:
+                        st.write("")  # Пустое место для выравнивания
+                with col_stop:
+                    if is_analysis_running:
+                        if st.button("⏹️ Остановить анализ", type="secondary", key="stop_mass_analysis_btn", use_container_width=True):
+                            st.session_state["mass_analysis_btn_clicked"] = False
+                            st.session_state["mass_analysis_stopped"] = True
+                            st.warning("⚠️ Анализ остановлен пользователем")
+                            st.rerun()
+                    else:
+                        st.write("")  # Пустое место для выравнивания
+
+                # Запускаем анализ, если кнопка была нажата
+                if st.session_state.get("mass_analysis_btn_clicked", False) and not st.session_state.get("mass_analysis_stopped", False):
+
+                    # Фильтруем товары без фото, если включена опция
+                    if filter_no_images:
+                        skus_filtered = []
+                        with st.spinner("Фильтрация товаров без фото..."):
+                            for sku in skus:
+                                if not has_downloaded_images(sku, min_images=1):
+                                    skus_filtered.append(sku)
+                        skus = skus_filtered
+
+                        if not skus:
+                            st.warning("⚠️ Нет товаров без фото для обработки")
+                            st.stop()
+
+                    # Ограничиваем количество товаров, если указано
+                    if mass_limit > 0:
+                        skus_to_process = skus[:mass_limit]
+                    else:
+                        skus_to_process = skus
+
+                    if skus_to_process:
+                        # Проверяем, нужно ли возобновить с сохраненного прогресса
+                        resume_analysis = st.session_state.get("resume_mass_analysis", False) or auto_resume
+                        saved_progress_data = st.session_state.get("saved_progress", None) or saved_progress
+
+                        # Начинаем массовый анализ
+                        mass_progress_bar = st.progress(0)
+                        mass_status_text = st.empty()
+                        mass_results_container = st.container()
+
+                        api_key = st.session_state.get('openai_api_key', '')
+
+                        if not api_key:
+                            st.error("❌ Необходимо указать API ключ OpenAI в настройках выше")
+                        else:
+                            # Если возобновляем, используем сохраненные данные
+                            if resume_analysis and saved_progress_data:
+                                skus_to_process = saved_progress_data.get("skus_to_process", skus_to_process)
+                                processed_skus = set(saved_progress_data.get("processed_skus", []))
+                                mass_results = saved_progress_data.get("results", [])
+                                settings = saved_progress_data.get("settings", {})
+                                mass_max_images = settings.get("max_images", mass_max_images)
+                                mass_delay = settings.get("delay", mass_delay)
+                                # Восстанавливаем выбранные параметры из сохраненного прогресса
+                                mass_selected_params = settings.get("selected_params", [])
+
+                                # Проверяем, это повторная обработка ошибок
+                                is_retry = saved_progress_data.get("is_retry", False)
+
+                                # Показываем информацию о возобновлении
+                                remaining_count = len(skus_to_process) - len(processed_skus)
+                                if is_retry:
+                                    st.info(f"🔄 Повторная обработка товаров с ошибками: {len(skus_to_process)} товаров. Успешные результаты ({len(mass_results)}) будут сохранены.")
+                                else:
+                                    st.info(f"🔄 Возобновление анализа: обработано {len(processed_skus)} из {len(skus_to_process)}, осталось {remaining_count}")
+
+                                st.session_state["resume_mass_analysis"] = False
+                                st.session_state["saved_progress"] = None
+                            else:
+                                processed_skus = set()
+                                mass_results = []
+                                # Используем выбранные параметры или все доступные
+                                selected_params_for_analysis = mass_selected_params if mass_selected_params else None
+                                settings = {
+                                    "max_images": mass_max_images,
+                                    "delay": mass_delay,
+                                    "selected_params": selected_params_for_analysis
+                                }
+
+                            total_skus = len(skus_to_process)
+                            mass_success_count = len([r for r in mass_results if r.get("Статус", "").startswith("✅")])
+                            mass_error_count = len([r for r in mass_results if not r.get("Статус", "").startswith("✅")])
+
+                            with mass_results_container:
+                                st.markdown("### 📊 Результаты массового анализа")
+                                results_table_placeholder = st.empty()
+                                apply_button_placeholder = st.empty()
+
+                                # Показываем уже обработанные результаты сразу при возобновлении
+                                if mass_results:
+                                    # Пересчитываем счетчики из актуальных результатов
+                                    current_success_count = len([r for r in mass_results if r.get("Статус", "").startswith("✅")])
+                                    current_error_count = len([r for r in mass_results if not r.get("Статус", "").startswith("✅")])
+
+                                    results_df = pd.DataFrame(mass_results)
+
+                                    # Фильтруем удаленные параметры из столбцов DataFrame
+                                    deleted_params = st.session_state.get("deleted_params", set())
+                                    if not isinstance(deleted_params, set):
+                                        deleted_params = set(deleted_params) if deleted_params else set()
+
+                                    # Удаляем столбцы, которые являются удаленными параметрами
+                                    cols_to_keep = [col for col in results_df.columns if col not in deleted_params]
+                                    if cols_to_keep:
+                                        results_df = results_df[cols_to_keep]
+
+                                    with results_table_placeholder.container():
+                                        st.markdown(f"**📋 Уже обработано: {len(mass_results)} товаров** (✅ Успешно: {current_success_count}, ❌ Ошибок: {current_error_count})")
+                                        st.dataframe(results_df, use_container_width=True, height=400)
+
+                                    # Кнопка для применения параметров - доступна сразу во время обработки
+                                    if current_success_count > 0:
+                                        with apply_button_placeholder.container():
+                                            st.divider()
+                                            col_apply1, col_apply2 = st.columns([1, 2])
+                                            with col_apply1:
+                                                if st.button("💾 Применить параметры в общую таблицу", type="primary", use_container_width=True, key="apply_mass_results_final"):
+                                                    # Сохраняем параметры в файл
+                                                    if save_param_values_to_file():
+                                                        if save_param_history_to_file():
+                                                            # Перезагружаем параметры из файла, чтобы убедиться, что они применены
+                                                            load_param_values_from_file()
+                                                            current_success_count = len([r for r in mass_results if r.get("Статус", "").startswith("✅")])
+                                                            st.success(f"✅ Параметры применены в общую таблицу! Обновлено {current_success_count} товаров.")
+                                                            # Обновляем таблицу для отображения новых параметров
+                                                            if "df" in st.session_state:
+                                                                # Перезагружаем данные, чтобы показать новые параметры
+                                                                st.session_state["data_loaded"] = False
+                                                                # Очищаем display_df, чтобы он пересоздался с новыми параметрами
+                                                                if "display_df" in st.session_state:
+                                                                    del st.session_state["display_df"]
+                                                            st.rerun()
+                                                        else:
+                                                            st.error("❌ Ошибка при сохранении истории изменений")
+                                                    else:
+                                                        st.error("❌ Ошибка при сохранении параметров")
+                                            with col_apply2:
+                                                st.info("💡 Параметры из успешных результатов будут применены в основную таблицу. Можно нажимать во время обработки.")
+
+                            # Проверяем, не был ли анализ остановлен
+                            if st.session_state.get("mass_analysis_stopped", False):
+                                st.warning("⚠️ Анализ был остановлен пользователем")
+                                st.session_state["mass_analysis_stopped"] = False
+                                st.session_state["mass_analysis_btn_clicked"] = False
+                                # Сохраняем текущие результаты
+                                if mass_results:
+                                    st.session_state["mass_analysis_results"] = mass_results
+                                    save_mass_analysis_results(mass_results)
+                                st.stop()
+
+                            # Обрабатываем только необработанные товары
+                            remaining_skus = [sku for sku in skus_to_process if str(sku) not in processed_skus]
+
+                            # Если все товары уже обработаны, показываем финальные результаты
+                            if not remaining_skus and mass_results:
+                                st.info("ℹ️ Все товары уже обработаны. Результаты показаны выше.")
+                                mass_progress_bar.progress(1.0)
+                                mass_status_text.empty()
+
+                                # Показываем финальные результаты
+                                st.markdown("---")
+                                st.markdown("### 📊 Итоговый отчет массового анализа")
+
+                                # Пересчитываем счетчики из актуальных результатов
+                                final_success_count = len([r for r in mass_results if r.get("Статус", "").startswith("✅")])
+                                final_error_count = len([r for r in mass_results if not r.get("Статус", "").startswith("✅")])
+
+                                col_success, col_error, col_total = st.columns(3)
+                                with col_success:
+                                    st.metric("✅ Успешно", final_success_count)
+                                with col_error:
+                                    st.metric("❌ Ошибок", final_error_count)
+                                with col_total:
+                                    st.metric("📦 Всего", total_skus)
+
+                                # Удаляем сохраненный прогресс
+                                clear_mass_analysis_progress()
+
+                                # Сохраняем результаты в session_state
+                                st.session_state["mass_analysis_results"] = mass_results
+                                save_mass_analysis_results(mass_results)
+
+                                # Автоматически применяем параметры из результатов
+                                applied_params_count = apply_mass_analysis_results_to_params(mass_results)
+                                if applied_params_count > 0:
+                                    # Сохраняем параметры в файл
+                                    save_param_values_to_file()
+
+                                # Сбрасываем флаг запуска анализа, чтобы старые результаты снова показывались
+                                st.session_state["mass_analysis_btn_clicked"] = False
+
+                                # Таблица уже показана выше в mass_results_container, не дублируем
+                                # Кнопка для применения параметров уже доступна выше, но показываем здесь тоже для итогового отчета
+                                # Пересчитываем счетчики из актуальных результатов
+                                final_success_count = len([r for r in mass_results if r.get("Статус", "").startswith("✅")])
+                                if final_success_count > 0:
+                                    # Кнопка уже есть в mass_results_container, здесь просто подтверждаем
+                                    st.success(f"✅ Анализ завершен! Параметры можно применить кнопкой выше.")
+                                else:
+                                    # Сохраняем параметры в файл даже если нет успешных результатов (для истории)
+                                    if save_param_values_to_file():
+                                        st.info("💾 Параметры сохранены в файл!")
+                                    if save_param_history_to_file():
+                                        st.info("💾 История изменений сохранена!")
+
+                                # Определяем проблемные товары (всегда, не только при mass_error_count > 0)
+                                error_results = [r for r in mass_results if not r.get("Статус", "").startswith("✅")]
+                                undefined_results = [r for r in mass_results if "⚠️ Параметры не определены" in r.get("Статус", "")]
+
+                                # Проверяем товары с незаполненными параметрами из таблицы
+                                param_values = get_param_values()
+                                all_param_names = list(st.session_state.get("param_options", {}).keys())
+                                skus_with_empty_params = []
+
+                                if all_param_names and param_values:
+                                    # Получаем все артикулы из таблицы
+                                    source_df = st.session_state.get("df")
+                                    if source_df is None:
+                                        source_df = st.session_state.get("display_df")
+                                    if source_df is not None and "Артикул" in source_df.columns:
+                                        for sku in source_df["Артикул"].dropna().unique():
+                                            sku_str = str(sku).replace(".0", "")
+                                            # Проверяем, заполнены ли все параметры для этого товара
+                                            filled_params_count = 0
+                                            for param_name in all_param_names:
+                                                if param_name in param_values and sku_str in param_values[param_name]:
+                                                    value = param_values[param_name][sku_str]
+                                                    if value and str(value).strip():
+                                                        filled_params_count += 1
+
+                                            # Если ни один параметр не заполнен, добавляем в список
+                                            if filled_params_count == 0:
+                                                skus_with_empty_params.append(sku_str)
+
+                                # Показываем детальный отчет об ошибках, если есть
+                                # Пересчитываем счетчики из актуальных результатов
+                                final_error_count = len([r for r in mass_results if not r.get("Статус", "").startswith("✅")])
+                                if final_error_count > 0:
+                                    st.markdown("---")
+                                    st.markdown("### ❌ Детальный отчет об ошибках")
+
+                                    # Кнопки для обработки разных типов проблемных товаров - показываем всегда, если есть проблемы
+                                    if error_results or undefined_results or skus_with_empty_params:
+                                        st.markdown("#### 🔄 Повторная обработка товаров")
+
+                                        # Определяем количество колонок в зависимости от наличия типов ошибок
+                                        num_cols = sum([bool(error_results), bool(undefined_results), bool(skus_with_empty_params)])
+                                        if num_cols == 1:
+                                            col_retry1, = st.columns(1)
+                                            col_retry2 = None
+                                            col_retry3 = None
+                                        elif num_cols == 2:
+                                            col_retry1, col_retry2 = st.columns(2)
+                                            col_retry3 = None
+                                        else:
+                                            col_retry1, col_retry2, col_retry3 = st.columns(3)
+
+                                        # Кнопка для обработки ВСЕХ товаров с ошибками (показываем отдельно)
+                                        if error_results:
+                                            st.markdown("**🔄 Обработать все товары с ошибками:**")
+                                            if st.button(f"🔄 Обработать все товары с ошибками ({len(error_results)})", type="primary", use_container_width=True, key="retry_all_errors_final_main"):
+                                                retry_skus = [str(r["Артикул"]) for r in error_results]
+                                                success_results = [r for r in mass_results if r.get("Статус", "").startswith("✅")]
+
+                                                retry_settings = {
+                                                    "max_images": mass_max_images,
+                                                    "delay": mass_delay,
+                                                    "selected_params": settings.get("selected_params", None)
+                                                }
+
+                                                retry_progress = {
+                                                    "skus_to_process": retry_skus,
+                                                    "processed_skus": [],
+                                                    "results": success_results,
+                                                    "settings": retry_settings,
+                                                    "timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                                    "is_retry": True
+                                                }
+
+                                                save_mass_analysis_progress(
+                                                    retry_skus,
+                                                    set(),
+                                                    success_results,
+                                                    retry_settings
+                                                )
+
+                                                st.session_state["resume_mass_analysis"] = True
+                                                st.session_state["saved_progress"] = retry_progress
+                                                st.success(f"✅ Запланирована обработка {len(retry_skus)} товаров с ошибками")
+                                                st.rerun()
+                                            st.divider()
+
+                                    if error_results:
+                                        error_df = pd.DataFrame(error_results)
+                                        error_report_cols = ["Артикул", "URL", "Статус"]
+                                        if "Параметры" in error_df.columns:
+                                            error_report_cols.append("Параметры")
+
+                                        error_report_df = error_df[error_report_cols].copy()
+
+                                    # Товары с ошибками (исключая неопределенные параметры)
+                                    real_errors = [r for r in error_results if "⚠️ Параметры не определены" not in r.get("Статус", "")] if error_results else []
+
+                                    if col_retry1:
+                                        with col_retry1:
+                                            if real_errors:
+                                                if st.button(f"🔄 Ошибки ({len(real_errors)})", type="primary", use_container_width=True, key="retry_real_errors_final"):
+                                                    retry_skus = [str(r["Артикул"]) for r in real_errors]
+                                                    success_results = [r for r in mass_results if r.get("Статус", "").startswith("✅")]
+
+                                                    retry_settings = {
+                                                        "max_images": mass_max_images,
+                                                        "delay": mass_delay,
+                                                        "selected_params": settings.get("selected_params", None)
+                                                    }
+
+                                                    retry_progress = {
+                                                        "skus_to_process": retry_skus,
+                                                        "processed_skus": [],
+                                                        "results": success_results,
+                                                        "settings": retry_settings,
+                                                        "timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                                        "is_retry": True
+                                                    }
+
+                                                    save_mass_analysis_progress(
+                                                        retry_skus,
+                                                        set(),
+                                                        success_results,
+                                                        retry_settings
+                                                    )
+
+                                                    st.session_state["resume_mass_analysis"] = True
+                                                    st.session_state["saved_progress"] = retry_progress
+                                                    st.success(f"✅ Запланирована обработка {len(retry_skus)} товаров с ошибками")
+                                                    st.rerun()
+                                            elif error_results:
+                                                st.info("✅ Нет товаров с ошибками (кроме неопределенных)")
+
+                                    if col_retry2:
+                                        with col_retry2:
+                                            # Товары с неопределенными параметрами
+                                            if undefined_results:
+                                                if st.button(f"🔄 Неопределенные ({len(undefined_results)})", type="primary", use_container_width=True, key="retry_undefined_params_final"):
+                                                    retry_skus = [str(r["Артикул"]) for r in undefined_results]
+                                                success_results = [r for r in mass_results if r.get("Статус", "").startswith("✅")]
+
+                                                retry_settings = {
+                                                    "max_images": mass_max_images,
+                                                    "delay": mass_delay,
+                                                    "selected_params": settings.get("selected_params", None)
+                                                }
+
+                                                retry_progress = {
+                                                    "skus_to_process": retry_skus,
+                                                    "processed_skus": [],
+                                                    "results": success_results,
+                                                    "settings": retry_settings,
+                                                    "timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                                    "is_retry": True
+                                                }
+
+                                                save_mass_analysis_progress(
+                                                    retry_skus,
+                                                    set(),
+                                                    success_results,
+                                                    retry_settings
+                                                )
+
+                                                st.session_state["resume_mass_analysis"] = True
+                                                st.session_state["saved_progress"] = retry_progress
+                                                st.success(f"✅ Запланирована обработка {len(retry_skus)} товаров с неопределенными параметрами")
+                                                st.rerun()
+                                            else:
+                                                st.info("✅ Нет товаров с неопределенными параметрами")
+
+                                    if col_retry3:
+                                        with col_retry3:
+                                            # Товары с незаполненными параметрами
+                                            if skus_with_empty_params:
+                                                if st.button(f"🔄 Незаполненные ({len(skus_with_empty_params)})", type="primary", use_container_width=True, key="retry_empty_params_final"):
+                                                    success_results = [r for r in mass_results if r.get("Статус", "").startswith("✅")]
+
+                                                    retry_settings = {
+                                                        "max_images": mass_max_images,
+                                                        "delay": mass_delay,
+                                                        "selected_params": settings.get("selected_params", None)
+                                                    }
+
+                                                    retry_progress = {
+                                                        "skus_to_process": skus_with_empty_params,
+                                                        "processed_skus": [],
+                                                        "results": success_results,
+                                                        "settings": retry_settings,
+                                                        "timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                                        "is_retry": True
+                                                    }
+
+                                                    save_mass_analysis_progress(
+                                                        skus_with_empty_params,
+                                                        set(),
+                                                        success_results,
+                                                        retry_settings
+                                                    )
+
+                                                    st.session_state["resume_mass_analysis"] = True
+                                                    st.session_state["saved_progress"] = retry_progress
+                                                    st.success(f"✅ Запланирована обработка {len(skus_with_empty_params)} товаров с незаполненными параметрами")
+                                                    st.rerun()
+
+                                    # Общая кнопка для всех проблемных товаров
+                                    all_problem_skus = set()
+                                    if real_errors:
+                                        all_problem_skus.update([str(r["Артикул"]) for r in real_errors])
+                                    if undefined_results:
+                                        all_problem_skus.update([str(r["Артикул"]) for r in undefined_results])
+                                    if skus_with_empty_params:
+                                        all_problem_skus.update(skus_with_empty_params)
+
+                                    if all_problem_skus:
+                                        st.divider()
+                                        if st.button(f"🔄 Обработать ВСЕ проблемные товары ({len(all_problem_skus)})", type="primary", use_container_width=True, key="retry_all_problems_final"):
+                                            success_results = [r for r in mass_results if r.get("Статус", "").startswith("✅")]
+
+                                            retry_settings = {
+                                                "max_images": mass_max_images,
+                                                "delay": mass_delay,
+                                                "selected_params": settings.get("selected_params", None)
+                                            }
+
+                                            retry_progress = {
+                                                "skus_to_process": list(all_problem_skus),
+                                                "processed_skus": [],
+                                                "results": success_results,
+                                                "settings": retry_settings,
+                                                "timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                                "is_retry": True
+                                            }
+
+                                            save_mass_analysis_progress(
+                                                list(all_problem_skus),
+                                                set(),
+                                                success_results,
+                                                retry_settings
+                                            )
+
+                                            st.session_state["resume_mass_analysis"] = True
+                                            st.session_state["saved_progress"] = retry_progress
+                                            st.success(f"✅ Запланирована обработка {len(all_problem_skus)} проблемных товаров")
+                                            st.rerun()
+
+                                        st.markdown("#### 📋 Все товары с ошибками")
+                                        st.dataframe(error_report_df, use_container_width=True, height=400)
+
+                                        # Экспорт в CSV
+                                        csv = error_report_df.to_csv(index=False).encode('utf-8-sig')
+                                        st.download_button(
+                                            label="📥 Скачать отчет об ошибках (CSV)",
+                                            data=csv,
+                                            file_name=f"mass_analysis_errors_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                                            mime="text/csv",
+                                            key="download_errors_csv_final"
+                                        )
+
+
+                            # Обрабатываем только если есть необработанные товары
+                            if remaining_skus:
+                                import time
+                                previous_product_time = None  # Время обработки предыдущего товара
+
+                                for idx, sku in enumerate(remaining_skus):
+                                    # Проверяем, не был ли анализ остановлен
+                                    if st.session_state.get("mass_analysis_stopped", False) or not st.session_state.get("mass_analysis_btn_clicked", False):
+                                        st.warning("⚠️ Анализ был остановлен")
+                                        # Сохраняем текущие результаты
+                                        if mass_results:
+                                            st.session_state["mass_analysis_results"] = mass_results
+                                            save_mass_analysis_results(mass_results)
+                                            # Автоматически применяем параметры из результатов
+                                            apply_mass_analysis_results_to_params(mass_results)
+                                            save_param_values_to_file()
+                                        st.session_state["mass_analysis_stopped"] = False
+                                        st.session_state["mass_analysis_btn_clicked"] = False
+                                        break
+
+                                    # Находим реальный индекс товара в исходном списке skus_to_process
+                                    # Это важно для правильного отображения номера позиции [X/96]
+                                    try:
+                                        processed_idx = skus_to_process.index(str(sku))
+                                    except (ValueError, AttributeError):
+                                        # Если не найден (не должно быть), используем текущую логику как fallback
+                                        processed_idx = len(processed_skus) + idx
+
+                                    # Формируем URL товара
+                                    wb_url = build_wb_product_url(sku)
+
+                                    # Засекаем время начала обработки товара
+                                    product_start_time = time.time()
+
+                                    # Формируем строку статуса с информацией о времени
+                                    prev_time_str = ""
+                                    if previous_product_time is not None:
+                                        prev_time_str = f" | ⏱️ Предыдущий: {previous_product_time:.1f}с"
+
+                                    mass_status_text.text(f"🔄 Обработка товара {processed_idx + 1}/{total_skus}: Артикул {sku}...{prev_time_str}")
+                                    # Ограничиваем значение progress до максимум 1.0
+                                    progress_value = min((processed_idx) / total_skus, 1.0)
+                                    mass_progress_bar.progress(progress_value)
+
+                                    # Получаем параметры через анализ изображений
+                                    try:
+                                        # Передаем выбранные параметры для анализа (из настроек или из текущего выбора)
+                                        if resume_analysis and saved_progress_data:
+                                            selected_params_for_analysis = settings.get("selected_params", None)
+                                        else:
+                                            selected_params_for_analysis = mass_selected_params if mass_selected_params else None
+
+                                        # Этап 1: Получение изображений
+                                        elapsed = time.time() - product_start_time
+                                        prev_time_str = f" | ⏱️ Предыдущий: {previous_product_time:.1f}с" if previous_product_time else ""
+                                        mass_status_text.text(f"📸 [{processed_idx + 1}/{total_skus}] Артикул {sku}: Получение изображений... | ⏱️ Текущий: {elapsed:.1f}с{prev_time_str}")
+
+                                        # Этап 2: Анализ изображений через AI
+                                        elapsed = time.time() - product_start_time
+                                        prev_time_str = f" | ⏱️ Предыдущий: {previous_product_time:.1f}с" if previous_product_time else ""
+                                        mass_status_text.text(f"🤖 [{processed_idx + 1}/{total_skus}] Артикул {sku}: Анализ через нейросеть... | ⏱️ Текущий: {elapsed:.1f}с{prev_time_str}")
+
+                                        params = get_product_params_from_images(wb_url, api_key, max_images=mass_max_images, selected_params=selected_params_for_analysis)
+
+                                        # Этап 3: Обработка результатов
+                                        elapsed = time.time() - product_start_time
+                                        prev_time_str = f" | ⏱️ Предыдущий: {previous_product_time:.1f}с" if previous_product_time else ""
+                                        mass_status_text.text(f"💾 [{processed_idx + 1}/{total_skus}] Артикул {sku}: Сохранение параметров... | ⏱️ Текущий: {elapsed:.1f}с{prev_time_str}")
+
+                                        if params:
+                                            # Фильтруем параметры, исключая невалидные (артикулы и т.д.)
+                                            valid_params = {k: v for k, v in params.items() if is_valid_param_name(k)}
+
+                                            result_row = {
+                                                "Артикул": sku,
+                                                "URL": wb_url,
+                                                "Статус": "✅ Успешно",
+                                                "Параметры": ", ".join([f"{k}: {v}" for k, v in valid_params.items()])
+                                            }
+                                            result_row.update(valid_params)
+
+                                            # Проверяем, есть ли уже результат для этого артикула
+                                            sku_str = str(sku).replace(".0", "")
+                                            existing_result_idx = None
+                                            for i, existing_result in enumerate(mass_results):
+                                                existing_sku = str(existing_result.get("Артикул", "")).replace(".0", "")
+                                                if existing_sku == sku_str:
+                                                    existing_result_idx = i
+                                                    break
+
+                                            # Если результат уже есть - обновляем, иначе добавляем
+                                            if existing_result_idx is not None:
+                                                # Обновляем существующий результат (всегда, чтобы данные были актуальными)
+                                                mass_results[existing_result_idx] = result_row
+                                            else:
+                                                # Добавляем новый результат
+                                                mass_results.append(result_row)
+
+                                            # СРАЗУ синхронизируем с session_state и сохраняем в файл после каждого товара
+                                            # Очищаем удаленные параметры перед сохранением
+                                            cleaned_mass_results = remove_deleted_params_from_mass_results(mass_results.copy())
+                                            st.session_state["mass_analysis_results"] = cleaned_mass_results
+                                            save_mass_analysis_results(cleaned_mass_results)
+                                            # Обновляем локальную переменную для отображения
+                                            mass_results = cleaned_mass_results
+
+                                            # Сохраняем параметры в session_state с историей
+                                            if "param_values" not in st.session_state:
+                                                st.session_state["param_values"] = {}
+
+                                            # Обновляем param_options только для валидных параметров
+                                            if "param_options" not in st.session_state:
+                                                st.session_state["param_options"] = {}
+
+                                            for param_name, param_value in params.items():
+                                                # Пропускаем невалидные параметры (артикулы и т.д.)
+                                                if not is_valid_param_name(param_name):
+                                                    continue
+
+                                                # Используем функцию с сохранением истории (без записи в файл)
+                                                save_param_value(str(sku), param_name, str(param_value), save_history=True)
+
+                                                # Обновляем param_options
+                                                if "param_options" not in st.session_state:
+                                                    st.session_state["param_options"] = {}
+                                                if param_name not in st.session_state["param_options"]:
+                                                    st.session_state["param_options"][param_name] = []
+                                                if param_value and str(param_value) not in st.session_state["param_options"][param_name]:
+                                                    st.session_state["param_options"][param_name].append(str(param_value))
+
+                                            # Сохраняем историю параметров пакетом после обработки всех параметров товара
+                                            if params:
+                                                save_param_history_to_file()
+
+                                        else:
+                                            result_row = {
+                                                "Артикул": sku,
+                                                "URL": wb_url,
+                                                "Статус": "⚠️ Параметры не определены",
+                                                "Параметры": ""
+                                            }
+
+                                            # Проверяем, есть ли уже результат для этого артикула
+                                            sku_str = str(sku).replace(".0", "")
+                                            existing_result_idx = None
+                                            for i, existing_result in enumerate(mass_results):
+                                                existing_sku = str(existing_result.get("Артикул", "")).replace(".0", "")
+                                                if existing_sku == sku_str:
+                                                    existing_result_idx = i
+                                                    break
+
+                                            # Если результат уже есть - обновляем, иначе добавляем
+                                            if existing_result_idx is not None:
+                                                # Обновляем существующий результат (всегда, чтобы данные были актуальными)
+                                                # Если предыдущий статус был успешным, а новый ошибка - показываем ошибку
+                                                # Если предыдущий статус был ошибкой, а новый успешный - обновляем на успешный
+                                                mass_results[existing_result_idx] = result_row
+                                            else:
+                                                # Добавляем новый результат
+                                                mass_results.append(result_row)
+
+                                            # СРАЗУ синхронизируем с session_state и сохраняем в файл после каждого товара
+                                            # Очищаем удаленные параметры перед сохранением
+                                            cleaned_mass_results = remove_deleted_params_from_mass_results(mass_results.copy())
+                                            st.session_state["mass_analysis_results"] = cleaned_mass_results
+                                            save_mass_analysis_results(cleaned_mass_results)
+                                            # Обновляем локальную переменную для отображения
+                                            mass_results = cleaned_mass_results
+
+                                    except Exception as e:
+                                        error_message = str(e)
+                                        # Сохраняем полное сообщение об ошибке
+                                        error_status = f"❌ Ошибка: {error_message[:100]}"
+                                        if len(error_message) > 100:
+                                            error_status += "..."
+
+                                        result_row = {
+                                            "Артикул": sku,
+                                            "URL": wb_url,
+                                            "Статус": error_status,
+                                            "Параметры": "",
+                                            "Ошибка (полная)": error_message  # Сохраняем полное сообщение для отчета
+                                        }
+
+                                        # Проверяем, есть ли уже результат для этого артикула
+                                        sku_str = str(sku).replace(".0", "")
+                                        existing_result_idx = None
+                                        for i, existing_result in enumerate(mass_results):
+                                            existing_sku = str(existing_result.get("Артикул", "")).replace(".0", "")
+                                            if existing_sku == sku_str:
+                                                existing_result_idx = i
+                                                break
+
+                                        # Если результат уже есть - обновляем, иначе добавляем
+                                        if existing_result_idx is not None:
+                                            # Обновляем существующий результат (всегда, чтобы данные были актуальными)
+                                            # Если предыдущий статус был успешным, а новый ошибка - показываем ошибку
+                                            # Если предыдущий статус был ошибкой, а новый успешный - обновляем на успешный
+                                            mass_results[existing_result_idx] = result_row
+                                        else:
+                                            # Добавляем новый результат
+                                            mass_results.append(result_row)
+
+                                        # СРАЗУ синхронизируем с session_state и сохраняем в файл после каждого товара
+                                        st.session_state["mass_analysis_results"] = mass_results
+                                        save_mass_analysis_results(mass_results)
+
+                                    # Вычисляем время обработки товара
+                                    product_end_time = time.time()
+                                    product_processing_time = product_end_time - product_start_time
+
+                                    # Отмечаем товар как обработанный
+                                    processed_skus.add(str(sku))
+
+                                    # Определяем статус и иконку из последнего добавленного результата
+                                    # Проверяем последний результат в mass_results для текущего артикула
+                                    last_result_status = None
+                                    for result in reversed(mass_results):
+                                        if str(result.get("Артикул", "")).replace(".0", "") == str(sku).replace(".0", ""):
+                                            last_result_status = result.get("Статус", "")
+                                            break
+
+                                    # Определяем иконку статуса
+                                    if last_result_status and last_result_status.startswith("✅"):
+                                        status_icon = "✅"
+                                    elif last_result_status and "❌" in last_result_status:
+                                        status_icon = "❌"
+                                    elif last_result_status and "⚠️" in last_result_status:
+                                        status_icon = "⚠️"
+                                    else:
+                                        status_icon = "⏳"
+
+                                    elapsed_str = f"{product_processing_time:.1f}с"
+                                    prev_time_str = f" | ⏱️ Предыдущий: {previous_product_time:.1f}с" if previous_product_time is not None else ""
+                                    mass_status_text.text(f"{status_icon} [{processed_idx + 1}/{total_skus}] Артикул {sku} обработан за {elapsed_str}{prev_time_str}")
+
+                                    # Обновляем прогресс-бар
+                                    progress_value = min((processed_idx + 1) / total_skus, 1.0)
+                                    mass_progress_bar.progress(progress_value)
+
+                                    # Сохраняем время обработки текущего товара для следующего
+                                    previous_product_time = product_processing_time
+
+                                    # Вычисляем статистику (всегда актуальная)
+                                    current_success_count = len([r for r in mass_results if r.get("Статус", "").startswith("✅")])
+                                    current_error_count = len([r for r in mass_results if not r.get("Статус", "").startswith("✅")])
+
+                                    # Обновляем таблицу результатов ПОСЛЕ КАЖДОГО товара
+                                    # КРИТИЧЕСКИ ВАЖНО: Показываем количество товаров из mass_results, а не processed_idx
+                                    # Используем актуальные данные из session_state (они уже синхронизированы выше)
+                                    current_results = st.session_state.get("mass_analysis_results", mass_results)
+                                    if current_results:
+                                        results_df = pd.DataFrame(current_results)
+
+                                        # Фильтруем удаленные параметры из столбцов DataFrame
+                                        deleted_params = st.session_state.get("deleted_params", set())
+                                        if not isinstance(deleted_params, set):
+                                            deleted_params = set(deleted_params) if deleted_params else set()
+
+                                        # Удаляем столбцы, которые являются удаленными параметрами
+                                        cols_to_keep = [col for col in results_df.columns if col not in deleted_params]
+                                        if cols_to_keep:
+                                            results_df = results_df[cols_to_keep]
+
+                                        # Пересчитываем статистику из актуальных результатов
+                                        current_success_count = len([r for r in current_results if r.get("Статус", "").startswith("✅")])
+                                        current_error_count = len([r for r in current_results if not r.get("Статус", "").startswith("✅")])
+
+                                        with results_table_placeholder.container():
+                                            st.markdown(f"**📋 Обработано: {len(current_results)} товаров** (✅ Успешно: {current_success_count}, ❌ Ошибок: {current_error_count}) | 🔄 Всего попыток: {processed_idx + 1}/{total_skus}")
+                                            st.dataframe(results_df, use_container_width=True, height=400)
+
+                                    # Сохраняем прогресс реже - каждые 5 товаров или в конце (для оптимизации)
+                                    should_save_progress = (len(processed_skus) % 5 == 0) or (idx == len(remaining_skus) - 1)
+                                    if should_save_progress:
+                                        save_mass_analysis_progress(
+                                            skus_to_process,
+                                            processed_skus,
+                                            mass_results,
+                                            settings
+                                        )
+
+                                    # Обновляем кнопку применения параметров реже - каждые 3 товара или в конце
+                                    should_update_button = (len(mass_results) % 3 == 0) or (idx == len(remaining_skus) - 1)
+                                    if should_update_button:
+                                        if current_success_count > 0:
+                                            with apply_button_placeholder.container():
+                                                st.divider()
+                                                col_apply1, col_apply2 = st.columns([1, 2])
+                                                with col_apply1:
+                                                    # Используем уникальный ключ с индексом обработанных товаров
+                                                    button_key = f"apply_mass_results_during_{len(mass_results)}"
+                                                    if st.button("💾 Применить параметры в общую таблицу", type="primary", use_container_width=True, key=button_key):
+                                                        # Сохраняем параметры в файл
+                                                        if save_param_values_to_file():
+                                                            if save_param_history_to_file():
+                                                                # Перезагружаем параметры из файла, чтобы убедиться, что они применены
+                                                                load_param_values_from_file()
+                                                                st.success(f"✅ Параметры применены в общую таблицу! Обновлено {current_success_count} товаров.")
+                                                                # Обновляем таблицу для отображения новых параметров
+                                                                if "df" in st.session_state:
+                                                                    # Перезагружаем данные, чтобы показать новые параметры
+                                                                    st.session_state["data_loaded"] = False
+                                                                    # Очищаем display_df, чтобы он пересоздался с новыми параметрами
+                                                                    if "display_df" in st.session_state:
+                                                                        del st.session_state["display_df"]
+                                                                st.rerun()
+                                                            else:
+                                                                st.error("❌ Ошибка при сохранении истории изменений")
+                                                        else:
+                                                            st.error("❌ Ошибка при сохранении параметров")
+                                                with col_apply2:
+                                                    st.info("💡 Параметры из успешных результатов будут применены в основную таблицу. Можно нажимать во время обработки.")
+                                        else:
+                                            apply_button_placeholder.empty()
+
+                                    # Задержка между товарами и переход к следующему
+                                    if idx < len(remaining_skus) - 1:
+                                        import time
+                                        # Показываем, что переходим к следующему товару
+                                        next_idx = processed_idx + 1
+                                        mass_status_text.text(f"⏳ Переход к следующему товару... [{next_idx}/{total_skus}] | ⏱️ Предыдущий: {product_processing_time:.1f}с")
+                                        time.sleep(mass_delay)
+                                        # Обновляем статус перед началом обработки следующего товара
+                                        mass_status_text.text(f"🔄 Начинаем обработку товара {next_idx}/{total_skus}...")
+                                    else:
+                                        # Последний товар обработан
+                                        mass_status_text.text(f"✅ Все товары обработаны! Последний товар: {product_processing_time:.1f}с")
+
+                            mass_progress_bar.progress(1.0)
+                            mass_status_text.empty()
+
+                            # Удаляем сохраненный прогресс после успешного завершения
+                            clear_mass_analysis_progress()
+
+                            # Сбрасываем флаг запуска анализа, чтобы старые результаты снова показывались
+                            st.session_state["mass_analysis_btn_clicked"] = False
+
+                            # Финальные результаты
+                            st.markdown("---")
+                            st.markdown("### 📊 Итоговый отчет массового анализа")
+
+                            # Пересчитываем счетчики из актуальных результатов
+                            final_success_count = len([r for r in mass_results if r.get("Статус", "").startswith("✅")])
+                            final_error_count = len([r for r in mass_results if not r.get("Статус", "").startswith("✅")])
+
+                            col_success, col_error, col_total = st.columns(3)
+                            with col_success:
+                                st.metric("✅ Успешно", final_success_count)
+                            with col_error:
+                                st.metric("❌ Ошибок", final_error_count)
+                            with col_total:
+                                st.metric("📦 Всего", total_skus)
+
+                            # Определяем проблемные товары для кнопок повторной обработки
+                            error_results = [r for r in mass_results if not r.get("Статус", "").startswith("✅")]
+                            undefined_results = [r for r in mass_results if "⚠️ Параметры не определены" in r.get("Статус", "")]
+
+                            # Показываем кнопки повторной обработки сразу после итогового отчета
+                            if undefined_results or error_results:
+                                st.markdown("---")
+                                st.markdown("#### 🔄 Повторная обработка товаров")
+
+                                # Кнопка для товаров с неопределенными параметрами
+                                if undefined_results:
+                                    if st.button(f"🔄 Обработать товары с неопределенными параметрами ({len(undefined_results)})", type="primary", use_container_width=True, key="retry_undefined_final_top"):
+                                        retry_skus = [str(r["Артикул"]) for r in undefined_results]
+                                        success_results = [r for r in mass_results if r.get("Статус", "").startswith("✅")]
+
+                                        retry_settings = {
+                                            "max_images": mass_max_images if 'mass_max_images' in locals() else st.session_state.get("mass_max_images_slider", 5),
+                                            "delay": mass_delay if 'mass_delay' in locals() else st.session_state.get("mass_delay_slider", 2.0),
+                                            "selected_params": mass_selected_params if 'mass_selected_params' in locals() else st.session_state.get("mass_selected_params_multiselect", [])
+                                        }
+
+                                        retry_progress = {
+                                            "skus_to_process": retry_skus,
+                                            "processed_skus": [],
+                                            "results": success_results,
+                                            "settings": retry_settings,
+                                            "timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                            "is_retry": True
+                                        }
+
+                                        save_mass_analysis_progress(
+                                            retry_skus,
+                                            set(),
+                                            success_results,
+                                            retry_settings
+                                        )
+
+                                        st.session_state["resume_mass_analysis"] = True
+                                        st.session_state["saved_progress"] = retry_progress
+                                        st.success(f"✅ Запланирована обработка {len(retry_skus)} товаров с неопределенными параметрами")
+                                        st.rerun()
+
+                                # Кнопка для всех товаров с ошибками
+                                if error_results:
+                                    if st.button(f"🔄 Обработать все товары с ошибками ({len(error_results)})", type="primary", use_container_width=True, key="retry_all_errors_final_top"):
+                                        retry_skus = [str(r["Артикул"]) for r in error_results]
+                                        success_results = [r for r in mass_results if r.get("Статус", "").startswith("✅")]
+
+                                        retry_settings = {
+                                            "max_images": mass_max_images if 'mass_max_images' in locals() else st.session_state.get("mass_max_images_slider", 5),
+                                            "delay": mass_delay if 'mass_delay' in locals() else st.session_state.get("mass_delay_slider", 2.0),
+                                            "selected_params": mass_selected_params if 'mass_selected_params' in locals() else st.session_state.get("mass_selected_params_multiselect", [])
+                                        }
+
+                                        retry_progress = {
+                                            "skus_to_process": retry_skus,
+                                            "processed_skus": [],
+                                            "results": success_results,
+                                            "settings": retry_settings,
+                                            "timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                            "is_retry": True
+                                        }
+
+                                        save_mass_analysis_progress(
+                                            retry_skus,
+                                            set(),
+                                            success_results,
+                                            retry_settings
+                                        )
+
+                                        st.session_state["resume_mass_analysis"] = True
+                                        st.session_state["saved_progress"] = retry_progress
+                                        st.success(f"✅ Запланирована обработка {len(retry_skus)} товаров с ошибками")
+                                        st.rerun()
+
+                            # Детальный отчет об ошибках
+                            # Пересчитываем счетчики из актуальных результатов
+                            current_error_count = len([r for r in mass_results if not r.get("Статус", "").startswith("✅")])
+                            if current_error_count > 0:
+                                st.markdown("---")
+                                st.markdown("### ❌ Детальный отчет об ошибках")
+
+                                # Фильтруем товары с ошибками
+                                error_results = [r for r in mass_results if not r.get("Статус", "").startswith("✅")]
+                                undefined_results = [r for r in mass_results if "⚠️ Параметры не определены" in r.get("Статус", "")]
+
+                                # Проверяем товары с незаполненными параметрами из таблицы
+                                param_values = get_param_values()
+                                all_param_names = list(st.session_state.get("param_options", {}).keys())
+                                skus_with_empty_params = []
+
+                                if all_param_names and param_values:
+                                    # Получаем все артикулы из таблицы
+                                    source_df = st.session_state.get("df")
+                                    if source_df is None:
+                                        source_df = st.session_state.get("display_df")
+                                    if source_df is not None and "Артикул" in source_df.columns:
+                                        for sku in source_df["Артикул"].dropna().unique():
+                                            sku_str = str(sku).replace(".0", "")
+                                            # Проверяем, заполнены ли все параметры для этого товара
+                                            filled_params_count = 0
+                                            for param_name in all_param_names:
+                                                if param_name in param_values and sku_str in param_values[param_name]:
+                                                    value = param_values[param_name][sku_str]
+                                                    if value and str(value).strip():
+                                                        filled_params_count += 1
+
+                                            # Если ни один параметр не заполнен, добавляем в список
+                                            if filled_params_count == 0:
+                                                skus_with_empty_params.append(sku_str)
+
+                                if error_results:
+                                    error_df = pd.DataFrame(error_results)
+                                    # Оставляем только важные колонки для отчета об ошибках
+                                    error_report_cols = ["Артикул", "URL", "Статус"]
+                                    if "Параметры" in error_df.columns:
+                                        error_report_cols.append("Параметры")
+
+                                    error_report_df = error_df[error_report_cols].copy()
+
+                                    # Кнопка для обработки всех товаров с ошибками
+                                    st.markdown("#### 🔄 Повторная обработка товаров с ошибками")
+                                    col_retry_all, col_retry_info = st.columns([2, 3])
+                                    with col_retry_all:
+                                        if st.button("🔄 Обработать все товары с ошибками снова", type="primary", key="retry_all_errors"):
+                                            # Извлекаем все артикулы с ошибками
+                                            retry_skus = [str(r["Артикул"]) for r in error_results]
+
+                                            # Сохраняем настройки для повторной обработки
+                                            retry_settings = {
+                                                "max_images": mass_max_images,
+                                                "delay": mass_delay
+                                            }
+
+                                            # Сохраняем текущие успешные результаты для последующего объединения
+                                            success_results = [r for r in mass_results if r.get("Статус", "").startswith("✅")]
+
+                                            # Создаем новый прогресс для повторной обработки
+                                            retry_progress = {
+                                                "skus_to_process": retry_skus,
+                                                "processed_skus": [],
+                                                "results": success_results,  # Сохраняем успешные результаты
+                                                "settings": retry_settings,
+                                                "timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                                "is_retry": True,
+                                                "original_results": mass_results  # Сохраняем все исходные результаты
+                                            }
+
+                                            save_mass_analysis_progress(
+                                                retry_skus,
+                                                set(),
+                                                success_results,  # Сохраняем успешные результаты
+                                                retry_settings
+                                            )
+
+                                            st.session_state["resume_mass_analysis"] = True
+                                            st.session_state["saved_progress"] = retry_progress
+                                            st.success(f"✅ Запланирована повторная обработка {len(retry_skus)} товаров с ошибками")
+                                            st.rerun()
+                                    with col_retry_info:
+                                        # Пересчитываем счетчики из актуальных результатов
+                                        current_success_count_info = len([r for r in mass_results if r.get("Статус", "").startswith("✅")])
+                                        st.info(f"📊 Будет обработано **{len(error_results)}** товаров с ошибками. Успешные результаты ({current_success_count_info}) будут сохранены.")
+
+                                    st.divider()
+
+                                    # Группируем ошибки по типу
+                                    error_types = {}
+                                    for _, row in error_report_df.iterrows():
+                                        status = str(row.get("Статус", ""))
+                                        if "APITimeoutError" in status or "timeout" in status.lower():
+                                            error_type = "⏱️ Таймаут API"
+                                        elif "Rate limit" in status or "429" in status:
+                                            error_type = "🚦 Превышен лимит запросов"
+                                        elif "Параметры не определены" in status:
+                                            error_type = "⚠️ Параметры не определены"
+                                        elif "Ошибка" in status:
+                                            error_type = "❌ Прочие ошибки"
+                                        else:
+                                            error_type = "❓ Неизвестная ошибка"
+
+                                        if error_type not in error_types:
+                                            error_types[error_type] = []
+                                        error_types[error_type].append(row.to_dict())
+
+                                    # Показываем ошибки по типам
+                                    st.markdown("#### 📊 Ошибки по типам")
+                                    for error_type, errors in error_types.items():
+                                        with st.expander(f"{error_type} ({len(errors)} товаров)", expanded=False):
+                                            error_type_df = pd.DataFrame(errors)
+                                            st.dataframe(error_type_df, use_container_width=True, height=min(400, len(errors) * 50))
+
+                                            # Кнопка для повторной обработки товаров с ошибками конкретного типа
+                                            if st.button(f"🔄 Повторить обработку ({len(errors)} товаров)", key=f"retry_{error_type}"):
+                                                # Извлекаем артикулы для повторной обработки
+                                                retry_skus = [str(r["Артикул"]) for r in errors]
+
+                                                # Сохраняем настройки для повторной обработки
+                                                retry_settings = {
+                                                    "max_images": mass_max_images,
+                                                    "delay": mass_delay
+                                                }
+
+                                                # Сохраняем текущие успешные результаты
+                                                success_results = [r for r in mass_results if r.get("Статус", "").startswith("✅")]
+
+                                                # Создаем новый прогресс для повторной обработки
+                                                retry_progress = {
+                                                    "skus_to_process": retry_skus,
+                                                    "processed_skus": [],
+                                                    "results": success_results,  # Сохраняем успешные результаты
+                                                    "settings": retry_settings,
+                                                    "timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                                    "is_retry": True,
+                                                    "original_results": mass_results
+                                                }
+
+                                                save_mass_analysis_progress(
+                                                    retry_skus,
+                                                    set(),
+                                                    success_results,  # Сохраняем успешные результаты
+                                                    retry_settings
+                                                )
+
+                                                st.session_state["resume_mass_analysis"] = True
+                                                st.session_state["saved_progress"] = retry_progress
+                                                st.success(f"✅ Запланирована повторная обработка {len(retry_skus)} товаров")
+                                                st.rerun()
+
+                                    st.divider()
+
+                                    # Общая таблица всех ошибок
+                                    st.markdown("#### 📋 Все товары с ошибками")
+                                    st.dataframe(error_report_df, use_container_width=True, height=400)
+
+                                    # Экспорт в CSV
+                                    csv = error_report_df.to_csv(index=False).encode('utf-8-sig')
+                                    st.download_button(
+                                        label="📥 Скачать отчет об ошибках (CSV)",
+                                        data=csv,
+                                        file_name=f"mass_analysis_errors_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                                        mime="text/csv",
+                                        key="download_errors_csv"
+                                    )
+
+                            # Сохраняем результаты в session_state для последующего просмотра
+                            st.session_state["mass_analysis_results"] = mass_results
+                            save_mass_analysis_results(mass_results)
+
+                            # Автоматически применяем параметры из результатов
+                            # Пересчитываем счетчики из актуальных результатов
+                            current_success_count = len([r for r in mass_results if r.get("Статус", "").startswith("✅")])
+                            if current_success_count > 0:
+                                applied_params_count = apply_mass_analysis_results_to_params(mass_results)
+                                if applied_params_count > 0:
+                                    # Сохраняем параметры в файл
+                                    save_param_values_to_file()
+                                    st.success(f"✅ Анализ завершен! Параметры автоматически применены ({applied_params_count} параметров).")
+                                else:
+                                    st.success(f"✅ Анализ завершен!")
+                            else:
+                                st.info("ℹ️ Нет успешных результатов для применения параметров")
+                    else:
+                        st.warning("⚠️ Нет товаров для анализа")
+
+    st.divider()
+    # ========== КОНЕЦ СЕКЦИИ: Определение параметров по ссылке ==========
+
+    # Таблица с параметрами удалена - используется основная таблица в первой вкладке "📊 Анализ данных"
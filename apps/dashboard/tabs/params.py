@@ -0,0 +1,1968 @@
+# -*- coding: utf-8 -*-
+"""
+Параметры товаров: значения и варианты, история правок, иерархия, исключения,
+результаты массового анализа, сохранение и загрузка проекта.
+
+Используются скриптом дашборда и вкладками «Анализ данных»,
+«Установка параметров» и «Аналитика по параметрам».
+"""
+import os
+import json
+import base64
+
+import pandas as pd
+import streamlit as st
+
+from utils.perf import perf_timed
+from utils.boot_state import read_json_snapshot, read_json_copy
+from utils.project_keys import (
+    param_history_path, main_page_settings_path,
+    resolve_param_values_file, resolve_main_page_settings_file
+)
+from utils.param_journal import (
+    append_param_edit, append_param_options, append_param_delete,
+    load_param_data, write_param_snapshot
+)
+
+
+def is_valid_param_name(param_name: str) -> bool:
+    """
+    Проверяет, является ли имя параметра валидным.
+    Исключает артикулы и другие недопустимые значения.
+    """
+    if not param_name or not isinstance(param_name, str):
+        return False
+    
+    param_name_clean = param_name.strip()
+    
+    # Исключаем пустые значения
+    if not param_name_clean:
+        return False
+    
+    # Исключаем артикулы (чисто числовые значения длиной более 6 цифр)
+    if param_name_clean.isdigit() and len(param_name_clean) >= 6:
+        return False
+    
+    # Исключаем служебные поля
+    excluded_names = ["Артикул", "URL", "Статус", "Параметры", "sku", "SKU"]
+    if param_name_clean in excluded_names:
+        return False
+    
+    return True
+
+
+def save_param_value(sku: str, param: str, value: str, save_history: bool = True):
+    """Сохраняет значение параметра для товара с сохранением истории изменений"""
+    # Проверяем валидность имени параметра
+    if not is_valid_param_name(param):
+        return
+    
+    # ВАЖНО: Проверяем удаленные параметры только из session_state текущего проекта
+    deleted_params = st.session_state.get("deleted_params", set())
+    if not isinstance(deleted_params, set):
+        deleted_params = set(deleted_params) if deleted_params else set()
+        st.session_state["deleted_params"] = deleted_params
+    
+    if param in deleted_params:
+        # Параметр был удален в текущем проекте, не сохраняем его
+        return
+    
+    if "param_values" not in st.session_state:
+        st.session_state["param_values"] = {}
+    if param not in st.session_state["param_values"]:
+        st.session_state["param_values"][param] = {}
+    
+    # Проверяем, есть ли старое значение
+    old_value = st.session_state["param_values"][param].get(sku, None)
+    
+    # Сохраняем новое значение в правильной структуре: param_values[param][sku] = value
+    st.session_state["param_values"][param][sku] = value
+    
+    # Дописываем правку в журнал проекта (одна строка, не зависит от размера проекта)
+    if old_value != value:
+        append_param_edit(st.session_state.get("cached_file_name"), param, sku, value)
+    
+    # Если значение изменилось и нужно сохранить историю
+    if save_history and old_value is not None and old_value != value:
+        add_param_history(sku, param, old_value, value)
+
+
+def save_param_options(param: str):
+    """Сохраняет варианты параметра: в проекте — одна запись журнала, без проекта — файл параметров"""
+    current_file = st.session_state.get("cached_file_name")
+    if not current_file:
+        return save_param_values_to_file()
+    return append_param_options(current_file, param, st.session_state.get("param_options", {}).get(param) or [])
+
+
+def save_param_delete(param: str):
+    """Сохраняет удаление параметра (он попадает в deleted_params): в проекте — одна запись журнала"""
+    deleted_params = st.session_state.get("deleted_params", set())
+    if not isinstance(deleted_params, set):
+        deleted_params = set(deleted_params) if deleted_params else set()
+        st.session_state["deleted_params"] = deleted_params
+    deleted_params.add(param)
+    current_file = st.session_state.get("cached_file_name")
+    if not current_file:
+        return save_param_values_to_file()
+    return append_param_delete(current_file, param)
+
+
+def mark_params_dirty():
+    """Параметры изменены мимо журнала (импорт, построение из таблицы): автосохранение запишет снимок"""
+    st.session_state["params_dirty"] = True
+
+
+def add_param_history(sku: str, param: str, old_value: str, new_value: str):
+    """Добавляет запись в историю изменений параметра (без сохранения в файл - сохраняется пакетами)"""
+    if "param_history" not in st.session_state:
+        st.session_state["param_history"] = []
+    
+    history_entry = {
+        "timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "sku": str(sku),
+        "param": param,
+        "old_value": old_value,
+        "new_value": new_value
+    }
+    
+    st.session_state["param_history"].append(history_entry)
+    
+    # НЕ сохраняем историю в файл здесь - сохраняется пакетами после обработки товара
+
+
+def get_param_history(sku: str = None, param: str = None):
+    """Получает историю изменений параметров с фильтрацией"""
+    history = st.session_state.get("param_history", [])
+    
+    if sku:
+        history = [h for h in history if h["sku"] == str(sku)]
+    if param:
+        history = [h for h in history if h["param"] == param]
+    
+    # Сортируем по дате (новые сверху)
+    history.sort(key=lambda x: x["timestamp"], reverse=True)
+    
+    return history
+
+
+@perf_timed()
+def save_param_history_to_file():
+    """Сохраняет историю изменений параметров в файл"""
+    history = st.session_state.get("param_history", [])
+    current_file = st.session_state.get("cached_file_name", None)
+    
+    if history and current_file:
+        try:
+            history_file = param_history_path(current_file)
+            
+            history_data = {
+                "file_name": current_file,
+                "history": history,
+                "last_updated": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
+            }
+            
+            with open(history_file, "w", encoding="utf-8") as f:
+                json.dump(history_data, f, ensure_ascii=False, indent=2)
+            
+            return True
+        except Exception as e:
+            return False
+    
+    return False
+
+
+@perf_timed()
+def load_param_history_from_file():
+    """Загружает историю изменений параметров из файла"""
+    current_file = st.session_state.get("cached_file_name", None)
+    
+    if current_file:
+        try:
+            history_file = param_history_path(current_file)
+            
+            if os.path.exists(history_file):
+                with open(history_file, "r", encoding="utf-8") as f:
+                    history_data = json.load(f)
+                
+                # Проверяем, что файл соответствует текущему файлу
+                if history_data.get("file_name") == current_file:
+                    st.session_state["param_history"] = history_data.get("history", [])
+                    return True
+        except Exception as e:
+            pass
+    
+    # Если файл не найден или не соответствует, инициализируем пустую историю
+    if "param_history" not in st.session_state:
+        st.session_state["param_history"] = []
+    
+    return False
+
+
+def get_hierarchy_params():
+    """Получает список иерархических параметров из session_state или возвращает значения по умолчанию"""
+    if "hierarchy_params" in st.session_state:
+        return st.session_state["hierarchy_params"]
+    # Значения по умолчанию
+    return ["Тип", "Рукав", "Ворот"]
+
+
+def get_subtype_params():
+    """Получает список параметров подтипа из session_state или возвращает значения по умолчанию"""
+    if "subtype_params" in st.session_state:
+        return st.session_state["subtype_params"]
+    # Значения по умолчанию
+    return ["Рукав", "Ворот"]
+
+
+def get_visual_params():
+    """Получает список визуальных параметров из session_state или возвращает значения по умолчанию"""
+    if "visual_params" in st.session_state:
+        return st.session_state["visual_params"]
+    # Значения по умолчанию
+    return ["Цвет", "Принт", "Логотип", "Строчка", "Шов", "Строчка шов"]
+
+
+def save_hierarchy_config():
+    """Сохраняет конфигурацию иерархии параметров в файл"""
+    try:
+        # Получаем удаленные параметры
+        deleted_params = st.session_state.get("deleted_params", set())
+        if not isinstance(deleted_params, set):
+            deleted_params = set(deleted_params) if deleted_params else set()
+        
+        # Фильтруем удаленные параметры из иерархии
+        hierarchy_params = [p for p in st.session_state.get("hierarchy_params", []) if p not in deleted_params]
+        subtype_params = [p for p in st.session_state.get("subtype_params", ["Рукав", "Ворот"]) if p not in deleted_params]
+        visual_params = [p for p in st.session_state.get("visual_params", ["Цвет", "Принт", "Логотип", "Строчка", "Шов", "Строчка шов"]) if p not in deleted_params]
+        
+        hierarchy_config = {
+            "hierarchy_params": hierarchy_params,
+            "subtype_params": subtype_params,
+            "visual_params": visual_params
+        }
+        with open("hierarchy_config.json", "w", encoding="utf-8") as f:
+            json.dump(hierarchy_config, f, ensure_ascii=False, indent=2)
+        return True
+    except Exception as e:
+        return False
+
+
+@perf_timed()
+def load_hierarchy_config():
+    """Загружает конфигурацию иерархии параметров из файла"""
+    try:
+        # Общий снимок процесса: ниже из него строятся новые списки, сам снимок не меняется
+        hierarchy_config = read_json_snapshot("hierarchy_config.json")
+        if isinstance(hierarchy_config, dict):
+            # Получаем удаленные параметры
+            deleted_params = st.session_state.get("deleted_params", set())
+            if not isinstance(deleted_params, set):
+                deleted_params = set(deleted_params) if deleted_params else set()
+            
+            # Фильтруем удаленные параметры при загрузке
+            hierarchy_params_loaded = hierarchy_config.get("hierarchy_params", [])
+            subtype_params_loaded = hierarchy_config.get("subtype_params", ["Рукав", "Ворот"])
+            visual_params_loaded = hierarchy_config.get("visual_params", ["Цвет", "Принт", "Логотип", "Строчка", "Шов", "Строчка шов"])
+            
+            # Удаляем удаленные параметры из загруженных списков
+            st.session_state["hierarchy_params"] = [p for p in hierarchy_params_loaded if p not in deleted_params]
+            st.session_state["subtype_params"] = [p for p in subtype_params_loaded if p not in deleted_params]
+            st.session_state["visual_params"] = [p for p in visual_params_loaded if p not in deleted_params]
+            return True
+    except Exception as e:
+        pass
+    return False
+
+
+def auto_build_params_from_table(df, uploaded_filename):
+    """
+    Автоматически строит параметры и иерархию из колонок таблицы для новой уникальной таблицы.
+    Определяет параметры из колонок, которые не являются стандартными.
+    """
+    if df is None or df.empty:
+        return
+    
+    # Стандартные колонки, которые не являются параметрами
+    standard_columns = {
+        "Артикул", "URL", "Статус", "Параметры", "Выручка", "Заказы", 
+        "Средняя цена", "Позиция в выдаче", "Дата создания", "Упущенная выручка",
+        "Изображение", "Ссылка", "Выкупы", "Продажи", "Средняя цена без СПП",
+        "Цена (с СПП)", "Прибыль", "Стоимость за 1000 показов", "Бренд", "Поставщик",
+        "Предмет", "Название", "Буст на позицию", "Буст с позиции", "Дельта", "Тип рекламы",
+        # Служебные колонки - данные, а не параметры
+        "Остаток", "Остатки", "Остатки на конец периода", "Остаток на конец периода",
+        "Дней в наличии", "Дней в продаже", "Дни в наличии", "Дни в продаже",
+        "Базовая цена", "Базовая цена, ₽", "Средняя цена без СПП", "Средняя цена",
+        "Дата", "Дата начала", "Дата конца", "Период", "Конец периода",
+        "Stock", "Stock Days", "Days in Stock", "Days Available",
+        "Реализация", "Реализация, шт", "Возврат", "Возврат, шт",
+        "Выкуп, %", "Процент выкупа", "Выкуп процент", "Выкуп",
+        "Оборачиваемость", "Оборачиваемость, раз", "Оборачиваемость (раз)",
+        "Рейтинг", "Отзывы", "Вопросы", "Рейтинг товара",
+        "Конверсия", "Конверсия, %", "Процент конверсии",
+        "Показы", "Клики", "CTR", "CPC", "CPA", "ROAS",
+        "Расход", "Расходы", "Бюджет", "Бюджет рекламы",
+        "Продано", "Продано, шт", "Заказано", "Заказано, шт",
+        "Начало периода", "Конец периода", "Период расчета",
+        "Расчет заказа", "Рекомендуемый заказ", "Оптимальный заказ"
+    }
+    
+    # Ключевые слова для исключения служебных колонок (даже если они не в standard_columns)
+    exclude_keywords = [
+        "остат", "остатки", "остаток",
+        "дней", "дни", "день",
+        "период", "периода", "периоды",
+        "конец", "начало", "дата",
+        "цена", "цена,", "стоимость", "прибыль", "выручка", "расход",
+        "расчет", "рекоменд", "оптимальн",
+        "реализац", "возврат", "выкуп",
+        "оборачиваемость", "конверсия",
+        "рейтинг", "отзыв", "вопрос",
+        "показ", "клик", "ctr", "cpc", "cpa", "roas",
+        "продано", "заказано", "заказ,", "продаж",
+        "stock", "days", "period", "price", "revenue", "profit"
+    ]
+    
+    def is_service_column(col_name):
+        """Проверяет, является ли колонка служебной (данные, а не параметр)"""
+        col_lower = str(col_name).lower()
+        # Проверяем по ключевым словам
+        for keyword in exclude_keywords:
+            if keyword in col_lower:
+                return True
+        return False
+    
+    # Определяем параметры из колонок таблицы (исключая стандартные и служебные)
+    param_columns = [
+        col for col in df.columns 
+        if col not in standard_columns 
+        and not is_service_column(col)
+        and is_valid_param_name(col)
+    ]
+    
+    if not param_columns:
+        return
+    
+    # Проверяем, является ли это новой таблицей (по имени файла или хэшу)
+    current_file_hash = f"{uploaded_filename}_{len(df)}"
+    last_file_hash = st.session_state.get("last_processed_file_hash", None)
+    
+    # Если это новая таблица, строим параметры и иерархию заново
+    if current_file_hash != last_file_hash:
+        # Инициализируем param_values и param_options, если их нет
+        if "param_values" not in st.session_state:
+            st.session_state["param_values"] = {}
+        if "param_options" not in st.session_state:
+            st.session_state["param_options"] = {}
+        
+        # Создаем param_values и param_options из колонок таблицы
+        param_values_new = {}
+        param_options_new = {}
+        
+        for param_col in param_columns:
+            param_values_new[param_col] = {}
+            param_options_new[param_col] = []
+            
+            # Заполняем значения параметров из таблицы
+            if "Артикул" in df.columns:
+                for idx, row in df.iterrows():
+                    sku = str(row.get("Артикул", "")).replace(".0", "")
+                    if sku and sku != "nan":
+                        value = row.get(param_col)
+                        if pd.notna(value) and str(value).strip():
+                            param_values_new[param_col][sku] = str(value).strip()
+            
+            # Собираем уникальные варианты значений для параметра
+            unique_values = df[param_col].dropna().astype(str).str.strip().unique()
+            param_options_new[param_col] = sorted([v for v in unique_values if v]) if len(unique_values) > 0 else []
+        
+        # Обновляем param_values и param_options, дополняя существующие (не перезаписывая полностью)
+        for param_name, param_data in param_values_new.items():
+            if param_name not in st.session_state["param_values"]:
+                st.session_state["param_values"][param_name] = {}
+            # Дополняем значениями из новой таблицы
+            st.session_state["param_values"][param_name].update(param_data)
+        
+        for param_name, options in param_options_new.items():
+            if param_name not in st.session_state["param_options"]:
+                st.session_state["param_options"][param_name] = []
+            # Объединяем варианты значений, убирая дубликаты
+            existing_options = set(st.session_state["param_options"][param_name])
+            new_options = set(options)
+            st.session_state["param_options"][param_name] = sorted(list(existing_options | new_options))
+        
+        # Автоматически строим иерархию на основе найденных параметров
+        # Типичные иерархические параметры (приоритет)
+        hierarchy_candidates = ["Тип", "Категория", "Группа", "Класс"]
+        subtype_candidates = ["Рукав", "Ворот", "Подтип", "Разновидность"]
+        visual_candidates = ["Цвет", "Принт", "Логотип", "Строчка", "Шов", "Строчка шов", "Расцветка", "Оттенок"]
+        
+        # Определяем иерархические параметры
+        hierarchy_params_auto = [p for p in hierarchy_candidates if p in param_columns]
+        if not hierarchy_params_auto:
+            # Если стандартных нет, берем первые 2-3 параметра как иерархические
+            hierarchy_params_auto = param_columns[:min(3, len(param_columns))]
+        
+        # Определяем параметры подтипа
+        subtype_params_auto = [p for p in subtype_candidates if p in param_columns]
+        
+        # Определяем визуальные параметры
+        visual_params_auto = [p for p in visual_candidates if p in param_columns]
+        # Дополняем остальными параметрами, которые не попали в другие категории
+        remaining_params = [p for p in param_columns if p not in hierarchy_params_auto and p not in subtype_params_auto]
+        visual_params_auto.extend(remaining_params[:min(5, len(remaining_params))])
+        
+        # Обновляем иерархию, если её еще нет или она не соответствует новым параметрам
+        if "hierarchy_params" not in st.session_state or not st.session_state.get("hierarchy_params"):
+            st.session_state["hierarchy_params"] = hierarchy_params_auto
+        else:
+            # Дополняем существующую иерархию новыми параметрами
+            existing_hierarchy = set(st.session_state["hierarchy_params"])
+            new_hierarchy = existing_hierarchy | set(hierarchy_params_auto)
+            st.session_state["hierarchy_params"] = list(new_hierarchy)
+        
+        if "subtype_params" not in st.session_state or not st.session_state.get("subtype_params"):
+            st.session_state["subtype_params"] = subtype_params_auto
+        else:
+            existing_subtype = set(st.session_state["subtype_params"])
+            new_subtype = existing_subtype | set(subtype_params_auto)
+            st.session_state["subtype_params"] = list(new_subtype)
+        
+        if "visual_params" not in st.session_state or not st.session_state.get("visual_params"):
+            st.session_state["visual_params"] = visual_params_auto
+        else:
+            existing_visual = set(st.session_state["visual_params"])
+            new_visual = existing_visual | set(visual_params_auto)
+            st.session_state["visual_params"] = list(new_visual)
+        
+        # Сохраняем хэш обработанного файла
+        st.session_state["last_processed_file_hash"] = current_file_hash
+        
+        # Сохраняем конфигурацию иерархии в файл
+        save_hierarchy_config()
+
+
+def save_mass_analysis_progress(skus_to_process: list, processed_skus: set, results: list, settings: dict):
+    """Сохраняет прогресс массового анализа"""
+    try:
+        progress_data = {
+            "skus_to_process": skus_to_process,
+            "processed_skus": list(processed_skus),
+            "results": results,
+            "settings": settings,
+            "timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        with open("mass_analysis_progress.json", "w", encoding="utf-8") as f:
+            json.dump(progress_data, f, ensure_ascii=False, indent=2)
+        return True
+    except Exception as e:
+        return False
+
+
+@perf_timed()
+def load_mass_analysis_progress():
+    """Загружает сохраненный прогресс массового анализа"""
+    try:
+        if os.path.exists("mass_analysis_progress.json"):
+            with open("mass_analysis_progress.json", "r", encoding="utf-8") as f:
+                progress_data = json.load(f)
+            return progress_data
+    except Exception as e:
+        pass
+    return None
+
+
+def clear_mass_analysis_progress():
+    """Удаляет сохраненный прогресс массового анализа"""
+    try:
+        if os.path.exists("mass_analysis_progress.json"):
+            os.remove("mass_analysis_progress.json")
+        return True
+    except Exception as e:
+        return False
+
+
+def save_excluded_params_settings():
+    """Сохраняет настройки исключения параметров в файл"""
+    try:
+        excluded_params = st.session_state.get("excluded_params", [])
+        excluded_param_values = st.session_state.get("excluded_param_values", {})
+        
+        settings = {
+            "excluded_params": excluded_params,
+            "excluded_param_values": excluded_param_values,
+            "timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        
+        with open("excluded_params_settings.json", "w", encoding="utf-8") as f:
+            json.dump(settings, f, ensure_ascii=False, indent=2)
+        
+        return True
+    except Exception as e:
+        st.error(f"Ошибка сохранения настроек исключения параметров: {e}")
+        return False
+
+
+@perf_timed()
+def load_excluded_params_settings():
+    """Загружает настройки исключения параметров из файла"""
+    try:
+        settings = read_json_copy("excluded_params_settings.json")
+        if isinstance(settings, dict):
+            if "excluded_params" in settings:
+                st.session_state["excluded_params"] = settings["excluded_params"]
+            else:
+                st.session_state["excluded_params"] = []
+                
+            if "excluded_param_values" in settings:
+                st.session_state["excluded_param_values"] = settings["excluded_param_values"]
+            else:
+                st.session_state["excluded_param_values"] = {}
+                
+            return True
+    except Exception as e:
+        # Не показываем ошибку, просто используем значения по умолчанию
+        pass
+    return False
+
+
+def save_full_project(project_name: str = None):
+    """Сохраняет полный проект в JSON файл, включая данные файла"""
+    try:
+        # Если проект уже существует, используем его ID, иначе создаем новый
+        import hashlib
+        current_project_id = st.session_state.get("current_project_id", None)
+        
+        if current_project_id and project_name:
+            # Обновляем существующий проект - используем старый ID
+            project_id = current_project_id
+        else:
+            # Создаем новый проект - генерируем новый ID
+            project_id = hashlib.md5(
+                (project_name or f"Проект_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}").encode('utf-8')
+            ).hexdigest()[:12]
+        
+        project_name_final = project_name or f"Проект_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}"
+        
+        # Получаем данные файла, если они есть
+        cached_file_name = st.session_state.get("cached_file_name", None)
+        cached_file_data = None
+        file_data_base64 = None
+        
+        # Пытаемся загрузить файл из кеша или из session_state
+        if cached_file_name:
+            # Сначала проверяем session_state
+            if "cached_file_data" in st.session_state and st.session_state["cached_file_data"]:
+                cached_file_data = st.session_state["cached_file_data"]
+            else:
+                # Пытаемся загрузить из file_cache
+                cache_dir = "file_cache"
+                cache_path = os.path.join(cache_dir, cached_file_name)
+                if os.path.exists(cache_path):
+                    with open(cache_path, "rb") as f:
+                        cached_file_data = f.read()
+            
+            # Кодируем файл в base64 для сохранения в JSON
+            if cached_file_data:
+                file_data_base64 = base64.b64encode(cached_file_data).decode('utf-8')
+        
+        # Собираем все данные проекта
+        project_data = {
+            "project_version": "1.1",
+            "project_id": project_id,
+            "export_date": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "project_name": project_name_final,
+            
+            # Параметры (только для этого проекта)
+            "param_values": get_param_values(),
+            "param_options": st.session_state.get("param_options", {}),
+            
+            # Иерархия параметров
+            "hierarchy_params": st.session_state.get("hierarchy_params", []),
+            "subtype_params": st.session_state.get("subtype_params", []),
+            "visual_params": st.session_state.get("visual_params", []),
+            
+            # Удаленные параметры
+            "deleted_params": list(st.session_state.get("deleted_params", set())),
+            
+            # Исключенные параметры
+            "excluded_params": st.session_state.get("excluded_params", []),
+            "excluded_param_values": st.session_state.get("excluded_param_values", {}),
+            
+            # Настройки главной страницы
+            "main_page_settings": {
+                "search": st.session_state.get("search", ""),
+                "spp": st.session_state.get("spp", 25),
+                "buyout_pct": st.session_state.get("buyout_pct", 25),
+                "revenue_min": st.session_state.get("revenue_min", 0),
+                "revenue_max": st.session_state.get("revenue_max", 1000000),
+                "price_min": st.session_state.get("price_min", 0),
+                "price_max": st.session_state.get("price_max", 10000),
+                "show_images": st.session_state.get("show_images", False),
+                "sort_column": st.session_state.get("sort_column", "Выручка"),
+                "sort_descending": st.session_state.get("sort_descending", True)
+            },
+            
+            # Информация о загруженном файле
+            "cached_file_name": cached_file_name,
+            "cached_file_data_base64": file_data_base64,  # Данные файла в base64
+            "file_size": len(cached_file_data) if cached_file_data else 0,
+            
+            # История параметров (опционально)
+            "param_history": load_param_history_from_file() if os.path.exists("param_history.json") else {}
+        }
+        
+        # Обновляем метаданные файла с информацией о проекте для восстановления при перезагрузке
+        if cached_file_name:
+            try:
+                meta_data = {
+                    "filename": cached_file_name,
+                    "timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "size": len(cached_file_data) if cached_file_data else 0,
+                    "project_id": project_id,
+                    "project_name": project_name_final
+                }
+                with open("file_cache_meta.json", "w", encoding="utf-8") as f:
+                    json.dump(meta_data, f, ensure_ascii=False, indent=2)
+            except Exception:
+                pass  # Не критично
+        
+        # Конвертируем в JSON строку
+        project_json = json.dumps(project_data, ensure_ascii=False, indent=2, default=str)
+        
+        # Обновляем session_state с информацией о проекте
+        st.session_state["current_project_id"] = project_id
+        st.session_state["current_project_name"] = project_name_final
+        
+        return project_json, project_data["project_name"], project_id
+    except Exception as e:
+        import traceback
+        st.error(f"Ошибка сохранения проекта: {e}\n{traceback.format_exc()}")
+        return None, None, None
+
+
+def load_full_project(project_json: str):
+    """Загружает полный проект из JSON файла, включая восстановление файла данных"""
+    try:
+        project_data = json.loads(project_json)
+        
+        # Проверяем версию проекта
+        project_version = project_data.get("project_version", "1.0")
+        project_id = project_data.get("project_id", None)
+        project_name = project_data.get("project_name", "Проект")
+        
+        # Восстанавливаем файл данных, если он есть
+        cached_file_name = project_data.get("cached_file_name", None)
+        file_data_base64 = project_data.get("cached_file_data_base64", None)
+        
+        if cached_file_name and file_data_base64:
+            try:
+                # Декодируем файл из base64
+                file_data = base64.b64decode(file_data_base64)
+                
+                # Сохраняем файл в кеш
+                cache_dir = "file_cache"
+                if not os.path.exists(cache_dir):
+                    os.makedirs(cache_dir)
+                
+                cache_path = os.path.join(cache_dir, cached_file_name)
+                with open(cache_path, "wb") as f:
+                    f.write(file_data)
+                
+                # Сохраняем в session_state для немедленного использования
+                st.session_state["cached_file_data"] = file_data
+                st.session_state["cached_file_name"] = cached_file_name
+                
+                # Обновляем метаданные кеша
+                meta_data = {
+                    "filename": cached_file_name,
+                    "timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "size": len(file_data),
+                    "project_id": project_id,
+                    "project_name": project_name
+                }
+                with open("file_cache_meta.json", "w", encoding="utf-8") as f:
+                    json.dump(meta_data, f, ensure_ascii=False, indent=2)
+                
+            except Exception as e:
+                st.warning(f"⚠️ Не удалось восстановить файл данных: {e}")
+        
+        # Очищаем старые параметры перед загрузкой новых
+        # Это важно для изоляции параметров между проектами
+        st.session_state["param_values"] = {}
+        st.session_state["param_options"] = {}
+        st.session_state["hierarchy_params"] = []
+        st.session_state["subtype_params"] = []
+        st.session_state["visual_params"] = []
+        st.session_state["deleted_params"] = set()
+        st.session_state["excluded_params"] = []
+        st.session_state["excluded_param_values"] = {}
+        
+        # Загружаем параметры проекта
+        if "param_values" in project_data:
+            st.session_state["param_values"] = project_data["param_values"]
+        if "param_options" in project_data:
+            st.session_state["param_options"] = project_data["param_options"]
+        
+        # Загружаем иерархию параметров
+        if "hierarchy_params" in project_data:
+            st.session_state["hierarchy_params"] = project_data["hierarchy_params"]
+        if "subtype_params" in project_data:
+            st.session_state["subtype_params"] = project_data["subtype_params"]
+        if "visual_params" in project_data:
+            st.session_state["visual_params"] = project_data["visual_params"]
+        
+        # Загружаем удаленные параметры
+        if "deleted_params" in project_data:
+            deleted_params = project_data["deleted_params"]
+            st.session_state["deleted_params"] = set(deleted_params) if isinstance(deleted_params, list) else deleted_params
+        
+        # Загружаем исключенные параметры
+        if "excluded_params" in project_data:
+            st.session_state["excluded_params"] = project_data["excluded_params"]
+        if "excluded_param_values" in project_data:
+            st.session_state["excluded_param_values"] = project_data["excluded_param_values"]
+        
+        # Загружаем настройки главной страницы
+        if "main_page_settings" in project_data:
+            main_settings = project_data["main_page_settings"]
+            st.session_state["search"] = main_settings.get("search", "")
+            st.session_state["spp"] = main_settings.get("spp", 25)
+            st.session_state["buyout_pct"] = main_settings.get("buyout_pct", 25)
+            st.session_state["revenue_min"] = main_settings.get("revenue_min", 0)
+            st.session_state["revenue_max"] = main_settings.get("revenue_max", 1000000)
+            st.session_state["price_min"] = main_settings.get("price_min", 0)
+            st.session_state["price_max"] = main_settings.get("price_max", 10000)
+            st.session_state["show_images"] = main_settings.get("show_images", False)
+            st.session_state["sort_column"] = main_settings.get("sort_column", "Выручка")
+            st.session_state["sort_descending"] = main_settings.get("sort_descending", True)
+        
+        # Устанавливаем флаг загрузки проекта, чтобы избежать конфликтов
+        st.session_state["project_loading"] = True
+        
+        # Сохраняем все данные в файлы (с привязкой к текущему файлу проекта)
+        # ВАЖНО: НЕ вызываем save_deleted_params_to_file() здесь, так как это сохранит
+        # deleted_params в глобальный файл, что затронет все проекты.
+        # deleted_params уже загружены из проекта и находятся в session_state.
+        save_param_values_to_file()
+        save_hierarchy_config()
+        # save_deleted_params_to_file() - НЕ вызываем при загрузке проекта!
+        save_excluded_params_settings()
+        save_main_page_data_to_file()
+        
+        # Снимаем флаг загрузки
+        st.session_state["project_loading"] = False
+        
+        # Загружаем историю параметров, если есть
+        if "param_history" in project_data and project_data["param_history"]:
+            try:
+                with open("param_history.json", "w", encoding="utf-8") as f:
+                    json.dump(project_data["param_history"], f, ensure_ascii=False, indent=2)
+            except Exception:
+                pass
+        
+        # Сохраняем ID проекта в session_state для отслеживания
+        if project_id:
+            st.session_state["current_project_id"] = project_id
+            st.session_state["current_project_name"] = project_name
+        
+        return True, project_name
+    except Exception as e:
+        import traceback
+        st.error(f"Ошибка загрузки проекта: {e}\n{traceback.format_exc()}")
+        return False, None
+
+
+def save_mass_analysis_results(results: list):
+    """Сохраняет результаты массового анализа в отдельный файл для постоянного хранения"""
+    try:
+        # Очищаем удаленные параметры перед сохранением
+        cleaned_results = remove_deleted_params_from_mass_results(results)
+        with open("mass_analysis_results.json", "w", encoding="utf-8") as f:
+            json.dump(cleaned_results, f, ensure_ascii=False, indent=2)
+        return True
+    except Exception as e:
+        return False
+
+
+@perf_timed()
+def load_mass_analysis_results():
+    """Загружает сохраненные результаты массового анализа"""
+    try:
+        if os.path.exists("mass_analysis_results.json"):
+            results = read_json_copy("mass_analysis_results.json", [])
+            results = results if isinstance(results, list) else []
+            # Очищаем удаленные параметры из результатов
+            results = remove_deleted_params_from_mass_results(results)
+            return results
+    except Exception as e:
+        pass
+    return []
+
+
+def remove_deleted_params_from_mass_results(results: list) -> list:
+    """Удаляет удаленные параметры из результатов массового анализа"""
+    if not results:
+        return results
+    
+    # Получаем список удаленных параметров
+    deleted_params = set()
+    if "deleted_params" in st.session_state:
+        deleted_params = st.session_state["deleted_params"]
+    else:
+        deleted_params = load_deleted_params_from_file()
+        # Сохраняем в session_state для будущих использований
+        if deleted_params:
+            st.session_state["deleted_params"] = deleted_params
+    
+    if not deleted_params:
+        return results
+    
+    # Список обязательных полей, которые не являются параметрами
+    required_fields = {"Артикул", "URL", "Статус", "Параметры"}
+    
+    cleaned_results = []
+    for result in results:
+        # Создаем копию результата без удаленных параметров
+        # Сохраняем обязательные поля и параметры, которые не были удалены
+        cleaned_result = {
+            k: v for k, v in result.items() 
+            if k in required_fields or k not in deleted_params
+        }
+        cleaned_results.append(cleaned_result)
+    
+    return cleaned_results
+
+
+def export_mass_analysis_results_to_csv(results: list):
+    """Экспортирует результаты массового анализа в CSV"""
+    try:
+        if not results:
+            return None
+        
+        df = pd.DataFrame(results)
+        
+        # Убеждаемся, что колонка Артикул есть и в правильном формате
+        if "Артикул" in df.columns:
+            df["Артикул"] = df["Артикул"].astype(str).str.replace(".0", "", regex=False)
+        
+        # Сортируем колонки: сначала основные, потом параметры
+        main_cols = ["Артикул", "URL", "Статус", "Параметры"]
+        param_cols = [col for col in df.columns if col not in main_cols]
+        column_order = [col for col in main_cols if col in df.columns] + sorted(param_cols)
+        
+        if column_order:
+            df = df[column_order]
+        
+        csv_data = df.to_csv(encoding='utf-8-sig', index=False)
+        return csv_data
+    except Exception as e:
+        st.error(f"Ошибка экспорта в CSV: {e}")
+        return None
+
+
+def import_mass_analysis_results_from_csv(csv_data: str):
+    """Импортирует результаты массового анализа из CSV и применяет параметры"""
+    try:
+        import io
+        df = pd.read_csv(io.StringIO(csv_data), encoding='utf-8-sig')
+        
+        results = []
+        applied_count = 0
+        
+        # Инициализируем param_values если нет
+        if "param_values" not in st.session_state:
+            st.session_state["param_values"] = {}
+        if "param_options" not in st.session_state:
+            st.session_state["param_options"] = {}
+        
+        for _, row in df.iterrows():
+            # Получаем артикул
+            sku_raw = row.get("Артикул", "")
+            if pd.isna(sku_raw) or not sku_raw:
+                continue
+            
+            sku = str(int(sku_raw)) if isinstance(sku_raw, (int, float)) else str(sku_raw).replace(".0", "")
+            
+            # Создаем запись результата
+            result_row = {
+                "Артикул": sku,
+                "URL": row.get("URL", ""),
+                "Статус": row.get("Статус", "✅ Импортировано"),
+                "Параметры": row.get("Параметры", "")
+            }
+            
+            # Извлекаем параметры из строки (если есть колонка Параметры)
+            params_dict = {}
+            if "Параметры" in row and pd.notna(row["Параметры"]):
+                params_str = str(row["Параметры"])
+                for param_pair in params_str.split(", "):
+                    if ":" in param_pair:
+                        param_name, param_value = param_pair.split(":", 1)
+                        param_name = param_name.strip()
+                        param_value = param_value.strip()
+                        if param_name and param_value:
+                            params_dict[param_name] = param_value
+            
+            # Также проверяем отдельные колонки параметров (но исключаем служебные)
+            # Используем ту же логику фильтрации, что и в auto_build_params_from_table
+            standard_cols = {
+                "Артикул", "URL", "Статус", "Параметры", "Выручка", "Заказы", 
+                "Средняя цена", "Позиция в выдаче", "Дата создания", "Упущенная выручка",
+                "Изображение", "Ссылка", "Выкупы", "Продажи", "Средняя цена без СПП",
+                "Цена (с СПП)", "Прибыль", "Стоимость за 1000 показов", "Бренд", "Поставщик",
+                "Предмет", "Название", "Буст на позицию", "Буст с позиции", "Дельта", "Тип рекламы",
+                "Остаток", "Остатки", "Остатки на конец периода", "Остаток на конец периода",
+                "Дней в наличии", "Дней в продаже", "Дни в наличии", "Дни в продаже",
+                "Базовая цена", "Базовая цена, ₽", "Дата", "Дата начала", "Дата конца", "Период", "Конец периода",
+                "Stock", "Stock Days", "Days in Stock", "Days Available",
+                "Реализация", "Реализация, шт", "Возврат", "Возврат, шт",
+                "Выкуп, %", "Процент выкупа", "Выкуп процент", "Выкуп",
+                "Оборачиваемость", "Оборачиваемость, раз", "Оборачиваемость (раз)",
+                "Рейтинг", "Отзывы", "Вопросы", "Рейтинг товара",
+                "Конверсия", "Конверсия, %", "Процент конверсии",
+                "Показы", "Клики", "CTR", "CPC", "CPA", "ROAS",
+                "Расход", "Расходы", "Бюджет", "Бюджет рекламы",
+                "Продано", "Продано, шт", "Заказано", "Заказано, шт",
+                "Начало периода", "Конец периода", "Период расчета",
+                "Расчет заказа", "Рекомендуемый заказ", "Оптимальный заказ"
+            }
+            
+            exclude_keywords = [
+                "остат", "остатки", "остаток",
+                "дней", "дни", "день",
+                "период", "периода", "периоды",
+                "конец", "начало", "дата",
+                "цена", "цена,", "стоимость", "прибыль", "выручка", "расход",
+                "расчет", "рекоменд", "оптимальн",
+                "реализац", "возврат", "выкуп",
+                "оборачиваемость", "конверсия",
+                "рейтинг", "отзыв", "вопрос",
+                "показ", "клик", "ctr", "cpc", "cpa", "roas",
+                "продано", "заказано", "заказ,", "продаж",
+                "stock", "days", "period", "price", "revenue", "profit"
+            ]
+            
+            def is_service_column(col_name):
+                """Проверяет, является ли колонка служебной (данные, а не параметр)"""
+                col_lower = str(col_name).lower()
+                for keyword in exclude_keywords:
+                    if keyword in col_lower:
+                        return True
+                return False
+            
+            param_cols = [
+                col for col in df.columns 
+                if col not in standard_cols 
+                and not is_service_column(col)
+                and is_valid_param_name(col)
+            ]
+            
+            for param_name in param_cols:
+                param_value = row.get(param_name)
+                if pd.notna(param_value) and str(param_value).strip():
+                    params_dict[param_name] = str(param_value).strip()
+            
+            # Применяем параметры к param_values
+            if params_dict:
+                # Загружаем список удаленных параметров
+                if "deleted_params" not in st.session_state:
+                    st.session_state["deleted_params"] = load_deleted_params_from_file()
+                
+                deleted_params = st.session_state.get("deleted_params", set())
+                
+                for param_name, param_value in params_dict.items():
+                    # Пропускаем невалидные параметры
+                    if not is_valid_param_name(param_name):
+                        continue
+                    
+                    # Пропускаем удаленные параметры
+                    if param_name in deleted_params:
+                        continue
+                    
+                    # Сохраняем параметр
+                    save_param_value(sku, param_name, str(param_value), save_history=True)
+                    
+                    # Обновляем param_options
+                    if param_name not in st.session_state["param_options"]:
+                        st.session_state["param_options"][param_name] = []
+                    if param_value and str(param_value) not in st.session_state["param_options"][param_name]:
+                        st.session_state["param_options"][param_name].append(str(param_value))
+                    
+                    applied_count += 1
+            
+            # Добавляем параметры в результат
+            result_row.update(params_dict)
+            results.append(result_row)
+        
+        # Сохраняем результаты в session_state
+        if "mass_analysis_results" not in st.session_state:
+            st.session_state["mass_analysis_results"] = []
+        
+        # Объединяем с существующими результатами (обновляем по артикулу)
+        existing_results = {str(r.get("Артикул", "")).replace(".0", ""): r for r in st.session_state["mass_analysis_results"]}
+        for result in results:
+            sku = str(result.get("Артикул", "")).replace(".0", "")
+            existing_results[sku] = result
+        
+        st.session_state["mass_analysis_results"] = list(existing_results.values())
+        
+        # Сохраняем результаты и параметры в файлы
+        save_mass_analysis_results(st.session_state["mass_analysis_results"])
+        save_param_values_to_file()
+        
+        return len(results), applied_count
+    except Exception as e:
+        st.error(f"Ошибка импорта из CSV: {e}")
+        return 0, 0
+
+
+def export_product_params_to_csv():
+    """Экспортирует параметры товаров в CSV файл для редактирования"""
+    try:
+        # Получаем данные
+        df = st.session_state.get("df")
+        if df is None:
+            df = st.session_state.get("display_df")
+        
+        if df is None or "Артикул" not in df.columns:
+            return None
+        
+        param_values = get_param_values()
+        if not param_values:
+            return None
+        
+        # Создаем DataFrame с артикулами
+        export_data = []
+        all_skus = df["Артикул"].dropna().unique()
+        
+        for sku in all_skus:
+            sku_str = str(sku).replace(".0", "")
+            row = {"Артикул": sku_str}
+            
+            # Добавляем все параметры
+            for param_name, param_dict in param_values.items():
+                value = param_dict.get(sku_str, "")
+                row[param_name] = value if value else ""
+            
+            export_data.append(row)
+        
+        export_df = pd.DataFrame(export_data)
+        
+        # Сортируем колонки: сначала Артикул, потом параметры по алфавиту
+        param_cols = sorted([col for col in export_df.columns if col != "Артикул"])
+        column_order = ["Артикул"] + param_cols
+        export_df = export_df[column_order]
+        
+        csv_data = export_df.to_csv(index=False, encoding='utf-8-sig')
+        return csv_data
+    except Exception as e:
+        st.error(f"Ошибка экспорта параметров в CSV: {e}")
+        return None
+
+
+def import_product_params_from_csv(csv_data: str):
+    """Импортирует параметры товаров из CSV файла и применяет их"""
+    try:
+        import io
+        df = pd.read_csv(io.StringIO(csv_data), encoding='utf-8-sig')
+        
+        if "Артикул" not in df.columns:
+            return 0, 0
+        
+        # Инициализируем param_values если нет
+        if "param_values" not in st.session_state:
+            st.session_state["param_values"] = {}
+        if "param_options" not in st.session_state:
+            st.session_state["param_options"] = {}
+        
+        param_values = st.session_state["param_values"]
+        param_options = st.session_state["param_options"]
+        
+        imported_count = 0
+        updated_count = 0
+        
+        # Получаем список колонок параметров (все кроме Артикул)
+        param_columns = [col for col in df.columns if col != "Артикул"]
+        
+        for _, row in df.iterrows():
+            sku_raw = row.get("Артикул", "")
+            if pd.isna(sku_raw) or not sku_raw:
+                continue
+            
+            sku = str(int(sku_raw)) if isinstance(sku_raw, (int, float)) else str(sku_raw).replace(".0", "")
+            imported_count += 1
+            
+            # Обновляем параметры для этого артикула
+            for param_name in param_columns:
+                value = row.get(param_name, "")
+                
+                # Пропускаем пустые значения
+                if pd.isna(value) or (isinstance(value, str) and not value.strip()):
+                    continue
+                
+                value_str = str(value).strip()
+                
+                # Инициализируем параметр если его нет
+                if param_name not in param_values:
+                    param_values[param_name] = {}
+                
+                # Обновляем значение
+                old_value = param_values[param_name].get(sku, "")
+                param_values[param_name][sku] = value_str
+                
+                # Добавляем значение в param_options если его там нет
+                if param_name not in param_options:
+                    param_options[param_name] = []
+                
+                if value_str and value_str not in param_options[param_name]:
+                    param_options[param_name].append(value_str)
+                
+                # Считаем обновления
+                if old_value != value_str:
+                    updated_count += 1
+        
+        # Сохраняем обновленные данные
+        st.session_state["param_values"] = param_values
+        st.session_state["param_options"] = param_options
+        mark_params_dirty()
+        
+        return imported_count, updated_count
+    except Exception as e:
+        st.error(f"Ошибка импорта параметров из CSV: {e}")
+        return 0, 0
+
+
+def apply_mass_analysis_results_to_params(results: list):
+    """Автоматически применяет параметры из результатов массового анализа к param_values"""
+    try:
+        applied_count = 0
+        
+        if "param_values" not in st.session_state:
+            st.session_state["param_values"] = {}
+        if "param_options" not in st.session_state:
+            st.session_state["param_options"] = {}
+        
+        for result in results:
+            # Пропускаем неуспешные результаты
+            status = result.get("Статус", "")
+            if not status.startswith("✅"):
+                continue
+            
+            sku_raw = result.get("Артикул", "")
+            if not sku_raw:
+                continue
+            
+            sku = str(int(sku_raw)) if isinstance(sku_raw, (int, float)) else str(sku_raw).replace(".0", "")
+            
+            # Извлекаем параметры из результата
+            params_dict = {}
+            
+            # Получаем параметры из колонки "Параметры" если есть
+            if "Параметры" in result and result["Параметры"]:
+                params_str = str(result["Параметры"])
+                for param_pair in params_str.split(", "):
+                    if ":" in param_pair:
+                        param_name, param_value = param_pair.split(":", 1)
+                        param_name = param_name.strip()
+                        param_value = param_value.strip()
+                        if param_name and param_value:
+                            params_dict[param_name] = param_value
+            
+            # Также берем параметры из всех ключей результата (кроме служебных)
+            excluded_keys = ["Артикул", "URL", "Статус", "Параметры"]
+            for key, value in result.items():
+                if key not in excluded_keys and value and str(value).strip():
+                    params_dict[key] = str(value).strip()
+            
+            # Применяем параметры
+            if params_dict:
+                # Загружаем список удаленных параметров
+                if "deleted_params" not in st.session_state:
+                    st.session_state["deleted_params"] = load_deleted_params_from_file()
+                
+                deleted_params = st.session_state.get("deleted_params", set())
+                
+                for param_name, param_value in params_dict.items():
+                    # Пропускаем невалидные параметры
+                    if not is_valid_param_name(param_name):
+                        continue
+                    
+                    # Пропускаем удаленные параметры
+                    if param_name in deleted_params:
+                        continue
+                    
+                    # Сохраняем параметр с историей
+                    save_param_value(sku, param_name, str(param_value), save_history=True)
+                    
+                    # Обновляем param_options
+                    if param_name not in st.session_state["param_options"]:
+                        st.session_state["param_options"][param_name] = []
+                    if param_value and str(param_value) not in st.session_state["param_options"][param_name]:
+                        st.session_state["param_options"][param_name].append(str(param_value))
+                    
+                    applied_count += 1
+        
+        # Значения уже в журнале, новые варианты — нет
+        if applied_count:
+            mark_params_dirty()
+        return applied_count
+    except Exception as e:
+        st.error(f"Ошибка применения параметров: {e}")
+        return 0
+
+
+@perf_timed()
+def save_param_values_to_file():
+    """Сохраняет параметры в файл, привязанные к текущему файлу/проекту"""
+    param_values = get_param_values()
+    current_file = st.session_state.get("cached_file_name", None)
+    
+    # ВАЖНО: deleted_params берутся ТОЛЬКО из session_state текущего проекта,
+    # а не из глобального файла. Это обеспечивает изоляцию между проектами.
+    deleted_params = st.session_state.get("deleted_params", set())
+    
+    # Если deleted_params не установлены, инициализируем пустым set
+    if not isinstance(deleted_params, set):
+        deleted_params = set(deleted_params) if deleted_params else set()
+        st.session_state["deleted_params"] = deleted_params
+    
+    # Удаляем удаленные параметры из param_values перед сохранением
+    if deleted_params:
+        param_values = {k: v for k, v in param_values.items() if k not in deleted_params}
+    
+    # Получаем param_options для сохранения
+    param_options = st.session_state.get("param_options", {})
+    # Также удаляем удаленные параметры из param_options
+    if deleted_params:
+        param_options = {k: v for k, v in param_options.items() if k not in deleted_params}
+    
+    if param_values and current_file:
+        try:
+            # Сохраняем параметры с информацией о файле, включая param_options и deleted_params
+            param_data = {
+                "file_name": current_file,
+                "param_values": param_values,
+                "param_options": param_options,  # Добавляем варианты параметров
+                "deleted_params": list(deleted_params) if deleted_params else [],  # Сохраняем удаленные параметры
+                "timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
+            }
+            
+            # Полный снимок по стабильному ключу проекта; журнал правок при этом очищается
+            param_file = write_param_snapshot(current_file, param_data)
+            st.session_state["params_dirty"] = False
+            
+            # Также сохраняем в общий реестр файлов
+            update_file_params_registry(current_file, param_file)
+            return True
+        except Exception as e:
+            st.error(f"Ошибка сохранения параметров: {e}")
+            return False
+    elif param_values and not current_file:
+        # Fallback для случаев, когда нет текущего файла
+        try:
+            # Сохраняем и param_values, и param_options в глобальный файл
+            global_data = {
+                "param_values": param_values,
+                "param_options": param_options
+            }
+            with open("param_values_global.json", "w", encoding="utf-8") as f:
+                json.dump(global_data, f, ensure_ascii=False, indent=2)
+            return True
+        except Exception:
+            return False
+    elif param_options and not param_values:
+        # Сохраняем только param_options, если нет param_values
+        try:
+            if current_file:
+                param_data = {
+                    "file_name": current_file,
+                    "param_values": {},
+                    "param_options": param_options,
+                    "timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
+                }
+                param_file = write_param_snapshot(current_file, param_data)
+                st.session_state["params_dirty"] = False
+                update_file_params_registry(current_file, param_file)
+                return True
+            else:
+                global_data = {"param_values": {}, "param_options": param_options}
+                with open("param_values_global.json", "w", encoding="utf-8") as f:
+                    json.dump(global_data, f, ensure_ascii=False, indent=2)
+            return True
+        except Exception:
+            return False
+    return False
+
+
+def update_file_params_registry(file_name, param_file):
+    """Обновляет реестр файлов и их параметров"""
+    try:
+        registry_file = "file_params_registry.json"
+        registry = {}
+        
+        if os.path.exists(registry_file):
+            with open(registry_file, "r", encoding="utf-8") as f:
+                registry = json.load(f)
+        
+        registry[file_name] = {
+            "param_file": param_file,
+            "last_updated": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        
+        with open(registry_file, "w", encoding="utf-8") as f:
+            json.dump(registry, f, ensure_ascii=False, indent=2)
+            
+    except Exception as e:
+        st.error(f"Ошибка обновления реестра: {e}")
+
+
+@perf_timed()
+def save_deleted_params_to_file():
+    """
+    Сохраняет список удаленных параметров только для текущего проекта/файла.
+    НЕ сохраняет в глобальный файл, чтобы не затрагивать другие проекты.
+    Удаленные параметры сохраняются только в файл параметров текущего проекта.
+    """
+    try:
+        # Получаем текущие удаленные параметры из session_state
+        current_deleted = st.session_state.get("deleted_params", set())
+        
+        # Убеждаемся, что это set
+        if not isinstance(current_deleted, set):
+            current_deleted = set(current_deleted) if current_deleted else set()
+            st.session_state["deleted_params"] = current_deleted
+        
+        # ВАЖНО: Не сохраняем в глобальный файл deleted_params.json,
+        # чтобы не затрагивать другие проекты. Удаленные параметры
+        # сохраняются только вместе с проектом через save_full_project()
+        # или в файл параметров текущего проекта через save_param_values_to_file()
+        
+        # Очищаем только файлы параметров ТЕКУЩЕГО проекта от удаленных параметров
+        current_file = st.session_state.get("cached_file_name", None)
+        if current_deleted and current_file:
+            # Очищаем только файл параметров текущего проекта
+            try:
+                param_file = resolve_param_values_file(current_file)
+                
+                if param_file and os.path.exists(param_file):
+                    with open(param_file, "r", encoding="utf-8") as f:
+                        param_data = json.load(f)
+                    
+                    if isinstance(param_data, dict) and "param_values" in param_data:
+                        # Удаляем удаленные параметры только из текущего файла проекта
+                        cleaned_params = {k: v for k, v in param_data.get("param_values", {}).items() if k not in current_deleted}
+                        cleaned_options = {k: v for k, v in param_data.get("param_options", {}).items() if k not in current_deleted}
+                        
+                        param_data["param_values"] = cleaned_params
+                        param_data["param_options"] = cleaned_options
+                        # Сохраняем deleted_params в файл проекта
+                        param_data["deleted_params"] = list(current_deleted)
+                        
+                        # Журнал не очищаем: правки других параметров в нём остаются
+                        write_param_snapshot(current_file, param_data, keep_journal=True)
+            except Exception as e:
+                # Не критично, продолжаем
+                pass
+        
+        return True
+    except Exception as e:
+        import traceback
+        if hasattr(st, 'error'):
+            st.error(f"Ошибка сохранения deleted_params: {e}\n{traceback.format_exc()}")
+        else:
+            print(f"Ошибка сохранения deleted_params: {e}\n{traceback.format_exc()}")
+        return False
+
+
+def clean_deleted_params_from_all_files(deleted_params: set):
+    """Удаляет удаленные параметры из всех файлов параметров"""
+    if not deleted_params:
+        return
+    
+    import glob
+    
+    # Очищаем все файлы param_values*.json (включая param_values.json без подчеркивания)
+    param_files = glob.glob("param_values*.json")
+    cleaned_count = 0
+    for param_file in param_files:
+        try:
+            with open(param_file, "r", encoding="utf-8") as f:
+                param_data = json.load(f)
+            
+            # Поддерживаем оба формата: новый (с file_name) и старый (прямой словарь)
+            if isinstance(param_data, dict) and "param_values" in param_data:
+                # Новый формат
+                file_params = param_data.get("param_values", {})
+                file_options = param_data.get("param_options", {})
+                
+                # Удаляем удаленные параметры
+                cleaned_params = {k: v for k, v in file_params.items() if k not in deleted_params}
+                cleaned_options = {k: v for k, v in file_options.items() if k not in deleted_params}
+                
+                # Обновляем данные
+                param_data["param_values"] = cleaned_params
+                param_data["param_options"] = cleaned_options
+                
+                # Проверяем, были ли изменения
+                if cleaned_params != file_params or cleaned_options != file_options:
+                    # Сохраняем обратно
+                    with open(param_file, "w", encoding="utf-8") as f:
+                        json.dump(param_data, f, ensure_ascii=False, indent=2)
+                    cleaned_count += 1
+            else:
+                # Старый формат - прямой словарь
+                if isinstance(param_data, dict):
+                    cleaned_params = {k: v for k, v in param_data.items() if k not in deleted_params}
+                    if cleaned_params != param_data:
+                        with open(param_file, "w", encoding="utf-8") as f:
+                            json.dump(cleaned_params, f, ensure_ascii=False, indent=2)
+                        cleaned_count += 1
+        except Exception as e:
+            # Пропускаем файлы с ошибками, но не прерываем процесс
+            continue
+    
+    # Очищаем глобальный файл
+    if os.path.exists("param_values_global.json"):
+        try:
+            with open("param_values_global.json", "r", encoding="utf-8") as f:
+                global_data = json.load(f)
+            
+            # Поддерживаем оба формата
+            if isinstance(global_data, dict) and "param_values" in global_data:
+                original_params = global_data.get("param_values", {})
+                original_options = global_data.get("param_options", {})
+                
+                cleaned_params = {k: v for k, v in original_params.items() if k not in deleted_params}
+                cleaned_options = {k: v for k, v in original_options.items() if k not in deleted_params}
+                
+                if cleaned_params != original_params or cleaned_options != original_options:
+                    global_data["param_values"] = cleaned_params
+                    global_data["param_options"] = cleaned_options
+                    with open("param_values_global.json", "w", encoding="utf-8") as f:
+                        json.dump(global_data, f, ensure_ascii=False, indent=2)
+                    cleaned_count += 1
+            else:
+                # Старый формат
+                if isinstance(global_data, dict):
+                    cleaned_global = {k: v for k, v in global_data.items() if k not in deleted_params}
+                    if cleaned_global != global_data:
+                        with open("param_values_global.json", "w", encoding="utf-8") as f:
+                            json.dump(cleaned_global, f, ensure_ascii=False, indent=2)
+                        cleaned_count += 1
+        except Exception:
+            pass
+    
+    # Очищаем table_cache.json
+    if os.path.exists("table_cache.json"):
+        try:
+            with open("table_cache.json", "r", encoding="utf-8") as f:
+                table_cache_data = json.load(f)
+            
+            if isinstance(table_cache_data, dict):
+                changed = False
+                # Очищаем param_values
+                if "param_values" in table_cache_data:
+                    original = table_cache_data["param_values"]
+                    table_cache_data["param_values"] = {
+                        k: v for k, v in original.items() 
+                        if k not in deleted_params
+                    }
+                    if table_cache_data["param_values"] != original:
+                        changed = True
+                
+                # Очищаем param_options
+                if "param_options" in table_cache_data:
+                    original = table_cache_data["param_options"]
+                    table_cache_data["param_options"] = {
+                        k: v for k, v in original.items() 
+                        if k not in deleted_params
+                    }
+                    if table_cache_data["param_options"] != original:
+                        changed = True
+                
+                if changed:
+                    with open("table_cache.json", "w", encoding="utf-8") as f:
+                        json.dump(table_cache_data, f, ensure_ascii=False, indent=2)
+                    cleaned_count += 1
+        except Exception:
+            pass
+    
+    # Возвращаем количество очищенных файлов
+    return cleaned_count
+    
+    # Возвращаем количество очищенных файлов
+    return cleaned_count
+    
+    # Очищаем глобальный файл
+    if os.path.exists("param_values_global.json"):
+        try:
+            with open("param_values_global.json", "r", encoding="utf-8") as f:
+                global_data = json.load(f)
+            
+            # Поддерживаем оба формата
+            if isinstance(global_data, dict) and "param_values" in global_data:
+                cleaned_params = {k: v for k, v in global_data.get("param_values", {}).items() if k not in deleted_params}
+                cleaned_options = {k: v for k, v in global_data.get("param_options", {}).items() if k not in deleted_params}
+                global_data["param_values"] = cleaned_params
+                global_data["param_options"] = cleaned_options
+            else:
+                # Старый формат
+                global_data = {k: v for k, v in global_data.items() if k not in deleted_params} if isinstance(global_data, dict) else {}
+            
+            with open("param_values_global.json", "w", encoding="utf-8") as f:
+                json.dump(global_data, f, ensure_ascii=False, indent=2)
+        except Exception:
+            pass
+    
+    # Очищаем table_cache.json
+    if os.path.exists("table_cache.json"):
+        try:
+            with open("table_cache.json", "r", encoding="utf-8") as f:
+                table_cache_data = json.load(f)
+            
+            if isinstance(table_cache_data, dict):
+                # Очищаем param_values
+                if "param_values" in table_cache_data:
+                    table_cache_data["param_values"] = {
+                        k: v for k, v in table_cache_data["param_values"].items() 
+                        if k not in deleted_params
+                    }
+                
+                # Очищаем param_options
+                if "param_options" in table_cache_data:
+                    table_cache_data["param_options"] = {
+                        k: v for k, v in table_cache_data["param_options"].items() 
+                        if k not in deleted_params
+                    }
+                
+                # Сохраняем обратно
+                with open("table_cache.json", "w", encoding="utf-8") as f:
+                    json.dump(table_cache_data, f, ensure_ascii=False, indent=2)
+        except Exception:
+            pass
+
+
+@perf_timed()
+def load_deleted_params_from_file():
+    """Загружает список удаленных параметров из файла"""
+    try:
+        if os.path.exists("deleted_params.json"):
+            deleted_params_list = read_json_snapshot("deleted_params.json")
+            # Конвертируем list обратно в set
+            return set(deleted_params_list) if isinstance(deleted_params_list, list) else set()
+    except Exception:
+        pass
+    return set()
+
+
+@perf_timed()
+def load_param_values_from_file():
+    """
+    Загружает параметры ТОЛЬКО для текущего проекта/файла.
+    НЕ объединяет параметры из всех файлов, чтобы не смешивать проекты.
+    """
+    import glob
+    
+    # ВАЖНО: deleted_params берутся ТОЛЬКО из session_state текущего проекта
+    deleted_params = st.session_state.get("deleted_params", set())
+    if not isinstance(deleted_params, set):
+        deleted_params = set(deleted_params) if deleted_params else set()
+        st.session_state["deleted_params"] = deleted_params
+    
+    all_param_values = {}
+    all_param_options = {}
+    
+    # КРИТИЧЕСКИ ВАЖНО: Загружаем параметры ТОЛЬКО для текущего файла/проекта
+    # НЕ загружаем из всех файлов, чтобы не смешивать проекты!
+    current_file = st.session_state.get("cached_file_name", None)
+    
+    # Если есть текущий файл, загружаем параметры только для него
+    if current_file:
+        try:
+            # Снимок проекта по стабильному ключу + хвост журнала правок
+            param_file, param_data = load_param_data(current_file)
+            if param_file and param_data is not None:
+                # Может быть общим снимком процесса: значения ниже копируются в новые словари
+                file_params = param_data.get("param_values", {}) if isinstance(param_data, dict) else {}
+                file_options = param_data.get("param_options", {}) if isinstance(param_data, dict) else {}
+                
+                # Загружаем deleted_params из файла проекта, если они там есть
+                file_deleted_params = param_data.get("deleted_params", [])
+                if file_deleted_params:
+                    # Объединяем с существующими deleted_params
+                    if not isinstance(deleted_params, set):
+                        deleted_params = set(deleted_params) if deleted_params else set()
+                    deleted_params.update(file_deleted_params)
+                    st.session_state["deleted_params"] = deleted_params
+                
+                # Загружаем параметры только из файла текущего проекта
+                for param_name, sku_values in file_params.items():
+                    # Пропускаем удаленные параметры
+                    if param_name in deleted_params:
+                        continue
+                        
+                    if param_name and isinstance(sku_values, dict):
+                        if param_name not in all_param_values:
+                            all_param_values[param_name] = {}
+                        all_param_values[param_name].update(sku_values)
+                        
+                        # Загружаем варианты из file_options
+                        if param_name in file_options and isinstance(file_options[param_name], list):
+                            all_param_options[param_name] = list(file_options[param_name])
+                        else:
+                            if param_name not in all_param_options:
+                                all_param_options[param_name] = []
+                            for value in sku_values.values():
+                                if value and str(value) not in all_param_options[param_name]:
+                                    all_param_options[param_name].append(str(value))
+        except Exception:
+            pass
+    else:
+        # Если нет текущего файла, загружаем из всех файлов (для обратной совместимости)
+        # Но это должно происходить только если проект не загружен
+        if not st.session_state.get("current_project_id", None):
+            # Загружаем параметры из всех файлов param_values_*.json (только для обратной совместимости)
+            param_files = glob.glob("param_values*.json")
+            
+            for param_file in param_files:
+                try:
+                    with open(param_file, "r", encoding="utf-8") as f:
+                        param_data = json.load(f)
+                        
+                    # Поддерживаем оба формата: новый (с file_name) и старый (прямой словарь)
+                    if isinstance(param_data, dict) and "param_values" in param_data:
+                        # Новый формат
+                        file_params = param_data.get("param_values", {})
+                        file_options = param_data.get("param_options", {})
+                    else:
+                        # Старый формат
+                        file_params = param_data if isinstance(param_data, dict) else {}
+                        file_options = {}
+                    
+                    # Объединяем параметры из всех файлов (пропускаем удаленные)
+                    for param_name, sku_values in file_params.items():
+                        # Пропускаем удаленные параметры
+                        if param_name in deleted_params:
+                            continue
+                            
+                        if param_name and isinstance(sku_values, dict):
+                            if param_name not in all_param_values:
+                                all_param_values[param_name] = {}
+                            all_param_values[param_name].update(sku_values)
+                            
+                            # Загружаем варианты из file_options если есть
+                            if param_name in file_options and isinstance(file_options[param_name], list):
+                                if param_name not in all_param_options:
+                                    all_param_options[param_name] = []
+                                for option in file_options[param_name]:
+                                    if option and str(option) not in all_param_options[param_name]:
+                                        all_param_options[param_name].append(str(option))
+                            else:
+                                if param_name not in all_param_options:
+                                    all_param_options[param_name] = []
+                                for value in sku_values.values():
+                                    if value and str(value) not in all_param_options[param_name]:
+                                        all_param_options[param_name].append(str(value))
+                except Exception as e:
+                    continue
+    
+            # Также проверяем глобальный файл (только если проект не загружен)
+    if os.path.exists("param_values_global.json"):
+        try:
+            with open("param_values_global.json", "r", encoding="utf-8") as f:
+                global_data = json.load(f)
+                if isinstance(global_data, dict) and "param_values" in global_data:
+                    global_params = global_data.get("param_values", {})
+                    global_options = global_data.get("param_options", {})
+                else:
+                    global_params = global_data if isinstance(global_data, dict) else {}
+                    global_options = {}
+                
+                if isinstance(global_params, dict):
+                    for param_name, sku_values in global_params.items():
+                        if param_name in deleted_params:
+                            continue
+                        if param_name and isinstance(sku_values, dict):
+                            if param_name not in all_param_values:
+                                all_param_values[param_name] = {}
+                            all_param_values[param_name].update(sku_values)
+                            
+                            if param_name in global_options and isinstance(global_options[param_name], list):
+                                if param_name not in all_param_options:
+                                    all_param_options[param_name] = []
+                                for option in global_options[param_name]:
+                                    if option and str(option) not in all_param_options[param_name]:
+                                        all_param_options[param_name].append(str(option))
+                            else:
+                                if param_name not in all_param_options:
+                                    all_param_options[param_name] = []
+                                for value in sku_values.values():
+                                    if value and str(value) not in all_param_options[param_name]:
+                                        all_param_options[param_name].append(str(value))
+        except Exception:
+            pass
+    
+    # Убеждаемся, что deleted_params установлены (уже должны быть в session_state)
+    # deleted_params уже могли быть загружены из файла проекта выше
+    if "deleted_params" not in st.session_state:
+        # Если проект не загружается, загружаем из файла для обратной совместимости
+        if not st.session_state.get("project_loading", False):
+            st.session_state["deleted_params"] = load_deleted_params_from_file()
+        else:
+            st.session_state["deleted_params"] = set()
+    
+    # Обновляем deleted_params для фильтрации
+    deleted_params = st.session_state.get("deleted_params", set())
+    if not isinstance(deleted_params, set):
+        deleted_params = set(deleted_params) if deleted_params else set()
+        st.session_state["deleted_params"] = deleted_params
+    
+    # Устанавливаем объединенные параметры
+    if all_param_values or all_param_options:
+        if all_param_values:
+            st.session_state["param_values"] = all_param_values
+        if all_param_options:
+            # Объединяем с существующими param_options если есть
+            # НО исключаем удаленные параметры
+            existing_options = st.session_state.get("param_options", {})
+            for param_name, options in all_param_options.items():
+                # Пропускаем удаленные параметры
+                if param_name in deleted_params:
+                    continue
+                if param_name not in existing_options:
+                    existing_options[param_name] = options
+                else:
+                    # Объединяем варианты, сохраняя порядок из файла
+                    combined = list(existing_options[param_name])
+                    for option in options:
+                        if option and str(option) not in combined:
+                            combined.append(str(option))
+                    existing_options[param_name] = combined
+            st.session_state["param_options"] = existing_options
+        # Создаем param_options из значений только если их еще нет в файлах
+        # Но сначала удаляем удаленные параметры из param_values в session_state
+        if deleted_params and "param_values" in st.session_state:
+            params_to_remove = [p for p in st.session_state["param_values"].keys() if p in deleted_params]
+            for param_name in params_to_remove:
+                del st.session_state["param_values"][param_name]
+        
+        if not all_param_options:
+            create_param_options_from_values()
+        return True
+    else:
+        st.session_state["param_values"] = {}
+        st.session_state["param_options"] = {}
+        return False
+
+
+def create_param_options_from_values():
+    """Создает param_options на основе загруженных данных"""
+    if "param_options" not in st.session_state:
+        st.session_state["param_options"] = {}
+    
+    # Получаем список удаленных параметров
+    deleted_params = st.session_state.get("deleted_params", load_deleted_params_from_file())
+    if deleted_params:
+        st.session_state["deleted_params"] = deleted_params
+        # Убеждаемся, что это set
+        if not isinstance(deleted_params, set):
+            deleted_params = set(deleted_params)
+            st.session_state["deleted_params"] = deleted_params
+    
+    # Получаем param_values через функцию, которая фильтрует удаленные параметры
+    param_values = get_param_values()
+    
+    # Дополнительная проверка - удаляем удаленные параметры еще раз на всякий случай
+    if deleted_params:
+        params_to_remove = [p for p in param_values.keys() if p in deleted_params]
+        for param_name in params_to_remove:
+            if param_name in param_values:
+                del param_values[param_name]
+        if params_to_remove:
+            st.session_state["param_values"] = param_values
+    for param_name, param_data in param_values.items():
+        # Пропускаем невалидные параметры (артикулы и т.д.)
+        if not is_valid_param_name(param_name):
+            continue
+        
+        # Пропускаем удаленные параметры
+        if param_name in deleted_params:
+            continue
+        
+        # Собираем все уникальные значения для каждого параметра
+        unique_values = list(set([v for v in param_data.values() if v and v.strip()]))
+        if unique_values:
+            # Если параметр уже есть в param_options, объединяем значения
+            if param_name in st.session_state["param_options"]:
+                existing_values = st.session_state["param_options"][param_name]
+                combined_values = list(set(existing_values + unique_values))
+                st.session_state["param_options"][param_name] = sorted(combined_values)
+            else:
+                st.session_state["param_options"][param_name] = sorted(unique_values)
+        elif param_name == "Крой":
+            # Для параметра "Крой" добавляем стандартные варианты, если нет данных
+            st.session_state["param_options"][param_name] = ["Классический", "Приталенный", "Свободный", "Оверсайз"]
+        else:
+            # Если параметр есть в param_values, но нет вариантов, добавляем его в param_options с пустым списком
+            if param_name not in st.session_state["param_options"]:
+                st.session_state["param_options"][param_name] = []
+    mark_params_dirty()
+
+
+@perf_timed()
+def save_main_page_data_to_file():
+    """Сохраняет данные главной страницы в файл, привязанные к текущему файлу"""
+    current_file = st.session_state.get("cached_file_name", None)
+    
+    try:
+        main_page_data = {
+            "search": st.session_state.get("search", ""),
+            "spp": st.session_state.get("spp", 25),
+            "buyout_pct": st.session_state.get("buyout_pct", 25),
+            "revenue_min": st.session_state.get("revenue_min", 0),
+            "revenue_max": st.session_state.get("revenue_max", 1000000),
+            "price_min": st.session_state.get("price_min", 0),
+            "price_max": st.session_state.get("price_max", 10000),
+            "show_images": st.session_state.get("show_images", False),
+            "sort_column": st.session_state.get("sort_column", "Выручка"),
+            "sort_descending": st.session_state.get("sort_descending", True)
+        }
+        
+        if current_file:
+            # Сохраняем настройки для конкретного файла
+            settings_file = main_page_settings_path(current_file)
+            
+            settings_data = {
+                "file_name": current_file,
+                "settings": main_page_data,
+                "timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
+            }
+            
+            with open(settings_file, "w", encoding="utf-8") as f:
+                json.dump(settings_data, f, ensure_ascii=False, indent=2)
+            
+            # Обновляем реестр настроек файлов
+            update_file_settings_registry(current_file, settings_file)
+        else:
+            # Fallback для случаев, когда нет текущего файла
+            with open("main_page_data_global.json", "w", encoding="utf-8") as f:
+                json.dump(main_page_data, f, ensure_ascii=False, indent=2)
+        
+        return True
+    except Exception as e:
+        st.error(f"Ошибка сохранения настроек: {e}")
+        return False
+
+
+def update_file_settings_registry(file_name, settings_file):
+    """Обновляет реестр файлов и их настроек"""
+    try:
+        registry_file = "file_settings_registry.json"
+        registry = {}
+        
+        if os.path.exists(registry_file):
+            with open(registry_file, "r", encoding="utf-8") as f:
+                registry = json.load(f)
+        
+        registry[file_name] = {
+            "settings_file": settings_file,
+            "last_updated": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        
+        with open(registry_file, "w", encoding="utf-8") as f:
+            json.dump(registry, f, ensure_ascii=False, indent=2)
+            
+    except Exception as e:
+        st.error(f"Ошибка обновления реестра настроек: {e}")
+
+
+@perf_timed()
+def load_main_page_data_from_file():
+    """Загружает данные главной страницы из файла, привязанные к текущему файлу"""
+    current_file = st.session_state.get("cached_file_name", None)
+    
+    if current_file:
+        try:
+            # Файл настроек по стабильному ключу (реестр — только для файлов до миграции)
+            settings_file = resolve_main_page_settings_file(current_file)
+            if settings_file:
+                # Общий снимок процесса (значения скалярные, копировать не нужно)
+                settings_data = read_json_snapshot(settings_file, {})
+                data = settings_data.get("settings", {})
+                
+                # Загружаем данные в session_state
+                st.session_state["search"] = data.get("search", "")
+                st.session_state["spp"] = data.get("spp", 25)
+                st.session_state["buyout_pct"] = data.get("buyout_pct", 25)
+                st.session_state["revenue_min"] = data.get("revenue_min", 0)
+                st.session_state["revenue_max"] = data.get("revenue_max", 1000000)
+                st.session_state["price_min"] = data.get("price_min", 0)
+                st.session_state["price_max"] = data.get("price_max", 10000)
+                st.session_state["show_images"] = data.get("show_images", False)
+                st.session_state["sort_column"] = data.get("sort_column", "Выручка")
+                st.session_state["sort_descending"] = data.get("sort_descending", True)
+                return True
+            
+            # Если настройки для файла не найдены, инициализируем значения по умолчанию
+            st.session_state["search"] = ""
+            st.session_state["spp"] = 25
+            st.session_state["buyout_pct"] = 25
+            st.session_state["revenue_min"] = 0
+            st.session_state["revenue_max"] = 1000000
+            st.session_state["price_min"] = 0
+            st.session_state["price_max"] = 10000
+            st.session_state["show_images"] = False
+            st.session_state["sort_column"] = "Выручка"
+            st.session_state["sort_descending"] = True
+            return True
+            
+        except Exception as e:
+            st.error(f"Ошибка загрузки настроек: {e}")
+            return False
+    else:
+        # Fallback для случаев, когда нет текущего файла
+        try:
+            if os.path.exists("main_page_data_global.json"):
+                with open("main_page_data_global.json", "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                    
+                    # Загружаем данные в session_state
+                    st.session_state["search"] = data.get("search", "")
+                    st.session_state["spp"] = data.get("spp", 25)
+                    st.session_state["buyout_pct"] = data.get("buyout_pct", 25)
+                    st.session_state["revenue_min"] = data.get("revenue_min", 0)
+                    st.session_state["revenue_max"] = data.get("revenue_max", 1000000)
+                    st.session_state["price_min"] = data.get("price_min", 0)
+                    st.session_state["price_max"] = data.get("price_max", 10000)
+                    st.session_state["show_images"] = data.get("show_images", False)
+                    st.session_state["sort_column"] = data.get("sort_column", "Выручка")
+                    st.session_state["sort_descending"] = data.get("sort_descending", True)
+                    return True
+        except Exception:
+            pass
+    return False
+
+
+def get_param_values():
+    """Получает param_values из session_state, исключая удаленные параметры текущего проекта"""
+    if "param_values" not in st.session_state:
+        st.session_state["param_values"] = {}
+    
+    param_values = st.session_state["param_values"]
+    
+    # ВАЖНО: deleted_params берутся ТОЛЬКО из session_state текущего проекта,
+    # а не из глобального файла. Это обеспечивает изоляцию между проектами.
+    deleted_params = st.session_state.get("deleted_params", set())
+    
+    # Если deleted_params не установлены, инициализируем пустым set
+    if not isinstance(deleted_params, set):
+        deleted_params = set(deleted_params) if deleted_params else set()
+        st.session_state["deleted_params"] = deleted_params
+    
+    # Фильтруем удаленные параметры
+    if deleted_params:
+        param_values = {k: v for k, v in param_values.items() if k not in deleted_params}
+    
+    return param_values
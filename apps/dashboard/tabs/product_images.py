@@ -0,0 +1,580 @@
+# -*- coding: utf-8 -*-
+"""
+Фото карточек товаров: скриншоты, кеш изображений и определение параметров
+товара по фото через ИИ
+"""
+import os
+import urllib.parse as _urlparse
+from collections import Counter
+
+import streamlit as st
+
+from utils.wb_utils import build_wb_product_url, extract_sku_from_url
+from utils.image_cache import (
+    _cache_dir, get_url_cache_with_state, get_cached_image_path, ensure_image_cached
+)
+from utils.ai_analysis import analyze_image_with_ai_core
+
+from .common import OPENAI_AVAILABLE
+from .params import get_hierarchy_params, get_subtype_params, get_visual_params
+
+
+def get_url_cache():
+    """Обёртка для совместимости"""
+    return get_url_cache_with_state(st.session_state)
+
+
+def get_cached_images_for_sku(sku: str, max_images: int = 3) -> list:
+    """
+    Получает пути к кешированным изображениям товара по артикулу.
+    Использует уже скачанные изображения из кеша.
+    
+    Args:
+        sku: Артикул товара
+        max_images: Максимальное количество изображений (по умолчанию 3)
+        
+    Returns:
+        Список путей к изображениям
+    """
+    images = []
+    sku_clean = str(sku).replace(".0", "")
+    
+    # Проверяем основное изображение (обычно это первое фото товара)
+    main_image = get_cached_image_path(sku_clean)
+    if main_image and os.path.exists(main_image):
+        images.append(main_image)
+    
+    # Если нужно больше изображений, можно искать дополнительные
+    # (например, с суффиксами _1, _2 и т.д.)
+    if len(images) < max_images:
+        cache_dir = os.path.join(_cache_dir(), "imgs")
+        if os.path.exists(cache_dir):
+            # Ищем дополнительные изображения с суффиксами
+            for suffix in range(1, max_images):
+                for ext in ("jpg", "png", "jpeg", "webp", "JPG", "PNG", "JPEG", "WEBP"):
+                    additional_path = os.path.join(cache_dir, f"{sku_clean}_{suffix}.{ext}")
+                    if os.path.exists(additional_path) and additional_path not in images:
+                        images.append(additional_path)
+                        break
+    
+    return images[:max_images]
+
+
+def analyze_image_with_ai(image_path_or_url: str, api_key: str = None, selected_params: list = None, product_name: str = None, sku: str = None) -> dict:
+    """
+    Анализирует изображение товара через нейросеть (OpenAI Vision API).
+    Обёртка для analyze_image_with_ai_core, которая получает данные из session_state.
+    Работает как с локальными файлами, так и с URL.
+    
+    Args:
+        image_path_or_url: Путь к локальному файлу изображения или URL
+        api_key: API ключ OpenAI (если None, берется из secrets.toml или session_state)
+        selected_params: Список параметров для анализа
+        product_name: Название товара (если доступно)
+        sku: Артикул товара (для получения названия, если product_name не указан)
+        
+    Returns:
+        Словарь с определенными параметрами
+    """
+    if not OPENAI_AVAILABLE:
+        return {}
+    
+    # Получаем API ключ
+    if not api_key:
+        try:
+            api_key = st.secrets.get('openai_api_key', '')
+        except:
+            pass
+        
+        if not api_key:
+            api_key = st.session_state.get('openai_api_key')
+    
+    if not api_key:
+        return {}
+    
+    # Получаем данные из session_state
+    param_options = st.session_state.get("param_options", {})
+    hierarchy_params = get_hierarchy_params()
+    subtype_params = get_subtype_params()
+    visual_params = get_visual_params()
+    debug_mode = st.session_state.get('debug_ai_analysis', False)
+    
+    try:
+        # Вызываем core-функцию
+        result = analyze_image_with_ai_core(
+            image_path_or_url=image_path_or_url,
+            api_key=api_key,
+            param_options=param_options,
+            hierarchy_params=hierarchy_params,
+            subtype_params=subtype_params,
+            visual_params=visual_params,
+            selected_params=selected_params,
+            product_name=product_name,
+            sku=sku,
+            debug_mode=debug_mode
+        )
+        
+        # Показываем предупреждения
+        if result.get("_warning"):
+            st.warning(result["_warning"])
+        
+        # Показываем debug-информацию
+        if debug_mode and result.get("_debug_response"):
+            with st.expander("🔍 Отладочная информация (ответ API)", expanded=False):
+                st.code(result["_debug_response"])
+        
+        return result.get("params", {})
+        
+    except Exception as e:
+        # Логируем ошибку для отладки
+        error_msg = str(e)
+        error_type = type(e).__name__
+        
+        # Проверяем тип ошибки и показываем соответствующее сообщение
+        if "api_key" in error_msg.lower() or "authentication" in error_msg.lower() or "401" in error_msg:
+            st.error(f"❌ Ошибка аутентификации: Проверьте правильность API ключа OpenAI")
+        elif "rate limit" in error_msg.lower() or "quota" in error_msg.lower() or "429" in error_msg:
+            st.error(f"❌ Превышен лимит запросов к API. Попробуйте позже.")
+        elif "invalid" in error_msg.lower() and ("image" in error_msg.lower() or "format" in error_msg.lower()):
+            st.error(f"❌ Не удалось обработать изображение. Проверьте формат файла.")
+        elif "timeout" in error_msg.lower() or "APITimeoutError" in error_type:
+            st.error(f"❌ Превышено время ожидания ответа от API. Попробуйте позже.")
+        elif "connection" in error_msg.lower() or "network" in error_msg.lower():
+            st.error(f"❌ Ошибка подключения к API. Проверьте интернет-соединение.")
+        else:
+            # Для отладки показываем краткую информацию об ошибке
+            st.warning(f"⚠️ Ошибка при анализе изображения: {error_type}")
+            # В режиме отладки можно показать полную ошибку
+            if debug_mode:
+                st.error(f"Детали ошибки: {error_msg[:200]}")
+        
+        return {}
+
+
+def analyze_image_for_params(image_url: str) -> dict:
+    """
+    Анализирует изображение товара и определяет параметры (цвет, стиль и т.д.).
+    Использует нейросеть для анализа (не скачивает изображение).
+    
+    Args:
+        image_url: URL изображения товара
+        
+    Returns:
+        Словарь с определенными параметрами
+    """
+    # Используем нейросеть для анализа
+    return analyze_image_with_ai(image_url)
+
+
+def get_screenshotapi_image_urls(sku: str, token: str = None, max_images: int = 5) -> list:
+    """
+    Генерирует URL-ы для получения изображений товара через screenshotapi.net.
+    
+    Args:
+        sku: Артикул товара
+        token: API токен screenshotapi.net (если None, берется из session_state или secrets)
+        max_images: Максимальное количество изображений (по умолчанию 5)
+        
+    Returns:
+        Список URL-ов изображений
+    """
+    image_urls = []
+    
+    try:
+        # Получаем токен если не передан
+        if not token:
+            try:
+                token = st.secrets.get('screenshotapi_token', '')
+            except:
+                pass
+            
+            if not token:
+                token = st.session_state.get('screenshotapi_token', '')
+        
+        if not token:
+            # Если токена нет, возвращаем пустой список
+            return []
+        
+        # Формируем URL страницы товара
+        product_url = build_wb_product_url(sku, host="https://global.wildberries.ru")
+        encoded_url = _urlparse.quote(product_url, safe="")
+        
+        # Базовый URL для screenshotapi.net
+        base_url = "https://shot.screenshotapi.net/v3/screenshot"
+        
+        # Первое изображение - основное (из главного слайдера)
+        # Увеличиваем timeout и добавляем больше времени на загрузку
+        first_image_url = (
+            f"{base_url}?token={token}"
+            f"&fresh=true"
+            f"&url={encoded_url}"
+            f"&width=1370"
+            f"&height=544"
+            f"&output=image"
+            f"&file_type=png"
+            f"&wait_for_event=load"
+            f"&wait_for=2000"
+            f"&selector_to_click=.mainSlider--JxK8z%20img"
+        )
+        image_urls.append(first_image_url)
+        
+        # Остальные 4 изображения - из вертикального слайдера
+        for i in range(2, min(6, max_images + 1)):  # nth-child от 2 до 5
+            additional_image_url = (
+                f"{base_url}?token={token}"
+                f"&fresh=true"
+                f"&url={encoded_url}"
+                f"&output=image"
+                f"&file_type=png"
+                f"&wait_for_event=load"
+                f"&selector_to_click=.swiper-vertical%20.swiper-slide%3Anth-child({i})%20img"
+            )
+            image_urls.append(additional_image_url)
+        
+    except Exception as e:
+        # В случае ошибки возвращаем пустой список
+        pass
+    
+    return image_urls[:max_images]
+
+
+def has_downloaded_images(sku: str, min_images: int = 1) -> bool:
+    """
+    Проверяет, есть ли у товара скачанные изображения через screenshotapi.
+    
+    Args:
+        sku: Артикул товара
+        min_images: Минимальное количество изображений для считания, что фото есть (по умолчанию 1)
+        
+    Returns:
+        True, если есть хотя бы min_images скачанных изображений
+    """
+    try:
+        sku_clean = str(sku).replace(".0", "")
+        cached_count = 0
+        
+        # Проверяем наличие изображений в кеше (формат: {sku}_screenshotapi_{index})
+        for idx in range(5):  # Проверяем до 5 изображений
+            cache_key = f"{sku_clean}_screenshotapi_{idx}"
+            cached_path = get_cached_image_path(cache_key)
+            if cached_path and os.path.exists(cached_path):
+                cached_count += 1
+                if cached_count >= min_images:
+                    return True
+        
+        return False
+    except Exception:
+        return False
+
+
+def get_screenshotapi_images_with_status(sku: str, token: str = None, max_images: int = 5) -> list:
+    """
+    Получает изображения товара через screenshotapi.net с информацией о статусе (в кеше или скачивается).
+    
+    Args:
+        sku: Артикул товара
+        token: API токен screenshotapi.net (если None, берется из session_state или secrets)
+        max_images: Максимальное количество изображений (по умолчанию 5)
+        
+    Returns:
+        Список словарей с информацией о каждом изображении:
+        [{"index": 1, "path": "...", "status": "cached"|"downloading"|"downloaded"|"error", "url": "..."}, ...]
+    """
+    images_info = []
+    
+    try:
+        # Получаем URL изображений
+        image_urls = get_screenshotapi_image_urls(sku, token=token, max_images=max_images)
+        
+        if not image_urls:
+            return []
+        
+        # Проверяем каждое изображение
+        for idx, img_url in enumerate(image_urls):
+            cache_key = f"{sku}_screenshotapi_{idx}"
+            
+            # Проверяем, есть ли изображение в кеше
+            cached_path = get_cached_image_path(cache_key)
+            if cached_path and os.path.exists(cached_path):
+                images_info.append({
+                    "index": idx + 1,
+                    "path": cached_path,
+                    "status": "cached",
+                    "url": img_url
+                })
+            else:
+                # Изображение нужно скачать
+                images_info.append({
+                    "index": idx + 1,
+                    "path": None,
+                    "status": "downloading",
+                    "url": img_url,
+                    "cache_key": cache_key
+                })
+        
+    except Exception as e:
+        pass
+    
+    return images_info
+
+
+def get_product_params_from_images(url: str, api_key: str = None, max_images: int = 5, selected_params: list = None) -> dict:
+    """
+    Определяет параметры товара по фотографиям через нейросеть.
+    Использует screenshotapi.net для получения изображений товара.
+    Оптимизировано для использования кешированных изображений - не скачивает повторно уже имеющиеся.
+    
+    Args:
+        url: URL товара Wildberries
+        api_key: API ключ OpenAI (если None, берется из session_state)
+        max_images: Максимальное количество изображений для анализа (по умолчанию 5)
+        selected_params: Список параметров для анализа (если None, анализируются все)
+        
+    Returns:
+        Словарь с определенными параметрами
+    """
+    sku = extract_sku_from_url(url)
+    if not sku:
+        return {}
+    
+    all_params = {}
+    
+    try:
+        import time
+        
+        # Получаем API ключ если не передан
+        if not api_key:
+            api_key = st.session_state.get('openai_api_key', '')
+        
+        if not api_key:
+            return {}
+        
+        # Сначала проверяем, какие изображения уже есть в кеше
+        sku_clean = str(sku).replace(".0", "")
+        cached_images = []
+        images_to_download = []  # Список индексов изображений, которые нужно скачать
+        
+        # Проверяем наличие изображений в кеше
+        for idx in range(max_images):
+            cache_key = f"{sku_clean}_screenshotapi_{idx}"
+            cached_path = get_cached_image_path(cache_key)
+            
+            if cached_path and os.path.exists(cached_path):
+                # Изображение уже в кеше - используем его
+                cached_images.append((idx, cached_path))
+            else:
+                # Изображение нужно скачать
+                images_to_download.append(idx)
+        
+        # Если все изображения уже в кеше, используем их без дополнительных запросов
+        if not images_to_download:
+            # Все изображения в кеше - используем их
+            image_paths = [path for _, path in sorted(cached_images)]
+        else:
+            # Нужно скачать некоторые изображения
+            # Получаем URL изображений через screenshotapi.net только для недостающих
+            image_urls = get_screenshotapi_image_urls(sku, max_images=max_images)
+            
+            if not image_urls:
+                # Если не удалось получить URL, используем только кешированные
+                image_paths = [path for _, path in sorted(cached_images)]
+            else:
+                # Скачиваем только недостающие изображения
+                image_paths = [None] * max_images
+                
+                # Заполняем пути для уже кешированных изображений
+                for idx, path in cached_images:
+                    image_paths[idx] = path
+                
+                # Скачиваем недостающие изображения
+                for idx in images_to_download:
+                    if idx < len(image_urls):
+                        cache_key = f"{sku_clean}_screenshotapi_{idx}"
+                        img_url = image_urls[idx]
+                        
+                        # Скачиваем изображение (ensure_image_cached проверит кеш внутри себя)
+                        cached_path = ensure_image_cached(cache_key, img_url, "PNG", timeout=30)
+                        if cached_path and os.path.exists(cached_path):
+                            image_paths[idx] = cached_path
+                        
+                        # Задержка между запросами только для новых скачиваний
+                        if idx < len(images_to_download) - 1:  # Не делаем задержку после последнего
+                            time.sleep(0.5)  # 500ms задержка между запросами
+                
+                # Убираем None значения
+                image_paths = [path for path in image_paths if path is not None]
+        
+        if not image_paths:
+            return {}
+        
+        # Анализируем каждое изображение через нейросеть
+        image_params_list = []
+        for img_path in image_paths:
+            img_params = analyze_image_with_ai(img_path, api_key, selected_params=selected_params)
+            if img_params:
+                image_params_list.append(img_params)
+        
+        # Объединяем результаты всех изображений
+        if image_params_list:
+            # Для каждого параметра берем наиболее частый
+            param_keys = set()
+            for img_params in image_params_list:
+                param_keys.update(img_params.keys())
+            
+            for key in param_keys:
+                values = [p.get(key) for p in image_params_list if p.get(key)]
+                if values:
+                    value_counts = Counter(values)
+                    all_params[key] = value_counts.most_common(1)[0][0]
+        
+    except Exception as e:
+        pass
+    
+    return all_params
+
+
+def determine_completeness(sku: str) -> str:
+    """
+    Определяет, является ли товар комплектом или одной вещью.
+    Анализирует характеристики и описание товара через API Wildberries.
+    
+    Args:
+        sku: Артикул товара
+        
+    Returns:
+        "Комплект" или "Один"
+    """
+    try:
+        api_url = f"https://card.wb.ru/cards/v1/detail?appType=1&curr=rub&dest=-1257786&spp=30&nm={sku}"
+        
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+            'Accept': 'application/json',
+        }
+        
+        import requests
+        response = requests.get(api_url, headers=headers, timeout=10)
+        
+        if response.status_code == 200:
+            data = response.json()
+            
+            if 'data' in data and 'products' in data['data'] and len(data['data']['products']) > 0:
+                product = data['data']['products'][0]
+                
+                # Собираем текст для анализа
+                text_to_analyze = []
+                
+                # Получаем название товара
+                if 'name' in product:
+                    text_to_analyze.append(product['name'].lower())
+                
+                # Получаем описание
+                if 'description' in product:
+                    text_to_analyze.append(product['description'].lower())
+                
+                # Получаем характеристики
+                if 'characteristics' in product:
+                    for char in product['characteristics']:
+                        if 'name' in char and 'value' in char:
+                            text_to_analyze.append(f"{char['name']} {char['value']}".lower())
+                
+                # Объединяем весь текст
+                full_text = " ".join(text_to_analyze)
+                
+                # Ключевые слова, указывающие на комплект
+                kit_keywords = [
+                    'комплект', 'набор', 'set', 'комплектация', 'в комплекте',
+                    '2 шт', '3 шт', '4 шт', '5 шт', '6 шт', '7 шт', '8 шт', '9 шт', '10 шт',
+                    'две', 'три', 'четыре', 'пять', 'шесть', 'семь', 'восемь', 'девять', 'десять',
+                    'пара', 'пары', 'шт.', 'штук', 'штуки',
+                    'включает', 'состоит из', 'содержит', 'в наборе',
+                    'комплект из', 'набор из', 'комплектация из'
+                ]
+                
+                # Проверяем наличие ключевых слов
+                for keyword in kit_keywords:
+                    if keyword in full_text:
+                        return "Комплект"
+                
+                # Дополнительная проверка: ищем числа перед словами "шт", "штук", "предмет"
+                import re
+                quantity_patterns = [
+                    r'\d+\s*(шт|штук|предмет|вещь|изделие)',
+                    r'(две|три|четыре|пять|шесть|семь|восемь|девять|десять)\s*(шт|штук|предмет|вещь)',
+                ]
+                
+                for pattern in quantity_patterns:
+                    if re.search(pattern, full_text):
+                        return "Комплект"
+                
+    except Exception as e:
+        # В случае ошибки возвращаем "Один" по умолчанию
+        pass
+    
+    # По умолчанию считаем, что это одна вещь
+    return "Один"
+
+
+def get_product_params_from_url(url: str) -> dict:
+    """
+    Пытается получить параметры товара по ссылке на Wildberries.
+    
+    ВАЖНО: Wildberries не предоставляет публичного API для получения параметров товара.
+    Эта функция может работать только если:
+    1. Используется официальный API Wildberries (требует токен)
+    2. Используется парсинг HTML (может нарушать ToS Wildberries)
+    
+    Args:
+        url: URL товара Wildberries
+        
+    Returns:
+        Словарь с параметрами товара или пустой словарь
+    """
+    sku = extract_sku_from_url(url)
+    if not sku:
+        return {}
+    
+    params = {}
+    
+    try:
+        # Попытка получить данные через API Wildberries (если доступен)
+        # Для этого нужен токен API, который обычно хранится в secrets.toml
+        api_url = f"https://card.wb.ru/cards/v1/detail?appType=1&curr=rub&dest=-1257786&spp=30&nm={sku}"
+        
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+            'Accept': 'application/json',
+        }
+        
+        import requests
+        response = requests.get(api_url, headers=headers, timeout=10)
+        
+        if response.status_code == 200:
+            data = response.json()
+            
+            # Извлекаем параметры из ответа API
+            if 'data' in data and 'products' in data['data'] and len(data['data']['products']) > 0:
+                product = data['data']['products'][0]
+                
+                # Извлекаем характеристики товара
+                if 'characteristics' in product:
+                    for char in product['characteristics']:
+                        if 'name' in char and 'value' in char:
+                            param_name = char['name'].strip()
+                            param_value = char['value'].strip()
+                            if param_name and param_value:
+                                params[param_name] = param_value
+                
+                # Извлекаем дополнительные данные
+                if 'brand' in product:
+                    params['Бренд'] = product['brand']
+                if 'name' in product:
+                    params['Название'] = product['name']
+                if 'colors' in product and product['colors']:
+                    params['Цвет'] = ', '.join([c.get('name', '') for c in product['colors'] if c.get('name')])
+                
+    except Exception as e:
+        # Если API недоступен или произошла ошибка, возвращаем пустой словарь
+        pass
+    
+    return params
@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+"""
+Вкладка «📝 Анализ отзывов»
+"""
+import importlib
+
+import pandas as pd
+import streamlit as st
+
+from utils.otziv_reports import find_and_load_otziv_reports
+from .common import filter_skus_by_analysis_with_details, load_ai_cache, save_ai_cache
+
+
+def render():
+    """Отрисовывает вкладку анализа отзывов по топ-комбинациям"""
+    st.subheader("📝 Анализ отзывов")
+    reviews_cache_file = "ai_reviews_cache.json"
+    reviews_cache = load_ai_cache(reviews_cache_file)
+
+    def render_ai_reviews(result: dict):
+        if result.get("error"):
+            st.error(result["error"])
+            if result.get("raw_response"):
+                with st.expander("Показать сырой ответ ИИ", expanded=False):
+                    st.text(result.get("raw_response", ""))
+            return
+        st.markdown("**Положительные стороны:**")
+        for item in result.get("positive", []):
+            st.write(f"- {item.get('topic')}: {item.get('percent')}%")
+        st.markdown("**Отрицательные стороны:**")
+        for item in result.get("negative", []):
+            st.write(f"- {item.get('topic')}: {item.get('percent')}%")
+        if result.get("improvements"):
+            st.markdown("**Что улучшить, чтобы быть конкурентнее:**")
+            for item in result.get("improvements", []):
+                st.write(f"- {item}")
+        if result.get("summary"):
+            st.info(result["summary"])
+
+    # Проверяем наличие данных о комбинациях
+    top_10_combinations = st.session_state.get('top_10_combinations', [])
+    cleaned_combo_to_skus = st.session_state.get('cleaned_combo_to_skus', {})
+
+    if not top_10_combinations:
+        st.info("ℹ️ Сначала перейдите во вкладку '📈 Аналитика по параметрам' и сформируйте топ комбинации.")
+    else:
+        combo_list = []
+        for combo in top_10_combinations:
+            if isinstance(combo, dict):
+                combo_key = combo.get("Комбинация", "")
+            else:
+                combo_key = str(combo)
+            if combo_key and combo_key in cleaned_combo_to_skus:
+                skus = cleaned_combo_to_skus[combo_key]
+                if skus:
+                    combo_display = f"{combo_key} ({len(skus)} товаров)"
+                    combo_list.append((combo_display, combo_key))
+
+        if not combo_list:
+            st.warning("⚠️ Не найдено комбинаций с товарами для анализа отзывов.")
+        else:
+            if len(combo_list) == 1:
+                _, selected_combo_key = combo_list[0]
+            else:
+                default_combo_key = st.session_state.get("selected_combo_key_global")
+                default_idx = 0
+                if default_combo_key:
+                    for i, (_, key) in enumerate(combo_list):
+                        if key == default_combo_key:
+                            default_idx = i
+                            break
+                selected_combo_tuple = st.selectbox(
+                    "📝 Выберите комбинацию для анализа отзывов:",
+                    options=combo_list,
+                    format_func=lambda x: x[0],
+                    index=default_idx,
+                    key="reviews_combo_select"
+                )
+                _, selected_combo_key = selected_combo_tuple
+
+            if selected_combo_key in cleaned_combo_to_skus:
+                combo_skus = cleaned_combo_to_skus[selected_combo_key]
+                combo_skus, excluded_skus = filter_skus_by_analysis_with_details(combo_skus)
+                if excluded_skus:
+                    excluded_preview = ", ".join([str(s) for s in excluded_skus[:10]])
+                    suffix = f" (+{len(excluded_skus) - 10})" if len(excluded_skus) > 10 else ""
+                    st.caption(
+                        f"🧹 Исключено артикулов из фильтра анализа: {len(excluded_skus)} "
+                        f"(фильтр «Анализ данных»). {excluded_preview}{suffix}"
+                    )
+
+                otziv_reports, otziv_missing = find_and_load_otziv_reports(tuple(combo_skus), "Otziv")
+                if otziv_missing:
+                    st.warning(f"⚠️ Не прочитаны отчеты отзывов для {len(otziv_missing)} артикулов.")
+                    st.markdown(
+                        "\n".join([f"- {sku}: {reason}" for sku, reason in otziv_missing.items()])
+                    )
+
+                if otziv_reports:
+                    review_frames = []
+                    for sku, info in otziv_reports.items():
+                        df_rev = info["data"].copy()
+                        df_rev.columns = df_rev.columns.astype(str).str.strip()
+
+                        sku_col = None
+                        for c in df_rev.columns:
+                            if "артикул" in c.lower():
+                                sku_col = c
+                                break
+                        if sku_col:
+                            df_rev = df_rev[df_rev[sku_col].astype(str).str.replace(".0", "") == str(sku)]
+
+                        date_col = None
+                        for c in df_rev.columns:
+                            if "дата" in c.lower():
+                                date_col = c
+                                break
+                        if date_col:
+                            df_rev[date_col] = (
+                                df_rev[date_col]
+                                .astype(str)
+                                .str.replace(r"\s*\\(.*\\)", "", regex=True)
+                            )
+                            df_rev[date_col] = pd.to_datetime(df_rev[date_col], errors="coerce")
+
+                        df_rev["__sku__"] = sku
+                        review_frames.append(df_rev)
+
+                    reviews_df = pd.concat(review_frames, ignore_index=True) if review_frames else pd.DataFrame()
+
+                    if not reviews_df.empty:
+                        date_col = None
+                        for c in reviews_df.columns:
+                            if "дата" in c.lower():
+                                date_col = c
+                                break
+                        if date_col and reviews_df[date_col].notna().any():
+                            min_date = reviews_df[date_col].min().date()
+                            max_date = reviews_df[date_col].max().date()
+                            date_range = st.date_input(
+                                "Период отзывов",
+                                value=(min_date, max_date),
+                                min_value=min_date,
+                                max_value=max_date
+                            )
+                            if isinstance(date_range, tuple) and len(date_range) == 2:
+                                start_r, end_r = date_range
+                                reviews_df = reviews_df[
+                                    (reviews_df[date_col].dt.date >= start_r) &
+                                    (reviews_df[date_col].dt.date <= end_r)
+                                ]
+
+                        rating_col = None
+                        for c in reviews_df.columns:
+                            if "оценка" in c.lower():
+                                rating_col = c
+                                break
+                        def show_rating_kpi(df, title_prefix=""):
+                            if not rating_col:
+                                return
+                            ratings = pd.to_numeric(df[rating_col], errors="coerce")
+                            avg_rating = ratings.mean() if ratings.notna().any() else 0
+                            total_reviews = int(ratings.notna().sum())
+                            share_5 = (ratings[ratings == 5].count() / total_reviews * 100) if total_reviews > 0 else 0
+                            share_1 = (ratings[ratings == 1].count() / total_reviews * 100) if total_reviews > 0 else 0
+
+                            st.markdown(f"**{title_prefix} KPI оценок**")
+                            k1, k2, k3, k4 = st.columns(4)
+                            with k1:
+                                st.metric("⭐ Средняя оценка", f"{avg_rating:.2f}")
+                            with k2:
+                                st.metric("📝 Отзывов", f"{total_reviews}")
+                            with k3:
+                                st.metric("👍 5★", f"{share_5:.1f}%")
+                            with k4:
+                                st.metric("👎 1★", f"{share_1:.1f}%")
+
+                        if rating_col:
+                            show_rating_kpi(reviews_df, "Общий")
+
+                        comment_col = None
+                        pros_col = None
+                        cons_col = None
+                        for c in reviews_df.columns:
+                            cl = c.lower()
+                            if "комментар" in cl:
+                                comment_col = c
+                            elif "достоин" in cl:
+                                pros_col = c
+                            elif "недостат" in cl:
+                                cons_col = c
+
+                        date_key = "all"
+                        if date_col and reviews_df[date_col].notna().any():
+                            date_key = f"{reviews_df[date_col].min().date()}_{reviews_df[date_col].max().date()}"
+                        cache_key_all = f"{selected_combo_key}|all|{date_key}"
+
+                        if cache_key_all in reviews_cache:
+                            st.info("ℹ️ Результат ИИ загружен из кеша.")
+                            render_ai_reviews(reviews_cache[cache_key_all])
+                            recalc_all = st.button("🔄 Пересчитать (общий анализ)", key=f"ai_reviews_tab_recalc_{selected_combo_key}")
+                        else:
+                            recalc_all = st.button("🤖 Проанализировать отзывы с ИИ", key=f"ai_reviews_tab_{selected_combo_key}")
+
+                        if recalc_all:
+                            api_key = st.session_state.get('openai_api_key', '') or st.secrets.get('openai_api_key', '')
+                            if not api_key:
+                                st.error("❌ Укажите OpenAI API ключ в настройках.")
+                            else:
+                                import utils.ai_analysis as ai_module
+                                ai_module = importlib.reload(ai_module)
+                                ai_result = ai_module.analyze_reviews_with_ai_core(
+                                    comments=reviews_df[comment_col].tolist() if comment_col else [],
+                                    advantages=reviews_df[pros_col].tolist() if pros_col else [],
+                                    disadvantages=reviews_df[cons_col].tolist() if cons_col else [],
+                                    api_key=api_key
+                                )
+                                reviews_cache[cache_key_all] = ai_result
+                                save_ai_cache(reviews_cache_file, reviews_cache)
+                                render_ai_reviews(ai_result)
+
+                        # Анализ по планам (низкий/средний/высокий)
+                        st.markdown("### 📌 Анализ отзывов по планам")
+                        all_combo_skus = sorted([str(sku).replace(".0", "") for sku in combo_skus if sku and str(sku).lower() not in ['nan', 'none', '']])
+                        total_skus = len(all_combo_skus)
+                        low_plan_skus = set()
+                        mid_plan_skus = set()
+                        high_plan_skus = set()
+                        if total_skus > 0:
+                            high_count = max(1, int(total_skus / 3))
+                            high_plan_skus = set(all_combo_skus[:high_count])
+                            mid_start = high_count
+                            mid_end = mid_start + max(1, int(total_skus / 3))
+                            if mid_end > mid_start and mid_end <= total_skus:
+                                mid_plan_skus = set(all_combo_skus[mid_start:mid_end])
+                            else:
+                                mid_plan_skus = set(all_combo_skus[mid_start:])
+                            low_start = mid_end if mid_end <= total_skus else mid_start
+                            low_plan_skus = set(all_combo_skus[low_start:])
+
+                        def plan_reviews_df(plan_skus_set):
+                            if "__sku__" not in reviews_df.columns:
+                                return reviews_df.iloc[0:0]
+                            return reviews_df[reviews_df["__sku__"].astype(str).isin(plan_skus_set)].copy()
+
+                        plan_blocks = [
+                            ("📉 Низкий план", low_plan_skus, "low"),
+                            ("📊 Средний план", mid_plan_skus, "mid"),
+                            ("📈 Высокий план", high_plan_skus, "high")
+                        ]
+
+                        for plan_label, plan_skus_set, plan_key_suffix in plan_blocks:
+                            df_plan = plan_reviews_df(plan_skus_set)
+                            st.markdown(f"**{plan_label}**")
+                            if df_plan.empty:
+                                st.info("ℹ️ Нет отзывов по артикулу(ам) этого плана.")
+                                continue
+                            show_rating_kpi(df_plan, plan_label)
+
+                            plan_cache_key = f"{selected_combo_key}|plan:{plan_key_suffix}|{date_key}"
+                            if plan_cache_key in reviews_cache:
+                                st.info("ℹ️ Результат ИИ загружен из кеша.")
+                                render_ai_reviews(reviews_cache[plan_cache_key])
+                                recalc_plan = st.button(f"🔄 Пересчитать ({plan_label})", key=f"ai_reviews_plan_recalc_{plan_key_suffix}_{selected_combo_key}")
+                            else:
+                                recalc_plan = st.button(f"🤖 ИИ анализ ({plan_label})", key=f"ai_reviews_plan_{plan_key_suffix}_{selected_combo_key}")
+
+                            if recalc_plan:
+                                api_key = st.session_state.get('openai_api_key', '') or st.secrets.get('openai_api_key', '')
+                                if not api_key:
+                                    st.error("❌ Укажите OpenAI API ключ в настройках.")
+                                else:
+                                    import utils.ai_analysis as ai_module
+                                    ai_module = importlib.reload(ai_module)
+                                    ai_result = ai_module.analyze_reviews_with_ai_core(
+                                        comments=df_plan[comment_col].tolist() if comment_col else [],
+                                        advantages=df_plan[pros_col].tolist() if pros_col else [],
+                                        disadvantages=df_plan[cons_col].tolist() if cons_col else [],
+                                        api_key=api_key
+                                    )
+                                    reviews_cache[plan_cache_key] = ai_result
+                                    save_ai_cache(reviews_cache_file, reviews_cache)
+                                    render_ai_reviews(ai_result)
+
+                        # Анализ по каждому артикулу
+                        st.markdown("### 🔍 Анализ отзывов по каждому артикулу")
+                        if "__sku__" in reviews_df.columns:
+                            for sku in sorted(reviews_df["__sku__"].dropna().astype(str).unique()):
+                                df_sku = reviews_df[reviews_df["__sku__"].astype(str) == sku]
+                                st.markdown(f"**Артикул {sku}**")
+                                if df_sku.empty:
+                                    st.info("ℹ️ Нет отзывов.")
+                                    continue
+                                show_rating_kpi(df_sku, f"Артикул {sku}")
+
+                                sku_cache_key = f"{selected_combo_key}|sku:{sku}|{date_key}"
+                                if sku_cache_key in reviews_cache:
+                                    st.info("ℹ️ Результат ИИ загружен из кеша.")
+                                    render_ai_reviews(reviews_cache[sku_cache_key])
+                                    recalc_sku = st.button(f"🔄 Пересчитать (артикул {sku})", key=f"ai_reviews_sku_recalc_{sku}_{selected_combo_key}")
+                                else:
+                                    recalc_sku = st.button(f"🤖 ИИ анализ (артикул {sku})", key=f"ai_reviews_sku_{sku}_{selected_combo_key}")
+
+                                if recalc_sku:
+                                    api_key = st.session_state.get('openai_api_key', '') or st.secrets.get('openai_api_key', '')
+                                    if not api_key:
+                                        st.error("❌ Укажите OpenAI API ключ в настройках.")
+                                    else:
+                                        import utils.ai_analysis as ai_module
+                                        ai_module = importlib.reload(ai_module)
+                                        ai_result = ai_module.analyze_reviews_with_ai_core(
+                                            comments=df_sku[comment_col].tolist() if comment_col else [],
+                                            advantages=df_sku[pros_col].tolist() if pros_col else [],
+                                            disadvantages=df_sku[cons_col].tolist() if cons_col else [],
+                                            api_key=api_key
+                                        )
+                                        reviews_cache[sku_cache_key] = ai_result
+                                        save_ai_cache(reviews_cache_file, reviews_cache)
+                                        render_ai_reviews(ai_result)
+                    else:
+                        st.info("ℹ️ Нет отзывов для выбранной комбинации.")
\ No newline at end of file
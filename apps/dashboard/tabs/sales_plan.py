@@ -0,0 +1,2726 @@
+# -*- coding: utf-8 -*-
+"""
+Вкладка «🗺️ План продаж»
+"""
+import os
+import json
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.calculations import calculate_unit_economics
+from utils.unit_economics import unit_economics
+from utils.perf import perf_checkpoint
+from utils.lazy import LazyModule
+
+from . import load_tab
+from .common import (
+    filter_skus_by_analysis_with_details, find_reports_with_missing,
+    enrich_missing_reports, analyze_combination_products_with_ai
+)
+
+# plotly загружается при первом построении графика, а не при отрисовке вкладки
+go = LazyModule("plotly.graph_objects")
+
+
+def render():
+    """Отрисовывает план продаж по топ комбинациям"""
+    perf_checkpoint("tab: 🗺️ План продаж")
+    st.subheader("🗺️ План продаж")
+
+    # Проверяем наличие данных о комбинациях
+    top_10_combinations = st.session_state.get('top_10_combinations', [])
+    top_10_novelty_combinations = st.session_state.get('top_10_novelty_combinations', [])
+    top_10_regular_combinations = st.session_state.get('top_10_regular_combinations', [])
+    cleaned_combo_to_skus = st.session_state.get('cleaned_combo_to_skus', {})
+    novelty_months = st.session_state.get('novelty_months', None)
+
+    if not top_10_combinations:
+        st.info("ℹ️ Сначала перейдите во вкладку '📈 Аналитика по параметрам' и сформируйте топ комбинаций, чтобы использовать план продаж.")
+    else:
+        # Формируем список всех комбинаций для выбора
+        combo_options = []
+        if novelty_months is not None and top_10_novelty_combinations:
+            for idx, combo in enumerate(top_10_novelty_combinations, 1):
+                combo_options.append(f"🆕 #{idx} (Новинка) - {combo['Комбинация']}")
+
+        if top_10_regular_combinations:
+            for idx, combo in enumerate(top_10_regular_combinations, 1):
+                prefix = "📦" if novelty_months is not None else ""
+                combo_options.append(f"{prefix} #{idx} - {combo['Комбинация']}")
+
+        selected_combo_idx = st.selectbox(
+            "Выберите комбинацию для плана продаж:",
+            options=combo_options,
+            help="Выберите комбинацию из топ-10, чтобы загрузить отчеты и построить план продаж",
+            key="sales_plan_combo_select"
+        )
+
+        if selected_combo_idx:
+            # Определяем, из какого списка выбрана комбинация
+            is_novelty_selection = "🆕" in selected_combo_idx or "(Новинка)" in selected_combo_idx
+
+            # Извлекаем индекс выбранной комбинации
+            idx_part = selected_combo_idx.split(" - ")[0].replace("#", "").replace("🆕", "").replace("📦", "").replace("(Новинка)", "").strip()
+            selected_idx = int(idx_part) - 1
+
+            # Выбираем комбинацию из соответствующего списка
+            if is_novelty_selection and novelty_months is not None and top_10_novelty_combinations:
+                if selected_idx < len(top_10_novelty_combinations):
+                    selected_combo = top_10_novelty_combinations[selected_idx]
+                else:
+                    selected_combo = None
+            else:
+                if selected_idx < len(top_10_regular_combinations):
+                    selected_combo = top_10_regular_combinations[selected_idx]
+                else:
+                    selected_combo = None
+
+            if selected_combo:
+                selected_combo_key = selected_combo['Комбинация']
+                # Сохраняем выбранную комбинацию для синхронизации между вкладками
+                st.session_state["selected_combo_key_global"] = selected_combo_key
+
+                # Готовый пакетный прогноз комбинации (из таблицы прогнозов, без обучения)
+                load_tab("prophet").render_forecast_summary(selected_combo_key)
+
+                # Получаем артикулы для выбранной комбинации
+                combo_skus = None
+                cleaned_combo_str = selected_combo_key
+                if cleaned_combo_str in cleaned_combo_to_skus:
+                    combo_skus = cleaned_combo_to_skus[cleaned_combo_str]
+                else:
+                    # Пробуем найти по частичному совпадению
+                    for orig_combo, orig_skus in cleaned_combo_to_skus.items():
+                        selected_parts = set(selected_combo_key.split(" | "))
+                        orig_parts = set(orig_combo.split(" | "))
+                        if selected_parts.issubset(orig_parts) or selected_parts == orig_parts:
+                            combo_skus = orig_skus
+                            break
+
+                if combo_skus:
+                    # Применяем фильтр артикулов из "Анализ данных"
+                    combo_skus, excluded_skus = filter_skus_by_analysis_with_details(combo_skus)
+                    if excluded_skus:
+                        excluded_preview = ", ".join([str(s) for s in excluded_skus[:10]])
+                        suffix = f" (+{len(excluded_skus) - 10})" if len(excluded_skus) > 10 else ""
+                        st.caption(
+                            f"🧹 Исключено артикулов из фильтра анализа: {len(excluded_skus)} "
+                            f"(фильтр «Анализ данных»). {excluded_preview}{suffix}"
+                        )
+                    # Создаём вкладки внутри плана продаж
+                    plan_subtab1, plan_subtab2, plan_subtab3, plan_subtab4 = st.tabs(["📊 План", "📈 Ситуация", "📋 Таблица", "💬 Чат с ИИ"])
+
+                    with plan_subtab1:
+                        # Инициализация session_state для хранения отчетов комбинаций
+                        if 'combination_reports' not in st.session_state:
+                            st.session_state['combination_reports'] = {}
+
+                        # Загрузка отчета для комбинации
+                        combo_report_key = f"report_{selected_combo_key}"
+                        missing_reports_key = f"tovar_missing_{selected_combo_key}"
+
+                    # Получаем артикулы из комбинации
+                    combo_skus_list = [str(sku).replace(".0", "") for sku in combo_skus] if combo_skus else []
+
+                    # Получаем данные о товарах комбинации для базовой цены
+                    df = st.session_state.get('df', None)
+                    combo_products_df = None
+                    base_price = None
+                    if df is not None and combo_skus:
+                        mask = df["Артикул"].astype(str).str.replace(".0", "").isin(combo_skus_list)
+                        combo_products_df = df[mask].copy()
+
+                        if not combo_products_df.empty:
+                            # Берем базовую цену из таблицы
+                            if "Базовая цена, ₽" in combo_products_df.columns:
+                                base_price = combo_products_df["Базовая цена, ₽"].mean()
+                            elif "Базовая цена" in combo_products_df.columns:
+                                base_price = combo_products_df["Базовая цена"].mean()
+                            elif "Средняя цена без СПП" in combo_products_df.columns:
+                                base_price = combo_products_df["Средняя цена без СПП"].mean()
+                            elif "Средняя цена" in combo_products_df.columns:
+                                base_price = combo_products_df["Средняя цена"].mean()
+
+                    # АВТОМАТИЧЕСКАЯ ЗАГРУЗКА ИЗ ПАПКИ TOVAR (свернуто)
+                    with st.expander("🔄 Автоматическая загрузка из папки Tovar", expanded=False):
+                        st.caption("Система автоматически найдет и загрузит отчеты для товаров этой комбинации из папки Tovar")
+
+                        check_missing_key = f"check_missing_plan_{selected_combo_key}"
+                        if st.button("🔍 Показать причины отсутствия отчетов", key=check_missing_key):
+                            with st.spinner("🔍 Проверяю наличие отчетов в папке Tovar..."):
+                                _, missing_reports = find_reports_with_missing(
+                                    tuple(combo_skus_list),
+                                    "Tovar"
+                                )
+                                st.session_state[missing_reports_key] = missing_reports
+
+                        # Автоматическая загрузка при первом открытии, если отчет еще не загружен
+                        auto_load_done_key = f"auto_load_done_{selected_combo_key}"
+                        if (combo_report_key not in st.session_state.get('combination_reports', {}) and 
+                            auto_load_done_key not in st.session_state and
+                            combo_skus_list):
+                            # Пробуем автоматически загрузить
+                            with st.spinner("🔍 Автоматически ищу отчеты в папке Tovar..."):
+                                found_reports, missing_reports = find_reports_with_missing(
+                                    tuple(combo_skus_list),
+                                    "Tovar"
+                                )
+
+                            if found_reports:
+                                # Объединяем данные из всех отчетов
+                                all_reports_data = []
+                                loaded_skus = []
+
+                                for sku, report_info in found_reports.items():
+                                    data = report_info['data'].copy()
+                                    data['Артикул'] = sku
+                                    all_reports_data.append(data)
+                                    loaded_skus.append(sku)
+
+                                if all_reports_data:
+                                    # Объединяем все данные
+                                    combined_data = pd.concat(all_reports_data, ignore_index=True)
+
+                                    # Группируем по дате и суммируем показатели
+                                    aggregated_data = combined_data.groupby('Дата').agg({
+                                        'Заказы': 'sum',
+                                        'Продажи': 'sum',
+                                        'Средняя цена': 'mean'  # Средняя цена по всем товарам
+                                    }).reset_index()
+
+                                    # Сохраняем в session_state
+                                    st.session_state['combination_reports'][combo_report_key] = {
+                                        'data': aggregated_data,
+                                        'combination': selected_combo_key,
+                                        'filename': f"Автоматически загружено из Tovar ({len(found_reports)} отчетов)",
+                                        'source': 'auto_tovar',
+                                        'loaded_skus': loaded_skus
+                                    }
+
+                                    st.session_state[auto_load_done_key] = True
+                                    st.session_state[missing_reports_key] = missing_reports
+                                    st.rerun()
+                            else:
+                                # Помечаем, что попытка была, чтобы не повторять
+                                st.session_state[auto_load_done_key] = True
+                                st.session_state[missing_reports_key] = missing_reports
+
+                        # Кнопка для ручной автоматической загрузки
+                        auto_load_key = f"auto_load_{selected_combo_key}"
+                        if st.button("🔄 Автоматически загрузить отчеты из папки Tovar", key=auto_load_key, type="primary"):
+                            with st.spinner("🔍 Ищу отчеты в папке Tovar..."):
+                                # Ищем и загружаем отчеты
+                                found_reports, missing_reports = find_reports_with_missing(
+                                    tuple(combo_skus_list),
+                                    "Tovar"
+                                )
+
+                                if found_reports:
+                                    # Объединяем данные из всех отчетов
+                                    all_reports_data = []
+                                    loaded_skus = []
+
+                                    for sku, report_info in found_reports.items():
+                                        data = report_info['data'].copy()
+                                        data['Артикул'] = sku
+                                        all_reports_data.append(data)
+                                        loaded_skus.append(sku)
+
+                                    if all_reports_data:
+                                        # Объединяем все данные
+                                        combined_data = pd.concat(all_reports_data, ignore_index=True)
+
+                                        # Группируем по дате и суммируем показатели
+                                        aggregated_data = combined_data.groupby('Дата').agg({
+                                            'Заказы': 'sum',
+                                            'Продажи': 'sum',
+                                            'Средняя цена': 'mean'  # Средняя цена по всем товарам
+                                        }).reset_index()
+
+                                        # Сохраняем в session_state
+                                        st.session_state['combination_reports'][combo_report_key] = {
+                                            'data': aggregated_data,
+                                            'combination': selected_combo_key,
+                                            'filename': f"Автоматически загружено из Tovar ({len(found_reports)} отчетов)",
+                                            'source': 'auto_tovar',
+                                            'loaded_skus': loaded_skus
+                                        }
+
+                                        st.success(f"✅ Автоматически загружено {len(found_reports)} отчетов для артикулов: {', '.join(loaded_skus[:5])}{'...' if len(loaded_skus) > 5 else ''}")
+                                        st.session_state[missing_reports_key] = missing_reports
+                                        st.rerun()
+                                    else:
+                                        st.warning("⚠️ Не удалось обработать найденные отчеты")
+                                else:
+                                    st.info(f"ℹ️ Не найдено отчетов в папке Tovar для артикулов: {', '.join(combo_skus_list[:5])}{'...' if len(combo_skus_list) > 5 else ''}")
+                                    st.session_state[missing_reports_key] = missing_reports
+
+                                    # Показываем какие артикулы есть в комбинации
+                                    if combo_skus_list:
+                                        with st.expander("📋 Артикулы в комбинации", expanded=False):
+                                            st.write(", ".join(combo_skus_list))
+
+                        # Проверяем, есть ли уже загруженные отчеты
+                        if combo_report_key in st.session_state.get('combination_reports', {}):
+                            report_info = st.session_state['combination_reports'][combo_report_key]
+                            if report_info.get('source') == 'auto_tovar':
+                                st.success(f"✅ Отчеты загружены автоматически из папки Tovar")
+                                if 'loaded_skus' in report_info:
+                                    st.caption(f"Загружено для артикулов: {', '.join(report_info['loaded_skus'][:5])}{'...' if len(report_info['loaded_skus']) > 5 else ''}")
+
+                            missing_reports = st.session_state.get(missing_reports_key)
+                            if missing_reports:
+                                if st.button("🔎 Уточнить причины ошибок чтения", key=f"enrich_missing_{selected_combo_key}"):
+                                    missing_reports = enrich_missing_reports(
+                                        missing_reports,
+                                        combo_skus_list,
+                                        "Tovar"
+                                    )
+                                    st.session_state[missing_reports_key] = missing_reports
+                                    st.rerun()
+                                st.warning(f"⚠️ Отчеты не загружены для {len(missing_reports)} артикулов.")
+                                with st.expander("❗️Отчеты не загружены (причины)", expanded=False):
+                                    st.markdown(
+                                        "\n".join(
+                                            [f"- {sku}: {reason}" for sku, reason in missing_reports.items()]
+                                        )
+                                    )
+
+                    # РУЧНАЯ ЗАГРУЗКА (свернуто)
+                    with st.expander("📤 Ручная загрузка отчета", expanded=False):
+                        st.caption("Или загрузите Excel/CSV файл вручную с данными по дням (заказы, продажи, средняя цена)")
+
+                        # Показываем информацию о текущем отчете, если он загружен автоматически
+                        if combo_report_key in st.session_state.get('combination_reports', {}):
+                            current_report = st.session_state['combination_reports'][combo_report_key]
+                            if current_report.get('source') == 'auto_tovar':
+                                st.info(f"📁 Текущий отчет: {current_report.get('filename', 'Автоматически загружен')}")
+                                if st.button("🔄 Обновить автоматическую загрузку", key=f"refresh_auto_{selected_combo_key}"):
+                                    # Удаляем старый отчет и загружаем заново
+                                    if combo_report_key in st.session_state['combination_reports']:
+                                        del st.session_state['combination_reports'][combo_report_key]
+                                    if auto_load_done_key in st.session_state:
+                                        del st.session_state[auto_load_done_key]
+                                    st.rerun()
+
+                        uploaded_report = st.file_uploader(
+                            "Выберите файл с отчетом (ручная загрузка)",
+                            type=['xlsx', 'xls', 'csv'],
+                            key=f"report_uploader_{selected_combo_key}",
+                            help="Файл должен содержать колонки: Дата, Заказы, Продажи (или Выкупы), Средняя цена. Ручная загрузка заменит автоматически загруженный отчет."
+                        )
+
+                    if uploaded_report is not None:
+                        try:
+                            # Обрабатываем загруженный файл
+                            if uploaded_report.name.endswith('.csv'):
+                                report_df = pd.read_csv(uploaded_report)
+                            else:
+                                report_df = pd.read_excel(uploaded_report)
+
+                            # Нормализуем названия колонок
+                            report_df.columns = report_df.columns.str.strip()
+
+                            # Ищем колонку с датой
+                            date_col = None
+                            for col in report_df.columns:
+                                if 'дата' in col.lower() or 'date' in col.lower():
+                                    date_col = col
+                                    break
+
+                            if date_col is None:
+                                st.error("❌ Не найдена колонка с датой в отчете")
+                            else:
+                                # Преобразуем дату
+                                report_df[date_col] = pd.to_datetime(report_df[date_col], errors='coerce')
+                                report_df = report_df.dropna(subset=[date_col])
+
+                                # Ищем колонки с данными
+                                orders_col = None
+                                sales_col = None
+                                price_col = None
+
+                                for col in report_df.columns:
+                                    col_lower = col.lower()
+                                    if ('заказ' in col_lower or 'order' in col_lower) and orders_col is None:
+                                        orders_col = col
+                                    elif ('продаж' in col_lower or 'выкуп' in col_lower or 'sale' in col_lower) and sales_col is None:
+                                        sales_col = col
+                                    elif ('цена' in col_lower or 'price' in col_lower) and price_col is None:
+                                        price_col = col
+
+                                # Создаем нормализованный DataFrame
+                                normalized_data = pd.DataFrame()
+                                normalized_data['Дата'] = report_df[date_col]
+                                normalized_data['Заказы'] = report_df[orders_col] if orders_col else 0
+                                normalized_data['Продажи'] = report_df[sales_col] if sales_col else 0
+                                normalized_data['Средняя цена'] = report_df[price_col] if price_col else 0
+
+                                # Сохраняем данные в session_state
+                                st.session_state['combination_reports'][combo_report_key] = {
+                                    'data': normalized_data,
+                                    'combination': selected_combo_key,
+                                    'filename': uploaded_report.name,
+                                    'source': 'manual'
+                                }
+
+                                st.success(f"✅ Отчет загружен успешно! Загружено {len(normalized_data)} записей")
+
+                                # Показываем предпросмотр данных
+                                with st.expander("📋 Предпросмотр данных", expanded=False):
+                                    st.dataframe(normalized_data.head(10))
+                                st.rerun()
+                        except Exception as e:
+                            st.error(f"❌ Ошибка при обработке файла: {str(e)}")
+
+                    # Показываем загруженные отчеты и строим график
+                    if combo_report_key in st.session_state.get('combination_reports', {}):
+                        report_data = st.session_state['combination_reports'][combo_report_key]['data']
+
+                        st.markdown("#### 📈 График плана продаж")
+
+                        # Выбор режима отображения: комбинация или отдельный товар
+                        view_mode = st.radio(
+                            "Режим просмотра:",
+                            ["📊 Комбинация товаров", "📦 Отдельный товар"],
+                            key=f"view_mode_{selected_combo_key}",
+                            horizontal=True
+                        )
+
+                        # Если выбран режим отдельного товара, показываем выбор товара
+                        selected_sku_for_plan = None
+                        if view_mode == "📦 Отдельный товар":
+                            if combo_skus_list:
+                                # Получаем названия товаров для выбора
+                                sku_options = []
+                                for sku in combo_skus_list:
+                                    # Пытаемся получить название товара из данных
+                                    sku_name = sku
+                                    if combo_products_df is not None and not combo_products_df.empty:
+                                        sku_row = combo_products_df[combo_products_df["Артикул"].astype(str).str.replace(".0", "") == sku]
+                                        if not sku_row.empty:
+                                            # Пытаемся найти название в колонках
+                                            name_cols = [col for col in sku_row.columns if 'название' in col.lower() or 'name' in col.lower() or 'товар' in col.lower()]
+                                            if name_cols:
+                                                sku_name = f"{sku} - {sku_row[name_cols[0]].iloc[0]}"
+                                    sku_options.append(sku_name)
+
+                                selected_sku_idx = st.selectbox(
+                                    "Выберите товар:",
+                                    options=range(len(combo_skus_list)),
+                                    format_func=lambda x: sku_options[x],
+                                    key=f"sku_select_{selected_combo_key}"
+                                )
+                                selected_sku_for_plan = combo_skus_list[selected_sku_idx]
+                            else:
+                                st.warning("⚠️ Нет товаров в комбинации")
+
+                        # Выбор промежутка времени для просмотра данных
+                        st.markdown("#### 📅 Период анализа")
+                        date_col1, date_col2 = st.columns(2)
+
+                        with date_col1:
+                            min_date = None
+                            max_date = None
+                            if combo_report_key in st.session_state.get('combination_reports', {}):
+                                report_data = st.session_state['combination_reports'][combo_report_key]['data']
+                                if not report_data.empty and 'Дата' in report_data.columns:
+                                    min_date = report_data['Дата'].min()
+                                    max_date = report_data['Дата'].max()
+
+                            if min_date and max_date:
+                                date_from = st.date_input(
+                                    "Дата начала:",
+                                    value=min_date.date() if isinstance(min_date, pd.Timestamp) else min_date,
+                                    min_value=min_date.date() if isinstance(min_date, pd.Timestamp) else min_date,
+                                    max_value=max_date.date() if isinstance(max_date, pd.Timestamp) else max_date,
+                                    key=f"date_from_{selected_combo_key}"
+                                )
+                            else:
+                                date_from = None
+
+                        with date_col2:
+                            if min_date and max_date:
+                                date_to = st.date_input(
+                                    "Дата окончания:",
+                                    value=max_date.date() if isinstance(max_date, pd.Timestamp) else max_date,
+                                    min_value=min_date.date() if isinstance(min_date, pd.Timestamp) else min_date,
+                                    max_value=max_date.date() if isinstance(max_date, pd.Timestamp) else max_date,
+                                    key=f"date_to_{selected_combo_key}"
+                                )
+                            else:
+                                date_to = None
+
+                        # KPI для выбранного периода
+                        if date_from and date_to and combo_report_key in st.session_state.get('combination_reports', {}):
+                            period_report_data = st.session_state['combination_reports'][combo_report_key]['data'].copy()
+                            if not period_report_data.empty and 'Дата' in period_report_data.columns:
+                                date_from_ts = pd.to_datetime(date_from)
+                                date_to_ts = pd.to_datetime(date_to)
+                                period_data = period_report_data[
+                                    (period_report_data['Дата'] >= date_from_ts) & 
+                                    (period_report_data['Дата'] <= date_to_ts)
+                                ].copy()
+
+                                if not period_data.empty:
+                                    # Рассчитываем KPI для периода
+                                    # Фильтруем только дни с продажами > 0
+                                    period_sales_data = period_data[period_data['Продажи'] > 0].copy()
+
+                                    if len(period_sales_data) > 0:
+                                        # Группируем по дням и считаем среднее продаж в каждый день
+                                        # Проверяем, есть ли колонка 'Артикул' (индивидуальные отчеты)
+                                        if 'Артикул' in period_sales_data.columns:
+                                            # Для индивидуальных отчетов группируем по дате и считаем среднее по товарам
+                                            daily_sales = period_sales_data.groupby('Дата')['Продажи'].mean().reset_index()
+                                        else:
+                                            # Для агрегированных данных просто берем продажи по дням
+                                            daily_sales = period_sales_data.groupby('Дата')['Продажи'].first().reset_index()
+
+                                        # Средние продажи в день (среднее по дням)
+                                        avg_sales_per_day = daily_sales['Продажи'].mean()
+
+                                        # Максимальные и минимальные продажи (максимум среднего по дням)
+                                        max_sales = daily_sales['Продажи'].max()
+                                        min_sales = daily_sales['Продажи'].min()
+
+                                        # Общие продажи (сумма средних по дням)
+                                        total_sales = daily_sales['Продажи'].sum()
+
+                                        days_with_sales = len(daily_sales)
+                                        total_days = len(period_data)
+
+                                        # Средний чек из базовой цены
+                                        avg_check = base_price if base_price else 0
+
+                                        # Выручка
+                                        revenue = total_sales * avg_check if avg_check > 0 else 0
+
+                                        # Рассчитываем рост/падение в процентах
+                                        # Сравниваем с предыдущим периодом той же длительности
+                                        period_duration = (date_to_ts - date_from_ts).days + 1
+                                        prev_period_start = date_from_ts - pd.Timedelta(days=period_duration)
+                                        prev_period_end = date_from_ts - pd.Timedelta(days=1)
+
+                                        prev_period_data = period_report_data[
+                                            (period_report_data['Дата'] >= prev_period_start) & 
+                                            (period_report_data['Дата'] <= prev_period_end)
+                                        ].copy()
+
+                                        sales_growth = None
+                                        avg_check_growth = None
+
+                                        if not prev_period_data.empty:
+                                            prev_period_sales_data = prev_period_data[prev_period_data['Продажи'] > 0].copy()
+                                            if len(prev_period_sales_data) > 0:
+                                                prev_avg_sales_per_day = prev_period_sales_data['Продажи'].mean()
+
+                                                if prev_avg_sales_per_day > 0:
+                                                    sales_growth = ((avg_sales_per_day - prev_avg_sales_per_day) / prev_avg_sales_per_day) * 100
+
+                                                # Средний чек предыдущего периода
+                                                if 'Средняя цена' in prev_period_sales_data.columns:
+                                                    prev_avg_check = prev_period_sales_data['Средняя цена'].mean()
+                                                else:
+                                                    prev_avg_check = base_price if base_price else 0
+
+                                                if prev_avg_check > 0:
+                                                    avg_check_growth = ((avg_check - prev_avg_check) / prev_avg_check) * 100
+
+                                        # Отображаем KPI
+                                        st.markdown("##### 📊 KPI за период")
+                                        kpi_col1, kpi_col2, kpi_col3, kpi_col4 = st.columns(4)
+
+                                        with kpi_col1:
+                                            # Получаем процент выкупа
+                                            buyout_pct_kpi = st.session_state.get("buyout_pct", 25)
+                                            buyout_k_kpi = buyout_pct_kpi / 100.0
+
+                                            # Общие заказы (переименовано из "Общие продажи")
+                                            if sales_growth is not None:
+                                                st.metric("💰 Общие заказы", f"{total_sales:,.0f} шт", delta=f"{sales_growth:+.1f}%")
+                                            else:
+                                                st.metric("💰 Общие заказы", f"{total_sales:,.0f} шт")
+
+                                            # Продажи с учетом процента выкупа
+                                            total_sold_kpi = total_sales * buyout_k_kpi
+                                            st.metric("💵 Продажи (с учетом выкупа)", f"{total_sold_kpi:,.0f} шт", 
+                                                     help=f"Общие заказы ({total_sales:,.0f} шт) × процент выкупа ({buyout_pct_kpi}%)")
+                                            st.metric("📈 Средние продажи/день", f"{avg_sales_per_day:.1f} шт")
+
+                                        with kpi_col2:
+                                            st.metric("💵 Выручка", f"{revenue:,.0f} ₽" if revenue > 0 else "—")
+
+                                        with kpi_col3:
+                                            st.metric("⬆️ Макс. продажи/день", f"{max_sales:.1f} шт")
+                                            st.metric("⬇️ Мин. продажи/день", f"{min_sales:.1f} шт")
+
+                                        with kpi_col4:
+                                            pass  # Оставляем пустым для симметрии
+
+                        # Настройки плана на следующий год (всегда видимый)
+                        st.markdown("#### 🔮 План на следующий год")
+                        growth_percent = st.number_input(
+                            "Процент роста на тренд, %:",
+                            min_value=-50.0,
+                            max_value=200.0,
+                            value=10.0,
+                            step=1.0,
+                            key=f"growth_percent_{selected_combo_key}",
+                            help="Процент роста относительно текущего тренда (может быть отрицательным)"
+                        )
+                        show_forecast = True  # Всегда показываем прогноз
+                        # Получаем все загруженные отчеты для сравнения
+                        all_reports = st.session_state.get('combination_reports', {})
+
+                        if len(all_reports) > 0:
+                            # Определяем, какие данные использовать
+                            if view_mode == "📦 Отдельный товар" and selected_sku_for_plan:
+                                # Для отдельного товара загружаем его отчет
+                                individual_report_key = f"report_{selected_sku_for_plan}"
+                                individual_report_data = None
+
+                                # Ищем отчет для этого товара в папке Tovar
+                                found_reports, _ = find_reports_with_missing((selected_sku_for_plan,), "Tovar")
+                                if found_reports and selected_sku_for_plan in found_reports:
+                                    individual_report_data = found_reports[selected_sku_for_plan]['data'].copy()
+
+                                if individual_report_data is not None and not individual_report_data.empty:
+                                    # Используем данные отдельного товара
+                                    combined_df = individual_report_data.copy()
+                                    combined_df['Комбинация'] = f"Товар {selected_sku_for_plan}"
+                                else:
+                                    st.warning(f"⚠️ Не найден отчет для товара {selected_sku_for_plan} в папке Tovar")
+                                    combined_df = pd.DataFrame()
+                            else:
+                                # Для комбинации загружаем отчеты для каждого товара отдельно
+                                # Это нужно для расчета среднего по дням только для товаров с продажами
+                                individual_reports = {}
+
+                                # Загружаем отчеты для всех товаров комбинации
+                                if combo_skus_list:
+                                    found_reports, _ = find_reports_with_missing(tuple(combo_skus_list), "Tovar")
+                                    for sku, report_info in found_reports.items():
+                                        if 'data' in report_info:
+                                            individual_reports[sku] = report_info['data'].copy()
+
+                                if individual_reports:
+                                    # Создаем объединенный DataFrame с указанием артикула
+                                    all_reports_data = []
+                                    for sku, report_data in individual_reports.items():
+                                        data = report_data.copy()
+                                        data['Артикул'] = sku
+                                        all_reports_data.append(data)
+
+                                    combined_df = pd.concat(all_reports_data, ignore_index=True)
+                                else:
+                                    # Если нет индивидуальных отчетов, используем агрегированные данные
+                                    comparison_data = []
+
+                                    for report_key, report_info in all_reports.items():
+                                        if report_info['combination'] == selected_combo_key:
+                                            data = report_info['data'].copy()
+                                            data['Комбинация'] = report_info['combination']
+                                            comparison_data.append(data)
+
+                                    if comparison_data:
+                                        combined_df = pd.concat(comparison_data, ignore_index=True)
+                                    else:
+                                        combined_df = pd.DataFrame()
+
+                            # Если нет данных, показываем сообщение
+                            if combined_df.empty:
+                                st.info("📊 Нет данных для построения графика. Загрузите отчеты для комбинации или выберите товар с доступными данными.")
+
+                            if not combined_df.empty:
+                                # Фильтруем данные по выбранному промежутку времени
+                                if date_from and date_to:
+                                    date_from_ts = pd.to_datetime(date_from)
+                                    date_to_ts = pd.to_datetime(date_to)
+                                    combined_df = combined_df[
+                                        (combined_df['Дата'] >= date_from_ts) & 
+                                        (combined_df['Дата'] <= date_to_ts)
+                                    ].copy()
+
+                                if combined_df.empty:
+                                    st.warning("⚠️ Нет данных в выбранном периоде")
+                                else:
+                                    # Находим общий период дат
+                                    all_dates = combined_df['Дата'].unique()
+                                    all_dates = sorted(all_dates)
+
+                                    # Создаем полный диапазон дат
+                                    if len(all_dates) > 1:
+                                        date_range = pd.date_range(start=all_dates[0], end=all_dates[-1], freq='D')
+                                    else:
+                                        date_range = pd.date_range(start=all_dates[0], periods=30, freq='D')
+
+                                    # Если включен прогноз на следующий год, расширяем диапазон дат
+                                    forecast_date_range = None
+                                    if show_forecast and len(all_dates) > 0:
+                                        last_date = all_dates[-1]
+                                        if isinstance(last_date, pd.Timestamp):
+                                            forecast_start = last_date + pd.Timedelta(days=1)
+                                            forecast_end = forecast_start + pd.DateOffset(years=1)
+                                            forecast_date_range = pd.date_range(start=forecast_start, end=forecast_end, freq='D')
+
+                                    # Проверяем, есть ли данные с артикулами (индивидуальные отчеты)
+                                    has_individual_reports = 'Артикул' in combined_df.columns
+
+                                    # Получаем combo_products_df для расчета базовых цен
+                                    combo_products_df = None
+                                    if combo_report_key in st.session_state.get('combination_reports', {}):
+                                        if 'combo_products_df' in st.session_state['combination_reports'][combo_report_key]:
+                                            combo_products_df = st.session_state['combination_reports'][combo_report_key]['combo_products_df']
+
+                                    # Строим график с тремя вариантами
+                                    fig = go.Figure()
+
+                                    # Для каждой комбинации рассчитываем статистику
+                                    for combo_name in combined_df['Комбинация'].unique() if 'Комбинация' in combined_df.columns else ['Комбинация']:
+                                        if has_individual_reports:
+                                            # Работаем с индивидуальными отчетами товаров
+                                            combo_data = combined_df.copy()
+                                        else:
+                                            combo_data = combined_df[combined_df['Комбинация'] == combo_name].copy() if 'Комбинация' in combined_df.columns else combined_df.copy()
+
+                                        # Сортируем по дате
+                                        combo_data = combo_data.sort_values('Дата')
+
+                                        # Рассчитываем планы для каждого дня отдельно
+                                        # Для каждого дня считаем среднее только по товарам с продажами > 0 в этот день
+
+                                        # Рассчитываем планы для каждого дня на основе исторических данных
+                                        low_plan_values = []
+                                        mid_plan_values = []
+                                        high_plan_values = []
+                                        avg_check_values = []  # Средний чек для каждого дня
+                                        actual_sales_by_date = []  # Фактические продажи по дням
+                                        actual_dates_list = []  # Даты с фактическими данными
+
+                                        # Таблица детализации по дням: дата, продажи каждого товара, среднее для каждого плана
+                                        daily_plan_details = []  # Список словарей с данными по каждому дню
+
+                                        # Параметр для расчета скользящего среднего (количество дней)
+                                        # Собираем все дни с продажами для определения window_size
+                                        all_days_with_sales = []
+                                        for date in date_range:
+                                            if has_individual_reports:
+                                                # Для каждого дня берем только товары с продажами > 0
+                                                day_data = combo_data[
+                                                    (combo_data['Дата'] == date) & 
+                                                    (combo_data['Продажи'] > 0)
+                                                ]
+                                            else:
+                                                day_data = combo_data[
+                                                    (combo_data['Дата'] == date) & 
+                                                    (combo_data['Продажи'] > 0)
+                                                ]
+
+                                            if len(day_data) > 0:
+                                                all_days_with_sales.append(date)
+
+                                        window_size = min(30, len(all_days_with_sales)) if all_days_with_sales else 30
+
+                                        # Собираем исторические данные для расчета тренда
+                                        historical_daily_means = []  # Средние продажи по дням
+
+                                        for idx, current_date in enumerate(date_range):
+                                            if has_individual_reports:
+                                                # Для каждого дня берем только товары с продажами > 0 в этот день
+                                                day_avg_check_no_spp = None
+                                                day_data = combo_data[
+                                                    (combo_data['Дата'] == current_date) & 
+                                                    (combo_data['Продажи'] > 0)
+                                                ]
+
+                                                if len(day_data) > 0:
+                                                    # Считаем среднее продаж только по товарам с продажами в этот день
+                                                    day_sales_mean = day_data['Продажи'].mean()
+                                                    historical_daily_means.append(day_sales_mean)
+
+                                                    # Средний чек по дню (с СПП и без СПП)
+                                                    day_avg_check = None
+                                                    day_avg_check_no_spp = None
+                                                    price_columns_spp = ["Цена с СПП, ₽", "Цена с СПП", "Средняя цена"]
+                                                    price_columns_no_spp = ["Средняя цена без СПП", "Базовая цена, ₽", "Базовая цена"]
+                                                    for price_col in price_columns_spp:
+                                                        if price_col in day_data.columns:
+                                                            price_values = day_data[price_col].dropna()
+                                                            price_values = price_values[price_values > 0]
+                                                            if len(price_values) > 0:
+                                                                day_avg_check = price_values.mean()
+                                                                break
+                                                    for price_col in price_columns_no_spp:
+                                                        if price_col in day_data.columns:
+                                                            price_values = day_data[price_col].dropna()
+                                                            price_values = price_values[price_values > 0]
+                                                            if len(price_values) > 0:
+                                                                day_avg_check_no_spp = price_values.mean()
+                                                                break
+
+                                                    actual_sales_by_date.append(day_sales_mean)
+                                                    actual_dates_list.append(current_date)
+                                                    avg_check_values.append(day_avg_check)
+                                                else:
+                                                    # Для дней без продаж берем данные за этот день из combo_data (Tovar)
+                                                    day_all_data = combo_data[combo_data['Дата'] == current_date]
+                                                    day_avg_check = None
+                                                    day_avg_check_no_spp = None
+                                                    if len(day_all_data) > 0:
+                                                        price_columns_spp = ["Цена с СПП, ₽", "Цена с СПП", "Средняя цена"]
+                                                        price_columns_no_spp = ["Средняя цена без СПП", "Базовая цена, ₽", "Базовая цена"]
+                                                        for price_col in price_columns_spp:
+                                                            if price_col in day_all_data.columns:
+                                                                price_values = day_all_data[price_col].dropna()
+                                                                price_values = price_values[price_values > 0]
+                                                                if len(price_values) > 0:
+                                                                    day_avg_check = price_values.mean()
+                                                                    break
+                                                        for price_col in price_columns_no_spp:
+                                                            if price_col in day_all_data.columns:
+                                                                price_values = day_all_data[price_col].dropna()
+                                                                price_values = price_values[price_values > 0]
+                                                                if len(price_values) > 0:
+                                                                    day_avg_check_no_spp = price_values.mean()
+                                                                    break
+                                                    avg_check_values.append(day_avg_check)
+                                            else:
+                                                # Для агрегированных данных
+                                                day_data = combo_data[
+                                                    (combo_data['Дата'] == current_date) & 
+                                                    (combo_data['Продажи'] > 0)
+                                                ]
+
+                                                if len(day_data) > 0:
+                                                    day_sales_mean = day_data['Продажи'].mean()
+                                                    historical_daily_means.append(day_sales_mean)
+
+                                                    # Средний чек = средняя базовая цена из данных Tovar за этот день
+                                                    day_avg_check = None
+                                                    price_columns = ["Цена с СПП, ₽", "Цена с СПП", "Базовая цена, ₽", "Базовая цена", "Средняя цена"]
+                                                    for price_col in price_columns:
+                                                        if price_col in day_data.columns:
+                                                            price_values = day_data[price_col].dropna()
+                                                            price_values = price_values[price_values > 0]
+                                                            if len(price_values) > 0:
+                                                                day_avg_check = price_values.mean()
+                                                                break
+
+                                                    actual_sales_by_date.append(day_sales_mean)
+                                                    actual_dates_list.append(current_date)
+                                                    avg_check_values.append(day_avg_check)
+                                                else:
+                                                    # Для дней без продаж берем данные за этот день из combo_data (Tovar)
+                                                    day_all_data = combo_data[combo_data['Дата'] == current_date]
+                                                    day_avg_check = None
+                                                    if len(day_all_data) > 0:
+                                                        price_columns = ["Цена с СПП, ₽", "Цена с СПП", "Базовая цена, ₽", "Базовая цена", "Средняя цена"]
+                                                        for price_col in price_columns:
+                                                            if price_col in day_all_data.columns:
+                                                                price_values = day_all_data[price_col].dropna()
+                                                                price_values = price_values[price_values > 0]
+                                                                if len(price_values) > 0:
+                                                                    day_avg_check = price_values.mean()
+                                                                    break
+                                                    avg_check_values.append(day_avg_check)
+
+                                            # Рассчитываем планы для текущего дня на основе ранжирования товаров
+                                            if len(day_data) > 0 and has_individual_reports:
+                                                # Ранжируем товары по продажам в этот день
+                                                day_data_sorted = day_data.sort_values('Продажи', ascending=False)
+
+                                                # Распределяем товары по планам примерно равными долями (по третям)
+                                                # Высокий план = лидеры (топ 33% товаров)
+                                                # Средний план = товары в центре (средние 33%)
+                                                # Низкий план = товары внизу (нижние 34%)
+
+                                                total_products = len(day_data_sorted)
+                                                if total_products > 0:
+                                                    # Высокий план - среднее топ 33% (или минимум 1 товар)
+                                                    top_count = max(1, int(total_products / 3))
+                                                    high_plan = day_data_sorted.head(top_count)['Продажи'].mean()
+
+                                                    # Средний план - среднее центральных 33%
+                                                    mid_start = top_count
+                                                    mid_end = mid_start + max(1, int(total_products / 3))
+                                                    if mid_end > mid_start and mid_end <= total_products:
+                                                        mid_plan = day_data_sorted.iloc[mid_start:mid_end]['Продажи'].mean()
+                                                    else:
+                                                        mid_plan = day_data_sorted.iloc[mid_start:]['Продажи'].mean() if mid_start < total_products else day_data_sorted['Продажи'].mean()
+
+                                                    # Низкий план - среднее нижних 34% (остаток)
+                                                    low_start = mid_end if mid_end <= total_products else mid_start
+                                                    low_plan = day_data_sorted.iloc[low_start:]['Продажи'].mean() if low_start < total_products else 0
+
+                                                    # Собираем данные для таблицы: продажи каждого товара
+                                                    day_items_sales = {}
+                                                    day_items_prices = {}  # Цены товаров для расчета планов по цене
+
+                                                    for item_idx, (_, row) in enumerate(day_data_sorted.iterrows()):
+                                                        sku = str(row.get('Артикул', '')) if 'Артикул' in row and pd.notna(row.get('Артикул')) else f"Товар {item_idx + 1}"
+                                                        sales = row['Продажи']
+                                                        day_items_sales[sku] = sales
+
+                                                        # Получаем цену товара напрямую из row (данные Tovar)
+                                                        price_columns = ["Цена с СПП, ₽", "Цена с СПП", "Базовая цена, ₽", "Базовая цена", "Средняя цена"]
+                                                        for col_name in price_columns:
+                                                            if col_name in row.index:
+                                                                price_val = row[col_name]
+                                                                if pd.notna(price_val) and price_val > 0:
+                                                                    day_items_prices[sku] = float(price_val)
+                                                                    break
+
+                                                    # Рассчитываем планы по цене (низкий, средний, высокий) на основе ранжирования товаров по цене
+                                                    low_price_plan = None
+                                                    mid_price_plan = None
+                                                    high_price_plan = None
+
+                                                    if len(day_items_prices) > 0:
+                                                        # Сортируем товары по цене (от высокой к низкой)
+                                                        sorted_prices = sorted(day_items_prices.items(), key=lambda x: x[1], reverse=True)
+                                                        total_price_items = len(sorted_prices)
+
+                                                        if total_price_items > 0:
+                                                            # Высокий план цены - средняя цена топ 33% товаров (с высокой ценой)
+                                                            top_price_count = max(1, int(total_price_items / 3))
+                                                            high_price_values = [price for _, price in sorted_prices[:top_price_count]]
+                                                            high_price_plan = np.mean(high_price_values) if high_price_values else None
+
+                                                            # Средний план цены - средняя цена центральных 33%
+                                                            mid_price_start = top_price_count
+                                                            mid_price_end = mid_price_start + max(1, int(total_price_items / 3))
+                                                            if mid_price_end > mid_price_start and mid_price_end <= total_price_items:
+                                                                mid_price_values = [price for _, price in sorted_prices[mid_price_start:mid_price_end]]
+                                                            else:
+                                                                mid_price_values = [price for _, price in sorted_prices[mid_price_start:]]
+                                                            mid_price_plan = np.mean(mid_price_values) if mid_price_values else None
+
+                                                            # Низкий план цены - средняя цена нижних 34% (с низкой ценой)
+                                                            low_price_start = mid_price_end if mid_price_end <= total_price_items else mid_price_start
+                                                            low_price_values = [price for _, price in sorted_prices[low_price_start:]]
+                                                            low_price_plan = np.mean(low_price_values) if low_price_values else None
+
+                                                    # Если не удалось рассчитать планы по цене, используем общую среднюю цену
+                                                    if low_price_plan is None or mid_price_plan is None or high_price_plan is None:
+                                                        # Используем day_avg_check (средняя цена из данных Tovar за день)
+                                                        avg_price_for_day = day_avg_check
+
+                                                        # Если нет, используем среднее из day_items_prices
+                                                        if avg_price_for_day is None and len(day_items_prices) > 0:
+                                                            avg_price_for_day = np.mean(list(day_items_prices.values()))
+
+                                                        # Устанавливаем значения для всех планов
+                                                        if avg_price_for_day is not None:
+                                                            if low_price_plan is None:
+                                                                low_price_plan = avg_price_for_day
+                                                            if mid_price_plan is None:
+                                                                mid_price_plan = avg_price_for_day
+                                                            if high_price_plan is None:
+                                                                high_price_plan = avg_price_for_day
+
+                                                    # Добавляем данные дня в таблицу
+                                                    daily_plan_details.append({
+                                                        'Дата': current_date,
+                                                        'Низкий план (среднее)': low_plan,
+                                                        'Средний план (среднее)': mid_plan,
+                                                        'Высокий план (среднее)': high_plan,
+                                                        'Низкий план цены': low_price_plan,
+                                                        'Средний план цены': mid_price_plan,
+                                                        'Высокий план цены': high_price_plan,
+                                                        'Средняя цена': day_avg_check if day_avg_check is not None else None,
+                                                        'Средняя цена без СПП': day_avg_check_no_spp if day_avg_check_no_spp is not None else None,
+                                                        'Товары': day_items_sales
+                                                    })
+                                                else:
+                                                    low_plan = 0
+                                                    mid_plan = 0
+                                                    high_plan = 0
+                                                    # Для дней без продаж используем общую среднюю цену для всех планов
+                                                    avg_price_for_day = day_avg_check if day_avg_check is not None else None
+                                                    daily_plan_details.append({
+                                                        'Дата': current_date,
+                                                        'Низкий план (среднее)': 0,
+                                                        'Средний план (среднее)': 0,
+                                                        'Высокий план (среднее)': 0,
+                                                        'Низкий план цены': avg_price_for_day,
+                                                        'Средний план цены': avg_price_for_day,
+                                                        'Высокий план цены': avg_price_for_day,
+                                                    'Средняя цена': day_avg_check if day_avg_check is not None else None,
+                                                    'Средняя цена без СПП': day_avg_check_no_spp if day_avg_check_no_spp is not None else None,
+                                                        'Товары': {}
+                                                    })
+                                            elif len(historical_daily_means) > 0:
+                                                # Если нет индивидуальных данных, используем исторические средние
+                                                if len(historical_daily_means) >= window_size:
+                                                    recent_data = historical_daily_means[-window_size:]
+                                                else:
+                                                    recent_data = historical_daily_means
+
+                                                # Для агрегированных данных используем статистику
+                                                sales_mean = np.mean(recent_data)
+                                                sales_std = np.std(recent_data) if len(recent_data) > 1 else 0
+
+                                                low_plan = max(0, sales_mean - sales_std)
+                                                mid_plan = sales_mean
+                                                high_plan = sales_mean + sales_std
+
+                                                # Для агрегированных данных используем общую среднюю цену для всех планов
+                                                avg_price_for_day = day_avg_check if day_avg_check is not None else None
+                                                avg_price_for_day_no_spp = day_avg_check_no_spp if day_avg_check_no_spp is not None else None
+
+                                                # Если day_avg_check None, пробуем получить из combo_products_df
+                                                if avg_price_for_day is None and combo_products_df is not None and len(combo_products_df) > 0:
+                                                    price_columns = ["Базовая цена", "базовая цена", "Базовая цена, ₽", "Средняя цена без СПП", "Средняя цена", "Цена", "цена"]
+                                                    for col_name in price_columns:
+                                                        if col_name in combo_products_df.columns:
+                                                            avg_price_for_day = combo_products_df[col_name].mean()
+                                                            if pd.notna(avg_price_for_day) and avg_price_for_day > 0:
+                                                                break
+                                                    if "Средняя цена без СПП" in combo_products_df.columns:
+                                                        avg_price_for_day_no_spp = combo_products_df["Средняя цена без СПП"].mean()
+
+                                                avg_price_for_day_no_spp = None
+                                                if combo_products_df is not None and len(combo_products_df) > 0:
+                                                    if "Средняя цена без СПП" in combo_products_df.columns:
+                                                        avg_price_for_day_no_spp = combo_products_df["Средняя цена без СПП"].mean()
+
+                                                # Добавляем данные дня в таблицу (для агрегированных данных)
+                                                daily_plan_details.append({
+                                                    'Дата': current_date,
+                                                    'Низкий план (среднее)': low_plan,
+                                                    'Средний план (среднее)': mid_plan,
+                                                    'Высокий план (среднее)': high_plan,
+                                                    'Низкий план цены': avg_price_for_day,
+                                                    'Средний план цены': avg_price_for_day,
+                                                    'Высокий план цены': avg_price_for_day,
+                                                    'Средняя цена': day_avg_check if day_avg_check is not None else avg_price_for_day,
+                                                    'Средняя цена без СПП': day_avg_check_no_spp if day_avg_check_no_spp is not None else avg_price_for_day_no_spp,
+                                                    'Товары': {}  # Нет данных по отдельным товарам
+                                                })
+                                            else:
+                                                # Если нет исторических данных
+                                                low_plan = 0
+                                                mid_plan = 0
+                                                high_plan = 0
+
+                                                # Для дней без исторических данных используем общую среднюю цену для всех планов
+                                                avg_price_for_day = day_avg_check if day_avg_check is not None else None
+                                                avg_price_for_day_no_spp = (
+                                                    day_avg_check_no_spp
+                                                    if day_avg_check_no_spp is not None
+                                                    else avg_price_for_day
+                                                )
+
+                                                # Если day_avg_check None, пробуем получить из combo_products_df
+                                                if avg_price_for_day is None and combo_products_df is not None and len(combo_products_df) > 0:
+                                                    price_columns = ["Базовая цена", "базовая цена", "Базовая цена, ₽", "Средняя цена без СПП", "Средняя цена", "Цена", "цена"]
+                                                    for col_name in price_columns:
+                                                        if col_name in combo_products_df.columns:
+                                                            avg_price_for_day = combo_products_df[col_name].mean()
+                                                            if pd.notna(avg_price_for_day) and avg_price_for_day > 0:
+                                                                break
+
+                                                daily_plan_details.append({
+                                                    'Дата': current_date,
+                                                    'Низкий план (среднее)': 0,
+                                                    'Средний план (среднее)': 0,
+                                                    'Высокий план (среднее)': 0,
+                                                    'Низкий план цены': avg_price_for_day,
+                                                    'Средний план цены': avg_price_for_day,
+                                                    'Высокий план цены': avg_price_for_day,
+                                                    'Средняя цена': day_avg_check if day_avg_check is not None else avg_price_for_day,
+                                                    'Средняя цена без СПП': day_avg_check_no_spp if day_avg_check_no_spp is not None else avg_price_for_day_no_spp,
+                                                    'Товары': {}
+                                                })
+
+                                            low_plan_values.append(low_plan)
+                                            mid_plan_values.append(mid_plan)
+                                            high_plan_values.append(high_plan)
+
+                                        # Сохраняем планы для прогноза (нужно для дублирования на следующий год)
+                                        historical_low_plans = []
+                                        historical_mid_plans = []
+                                        historical_high_plans = []
+
+                                        # Пересчитываем планы для всех дней, чтобы сохранить их для прогноза
+                                        for idx, current_date in enumerate(date_range):
+                                            if has_individual_reports:
+                                                day_data = combo_data[
+                                                    (combo_data['Дата'] == current_date) & 
+                                                    (combo_data['Продажи'] > 0)
+                                                ]
+
+                                                if len(day_data) > 0:
+                                                    day_data_sorted = day_data.sort_values('Продажи', ascending=False)
+                                                    total_products = len(day_data_sorted)
+                                                    if total_products > 0:
+                                                        top_count = max(1, int(total_products * 0.25))
+                                                        high_plan_val = day_data_sorted.head(top_count)['Продажи'].mean()
+
+                                                        mid_start = max(0, int(total_products * 0.25))
+                                                        mid_end = min(total_products, int(total_products * 0.75))
+                                                        if mid_end > mid_start:
+                                                            mid_plan_val = day_data_sorted.iloc[mid_start:mid_end]['Продажи'].mean()
+                                                        else:
+                                                            mid_plan_val = day_data_sorted['Продажи'].mean()
+
+                                                        bottom_count = max(1, int(total_products * 0.25))
+                                                        low_plan_val = day_data_sorted.tail(bottom_count)['Продажи'].mean()
+
+                                                        historical_low_plans.append(low_plan_val)
+                                                        historical_mid_plans.append(mid_plan_val)
+                                                        historical_high_plans.append(high_plan_val)
+                                                    else:
+                                                        historical_low_plans.append(0)
+                                                        historical_mid_plans.append(0)
+                                                        historical_high_plans.append(0)
+                                                else:
+                                                    historical_low_plans.append(0)
+                                                    historical_mid_plans.append(0)
+                                                    historical_high_plans.append(0)
+                                            else:
+                                                # Для агрегированных данных используем уже рассчитанные планы
+                                                if idx < len(low_plan_values):
+                                                    historical_low_plans.append(low_plan_values[idx])
+                                                    historical_mid_plans.append(mid_plan_values[idx])
+                                                    historical_high_plans.append(high_plan_values[idx])
+                                                else:
+                                                    historical_low_plans.append(0)
+                                                    historical_mid_plans.append(0)
+                                                    historical_high_plans.append(0)
+
+                                        # Добавляем линии плана (динамические по дням)
+                                        fig.add_trace(go.Scatter(
+                                            x=date_range,
+                                            y=low_plan_values,
+                                            mode='lines',
+                                            name=f'{combo_name} - Низкий план',
+                                            line=dict(color='red', width=2),
+                                            hovertemplate='Дата: %{x|%d.%m.%Y}<br>Низкий план: %{y:.1f}<extra></extra>'
+                                        ))
+
+                                        fig.add_trace(go.Scatter(
+                                            x=date_range,
+                                            y=mid_plan_values,
+                                            mode='lines',
+                                            name=f'{combo_name} - Средний план',
+                                            line=dict(color='orange', width=2),
+                                            hovertemplate='Дата: %{x|%d.%m.%Y}<br>Средний план: %{y:.1f}<extra></extra>'
+                                        ))
+
+                                        fig.add_trace(go.Scatter(
+                                            x=date_range,
+                                            y=high_plan_values,
+                                            mode='lines',
+                                            name=f'{combo_name} - Высокий план',
+                                            line=dict(color='green', width=2),
+                                            hovertemplate='Дата: %{x|%d.%m.%Y}<br>Высокий план: %{y:.1f}<extra></extra>'
+                                        ))
+
+                                        # Добавляем среднюю цену на график (вторая ось Y)
+                                        if avg_check_values and any(v is not None and pd.notna(v) for v in avg_check_values):
+                                            # Фильтруем значения для дат, где есть данные
+                                            avg_check_dates = []
+                                            avg_check_prices = []
+                                            for i, date_val in enumerate(date_range):
+                                                if i < len(avg_check_values) and avg_check_values[i] is not None and pd.notna(avg_check_values[i]):
+                                                    avg_check_dates.append(date_val)
+                                                    avg_check_prices.append(avg_check_values[i])
+
+                                            if len(avg_check_prices) > 0:
+                                                fig.add_trace(go.Scatter(
+                                                    x=avg_check_dates,
+                                                    y=avg_check_prices,
+                                                    mode='lines+markers',
+                                                    name='Средняя цена, ₽',
+                                                    line=dict(color='purple', width=2),
+                                                    yaxis='y2',
+                                                    hovertemplate='Дата: %{x|%d.%m.%Y}<br>Средняя цена: %{y:.2f} ₽<extra></extra>'
+                                                ))
+
+                                        # Добавляем фактические данные (если есть)
+                                        if len(actual_dates_list) > 0:
+                                            fig.add_trace(go.Scatter(
+                                                x=actual_dates_list,
+                                                y=actual_sales_by_date,
+                                                mode='lines+markers',
+                                                name=f'{combo_name} - Факт',
+                                                line=dict(color='blue', width=2),
+                                                marker=dict(size=6),
+                                                hovertemplate='Дата: %{x|%d.%m.%Y}<br>Продажи (факт): %{y:.1f}<extra></extra>',
+                                                connectgaps=False,  # Не соединять пропуски
+                                                yaxis='y'  # Основная ось Y
+                                            ))
+
+                                        # Прогноз на следующий год будет в отдельном графике (см. ниже)
+
+                                    # Настройка графика
+                                    layout_updates = {
+                                        'title': 'План продаж: Низкий, Средний, Высокий варианты',
+                                        'xaxis_title': 'Дата',
+                                        'yaxis_title': 'Продажи, шт',
+                                        'hovermode': 'x unified',
+                                        'height': 600,
+                                        'legend': dict(
+                                            orientation="v",
+                                            yanchor="top",
+                                            y=1,
+                                            xanchor="left",
+                                            x=1.01
+                                        )
+                                    }
+
+                                    # Добавляем вторую ось Y для средней цены, если она есть на графике
+                                    if avg_check_values and any(v is not None and pd.notna(v) for v in avg_check_values):
+                                        layout_updates['yaxis2'] = dict(
+                                            title='Средняя цена, ₽',
+                                            overlaying='y',
+                                            side='right'
+                                        )
+
+                                    fig.update_layout(**layout_updates)
+
+                                    st.plotly_chart(fig, use_container_width=True, key=f"sales_plan_chart_{selected_combo_key}")
+
+                                    # График 1: План на загруженный период (без роста, сухие данные)
+                                    if show_forecast and date_from and date_to and len(historical_daily_means) > 0:
+                                        st.markdown("#### 🔮 План на загруженный период")
+
+                                        # Создаем диапазон дат для загруженного периода
+                                        loaded_period_date_range = pd.date_range(start=date_from, end=date_to, freq='D')
+
+                                        # Создаем график для загруженного периода (без роста)
+                                        fig_loaded_period = go.Figure()
+
+                                        # Берем планы для загруженного периода без роста (сухие данные)
+                                        loaded_low_values = []
+                                        loaded_mid_values = []
+                                        loaded_high_values = []
+                                        loaded_avg_check_values = []
+
+                                        # Для каждого дня в загруженном периоде берем соответствующий день из date_range
+                                        for i, loaded_date in enumerate(loaded_period_date_range):
+                                            # Находим индекс в date_range, который соответствует этому дню
+                                            # Если загруженный период короче date_range, берем соответствующий день
+                                            # Если длиннее, циклически повторяем
+                                            date_idx = i % len(low_plan_values) if len(low_plan_values) > 0 else 0
+
+                                            # Берем планы без роста (сухие данные)
+                                            loaded_low = low_plan_values[date_idx] if date_idx < len(low_plan_values) else (low_plan_values[-1] if low_plan_values else 0)
+                                            loaded_mid = mid_plan_values[date_idx] if date_idx < len(mid_plan_values) else (mid_plan_values[-1] if mid_plan_values else 0)
+                                            loaded_high = high_plan_values[date_idx] if date_idx < len(high_plan_values) else (high_plan_values[-1] if high_plan_values else 0)
+
+                                            loaded_low_values.append(loaded_low)
+                                            loaded_mid_values.append(loaded_mid)
+                                            loaded_high_values.append(loaded_high)
+
+                                            # Средний чек
+                                            if date_idx < len(avg_check_values) and avg_check_values[date_idx] is not None:
+                                                loaded_avg_check_values.append(avg_check_values[date_idx])
+                                            else:
+                                                loaded_avg_check_values.append(None)
+
+                                        # Добавляем линии плана на загруженный период (без роста)
+                                        fig_loaded_period.add_trace(go.Scatter(
+                                            x=loaded_period_date_range,
+                                            y=loaded_low_values,
+                                            mode='lines',
+                                            name=f'{combo_name} - Низкий план',
+                                            line=dict(color='red', width=2),
+                                            hovertemplate='Дата: %{x|%d.%m.%Y}<br>Низкий план: %{y:.1f}<extra></extra>'
+                                        ))
+
+                                        fig_loaded_period.add_trace(go.Scatter(
+                                            x=loaded_period_date_range,
+                                            y=loaded_mid_values,
+                                            mode='lines',
+                                            name=f'{combo_name} - Средний план',
+                                            line=dict(color='orange', width=2),
+                                            hovertemplate='Дата: %{x|%d.%m.%Y}<br>Средний план: %{y:.1f}<extra></extra>'
+                                        ))
+
+                                        fig_loaded_period.add_trace(go.Scatter(
+                                            x=loaded_period_date_range,
+                                            y=loaded_high_values,
+                                            mode='lines',
+                                            name=f'{combo_name} - Высокий план',
+                                            line=dict(color='green', width=2),
+                                            hovertemplate='Дата: %{x|%d.%m.%Y}<br>Высокий план: %{y:.1f}<extra></extra>'
+                                        ))
+
+                                        # Добавляем среднюю цену, если есть
+                                        if loaded_avg_check_values and any(v is not None and pd.notna(v) for v in loaded_avg_check_values):
+                                            loaded_avg_check_dates = []
+                                            loaded_avg_check_prices = []
+                                            for i, date_val in enumerate(loaded_period_date_range):
+                                                if i < len(loaded_avg_check_values) and loaded_avg_check_values[i] is not None and pd.notna(loaded_avg_check_values[i]):
+                                                    loaded_avg_check_dates.append(date_val)
+                                                    loaded_avg_check_prices.append(loaded_avg_check_values[i])
+
+                                            if len(loaded_avg_check_prices) > 0:
+                                                fig_loaded_period.add_trace(go.Scatter(
+                                                    x=loaded_avg_check_dates,
+                                                    y=loaded_avg_check_prices,
+                                                    mode='lines+markers',
+                                                    name='Средняя цена, ₽',
+                                                    line=dict(color='purple', width=2),
+                                                    yaxis='y2',
+                                                    hovertemplate='Дата: %{x|%d.%m.%Y}<br>Средняя цена: %{y:.2f} ₽<extra></extra>'
+                                                ))
+
+                                        # Настройка графика загруженного периода
+                                        date_from_str = date_from.strftime("%d.%m.%Y")
+                                        date_to_str = date_to.strftime("%d.%m.%Y")
+                                        loaded_period_layout = {
+                                            'title': f'План на загруженный период ({date_from_str} - {date_to_str})',
+                                            'xaxis_title': 'Дата',
+                                            'yaxis_title': 'Продажи, шт',
+                                            'hovermode': 'x unified',
+                                            'height': 600,
+                                            'legend': dict(
+                                                orientation="v",
+                                                yanchor="top",
+                                                y=1,
+                                                xanchor="left",
+                                                x=1.01
+                                            )
+                                        }
+
+                                        # Добавляем вторую ось Y для средней цены, если она есть
+                                        if loaded_avg_check_values and any(v is not None and pd.notna(v) for v in loaded_avg_check_values):
+                                            loaded_period_layout['yaxis2'] = dict(
+                                                title='Средняя цена, ₽',
+                                                overlaying='y',
+                                                side='right'
+                                            )
+
+                                        fig_loaded_period.update_layout(**loaded_period_layout)
+
+                                        st.plotly_chart(fig_loaded_period, use_container_width=True, key=f"loaded_period_chart_{selected_combo_key}")
+
+                                    # График 2: План на следующий год (с ростом тренда)
+                                    if show_forecast and forecast_date_range is not None and len(low_plan_values) > 0:
+                                        st.markdown("#### 🔮 План на следующий год")
+
+                                        # Создаем отдельный график для прогноза на следующий год с ростом
+                                        fig_forecast = go.Figure()
+
+                                        # Рассчитываем прогнозные значения с учетом процента роста
+                                        growth_factor = 1 + (growth_percent / 100.0)
+
+                                        # Дублируем данные предыдущего года день за днем с учетом роста
+                                        forecast_low_values = []
+                                        forecast_mid_values = []
+                                        forecast_high_values = []
+                                        forecast_avg_check_values = []
+
+                                        # Получаем средние чеки предыдущего года
+                                        previous_year_avg_checks = [v for v in avg_check_values if v is not None]
+
+                                        # Для каждого дня в прогнозе берем соответствующий день предыдущего года
+                                        for i, forecast_date in enumerate(forecast_date_range):
+                                            # Используем индекс по порядку дней (циклически повторяем данные предыдущего года)
+                                            prev_year_idx = i % len(low_plan_values) if len(low_plan_values) > 0 else 0
+
+                                            # Берем планы из предыдущего года
+                                            prev_year_low = low_plan_values[prev_year_idx] if prev_year_idx < len(low_plan_values) else (low_plan_values[-1] if low_plan_values else 0)
+                                            prev_year_mid = mid_plan_values[prev_year_idx] if prev_year_idx < len(mid_plan_values) else (mid_plan_values[-1] if mid_plan_values else 0)
+                                            prev_year_high = high_plan_values[prev_year_idx] if prev_year_idx < len(high_plan_values) else (high_plan_values[-1] if high_plan_values else 0)
+
+                                            # Применяем рост тренда к каждому плану
+                                            forecast_low = max(0, prev_year_low * growth_factor)
+                                            forecast_mid = max(0, prev_year_mid * growth_factor)
+                                            forecast_high = max(0, prev_year_high * growth_factor)
+
+                                            forecast_low_values.append(forecast_low)
+                                            forecast_mid_values.append(forecast_mid)
+                                            forecast_high_values.append(forecast_high)
+
+                                            # Средний чек для соответствующего дня предыдущего года
+                                            check_idx = i % len(previous_year_avg_checks) if len(previous_year_avg_checks) > 0 else 0
+                                            if check_idx < len(previous_year_avg_checks):
+                                                prev_year_avg_check = previous_year_avg_checks[check_idx]
+                                            else:
+                                                prev_year_avg_check = previous_year_avg_checks[-1] if previous_year_avg_checks else None
+
+                                            forecast_avg_check_values.append(prev_year_avg_check)
+
+                                        # Добавляем линии плана на следующий год (с ростом)
+                                        fig_forecast.add_trace(go.Scatter(
+                                            x=forecast_date_range,
+                                            y=forecast_low_values,
+                                            mode='lines',
+                                            name=f'{combo_name} - Низкий план',
+                                            line=dict(color='red', width=2),
+                                            hovertemplate='Дата: %{x|%d.%m.%Y}<br>Низкий план: %{y:.0f}<extra></extra>'
+                                        ))
+
+                                        fig_forecast.add_trace(go.Scatter(
+                                            x=forecast_date_range,
+                                            y=forecast_mid_values,
+                                            mode='lines',
+                                            name=f'{combo_name} - Средний план',
+                                            line=dict(color='orange', width=2),
+                                            hovertemplate='Дата: %{x|%d.%m.%Y}<br>Средний план: %{y:.0f}<extra></extra>'
+                                        ))
+
+                                        fig_forecast.add_trace(go.Scatter(
+                                            x=forecast_date_range,
+                                            y=forecast_high_values,
+                                            mode='lines',
+                                            name=f'{combo_name} - Высокий план',
+                                            line=dict(color='green', width=2),
+                                            hovertemplate='Дата: %{x|%d.%m.%Y}<br>Высокий план: %{y:.0f}<extra></extra>'
+                                        ))
+
+                                        # Добавляем среднюю цену, если есть
+                                        if forecast_avg_check_values and any(v is not None and pd.notna(v) for v in forecast_avg_check_values):
+                                            forecast_avg_check_dates = []
+                                            forecast_avg_check_prices = []
+                                            for i, date_val in enumerate(forecast_date_range):
+                                                if i < len(forecast_avg_check_values) and forecast_avg_check_values[i] is not None and pd.notna(forecast_avg_check_values[i]):
+                                                    forecast_avg_check_dates.append(date_val)
+                                                    forecast_avg_check_prices.append(forecast_avg_check_values[i])
+
+                                            if len(forecast_avg_check_prices) > 0:
+                                                fig_forecast.add_trace(go.Scatter(
+                                                    x=forecast_avg_check_dates,
+                                                    y=forecast_avg_check_prices,
+                                                    mode='lines+markers',
+                                                    name='Средняя цена, ₽',
+                                                    line=dict(color='purple', width=2),
+                                                    yaxis='y2',
+                                                    hovertemplate='Дата: %{x|%d.%m.%Y}<br>Средняя цена: %{y:.2f} ₽<extra></extra>'
+                                                ))
+
+                                        # Настройка графика прогноза на следующий год
+                                        forecast_layout = {
+                                            'title': f'План продаж на следующий год (рост {growth_percent:.1f}%)',
+                                            'xaxis_title': 'Дата',
+                                            'yaxis_title': 'Продажи, шт',
+                                            'hovermode': 'x unified',
+                                            'height': 600,
+                                            'legend': dict(
+                                                orientation="v",
+                                                yanchor="top",
+                                                y=1,
+                                                xanchor="left",
+                                                x=1.01
+                                            )
+                                        }
+
+                                        # Добавляем вторую ось Y для средней цены, если она есть
+                                        if forecast_avg_check_values and any(v is not None and pd.notna(v) for v in forecast_avg_check_values):
+                                            forecast_layout['yaxis2'] = dict(
+                                                title='Средняя цена, ₽',
+                                                overlaying='y',
+                                                side='right'
+                                            )
+
+                                        fig_forecast.update_layout(**forecast_layout)
+
+                                        st.plotly_chart(fig_forecast, use_container_width=True, key=f"forecast_chart_{selected_combo_key}")
+
+                                    # Таблица детализации по дням
+                                    if len(daily_plan_details) > 0:
+                                        st.markdown("---")
+                                        st.markdown("#### 📋 Детализация планов по дням")
+
+                                        # Галочка для отображения таблицы с учетом тренда
+                                        show_table_with_trend = st.checkbox(
+                                            "Показать таблицу с учетом роста тренда",
+                                            value=False,
+                                            key=f"show_table_trend_{selected_combo_key}",
+                                            help="Если включено, таблица будет включать данные следующего года с учетом роста тренда"
+                                        )
+
+                                        # Формируем DataFrame для таблицы
+                                        table_data = []
+                                        all_skus = set()
+
+                                        # Выбираем данные для таблицы (с трендом или без)
+                                        if show_table_with_trend:
+                                            # Получаем combined_plan_details из session_state (он всегда должен быть там сохранен)
+                                            plan_table_key = f'plan_details_table_{selected_combo_key}'
+                                            if plan_table_key in st.session_state and len(st.session_state[plan_table_key]) > 0:
+                                                table_source = st.session_state[plan_table_key]
+                                            else:
+                                                # Если нет в session_state, используем daily_plan_details
+                                                table_source = daily_plan_details
+                                        else:
+                                            table_source = daily_plan_details
+
+                                        # Собираем все уникальные артикулы
+                                        for day_detail in table_source:
+                                            all_skus.update(day_detail.get('Товары', {}).keys())
+
+                                        # Сортируем артикулы для стабильного порядка
+                                        sorted_skus = sorted(list(all_skus))
+
+                                        # Формируем строки таблицы
+                                        for day_detail in table_source:
+                                            # Получаем цены по планам
+                                            low_price_plan = day_detail.get('Низкий план цены')
+                                            mid_price_plan = day_detail.get('Средний план цены')
+                                            high_price_plan = day_detail.get('Высокий план цены')
+
+                                            # Используем fallback на 'Средняя цена', если планы по цене None
+                                            if low_price_plan is None:
+                                                low_price_plan = day_detail.get('Средняя цена')
+                                            if mid_price_plan is None:
+                                                mid_price_plan = day_detail.get('Средняя цена')
+                                            if high_price_plan is None:
+                                                high_price_plan = day_detail.get('Средняя цена')
+
+                                            row = {
+                                                'Дата': day_detail['Дата'].strftime('%d.%m.%Y') if hasattr(day_detail['Дата'], 'strftime') else str(day_detail['Дата']),
+                                                'Низкий план (среднее)': f"{day_detail['Низкий план (среднее)']:.1f}",
+                                                'Низкий план (средняя цена), ₽': f"{low_price_plan:.2f}" if low_price_plan is not None and pd.notna(low_price_plan) else "—",
+                                                'Средний план (среднее)': f"{day_detail['Средний план (среднее)']:.1f}",
+                                                'Средний план (средняя цена), ₽': f"{mid_price_plan:.2f}" if mid_price_plan is not None and pd.notna(mid_price_plan) else "—",
+                                                'Высокий план (среднее)': f"{day_detail['Высокий план (среднее)']:.1f}",
+                                                'Высокий план (средняя цена), ₽': f"{high_price_plan:.2f}" if high_price_plan is not None and pd.notna(high_price_plan) else "—"
+                                            }
+
+                                            # Добавляем продажи каждого товара
+                                            for sku in sorted_skus:
+                                                sales = day_detail.get('Товары', {}).get(sku, 0)
+                                                row[sku] = f"{sales:.1f}" if sales > 0 else "0"
+
+                                            table_data.append(row)
+
+                                        # Создаем DataFrame
+                                        plan_details_df = pd.DataFrame(table_data)
+
+                                        # Отображаем таблицу (только для загруженного периода, без роста)
+                                        st.dataframe(plan_details_df, use_container_width=True, hide_index=True)
+
+                                        # График цены (низкий, средний, высокий план)
+                                        if len(daily_plan_details) > 0:
+                                            st.markdown("#### 💰 График средней цены по планам")
+
+                                            # Собираем данные для графика цены
+                                            price_dates = []
+                                            price_low_values = []
+                                            price_mid_values = []
+                                            price_high_values = []
+
+                                            for day_detail in daily_plan_details:
+                                                price_dates.append(day_detail['Дата'])
+                                                low_price = day_detail.get('Низкий план цены')
+                                                mid_price = day_detail.get('Средний план цены')
+                                                high_price = day_detail.get('Высокий план цены')
+
+                                                # Используем fallback на 'Средняя цена', если планы по цене None
+                                                if low_price is None:
+                                                    low_price = day_detail.get('Средняя цена')
+                                                if mid_price is None:
+                                                    mid_price = day_detail.get('Средняя цена')
+                                                if high_price is None:
+                                                    high_price = day_detail.get('Средняя цена')
+
+                                                price_low_values.append(low_price if low_price is not None and pd.notna(low_price) else None)
+                                                price_mid_values.append(mid_price if mid_price is not None and pd.notna(mid_price) else None)
+                                                price_high_values.append(high_price if high_price is not None and pd.notna(high_price) else None)
+
+                                            # Создаем график цены
+                                            fig_price = go.Figure()
+
+                                            # Фильтруем значения для отображения (убираем None)
+                                            price_low_filtered = [(d, v) for d, v in zip(price_dates, price_low_values) if v is not None]
+                                            price_mid_filtered = [(d, v) for d, v in zip(price_dates, price_mid_values) if v is not None]
+                                            price_high_filtered = [(d, v) for d, v in zip(price_dates, price_high_values) if v is not None]
+
+                                            if price_low_filtered:
+                                                dates_low, values_low = zip(*price_low_filtered)
+                                                fig_price.add_trace(go.Scatter(
+                                                    x=list(dates_low),
+                                                    y=list(values_low),
+                                                    mode='lines',
+                                                    name='Низкий план цены',
+                                                    line=dict(color='red', width=2),
+                                                    hovertemplate='Дата: %{x|%d.%m.%Y}<br>Низкий план цены: %{y:.2f} ₽<extra></extra>'
+                                                ))
+
+                                            if price_mid_filtered:
+                                                dates_mid, values_mid = zip(*price_mid_filtered)
+                                                fig_price.add_trace(go.Scatter(
+                                                    x=list(dates_mid),
+                                                    y=list(values_mid),
+                                                    mode='lines',
+                                                    name='Средний план цены',
+                                                    line=dict(color='orange', width=2),
+                                                    hovertemplate='Дата: %{x|%d.%m.%Y}<br>Средний план цены: %{y:.2f} ₽<extra></extra>'
+                                                ))
+
+                                            if price_high_filtered:
+                                                dates_high, values_high = zip(*price_high_filtered)
+                                                fig_price.add_trace(go.Scatter(
+                                                    x=list(dates_high),
+                                                    y=list(values_high),
+                                                    mode='lines',
+                                                    name='Высокий план цены',
+                                                    line=dict(color='green', width=2),
+                                                    hovertemplate='Дата: %{x|%d.%m.%Y}<br>Высокий план цены: %{y:.2f} ₽<extra></extra>'
+                                                ))
+
+                                            # Настройка графика цены
+                                            price_layout = {
+                                                'title': 'Средняя цена по планам (низкий, средний, высокий)',
+                                                'xaxis_title': 'Дата',
+                                                'yaxis_title': 'Цена, ₽',
+                                                'hovermode': 'x unified',
+                                                'height': 600,
+                                                'legend': dict(
+                                                    orientation="v",
+                                                    yanchor="top",
+                                                    y=1,
+                                                    xanchor="left",
+                                                    x=1.01
+                                                )
+                                            }
+
+                                            fig_price.update_layout(**price_layout)
+
+                                            st.plotly_chart(fig_price, use_container_width=True, key=f"price_chart_{selected_combo_key}")
+
+                                        # Создаем таблицу планов для 2026 года с учетом роста тренда
+                                        forecast_plan_details = []
+
+                                        # Определяем forecast_date_range, если он еще не определен
+                                        if 'forecast_date_range' not in locals() or forecast_date_range is None:
+                                            if len(date_range) > 0:
+                                                last_date = date_range[-1]
+                                                if isinstance(last_date, pd.Timestamp):
+                                                    forecast_start = last_date + pd.Timedelta(days=1)
+                                                    forecast_end = forecast_start + pd.DateOffset(years=1)
+                                                    forecast_date_range = pd.date_range(start=forecast_start, end=forecast_end, freq='D')
+
+                                        # Проверяем, есть ли данные для прогноза
+                                        if show_forecast and forecast_date_range is not None and len(daily_plan_details) > 0:
+                                            # Получаем процент роста
+                                            growth_factor = 1 + (growth_percent / 100.0)
+
+                                            # Создаем таблицу планов для 2026 года, дублируя структуру текущего года
+                                            for i, forecast_date in enumerate(forecast_date_range):
+                                                # Используем индекс по порядку дней (циклически повторяем данные предыдущего года)
+                                                prev_year_idx = i % len(daily_plan_details) if len(daily_plan_details) > 0 else 0
+
+                                                if prev_year_idx < len(daily_plan_details):
+                                                    prev_day_detail = daily_plan_details[prev_year_idx]
+
+                                                    # Применяем рост тренда к планам
+                                                    forecast_low_plan = max(0, prev_day_detail['Низкий план (среднее)'] * growth_factor)
+                                                    forecast_mid_plan = max(0, prev_day_detail['Средний план (среднее)'] * growth_factor)
+                                                    forecast_high_plan = max(0, prev_day_detail['Высокий план (среднее)'] * growth_factor)
+
+                                                    # Применяем рост к продажам каждого товара
+                                                    forecast_items = {}
+                                                    for sku, sales in prev_day_detail['Товары'].items():
+                                                        forecast_items[sku] = max(0, sales * growth_factor)
+
+                                                    # Получаем цены из исходного дня (цены не меняются при росте)
+                                                    prev_low_price = prev_day_detail.get('Низкий план цены')
+                                                    prev_mid_price = prev_day_detail.get('Средний план цены')
+                                                    prev_high_price = prev_day_detail.get('Высокий план цены')
+                                                    prev_avg_price = prev_day_detail.get('Средняя цена')
+
+                                                    # Добавляем день в таблицу прогноза
+                                                    forecast_plan_details.append({
+                                                        'Дата': forecast_date,
+                                                        'Низкий план (среднее)': forecast_low_plan,
+                                                        'Средний план (среднее)': forecast_mid_plan,
+                                                        'Высокий план (среднее)': forecast_high_plan,
+                                                        'Низкий план цены': prev_low_price,
+                                                        'Средний план цены': prev_mid_price,
+                                                        'Высокий план цены': prev_high_price,
+                                                        'Средняя цена': prev_avg_price,
+                                                        'Товары': forecast_items
+                                                    })
+
+                                        # Объединяем таблицы текущего года и прогноза на 2026 год
+                                        combined_plan_details = daily_plan_details.copy()
+                                        combined_plan_details.extend(forecast_plan_details)
+
+                                        # Сохраняем объединенную таблицу в session_state для использования во вкладке "Расчет заказа" и в таблице детализации
+                                        st.session_state[f'plan_details_table_{selected_combo_key}'] = combined_plan_details
+                                    else:
+                                        # Если нет прогноза, используем только daily_plan_details, но все равно сохраняем в session_state
+                                        combined_plan_details = daily_plan_details.copy()
+                                        st.session_state[f'plan_details_table_{selected_combo_key}'] = combined_plan_details
+
+                                    # Общий KPI после графиков
+                                    st.markdown("---")
+                                    st.markdown("#### 📊 Общие KPI")
+
+                                    # Рассчитываем общие KPI на основе всех данных
+                                    if len(actual_sales_by_date) > 0:
+                                        total_sales_all = sum(actual_sales_by_date)
+                                        avg_sales_per_day_all = np.mean(actual_sales_by_date)
+                                        days_with_sales_all = len(actual_sales_by_date)
+                                        total_days_all = len(date_range)
+
+                                        # Средний чек из базовой цены
+                                        avg_check_all = base_price if base_price else 0
+
+                                        # Выручка
+                                        revenue_all = total_sales_all * avg_check_all if avg_check_all > 0 else 0
+
+                                        # Максимальные и минимальные продажи (среднее по товарам в день)
+                                        max_sales_all = max(actual_sales_by_date) if actual_sales_by_date else 0
+                                        min_sales_all = min(actual_sales_by_date) if actual_sales_by_date else 0
+
+                                        # Планы (средние значения)
+                                        avg_low_plan = np.mean([v for v in low_plan_values if v > 0]) if any(v > 0 for v in low_plan_values) else 0
+                                        avg_mid_plan = np.mean([v for v in mid_plan_values if v > 0]) if any(v > 0 for v in mid_plan_values) else 0
+                                        avg_high_plan = np.mean([v for v in high_plan_values if v > 0]) if any(v > 0 for v in high_plan_values) else 0
+
+                                        # Рассчитываем рост/падение в процентах для общих KPI
+                                        # Сравниваем первую и вторую половину периода
+                                        if len(actual_sales_by_date) > 1:
+                                            mid_point = len(actual_sales_by_date) // 2
+                                            first_half_sales = actual_sales_by_date[:mid_point]
+                                            second_half_sales = actual_sales_by_date[mid_point:]
+
+                                            first_half_avg = np.mean(first_half_sales) if len(first_half_sales) > 0 else 0
+                                            second_half_avg = np.mean(second_half_sales) if len(second_half_sales) > 0 else 0
+
+                                            sales_growth_all = None
+                                            if first_half_avg > 0:
+                                                sales_growth_all = ((second_half_avg - first_half_avg) / first_half_avg) * 100
+
+                                            # Средний чек для первой и второй половины
+                                            first_half_checks = [avg_check_values[i] for i in range(len(avg_check_values)) if i < mid_point and avg_check_values[i] is not None]
+                                            second_half_checks = [avg_check_values[i] for i in range(len(avg_check_values)) if i >= mid_point and avg_check_values[i] is not None]
+
+                                            first_half_avg_check = np.mean(first_half_checks) if len(first_half_checks) > 0 else avg_check_all
+                                            second_half_avg_check = np.mean(second_half_checks) if len(second_half_checks) > 0 else avg_check_all
+
+                                            avg_check_growth_all = None
+                                            if first_half_avg_check > 0:
+                                                avg_check_growth_all = ((second_half_avg_check - first_half_avg_check) / first_half_avg_check) * 100
+                                        else:
+                                            sales_growth_all = None
+                                            avg_check_growth_all = None
+
+                                        # Отображаем общие KPI
+                                        kpi_all_col1, kpi_all_col2, kpi_all_col3, kpi_all_col4 = st.columns(4)
+
+                                        with kpi_all_col1:
+                                            if sales_growth_all is not None:
+                                                st.metric("💰 Общие продажи", f"{total_sales_all:,.0f} шт", delta=f"{sales_growth_all:+.1f}%")
+                                            else:
+                                                st.metric("💰 Общие продажи", f"{total_sales_all:,.0f} шт")
+                                            st.metric("📈 Средние продажи/день", f"{avg_sales_per_day_all:.1f} шт")
+
+                                        with kpi_all_col2:
+                                            st.metric("💵 Общая выручка", f"{revenue_all:,.0f} ₽" if revenue_all > 0 else "—")
+
+                                        with kpi_all_col3:
+                                            st.metric("⬆️ Макс. продажи/день", f"{max_sales_all:.1f} шт")
+                                            st.metric("⬇️ Мин. продажи/день", f"{min_sales_all:.1f} шт")
+                                            st.metric("📊 Средний низкий план", f"{avg_low_plan:.1f} шт")
+
+                                        with kpi_all_col4:
+                                            st.metric("📊 Средний план", f"{avg_mid_plan:.1f} шт")
+                                            st.metric("📊 Средний высокий план", f"{avg_high_plan:.1f} шт")
+                                    else:
+                                        # Если нет данных о продажах, пропускаем эту комбинацию
+                                        pass
+
+                                    # ================= ЮНИТ-ЭКОНОМИКА В ПЛАНЕ ПРОДАЖ =================
+                                    st.markdown("---")
+                                    st.markdown("#### 💰 Юнит-экономика и расчёт прибыли")
+
+                                    # Загрузка настроек
+                                    def load_ue_plan_settings():
+                                        try:
+                                            if os.path.exists("ue_settings.json"):
+                                                with open("ue_settings.json", 'r', encoding='utf-8') as f:
+                                                    return json.load(f)
+                                        except:
+                                            pass
+                                        return {}
+
+                                    def save_ue_plan_settings(settings):
+                                        try:
+                                            with open("ue_settings.json", 'w', encoding='utf-8') as f:
+                                                json.dump(settings, f, ensure_ascii=False, indent=2)
+                                            return True
+                                        except:
+                                            return False
+
+                                    ue_plan_settings = load_ue_plan_settings()
+                                    plan_ue_key = f"{selected_combo_key}_plan"
+                                    combo_ue_plan = ue_plan_settings.get(plan_ue_key, ue_plan_settings.get(selected_combo_key, {}))
+
+                                    with st.expander("⚙️ Настройки юнит-экономики", expanded=True):
+                                        ue_ps1, ue_ps2 = st.columns([3, 1])
+                                        with ue_ps2:
+                                            if st.button("💾 Сохранить", key=f"ue_save_plan_{selected_combo_key}", use_container_width=True):
+                                                new_ue_plan = {
+                                                    'cost_price': st.session_state.get(f'ue_cost_p_{selected_combo_key}', 500.0),
+                                                    'commission': st.session_state.get(f'ue_comm_p_{selected_combo_key}', 15.0),
+                                                    'logistics': st.session_state.get(f'ue_log_p_{selected_combo_key}', 100.0),
+                                                    'advertising': st.session_state.get(f'ue_adv_p_{selected_combo_key}', 5.0),
+                                                    'spp': st.session_state.get(f'ue_spp_p_{selected_combo_key}', 25.0),
+                                                    'buyout': st.session_state.get(f'ue_buy_p_{selected_combo_key}', 80.0),
+                                                    'tax': st.session_state.get(f'ue_tax_p_{selected_combo_key}', 7.0),
+                                                    'saved_at': datetime.now().strftime('%Y-%m-%d %H:%M')
+                                                }
+                                                ue_plan_settings[plan_ue_key] = new_ue_plan
+                                                if save_ue_plan_settings(ue_plan_settings):
+                                                    st.success("✅ Сохранено!")
+                                        with ue_ps1:
+                                            if combo_ue_plan.get('saved_at'):
+                                                st.caption(f"📅 Сохранено: {combo_ue_plan.get('saved_at')}")
+
+                                        ue_pc1, ue_pc2, ue_pc3 = st.columns(3)
+
+                                        with ue_pc1:
+                                            ue_cost_p = st.number_input("Себестоимость, ₽", min_value=0.0, value=combo_ue_plan.get('cost_price', 500.0), step=10.0, key=f"ue_cost_p_{selected_combo_key}")
+                                            ue_comm_p = st.number_input("Комиссия WB, %", min_value=0.0, max_value=100.0, value=combo_ue_plan.get('commission', 15.0), step=0.5, key=f"ue_comm_p_{selected_combo_key}")
+
+                                        with ue_pc2:
+                                            ue_log_p = st.number_input("Логистика, ₽", min_value=0.0, value=combo_ue_plan.get('logistics', 100.0), step=10.0, key=f"ue_log_p_{selected_combo_key}")
+                                            ue_adv_p = st.number_input("Реклама, %", min_value=0.0, max_value=100.0, value=combo_ue_plan.get('advertising', 5.0), step=0.5, key=f"ue_adv_p_{selected_combo_key}")
+
+                                        with ue_pc3:
+                                            ue_spp_p = st.number_input("СПП, %", min_value=0.0, max_value=100.0, value=combo_ue_plan.get('spp', 25.0), step=0.5, key=f"ue_spp_p_{selected_combo_key}")
+                                            ue_buy_p = st.number_input("% выкупа", min_value=1.0, max_value=100.0, value=combo_ue_plan.get('buyout', 80.0), step=1.0, key=f"ue_buy_p_{selected_combo_key}")
+                                            ue_tax_p = st.number_input("Налог, %", min_value=0.0, max_value=100.0, value=combo_ue_plan.get('tax', 7.0), step=0.5, key=f"ue_tax_p_{selected_combo_key}")
+
+                                    # Детализация на 1 единицу
+                                    with st.expander("🔍 Детализация расчёта (на 1 единицу)", expanded=False):
+                                        # Информация о периоде
+                                        if len(daily_plan_details) > 0:
+                                            first_date = daily_plan_details[0].get('Дата', '')
+                                            last_date = daily_plan_details[-1].get('Дата', '')
+                                            if hasattr(first_date, 'strftime'):
+                                                first_date = first_date.strftime('%d.%m.%Y')
+                                            if hasattr(last_date, 'strftime'):
+                                                last_date = last_date.strftime('%d.%m.%Y')
+                                            st.info(f"📅 Период плана: {first_date} - {last_date} | 🗺️ План продаж")
+
+                                        avg_price_plan_spp = base_price if base_price and base_price > 0 else 1000
+                                        spp_f_p = (1 - ue_spp_p / 100) if ue_spp_p < 100 else 1
+                                        avg_price_plan_no_spp = avg_price_plan_spp / spp_f_p
+
+                                        ue_ex_p = calculate_unit_economics(
+                                            cost_price=ue_cost_p, retail_price=avg_price_plan_no_spp,
+                                            commission_rate=ue_comm_p, logistics_cost=ue_log_p,
+                                            advertising_percent=ue_adv_p, buyout_percent=ue_buy_p, tax_rate=ue_tax_p
+                                        )
+
+                                        dcp1, dcp2 = st.columns(2)
+                                        with dcp1:
+                                            st.markdown("**📥 Доходы:**")
+                                            st.write(f"🏷️ Цена с СПП ({ue_spp_p}%): **{avg_price_plan_spp:,.0f} ₽**")
+                                            st.write(f"💰 Цена без СПП: **{avg_price_plan_no_spp:,.0f} ₽**")
+                                            st.markdown("**📤 Расходы:**")
+                                            st.write(f"📦 Себестоимость: **{ue_cost_p:,.0f} ₽**")
+                                            st.write(f"🏢 Комиссия: **{ue_ex_p['Комиссия, руб']:,.0f} ₽**")
+                                            st.write(f"🚚 Логистика: **{ue_ex_p['Логистика с учетом выкупа']:,.0f} ₽**")
+                                            st.write(f"📢 Реклама: **{ue_ex_p['Реклама, руб']:,.0f} ₽**")
+                                            st.write(f"🏛️ Налог: **{ue_ex_p['Налог, руб']:,.0f} ₽**")
+                                        with dcp2:
+                                            st.markdown("**📊 Результат:**")
+                                            tot_exp_p = ue_cost_p + ue_ex_p['Комиссия, руб'] + ue_ex_p['Логистика с учетом выкупа'] + ue_ex_p['Реклама, руб'] + ue_ex_p['Налог, руб']
+                                            st.write(f"💸 Всего расходов: **{tot_exp_p:,.0f} ₽**")
+                                            st.write(f"📈 Выручка с ед.: **{ue_ex_p['Выручка с ед.']:,.0f} ₽**")
+                                            pcp = "green" if ue_ex_p['Прибыль с ед.'] > 0 else "red"
+                                            st.markdown(f"💵 **Прибыль: <span style='color:{pcp};font-size:1.2em;'>{ue_ex_p['Прибыль с ед.']:,.0f} ₽</span>**", unsafe_allow_html=True)
+                                            mcp = "green" if ue_ex_p['Маржинальность, %'] > 0 else "red"
+                                            st.markdown(f"📉 Маржа: <span style='color:{mcp};'>{ue_ex_p['Маржинальность, %']:.1f}%</span>", unsafe_allow_html=True)
+                                            rcp = "green" if ue_ex_p['Рентабельность, %'] > 0 else "red"
+                                            st.markdown(f"📊 Рентабельность: <span style='color:{rcp};'>{ue_ex_p['Рентабельность, %']:.1f}%</span>", unsafe_allow_html=True)
+
+                                    # Расчёт прибыли по планам
+                                    if len(daily_plan_details) > 0:
+                                        st.markdown("##### 📊 Прибыль по планам")
+
+                                        # Продажи и цены без СПП по дням × (низкий, средний, высокий) — одним расчетом
+                                        plan_sales_p = np.array([
+                                            [day_d.get('Низкий план (среднее)', 0), day_d.get('Средний план (среднее)', 0), day_d.get('Высокий план (среднее)', 0)]
+                                            for day_d in daily_plan_details
+                                        ], dtype='float64')
+                                        plan_prices_p = np.array([
+                                            [
+                                                (day_d.get(price_key) or day_d.get('Средняя цена') or avg_price_plan_spp) / spp_f_p
+                                                for price_key in ('Низкий план цены', 'Средний план цены', 'Высокий план цены')
+                                            ]
+                                            for day_d in daily_plan_details
+                                        ], dtype='float64')
+                                        plan_profit_unit_p = unit_economics(
+                                            price=plan_prices_p, cost_price=ue_cost_p, commission_rate=ue_comm_p,
+                                            logistics_cost=ue_log_p, advertising_percent=ue_adv_p,
+                                            buyout_percent=ue_buy_p, tax_rate=ue_tax_p
+                                        )['Прибыль с ед.']
+                                        tot_profit_low_p, tot_profit_mid_p, tot_profit_high_p = (plan_profit_unit_p * plan_sales_p).sum(axis=0)
+                                        tot_sales_low_p, tot_sales_mid_p, tot_sales_high_p = plan_sales_p.sum(axis=0)
+
+                                        pkp1, pkp2, pkp3 = st.columns(3)
+                                        with pkp1:
+                                            pcd_low = "normal" if tot_profit_low_p >= 0 else "inverse"
+                                            st.metric("📉 Низкий план", f"{tot_profit_low_p:,.0f} ₽", delta=f"{tot_sales_low_p:.0f} продаж", delta_color=pcd_low)
+                                        with pkp2:
+                                            pcd_mid = "normal" if tot_profit_mid_p >= 0 else "inverse"
+                                            st.metric("📊 Средний план", f"{tot_profit_mid_p:,.0f} ₽", delta=f"{tot_sales_mid_p:.0f} продаж", delta_color=pcd_mid)
+                                        with pkp3:
+                                            pcd_high = "normal" if tot_profit_high_p >= 0 else "inverse"
+                                            st.metric("📈 Высокий план", f"{tot_profit_high_p:,.0f} ₽", delta=f"{tot_sales_high_p:.0f} продаж", delta_color=pcd_high)
+
+                                        st.info(f"📅 Период: {len(daily_plan_details)} дней | 💵 Прибыль с ед.: {ue_ex_p['Прибыль с ед.']:,.0f} ₽")
+
+                        # Кнопка для удаления отчета
+                        if st.button(f"🗑️ Удалить отчет для '{selected_combo_key[:30]}...'", key=f"delete_report_{selected_combo_key}"):
+                            if combo_report_key in st.session_state['combination_reports']:
+                                del st.session_state['combination_reports'][combo_report_key]
+                            if auto_load_done_key in st.session_state:
+                                del st.session_state[auto_load_done_key]
+                            st.rerun()
+
+                    # ================= ВКЛАДКА "СИТУАЦИЯ" =================
+                    with plan_subtab2:
+                        st.markdown("### 📈 Текущая ситуация")
+                        st.markdown("Анализ выполнения плана продаж на текущий момент")
+
+                        # Проверяем наличие данных плана
+                        plan_details_key = f'plan_details_table_{selected_combo_key}'
+                        plan_details_data = st.session_state.get(plan_details_key, [])
+
+                        if not plan_details_data:
+                            st.warning("⚠️ Сначала сформируйте план продаж во вкладке '📊 План'")
+                        else:
+                            # Генерируем симулированные данные (в будущем - загрузка по API)
+                            import random
+
+                            # Период анализа: 1 сентября - 17 декабря 2025
+                            start_situation = datetime(2025, 9, 1)
+                            end_situation = datetime(2025, 12, 17)
+
+                            # Создаём датафрейм с фактическими данными (симуляция)
+                            situation_dates = pd.date_range(start=start_situation, end=end_situation, freq='D')
+
+                            # Получаем плановые данные за этот период
+                            plan_by_date = {}
+                            for day_detail in plan_details_data:
+                                day_date = day_detail.get('Дата')
+                                if day_date:
+                                    if isinstance(day_date, str):
+                                        day_date = pd.Timestamp(day_date)
+                                    plan_by_date[day_date.date() if hasattr(day_date, 'date') else day_date] = day_detail
+
+                            # Базовая цена для симуляции
+                            base_price_sim = base_price if base_price and base_price > 0 else 1000
+
+                            # Генерируем фактические данные
+                            fact_data = []
+                            random.seed(42)  # Для воспроизводимости
+
+                            for date in situation_dates:
+                                date_only = date.date()
+
+                                # Получаем план на этот день
+                                plan_day = plan_by_date.get(date_only, {})
+                                plan_low = plan_day.get('Низкий план (среднее)', 5)
+                                plan_mid = plan_day.get('Средний план (среднее)', 10)
+                                plan_high = plan_day.get('Высокий план (среднее)', 15)
+
+                                # Симуляция факта: отклонение от среднего плана ±30%
+                                deviation = random.uniform(0.7, 1.3)
+                                fact_orders = max(0, int(plan_mid * deviation))
+
+                                # Продажи = заказы * процент выкупа (75-85%)
+                                buyout_rate = random.uniform(0.75, 0.85)
+                                fact_sales = int(fact_orders * buyout_rate)
+
+                                # Цена: отклонение ±10% от базовой
+                                price_deviation = random.uniform(0.9, 1.1)
+                                fact_price = base_price_sim * price_deviation
+
+                                fact_data.append({
+                                    'Дата': date,
+                                    'Заказы (факт)': fact_orders,
+                                    'Продажи (факт)': fact_sales,
+                                    'Цена (факт)': fact_price,
+                                    'План (низкий)': plan_low,
+                                    'План (средний)': plan_mid,
+                                    'План (высокий)': plan_high
+                                })
+
+                            fact_df = pd.DataFrame(fact_data)
+
+                            # Расчёт KPI
+                            total_fact_orders = fact_df['Заказы (факт)'].sum()
+                            total_fact_sales = fact_df['Продажи (факт)'].sum()
+                            total_plan_low = fact_df['План (низкий)'].sum()
+                            total_plan_mid = fact_df['План (средний)'].sum()
+                            total_plan_high = fact_df['План (высокий)'].sum()
+                            avg_fact_price = fact_df['Цена (факт)'].mean()
+                            total_revenue = (fact_df['Цена (факт)'] * fact_df['Продажи (факт)']).sum()
+
+                            # Процент выполнения плана
+                            pct_vs_low = (total_fact_orders / total_plan_low * 100) if total_plan_low > 0 else 0
+                            pct_vs_mid = (total_fact_orders / total_plan_mid * 100) if total_plan_mid > 0 else 0
+                            pct_vs_high = (total_fact_orders / total_plan_high * 100) if total_plan_high > 0 else 0
+
+                            # Период
+                            days_passed = len(fact_df)
+
+                            # Расчёт прибыли (используем настройки юнит-экономики если есть)
+                            # Загружаем настройки UE
+                            def load_ue_situation():
+                                try:
+                                    if os.path.exists("ue_settings.json"):
+                                        with open("ue_settings.json", 'r', encoding='utf-8') as f:
+                                            return json.load(f)
+                                except:
+                                    pass
+                                return {}
+
+                            ue_sit_settings = load_ue_situation()
+                            ue_sit = ue_sit_settings.get(f"{selected_combo_key}_plan", ue_sit_settings.get(selected_combo_key, {}))
+
+                            ue_cost_sit = ue_sit.get('cost_price', 500)
+                            ue_comm_sit = ue_sit.get('commission', 15)
+                            ue_log_sit = ue_sit.get('logistics', 100)
+                            ue_adv_sit = ue_sit.get('advertising', 5)
+                            ue_spp_sit = ue_sit.get('spp', 25)
+                            ue_buy_sit = ue_sit.get('buyout', 80)
+                            ue_tax_sit = ue_sit.get('tax', 7)
+
+                            # Пересчёт цены без СПП
+                            spp_f_sit = (1 - ue_spp_sit / 100) if ue_spp_sit < 100 else 1
+                            avg_price_no_spp_sit = avg_fact_price / spp_f_sit
+
+                            # Прибыль на единицу
+                            ue_profit_sit = calculate_unit_economics(
+                                cost_price=ue_cost_sit, retail_price=avg_price_no_spp_sit,
+                                commission_rate=ue_comm_sit, logistics_cost=ue_log_sit,
+                                advertising_percent=ue_adv_sit, buyout_percent=ue_buy_sit, tax_rate=ue_tax_sit
+                            )
+                            profit_per_unit = ue_profit_sit['Прибыль с ед.']
+
+                            # Текущая прибыль факт
+                            total_profit_fact = profit_per_unit * total_fact_sales
+
+                            # Плановая прибыль (средний план)
+                            total_profit_plan_mid = profit_per_unit * total_plan_mid
+                            total_profit_plan_low = profit_per_unit * total_plan_low
+                            total_profit_plan_high = profit_per_unit * total_plan_high
+
+                            # Средняя плановая цена (из plan_details)
+                            plan_prices = []
+                            for day_detail in plan_details_data:
+                                price = day_detail.get('Средний план цены') or day_detail.get('Средняя цена')
+                                if price and price > 0:
+                                    plan_prices.append(price)
+                            avg_plan_price = np.mean(plan_prices) if plan_prices else base_price_sim
+
+                            st.markdown("---")
+                            st.subheader("📊 Выполнение плана и сравнение")
+
+                            # Таблица: Факт | Низкий | Средний | Высокий
+                            st.markdown("##### 📦 Заказы и выполнение")
+                            order_col1, order_col2, order_col3, order_col4 = st.columns(4)
+
+                            with order_col1:
+                                st.metric("📦 Факт", f"{total_fact_orders:,.0f} шт")
+                                st.metric("💰 Продаж (факт)", f"{total_fact_sales:,.0f} шт")
+
+                            with order_col2:
+                                delta_low = total_fact_orders - total_plan_low
+                                st.metric("📉 Низкий план", f"{total_plan_low:,.0f} шт")
+                                st.metric("📉 vs Низкий", f"{pct_vs_low:.1f}%", delta=f"{delta_low:+.0f} шт", delta_color="normal" if delta_low >= 0 else "inverse")
+
+                            with order_col3:
+                                delta_mid = total_fact_orders - total_plan_mid
+                                st.metric("📊 Средний план", f"{total_plan_mid:,.0f} шт")
+                                st.metric("📊 vs Средний", f"{pct_vs_mid:.1f}%", delta=f"{delta_mid:+.0f} шт", delta_color="normal" if delta_mid >= 0 else "inverse")
+
+                            with order_col4:
+                                delta_high = total_fact_orders - total_plan_high
+                                st.metric("📈 Высокий план", f"{total_plan_high:,.0f} шт")
+                                st.metric("📈 vs Высокий", f"{pct_vs_high:.1f}%", delta=f"{delta_high:+.0f} шт", delta_color="normal" if delta_high >= 0 else "inverse")
+
+                            # Прибыль
+                            st.markdown("##### 💰 Прибыль")
+                            profit_col1, profit_col2, profit_col3, profit_col4 = st.columns(4)
+
+                            with profit_col1:
+                                st.metric("💰 Прибыль (факт)", f"{total_profit_fact:,.0f} ₽")
+                                st.metric("💵 На единицу", f"{profit_per_unit:,.0f} ₽")
+
+                            with profit_col2:
+                                diff_profit_low = total_profit_fact - total_profit_plan_low
+                                st.metric("📉 Прибыль (низ.)", f"{total_profit_plan_low:,.0f} ₽")
+                                st.metric("📉 Разница", f"{diff_profit_low:+,.0f} ₽", delta_color="normal" if diff_profit_low >= 0 else "inverse")
+
+                            with profit_col3:
+                                diff_profit_mid = total_profit_fact - total_profit_plan_mid
+                                st.metric("📊 Прибыль (сред.)", f"{total_profit_plan_mid:,.0f} ₽")
+                                st.metric("📊 Разница", f"{diff_profit_mid:+,.0f} ₽", delta_color="normal" if diff_profit_mid >= 0 else "inverse")
+
+                            with profit_col4:
+                                diff_profit_high = total_profit_fact - total_profit_plan_high
+                                st.metric("📈 Прибыль (выс.)", f"{total_profit_plan_high:,.0f} ₽")
+                                st.metric("📈 Разница", f"{diff_profit_high:+,.0f} ₽", delta_color="normal" if diff_profit_high >= 0 else "inverse")
+
+                            # Цена и выручка
+                            st.markdown("##### 🏷️ Цена и выручка")
+                            price_col1, price_col2, price_col3, price_col4 = st.columns(4)
+
+                            with price_col1:
+                                st.metric("💵 Выручка (факт)", f"{total_revenue:,.0f} ₽")
+
+                            with price_col2:
+                                st.metric("🏷️ Ср. цена (факт)", f"{avg_fact_price:,.0f} ₽")
+
+                            with price_col3:
+                                price_diff = avg_fact_price - avg_plan_price
+                                st.metric("🏷️ Ср. цена (план)", f"{avg_plan_price:,.0f} ₽", delta=f"{price_diff:+,.0f} ₽", delta_color="normal" if price_diff >= 0 else "off")
+
+                            with price_col4:
+                                avg_daily = total_fact_orders / days_passed if days_passed > 0 else 0
+                                st.metric("📅 Дней прошло", f"{days_passed}")
+                                st.metric("📈 Среднее/день", f"{avg_daily:.1f} шт")
+
+                            # Оценка ситуации
+                            st.markdown("---")
+                            st.subheader("🎯 Оценка ситуации")
+
+                            # Определяем к какому плану ближе текущая ситуация
+                            diff_to_low = abs(total_fact_orders - total_plan_low)
+                            diff_to_mid = abs(total_fact_orders - total_plan_mid)
+                            diff_to_high = abs(total_fact_orders - total_plan_high)
+
+                            # Определяем ближайший план
+                            if diff_to_low <= diff_to_mid and diff_to_low <= diff_to_high:
+                                closest_plan = "📉 Низкому плану"
+                                closest_plan_value = total_plan_low
+                                closest_pct = pct_vs_low
+                            elif diff_to_high <= diff_to_mid:
+                                closest_plan = "📈 Высокому плану"
+                                closest_plan_value = total_plan_high
+                                closest_pct = pct_vs_high
+                            else:
+                                closest_plan = "📊 Среднему плану"
+                                closest_plan_value = total_plan_mid
+                                closest_pct = pct_vs_mid
+
+                            # Определяем между какими планами находимся
+                            if total_fact_orders >= total_plan_high:
+                                position = "выше высокого плана 🚀"
+                                position_detail = f"Превышение высокого плана на {total_fact_orders - total_plan_high:,.0f} шт"
+                            elif total_fact_orders >= total_plan_mid:
+                                position = "между средним и высоким планом 📈"
+                                progress_to_high = (total_fact_orders - total_plan_mid) / (total_plan_high - total_plan_mid) * 100 if total_plan_high > total_plan_mid else 0
+                                position_detail = f"Прогресс к высокому плану: {progress_to_high:.0f}%"
+                            elif total_fact_orders >= total_plan_low:
+                                position = "между низким и средним планом 📊"
+                                progress_to_mid = (total_fact_orders - total_plan_low) / (total_plan_mid - total_plan_low) * 100 if total_plan_mid > total_plan_low else 0
+                                position_detail = f"Прогресс к среднему плану: {progress_to_mid:.0f}%"
+                            else:
+                                position = "ниже низкого плана ⚠️"
+                                position_detail = f"Отставание от низкого плана на {total_plan_low - total_fact_orders:,.0f} шт"
+
+                            # Основной статус
+                            if pct_vs_mid >= 100:
+                                st.success(f"✅ **Отлично!** План выполнен на {pct_vs_mid:.1f}%.")
+                            elif pct_vs_mid >= 90:
+                                st.info(f"ℹ️ **Хорошо.** План выполнен на {pct_vs_mid:.1f}%.")
+                            elif pct_vs_mid >= 75:
+                                st.warning(f"⚠️ **Внимание.** План выполнен на {pct_vs_mid:.1f}%.")
+                            else:
+                                st.error(f"❌ **Критично.** План выполнен только на {pct_vs_mid:.1f}%.")
+
+                            # Подробная оценка
+                            st.markdown("#### 📍 Позиция относительно планов")
+
+                            eval_col1, eval_col2 = st.columns(2)
+
+                            with eval_col1:
+                                st.markdown(f"**Текущее положение:** {position}")
+                                st.markdown(f"**Ближе всего к:** {closest_plan}")
+                                st.caption(position_detail)
+
+                            with eval_col2:
+                                # Прогресс-бар визуализация
+                                st.markdown("**Шкала выполнения:**")
+
+                                # Визуализация положения на шкале
+                                if total_plan_high > 0:
+                                    scale_pct = min(100, total_fact_orders / total_plan_high * 100)
+                                    low_mark = total_plan_low / total_plan_high * 100
+                                    mid_mark = total_plan_mid / total_plan_high * 100
+
+                                    st.progress(scale_pct / 100)
+                                    st.caption(f"📉 Низкий: {low_mark:.0f}% | 📊 Средний: {mid_mark:.0f}% | 📈 Высокий: 100%")
+
+                            # Детальная статистика
+                            st.markdown("#### 📊 Детальный анализ")
+
+                            detail_col1, detail_col2, detail_col3 = st.columns(3)
+
+                            with detail_col1:
+                                st.markdown("**vs Низкий план:**")
+                                if pct_vs_low >= 100:
+                                    st.markdown(f"✅ Выполнен на **{pct_vs_low:.1f}%**")
+                                else:
+                                    st.markdown(f"⏳ Выполнен на **{pct_vs_low:.1f}%**")
+                                need_for_low = max(0, total_plan_low - total_fact_orders)
+                                if need_for_low > 0:
+                                    st.caption(f"До выполнения: {need_for_low:,.0f} шт")
+
+                            with detail_col2:
+                                st.markdown("**vs Средний план:**")
+                                if pct_vs_mid >= 100:
+                                    st.markdown(f"✅ Выполнен на **{pct_vs_mid:.1f}%**")
+                                else:
+                                    st.markdown(f"⏳ Выполнен на **{pct_vs_mid:.1f}%**")
+                                need_for_mid = max(0, total_plan_mid - total_fact_orders)
+                                if need_for_mid > 0:
+                                    st.caption(f"До выполнения: {need_for_mid:,.0f} шт")
+
+                            with detail_col3:
+                                st.markdown("**vs Высокий план:**")
+                                if pct_vs_high >= 100:
+                                    st.markdown(f"✅ Выполнен на **{pct_vs_high:.1f}%**")
+                                else:
+                                    st.markdown(f"⏳ Выполнен на **{pct_vs_high:.1f}%**")
+                                need_for_high = max(0, total_plan_high - total_fact_orders)
+                                if need_for_high > 0:
+                                    st.caption(f"До выполнения: {need_for_high:,.0f} шт")
+
+                            # Сколько должно быть
+                            st.markdown("---")
+                            st.subheader("📋 Сколько должно быть по плану")
+
+                            plan_compare_col1, plan_compare_col2, plan_compare_col3 = st.columns(3)
+
+                            with plan_compare_col1:
+                                diff_low = total_fact_orders - total_plan_low
+                                st.metric("📉 Низкий план", f"{total_plan_low:,.0f} шт", delta=f"{diff_low:+.0f} шт", delta_color="normal" if diff_low >= 0 else "inverse")
+
+                            with plan_compare_col2:
+                                diff_mid = total_fact_orders - total_plan_mid
+                                st.metric("📊 Средний план", f"{total_plan_mid:,.0f} шт", delta=f"{diff_mid:+.0f} шт", delta_color="normal" if diff_mid >= 0 else "inverse")
+
+                            with plan_compare_col3:
+                                diff_high = total_fact_orders - total_plan_high
+                                st.metric("📈 Высокий план", f"{total_plan_high:,.0f} шт", delta=f"{diff_high:+.0f} шт", delta_color="normal" if diff_high >= 0 else "inverse")
+
+                            # График факт vs план
+                            st.markdown("---")
+                            st.subheader("📈 График: Факт vs План")
+
+
+                            fig_situation = go.Figure()
+
+                            # Факт заказов
+                            fig_situation.add_trace(go.Scatter(
+                                x=fact_df['Дата'],
+                                y=fact_df['Заказы (факт)'],
+                                mode='lines',
+                                name='Факт заказов',
+                                line=dict(color='blue', width=2)
+                            ))
+
+                            # Планы
+                            fig_situation.add_trace(go.Scatter(
+                                x=fact_df['Дата'],
+                                y=fact_df['План (низкий)'],
+                                mode='lines',
+                                name='Низкий план',
+                                line=dict(color='red', width=1, dash='dot')
+                            ))
+
+                            fig_situation.add_trace(go.Scatter(
+                                x=fact_df['Дата'],
+                                y=fact_df['План (средний)'],
+                                mode='lines',
+                                name='Средний план',
+                                line=dict(color='orange', width=2, dash='dash')
+                            ))
+
+                            fig_situation.add_trace(go.Scatter(
+                                x=fact_df['Дата'],
+                                y=fact_df['План (высокий)'],
+                                mode='lines',
+                                name='Высокий план',
+                                line=dict(color='green', width=1, dash='dot')
+                            ))
+
+                            fig_situation.update_layout(
+                                title="Факт заказов vs План продаж",
+                                xaxis_title="Дата",
+                                yaxis_title="Заказы, шт",
+                                hovermode='x unified',
+                                height=400
+                            )
+
+                            st.plotly_chart(fig_situation, use_container_width=True)
+
+                            # Таблица по дням (последние 14 дней)
+                            st.markdown("---")
+                            st.subheader("📋 Детализация (последние 14 дней)")
+
+                            recent_df = fact_df.tail(14).copy()
+                            recent_df['Дата'] = recent_df['Дата'].dt.strftime('%d.%m.%Y')
+                            recent_df['Цена (факт)'] = recent_df['Цена (факт)'].apply(lambda x: f"{x:,.0f} ₽")
+                            recent_df['% от плана'] = (recent_df['Заказы (факт)'] / recent_df['План (средний)'] * 100).apply(lambda x: f"{x:.0f}%")
+
+                            display_df = recent_df[['Дата', 'Заказы (факт)', 'Продажи (факт)', 'План (средний)', '% от плана', 'Цена (факт)']]
+                            st.dataframe(display_df, use_container_width=True, hide_index=True)
+
+                            st.caption("⚠️ Данные симулированы. В будущем будет загрузка реальных данных по API.")
+
+                    # ================= ВКЛАДКА "ТАБЛИЦА" =================
+                    with plan_subtab3:
+                        st.markdown("### 📋 Таблица воронки продаж")
+                        st.markdown("Детализация планов и фактических данных по дням")
+
+                        # Получаем данные плана для выбранной комбинации
+                        plan_details_key = f'plan_details_table_{selected_combo_key}'
+                        plan_details = st.session_state.get(plan_details_key, [])
+
+                        if plan_details and len(plan_details) > 0:
+                            # Параметры для расчета рентабельности (берем из настроек или используем значения по умолчанию)
+                            buyout_pct = st.session_state.get("buyout_pct", 80.0)
+
+                            # Загружаем настройки юнит-экономики из файла
+                            def load_ue_plan_settings():
+                                try:
+                                    if os.path.exists("ue_settings.json"):
+                                        with open("ue_settings.json", 'r', encoding='utf-8') as f:
+                                            return json.load(f)
+                                except:
+                                    pass
+                                return {}
+
+                            ue_plan_settings = load_ue_plan_settings()
+                            plan_ue_key = f"{selected_combo_key}_plan"
+                            combo_ue_plan = ue_plan_settings.get(plan_ue_key, ue_plan_settings.get(selected_combo_key, {}))
+
+                            # Параметры юнит-экономики (из сохраненных настроек, session_state или значения по умолчанию)
+                            ue_cost = combo_ue_plan.get('cost_price', st.session_state.get(f'ue_cost_p_{selected_combo_key}', 500.0))
+                            ue_comm = combo_ue_plan.get('commission', st.session_state.get(f'ue_comm_p_{selected_combo_key}', 15.0))
+                            ue_log = combo_ue_plan.get('logistics', st.session_state.get(f'ue_log_p_{selected_combo_key}', 100.0))
+                            ue_adv = combo_ue_plan.get('advertising', st.session_state.get(f'ue_adv_p_{selected_combo_key}', 5.0))
+                            ue_spp = combo_ue_plan.get('spp', st.session_state.get(f'ue_spp_p_{selected_combo_key}', 25.0))
+                            ue_buy = combo_ue_plan.get('buyout', st.session_state.get(f'ue_buy_p_{selected_combo_key}', buyout_pct))
+                            ue_tax = combo_ue_plan.get('tax', st.session_state.get(f'ue_tax_p_{selected_combo_key}', 7.0))
+
+                            # Создаем структуру таблицы: строки - метрики, столбцы - дни
+                            table_rows = {
+                                'Заказали, шт': [],  # Заказали факт
+                                'Заказы план': [],  # Заказали план
+                                'Продажа факт': [],  # Продажа факт
+                                'Продажа план': [],  # Продажа план
+                                'Средняя цена факт': [],
+                                'Средняя цена план': [],
+                                'Прибыль факт': [],
+                                'Прибыль план': [],
+                                'Рентабельность факт': [],
+                                'Рентабельность план': [],
+                                'ДДР': [],
+                                'Реклама': [],
+                                'Конверсия в корзину': [],
+                                'Конверсия в заказ': [],
+                                'Процент выкупа': [],
+                                'Заказали на сумму, ₽': [],
+                                'Выкупили на сумму, ₽': [],
+                                'Отменили, шт': []
+                            }
+
+                            # Список дат для столбцов
+                            date_columns = []
+
+                            # Заполняем данные для каждого дня
+                            for day_idx, day_detail in enumerate(plan_details):
+                                date = day_detail.get('Дата')
+                                if hasattr(date, 'strftime'):
+                                    date_str = date.strftime('%d.%m.%Y')
+                                    # Используем дату для seed, чтобы значения были стабильными, но разными для каждого дня
+                                    date_hash = hash(date_str) % 10000
+                                    np.random.seed(42 + date_hash)
+                                else:
+                                    date_str = str(date)
+                                    np.random.seed(42 + day_idx)
+                                date_columns.append(date_str)
+
+                                # Данные из плана продаж
+                                orders_plan = day_detail.get('Средний план (среднее)', 0)
+                                sales_plan = orders_plan * (buyout_pct / 100.0)  # Продажа план = Заказы план × % выкупа
+                                avg_price_plan = day_detail.get('Средний план цены') or day_detail.get('Средняя цена') or 0
+
+                                # Расчет рентабельности плана через юнит-экономику
+                                if avg_price_plan > 0 and sales_plan > 0:
+                                    # Рассчитываем цену без СПП для юнит-экономики
+                                    spp_factor = (1 - ue_spp / 100) if ue_spp < 100 else 1
+                                    avg_price_plan_no_spp = avg_price_plan / spp_factor
+
+                                    # Рассчитываем юнит-экономику для плана
+                                    ue_plan = calculate_unit_economics(
+                                        cost_price=ue_cost,
+                                        retail_price=avg_price_plan_no_spp,
+                                        commission_rate=ue_comm,
+                                        logistics_cost=ue_log,
+                                        advertising_percent=ue_adv,
+                                        buyout_percent=ue_buy,
+                                        tax_rate=ue_tax
+                                    )
+
+                                    # Рентабельность план из юнит-экономики
+                                    rentability_plan = ue_plan['Рентабельность, %']
+                                    # Прибыль план = Прибыль с единицы × Количество продаж
+                                    profit_plan = ue_plan['Прибыль с ед.'] * sales_plan
+                                else:
+                                    rentability_plan = 0
+                                    profit_plan = 0
+
+                                # Рандомные данные для текущих показателей (позже будут из API)
+                                orders_fact = max(0, int(orders_plan * np.random.uniform(0.7, 1.3)))
+                                sales_fact = max(0, int(orders_fact * (buyout_pct / 100.0) * np.random.uniform(0.95, 1.05)))
+
+                                # Сначала рассчитываем сумму заказов на основе плановой цены с отклонением
+                                # Фактическая цена может отличаться от плановой на ±10%
+                                price_variation = np.random.uniform(0.9, 1.1) if avg_price_plan > 0 else 1.0
+                                orders_sum = orders_fact * avg_price_plan * price_variation if avg_price_plan > 0 and orders_fact > 0 else 0
+
+                                # Средняя цена факт = Заказали на сумму / Заказали (шт)
+                                avg_price_fact = orders_sum / orders_fact if orders_fact > 0 else 0
+
+                                # Выкупили на сумму = Выкупили (шт) × Средняя цена факт
+                                sales_sum = sales_fact * avg_price_fact if avg_price_fact > 0 else 0
+
+                                cancelled = max(0, int((orders_fact - sales_fact) * np.random.uniform(0.3, 0.7)))
+                                reklama = orders_sum * np.random.uniform(0, 0.05)
+
+                                # Симулируем данные для конверсий (позже будут из API)
+                                # Просмотры - обычно в 10-50 раз больше заказов
+                                views = max(orders_fact * 20, int(orders_plan * 20 * np.random.uniform(0.8, 1.2))) if orders_plan > 0 else 0
+                                # Добавления в корзину - обычно в 2-5 раз больше заказов
+                                cart_adds = max(orders_fact * 3, int(orders_fact * np.random.uniform(2, 5))) if orders_fact > 0 else 0
+
+                                # Расчет конверсий и процента выкупа
+                                # Конверсия в корзину = (Добавили в корзину / Просмотры) * 100
+                                conversion_to_cart = (cart_adds / views * 100) if views > 0 else 0
+                                # Конверсия в заказ = (Заказали / Добавили в корзину) * 100
+                                conversion_to_order = (orders_fact / cart_adds * 100) if cart_adds > 0 else 0
+                                # Процент выкупа = (Выкупили / Заказали) * 100
+                                buyout_percent = (sales_fact / orders_fact * 100) if orders_fact > 0 else 0
+
+                                # Расчет рентабельности факт через юнит-экономику
+                                if sales_sum > 0 and avg_price_fact > 0:
+                                    # Рассчитываем цену без СПП для факта
+                                    spp_factor_fact = (1 - ue_spp / 100) if ue_spp < 100 else 1
+                                    avg_price_fact_no_spp = avg_price_fact / spp_factor_fact
+
+                                    # Рассчитываем юнит-экономику для факта
+                                    ue_fact = calculate_unit_economics(
+                                        cost_price=ue_cost,
+                                        retail_price=avg_price_fact_no_spp,
+                                        commission_rate=ue_comm,
+                                        logistics_cost=ue_log,
+                                        advertising_percent=ue_adv,
+                                        buyout_percent=ue_buy,
+                                        tax_rate=ue_tax
+                                    )
+
+                                    # Рентабельность факт из юнит-экономики
+                                    rentability_fact = ue_fact['Рентабельность, %']
+                                    # Прибыль факт = Прибыль с единицы × Количество продаж
+                                    profit_fact = ue_fact['Прибыль с ед.'] * sales_fact
+                                else:
+                                    rentability_fact = 0
+                                    profit_fact = 0
+
+                                # ДДР (Доля доставки в рознице) - процент отношения Реклама к Заказали на сумму
+                                # ДДР = (Реклама / Заказали на сумму) × 100%
+                                if orders_sum > 0:
+                                    ddr = (reklama / orders_sum) * 100.0
+                                else:
+                                    ddr = 0
+
+                                # Заполняем строки в правильном порядке
+                                table_rows['Заказали, шт'].append(orders_fact)  # Заказали факт
+                                table_rows['Заказы план'].append(orders_plan)  # Заказали план
+                                table_rows['Продажа факт'].append(sales_fact)  # Продажа факт
+                                table_rows['Продажа план'].append(sales_plan)  # Продажа план
+                                table_rows['Средняя цена факт'].append(avg_price_fact)
+                                table_rows['Средняя цена план'].append(avg_price_plan)
+                                table_rows['Прибыль факт'].append(profit_fact)
+                                table_rows['Прибыль план'].append(profit_plan)
+                                table_rows['Рентабельность факт'].append(rentability_fact)
+                                table_rows['Рентабельность план'].append(rentability_plan)
+                                table_rows['ДДР'].append(ddr)
+                                table_rows['Реклама'].append(reklama)
+                                table_rows['Конверсия в корзину'].append(conversion_to_cart)
+                                table_rows['Конверсия в заказ'].append(conversion_to_order)
+                                table_rows['Процент выкупа'].append(buyout_percent)
+                                table_rows['Заказали на сумму, ₽'].append(orders_sum)
+                                table_rows['Выкупили на сумму, ₽'].append(sales_sum)
+                                table_rows['Отменили, шт'].append(cancelled)
+
+                            # Создаем DataFrame для отображения (сохраняем числовые значения для сравнения)
+                            table_df = pd.DataFrame.from_dict(table_rows, orient='index', columns=date_columns)
+
+                            # Функция для условного форматирования ячеек
+                            def highlight_performance(df):
+                                """Выделяет ячейки цветом в зависимости от выполнения плана"""
+                                # Создаем DataFrame со стилями (изначально пустые стили)
+                                styles = pd.DataFrame('', index=df.index, columns=df.columns)
+
+                                # Получаем индексы строк (один раз, вне цикла)
+                                orders_plan_idx = df.index.get_loc('Заказы план') if 'Заказы план' in df.index else None
+                                sales_plan_idx = df.index.get_loc('Продажа план') if 'Продажа план' in df.index else None
+                                orders_fact_idx = df.index.get_loc('Заказали, шт') if 'Заказали, шт' in df.index else None
+                                sales_fact_idx = df.index.get_loc('Продажа факт') if 'Продажа факт' in df.index else None
+                                profit_plan_idx = df.index.get_loc('Прибыль план') if 'Прибыль план' in df.index else None
+                                profit_fact_idx = df.index.get_loc('Прибыль факт') if 'Прибыль факт' in df.index else None
+
+                                # Для каждого столбца (дня) проверяем выполнение плана
+                                for col in df.columns:
+                                    # Проверяем "Заказали, шт" vs "Заказы план"
+                                    if orders_fact_idx is not None and orders_plan_idx is not None:
+                                        plan_val = df.iloc[orders_plan_idx, df.columns.get_loc(col)]
+                                        fact_val = df.iloc[orders_fact_idx, df.columns.get_loc(col)]
+                                        if pd.notna(plan_val) and pd.notna(fact_val) and plan_val > 0:
+                                            if fact_val >= plan_val:
+                                                styles.iloc[orders_fact_idx, df.columns.get_loc(col)] = 'background-color: #32CD32'  # Яркий зеленый - план выполнен
+                                            else:
+                                                styles.iloc[orders_fact_idx, df.columns.get_loc(col)] = 'background-color: #FF6B6B'  # Яркий красный - отставание
+
+                                    # Проверяем "Продажа факт" vs "Продажа план"
+                                    if sales_fact_idx is not None and sales_plan_idx is not None:
+                                        plan_val = df.iloc[sales_plan_idx, df.columns.get_loc(col)]
+                                        fact_val = df.iloc[sales_fact_idx, df.columns.get_loc(col)]
+                                        if pd.notna(plan_val) and pd.notna(fact_val) and plan_val > 0:
+                                            if fact_val >= plan_val:
+                                                styles.iloc[sales_fact_idx, df.columns.get_loc(col)] = 'background-color: #32CD32'  # Яркий зеленый - план выполнен
+                                            else:
+                                                styles.iloc[sales_fact_idx, df.columns.get_loc(col)] = 'background-color: #FF6B6B'  # Яркий красный - отставание
+
+                                    # Проверяем "Прибыль факт" vs "Прибыль план"
+                                    if profit_fact_idx is not None and profit_plan_idx is not None:
+                                        plan_val = df.iloc[profit_plan_idx, df.columns.get_loc(col)]
+                                        fact_val = df.iloc[profit_fact_idx, df.columns.get_loc(col)]
+                                        if pd.notna(plan_val) and pd.notna(fact_val) and plan_val > 0:
+                                            if fact_val >= plan_val:
+                                                styles.iloc[profit_fact_idx, df.columns.get_loc(col)] = 'background-color: #32CD32'  # Яркий зеленый - план выполнен
+                                            else:
+                                                styles.iloc[profit_fact_idx, df.columns.get_loc(col)] = 'background-color: #FF6B6B'  # Яркий красный - отставание
+
+                                return styles
+
+                            # Применяем условное форматирование к числовому DataFrame
+                            styled_df = table_df.style.apply(highlight_performance, axis=None)
+
+                            # Форматируем значения для отображения через format
+                            # Для строк с целыми числами
+                            int_rows = ['Заказы план', 'Продажа план', 'Заказали, шт', 'Продажа факт', 'Отменили, шт']
+                            for row in int_rows:
+                                if row in table_df.index:
+                                    styled_df = styled_df.format('{:.0f}', subset=pd.IndexSlice[row, :])
+
+                            # Для строк с валютами
+                            currency_rows = ['Средняя цена план', 'Средняя цена факт', 'Заказали на сумму, ₽', 'Выкупили на сумму, ₽', 'Реклама', 'Прибыль план', 'Прибыль факт']
+                            for row in currency_rows:
+                                if row in table_df.index:
+                                    styled_df = styled_df.format(lambda x: f"{x:,.0f} ₽" if pd.notna(x) and x > 0 else "0 ₽", subset=pd.IndexSlice[row, :])
+
+                            # Для строк с процентами
+                            percent_rows = ['Рентабельность план', 'Рентабельность факт', 'Конверсия в корзину', 'Конверсия в заказ', 'Процент выкупа', 'ДДР']
+                            for row in percent_rows:
+                                if row in table_df.index:
+                                    styled_df = styled_df.format('{:.2f}%', subset=pd.IndexSlice[row, :])
+
+                            # Отображаем таблицу со стилями
+                            st.dataframe(
+                                styled_df,
+                                use_container_width=True,
+                                height=600
+                            )
+
+                            st.info("💡 Текущие данные (заказали, выкупили, суммы, отменили, реклама) генерируются случайно. В будущем они будут загружаться из API.")
+                        else:
+                            st.warning("⚠️ Нет данных плана для этой комбинации. Сначала создайте план во вкладке '📊 План'.")
+
+                    # ================= ВКЛАДКА "ЧАТ С ИИ" =================
+                    with plan_subtab4:
+                        st.markdown("### 💬 Чат с ИИ-аналитиком")
+                        st.markdown("Задайте вопросы о комбинации товаров и получите рекомендации")
+
+                        # Получаем данные о товарах комбинации для контекста
+                        df = st.session_state.get('df', None)
+                        combo_products_df_for_chat = None
+                        if df is not None and combo_skus:
+                            combo_skus_list_for_chat = [str(sku).replace(".0", "") for sku in combo_skus] if combo_skus else []
+                            mask = df["Артикул"].astype(str).str.replace(".0", "").isin(combo_skus_list_for_chat)
+                            combo_products_df_for_chat = df[mask].copy()
+
+                        # Инициализация истории чата
+                        chat_key = f'ai_chat_history_{selected_combo_key}'
+                        if chat_key not in st.session_state:
+                            st.session_state[chat_key] = []
+
+                        # Отображаем историю чата
+                        chat_history = st.session_state[chat_key]
+
+                        # Контейнер для истории чата
+                        chat_container = st.container()
+
+                        with chat_container:
+                            if not chat_history:
+                                st.info("👋 Привет! Я ИИ-аналитик. Задайте мне вопрос о комбинации товаров, и я помогу с анализом и рекомендациями.")
+
+                            # Отображаем сообщения
+                            for message in chat_history:
+                                role = message.get("role", "user")
+                                content = message.get("content", "")
+
+                                if role == "user":
+                                    with st.chat_message("user"):
+                                        st.markdown(content)
+                                else:
+                                    with st.chat_message("assistant"):
+                                        st.markdown(content)
+
+                        # Поле ввода сообщения
+                        user_input = st.chat_input("Введите ваш вопрос о комбинации товаров...")
+
+                        if user_input:
+                            # Добавляем сообщение пользователя в историю
+                            chat_history.append({"role": "user", "content": user_input})
+                            st.session_state[chat_key] = chat_history
+                            st.rerun()
+
+                        # Кнопки для быстрых вопросов
+                        st.markdown("---")
+                        st.markdown("#### 💡 Быстрые вопросы")
+
+                        quick_questions_col1, quick_questions_col2 = st.columns(2)
+
+                        with quick_questions_col1:
+                            if st.button("🔍 Проанализировать комбинацию", use_container_width=True, key=f"quick_analyze_{selected_combo_key}"):
+                                if combo_products_df_for_chat is not None and not combo_products_df_for_chat.empty:
+                                    # Запускаем анализ комбинации
+                                    category = "Рашрашд мужской (компрессионная одежда)"
+
+                                    with st.spinner("🔄 Анализирую комбинацию товаров..."):
+                                        analysis_result = analyze_combination_products_with_ai(
+                                            combo_products_df_for_chat,
+                                            selected_combo_key,
+                                            category=category
+                                        )
+
+                                        if "error" not in analysis_result:
+                                            # Формируем ответ на основе анализа
+                                            response_parts = []
+                                            response_parts.append("✅ **Анализ комбинации завершен!**\n\n")
+
+                                            if "common_characteristics" in analysis_result:
+                                                response_parts.append(f"📊 **Общие характеристики:**\n{analysis_result['common_characteristics']}\n\n")
+
+                                            if "strengths" in analysis_result and analysis_result["strengths"]:
+                                                response_parts.append("✅ **Сильные стороны:**\n")
+                                                for strength in analysis_result["strengths"]:
+                                                    response_parts.append(f"- {strength}\n")
+                                                response_parts.append("\n")
+
+                                            if "weaknesses" in analysis_result and analysis_result["weaknesses"]:
+                                                response_parts.append("⚠️ **Слабые стороны:**\n")
+                                                for weakness in analysis_result["weaknesses"]:
+                                                    response_parts.append(f"- {weakness}\n")
+                                                response_parts.append("\n")
+
+                                            if "recommendations" in analysis_result and analysis_result["recommendations"]:
+                                                response_parts.append("💡 **Рекомендации:**\n")
+                                                for rec in analysis_result["recommendations"][:3]:  # Показываем первые 3
+                                                    priority_emoji = "🔴" if rec.get("priority") == "high" else "🟡" if rec.get("priority") == "medium" else "🟢"
+                                                    response_parts.append(f"{priority_emoji} **{rec.get('category', 'Общее')}:** {rec.get('recommendation', '')}\n")
+                                                response_parts.append("\n")
+
+                                            response = "".join(response_parts)
+
+                                            # Добавляем ответ в историю
+                                            chat_history.append({"role": "assistant", "content": response})
+                                            st.session_state[chat_key] = chat_history
+                                            st.session_state[f'ai_analysis_{selected_combo_key}'] = analysis_result
+                                            st.rerun()
+                                        else:
+                                            error_msg = f"❌ Ошибка анализа: {analysis_result.get('error', 'Неизвестная ошибка')}"
+                                            chat_history.append({"role": "assistant", "content": error_msg})
+                                            st.session_state[chat_key] = chat_history
+                                            st.rerun()
+                                else:
+                                    st.warning("⚠️ Нет данных о товарах комбинации")
+
+                            if st.button("📊 Показать характеристики", use_container_width=True, key=f"quick_characteristics_{selected_combo_key}"):
+                                if combo_products_df_for_chat is not None and not combo_products_df_for_chat.empty:
+                                    # Формируем ответ с характеристиками
+                                    response_parts = []
+                                    response_parts.append("📊 **Характеристики комбинации:**\n\n")
+
+                                    # Базовые метрики
+                                    if "Заказы" in combo_products_df_for_chat.columns:
+                                        total_orders = combo_products_df_for_chat["Заказы"].sum()
+                                        response_parts.append(f"📦 **Общие заказы:** {total_orders:,.0f} шт\n")
+
+                                    if "Выручка" in combo_products_df_for_chat.columns:
+                                        total_revenue = combo_products_df_for_chat["Выручка"].sum()
+                                        response_parts.append(f"💰 **Общая выручка:** {total_revenue:,.0f} ₽\n")
+
+                                    if "Средняя цена" in combo_products_df_for_chat.columns:
+                                        avg_price = combo_products_df_for_chat["Средняя цена"].mean()
+                                        response_parts.append(f"🏷️ **Средняя цена:** {avg_price:,.0f} ₽\n")
+
+                                    response_parts.append(f"\n📋 **Количество товаров в комбинации:** {len(combo_products_df_for_chat)}")
+
+                                    response = "".join(response_parts)
+                                    chat_history.append({"role": "user", "content": "Покажи характеристики комбинации"})
+                                    chat_history.append({"role": "assistant", "content": response})
+                                    st.session_state[chat_key] = chat_history
+                                    st.rerun()
+                                else:
+                                    st.warning("⚠️ Нет данных о товарах комбинации")
+
+                        with quick_questions_col2:
+                            if st.button("💡 Получить рекомендации", use_container_width=True, key=f"quick_recommendations_{selected_combo_key}"):
+                                # Используем сохраненный анализ, если есть
+                                if f'ai_analysis_{selected_combo_key}' in st.session_state:
+                                    analysis_result = st.session_state[f'ai_analysis_{selected_combo_key}']
+                                    if "error" not in analysis_result and "recommendations" in analysis_result:
+                                        response_parts = []
+                                        response_parts.append("💡 **Рекомендации по улучшению комбинации:**\n\n")
+
+                                        for rec in analysis_result["recommendations"]:
+                                            priority_emoji = "🔴" if rec.get("priority") == "high" else "🟡" if rec.get("priority") == "medium" else "🟢"
+                                            response_parts.append(f"{priority_emoji} **{rec.get('category', 'Общее')}:**\n")
+                                            response_parts.append(f"{rec.get('recommendation', '')}\n")
+                                            if rec.get('expected_impact'):
+                                                response_parts.append(f"💭 *Ожидаемый эффект: {rec['expected_impact']}*\n")
+                                            response_parts.append("\n")
+
+                                        response = "".join(response_parts)
+                                        chat_history.append({"role": "user", "content": "Дай рекомендации"})
+                                        chat_history.append({"role": "assistant", "content": response})
+                                        st.session_state[chat_key] = chat_history
+                                        st.rerun()
+                                    else:
+                                        st.info("ℹ️ Сначала выполните анализ комбинации, нажав кнопку 'Проанализировать комбинацию'")
+                                else:
+                                    st.info("ℹ️ Сначала выполните анализ комбинации, нажав кнопку 'Проанализировать комбинацию'")
+
+                            if st.button("🗑️ Очистить чат", use_container_width=True, key=f"clear_chat_{selected_combo_key}"):
+                                st.session_state[chat_key] = []
+                                st.rerun()
+
+                else:
+                    st.warning(f"⚠️ Не удалось найти товары для комбинации: {selected_combo_key}")
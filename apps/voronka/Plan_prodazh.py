@@ -1,4 +1,11 @@
 # -*- coding: utf-8 -*-
+import sys
+from pathlib import Path
+# Добавляем корневую директорию проекта в sys.path для импорта utils
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
 import pandas as pd
 import streamlit as st
 import plotly.express as px
@@ -9,6 +16,22 @@ import json
 import pickle
 import numpy as np
 
+from utils.unit_economics import unit_economics, unit_economics_scalar, unit_economics_memo
+from utils.seasonal_plan import build_seasonal_plan
+from utils.period_pivot import (
+    MONTH_WEEK, build_period_pivot, add_period_columns, label_columns, parse_period_label, month_week_columns, overlay_plan
+)
+
+# Недели и месяцы плана (сентябрь-декабрь 2025), которые всегда есть в сводной таблице:
+# ключи (год, месяц, неделя ISO), неделя 0 — месячный столбец
+PLAN_EXTRA_KEYS = (
+    [(2025, 9, week) for week in (39, 40)]
+    + [(2025, 10, week) for week in range(41, 45)]
+    + [(2025, 11, week) for week in range(45, 49)]
+    + [(2025, 12, week) for week in range(49, 53)]
+    + [(2025, month, MONTH_WEEK) for month in range(9, 13)]
+)
+
 # Настройка страницы
 st.set_page_config(page_title="Анализ воронки продаж", layout="wide")
 
@@ -220,177 +243,29 @@ def generate_future_columns():
     sorted_columns = sorted(future_columns, reverse=False)
     return sorted_columns
 
-def generate_seasonal_rentability_plan(pivot_data, monthly_rentability_percentages, base_rentability=15.0):
-    """Генерирует план рентабельности с плавными переходами между месяцами"""
+def get_plan_seed():
+    """Seed колебаний сезонного плана из настроек таблицы (None — план без колебаний)"""
+    seed = st.session_state.get('table_settings', {}).get('plan_seed', 0)
+    return None if seed is None or seed < 0 else int(seed)
+
+def generate_seasonal_rentability_plan(pivot_data, monthly_rentability_percentages, base_rentability=15.0, seed=None):
+    """Генерирует план рентабельности с плавными переходами между месяцами (воспроизводимо при одном seed)"""
     try:
-        import math
-        import random
-        
-        
-        # Ищем все недельные столбцы (содержат "(" и "нед.")
-        weekly_columns = [col for col in pivot_data.columns if "(" in col and "нед." in col]
-        
+        plan = build_seasonal_plan(
+            pivot_data.columns,
+            monthly_rentability_percentages=monthly_rentability_percentages,
+            base_rentability=base_rentability,
+            seed=get_plan_seed() if seed is None else seed,
+        )
         
-        if not weekly_columns:
+        if plan.empty:
             st.warning("⚠️ Не найдены недельные столбцы")
             return False
         
-        # Сортируем столбцы по дате
-        weekly_columns.sort()
-        
-        plan_generated = 0
-        total_weeks = len(weekly_columns)
-        
-        # Создаем плавные переходы между месяцами для рентабельности
-        for i, col in enumerate(weekly_columns):
-            # Извлекаем год, месяц и неделю из названия столбца
-            # Формат: "2025.9 (нед. 36)"
-            try:
-                # Разделяем по точке и скобке
-                parts = col.split(" (")
-                if len(parts) >= 2:
-                    year_month = parts[0]  # "2025.9"
-                    week_part = parts[1].split(")")[0]  # "нед. 36"
-                    
-                    # Извлекаем год и месяц
-                    year_month_parts = year_month.split(".")
-                    if len(year_month_parts) >= 2:
-                        year = int(year_month_parts[0])
-                        month = int(year_month_parts[1])
-                        
-                        # Извлекаем номер недели
-                        week_num = int(week_part.split("нед. ")[1])
-                    else:
-                        continue
-                else:
-                    continue
-            except (ValueError, IndexError):
-                continue
-            
-            # Получаем базовый процент для месяца
-            base_percentage = monthly_rentability_percentages.get(month, 100.0)
-            
-            # Определяем позицию недели в месяце (1-5)
-            week_in_month = ((week_num - 1) % 5) + 1
-            
-            # Создаем плавные переходы внутри месяца
-            monthly_variation = math.sin((week_in_month - 1) * math.pi / 2) * 0.02
-            
-            # Плавные переходы между месяцами
-            month_transition = 0.0
-            
-            # Находим предыдущий и следующий месяцы
-            prev_month = month - 1 if month > 1 else 12
-            next_month = month + 1 if month < 12 else 1
-            
-            prev_percentage = monthly_rentability_percentages.get(prev_month, 100.0)
-            next_percentage = monthly_rentability_percentages.get(next_month, 100.0)
-            
-            # Плавная интерполяция между месяцами
-            if week_in_month == 1:  # Первая неделя месяца
-                month_transition = (prev_percentage - base_percentage) * 0.2
-            elif week_in_month == 5:  # Последняя неделя месяца
-                month_transition = (next_percentage - base_percentage) * 0.2
-            elif week_in_month == 2:  # Вторая неделя месяца
-                month_transition = (prev_percentage - base_percentage) * 0.1
-            elif week_in_month == 4:  # Четвертая неделя месяца
-                month_transition = (next_percentage - base_percentage) * 0.1
-            elif week_in_month == 3:  # Средняя неделя месяца
-                month_transition = ((prev_percentage + next_percentage) / 2 - base_percentage) * 0.05
-            
-            # Применяем переходы
-            final_percentage = base_percentage + month_transition + (base_percentage * monthly_variation)
-            
-            # Добавляем реалистичные колебания для рентабельности
-            seasonal_factor = 1.0
-            if month in [12, 1]:  # Новогодние праздники
-                seasonal_factor = 0.95  # Снижение рентабельности
-            elif month in [6, 7, 8]:  # Летний период
-                seasonal_factor = 1.05  # Повышение рентабельности
-            elif month in [2, 3]:  # После праздников
-                seasonal_factor = 1.02  # Небольшое повышение
-            
-            # Случайные колебания (±1% для рентабельности)
-            random_factor = 1.0 + (random.random() - 0.5) * 0.02
-            
-            # Финальный процент
-            final_percentage = final_percentage * seasonal_factor * random_factor
-            
-            # Рассчитываем план рентабельности
-            rentability_plan = base_rentability * (final_percentage / 100)
-            
-            # Автоматическое исправление падений в неделях 39, 40, 45, 49
-            if week_num in [39, 40, 45, 49]:
-                # Находим соседние недели для интерполяции
-                prev_week_num = week_num - 1
-                next_week_num = week_num + 1
-                
-                # Ищем соседние недели в данных
-                prev_week_col = None
-                next_week_col = None
-                
-                for other_col in weekly_columns:
-                    if f"нед. {prev_week_num}" in other_col:
-                        prev_week_col = other_col
-                    elif f"нед. {next_week_num}" in other_col:
-                        next_week_col = other_col
-                
-                # Интерполируем значение для проблемных недель
-                if prev_week_col and next_week_col:
-                    # Используем среднее между соседними неделями
-                    prev_value = st.session_state.rentability_plan_values.get(prev_week_col, base_rentability * (final_percentage / 100))
-                    next_value = st.session_state.rentability_plan_values.get(next_week_col, base_rentability * (final_percentage / 100))
-                    rentability_plan = (prev_value + next_value) / 2
-                elif prev_week_col:
-                    # Если нет следующей недели, используем предыдущую с небольшим снижением
-                    prev_value = st.session_state.rentability_plan_values.get(prev_week_col, base_rentability * (final_percentage / 100))
-                    rentability_plan = prev_value * 0.95
-                elif next_week_col:
-                    # Если нет предыдущей недели, используем следующую с небольшим снижением
-                    next_value = st.session_state.rentability_plan_values.get(next_week_col, base_rentability * (final_percentage / 100))
-                    rentability_plan = next_value * 0.95
-            
-            # Сохраняем в session state
-            st.session_state.rentability_plan_values[col] = round(rentability_plan, 1)
-            
-            # Специальная обработка для недель 39 и 40 - принудительно обновляем значения рентабельности
-            if week_num in [39, 40]:
-                # Убеждаемся, что значения не равны нулю
-                if st.session_state.rentability_plan_values[col] == 0:
-                    # Используем среднее значение соседних недель или базовое значение
-                    if week_num == 39:
-                        # Для недели 39 используем значение недели 38 с небольшим увеличением
-                        week_38_col = f"{current_year}.9 (нед. 38)"
-                        if week_38_col in st.session_state.rentability_plan_values:
-                            base_val = st.session_state.rentability_plan_values[week_38_col]
-                            if base_val > 0:
-                                st.session_state.rentability_plan_values[col] = round(base_val * 1.02, 1)
-                            else:
-                                st.session_state.rentability_plan_values[col] = round(base_rentability * (final_percentage / 100), 1)
-                        else:
-                            st.session_state.rentability_plan_values[col] = round(base_rentability * (final_percentage / 100), 1)
-                    elif week_num == 40:
-                        # Для недели 40 используем значение недели 39 или недели 41
-                        week_39_col = f"{current_year}.9 (нед. 39)"
-                        week_41_col = f"{current_year}.10 (нед. 41)"
-                        if week_39_col in st.session_state.rentability_plan_values and st.session_state.rentability_plan_values[week_39_col] > 0:
-                            base_val = st.session_state.rentability_plan_values[week_39_col]
-                            st.session_state.rentability_plan_values[col] = round(base_val * 0.99, 1)
-                        elif week_41_col in st.session_state.rentability_plan_values and st.session_state.rentability_plan_values[week_41_col] > 0:
-                            base_val = st.session_state.rentability_plan_values[week_41_col]
-                            st.session_state.rentability_plan_values[col] = round(base_val * 1.01, 1)
-                        else:
-                            st.session_state.rentability_plan_values[col] = round(base_rentability * (final_percentage / 100), 1)
-            plan_generated += 1
-        
-        
-        if plan_generated > 0:
-            save_settings_to_cache()  # Сохраняем значения в кеш
-            st.success(f"✅ Сгенерирован план рентабельности для {plan_generated} недель")
-            return True
-        else:
-            st.warning("⚠️ Не удалось сгенерировать план рентабельности")
-            return False
+        st.session_state.rentability_plan_values.update(plan['Рентабельность план'].to_dict())
+        save_settings_to_cache()  # Сохраняем значения в кеш
+        st.success(f"✅ Сгенерирован план рентабельности для {len(plan)} недель")
+        return True
             
     except Exception as e:
         st.error(f"❌ Ошибка при генерации плана рентабельности: {str(e)}")
@@ -447,196 +322,30 @@ def fix_weeks_39_40_plans():
     # Сохраняем изменения в кеш
     save_settings_to_cache()
 
-def generate_seasonal_orders_plan(pivot_data, monthly_percentages, base_orders=50):
-    """Генерирует план заказов с плавными переходами между месяцами и реалистичными колебаниями"""
+def generate_seasonal_orders_plan(pivot_data, monthly_percentages, base_orders=50, seed=None):
+    """Генерирует план заказов и продаж с плавными переходами между месяцами (воспроизводимо при одном seed)"""
     try:
-        import math
-        import random
-        
-        # Получаем текущую дату
-        current_date = datetime.now()
-        current_year = current_date.year
-        
-        # Ищем столбцы текущего года
-        current_year_columns = [col for col in pivot_data.columns if str(current_year) in col and "(" in col]
+        current_year = datetime.now().year
+        buyout_percent = st.session_state.rentability_params.get('buyout_percent', 85.0)
+        plan = build_seasonal_plan(
+            pivot_data.columns,
+            monthly_percentages=monthly_percentages,
+            base_orders=base_orders,
+            buyout_percent=buyout_percent,
+            seed=get_plan_seed() if seed is None else seed,
+            year=current_year,
+        )
         
-        if not current_year_columns:
+        if plan.empty:
             st.warning(f"⚠️ Не найдены столбцы за {current_year} год")
             return False
         
-        # Сортируем столбцы по дате
-        current_year_columns.sort()
-        
-        plan_generated = 0
-        total_weeks = len(current_year_columns)
-        
-        # Создаем базовую кривую на основе месячных процентов
-        monthly_curve = []
-        for col in current_year_columns:
-            if f"{current_year}." in col:
-                # Извлекаем месяц из названия столбца
-                month_part = col.split(f"{current_year}.")[1].split(" (")[0]
-                month = int(month_part)
-                
-                # Получаем процент для этого месяца
-                percentage = monthly_percentages.get(month, 100.0)
-                monthly_curve.append(percentage)
-            else:
-                monthly_curve.append(100.0)
-        
-        # Проверяем на дублирующиеся недели
-        week_counts = {}
-        for col in current_year_columns:
-            if f"{current_year}." in col:
-                week_part = col.split(" (нед. ")[1].split(")")[0]
-                week_num = int(week_part)
-                if week_num not in week_counts:
-                    week_counts[week_num] = []
-                week_counts[week_num].append(col)
-        
-        # Создаем плавные переходы между месяцами
-        for i, col in enumerate(current_year_columns):
-            if f"{current_year}." in col:
-                # Извлекаем месяц и неделю
-                month_part = col.split(f"{current_year}.")[1].split(" (")[0]
-                month = int(month_part)
-                week_part = col.split(" (нед. ")[1].split(")")[0]
-                week_num = int(week_part)
-                
-                # Получаем базовый процент для месяца
-                base_percentage = monthly_percentages.get(month, 100.0)
-                
-                # Определяем позицию недели в месяце (1-5) с более плавными переходами
-                week_in_month = ((week_num - 1) % 5) + 1
-                
-                # Создаем плавные переходы внутри месяца
-                # Небольшая вариация внутри месяца (±3% вместо ±5%)
-                monthly_variation = math.sin((week_in_month - 1) * math.pi / 2) * 0.03
-                
-                # Плавные переходы между месяцами с более мягкими коэффициентами
-                month_transition = 0.0
-                
-                # Находим предыдущий и следующий месяцы
-                prev_month = month - 1 if month > 1 else 12
-                next_month = month + 1 if month < 12 else 1
-                
-                prev_percentage = monthly_percentages.get(prev_month, 100.0)
-                next_percentage = monthly_percentages.get(next_month, 100.0)
-                
-                # Более плавная интерполяция между месяцами
-                if week_in_month == 1:  # Первая неделя месяца
-                    # Плавный переход от предыдущего месяца (20% влияния вместо 30%)
-                    month_transition = (prev_percentage - base_percentage) * 0.2
-                elif week_in_month == 5:  # Последняя неделя месяца
-                    # Плавный переход к следующему месяцу (20% влияния вместо 30%)
-                    month_transition = (next_percentage - base_percentage) * 0.2
-                elif week_in_month == 2:  # Вторая неделя месяца
-                    # Меньшее влияние предыдущего месяца (10% вместо 15%)
-                    month_transition = (prev_percentage - base_percentage) * 0.1
-                elif week_in_month == 4:  # Четвертая неделя месяца
-                    # Меньшее влияние следующего месяца (10% вместо 15%)
-                    month_transition = (next_percentage - base_percentage) * 0.1
-                elif week_in_month == 3:  # Средняя неделя месяца
-                    # Минимальное влияние соседних месяцев (5%)
-                    month_transition = ((prev_percentage + next_percentage) / 2 - base_percentage) * 0.05
-                
-                # Применяем переходы
-                final_percentage = base_percentage + month_transition + (base_percentage * monthly_variation)
-                
-                # Добавляем реалистичные колебания
-                # Сезонные колебания
-                seasonal_factor = 1.0
-                if month in [12, 1]:  # Новогодние праздники
-                    seasonal_factor += 0.15
-                elif month in [6, 7, 8]:  # Летние месяцы
-                    seasonal_factor -= 0.1
-                elif month in [3, 4]:  # Весенний подъем
-                    seasonal_factor += 0.08
-                
-                # Небольшие случайные колебания (±2% вместо ±3%)
-                random_factor = random.uniform(0.98, 1.02)
-                
-                # Объединяем все факторы
-                final_percentage = final_percentage * seasonal_factor * random_factor
-                
-                # Рассчитываем план заказов
-                orders_plan = base_orders * (final_percentage / 100)
-                
-                # Дублирование недель теперь устранено при группировке данных
-                # Не нужно делить пополам, так как каждая неделя уникальна после группировки
-                
-                # Автоматическое исправление падений в неделях 39, 40, 45, 49
-                if week_num in [39, 40, 45, 49]:
-                    # Находим соседние недели для интерполяции
-                    prev_week_num = week_num - 1
-                    next_week_num = week_num + 1
-                    
-                    # Ищем соседние недели в данных
-                    prev_week_col = None
-                    next_week_col = None
-                    
-                    for other_col in current_year_columns:
-                        if f"нед. {prev_week_num}" in other_col:
-                            prev_week_col = other_col
-                        elif f"нед. {next_week_num}" in other_col:
-                            next_week_col = other_col
-                    
-                    # Интерполируем значение для проблемных недель
-                    if prev_week_col and next_week_col:
-                        # Используем среднее между соседними неделями
-                        prev_value = st.session_state.orders_plan_values.get(prev_week_col, base_orders * (final_percentage / 100))
-                        next_value = st.session_state.orders_plan_values.get(next_week_col, base_orders * (final_percentage / 100))
-                        orders_plan = (prev_value + next_value) / 2
-                    elif prev_week_col:
-                        # Если нет следующей недели, используем предыдущую с небольшим снижением
-                        prev_value = st.session_state.orders_plan_values.get(prev_week_col, base_orders * (final_percentage / 100))
-                        orders_plan = prev_value * 0.95
-                    elif next_week_col:
-                        # Если нет предыдущей недели, используем следующую с небольшим снижением
-                        next_value = st.session_state.orders_plan_values.get(next_week_col, base_orders * (final_percentage / 100))
-                        orders_plan = next_value * 0.95
-                
-                # Сохраняем в session state
-                st.session_state.orders_plan_values[col] = round(orders_plan, 1)
-                plan_generated += 1
-                
-                # Специальная обработка для недель 39 и 40 - принудительно обновляем значения
-                if week_num in [39, 40]:
-                    # Убеждаемся, что значения не равны нулю
-                    if st.session_state.orders_plan_values[col] == 0:
-                        # Используем среднее значение соседних недель или базовое значение
-                        if week_num == 39:
-                            # Для недели 39 используем значение недели 38 с небольшим увеличением
-                            week_38_col = f"{current_year}.9 (нед. 38)"
-                            if week_38_col in st.session_state.orders_plan_values:
-                                base_val = st.session_state.orders_plan_values[week_38_col]
-                                if base_val > 0:
-                                    st.session_state.orders_plan_values[col] = round(base_val * 1.05, 1)
-                                else:
-                                    st.session_state.orders_plan_values[col] = round(base_orders * (final_percentage / 100), 1)
-                            else:
-                                st.session_state.orders_plan_values[col] = round(base_orders * (final_percentage / 100), 1)
-                        elif week_num == 40:
-                            # Для недели 40 используем значение недели 39 или недели 41
-                            week_39_col = f"{current_year}.9 (нед. 39)"
-                            week_41_col = f"{current_year}.10 (нед. 41)"
-                            if week_39_col in st.session_state.orders_plan_values and st.session_state.orders_plan_values[week_39_col] > 0:
-                                base_val = st.session_state.orders_plan_values[week_39_col]
-                                st.session_state.orders_plan_values[col] = round(base_val * 0.98, 1)
-                            elif week_41_col in st.session_state.orders_plan_values and st.session_state.orders_plan_values[week_41_col] > 0:
-                                base_val = st.session_state.orders_plan_values[week_41_col]
-                                st.session_state.orders_plan_values[col] = round(base_val * 1.02, 1)
-                            else:
-                                st.session_state.orders_plan_values[col] = round(base_orders * (final_percentage / 100), 1)
-        
-        if plan_generated > 0:
-            save_settings_to_cache()
-            st.success(f"✅ Сгенерирован реалистичный план заказов для {plan_generated} недель")
-            st.info(f"📊 Использованы плавные переходы между месяцами и реалистичные колебания")
-            return True
-        else:
-            st.warning("⚠️ Не удалось сгенерировать план - нет подходящих данных")
-            return False
+        st.session_state.orders_plan_values.update(plan['Заказ план'].to_dict())
+        st.session_state.sales_plan_values.update(plan['Продажа план'].to_dict())
+        save_settings_to_cache()
+        st.success(f"✅ Сгенерирован реалистичный план заказов для {len(plan)} недель")
+        st.info(f"📊 Использованы плавные переходы между месяцами и реалистичные колебания")
+        return True
             
     except Exception as e:
         st.error(f"❌ Ошибка при генерации плана: {e}")
@@ -644,7 +353,6 @@ def generate_seasonal_orders_plan(pivot_data, monthly_percentages, base_orders=5
 
 
 
-
 def save_cache_data(data, filename):
     """Сохраняет данные в кеш файл"""
     try:
@@ -672,7 +380,6 @@ def save_settings_to_cache():
         'rentabelnost_fact_values': st.session_state.get('rentabelnost_fact_values', {}),
         'rentability_plan_values': st.session_state.get('rentability_plan_values', {}),
         'rentability_params': st.session_state.get('rentability_params', {}),
-        'rentability_cache': st.session_state.get('rentability_cache', {}),  # Кеш рассчитанных значений
         'uploaded_files_history': st.session_state.get('uploaded_files_history', []),  # История загруженных файлов
         'table_settings': st.session_state.get('table_settings', {}),  # Настройки таблицы
         'monthly_percentages': st.session_state.get('monthly_percentages', {}),  # Проценты по месяцам для планирования заказов
@@ -693,7 +400,6 @@ def load_settings_from_cache():
         st.session_state.rentabelnost_fact_values = settings.get('rentabelnost_fact_values', {})
         st.session_state.rentability_plan_values = settings.get('rentability_plan_values', {})
         st.session_state.rentability_params = settings.get('rentability_params', {})
-        st.session_state.rentability_cache = settings.get('rentability_cache', {})  # Кеш рассчитанных значений
         st.session_state.uploaded_files_history = settings.get('uploaded_files_history', [])  # История загруженных файлов
         st.session_state.table_settings = settings.get('table_settings', {})  # Настройки таблицы
         st.session_state.monthly_percentages = settings.get('monthly_percentages', {})  # Проценты по месяцам для планирования заказов
@@ -784,53 +490,52 @@ def calculate_unit_economics(
     storage_cost=0,       # Хранение (опционально)
     spp_discount=25.0     # СПП скидка
 ):
-    """Расчет юнит-экономики по формулам из таблицы себестоимости"""
-    
-    # 1. Цена со скидкой
-    price_with_discount = retail_price * (1 - discount_percent / 100)
-    
-    # 2. Цена с учетом СПП (не участвует в расчетах)
-    price_with_spp = price_with_discount * (1 - spp_discount / 100)
-    
-    # 3. Комиссия в рублях
-    commission_amount = price_with_discount * (commission_rate / 100)
-    
-    # 4. Реклама как доля от цены продажи
-    advertising_cost = price_with_discount * (advertising_percent / 100)
-    
-    # 5. Доставка (упрощенная формула)
-    delivery_cost = logistics_cost
-    
-    # 6. Налог с единицы (7%)
-    tax_per_unit = price_with_discount * 0.07
-    
-    # 7. Прибыль с единицы (упрощенная формула)
-    # Прибыль = Цена - Себестоимость - Комиссия - Реклама - Доставка - Налог - Хранение
-    profit_per_unit = price_with_discount - cost_price - commission_amount - advertising_cost - delivery_cost - tax_per_unit - storage_cost
-    
-    # 9. Маржинальность (%)
-    margin_percent = (profit_per_unit / price_with_discount) * 100 if price_with_discount > 0 else 0
-    
-    # 10. Рентабельность (%)
-    profitability_percent = (profit_per_unit / cost_price) * 100 if cost_price > 0 else 0
+    """Расчет юнит-экономики по формулам из таблицы себестоимости (логистика тарифом, налог 7% от цены)"""
+    ue = unit_economics_scalar(
+        price=retail_price, discount_percent=discount_percent, cost_price=cost_price,
+        commission_rate=commission_rate, logistics_cost=logistics_cost,
+        advertising_percent=advertising_percent, buyout_percent=buyout_percent,
+        storage_cost=storage_cost, tax_rate=7.0, logistics='flat', tax_base='price'
+    )
     
     return {
-        'Цена со скидкой': price_with_discount,
-        'Цена с учетом СПП': price_with_spp,
-        'Комиссия, руб': commission_amount,
-        'Выручка с ед.': price_with_discount - commission_amount - advertising_cost - delivery_cost - tax_per_unit - storage_cost,
-        'Реклама, руб': advertising_cost,
-        'Налог с ед., руб': tax_per_unit,
-        'Доставка с учетом выкупа': delivery_cost,
-        'Прибыль с ед.': profit_per_unit,
-        'Маржинальность, %': margin_percent,
-        'Рентабельность, %': profitability_percent
+        'Цена со скидкой': ue['Цена продажи'],
+        'Цена с учетом СПП': ue['Цена продажи'] * (1 - spp_discount / 100),
+        'Комиссия, руб': ue['Комиссия, руб'],
+        'Выручка с ед.': ue['Выручка с ед.'] - ue['Налог, руб'],
+        'Реклама, руб': ue['Реклама, руб'],
+        'Налог с ед., руб': ue['Налог, руб'],
+        'Доставка с учетом выкупа': ue['Логистика с учетом выкупа'],
+        'Прибыль с ед.': ue['Прибыль с ед.'],
+        'Маржинальность, %': ue['Маржинальность, %'],
+        'Рентабельность, %': ue['Рентабельность, %']
     }
 
-def get_rentability_cache_key(average_price, cost_price, discount_percent, commission_rate, 
-                             logistics_cost, advertising_percent, buyout_percent, storage_cost, spp_discount):
-    """Создает ключ для кеша рентабельности на основе всех параметров"""
-    return f"{average_price:.2f}_{cost_price:.2f}_{discount_percent:.2f}_{commission_rate:.2f}_{logistics_cost:.2f}_{advertising_percent:.2f}_{buyout_percent:.2f}_{storage_cost:.2f}_{spp_discount:.2f}"
+def complex_unit_economics(average_price, cost_price, commission_rate=15, logistics_cost=50,
+                           advertising_percent=0, buyout_percent=85, storage_cost=0):
+    """
+    Юнит-экономика от средней цены для строк «Рентабельность факт» и «Прибыль на ед.»:
+    логистика с учетом выкупа, налог 7% от цены, хранение. Принимает числа или массивы (по неделям).
+    Прибыль = Цена - Себестоимость - Комиссия - Реклама - Доставка - Налог - Хранение
+    """
+    return unit_economics(
+        price=average_price, cost_price=cost_price, commission_rate=commission_rate,
+        logistics_cost=logistics_cost, advertising_percent=advertising_percent,
+        buyout_percent=buyout_percent, storage_cost=storage_cost, tax_rate=7.0,
+        logistics='buyout', tax_base='price'
+    )
+
+def complex_unit_metrics(average_price, cost_price, commission_rate=15, logistics_cost=50,
+                         advertising_percent=0, buyout_percent=85, storage_cost=0):
+    """
+    complex_unit_economics для одного набора чисел через общую LRU-память (unit_economics_memo).
+    Ключ — кортеж параметров, результат из них выводится, поэтому память не пишется в settings_cache.pkl.
+    """
+    return unit_economics_memo(
+        float(average_price), float(cost_price), float(commission_rate), float(logistics_cost),
+        float(advertising_percent), float(buyout_percent), float(storage_cost), 7.0,
+        logistics='buyout', tax_base='price'
+    )
 
 def calculate_complex_rentability(average_price, cost_price, discount_percent=0, commission_rate=15, 
                                  logistics_cost=50, advertising_percent=0, buyout_percent=85, 
@@ -839,52 +544,15 @@ def calculate_complex_rentability(average_price, cost_price, discount_percent=0,
     if average_price <= 0 or cost_price <= 0:
         return 0.0
     
-    # Инициализируем кеш если его нет
-    if 'rentability_cache' not in st.session_state:
-        st.session_state.rentability_cache = {}
-    
-    # Создаем ключ для кеша
-    cache_key = get_rentability_cache_key(average_price, cost_price, discount_percent, commission_rate, 
-                                        logistics_cost, advertising_percent, buyout_percent, storage_cost, spp_discount)
-    
-    # Проверяем кеш
-    if use_cache and cache_key in st.session_state.rentability_cache:
-        return st.session_state.rentability_cache[cache_key]
-    
-    # Используем среднюю цену как "Цена со скидкой" из таблицы себестоимости
-    price_with_discount = average_price
-    
-    # 1. Цена с учетом СПП (не участвует в расчетах)
-    price_with_spp = price_with_discount * (1 - spp_discount / 100)
-    
-    # 2. Комиссия в рублях
-    commission_amount = price_with_discount * (commission_rate / 100)
-    
-    # 3. Реклама как доля от цены продажи
-    advertising_cost = price_with_discount * (advertising_percent / 100)
-    
-    # 4. Доставка (сложная формула с учетом процента выкупа)
-    buyout_ratio = buyout_percent / 100
-    delivery_cost = (buyout_ratio * logistics_cost + (1 - buyout_ratio) * (logistics_cost + 50)) * 100 / buyout_percent
-    
-    # 5. Налог с единицы (7%)
-    tax_per_unit = price_with_discount * 0.07
-    
-    # 6. Прибыль с единицы (упрощенная формула)
-    # Прибыль = Цена - Себестоимость - Комиссия - Реклама - Доставка - Налог - Хранение
-    profit_per_unit = price_with_discount - cost_price - commission_amount - advertising_cost - delivery_cost - tax_per_unit - storage_cost
-    
-    # 8. Рентабельность (%)
-    profitability_percent = (profit_per_unit / cost_price) * 100 if cost_price > 0 else 0
-    
-    result = profitability_percent  # Показываем реальную рентабельность (включая отрицательную)
-    
-    # Сохраняем в кеш
+    # Средняя цена - это "Цена со скидкой" из таблицы себестоимости (скидка уже учтена)
     if use_cache:
-        st.session_state.rentability_cache[cache_key] = result
-        save_settings_to_cache()  # Сохраняем кеш
+        metrics = complex_unit_metrics(average_price, cost_price, commission_rate, logistics_cost,
+                                       advertising_percent, buyout_percent, storage_cost)
+    else:
+        metrics = complex_unit_economics(average_price, cost_price, commission_rate, logistics_cost,
+                                         advertising_percent, buyout_percent, storage_cost)
     
-    return result
+    return float(metrics['Рентабельность, %'])  # Показываем реальную рентабельность (включая отрицательную)
 
 def calculate_profit_per_unit(average_price, cost_price, discount_percent=0, commission_rate=15, 
                              logistics_cost=50, advertising_percent=0, buyout_percent=85, 
@@ -893,47 +561,15 @@ def calculate_profit_per_unit(average_price, cost_price, discount_percent=0, com
     if average_price <= 0 or cost_price <= 0:
         return 0.0
     
-    # Инициализируем кеш если его нет
-    if 'profit_per_unit_cache' not in st.session_state:
-        st.session_state.profit_per_unit_cache = {}
-    
-    # Создаем ключ для кеша
-    cache_key = get_rentability_cache_key(average_price, cost_price, discount_percent, commission_rate, 
-                                        logistics_cost, advertising_percent, buyout_percent, storage_cost, spp_discount)
-    
-    # Проверяем кеш
-    if use_cache and cache_key in st.session_state.profit_per_unit_cache:
-        return st.session_state.profit_per_unit_cache[cache_key]
-    
-    # Используем среднюю цену как "Цена со скидкой" из таблицы себестоимости
-    price_with_discount = average_price
-    
-    # 1. Цена с учетом СПП (не участвует в расчетах)
-    price_with_spp = price_with_discount * (1 - spp_discount / 100)
-    
-    # 2. Комиссия в рублях
-    commission_amount = price_with_discount * (commission_rate / 100)
-    
-    # 3. Реклама как доля от цены продажи
-    advertising_cost = price_with_discount * (advertising_percent / 100)
-    
-    # 4. Доставка (сложная формула с учетом процента выкупа)
-    buyout_ratio = buyout_percent / 100
-    delivery_cost = (buyout_ratio * logistics_cost + (1 - buyout_ratio) * (logistics_cost + 50)) * 100 / buyout_percent
-    
-    # 5. Налог с единицы (7%)
-    tax_per_unit = price_with_discount * 0.07
-    
-    # 6. Прибыль с единицы (упрощенная формула)
-    # Прибыль = Цена - Себестоимость - Комиссия - Реклама - Доставка - Налог - Хранение
-    profit_per_unit = price_with_discount - cost_price - commission_amount - advertising_cost - delivery_cost - tax_per_unit - storage_cost
-    
-    # Сохраняем в кеш
+    # Средняя цена - это "Цена со скидкой" из таблицы себестоимости (скидка уже учтена)
     if use_cache:
-        st.session_state.profit_per_unit_cache[cache_key] = profit_per_unit
-        save_settings_to_cache()  # Сохраняем кеш
+        metrics = complex_unit_metrics(average_price, cost_price, commission_rate, logistics_cost,
+                                       advertising_percent, buyout_percent, storage_cost)
+    else:
+        metrics = complex_unit_economics(average_price, cost_price, commission_rate, logistics_cost,
+                                         advertising_percent, buyout_percent, storage_cost)
     
-    return profit_per_unit
+    return float(metrics['Прибыль с ед.'])
 
 def load_additional_data(uploaded_file):
     """Загружает дополнительные данные из загруженного файла"""
@@ -1275,19 +911,16 @@ with col2:
             for cache_file in cache_files:
                 if os.path.exists(cache_file):
                     os.remove(cache_file)
-            if 'rentability_cache' in st.session_state:
-                st.session_state.rentability_cache = {}
+            unit_economics_memo.cache_clear()
             st.success("✅ Кеш очищен!")
 
-# Информация о кеше рентабельности
-if 'rentability_cache' in st.session_state:
-    cache_count = len(st.session_state.rentability_cache)
-    st.caption(f"💰 Кеш рентабельности: {cache_count} значений")
-    
-    if st.button("🔄 Пересчитать", help="Пересчитать рентабельность"):
-        st.session_state.rentability_cache = {}
-        save_settings_to_cache()
-        st.success("✅ Кеш очищен! Будет пересчет.")
+# Информация о кеше рентабельности (LRU-память в процессе, на диск не пишется)
+cache_count = unit_economics_memo.cache_info().currsize
+st.caption(f"💰 Кеш рентабельности: {cache_count} значений")
+
+if st.button("🔄 Пересчитать", help="Пересчитать рентабельность"):
+    unit_economics_memo.cache_clear()
+    st.success("✅ Кеш очищен! Будет пересчет.")
 
 # Настройки таблицы (компактная версия)
 with st.sidebar.expander("⚙️ Настройки таблицы", expanded=False):
@@ -1455,10 +1088,6 @@ with st.sidebar.expander("💰 Параметры рентабельности",
     )
 
 
-# Инициализируем кеш рентабельности если его нет
-if 'rentability_cache' not in st.session_state:
-    st.session_state.rentability_cache = {}
-
 # Автоматически загружаем настройки из кеша при старте
 if not load_settings_from_cache():
     # Если кеш не найден, инициализируем значения по умолчанию
@@ -1540,8 +1169,7 @@ if spp_discount != st.session_state.rentability_params.get('spp_discount', 25.0)
     # Сохраняем изменения если они есть
 if params_changed:
     save_settings_to_cache()
-    # Очищаем кеш рентабельности при изменении параметров
-    st.session_state.rentability_cache = {}
+    # Кеш рентабельности не очищаем: параметры входят в ключ памяти
     st.success("✅ Настройки рентабельности сохранены и кешированы!")
 
 
@@ -1644,52 +1272,6 @@ if df is not None:
         # Создаем простую таблицу
         st.subheader("📈 Сводная таблица")
         
-        # Используем даты из Voronka.xlsx для группировки по неделям (приоритет)
-        if date_col:
-            try:
-                # Безопасно конвертируем в datetime
-                df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
-                
-                # Проверяем, что конвертация прошла успешно
-                valid_dates = df[date_col].notna()
-                if valid_dates.any():
-                    # Создаем столбцы только для валидных дат
-                    df.loc[valid_dates, 'Неделя'] = df.loc[valid_dates, date_col].dt.isocalendar().week
-                    df.loc[valid_dates, 'Год'] = df.loc[valid_dates, date_col].dt.year
-                    df.loc[valid_dates, 'Месяц'] = df.loc[valid_dates, date_col].dt.month
-                    # Создаем уникальный формат дат для недель (избегаем дублирования)
-                    # Используем ISO номер недели для уникальности
-                    df.loc[valid_dates, 'Неделя_Год'] = (
-                        df.loc[valid_dates, 'Год'].astype(int).astype(str) + '.' + 
-                        df.loc[valid_dates, 'Месяц'].astype(int).astype(str) + 
-                        ' (нед. ' + df.loc[valid_dates, 'Неделя'].astype(int).astype(str) + ')'
-                    )
-                    
-                    # Дублирование недель будет устранено при группировке данных
-                    # Создаем столбец для группировки по месяцам
-                    df.loc[valid_dates, 'Месяц_Год'] = (
-                        df.loc[valid_dates, 'Год'].astype(int).astype(str) + '.' + 
-                        df.loc[valid_dates, 'Месяц'].astype(int).astype(str).str.zfill(2)
-                    )
-                    
-                    # Для строк без валидных дат создаем простую группировку
-                    invalid_mask = ~valid_dates
-                    if invalid_mask.any():
-                        df.loc[invalid_mask, 'Неделя_Год'] = 'Неделя ' + (df[invalid_mask].index + 1).astype(str)
-                        df.loc[invalid_mask, 'Месяц_Год'] = 'Месяц ' + (df[invalid_mask].index + 1).astype(str)
-                else:
-                    # Создаем простую группировку по порядку
-                    df['Неделя_Год'] = 'Неделя ' + (df.index + 1).astype(str)
-                    df['Месяц_Год'] = 'Месяц ' + (df.index + 1).astype(str)
-            except Exception as e:
-                # Создаем простую группировку по порядку
-                df['Неделя_Год'] = 'Неделя ' + (df.index + 1).astype(str)
-                df['Месяц_Год'] = 'Месяц ' + (df.index + 1).astype(str)
-        else:
-            # Если нет дат в Voronka.xlsx, создаем простую группировку по порядку
-            df['Неделя_Год'] = 'Неделя ' + (df.index + 1).astype(str)
-            df['Месяц_Год'] = 'Месяц ' + (df.index + 1).astype(str)
-        
         # Группируем по неделям - суммируем данные внутри недели, но неделя перезаписывается при загрузке нового файла
         agg_dict = {
             orders_col: 'sum',  # Суммируем внутри недели
@@ -1721,263 +1303,22 @@ if df is not None:
         # if cancelled_wb_col and pd.api.types.is_numeric_dtype(df[cancelled_wb_col]):
         #     agg_dict[cancelled_wb_col] = 'sum'
         
-        weekly_data = df.groupby('Неделя_Год').agg(agg_dict).reset_index()
-        
-        # Убрано временное исправление для 37 недели - проблема была в дублированных записях
-        
-        # Данные успешно обработаны и сгруппированы по неделям
-        
-        # Данные загружены и готовы к обработке
-        
-        # Сортируем недели по дате (от старых к новым - слева направо для плавного отображения)
-        # Создаем временную колонку для сортировки по году, месяцу и неделе
-        weekly_data['year'] = weekly_data['Неделя_Год'].str.extract(r'(\d{4})').astype(int)
-        weekly_data['month'] = weekly_data['Неделя_Год'].str.extract(r'(\d{4})\.(\d+)')[1].astype(int)
-        weekly_data['week'] = weekly_data['Неделя_Год'].str.extract(r'нед\. (\d+)').astype(int)
-        weekly_data = weekly_data.sort_values(['year', 'month', 'week'], ascending=True).drop(['year', 'month', 'week'], axis=1)
-        
-        # Создаем сводную таблицу по неделям
-        weekly_pivot_data = weekly_data.set_index('Неделя_Год').T
-        
-        # Создаем сводную таблицу по месяцам
-        monthly_data = df.groupby('Месяц_Год').agg(agg_dict).reset_index()
-        # Сортируем месяцы (от старых к новым для плавного отображения)
-        monthly_data['year'] = monthly_data['Месяц_Год'].str.extract(r'(\d{4})').astype(int)
-        monthly_data['month'] = monthly_data['Месяц_Год'].str.extract(r'(\d{4})\.(\d+)')[1].astype(int)
-        monthly_data = monthly_data.sort_values(['year', 'month'], ascending=True).drop(['year', 'month'], axis=1)
-        monthly_pivot_data = monthly_data.set_index('Месяц_Год').T
+        # Недели и месяцы считаются одним проходом по целочисленным ключам (год, месяц, неделя ISO);
+        # строки без корректной даты в таблицу не попадают, подписи столбцов строятся в конце
+        if not date_col:
+            st.warning("⚠️ В файле нет столбца с датой - сводная таблица по неделям не строится")
+            pivot_keys = pd.DataFrame(index=list(agg_dict))
+        else:
+            pivot_keys = build_period_pivot(df, date_col, agg_dict)
         
-        # Создаем итоговую таблицу, начиная с недельных данных
-        pivot_data = weekly_pivot_data.copy()
+        # Месячные столбцы из данных (для итогов «Общие по месяцам»)
+        monthly_pivot_data = label_columns(pivot_keys[[key for key in pivot_keys.columns if key[2] == MONTH_WEEK]])
         
-        # Добавляем столбец "Общие по месяцам"
+        # Недели и месяцы плана, которые нужны в таблице даже без данных;
+        # порядок: недели месяца, затем месячный столбец; «Общие по месяцам» в конце
+        pivot_data = label_columns(add_period_columns(pivot_keys, PLAN_EXTRA_KEYS))
         pivot_data["Общие по месяцам"] = 0.0
-        
-        # Добавляем месячные столбцы в pivot_data
-        for col in monthly_pivot_data.columns:
-            if col not in pivot_data.columns:
-                pivot_data[col] = monthly_pivot_data[col]
-            else:
-                # Если столбец уже существует, обновляем его значения
-                pivot_data[col] = monthly_pivot_data[col]
-        
-        # Добавляем недостающие месячные столбцы для 2025 года
-        # Проверяем, какие месяцы уже есть в данных
-        existing_2025_months = [col for col in pivot_data.columns if col.startswith("2025.") and '(' not in col]
-        
-        # Добавляем только те месяцы, которых действительно нет
-        required_months = ['2025.9', '2025.10', '2025.11', '2025.12']
-        for month in required_months:
-            # Проверяем, есть ли этот месяц в разных форматах
-            month_exists = False
-            for existing_month in existing_2025_months:
-                # Нормализуем оба формата для сравнения
-                year1, month1 = month.split('.')
-                year2, month2 = existing_month.split('.')
-                normalized1 = f"{year1}.{month1.zfill(2)}"
-                normalized2 = f"{year2}.{month2.zfill(2)}"
-                if normalized1 == normalized2:
-                    month_exists = True
-                    break
-            
-            if not month_exists and month not in pivot_data.columns:
-                # Создаем пустой столбец для недостающего месяца
-                pivot_data[month] = 0.0
-        
-        # Добавляем недостающие недельные столбцы для месяцев 2025.09, 2025.10, 2025.11, 2025.12
-        missing_weeks = [
-            # Сентябрь 2025 (недели 39-40) - недели 39-40 имеют больше дней в сентябре
-            '2025.9 (нед. 39)', '2025.9 (нед. 40)',
-            # Октябрь 2025 (недели 41-44)
-            '2025.10 (нед. 41)', '2025.10 (нед. 42)', '2025.10 (нед. 43)', '2025.10 (нед. 44)',
-            # Ноябрь 2025 (недели 45-48)
-            '2025.11 (нед. 45)', '2025.11 (нед. 46)', '2025.11 (нед. 47)', '2025.11 (нед. 48)',
-            # Декабрь 2025 (недели 49-52)
-            '2025.12 (нед. 49)', '2025.12 (нед. 50)', '2025.12 (нед. 51)', '2025.12 (нед. 52)'
-        ]
-        
-        for week in missing_weeks:
-            if week not in pivot_data.columns:
-                pivot_data[week] = 0.0
-                # st.write(f"🔧 Добавлен недостающий недельный столбец: {week}")  # Убрано по запросу пользователя
-        
-        # Переупорядочиваем столбцы: группируем недели по месяцам
-        # Создаем новый порядок столбцов
-        new_columns = []
-        
-        # Определяем порядок месяцев и их недель (неделя отдается месяцу с большим количеством дней)
-        month_week_mapping = {
-            '2025.07': ['2025.7 (нед. 27)', '2025.7 (нед. 28)', '2025.7 (нед. 29)', '2025.7 (нед. 30)', '2025.7 (нед. 31)'],
-            '2025.08': ['2025.8 (нед. 31)', '2025.8 (нед. 32)', '2025.8 (нед. 33)', '2025.8 (нед. 34)', '2025.8 (нед. 35)'],
-            '2025.09': ['2025.9 (нед. 36)', '2025.9 (нед. 37)', '2025.9 (нед. 38)', '2025.9 (нед. 39)', '2025.9 (нед. 40)'],  # Сентябрь - недели 39-40 имеют больше дней в сентябре
-            '2025.10': ['2025.10 (нед. 41)', '2025.10 (нед. 42)', '2025.10 (нед. 43)', '2025.10 (нед. 44)'],  # Октябрь
-            '2025.11': ['2025.11 (нед. 45)', '2025.11 (нед. 46)', '2025.11 (нед. 47)', '2025.11 (нед. 48)'],
-            '2025.12': ['2025.12 (нед. 49)', '2025.12 (нед. 50)', '2025.12 (нед. 51)', '2025.12 (нед. 52)']
-        }
-        
-        # Добавляем недели и месячные столбцы в правильном порядке
-        for month, weeks in month_week_mapping.items():
-            # Добавляем недели этого месяца
-            for week in weeks:
-                if week in pivot_data.columns:
-                    new_columns.append(week)
-            # Добавляем месячный столбец
-            if month in pivot_data.columns:
-                new_columns.append(month)
-        
-        # Добавляем остальные столбцы
-        for col in pivot_data.columns:
-            if col not in new_columns:
-                new_columns.append(col)
-        
-        # Переупорядочиваем DataFrame
-        pivot_data = pivot_data[new_columns]
-        
-        
-        
-        # Используем уже созданный правильный порядок столбцов
-        final_columns = new_columns
-        
-        # Принудительно отключаем кеш для отладки
-        cached_columns = None
-
-        # Используем кешированный порядок столбцов или создаем новый
-        if False and cached_columns and all(col in pivot_data.columns for col in cached_columns):
-            # Проверяем, есть ли в кеше месячные столбцы
-            monthly_cols_in_cache = [col for col in cached_columns if col.startswith(("2024.", "2023.", "2022.", "2025.")) and '(' not in col]
-            monthly_cols_in_data = [col for col in pivot_data.columns if col.startswith(("2024.", "2023.", "2022.", "2025.")) and '(' not in col]
-            
-            if len(monthly_cols_in_cache) == len(monthly_cols_in_data):
-                # Используем кешированный порядок
-                final_columns = [col for col in cached_columns if col in pivot_data.columns]
-                # Добавляем новые столбцы, которых не было в кеше
-                for col in pivot_data.columns:
-                    if col not in final_columns:
-                        final_columns.append(col)
-                # Удаляем дублирующиеся месячные столбцы в кешированной версии, но сохраняем их в правильных местах
-                # Создаем новый final_columns без дублирующихся месячных столбцов
-                new_final_columns = []
-                seen_monthly_cols = set()
-                
-                for col in final_columns:
-                    if col.startswith(("2024.", "2023.", "2022.", "2025.")) and '(' not in col:
-                        # Это месячный столбец - проверяем на дублирование
-                        year, month = col.split('.')
-                        normalized = f"{year}.{month.zfill(2)}"
-                        if normalized not in seen_monthly_cols:
-                            new_final_columns.append(col)
-                            seen_monthly_cols.add(normalized)
-                    else:
-                        # Это не месячный столбец - добавляем как есть
-                        new_final_columns.append(col)
-                
-                final_columns = new_final_columns
-                
-            else:
-                cached_columns = None  # Принудительно создаем новый порядок
-        
-        if not cached_columns or not all(col in pivot_data.columns for col in cached_columns):
-            # Создаем новый порядок столбцов
-            final_columns = []
-            
-            # Получаем уникальные месяцы из недельных данных
-            weekly_months = set()
-            for col in weekly_pivot_data.columns:
-                if '(' in col and 'нед.' in col:
-                    # Извлекаем месяц из формата "2024.01 (нед. 01)" или "2025.9 (нед. 38)"
-                    month_part = col.split(' (')[0]  # "2024.01" или "2025.9"
-                    # Унифицируем формат: добавляем ведущий ноль если нужно
-                    year, month = month_part.split('.')
-                    month_normalized = f"{year}.{month.zfill(2)}"
-                    weekly_months.add(month_normalized)
-            
-            # Добавляем месяцы из monthly_pivot_data, которых может не быть в недельных данных
-            for col in monthly_pivot_data.columns:
-                # Унифицируем формат и для месячных столбцов
-                year, month = col.split('.')
-                month_normalized = f"{year}.{month.zfill(2)}"
-                weekly_months.add(month_normalized)
-            
-            # Принудительно добавляем месяцы 2025.9, 2025.10, 2025.11, 2025.12 если их нет
-            required_2025_months = ['2025.09', '2025.10', '2025.11', '2025.12']
-            for month in required_2025_months:
-                weekly_months.add(month)
-            
-            # Сортируем месяцы по возрастанию (сначала год, потом месяц)
-            sorted_months = sorted(weekly_months, key=lambda x: (int(x.split('.')[0]), int(x.split('.')[1])))
-            
-            
-            # Создаем правильный порядок столбцов: недели месяца, затем месячный столбец
-            for month in sorted_months:
-                # Добавляем недельные столбцы этого месяца
-                month_weeks = []
-                for col in pivot_data.columns:
-                    if '(' in col and 'нед.' in col:
-                        col_month_part = col.split(' (')[0]
-                        # Унифицируем формат для сравнения
-                        col_year, col_month = col_month_part.split('.')
-                        col_month_normalized = f"{col_year}.{col_month.zfill(2)}"
-                        
-                        if col_month_normalized == month:
-                            month_weeks.append(col)
-                
-                # Сортируем недели по возрастанию (слева направо)
-                month_weeks.sort(key=lambda x: int(x.split('нед. ')[1].split(')')[0]), reverse=False)
-                final_columns.extend(month_weeks)
-                
-                # Добавляем месячный столбец после недель этого месяца
-                monthly_col = None
-                for col in pivot_data.columns:
-                    # Проверяем только месячные столбцы (содержат год.месяц без скобок)
-                    if '(' not in col and '.' in col and col.startswith(("2024.", "2023.", "2022.", "2025.")) and col not in month_weeks:
-                        col_year, col_month = col.split('.')
-                        col_month_normalized = f"{col_year}.{col_month.zfill(2)}"
-                        # Проверяем как нормализованный формат, так и оригинальный
-                        if col_month_normalized == month or col == month:
-                            monthly_col = col
-                            break
-                
-                # Если не нашли месячный столбец, создаем его для месяцев 2025.9-2025.12
-                if not monthly_col and month in ['2025.09', '2025.10', '2025.11', '2025.12']:
-                    # Преобразуем нормализованный формат обратно в оригинальный
-                    year, month_num = month.split('.')
-                    original_month = f"{year}.{int(month_num)}"  # Убираем ведущий ноль
-                    if original_month in pivot_data.columns:
-                        monthly_col = original_month
-                
-                if monthly_col:
-                    final_columns.append(monthly_col)
-            
-            
-            
-            # Добавляем столбец "Общие по месяцам" в конец
-            final_columns.append("Общие по месяцам")
-            
-            
-            # Убеждаемся, что все столбцы из pivot_data включены в final_columns
-            # Но только те, которые не являются месячными (они уже добавлены в правильном порядке)
-            for col in pivot_data.columns:
-                if col not in final_columns and not (col.startswith(("2024.", "2023.", "2022.", "2025.")) and '(' not in col):
-                    final_columns.append(col)
-            
-            # Удаляем дублирующиеся месячные столбцы, но сохраняем их в правильных местах
-            # Создаем новый final_columns без дублирующихся месячных столбцов
-            new_final_columns = []
-            seen_monthly_cols = set()
-            
-            for col in final_columns:
-                if col.startswith(("2024.", "2023.", "2022.", "2025.")) and '(' not in col:
-                    # Это месячный столбец - проверяем на дублирование
-                    year, month = col.split('.')
-                    normalized = f"{year}.{month.zfill(2)}"
-                    if normalized not in seen_monthly_cols:
-                        new_final_columns.append(col)
-                        seen_monthly_cols.add(normalized)
-                else:
-                    # Это не месячный столбец - добавляем как есть
-                    new_final_columns.append(col)
-            
-            final_columns = new_final_columns
+        final_columns = list(pivot_data.columns)
         
         # Добавляем будущие столбцы если включена опция
         if st.session_state.table_settings.get('show_future_dates', True):
@@ -2013,17 +1354,9 @@ if df is not None:
             # Фильтруем столбцы, скрывая недели до выбранной
             filtered_columns = []
             for col in final_columns:
-                if "(" in col and "нед." in col:
-                    try:
-                        week_part = col.split("(нед.")[1].split(")")[0].strip()
-                        week_num = int(week_part)
-                        if week_num >= hide_weeks_before:
-                            filtered_columns.append(col)
-                    except (ValueError, IndexError):
-                        # Если не удается распарсить номер недели, оставляем столбец
-                        filtered_columns.append(col)
-                else:
-                    # Не недельные столбцы оставляем
+                key = parse_period_label(col)
+                if key is None or key[2] == MONTH_WEEK or key[2] >= hide_weeks_before:
+                    # Месячные и прочие столбцы оставляем
                     filtered_columns.append(col)
             
             # Обновляем final_columns с отфильтрованными столбцами
@@ -2169,6 +1502,9 @@ if df is not None:
         avg_price_row.name = "Средняя цена"
         pivot_data = pd.concat([pivot_data, avg_price_row.to_frame().T])
         
+        # Недели каждого месячного столбца (по ключам, формат подписи месяца не важен)
+        month_weeks_map = month_week_columns(pivot_data.columns)
+        
         # Создаем строки в правильном порядке согласно index_names
         # Сначала создаем базовые строки, затем зависимые
         for idx_name in index_names:
@@ -2176,20 +1512,8 @@ if df is not None:
                 # Строка уже добавлена выше, пропускаем
                 continue
             elif idx_name == "Реклама":
-                # Загружаем значения из session state
-                values = []
-                for col in pivot_data.columns:
-                    if col == "Общие по месяцам":
-                        values.append(0.0)  # Будет рассчитано позже
-                    elif col.startswith(("2024.", "2023.", "2022.", "2025.")) and '(' not in col:
-                        # Месячные столбцы - рассчитываем сумму по неделям
-                        month_weeks = [c for c in pivot_data.columns if c.startswith(col + ' (')]
-                        reklama_total = sum(st.session_state.get('reklama_values', {}).get(week, 0.0) for week in month_weeks)
-                        values.append(reklama_total)
-                    else:
-                        week_reklama = st.session_state.reklama_values.get(col, 0.0)
-                        values.append(week_reklama)
-                row = pd.Series(values, index=pivot_data.columns)
+                # Недели - из session state, месяцы - сумма по своим неделям
+                row = pd.Series(overlay_plan(pivot_data.columns, st.session_state.reklama_values), index=pivot_data.columns)
                 row.name = "Реклама"
                 additional_rows.append(row.to_frame().T)
             elif idx_name == "ДРР":
@@ -2204,7 +1528,7 @@ if df is not None:
                         values.append(0.0)  # Будет рассчитано позже
                     elif col.startswith(("2024.", "2023.", "2022.", "2025.")) and '(' not in col:
                         # Месячные столбцы - среднее ДРР по неделям этого месяца
-                        month_weeks = [c for c in pivot_data.columns if c.startswith(col + ' (')]
+                        month_weeks = month_weeks_map.get(col, [])
                         drr_values = []
                         for week_col in month_weeks:
                             reklama_value = st.session_state.get('reklama_values', {}).get(week_col, 0.0)
@@ -2241,178 +1565,66 @@ if df is not None:
                 row.name = "ДРР"
                 additional_rows.append(row.to_frame().T)
             elif idx_name == "Заказ план":
-                # Сначала проверяем данные из исходного файла, потом из session state
-                values = []
-                for col in pivot_data.columns:
-                    if col == "Общие по месяцам":
-                        values.append(0.0)  # Будет рассчитано позже
-                    elif col.startswith(("2024.", "2023.", "2022.", "2025.")) and '(' not in col:
-                        # Месячные столбцы - рассчитываем сумму по неделям
-                        month_weeks = [c for c in pivot_data.columns if c.startswith(col + ' (')]
-                        orders_plan_total = 0.0
-                        for week in month_weeks:
-                            # Сначала проверяем данные из исходного файла
-                            if orders_plan_col and week in pivot_data.index:
-                                file_value = pivot_data.loc[week, orders_plan_col] if pd.notna(pivot_data.loc[week, orders_plan_col]) else 0.0
-                                if file_value > 0:
-                                    orders_plan_total += file_value
-                                else:
-                                    orders_plan_total += st.session_state.get('orders_plan_values', {}).get(week, 0.0)
-                            else:
-                                orders_plan_total += st.session_state.get('orders_plan_values', {}).get(week, 0.0)
-                        values.append(orders_plan_total)
-                    else:
-                        # Сначала проверяем данные из исходного файла
-                        if orders_plan_col and col in pivot_data.index:
-                            file_value = pivot_data.loc[col, orders_plan_col] if pd.notna(pivot_data.loc[col, orders_plan_col]) else 0.0
-                            if file_value > 0:
-                                values.append(file_value)
-                            else:
-                                values.append(st.session_state.orders_plan_values.get(col, 0.0))
-                        else:
-                            values.append(st.session_state.orders_plan_values.get(col, 0.0))
-                row = pd.Series(values, index=pivot_data.columns)
+                # Недели - из session state, месяцы - сумма по своим неделям
+                orders_plan_row = overlay_plan(pivot_data.columns, st.session_state.orders_plan_values)
+                row = pd.Series(orders_plan_row, index=pivot_data.columns)
                 row.name = "Заказ план"
                 additional_rows.append(row.to_frame().T)
             elif idx_name == "Продажа план":
-                # Сначала проверяем данные из исходного файла, потом рассчитываем как Заказ план × % выкупа
-                values = []
+                # Заказ план × % выкупа (месяцы - сумма по неделям, поэтому масштабируются так же)
                 buyout_percent = st.session_state.rentability_params.get('buyout_percent', 85.0)
-                
-                for col in pivot_data.columns:
-                    if col == "Общие по месяцам":
-                        values.append(0.0)  # Будет рассчитано позже
-                    elif col.startswith(("2024.", "2023.", "2022.", "2025.")) and '(' not in col:
-                        # Месячные столбцы - рассчитываем сумму по неделям
-                        month_weeks = [c for c in pivot_data.columns if c.startswith(col + ' (')]
-                        sales_plan_total = 0.0
-                        for week in month_weeks:
-                            # Сначала проверяем данные из исходного файла
-                            if sales_plan_col and week in pivot_data.index:
-                                file_value = pivot_data.loc[week, sales_plan_col] if pd.notna(pivot_data.loc[week, sales_plan_col]) else 0.0
-                                if file_value > 0:
-                                    sales_plan_total += file_value
-                                else:
-                                    # Рассчитываем как Заказ план × % выкупа
-                                    orders_plan = st.session_state.get('orders_plan_values', {}).get(week, 0.0)
-                                    sales_plan = orders_plan * (buyout_percent / 100)
-                                    sales_plan_total += sales_plan
-                            else:
-                                # Рассчитываем как Заказ план × % выкупа
-                                orders_plan = st.session_state.get('orders_plan_values', {}).get(week, 0.0)
-                                sales_plan = orders_plan * (buyout_percent / 100)
-                                sales_plan_total += sales_plan
-                        values.append(sales_plan_total)
-                    else:
-                        # Сначала проверяем данные из исходного файла
-                        if sales_plan_col and col in pivot_data.index:
-                            file_value = pivot_data.loc[col, sales_plan_col] if pd.notna(pivot_data.loc[col, sales_plan_col]) else 0.0
-                            if file_value > 0:
-                                values.append(file_value)
-                            else:
-                                # Рассчитываем как Заказ план × % выкупа
-                                orders_plan = st.session_state.get('orders_plan_values', {}).get(col, 0.0)
-                                sales_plan = orders_plan * (buyout_percent / 100)
-                                values.append(sales_plan)
-                        else:
-                            # Рассчитываем как Заказ план × % выкупа
-                            orders_plan = st.session_state.get('orders_plan_values', {}).get(col, 0.0)
-                            sales_plan = orders_plan * (buyout_percent / 100)
-                            values.append(sales_plan)
-                
-                row = pd.Series(values, index=pivot_data.columns)
+                orders_plan_row = overlay_plan(pivot_data.columns, st.session_state.get('orders_plan_values', {}))
+                row = pd.Series(orders_plan_row * (buyout_percent / 100), index=pivot_data.columns)
                 row.name = "Продажа план"
                 additional_rows.append(row.to_frame().T)
             elif idx_name == "Рентабельность факт":
-                # Сложный расчет рентабельности на основе средней цены
+                # Сложный расчет рентабельности на основе средней цены - для всех столбцов одним расчетом
+                # Используем ДРР (долю рекламных расходов) вместо абсолютной суммы рекламы, ДРР уже в процентах
+                params = st.session_state.rentability_params
+                avg_prices = np.zeros(len(pivot_data.columns))
+                if "Средняя цена" in pivot_data.index:
+                    avg_prices = pd.to_numeric(pivot_data.loc["Средняя цена"], errors='coerce').fillna(0).to_numpy(dtype='float64')
+                drr_values = 0.0
+                if "ДРР" in pivot_data.index:
+                    drr_values = pd.to_numeric(pivot_data.loc["ДРР"], errors='coerce').fillna(0).to_numpy(dtype='float64')
+                cost_price = params.get('cost_price', 100.0)
+                week_rentability = np.where(
+                    (avg_prices > 0) & (cost_price > 0),
+                    complex_unit_economics(
+                        avg_prices, cost_price,
+                        commission_rate=params.get('commission_rate', 15.0),
+                        logistics_cost=params.get('logistics_cost', 50.0),
+                        advertising_percent=drr_values,
+                        buyout_percent=params.get('buyout_percent', 85.0),
+                        storage_cost=params.get('storage_cost', 0.0)
+                    )['Рентабельность, %'],
+                    0.0
+                )
+                rentability_by_col = dict(zip(pivot_data.columns, week_rentability))
+                priced_cols = {col for col, price in zip(pivot_data.columns, avg_prices) if price > 0}
+                
                 values = []
                 for col in pivot_data.columns:
                     if col == "Общие по месяцам":
                         values.append(0.0)  # Будет рассчитано позже
                     elif col.startswith(("2024.", "2023.", "2022.", "2025.")) and '(' not in col:
-                        # Месячные столбцы - рассчитываем среднее по неделям
-                        month_weeks = [c for c in pivot_data.columns if c.startswith(col + ' (')]
-                        rentability_values = []
-                        for week in month_weeks:
-                            # Получаем среднюю цену для этой недели
-                            avg_price = pivot_data.loc["Средняя цена", week] if "Средняя цена" in pivot_data.index else 0.0
-                            if avg_price > 0:
-                                # Сложный расчет рентабельности
-                                # Используем ДРР (долю рекламных расходов) вместо абсолютной суммы рекламы
-                                drr_value = 0.0
-                                if "ДРР" in pivot_data.index:
-                                    drr_value = pivot_data.loc["ДРР", week] if pd.notna(pivot_data.loc["ДРР", week]) else 0.0
-                                advertising_percent = drr_value  # ДРР уже в процентах
-                                
-                                rentability = calculate_complex_rentability(
-                                    average_price=avg_price,
-                                    cost_price=st.session_state.rentability_params.get('cost_price', 100.0),
-                                    discount_percent=st.session_state.rentability_params.get('discount_percent', 0.0),
-                                    commission_rate=st.session_state.rentability_params.get('commission_rate', 15.0),
-                                    logistics_cost=st.session_state.rentability_params.get('logistics_cost', 50.0),
-                                    advertising_percent=advertising_percent,
-                                    buyout_percent=st.session_state.rentability_params.get('buyout_percent', 85.0),
-                                    storage_cost=st.session_state.rentability_params.get('storage_cost', 0.0),
-                                    spp_discount=st.session_state.rentability_params.get('spp_discount', 25.0)
-                                )
-                                rentability_values.append(rentability)
-                        
-                        if rentability_values:
-                            values.append(sum(rentability_values) / len(rentability_values))
+                        # Месячные столбцы - среднее по неделям со средней ценой
+                        month_weeks = [week for week in month_weeks_map.get(col, []) if week in priced_cols]
+                        if month_weeks:
+                            values.append(sum(rentability_by_col[week] for week in month_weeks) / len(month_weeks))
                         else:
                             values.append(0.0)
                     else:
-                        # Недельные столбцы - рассчитываем рентабельность на основе средней цены
-                        avg_price = pivot_data.loc["Средняя цена", col] if "Средняя цена" in pivot_data.index else 0.0
-                        if avg_price > 0:
-                            # Используем ДРР (долю рекламных расходов) вместо абсолютной суммы рекламы
-                            # ДРР уже рассчитан в строке "ДРР" таблицы
-                            drr_value = 0.0
-                            if "ДРР" in pivot_data.index:
-                                drr_value = pivot_data.loc["ДРР", col] if pd.notna(pivot_data.loc["ДРР", col]) else 0.0
-                            advertising_percent = drr_value  # ДРР уже в процентах
-                            
-                            rentability = calculate_complex_rentability(
-                                average_price=avg_price,
-                                cost_price=st.session_state.rentability_params.get('cost_price', 100.0),
-                                discount_percent=st.session_state.rentability_params.get('discount_percent', 0.0),
-                                commission_rate=st.session_state.rentability_params.get('commission_rate', 15.0),
-                                logistics_cost=st.session_state.rentability_params.get('logistics_cost', 50.0),
-                                advertising_percent=advertising_percent,
-                                buyout_percent=st.session_state.rentability_params.get('buyout_percent', 85.0),
-                                storage_cost=st.session_state.rentability_params.get('storage_cost', 0.0),
-                                spp_discount=st.session_state.rentability_params.get('spp_discount', 25.0)
-                            )
-                            values.append(rentability)
-                        else:
-                            values.append(0.0)
+                        values.append(float(rentability_by_col[col]))
                 row = pd.Series(values, index=pivot_data.columns)
                 row.name = "Рентабельность факт"
                 additional_rows.append(row.to_frame().T)
             elif idx_name == "Рентабельность план":
-                # Загружаем значения из session state (аналогично План заказов)
-                values = []
-                
-                for col in pivot_data.columns:
-                    if col == "Общие по месяцам":
-                        values.append(0.0)  # Будет рассчитано позже
-                    elif col.startswith(("2024.", "2023.", "2022.", "2025.")) and '(' not in col:
-                        # Месячные столбцы - рассчитываем среднее по неделям
-                        month_weeks = [c for c in pivot_data.columns if c.startswith(col + ' (')]
-                        rentability_plan_total = 0.0
-                        for week in month_weeks:
-                            rentability_plan_total += st.session_state.rentability_plan_values.get(week, 0.0)
-                        if len(month_weeks) > 0:
-                            rentability_plan_avg = rentability_plan_total / len(month_weeks)
-                        else:
-                            rentability_plan_avg = 0.0
-                        values.append(rentability_plan_avg)
-                    else:
-                        # Для недельных столбцов - берем значения из session state
-                        value = st.session_state.rentability_plan_values.get(col, 0.0)
-                        values.append(value)
-                
-                row = pd.Series(values, index=pivot_data.columns)
+                # Недели - из session state, месяцы - среднее по своим неделям
+                row = pd.Series(
+                    overlay_plan(pivot_data.columns, st.session_state.rentability_plan_values, how='mean'),
+                    index=pivot_data.columns,
+                )
                 row.name = "Рентабельность план"
                 additional_rows.append(row.to_frame().T)
             elif idx_name == "Прибыль на ед.":
@@ -2473,14 +1685,7 @@ if df is not None:
                             profit_per_unit_values.append(0.0)
                     elif col.startswith(("2024.", "2023.", "2022.", "2025.")) and '(' not in col:
                         # Месячные столбцы - рассчитываем среднее по неделям
-                        # Нормализуем формат месяца (2025.08 -> 2025.8)
-                        if '.' in col:
-                            year, month = col.split('.')
-                            normalized_month = f"{year}.{int(month)}"
-                        else:
-                            normalized_month = col
-                        
-                        month_weeks = [c for c in pivot_data.columns if c.startswith(normalized_month + ' (')]
+                        month_weeks = month_weeks_map.get(col, [])
                         profit_values = []
                         # Используем уже рассчитанные значения из pivot_data
                         for week in month_weeks:
@@ -2575,14 +1780,7 @@ if df is not None:
                         values.append(total_profit)
                     elif col.startswith(("2024.", "2023.", "2022.", "2025.")) and '(' not in col:
                         # Месячные столбцы - рассчитываем сумму по неделям
-                        # Нормализуем формат месяца (2025.08 -> 2025.8)
-                        if '.' in col:
-                            year, month = col.split('.')
-                            normalized_month = f"{year}.{int(month)}"
-                        else:
-                            normalized_month = col
-                        
-                        month_weeks = [c for c in pivot_data.columns if c.startswith(normalized_month + ' (')]
+                        month_weeks = month_weeks_map.get(col, [])
                         profit_total = 0.0
                         for week in month_weeks:
                             if week in pivot_data.columns:
@@ -2657,18 +1855,8 @@ if df is not None:
         # Перезаписываем месячные значения для строк "Реклама", "Заказ план", "Продажа план"
         for col in pivot_data.columns:
             if col.startswith(("2024.", "2023.", "2022.", "2025.")) and '(' not in col:
-                # Ищем недели для этого месяца, учитывая разные форматы (2025.09 и 2025.9)
-                month_weeks = []
-                for week_col in pivot_data.columns:
-                    if '(' in week_col and 'нед.' in week_col:
-                        # Извлекаем год и месяц из недели (например, "2025.9" из "2025.9 (нед. 38)")
-                        week_year_month = week_col.split(' (')[0]
-                        # Нормализуем формат месяца (2025.9 -> 2025.09)
-                        if '.' in week_year_month:
-                            year, month = week_year_month.split('.')
-                            normalized_week_month = f"{year}.{month.zfill(2)}"
-                            if normalized_week_month == col:
-                                month_weeks.append(week_col)
+                # Недели этого месяца (форматы 2025.09 и 2025.9 сопоставляются по ключам)
+                month_weeks = month_weeks_map.get(col, [])
                 
                 # Средняя цена - среднее по неделям
                 if "Средняя цена" in pivot_data.index:
@@ -4411,7 +3599,35 @@ if df is not None:
                 save_settings_to_cache()
         
         with col2:
-            st.markdown("")  # Пустое место для выравнивания
+            saved_seed = st.session_state.table_settings.get('plan_seed', 0)
+            plan_seed = st.number_input(
+                "Seed колебаний плана",
+                min_value=-1,
+                value=int(saved_seed),
+                step=1,
+                key="plan_seed_input",
+                help="Один и тот же seed дает один и тот же план; -1 — план без случайных колебаний"
+            )
+            if plan_seed != saved_seed:
+                st.session_state.table_settings['plan_seed'] = int(plan_seed)
+                save_settings_to_cache()
+        
+        # Предпросмотр плана пересчитывается сразу при изменении процентов по месяцам
+        with st.expander("👁️ Предпросмотр сезонного плана", expanded=False):
+            preview = build_seasonal_plan(
+                pivot_data.columns,
+                monthly_percentages=monthly_percentages,
+                monthly_rentability_percentages=st.session_state.monthly_rentability_percentages,
+                base_orders=base_orders,
+                base_rentability=st.session_state.get('base_rentability_value', 15.0),
+                buyout_percent=st.session_state.rentability_params.get('buyout_percent', 85.0),
+                seed=get_plan_seed(),
+                year=datetime.now().year,
+            )
+            if preview.empty:
+                st.caption("Нет недельных столбцов текущего года")
+            else:
+                st.line_chart(preview[['Заказ план', 'Продажа план']])
         
         # Кнопки для генерации планов
         col1, col2, col3 = st.columns([1, 1, 1])
@@ -2,6 +2,11 @@
 """
 Модуль интеграции данных для ИИ-аналитика
 Позволяет получать данные из различных приложений проекта
+
+Источники читаются через общий кеш снимков процесса (utils.boot_state.read_snapshot):
+файл читается заново только после изменения его mtime/размера, поэтому сводка,
+проверка качества и инсайты одного отчёта работают с одним снимком в памяти.
+Снимки общие для всех вызовов — изменять DataFrame и JSON источников нельзя.
 """
 
 import pandas as pd
@@ -10,73 +15,74 @@ import os
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 
+from utils.boot_state import read_snapshot
+from utils.columnar_cache import CACHE_DIR, load_cache, manifest_path, migrate_csv_cache
+
+# Секция попаданий/промахов кеша источников в utils.perf
+SNAPSHOT_SECTION = "data_sources"
+
+
+def _read_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _read_wb_excel(path):
+    """45.xlsx (лист «Товары») с приведением дат и числовых столбцов"""
+    df = pd.read_excel(path, sheet_name='Товары', header=1)
+    df['Дата'] = pd.to_datetime(df['Дата'])
+    
+    # Преобразуем числовые столбцы
+    numeric_cols = ['Заказали, шт', 'Выкупили, шт', 'Выкупили на сумму, ₽', 
+                   'Переходы в карточку', 'Положили в корзину', 'Процент выкупа',
+                   'Заказали на сумму, ₽']
+    for col in numeric_cols:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
 class DataIntegration:
     """Класс для интеграции данных из различных источников"""
     
-    def __init__(self):
-        self.base_path = os.path.dirname(os.path.abspath(__file__))
+    def __init__(self, base_path=None):
+        self.base_path = base_path or os.path.dirname(os.path.abspath(__file__))
+    
+    def _json_source(self, file_name):
+        return read_snapshot(os.path.join(self.base_path, file_name), _read_json, name=SNAPSHOT_SECTION)
     
     def get_wb_analysis_data(self) -> Optional[pd.DataFrame]:
         """Получает данные из анализа WB (45.xlsx)"""
         try:
-            # Пробуем загрузить из кеша
-            cache_file = os.path.join(self.base_path, 'data_cache.csv')
-            if os.path.exists(cache_file):
-                df = pd.read_csv(cache_file)
-                df['Дата'] = pd.to_datetime(df['Дата'])
+            # Пробуем загрузить из кеша (колоночный кеш analytics_45, типы уже сохранены);
+            # снимок сверяется по футеру _meta.json, который переписывается при каждой записи кеша
+            cache_dir = os.path.join(self.base_path, CACHE_DIR)
+            if not os.path.exists(manifest_path(cache_dir)):
+                # Старый data_cache.csv импортируется в колоночный кеш (создаётся футер)
+                migrate_csv_cache(cache_dir=cache_dir)
+            df = read_snapshot(manifest_path(cache_dir), lambda _: load_cache(cache_dir), name=SNAPSHOT_SECTION)
+            if df is not None and not df.empty:
                 return df
             
             # Если кеша нет, загружаем из основного файла
             excel_file = os.path.join(self.base_path, '45.xlsx')
             if os.path.exists(excel_file):
-                df = pd.read_excel(excel_file, sheet_name='Товары', header=1)
-                df['Дата'] = pd.to_datetime(df['Дата'])
-                
-                # Преобразуем числовые столбцы
-                numeric_cols = ['Заказали, шт', 'Выкупили, шт', 'Выкупили на сумму, ₽', 
-                               'Переходы в карточку', 'Положили в корзину', 'Процент выкупа',
-                               'Заказали на сумму, ₽']
-                for col in numeric_cols:
-                    if col in df.columns:
-                        df[col] = pd.to_numeric(df[col], errors='coerce')
-                
-                return df
+                return read_snapshot(excel_file, _read_wb_excel, name=SNAPSHOT_SECTION)
         except Exception as e:
             print(f"Ошибка загрузки данных WB анализа: {e}")
             return None
     
     def get_production_calendar_data(self) -> Optional[List[Dict]]:
         """Получает данные из календаря производства"""
-        try:
-            calendar_file = os.path.join(self.base_path, 'production_calendar_data.json')
-            if os.path.exists(calendar_file):
-                with open(calendar_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except Exception as e:
-            print(f"Ошибка загрузки данных календаря производства: {e}")
-            return None
+        return self._json_source('production_calendar_data.json')
     
     def get_seasonal_calculator_data(self) -> Optional[Dict]:
         """Получает данные из сезонного калькулятора"""
-        try:
-            seasonal_file = os.path.join(self.base_path, 'seasonal_data.json')
-            if os.path.exists(seasonal_file):
-                with open(seasonal_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except Exception as e:
-            print(f"Ошибка загрузки данных сезонного калькулятора: {e}")
-            return None
+        return self._json_source('seasonal_data.json')
     
     def get_investments_data(self) -> Optional[Dict]:
         """Получает данные об инвестициях"""
-        try:
-            investments_file = os.path.join(self.base_path, 'investments_data.json')
-            if os.path.exists(investments_file):
-                with open(investments_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except Exception as e:
-            print(f"Ошибка загрузки данных инвестиций: {e}")
-            return None
+        return self._json_source('investments_data.json')
     
     def get_unit_economics_data(self) -> Optional[pd.DataFrame]:
         """Получает данные из юнит-экономики"""
@@ -91,7 +97,11 @@ class DataIntegration:
             return None
     
     def get_all_data_sources(self) -> Dict[str, Any]:
-        """Получает все доступные источники данных"""
+        """
+        Получает все доступные источники данных (снимок: повторный вызов без изменений
+        файлов не читает диск). Результат можно передать в get_data_summary,
+        validate_data_quality и get_cross_app_insights.
+        """
         data_sources = {}
         
         # WB анализ
@@ -121,9 +131,10 @@ class DataIntegration:
         
         return data_sources
     
-    def get_data_summary(self) -> Dict[str, Any]:
-        """Получает сводку по всем доступным данным"""
-        data_sources = self.get_all_data_sources()
+    def get_data_summary(self, data_sources: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Получает сводку по всем доступным данным (data_sources — уже загруженный снимок get_all_data_sources)"""
+        if data_sources is None:
+            data_sources = self.get_all_data_sources()
         summary = {
             'total_sources': len(data_sources),
             'available_sources': list(data_sources.keys()),
@@ -169,9 +180,10 @@ class DataIntegration:
         
         return summary
     
-    def validate_data_quality(self) -> Dict[str, Any]:
-        """Проверяет качество данных"""
-        data_sources = self.get_all_data_sources()
+    def validate_data_quality(self, data_sources: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Проверяет качество данных (data_sources — уже загруженный снимок get_all_data_sources)"""
+        if data_sources is None:
+            data_sources = self.get_all_data_sources()
         quality_report = {
             'overall_score': 0,
             'sources_checked': 0,
@@ -243,9 +255,10 @@ class DataIntegration:
         
         return quality_report
     
-    def get_cross_app_insights(self) -> Dict[str, Any]:
-        """Получает инсайты на основе данных из разных приложений"""
-        data_sources = self.get_all_data_sources()
+    def get_cross_app_insights(self, data_sources: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Получает инсайты на основе данных из разных приложений (data_sources — уже загруженный снимок get_all_data_sources)"""
+        if data_sources is None:
+            data_sources = self.get_all_data_sources()
         insights = {
             'sales_vs_production': {},
             'investment_analysis': {},
@@ -8,6 +8,9 @@ import warnings
 import os
 import json
 from pathlib import Path
+
+from utils.inventory_sim import simulate_inventory
+
 warnings.filterwarnings('ignore')
 
 # Создаем папку для сохранения данных
@@ -144,17 +147,13 @@ def extract_monthly_data(df, selected_columns):
 def calculate_inventory_needs(monthly_orders, buyback_rate, initial_stock=0, return_days=7, safety_stock=0.1, monthly_undelivered=None):
     """Расчет единовременной закупки товара для максимальной распродажи с минимальным остатком"""
     
-    results = {}
-    total_orders = sum(monthly_orders.values())
+    months_list = list(monthly_orders.keys())
+    orders = np.array([monthly_orders[month] for month in months_list], dtype='float64')
+    total_orders = orders.sum()
     
     # НОВАЯ ЛОГИКА: Недоставка создает контролируемый недостаток, а не влияет на общий объем заказов
     total_actual_orders = total_orders  # Используем полные заказы
     
-    # НОВАЯ ЛОГИКА: Рассчитываем закупку для максимальной распродажи
-    
-    # Анализируем месяцы по порядку и рассчитываем минимально необходимый запас
-    months_list = list(monthly_orders.keys())
-    
     # Рассчитываем общий объем заказов и возвратов
     total_returns = total_actual_orders * (1 - buyback_rate)
     
@@ -169,59 +168,26 @@ def calculate_inventory_needs(monthly_orders, buyback_rate, initial_stock=0, ret
         # При наличии страхового запаса добавляем минимальную долю
         total_initial_purchase = max(0, net_required) + (max(0, net_required) * safety_stock * 0.05)
     
-    # Теперь моделируем продажи с рассчитанной закупкой + начальный остаток
-    warehouse_stock = total_initial_purchase + initial_stock
+    # Лимит недостатка товара в процентах от заказов (по умолчанию 0 — недостаток не допускается)
+    monthly_undelivered = monthly_undelivered or {}
+    shortage_limit = np.array([monthly_undelivered.get(month, 0) for month in months_list], dtype='float64')
     
-    for month, orders in monthly_orders.items():
-        # НОВАЯ ЛОГИКА: Лимит недостатка товара в процентах от заказов
-        shortage_limit_percent = monthly_undelivered.get(month, 0) if monthly_undelivered else 0
-        max_allowed_shortage = orders * shortage_limit_percent  # Максимально допустимый недостаток в штуках
-        
-        # Продаем товар с учетом лимита недостатка
-        if warehouse_stock >= orders:
-            # Товара достаточно - продаем полные заказы
-            sold_from_warehouse = orders
-            stock_shortage = 0
-        else:
-            # Товара недостаточно - продаем доступный товар
-            sold_from_warehouse = warehouse_stock
-            stock_shortage = orders - warehouse_stock
-        
-        # Применяем лимит недостатка товара
-        if stock_shortage > max_allowed_shortage:
-            # Если недостаток превышает лимит, ограничиваем его
-            stock_shortage = max_allowed_shortage
-        
-        # Общий недостаток = недостаток из-за отсутствия товара (ограниченный лимитом)
-        total_shortage = stock_shortage
-        
-        # Товар, который будет возвращен в этом месяце
-        returns_this_month = sold_from_warehouse * (1 - buyback_rate)
-        
-        # Товар, который выкупается (не возвращается)
-        buyback_quantity = sold_from_warehouse * buyback_rate
-        
-        # Возвращается на склад
-        returns_to_warehouse = returns_this_month
-        
-        # Обновляем остаток на складе
-        warehouse_stock = warehouse_stock - sold_from_warehouse + returns_to_warehouse
-        
-        # Расчет KPI
-        utilization_rate = (buyback_quantity / sold_from_warehouse * 100) if sold_from_warehouse > 0 else 0
-        return_rate = (returns_this_month / sold_from_warehouse * 100) if sold_from_warehouse > 0 else 0
-        
+    # Моделируем продажи с рассчитанной закупкой + начальный остаток (utils.inventory_sim)
+    sim = simulate_inventory(orders, buyback_rate, total_initial_purchase + initial_stock, shortage_limit=shortage_limit)
+    
+    results = {}
+    for i, month in enumerate(months_list):
         results[month] = {
-            'orders': orders,
-            'sold_from_warehouse': sold_from_warehouse,
-            'shortage': total_shortage,  # Недостаток товара (ограниченный лимитом)
-            'returns_this_month': returns_this_month,
-            'returns_to_warehouse': returns_to_warehouse,
-            'buyback_quantity': buyback_quantity,
-            'warehouse_stock': warehouse_stock,
-            'utilization_rate': utilization_rate,
-            'return_rate': return_rate,
-            'total_initial_purchase': total_initial_purchase if month == list(monthly_orders.keys())[0] else 0
+            'orders': monthly_orders[month],
+            'sold_from_warehouse': float(sim['sold_from_warehouse'][i]),
+            'shortage': float(sim['shortage'][i]),  # Недостаток товара (ограниченный лимитом)
+            'returns_this_month': float(sim['returns_this_month'][i]),
+            'returns_to_warehouse': float(sim['returns_to_warehouse'][i]),
+            'buyback_quantity': float(sim['buyback_quantity'][i]),
+            'warehouse_stock': float(sim['warehouse_stock'][i]),
+            'utilization_rate': float(sim['utilization_rate'][i]),
+            'return_rate': float(sim['return_rate'][i]),
+            'total_initial_purchase': total_initial_purchase if i == 0 else 0
         }
     
     return results
@@ -325,40 +291,29 @@ def create_advanced_visualizations(results, buyback_rate, monthly_orders):
 def calculate_weekly_inventory(monthly_orders, buyback_rate, return_days=7, safety_stock=0.1):
     """Расчет еженедельного инвентаря на основе месячных заказов"""
     
-    weekly_results = {}
-    
     # Преобразуем месячные заказы в еженедельные (примерно 4.33 недели в месяце)
     weeks_per_month = 4.33
+    # Распределение по 4 неделям месяца: первая неделя - больше заказов, последняя - меньше
+    week_weights = np.array([1.2, 1.0, 1.0, 0.8])
     
-    for month, orders in monthly_orders.items():
-        weekly_orders = orders / weeks_per_month
-        
-        for week in range(1, 5):  # 4 недели в месяце
-            week_key = f"{month} - Неделя {week}"
-            
-            # Распределяем заказы по неделям (можно настроить неравномерно)
-            if week == 1:
-                week_orders = weekly_orders * 1.2  # Первая неделя - больше заказов
-            elif week == 4:
-                week_orders = weekly_orders * 0.8  # Последняя неделя - меньше заказов
-            else:
-                week_orders = weekly_orders
-            
-            # Расчет для недели
-            sold_from_warehouse = week_orders
-            returns_this_week = sold_from_warehouse * (1 - buyback_rate)
-            buyback_quantity = sold_from_warehouse * buyback_rate
-            returns_to_warehouse = returns_this_week
-            
-            weekly_results[week_key] = {
-                'orders': week_orders,
-                'sold_from_warehouse': sold_from_warehouse,
-                'returns_this_week': returns_this_week,
-                'returns_to_warehouse': returns_to_warehouse,
-                'buyback_quantity': buyback_quantity,
-                'utilization_rate': (buyback_quantity / sold_from_warehouse * 100) if sold_from_warehouse > 0 else 0,
-                'return_rate': (returns_this_week / sold_from_warehouse * 100) if sold_from_warehouse > 0 else 0
-            }
+    months_list = list(monthly_orders.keys())
+    monthly = np.array([monthly_orders[month] for month in months_list], dtype='float64')
+    week_orders = (monthly[:, None] / weeks_per_month * week_weights[None, :]).ravel()
+    
+    # Продаем весь недельный заказ, возвраты в той же неделе
+    sim = simulate_inventory(week_orders, buyback_rate, backorder=True)
+    
+    weekly_results = {}
+    for i, (month, week) in enumerate((m, w) for m in months_list for w in range(1, 5)):
+        weekly_results[f"{month} - Неделя {week}"] = {
+            'orders': float(week_orders[i]),
+            'sold_from_warehouse': float(sim['sold_from_warehouse'][i]),
+            'returns_this_week': float(sim['returns_this_month'][i]),
+            'returns_to_warehouse': float(sim['returns_to_warehouse'][i]),
+            'buyback_quantity': float(sim['buyback_quantity'][i]),
+            'utilization_rate': float(sim['utilization_rate'][i]),
+            'return_rate': float(sim['return_rate'][i])
+        }
     
     return weekly_results
 
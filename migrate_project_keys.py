@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Скрипт миграции файлов проектов на стабильные ключи и очистки «сирот»
+
+Старые файлы param_values_<n>.json, param_history_<n>.json и main_page_settings_<n>.json
+(n = hash(имя файла) % 1000000, менялся при каждом перезапуске) объединяются
+по имени файла проекта в param_values_<ключ>.json и т.д. Реестры обновляются.
+
+Запуск:
+    python migrate_project_keys.py            # только показать план
+    python migrate_project_keys.py --apply    # выполнить, старые файлы -> backups/legacy_project_files
+    python migrate_project_keys.py --apply --delete   # выполнить и удалить старые файлы
+"""
+import argparse
+
+from utils.project_keys import migrate_project_files
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Миграция файлов проектов на стабильные ключи")
+    parser.add_argument("--root", default=".", help="Каталог с файлами проектов")
+    parser.add_argument("--apply", action="store_true", help="Выполнить миграцию (по умолчанию — только план)")
+    parser.add_argument("--delete", action="store_true", help="Удалять старые файлы вместо переноса в резервную папку")
+    args = parser.parse_args()
+
+    report = migrate_project_files(args.root, apply=args.apply, delete=args.delete)
+
+    total_legacy = 0
+    for file_name, kinds in sorted(report["projects"].items()):
+        print(f"📁 {file_name}")
+        for prefix, info in kinds.items():
+            total_legacy += len(info["legacy_files"])
+            print(f"   {prefix}*: {len(info['legacy_files'])} файл(ов) -> {info['target']}")
+
+    for registry_file, file_name in report["pruned"]:
+        print(f"🧹 Висячая запись {registry_file}: {file_name}")
+
+    for path in report["unreadable"]:
+        print(f"⚠️ Пропущен (нечитаемый или без file_name): {path}")
+
+    print()
+    print(f"Проектов: {len(report['projects'])}, старых файлов: {total_legacy}")
+    if args.apply:
+        action = "удалено" if args.delete else "перенесено в резервную папку"
+        print(f"✅ Записано файлов: {len(report['written'])}, {action}: {len(report['removed'])}, "
+              f"удалено записей реестров: {len(report['pruned'])}")
+    else:
+        print("Это только план. Для выполнения запустите с --apply")
+
+
+if __name__ == "__main__":
+    main()
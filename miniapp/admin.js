@@ -183,7 +183,8 @@ function renderCustomers(customers) {
         <label>Почта <input type="text" value="${customer.email || ""}" disabled /></label>
         <label>Адреса <input type="text" value="${addresses}" disabled /></label>
         <label>Бонусы <input type="text" value="${customer.bonus_balance ?? 0}" disabled /></label>
-        <label>Заказов всего <input type="text" value="${orders.length}" disabled /></label>
+        <label>Заказов всего <input type="text" value="${customer.order_count ?? orders.length}" disabled /></label>
+        <label>Сумма заказов <input type="text" value="${formatRub(customer.total_spent || 0)}" disabled /></label>
       </div>
       <div class="admin-items">${ordersHtml}</div>
       <div class="product-actions">
@@ -727,15 +728,18 @@ importCsvBtn.addEventListener("click", async () => {
   try {
     const formData = new FormData();
     formData.append("file", file);
-    const response = await fetch("/api/products/import", {
+    const response = await fetch("/api/products/import?mode=replace", {
       method: "POST",
       body: formData,
     });
     if (!response.ok) {
       throw new Error("Ошибка импорта");
     }
+    const report = await response.json();
     await loadProducts();
-    importCsvBtn.textContent = "Готово";
+    importCsvBtn.textContent = report.errors_total
+      ? `Готово, ошибок: ${report.errors_total}`
+      : "Готово";
   } catch (error) {
     importCsvBtn.textContent = "Ошибка";
   } finally {
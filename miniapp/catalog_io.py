@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Потоковый импорт и экспорт каталога товаров (CSV, XLSX).
+
+Импорт читает файл построчно, проверяет каждую строку и записывает корректные товары
+пачками (upsert по id) в одной транзакции; встреченные id хранятся во временной таблице
+SQLite, поэтому память не растёт с размером файла.
+Ошибки собираются по номерам строк; dry_run только проверяет файл, ничего не записывая.
+Экспорт отдаёт каталог генератором: строки CSV идут клиенту по мере чтения из базы.
+"""
+import csv
+import io
+import tempfile
+from contextlib import nullcontext
+
+import storage
+
+try:
+    from openpyxl import Workbook, load_workbook
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+PRODUCT_FIELDS = [
+    "id",
+    "name",
+    "price",
+    "category",
+    "tags",
+    "description",
+    "min_qty",
+    "delivery_label",
+    "image",
+]
+
+IMPORT_BATCH_SIZE = 1000
+EXPORT_BATCH_SIZE = 1000
+# Сколько ошибок по строкам возвращать в отчёте (счётчик ведётся по всем)
+MAX_REPORTED_ERRORS = 1000
+
+
+def _number(value, default):
+    text = str(value if value is not None else "").strip().replace(" ", "").replace(",", ".")
+    if not text:
+        return default
+    return int(float(text))
+
+
+def parse_product_row(data, row_number):
+    """Товар из строки файла {колонка: значение}; возвращает (товар или None, список ошибок)"""
+    data = {str(k or "").strip(): ("" if v is None else str(v).strip()) for k, v in data.items()}
+    errors = []
+    name = data.get("name", "")
+    if not name:
+        errors.append("не указано название (name)")
+    try:
+        price = _number(data.get("price"), 0)
+        if price < 0:
+            errors.append("отрицательная цена (price)")
+    except ValueError:
+        price = 0
+        errors.append(f"некорректная цена (price): {data.get('price')}")
+    try:
+        min_qty = max(1, _number(data.get("min_qty"), 1))
+    except ValueError:
+        min_qty = 1
+        errors.append(f"некорректное минимальное количество (min_qty): {data.get('min_qty')}")
+    if errors:
+        return None, errors
+    image = data.get("image", "")
+    if image.startswith("/assets/"):
+        # Картинки из assets/ хранятся без версии ?v=... (её добавляет сервер)
+        image = image.split("?", 1)[0]
+    product = {
+        "id": data.get("id") or f"p{row_number}",
+        "name": name,
+        "price": price,
+        "category": data.get("category", ""),
+        "tags": [t.strip() for t in data.get("tags", "").split("|") if t.strip()],
+        "description": data.get("description", ""),
+        "min_qty": min_qty,
+        "delivery_label": data.get("delivery_label", ""),
+        "image": image,
+    }
+    return product, []
+
+
+def iter_csv_rows(stream):
+    """Строки CSV из бинарного потока (utf-8, с BOM или без) как словари"""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        yield from csv.DictReader(text)
+    finally:
+        text.detach()
+
+
+def iter_xlsx_rows(stream):
+    """Строки первого листа XLSX как словари (openpyxl в режиме read_only)"""
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(h or "").strip() for h in next(rows, [])]
+        for values in rows:
+            if values and any(v not in (None, "") for v in values):
+                yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def import_products(rows, dry_run=False, replace=False, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Импорт товаров из итератора строк {колонка: значение}.
+    Корректные строки записываются пачками по batch_size (upsert по id), строки с ошибками
+    пропускаются. replace=True — товары, которых нет в файле, удаляются (как прежний импорт);
+    товары из строк с ошибками остаются как были (их id тоже считаются встреченными);
+    если корректных строк нет, каталог не трогается.
+    Возвращает отчёт: rows, imported, created, updated, deleted, errors_total, errors, dry_run.
+    """
+    report = {
+        "rows": 0,
+        "imported": 0,
+        "created": 0,
+        "updated": 0,
+        "deleted": 0,
+        "errors_total": 0,
+        "errors": [],
+        "dry_run": dry_run,
+    }
+    batch = {}
+
+    def reject(row_number, row_id, errors):
+        report["errors_total"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"row": row_number, "id": row_id, "errors": errors})
+
+    def flush():
+        # id из прежних пачек этого файла — повторы (встреченные id лежат во временной таблице, не в памяти)
+        for product_id in storage.mark_import_ids(list(batch)):
+            row_number, _ = batch.pop(product_id)
+            reject(row_number, product_id, [f"повтор id {product_id} (строка пропущена)"])
+        products = [product for _, product in batch.values()]
+        existing = storage.existing_product_ids(list(batch))
+        report["updated"] += len(existing)
+        report["created"] += len(products) - len(existing)
+        report["imported"] += len(products)
+        if not dry_run and products:
+            storage.upsert_products(products)
+        batch.clear()
+
+    storage.reset_import_ids()
+    # Проверка без записи не занимает базу на запись
+    with nullcontext() if dry_run else storage.transaction():
+        # Номер строки — как в файле: первая строка — заголовок
+        for row_number, data in enumerate(rows, start=2):
+            report["rows"] += 1
+            product, errors = parse_product_row(data, row_number - 1)
+            if not errors and product["id"] in batch:
+                errors = [f"повтор id {product['id']} (строка пропущена)"]
+            if errors:
+                reject(row_number, data.get("id"), errors)
+                # Строка есть в файле, но не прочитана: её товар нельзя удалять при замене каталога
+                row_id = str(data.get("id") or "").strip() or f"p{row_number - 1}"
+                storage.keep_import_ids([row_id])
+                continue
+            batch[product["id"]] = (row_number, product)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+        if replace and report["imported"]:
+            if dry_run:
+                report["deleted"] = storage.count_products_not_imported()
+            else:
+                report["deleted"] = storage.delete_products_not_imported()
+    return report
+
+
+def _csv_row(product):
+    row = dict(product)
+    row["tags"] = "|".join(product.get("tags") or [])
+    return ["" if row.get(field) is None else row.get(field) for field in PRODUCT_FIELDS]
+
+
+def export_csv(products, batch_size=EXPORT_BATCH_SIZE):
+    """Генератор кусков CSV (заголовок + товары) по batch_size строк"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(PRODUCT_FIELDS)
+    count = 0
+    for product in products:
+        writer.writerow(_csv_row(product))
+        count += 1
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def export_xlsx(products, chunk_size=64 * 1024):
+    """
+    Генератор байтов XLSX. Книга пишется openpyxl в режиме write_only во временный файл
+    (строки не копятся в памяти) и отдаётся кусками по chunk_size.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("products")
+    sheet.append(PRODUCT_FIELDS)
+    for product in products:
+        sheet.append(_csv_row(product))
+    with tempfile.TemporaryFile() as file:
+        workbook.save(file)
+        file.seek(0)
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import argparse
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = BASE_DIR / "data"
+sys.path.insert(0, str(BASE_DIR))
+
+import storage  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate miniapp JSON data files to SQLite")
+    parser.add_argument("--data-dir", default=str(DATA_DIR), help="directory with products/orders/customers/settings.json")
+    parser.add_argument("--db", default=str(storage.DB_FILE), help="target SQLite file")
+    parser.add_argument("--force", action="store_true", help="overwrite tables even if migration was already done")
+    args = parser.parse_args()
+
+    storage.configure(args.db)
+    counts = storage.migrate_from_json(args.data_dir, force=args.force)
+    if counts is None:
+        print(f"Already migrated: {args.db} (use --force to overwrite)")
+        return
+    for table, count in counts.items():
+        print(f"{table}: {count}")
+    print(f"Migrated to {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,13 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-import json
+import argparse
+import sys
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[1]
-DATA_DIR = BASE_DIR / "data"
-ORDERS_FILE = DATA_DIR / "orders.json"
-CUSTOMERS_FILE = DATA_DIR / "customers.json"
+sys.path.insert(0, str(BASE_DIR))
 
-
-def _load_json(path, default):
-    if not path.exists():
-        return default
-    with path.open("r", encoding="utf-8") as file:
-        return json.load(file)
-
-
-def _save_json(path, data):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as file:
-        json.dump(data, file, ensure_ascii=False, indent=2)
+import storage  # noqa: E402
 
 
 def _normalize_user_id(order):
@@ -35,9 +23,25 @@ def _normalize_user_id(order):
     return uid_str
 
 
+def verify():
+    mismatches = storage.verify_customer_stats()
+    for user_id, (stored, fresh) in list(mismatches.items())[:20]:
+        print(f"{user_id}: stored {stored} != rebuilt {fresh}")
+    print(f"Customer aggregates checked: {len(storage.load_customer_stats())}, mismatches: {len(mismatches)}")
+    return not mismatches
+
+
 def main():
-    orders = _load_json(ORDERS_FILE, [])
-    existing_customers = _load_json(CUSTOMERS_FILE, {})
+    parser = argparse.ArgumentParser(description="Rebuild customers and their aggregates from orders")
+    parser.add_argument("--verify", action="store_true", help="only compare stored aggregates with a full recount")
+    args = parser.parse_args()
+
+    storage.migrate_from_json(storage.DATA_DIR)
+    if args.verify:
+        sys.exit(0 if verify() else 1)
+
+    orders = storage.load_orders()
+    existing_customers = storage.load_customers()
     rebuilt = {}
 
     for order in orders:
@@ -66,9 +70,11 @@ def main():
             customer["email"] = order["email"]
         rebuilt[user_id] = customer
 
-    _save_json(ORDERS_FILE, orders)
-    _save_json(CUSTOMERS_FILE, rebuilt)
+    with storage.transaction():
+        storage.save_orders(orders)
+        storage.save_customers(rebuilt)
     print(f"Customers rebuilt: {len(rebuilt)}")
+    verify()
 
 
 if __name__ == "__main__":
@@ -1,9 +1,10 @@
 # -*- coding: utf-8 -*-
 import base64
-import json
+import csv
+import gzip
+import hashlib
 import os
 import re
-import threading
 import time
 from datetime import datetime
 from pathlib import Path
@@ -12,15 +13,15 @@ from flask import Flask, jsonify, request, send_from_directory, Response
 from markupsafe import escape
 from werkzeug.utils import secure_filename
 
+import catalog_io
+import storage
+
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "data"
-PRODUCTS_FILE = DATA_DIR / "products.json"
-ORDERS_FILE = DATA_DIR / "orders.json"
-SETTINGS_FILE = DATA_DIR / "settings.json"
-CUSTOMERS_FILE = DATA_DIR / "customers.json"
 ASSETS_DIR = BASE_DIR / "assets"
 
-LOCK = threading.Lock()
+# Данные хранятся в SQLite (storage.py); JSON из data/ переносится при первом запуске
+storage.migrate_from_json(DATA_DIR)
 
 PROMO_RULES = {
     "FLOWER10": {"type": "percent", "value": 10},
@@ -30,6 +31,17 @@ PROMO_RULES = {
 SERVICE_FEE_RATE = 0.1
 BONUS_VALUE = 300
 
+CUSTOMERS_PAGE_SIZE = 50
+CUSTOMERS_PAGE_MAX = 500
+
+# Картинки из assets/ с хешем содержимого в URL кешируются клиентом на год
+ASSET_MAX_AGE = 365 * 24 * 3600
+
+# Готовые ответы каталога и настроек: {имя: {version, body, gzip, etag}}
+_SNAPSHOTS = {}
+# Хеши содержимого картинок: {путь: ((mtime, размер), хеш)}
+_ASSET_HASHES = {}
+
 app = Flask(__name__)
 ADMIN_USER = os.environ.get("ADMIN_USER", "admin")
 ADMIN_PASSWORD = os.environ.get("ADMIN_PASSWORD", "admin123")
@@ -58,15 +70,69 @@ def _require_admin():
 
 
 def _load_products():
-    if not PRODUCTS_FILE.exists():
-        return []
-    with PRODUCTS_FILE.open("r", encoding="utf-8") as file:
-        return json.load(file)
+    return storage.load_products()
 
 def _save_products(products):
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    with PRODUCTS_FILE.open("w", encoding="utf-8") as file:
-        json.dump(products, file, ensure_ascii=False, indent=2)
+    storage.save_products(products)
+
+def _asset_path(image):
+    """Путь картинки без версии ?v=... (в базе хранится путь без версии)"""
+    if image and image.startswith("/assets/"):
+        return image.split("?", 1)[0]
+    return image
+
+def _asset_hash(filename):
+    """Короткий хеш содержимого файла из assets/ (пересчитывается при смене mtime или размера)"""
+    path = ASSETS_DIR / Path(filename).name
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _ASSET_HASHES.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+    digest = hashlib.sha256(path.read_bytes()).hexdigest()[:16]
+    _ASSET_HASHES[path] = (key, digest)
+    return digest
+
+def _versioned_image(image):
+    """URL картинки из assets/ с хешем содержимого: /assets/p1.jpg?v=<хеш>"""
+    path = _asset_path(image)
+    if not path or not path.startswith("/assets/"):
+        return image
+    digest = _asset_hash(path)
+    return f"{path}?v={digest}" if digest else path
+
+def _snapshot(name, loader):
+    """Готовый ответ (JSON, gzip, ETag) для текущей версии данных name в базе"""
+    version = storage.get_version(name)
+    snapshot = _SNAPSHOTS.get(name)
+    if snapshot is None or snapshot["version"] != version:
+        body = app.json.dumps(loader()).encode("utf-8")
+        snapshot = {
+            "version": version,
+            "body": body,
+            "gzip": gzip.compress(body, compresslevel=6, mtime=0),
+            "etag": hashlib.sha256(body).hexdigest()[:32],
+        }
+        _SNAPSHOTS[name] = snapshot
+    return snapshot
+
+def _snapshot_response(name, loader):
+    """Ответ из снимка: 304 при совпадении ETag, иначе gzip или JSON как есть"""
+    snapshot = _snapshot(name, loader)
+    if request.if_none_match.contains(snapshot["etag"]):
+        response = Response(status=304)
+    elif "gzip" in request.accept_encodings:
+        response = Response(snapshot["gzip"], mimetype="application/json")
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = Response(snapshot["body"], mimetype="application/json")
+    response.set_etag(snapshot["etag"])
+    response.headers["Cache-Control"] = "no-cache"
+    response.vary.add("Accept-Encoding")
+    return response
 
 def _allowed_image(filename):
     ext = Path(filename).suffix.lower()
@@ -100,42 +166,27 @@ def _default_settings():
     }
 
 def _load_settings():
-    if not SETTINGS_FILE.exists():
-        return _default_settings()
-    with SETTINGS_FILE.open("r", encoding="utf-8") as file:
-        data = json.load(file)
+    data = storage.load_settings()
     merged = _default_settings()
     merged.update({k: data.get(k) for k in merged.keys() if k in data})
     return merged
 
 def _save_settings(settings):
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    with SETTINGS_FILE.open("w", encoding="utf-8") as file:
-        json.dump(settings, file, ensure_ascii=False, indent=2)
+    storage.save_settings(settings)
 
 def _load_customers():
-    if not CUSTOMERS_FILE.exists():
-        return {}
-    with CUSTOMERS_FILE.open("r", encoding="utf-8") as file:
-        return json.load(file)
+    return storage.load_customers()
 
 def _save_customers(customers):
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    with CUSTOMERS_FILE.open("w", encoding="utf-8") as file:
-        json.dump(customers, file, ensure_ascii=False, indent=2)
+    storage.save_customers(customers)
 
 
-def _load_orders():
-    if not ORDERS_FILE.exists():
-        return []
-    with ORDERS_FILE.open("r", encoding="utf-8") as file:
-        return json.load(file)
+def _load_orders(user_id=None):
+    return storage.load_orders(user_id)
 
 
 def _save_orders(orders):
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    with ORDERS_FILE.open("w", encoding="utf-8") as file:
-        json.dump(orders, file, ensure_ascii=False, indent=2)
+    storage.save_orders(orders)
 
 
 def _promo_rules_from_settings(settings):
@@ -217,49 +268,53 @@ def offer_page():
 
 @app.get("/<path:filename>")
 def static_files(filename):
-    return send_from_directory(BASE_DIR, filename)
+    response = send_from_directory(BASE_DIR, filename)
+    version = request.args.get("v")
+    if filename.startswith("assets/") and version and version == _asset_hash(filename):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = ASSET_MAX_AGE
+        response.cache_control.immutable = True
+    return response
 
 
 @app.get("/api/orders")
 def get_orders():
-    with LOCK:
-        orders = _load_orders()
-        user_id = request.args.get("user_id")
-        if not user_id:
-            auth = _require_admin()
-            if auth:
-                return auth
-        if user_id:
-            orders = [o for o in orders if str(o.get("user_id")) == str(user_id)]
-        return jsonify(orders)
+    user_id = request.args.get("user_id")
+    if not user_id:
+        auth = _require_admin()
+        if auth:
+            return auth
+    return jsonify(_load_orders(user_id or None))
 
 @app.get("/api/customers/<user_id>")
 def get_customer(user_id):
-    with LOCK:
-        customers = _load_customers()
-        if str(user_id) == "guest":
-            return jsonify({"addresses": [], "orders": [], "bonus_balance": 0})
-        customer = customers.get(str(user_id))
-        if not customer:
-            settings = _load_settings()
-            customer = {
-                "addresses": [],
-                "orders": [],
-                "bonus_balance": int(settings.get("bonus_balance", 0)),
-                "welcome_bonus_awarded": True,
-            }
-            customers[str(user_id)] = customer
-            _save_customers(customers)
-        if "bonus_balance" not in customer:
-            settings = _load_settings()
-            customer["bonus_balance"] = int(settings.get("bonus_balance", 0))
-            customers[str(user_id)] = customer
-            _save_customers(customers)
-        if "welcome_bonus_awarded" not in customer:
-            customer["welcome_bonus_awarded"] = True
-            customers[str(user_id)] = customer
-            _save_customers(customers)
-        return jsonify(customer)
+    if str(user_id) == "guest":
+        return jsonify({"addresses": [], "orders": [], "bonus_balance": 0})
+    customer = storage.get_customer(user_id)
+    if not customer or "bonus_balance" not in customer or "welcome_bonus_awarded" not in customer:
+        # Запись нужна только для нового покупателя или старого профиля без бонусных полей;
+        # внутри транзакции профиль читается заново (его мог создать параллельный запрос)
+        with storage.transaction():
+            customer = storage.get_customer(user_id)
+            if not customer:
+                settings = _load_settings()
+                customer = {
+                    "addresses": [],
+                    "orders": [],
+                    "bonus_balance": int(settings.get("bonus_balance", 0)),
+                    "welcome_bonus_awarded": True,
+                }
+                storage.save_customer(user_id, customer)
+            if "bonus_balance" not in customer:
+                settings = _load_settings()
+                customer["bonus_balance"] = int(settings.get("bonus_balance", 0))
+                storage.save_customer(user_id, customer)
+            if "welcome_bonus_awarded" not in customer:
+                customer["welcome_bonus_awarded"] = True
+                storage.save_customer(user_id, customer)
+    stats = storage.get_customer_stats(user_id)
+    return jsonify({**customer, **stats})
 
 
 @app.delete("/api/customers/<user_id>")
@@ -267,12 +322,8 @@ def delete_customer(user_id):
     auth = _require_admin()
     if auth:
         return auth
-    with LOCK:
-        customers = _load_customers()
-        if str(user_id) not in customers:
-            return jsonify({"message": "Покупатель не найден"}), 404
-        customers.pop(str(user_id), None)
-        _save_customers(customers)
+    if not storage.delete_customer(user_id):
+        return jsonify({"message": "Покупатель не найден"}), 404
     return jsonify({"ok": True})
 
 
@@ -282,65 +333,59 @@ def list_customers():
     if auth:
         return auth
     include_orders = request.args.get("include") == "orders"
-    with LOCK:
-        customers = _load_customers()
-        orders = _load_orders() if include_orders else []
-        orders_map = {}
-        orders_by_user = {}
-        orders_by_username = {}
-        if include_orders:
-            for order in orders:
-                oid = int(order.get("id", 0))
-                if oid:
-                    orders_map[oid] = order
-                uid = str(order.get("user_id"))
-                if not uid:
-                    continue
-                orders_by_user.setdefault(uid, []).append(order)
-                username = (order.get("username") or "").strip()
-                if username:
-                    orders_by_username.setdefault(f"@{username}", []).append(order)
-        result = []
-        for uid, customer in customers.items():
-            entry = {"user_id": uid}
-            if isinstance(customer, dict):
-                entry.update(customer)
-            if include_orders:
-                order_ids = [
-                    int(order_id)
-                    for order_id in (customer.get("orders") or [])
-                    if str(order_id).isdigit()
-                ]
-                order_details = [orders_map.get(oid) for oid in order_ids]
-                order_details = [o for o in order_details if o]
-                if not order_details:
-                    order_details = orders_by_user.get(str(uid), [])
-                if not order_details:
-                    order_details = orders_by_username.get(str(uid), [])
-                entry["order_details"] = order_details
-                if order_details:
-                    last_order = order_details[-1]
-                    entry.setdefault("phone", last_order.get("phone"))
-                    entry.setdefault("email", last_order.get("email"))
-                    entry.setdefault("name", last_order.get("name"))
-                    entry.setdefault("address", last_order.get("address"))
-            result.append(entry)
-        return jsonify(result)
+    sort = request.args.get("sort", "created")
+    if sort not in storage.CUSTOMER_SORTS:
+        return jsonify({"message": "Некорректная сортировка"}), 400
+    descending = request.args.get("order") == "desc"
+    paginated = "page" in request.args
+    try:
+        page = max(1, int(request.args.get("page", 1)))
+        per_page = int(request.args.get("per_page", CUSTOMERS_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"message": "Некорректная страница"}), 400
+    per_page = min(CUSTOMERS_PAGE_MAX, max(1, per_page))
+    result, total = storage.list_customers(
+        sort,
+        descending,
+        limit=per_page if paginated else None,
+        offset=(page - 1) * per_page if paginated else 0,
+    )
+    if include_orders:
+        for entry in result:
+            order_ids = [
+                int(order_id)
+                for order_id in (entry.get("orders") or [])
+                if str(order_id).isdigit()
+            ]
+            order_details = storage.load_orders_by_ids(order_ids)
+            if not order_details:
+                order_details = _load_orders(entry["user_id"])
+            if not order_details and str(entry["user_id"]).startswith("@"):
+                # Старые покупатели записаны под @username, их заказы — под числовым user_id
+                order_details = storage.load_orders_by_username(entry["user_id"])
+            entry["order_details"] = order_details
+            if order_details:
+                last_order = order_details[-1]
+                entry.setdefault("phone", last_order.get("phone"))
+                entry.setdefault("email", last_order.get("email"))
+                entry.setdefault("name", last_order.get("name"))
+                entry.setdefault("address", last_order.get("address"))
+    if paginated:
+        return jsonify({"items": result, "total": total, "page": page, "per_page": per_page})
+    return jsonify(result)
 
 @app.patch("/api/customers/<user_id>")
 def update_customer(user_id):
     payload = request.get_json(force=True, silent=True) or {}
-    with LOCK:
-        customers = _load_customers()
-        customer = customers.get(str(user_id), {"addresses": [], "orders": []})
+    with storage.transaction():
+        customer = storage.get_customer(user_id) or {"addresses": [], "orders": []}
         if "addresses" in payload and isinstance(payload.get("addresses"), list):
             customer["addresses"] = payload.get("addresses")
         if "name" in payload:
             customer["name"] = payload.get("name")
         if "username" in payload:
             customer["username"] = payload.get("username")
-        customers[str(user_id)] = customer
-        _save_customers(customers)
+        storage.save_customer(user_id, customer)
     return jsonify({"ok": True})
 
 @app.patch("/api/orders/<int:order_id>/status")
@@ -352,17 +397,12 @@ def update_order_status(order_id):
     status = (payload.get("status") or "").strip()
     if status not in {"не обработан", "собран", "отправлен", "оплачен", "выполнен", "отменен"}:
         return jsonify({"message": "Некорректный статус"}), 400
-    with LOCK:
-        orders = _load_orders()
-        updated = False
-        for order in orders:
-            if int(order.get("id", 0)) == order_id:
-                order["status"] = status
-                updated = True
-                break
-        if not updated:
+    with storage.transaction():
+        order = storage.get_order(order_id)
+        if not order:
             return jsonify({"message": "Заказ не найден"}), 404
-        _save_orders(orders)
+        order["status"] = status
+        storage.save_order(order)
     return jsonify({"ok": True})
 
 @app.delete("/api/orders/<int:order_id>")
@@ -370,12 +410,8 @@ def delete_order(order_id):
     auth = _require_admin()
     if auth:
         return auth
-    with LOCK:
-        orders = _load_orders()
-        new_orders = [o for o in orders if int(o.get("id", 0)) != order_id]
-        if len(new_orders) == len(orders):
-            return jsonify({"message": "Заказ не найден"}), 404
-        _save_orders(new_orders)
+    if not storage.delete_order(order_id):
+        return jsonify({"message": "Заказ не найден"}), 404
     return jsonify({"ok": True})
 
 @app.patch("/api/orders/<int:order_id>")
@@ -397,24 +433,18 @@ def update_order(order_id):
         "promo_code",
         "status",
     }
-    with LOCK:
-        orders = _load_orders()
-        updated = False
-        for order in orders:
-            if int(order.get("id", 0)) == order_id:
-                for key, value in payload.items():
-                    if key in allowed_fields:
-                        order[key] = value
-                updated = True
-                break
-        if not updated:
+    with storage.transaction():
+        order = storage.get_order(order_id)
+        if not order:
             return jsonify({"message": "Заказ не найден"}), 404
-        _save_orders(orders)
+        for key, value in payload.items():
+            if key in allowed_fields:
+                order[key] = value
+        storage.save_order(order)
     return jsonify({"ok": True})
 @app.get("/api/settings")
 def get_settings():
-    with LOCK:
-        return jsonify(_load_settings())
+    return _snapshot_response("settings", _load_settings)
 
 @app.patch("/api/settings")
 def update_settings():
@@ -422,7 +452,7 @@ def update_settings():
     if auth:
         return auth
     payload = request.get_json(force=True, silent=True) or {}
-    with LOCK:
+    with storage.transaction():
         settings = _load_settings()
         for key in settings.keys():
             if key in payload:
@@ -434,8 +464,10 @@ def update_settings():
 
 @app.get("/api/products")
 def get_products():
-    with LOCK:
-        return jsonify(_load_products())
+    return _snapshot_response(
+        "products",
+        lambda: [dict(p, image=_versioned_image(p.get("image"))) for p in _load_products()],
+    )
 
 @app.patch("/api/products/<product_id>")
 def update_product(product_id):
@@ -443,31 +475,26 @@ def update_product(product_id):
     if auth:
         return auth
     payload = request.get_json(force=True, silent=True) or {}
-    with LOCK:
-        products = _load_products()
-        updated = False
-        for product in products:
-            if str(product.get("id")) == str(product_id):
-                if "image" in payload:
-                    image = (payload.get("image") or "").strip()
-                    product["image"] = image or None
-                if "name" in payload:
-                    product["name"] = (payload.get("name") or "").strip()
-                if "description" in payload:
-                    product["description"] = (payload.get("description") or "").strip()
-                if "price" in payload:
-                    product["price"] = int(payload.get("price") or 0)
-                if "min_qty" in payload:
-                    product["min_qty"] = max(1, int(payload.get("min_qty") or 1))
-                if "tags" in payload and isinstance(payload.get("tags"), list):
-                    product["tags"] = payload.get("tags")
-                if "delivery_label" in payload:
-                    product["delivery_label"] = (payload.get("delivery_label") or "").strip() or None
-                updated = True
-                break
-        if not updated:
+    with storage.transaction():
+        product = storage.get_product(product_id)
+        if not product:
             return jsonify({"message": "Товар не найден"}), 404
-        _save_products(products)
+        if "image" in payload:
+            image = _asset_path((payload.get("image") or "").strip())
+            product["image"] = image or None
+        if "name" in payload:
+            product["name"] = (payload.get("name") or "").strip()
+        if "description" in payload:
+            product["description"] = (payload.get("description") or "").strip()
+        if "price" in payload:
+            product["price"] = int(payload.get("price") or 0)
+        if "min_qty" in payload:
+            product["min_qty"] = max(1, int(payload.get("min_qty") or 1))
+        if "tags" in payload and isinstance(payload.get("tags"), list):
+            product["tags"] = payload.get("tags")
+        if "delivery_label" in payload:
+            product["delivery_label"] = (payload.get("delivery_label") or "").strip() or None
+        storage.upsert_products([product])
     return jsonify({"ok": True})
 
 
@@ -476,12 +503,8 @@ def delete_product(product_id):
     auth = _require_admin()
     if auth:
         return auth
-    with LOCK:
-        products = _load_products()
-        new_products = [p for p in products if str(p.get("id")) != str(product_id)]
-        if len(new_products) == len(products):
-            return jsonify({"message": "Товар не найден"}), 404
-        _save_products(new_products)
+    if not storage.delete_product(product_id):
+        return jsonify({"message": "Товар не найден"}), 404
     return jsonify({"ok": True})
 
 @app.post("/api/products/<product_id>/image")
@@ -502,17 +525,12 @@ def upload_product_image(product_id):
     filename = f"{safe_id}-{int(time.time())}{ext}"
     save_path = ASSETS_DIR / filename
     file.save(save_path)
-    with LOCK:
-        products = _load_products()
-        updated = False
-        for product in products:
-            if str(product.get("id")) == str(product_id):
-                product["image"] = f"/assets/{filename}"
-                updated = True
-                break
-        if not updated:
+    with storage.transaction():
+        product = storage.get_product(product_id)
+        if not product:
             return jsonify({"message": "Товар не найден"}), 404
-        _save_products(products)
+        product["image"] = f"/assets/{filename}"
+        storage.upsert_products([product])
     return jsonify({"ok": True, "path": f"/assets/{filename}"})
 
 
@@ -522,11 +540,9 @@ def create_product():
     if auth:
         return auth
     payload = request.get_json(force=True, silent=True) or {}
-    with LOCK:
-        products = _load_products()
-        existing_ids = {str(p.get("id")) for p in products}
+    with storage.transaction():
         requested_id = str(payload.get("id") or "").strip()
-        if requested_id and requested_id in existing_ids:
+        if requested_id and storage.get_product(requested_id):
             return jsonify({"message": "ID уже используется"}), 400
         if requested_id:
             product_id = requested_id
@@ -534,7 +550,7 @@ def create_product():
             base_id = f"p{int(time.time())}"
             product_id = base_id
             counter = 1
-            while product_id in existing_ids:
+            while storage.get_product(product_id):
                 counter += 1
                 product_id = f"{base_id}_{counter}"
         tags = payload.get("tags")
@@ -549,10 +565,9 @@ def create_product():
             "description": (payload.get("description") or "").strip(),
             "min_qty": max(1, int(payload.get("min_qty") or 1)),
             "delivery_label": (payload.get("delivery_label") or "").strip(),
-            "image": (payload.get("image") or "").strip(),
+            "image": _asset_path((payload.get("image") or "").strip()),
         }
-        products.append(product)
-        _save_products(products)
+        storage.upsert_products([product])
     return jsonify(product), 201
 
 @app.post("/api/products/import")
@@ -565,34 +580,24 @@ def import_products():
     file = request.files["file"]
     if file.filename == "":
         return jsonify({"message": "Файл не выбран"}), 400
-    if not file.filename.lower().endswith(".csv"):
-        return jsonify({"message": "Нужен CSV файл"}), 400
-    content = file.read().decode("utf-8")
-    lines = [line for line in content.splitlines() if line.strip()]
-    if not lines:
+    filename = file.filename.lower()
+    if filename.endswith(".csv"):
+        rows = catalog_io.iter_csv_rows(file.stream)
+    elif filename.endswith(".xlsx"):
+        if not catalog_io.OPENPYXL_AVAILABLE:
+            return jsonify({"message": "Для XLSX на сервере нужен openpyxl"}), 400
+        rows = catalog_io.iter_xlsx_rows(file.stream)
+    else:
+        return jsonify({"message": "Нужен CSV или XLSX файл"}), 400
+    dry_run = request.args.get("dry_run") in {"1", "true", "yes"}
+    replace = request.args.get("mode") == "replace"
+    try:
+        report = catalog_io.import_products(rows, dry_run=dry_run, replace=replace)
+    except (UnicodeDecodeError, csv.Error, ValueError) as error:
+        return jsonify({"message": f"Не удалось прочитать файл: {error}"}), 400
+    if not report["rows"]:
         return jsonify({"message": "Пустой файл"}), 400
-    header = [h.strip() for h in lines[0].split(",")]
-    rows = lines[1:]
-    products = []
-    for row in rows:
-        cols = [c.strip() for c in row.split(",")]
-        data = dict(zip(header, cols))
-        tags = [t.strip() for t in data.get("tags", "").split("|") if t.strip()]
-        product = {
-            "id": data.get("id") or f"p{len(products) + 1}",
-            "name": data.get("name", ""),
-            "price": int(float(data.get("price", 0) or 0)),
-            "category": data.get("category", ""),
-            "tags": tags,
-            "description": data.get("description", ""),
-            "min_qty": int(float(data.get("min_qty", 1) or 1)),
-            "delivery_label": data.get("delivery_label", ""),
-            "image": data.get("image", ""),
-        }
-        products.append(product)
-    with LOCK:
-        _save_products(products)
-    return jsonify({"ok": True, "count": len(products)})
+    return jsonify({"ok": True, "count": report["imported"], **report})
 
 @app.patch("/api/products/bulk")
 def update_products_bulk():
@@ -601,14 +606,13 @@ def update_products_bulk():
         return auth
     payload = request.get_json(force=True, silent=True) or {}
     items = payload.get("products") or []
-    with LOCK:
-        products = _load_products()
-        products_map = {str(p.get("id")): p for p in products}
+    with storage.transaction():
+        changed = {}
         for item in items:
             pid = str(item.get("id"))
-            if pid not in products_map:
+            product = changed.get(pid) or storage.get_product(pid)
+            if not product:
                 continue
-            product = products_map[pid]
             if "name" in item:
                 product["name"] = str(item.get("name") or "").strip()
             if "description" in item:
@@ -622,8 +626,9 @@ def update_products_bulk():
             if "delivery_label" in item:
                 product["delivery_label"] = str(item.get("delivery_label") or "").strip()
             if "image" in item:
-                product["image"] = str(item.get("image") or "").strip()
-        _save_products(list(products_map.values()))
+                product["image"] = _asset_path(str(item.get("image") or "").strip())
+            changed[pid] = product
+        storage.upsert_products(list(changed.values()))
     return jsonify({"ok": True})
 
 @app.get("/api/products/export")
@@ -631,37 +636,16 @@ def export_products():
     auth = _require_admin()
     if auth:
         return auth
-    with LOCK:
-        products = _load_products()
-    header = [
-        "id",
-        "name",
-        "price",
-        "category",
-        "tags",
-        "description",
-        "min_qty",
-        "delivery_label",
-        "image",
-    ]
-    lines = [",".join(header)]
-    for product in products:
-        tags = "|".join(product.get("tags", []) or [])
-        row = [
-            str(product.get("id", "")),
-            str(product.get("name", "")).replace(",", " "),
-            str(product.get("price", "")),
-            str(product.get("category", "")).replace(",", " "),
-            tags.replace(",", " "),
-            str(product.get("description", "")).replace(",", " "),
-            str(product.get("min_qty", "")),
-            str(product.get("delivery_label", "")),
-            str(product.get("image", "")),
-        ]
-        lines.append(",".join(row))
-    csv_content = "\n".join(lines)
+    if request.args.get("format") == "xlsx":
+        if not catalog_io.OPENPYXL_AVAILABLE:
+            return jsonify({"message": "Для XLSX на сервере нужен openpyxl"}), 400
+        return Response(
+            catalog_io.export_xlsx(storage.iter_products()),
+            mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            headers={"Content-Disposition": "attachment; filename=products.xlsx"},
+        )
     return Response(
-        csv_content,
+        catalog_io.export_csv(storage.iter_products()),
         mimetype="text/csv",
         headers={"Content-Disposition": "attachment; filename=products.csv"},
     )
@@ -733,8 +717,7 @@ def create_order():
     total_before_bonus = subtotal + service_fee + delivery_fee - discount
     available_bonus = int(settings.get("bonus_balance", 0))
     if user_id and str(user_id) != "guest":
-        customers = _load_customers()
-        customer = customers.get(str(user_id), {})
+        customer = storage.get_customer(user_id) or {}
         available_bonus = int(customer.get("bonus_balance", available_bonus))
     bonus = max(0, min(int(bonus_requested or 0), available_bonus, total_before_bonus))
     total = total_before_bonus - bonus
@@ -742,11 +725,8 @@ def create_order():
     if bonus > 0:
         bonus_earned = 0
 
-    with LOCK:
-        orders = _load_orders()
-        next_id = (orders[-1]["id"] + 1) if orders else 1
+    with storage.transaction():
         order = {
-            "id": next_id,
             "user_id": user_id,
             "username": username,
             "phone": phone,
@@ -768,20 +748,15 @@ def create_order():
             "status": "не обработан",
             "created_at": datetime.now().strftime("%Y-%m-%d %H:%M"),
         }
-        orders.append(order)
-        _save_orders(orders)
+        next_id = storage.insert_order(order)
 
         if user_id and str(user_id) != "guest":
-            customers = _load_customers()
-            customer = customers.get(
-                str(user_id),
-                {
-                    "addresses": [],
-                    "orders": [],
-                    "bonus_balance": available_bonus,
-                    "welcome_bonus_awarded": True,
-                },
-            )
+            customer = storage.get_customer(user_id) or {
+                "addresses": [],
+                "orders": [],
+                "bonus_balance": available_bonus,
+                "welcome_bonus_awarded": True,
+            }
             if address and address not in customer.get("addresses", []):
                 customer.setdefault("addresses", []).append(address)
             customer.setdefault("orders", []).append(next_id)
@@ -794,8 +769,7 @@ def create_order():
                 customer["email"] = email
             current_bonus = int(customer.get("bonus_balance", available_bonus))
             customer["bonus_balance"] = max(0, current_bonus - int(bonus)) + int(bonus_earned)
-            customers[str(user_id)] = customer
-            _save_customers(customers)
+            storage.save_customer(user_id, customer)
 
     return jsonify({"order_id": next_id, "total": total})
 
@@ -0,0 +1,684 @@
+# -*- coding: utf-8 -*-
+"""
+Хранилище мини-приложения: SQLite в режиме WAL вместо JSON-файлов в data/.
+
+Товары, заказы, покупатели и настройки лежат в отдельных таблицах. Документ хранится
+целиком в колонке data (JSON), а поля для поиска (user_id, @username, статус и дата
+заказа, категория товара) вынесены в колонки с индексами. Изменение одного заказа или
+покупателя — это одна строка, а не перезапись всего файла истории.
+
+Каждый поток работает через своё соединение. Чтение в WAL не блокирует запись.
+Изменения «прочитать — поменять — записать» выполняются в transaction()
+(BEGIN IMMEDIATE), поэтому записи сериализуются самой базой.
+
+customer_stats — агрегаты покупателя (число заказов, сумма, последний заказ, бонусы,
+адреса из заказов). Они обновляются при каждой записи или удалении заказа, поэтому
+список покупателей не сканирует историю заказов. Отменённые заказы не учитываются.
+
+Версии каталога и настроек (get_version) растут в той же транзакции, что и запись,
+поэтому кеш ответов сервера узнаёт об изменениях и из других процессов.
+"""
+import json
+import os
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+# Корень проекта в sys.path для импорта utils
+if str(BASE_DIR.parent) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR.parent))
+
+from utils.sqlite_db import thread_connection, write_transaction  # noqa: E402
+
+DATA_DIR = BASE_DIR / "data"
+DB_FILE = Path(os.environ.get("MINIAPP_DB", DATA_DIR / "miniapp.db"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id TEXT PRIMARY KEY,
+    category TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_products_category ON products(category);
+
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT,
+    status TEXT,
+    created_at TEXT,
+    data TEXT NOT NULL,
+    username TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_orders_user ON orders(user_id);
+CREATE INDEX IF NOT EXISTS idx_orders_status ON orders(status);
+CREATE INDEX IF NOT EXISTS idx_orders_created ON orders(created_at);
+
+CREATE TABLE IF NOT EXISTS customers (
+    user_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS customer_stats (
+    user_id TEXT PRIMARY KEY,
+    order_count INTEGER NOT NULL DEFAULT 0,
+    total_spent REAL NOT NULL DEFAULT 0,
+    last_order_id INTEGER,
+    last_order_at TEXT,
+    bonus_balance INTEGER NOT NULL DEFAULT 0,
+    addresses TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_stats_order_count ON customer_stats(order_count);
+CREATE INDEX IF NOT EXISTS idx_stats_total_spent ON customer_stats(total_spent);
+CREATE INDEX IF NOT EXISTS idx_stats_last_order ON customer_stats(last_order_id);
+CREATE INDEX IF NOT EXISTS idx_stats_bonus ON customer_stats(bonus_balance);
+
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+CANCELLED_STATUS = "отменен"
+
+# Сортировки списка покупателей: параметр sort -> выражение ORDER BY
+CUSTOMER_SORTS = {
+    "created": "c.rowid",
+    "user_id": "c.user_id",
+    "order_count": "s.order_count",
+    "total_spent": "s.total_spent",
+    "last_order": "s.last_order_id",
+    "bonus_balance": "s.bonus_balance",
+}
+
+_local = threading.local()
+
+
+def configure(path):
+    """Сменить файл базы (миграция, бенчмарки)"""
+    global DB_FILE
+    DB_FILE = Path(path)
+
+
+def _dumps(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def _user_key(user_id):
+    return None if user_id is None else str(user_id)
+
+
+def connect():
+    """Соединение текущего потока с DB_FILE (см. utils.sqlite_db)"""
+    return thread_connection(_local, DB_FILE, SCHEMA, on_open=_migrate)
+
+
+def _migrate(conn):
+    """Довести базу старой версии до текущей схемы"""
+    _add_orders_username(conn)
+    # База из версии без агрегатов: построить их один раз
+    if not conn.execute("SELECT 1 FROM meta WHERE key = 'customer_stats'").fetchone():
+        rebuild_customer_stats()
+
+
+def _add_orders_username(conn):
+    """База из версии без колонки orders.username: добавить её, заполнить из data и проиндексировать"""
+    def has_column():
+        return "username" in {row[1] for row in conn.execute("PRAGMA table_info(orders)")}
+
+    if not has_column():
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Другой процесс мог добавить колонку, пока ждали блокировку
+            if not has_column():
+                conn.execute("ALTER TABLE orders ADD COLUMN username TEXT")
+                rows = conn.execute("SELECT id, data FROM orders").fetchall()
+                conn.executemany(
+                    "UPDATE orders SET username = ? WHERE id = ?",
+                    [(_username_key(json.loads(data)), order_id) for order_id, data in rows],
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_username ON orders(username)")
+
+
+def transaction():
+    """Транзакция на запись (см. utils.sqlite_db)"""
+    return write_transaction(connect())
+
+
+# Версии данных для кеша ответов
+
+def get_version(name):
+    row = connect().execute("SELECT value FROM meta WHERE key = ?", (f"version:{name}",)).fetchone()
+    return int(row[0]) if row else 0
+
+
+def bump_version(name):
+    with transaction() as conn:
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, 1) "
+            "ON CONFLICT(key) DO UPDATE SET value = value + 1",
+            (f"version:{name}",),
+        )
+
+
+# Товары
+
+def load_products():
+    rows = connect().execute("SELECT data FROM products ORDER BY rowid")
+    return [json.loads(data) for (data,) in rows]
+
+
+def get_product(product_id):
+    row = connect().execute(
+        "SELECT data FROM products WHERE id = ?", (str(product_id),)
+    ).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def iter_products():
+    """Товары по одному прямо из курсора (для потокового экспорта)"""
+    for (data,) in connect().execute("SELECT data FROM products ORDER BY rowid"):
+        yield json.loads(data)
+
+
+def existing_product_ids(product_ids):
+    """Какие из product_ids уже есть в каталоге"""
+    conn = connect()
+    found = set()
+    product_ids = [str(pid) for pid in product_ids]
+    for start in range(0, len(product_ids), 500):
+        chunk = product_ids[start:start + 500]
+        rows = conn.execute(
+            f"SELECT id FROM products WHERE id IN ({','.join('?' * len(chunk))})", chunk
+        )
+        found.update(pid for (pid,) in rows)
+    return found
+
+
+def upsert_products(products):
+    """Добавить или обновить товары по id (порядок существующих не меняется)"""
+    with transaction() as conn:
+        conn.executemany(
+            "INSERT INTO products (id, category, data) VALUES (?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET category = excluded.category, data = excluded.data",
+            [(str(p.get("id")), p.get("category"), _dumps(p)) for p in products],
+        )
+        bump_version("products")
+
+
+def save_products(products):
+    """Заменить весь каталог"""
+    with transaction() as conn:
+        conn.execute("DELETE FROM products")
+        upsert_products(products)
+
+
+def delete_product(product_id):
+    with transaction() as conn:
+        cursor = conn.execute("DELETE FROM products WHERE id = ?", (str(product_id),))
+        bump_version("products")
+    return cursor.rowcount > 0
+
+
+def reset_import_ids():
+    """
+    Очистить временные таблицы текущего импорта (свои у каждого соединения):
+    import_ids — id записанных строк, import_kept_ids — id строк с ошибками,
+    товары которых при замене каталога сохраняются как есть.
+    """
+    conn = connect()
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS import_ids (id TEXT PRIMARY KEY)")
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS import_kept_ids (id TEXT PRIMARY KEY)")
+    conn.execute("DELETE FROM import_ids")
+    conn.execute("DELETE FROM import_kept_ids")
+
+
+def mark_import_ids(product_ids):
+    """Отметить id как встреченные в импорте; возвращает те, что уже были отмечены раньше"""
+    product_ids = [str(pid) for pid in product_ids]
+    conn = connect()
+    seen = set()
+    for start in range(0, len(product_ids), 500):
+        chunk = product_ids[start:start + 500]
+        rows = conn.execute(
+            f"SELECT id FROM import_ids WHERE id IN ({','.join('?' * len(chunk))})", chunk
+        )
+        seen.update(pid for (pid,) in rows)
+    conn.executemany(
+        "INSERT OR IGNORE INTO import_ids (id) VALUES (?)", [(pid,) for pid in product_ids]
+    )
+    return seen
+
+
+def keep_import_ids(product_ids):
+    """Отметить id строк с ошибками: при замене каталога эти товары не удаляются"""
+    connect().executemany(
+        "INSERT OR IGNORE INTO import_kept_ids (id) VALUES (?)", [(str(pid),) for pid in product_ids]
+    )
+
+
+# Товары, которых нет ни среди записанных, ни среди сохраняемых id импорта
+_NOT_IMPORTED = (
+    "id NOT IN (SELECT id FROM import_ids) AND id NOT IN (SELECT id FROM import_kept_ids)"
+)
+
+
+def count_products_not_imported():
+    (count,) = connect().execute(f"SELECT COUNT(*) FROM products WHERE {_NOT_IMPORTED}").fetchone()
+    return count
+
+
+def delete_products_not_imported():
+    """Удалить товары, которых не было в импорте; возвращает число удалённых"""
+    with transaction() as conn:
+        cursor = conn.execute(f"DELETE FROM products WHERE {_NOT_IMPORTED}")
+        bump_version("products")
+    return cursor.rowcount
+
+
+# Заказы
+
+def load_orders(user_id=None):
+    """Все заказы по возрастанию id; user_id — только заказы покупателя (по индексу)"""
+    if user_id is None:
+        rows = connect().execute("SELECT data FROM orders ORDER BY id")
+    else:
+        rows = connect().execute(
+            "SELECT data FROM orders WHERE user_id = ? ORDER BY id", (str(user_id),)
+        )
+    return [json.loads(data) for (data,) in rows]
+
+
+def get_order(order_id):
+    row = connect().execute("SELECT data FROM orders WHERE id = ?", (int(order_id),)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def load_orders_by_ids(order_ids):
+    """Заказы с указанными id в порядке возрастания id (отсутствующие пропускаются)"""
+    order_ids = [int(order_id) for order_id in order_ids]
+    if not order_ids:
+        return []
+    conn = connect()
+    found = {}
+    for start in range(0, len(order_ids), 500):
+        chunk = order_ids[start:start + 500]
+        rows = conn.execute(
+            f"SELECT id, data FROM orders WHERE id IN ({','.join('?' * len(chunk))})", chunk
+        )
+        found.update((order_id, json.loads(data)) for order_id, data in rows)
+    return [found[order_id] for order_id in sorted(found)]
+
+
+def load_orders_by_username(username):
+    """
+    Заказы по @username из заказа (по индексу), по возрастанию id. Старые покупатели
+    записаны под ключом "@username", а их заказы — под числовым user_id.
+    """
+    return [
+        json.loads(data)
+        for (data,) in connect().execute(
+            "SELECT data FROM orders WHERE username = ? ORDER BY id", (str(username),)
+        )
+    ]
+
+
+def _username_key(order):
+    """"@username" из заказа (как ключ старых покупателей) или None"""
+    username = (order.get("username") or "").strip()
+    return f"@{username}" if username else None
+
+
+def _order_row(order):
+    return (
+        int(order["id"]),
+        _user_key(order.get("user_id")),
+        order.get("status"),
+        order.get("created_at"),
+        _dumps(order),
+        _username_key(order),
+    )
+
+
+def save_order(order):
+    """Записать заказ по его id (новый или изменённый) и обновить агрегаты покупателя"""
+    with transaction() as conn:
+        previous = get_order(order["id"])
+        conn.execute(
+            "INSERT INTO orders (id, user_id, status, created_at, data, username) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET user_id = excluded.user_id, status = excluded.status, "
+            "created_at = excluded.created_at, data = excluded.data, username = excluded.username",
+            _order_row(order),
+        )
+        _apply_order(conn, previous, -1)
+        _apply_order(conn, order, 1)
+
+
+def insert_order(order):
+    """Добавить заказ со следующим по порядку id; возвращает id"""
+    with transaction() as conn:
+        (last_id,) = conn.execute("SELECT COALESCE(MAX(id), 0) FROM orders").fetchone()
+        save_order({"id": last_id + 1, **order})
+    return last_id + 1
+
+
+def save_orders(orders):
+    """Заменить всю историю заказов"""
+    with transaction() as conn:
+        conn.execute("DELETE FROM orders")
+        conn.executemany(
+            "INSERT INTO orders (id, user_id, status, created_at, data, username) VALUES (?, ?, ?, ?, ?, ?)",
+            [_order_row(order) for order in orders],
+        )
+        rebuild_customer_stats()
+
+
+def delete_order(order_id):
+    with transaction() as conn:
+        previous = get_order(order_id)
+        conn.execute("DELETE FROM orders WHERE id = ?", (int(order_id),))
+        _apply_order(conn, previous, -1)
+    return previous is not None
+
+
+# Покупатели
+
+def load_customers():
+    rows = connect().execute("SELECT user_id, data FROM customers ORDER BY rowid")
+    return {user_id: json.loads(data) for user_id, data in rows}
+
+
+def get_customer(user_id):
+    row = connect().execute(
+        "SELECT data FROM customers WHERE user_id = ?", (str(user_id),)
+    ).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def save_customer(user_id, customer):
+    with transaction() as conn:
+        conn.execute(
+            "INSERT INTO customers (user_id, data) VALUES (?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET data = excluded.data",
+            (str(user_id), _dumps(customer)),
+        )
+        conn.execute(
+            "INSERT INTO customer_stats (user_id, bonus_balance) VALUES (?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET bonus_balance = excluded.bonus_balance",
+            (str(user_id), _number(customer.get("bonus_balance"), int)),
+        )
+
+
+def save_customers(customers):
+    """Заменить всех покупателей"""
+    with transaction() as conn:
+        conn.execute("DELETE FROM customers")
+        conn.executemany(
+            "INSERT INTO customers (user_id, data) VALUES (?, ?)",
+            [(str(uid), _dumps(customer)) for uid, customer in customers.items()],
+        )
+        rebuild_customer_stats()
+
+
+def delete_customer(user_id):
+    """Удалить покупателя; агрегаты его заказов остаются (заказы не удаляются)"""
+    with transaction() as conn:
+        cursor = conn.execute("DELETE FROM customers WHERE user_id = ?", (str(user_id),))
+        conn.execute("UPDATE customer_stats SET bonus_balance = 0 WHERE user_id = ?", (str(user_id),))
+    return cursor.rowcount > 0
+
+
+# Агрегаты покупателей
+
+def _number(value, kind=float):
+    try:
+        return kind(value or 0)
+    except (TypeError, ValueError):
+        return kind(0)
+
+
+def _stats_key(order):
+    """Ключ покупателя заказа (как user_id в таблице orders); None — гость или не учитывается"""
+    if not order or order.get("status") == CANCELLED_STATUS:
+        return None
+    user_id = _user_key(order.get("user_id"))
+    if not user_id or not user_id.strip() or user_id.strip().lower() == "guest":
+        return None
+    return user_id
+
+
+def _stats_dict(row):
+    order_count, total_spent, last_order_id, last_order_at, bonus_balance, addresses = row
+    return {
+        "order_count": order_count,
+        "total_spent": round(total_spent, 2),
+        "last_order_id": last_order_id,
+        "last_order_at": last_order_at,
+        "bonus_balance": bonus_balance,
+        "order_addresses": list(json.loads(addresses)),
+    }
+
+
+_STATS_COLUMNS = "s.order_count, s.total_spent, s.last_order_id, s.last_order_at, s.bonus_balance, s.addresses"
+
+
+def _apply_order(conn, order, sign):
+    """Добавить (sign=1) или убрать (sign=-1) вклад заказа в агрегаты его покупателя"""
+    user_id = _stats_key(order)
+    if user_id is None:
+        return
+    conn.execute("INSERT OR IGNORE INTO customer_stats (user_id) VALUES (?)", (user_id,))
+    addresses_json, last_order_id = conn.execute(
+        "SELECT addresses, last_order_id FROM customer_stats WHERE user_id = ?", (user_id,)
+    ).fetchone()
+    addresses = json.loads(addresses_json)
+    address = (order.get("address") or "").strip()
+    if address:
+        addresses[address] = addresses.get(address, 0) + sign
+        if addresses[address] <= 0:
+            del addresses[address]
+    conn.execute(
+        "UPDATE customer_stats SET order_count = order_count + ?, total_spent = total_spent + ?, "
+        "addresses = ? WHERE user_id = ?",
+        (sign, sign * _number(order.get("total")), _dumps(addresses), user_id),
+    )
+    order_id = int(order["id"])
+    if sign > 0 and (last_order_id is None or order_id >= last_order_id):
+        conn.execute(
+            "UPDATE customer_stats SET last_order_id = ?, last_order_at = ? WHERE user_id = ?",
+            (order_id, order.get("created_at"), user_id),
+        )
+    elif sign < 0 and last_order_id == order_id:
+        # Последний заказ убран — берём предыдущий по индексу заказов покупателя
+        row = conn.execute(
+            "SELECT id, created_at FROM orders WHERE user_id = ? AND COALESCE(status, '') != ? "
+            "ORDER BY id DESC LIMIT 1",
+            (user_id, CANCELLED_STATUS),
+        ).fetchone()
+        conn.execute(
+            "UPDATE customer_stats SET last_order_id = ?, last_order_at = ? WHERE user_id = ?",
+            (row[0] if row else None, row[1] if row else None, user_id),
+        )
+
+
+def compute_customer_stats():
+    """Агрегаты всех покупателей, посчитанные заново по заказам и покупателям (без таблицы customer_stats)"""
+    stats = {}
+
+    def entry(user_id):
+        return stats.setdefault(user_id, {
+            "order_count": 0, "total_spent": 0.0, "last_order_id": None,
+            "last_order_at": None, "bonus_balance": 0, "order_addresses": {},
+        })
+
+    for user_id, customer in load_customers().items():
+        entry(user_id)["bonus_balance"] = _number(customer.get("bonus_balance"), int)
+    for order in load_orders():
+        user_id = _stats_key(order)
+        if user_id is None:
+            continue
+        item = entry(user_id)
+        item["order_count"] += 1
+        item["total_spent"] += _number(order.get("total"))
+        if item["last_order_id"] is None or int(order["id"]) >= item["last_order_id"]:
+            item["last_order_id"] = int(order["id"])
+            item["last_order_at"] = order.get("created_at")
+        address = (order.get("address") or "").strip()
+        if address:
+            item["order_addresses"][address] = item["order_addresses"].get(address, 0) + 1
+    return stats
+
+
+def rebuild_customer_stats():
+    """Пересчитать таблицу customer_stats целиком; возвращает число покупателей"""
+    with transaction() as conn:
+        stats = compute_customer_stats()
+        conn.execute("DELETE FROM customer_stats")
+        conn.executemany(
+            "INSERT INTO customer_stats (user_id, order_count, total_spent, last_order_id, "
+            "last_order_at, bonus_balance, addresses) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (uid, s["order_count"], s["total_spent"], s["last_order_id"], s["last_order_at"],
+                 s["bonus_balance"], _dumps(s["order_addresses"]))
+                for uid, s in stats.items()
+            ],
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('customer_stats', ?)",
+            (datetime.now().strftime("%Y-%m-%d %H:%M:%S"),),
+        )
+    return len(stats)
+
+
+def verify_customer_stats():
+    """
+    Сравнить customer_stats с пересчётом по заказам.
+    Возвращает {user_id: (в таблице, пересчёт)} для расходящихся покупателей.
+    """
+    empty = {"order_count": 0, "total_spent": 0.0, "last_order_id": None,
+             "last_order_at": None, "bonus_balance": 0, "order_addresses": {}}
+    expected = compute_customer_stats()
+    actual = {}
+    for row in connect().execute(
+        "SELECT user_id, order_count, total_spent, last_order_id, last_order_at, bonus_balance, addresses "
+        "FROM customer_stats"
+    ):
+        actual[row[0]] = dict(zip(empty, row[1:6]), order_addresses=json.loads(row[6]))
+    mismatches = {}
+    for user_id in set(expected) | set(actual):
+        stored, fresh = actual.get(user_id, empty), expected.get(user_id, empty)
+        same = all(
+            abs(stored[k] - fresh[k]) < 0.005 if k == "total_spent" else stored[k] == fresh[k]
+            for k in empty
+        )
+        if not same:
+            mismatches[user_id] = (stored, fresh)
+    return mismatches
+
+
+def load_customer_stats():
+    """Все агрегаты из таблицы: {user_id: агрегаты}"""
+    rows = connect().execute(f"SELECT s.user_id, {_STATS_COLUMNS} FROM customer_stats s")
+    return {row[0]: _stats_dict(row[1:]) for row in rows}
+
+
+def get_customer_stats(user_id):
+    row = connect().execute(
+        f"SELECT {_STATS_COLUMNS} FROM customer_stats s WHERE s.user_id = ?", (str(user_id),)
+    ).fetchone()
+    return _stats_dict(row) if row else _stats_dict((0, 0.0, None, None, 0, "{}"))
+
+
+def list_customers(sort="created", descending=False, limit=None, offset=0):
+    """
+    Страница покупателей с агрегатами, отсортированная по CUSTOMER_SORTS[sort].
+    Возвращает (список {user_id, поля покупателя, агрегаты}, всего покупателей).
+    """
+    column = CUSTOMER_SORTS.get(sort, CUSTOMER_SORTS["created"])
+    direction = "DESC" if descending else "ASC"
+    conn = connect()
+    (total,) = conn.execute("SELECT COUNT(*) FROM customers").fetchone()
+    rows = conn.execute(
+        f"SELECT c.user_id, c.data, {_STATS_COLUMNS} FROM customers c "
+        f"JOIN customer_stats s ON s.user_id = c.user_id "
+        f"ORDER BY {column} {direction}, c.rowid LIMIT ? OFFSET ?",
+        (-1 if limit is None else int(limit), int(offset)),
+    )
+    items = []
+    for row in rows:
+        entry = {"user_id": row[0]}
+        customer = json.loads(row[1])
+        if isinstance(customer, dict):
+            entry.update(customer)
+        entry.update(_stats_dict(row[2:]))
+        items.append(entry)
+    return items, total
+
+
+# Настройки
+
+def load_settings():
+    """Сохранённые настройки (без значений по умолчанию)"""
+    rows = connect().execute("SELECT key, value FROM settings")
+    return {key: json.loads(value) for key, value in rows}
+
+
+def save_settings(settings):
+    with transaction() as conn:
+        conn.execute("DELETE FROM settings")
+        conn.executemany(
+            "INSERT INTO settings (key, value) VALUES (?, ?)",
+            [(key, _dumps(value)) for key, value in settings.items()],
+        )
+        bump_version("settings")
+
+
+# Миграция из JSON
+
+def _load_json(path, default):
+    if not path.exists():
+        return default
+    with path.open("r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def migrate_from_json(data_dir=DATA_DIR, force=False):
+    """
+    Перенести products.json, orders.json, customers.json и settings.json в базу.
+    Выполняется один раз: повторный вызов ничего не делает, пока не передан force=True
+    (тогда таблицы перезаписываются содержимым файлов). JSON-файлы не удаляются.
+    Возвращает число перенесённых записей по таблицам или None, если миграция уже была.
+    """
+    data_dir = Path(data_dir)
+    with transaction() as conn:
+        done = conn.execute("SELECT value FROM meta WHERE key = 'migrated_from_json'").fetchone()
+        if done and not force:
+            return None
+        products = _load_json(data_dir / "products.json", [])
+        orders = _load_json(data_dir / "orders.json", [])
+        customers = _load_json(data_dir / "customers.json", {})
+        settings = _load_json(data_dir / "settings.json", {})
+        save_products(products)
+        save_orders(orders)
+        save_customers(customers)
+        save_settings(settings)
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_from_json', ?)",
+            (datetime.now().strftime("%Y-%m-%d %H:%M:%S"),),
+        )
+    return {
+        "products": len(products),
+        "orders": len(orders),
+        "customers": len(customers),
+        "settings": len(settings),
+    }
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк холодного старта дашборда: apps/dashboard/dashboard_final.py до и после
+ленивой загрузки вкладок и зависимостей, каждый раз в новом процессе.
+
+Сравниваются два дерева проекта:
+  before — ревизия до выноса вкладок (по умолчанию родитель коммита, добавившего
+           apps/dashboard/tabs), выгружается через git archive во временную папку;
+  after  — текущее рабочее дерево.
+
+Что замеряется:
+  full    — import apps.dashboard.dashboard_final целиком (первый проход скрипта
+            в «голом» режиме Streamlit); только если streamlit установлен;
+  prelude — все импорты модульного уровня dashboard_final.py (import, from и блоки try
+            с импортами) в порядке файла, извлечённые через ast из самого файла,
+            поэтому список не устаревает. Недоступные пакеты пропускаются и выводятся.
+
+Запуск из корня проекта:
+    python scripts/bench/bench_cold_start.py --runs 5
+    python scripts/bench/bench_cold_start.py --before <ревизия>
+"""
+import argparse
+import ast
+import io
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DASHBOARD = "apps/dashboard/dashboard_final.py"
+
+# Тяжёлые библиотеки, которые раньше загружались при старте
+HEAVY_MODULES = ["prophet", "openai", "PIL", "docx", "bs4"]
+
+_CHILD_CODE = """
+import importlib, json, sys, time
+sys.path.insert(0, {root!r})
+blocks = {blocks!r}
+missing = []
+t0 = time.perf_counter()
+if blocks is None:
+    importlib.import_module("apps.dashboard.dashboard_final")
+else:
+    namespace = {{}}
+    for block in blocks:
+        try:
+            exec(block, namespace)
+        except Exception as e:
+            missing.append(block.splitlines()[0][:60] + " -> " + type(e).__name__ + ": " + str(e)[:60])
+elapsed = (time.perf_counter() - t0) * 1000.0
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"ms": elapsed, "modules": len(sys.modules), "heavy": heavy, "missing": missing}}))
+"""
+
+
+def git(*args):
+    return subprocess.run(["git", *args], cwd=PROJECT_ROOT, capture_output=True, check=True).stdout
+
+
+def default_before():
+    """Родитель коммита, добавившего apps/dashboard/tabs"""
+    added = git("log", "--diff-filter=A", "--format=%H", "--", "apps/dashboard/tabs/__init__.py").decode().split()
+    if not added:
+        raise SystemExit("Не найден коммит с apps/dashboard/tabs — укажите --before")
+    return added[-1] + "^"
+
+
+def export_tree(rev, target):
+    """Выгружает utils, apps и корневые .py ревизии rev в папку target"""
+    root_files = [name for name in git("ls-tree", "--name-only", rev).decode().splitlines() if name.endswith(".py")]
+    archive = git("archive", "--format=tar", rev, "utils", "apps", *root_files)
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(target)
+
+
+def import_prelude(path):
+    """Импорты модульного уровня файла по порядку: import, from и try, тело которых — только импорты"""
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    blocks = []
+    for node in ast.parse(source).body:
+        is_import = isinstance(node, (ast.Import, ast.ImportFrom))
+        is_try_import = isinstance(node, ast.Try) and all(
+            isinstance(item, (ast.Import, ast.ImportFrom)) for item in node.body
+        )
+        if is_import or is_try_import:
+            blocks.append(ast.get_source_segment(source, node))
+    return blocks
+
+
+def direct_packages(blocks):
+    """Сторонние пакеты, которые скрипт импортирует сам на модульном уровне (без stdlib, utils и apps)"""
+    names = set()
+    for block in blocks:
+        for node in ast.walk(ast.parse(block)):
+            if isinstance(node, ast.Import):
+                names.update(alias.name.split(".")[0] for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                names.add(node.module.split(".")[0])
+    return sorted(name for name in names if name not in sys.stdlib_module_names and name not in ("utils", "apps"))
+
+
+def measure(root, blocks):
+    """Один запуск в новом процессе: мс, число модулей, тяжёлые библиотеки, недоступные импорты"""
+    import json
+    code = _CHILD_CODE.format(root=root, blocks=blocks, heavy=HEAVY_MODULES)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=root)
+    lines = out.stdout.strip().splitlines()
+    if out.returncode != 0 or not lines:
+        raise RuntimeError(out.stderr[-2000:])
+    return json.loads(lines[-1])
+
+
+def run(root, blocks, runs):
+    results = [measure(root, blocks) for _ in range(runs)]
+    timings = [r["ms"] for r in results]
+    return statistics.median(timings), min(timings), max(timings), results[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк холодного старта дашборда")
+    parser.add_argument("--runs", type=int, default=5, help="число запусков на дерево")
+    parser.add_argument("--before", default=None, help="ревизия «до» (по умолчанию — до выноса вкладок)")
+    args = parser.parse_args()
+
+    before = args.before or default_before()
+    full = subprocess.run([sys.executable, "-c", "import streamlit"], capture_output=True).returncode == 0
+    mode = "full" if full else "prelude"
+    print(f"Ревизия «до»: {git('rev-parse', '--short', before).decode().strip()}; режим: {mode}")
+    if not full:
+        print("streamlit не установлен — замеряются импорты модульного уровня dashboard_final.py\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        export_tree(before, tmp)
+        trees = {"before": tmp, "after": PROJECT_ROOT}
+        results = {}
+        for name, root in trees.items():
+            prelude = import_prelude(os.path.join(root, DASHBOARD))
+            blocks = None if full else prelude
+            median, low, high, last = run(root, blocks, args.runs)
+            results[name] = median
+            print(f"{name:>6}: медиана {median:8.1f} мс (мин {low:.1f}, макс {high:.1f}), "
+                  f"модулей: {last['modules']}, тяжёлые: {', '.join(last['heavy']) or 'нет'}")
+            print(f"        пакеты в импортах скрипта: {', '.join(direct_packages(prelude))}")
+            for item in last["missing"]:
+                print(f"        пропущено: {item}")
+
+    print(f"ускорение: ×{results['before'] / results['after']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
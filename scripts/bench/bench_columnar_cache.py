@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк колоночного кеша analytics_45 (utils.columnar_cache) против data_cache.csv.
+
+Сценарии (на синтетически размноженном кеше):
+  размер — data_cache.csv против папки разделов (сжатые .npz и _meta.json);
+  загрузка — прежний load_data_cache (read_csv + to_datetime + дедупликация + типы)
+             против load_cache (разделы по месяцам, типы из футера);
+  проекция — load_cache только нужных колонок и одного месяца;
+  информация — прежний get_cache_info (полное чтение CSV) против cache_info (только футер);
+  загрузка отчёта — полная перезапись CSV против replace_period (только месяцы отчёта).
+Проверяет, что данные из колоночного кеша совпадают с CSV, включая типы колонок.
+
+Запуск из корня проекта:
+    python scripts/bench/bench_columnar_cache.py --scale 20
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.columnar_cache import save_cache, load_cache, cache_info, replace_period  # noqa: E402
+
+KEYS = ['Дата', 'Артикул WB', 'Артикул продавца']
+
+
+def load_csv(path):
+    """Как было в app_45_simple.load_data_cache"""
+    df = pd.read_csv(path)
+    df['Дата'] = pd.to_datetime(df['Дата'])
+    df = df.drop_duplicates(subset=KEYS, keep='last')
+    if 'Неделя' in df.columns:
+        df['Неделя'] = df['Неделя'].astype(int)
+    return df.sort_values('Дата', kind='mergesort').reset_index(drop=True)
+
+
+def csv_info(path):
+    """Как было в app_45_simple.get_cache_info"""
+    df = load_csv(path)
+    return {'records': len(df), 'start_date': df['Дата'].min(), 'end_date': df['Дата'].max()}
+
+
+def scaled(df, scale):
+    copies = []
+    for i in range(scale):
+        part = df.copy()
+        part['Артикул WB'] = part['Артикул WB'] + i * 10_000_000
+        copies.append(part)
+    return pd.concat(copies, ignore_index=True)
+
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def timed(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - t0) * 1000.0 / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк колоночного кеша")
+    parser.add_argument("--cache", default=os.path.join(PROJECT_ROOT, "data_cache.csv"), help="исходный кеш CSV")
+    parser.add_argument("--scale", type=int, default=20, help="во сколько раз размножить артикулы")
+    parser.add_argument("--repeat", type=int, default=5, help="повторов замера")
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="bench_cache_")
+    try:
+        csv_path = os.path.join(work, "data_cache.csv")
+        cache_dir = os.path.join(work, "data_cache")
+        scaled(load_csv(args.cache), args.scale).to_csv(csv_path, index=False)
+        source = load_csv(csv_path)
+        save_cache(source, cache_dir)
+        print(f"Строк: {len(source):,}, колонок: {source.shape[1]}, разделов: {cache_info(cache_dir)['partitions']}")
+        print(f"размер CSV:           {os.path.getsize(csv_path) / 1024:8.0f} КБ")
+        print(f"размер кеша:          {dir_size(cache_dir) / 1024:8.0f} КБ\n")
+
+        csv_ms, old = timed(lambda: load_csv(csv_path), args.repeat)
+        col_ms, new = timed(lambda: load_cache(cache_dir), args.repeat)
+        pd.testing.assert_frame_equal(old, new)
+        print(f"загрузка CSV:         {csv_ms:8.1f} мс")
+        print(f"загрузка колоночная:  {col_ms:8.1f} мс")
+
+        last = source['Дата'].max()
+        month_from = last.replace(day=1)
+        proj_ms, part = timed(
+            lambda: load_cache(cache_dir, columns=['Артикул WB', 'Заказали, шт'], date_from=month_from),
+            args.repeat,
+        )
+        expected = old.loc[old['Дата'] >= month_from, ['Дата', 'Артикул WB', 'Заказали, шт']]
+        pd.testing.assert_frame_equal(expected.reset_index(drop=True), part[expected.columns])
+        print(f"2 колонки, 1 месяц:   {proj_ms:8.1f} мс")
+
+        old_info_ms, _ = timed(lambda: csv_info(csv_path), args.repeat)
+        new_info_ms, info = timed(lambda: cache_info(cache_dir), args.repeat)
+        assert info['records'] == len(old)
+        print(f"инфо о кеше CSV:      {old_info_ms:8.1f} мс")
+        print(f"инфо о кеше (футер):  {new_info_ms:8.1f} мс")
+
+        # Загрузка отчёта за последние 30 дней: CSV переписывается целиком, кеш — только эти месяцы
+        date_from = last - pd.Timedelta(days=29)
+        upload = source[source['Дата'] >= date_from].copy()
+        upload['Заказали, шт'] = upload['Заказали, шт'] + 1
+        combined = pd.concat([source[source['Дата'] < date_from], upload], ignore_index=True)
+        write_ms, _ = timed(lambda: combined.to_csv(csv_path, index=False), 1)
+        replace_ms, _ = timed(lambda: replace_period(upload, date_from, last, cache_dir), 1)
+        pd.testing.assert_frame_equal(load_csv(csv_path), load_cache(cache_dir))
+        print(f"отчёт 30 дн., CSV:    {write_ms:8.1f} мс (перезапись файла)")
+        print(f"отчёт 30 дн., кеш:    {replace_ms:8.1f} мс (замена разделов периода)")
+        print("\nпаритет данных и типов: OK")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
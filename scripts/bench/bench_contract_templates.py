@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк скомпилированных шаблонов DOCX генератора договоров
+(apps/contract_generator/document_templates.py).
+
+Прежний путь: на каждый документ python-docx заново строит все абзацы договора,
+применяет шрифт к каждому run и таблице и сохраняет документ.
+Новый путь: скелет с подстановками ⟦поле⟧ строится один раз, документ рекламодателя —
+склейка кусков word/document.xml и запись архива.
+Фикстура — договор той же структуры, что create_contract_document (заголовок, ~120 абзацев
+текста, разделы, таблица реквизитов), рекламодатели со спецсимволами и переводами строк.
+Паритет: тексты абзацев и ячеек таблиц, прочитанные python-docx, совпадают.
+Требуется python-docx; без него замер пропускается.
+
+Запуск из корня проекта:
+    python scripts/bench/bench_contract_templates.py --advertisers 200
+"""
+import argparse
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "apps", "contract_generator"))
+
+from document_templates import DocxTemplate, placeholders  # noqa: E402
+
+FIELDS = ['company_name', 'ogrn', 'director', 'email', 'inn', 'legal_address', 'account',
+          'bank', 'bank_bik', 'brand_name', 'contract_amount', 'start_date', 'end_date', 'contract_number']
+CLAUSE = ("Исполнитель обязуется оказать Услуги в полном объеме и в установленные сроки, соблюдая "
+          "требования законодательства Российской Федерации и условия Договора.")
+
+
+def build_contract(data):
+    """Договор в стиле create_contract_document: абзацы, шрифт на каждый run, таблица реквизитов"""
+    from docx import Document
+    from docx.shared import Inches, RGBColor
+
+    def font(paragraph, size=12, bold=False):
+        for run in paragraph.runs:
+            run.font.name = "Times New Roman"
+            run.font.size = Inches(size / 72)
+            run.font.color.rgb = RGBColor(0, 0, 0)
+            run.font.bold = bold
+
+    doc = Document()
+    font(doc.add_paragraph(f"ДОГОВОР ОКАЗАНИЯ РЕКЛАМНЫХ УСЛУГ №{data['contract_number']}"), 14, True)
+    doc.add_paragraph(f"{data['company_name']} (ОГРН {data['ogrn']}), в лице {data['director']}, "
+                      f"именуемый в дальнейшем «Заказчик», с одной стороны")
+    for section in range(1, 11):
+        font(doc.add_heading(f"{section}. РАЗДЕЛ ДОГОВОРА", level=1), 12, True)
+        for clause in range(1, 12):
+            doc.add_paragraph(f"{section}.{clause}. {CLAUSE}")
+            doc.add_paragraph("")
+    doc.add_paragraph(f"1.1. Срок с {data['start_date']} по {data['end_date']}, бренд «{data['brand_name']}», "
+                      f"стоимость {data['contract_amount']} рублей.")
+    doc.add_paragraph(f"Заказчик – {data['email']}")
+    table = doc.add_table(rows=1, cols=2)
+    table.style = 'Table Grid'
+    cells = table.rows[0].cells
+    cells[0].text = 'ЗАКАЗЧИК:'
+    cells[1].text = 'ИСПОЛНИТЕЛЬ:'
+    for text in [data['company_name'], f"Юр адрес: {data['legal_address']}", f"ИНН {data['inn']}",
+                 f"р/с {data['account']}", f"Банк {data['bank']}", f"БИК {data['bank_bik']}", f"/ {data['director']} /"]:
+        cells[0].add_paragraph(text)
+    for row in table.rows:
+        for cell in row.cells:
+            for paragraph in cell.paragraphs:
+                font(paragraph)
+    return doc
+
+
+def docx_bytes(doc):
+    import io
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def advertiser(i):
+    return {
+        'company_name': f"ООО «Ромашка & Co {i}» <опт>", 'ogrn': str(1180000000000 + i),
+        'director': f"Иванов И.И. {i}", 'email': f"shop{i}@example.ru", 'inn': str(3500000000 + i),
+        'legal_address': f"г Вологда,\nул Ленина дом {i}", 'account': str(40702810000000000000 + i),
+        'bank': "АО «ТБАНК»", 'bank_bik': "044525974", 'brand_name': f"Brand {i}",
+        'contract_amount': f"{50 + i % 10} 000", 'start_date': "01.02.2026", 'end_date': "08.03.2026",
+        'contract_number': f"{i % 28 + 1:02d}/02/26-К",
+    }
+
+
+def texts(content):
+    """Тексты абзацев и ячеек таблиц документа"""
+    import io
+    from docx import Document
+    doc = Document(io.BytesIO(content))
+    result = [p.text for p in doc.paragraphs]
+    for table in doc.tables:
+        result += [p.text for row in table.rows for cell in row.cells for p in cell.paragraphs]
+    return result
+
+
+def timed(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - t0) * 1000.0 / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк шаблонов договоров")
+    parser.add_argument("--advertisers", type=int, default=200, help="рекламодателей в пакете")
+    args = parser.parse_args()
+
+    try:
+        import docx  # noqa: F401
+    except ImportError:
+        print("python-docx не установлен — замер шаблонов договоров пропущен")
+        return
+
+    compile_ms, template = timed(lambda: DocxTemplate(docx_bytes(build_contract(placeholders(FIELDS)))), 1)
+    data = [advertiser(i) for i in range(args.advertisers)]
+    for item in data[:20]:
+        assert texts(docx_bytes(build_contract(item))) == texts(template.render(item)), item['company_name']
+
+    old_ms, _ = timed(lambda: [docx_bytes(build_contract(item)) for item in data], 1)
+    new_ms, _ = timed(lambda: [template.render(item) for item in data], 1)
+    print(f"Рекламодателей: {args.advertisers}; компиляция шаблона: {compile_ms:.1f} мс")
+    print(f"  построение python-docx: {old_ms / len(data):8.2f} мс на договор")
+    print(f"  шаблон:                 {new_ms / len(data):8.2f} мс на договор   x{old_ms / new_ms:.0f}")
+    print("Паритет текста с построением python-docx: OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк загрузки источников данных ИИ-аналитика (data_integration.DataIntegration).
+
+Прежний путь отчёта AIAnalyst: load_data_sources (загрузка + проверка качества),
+инсайты и предупреждения — каждый шаг заново вызывал get_all_data_sources,
+то есть 4 полных чтения колоночного кеша 45 и JSON-файлов на отчёт.
+Новый путь: один снимок get_all_data_sources на отчёт, сводка, качество и инсайты
+считаются по нему; файлы перечитываются только после изменения mtime/размера.
+Число чтений берётся из трассы utils.perf (промахи секции data_sources).
+
+Запуск из корня проекта:
+    python scripts/bench/bench_data_sources.py --products 300 --days 365
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, PROJECT_ROOT)
+
+from data_integration import SNAPSHOT_SECTION, DataIntegration  # noqa: E402
+from utils.boot_state import invalidate  # noqa: E402
+from utils.columnar_cache import CACHE_DIR, load_cache, save_cache  # noqa: E402
+from utils.perf import begin_rerun, end_rerun, get_traces, set_perf_enabled  # noqa: E402
+
+JSON_SOURCES = {
+    'production_calendar': 'production_calendar_data.json',
+    'seasonal_calculator': 'seasonal_data.json',
+    'investments': 'investments_data.json',
+}
+
+
+def make_sources(base, products, days, seed=0):
+    """Колоночный кеш 45 (товары × дни) и JSON-файлы календаря, сезонности и инвестиций"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end=pd.Timestamp.now().normalize(), periods=days)
+    n = products * days
+    orders = rng.integers(0, 30, n)
+    sales = (orders * rng.uniform(0.3, 0.9, n)).astype(int)
+    df = pd.DataFrame({
+        'Дата': np.tile(dates, products),
+        'Артикул WB': np.repeat(np.arange(10_000_000, 10_000_000 + products), days),
+        'Артикул продавца': np.repeat([f"SKU-{i}" for i in range(products)], days),
+        'Заказали, шт': orders,
+        'Выкупили, шт': sales,
+        'Выкупили на сумму, ₽': sales * rng.uniform(500, 3000, n).round(2),
+        'Заказали на сумму, ₽': orders * rng.uniform(500, 3000, n).round(2),
+        'Переходы в карточку': rng.integers(0, 2000, n),
+        'Положили в корзину': rng.integers(0, 200, n),
+    })
+    save_cache(df, os.path.join(base, CACHE_DIR))
+    today = pd.Timestamp.now().normalize()
+    projects = [{
+        'name': f"Проект {i}",
+        'wb_end': (today + pd.Timedelta(days=int(rng.integers(-60, 120)))).strftime('%Y-%m-%d'),
+        'target_launch': (today + pd.Timedelta(days=int(rng.integers(-30, 90)))).strftime('%Y-%m-%d'),
+        'total_development_cost': float(rng.integers(0, 500_000)),
+    } for i in range(200)]
+    payloads = {
+        'production_calendar': projects,
+        'seasonal_calculator': {'months': {str(m): float(rng.uniform(0.5, 1.5)) for m in range(1, 13)}},
+        'investments': [{'date': d.strftime('%Y-%m-%d'), 'amount': float(rng.integers(1000, 90000))}
+                        for d in pd.date_range(end=today, periods=500)],
+    }
+    for key, file_name in JSON_SOURCES.items():
+        with open(os.path.join(base, file_name), 'w', encoding='utf-8') as f:
+            json.dump(payloads[key], f, ensure_ascii=False)
+    return len(df)
+
+
+def old_all_sources(base):
+    """Как было: каждый вызов get_all_data_sources читает все файлы с диска"""
+    sources = {'wb_analysis': load_cache(os.path.join(base, CACHE_DIR))}
+    for key, file_name in JSON_SOURCES.items():
+        with open(os.path.join(base, file_name), 'r', encoding='utf-8') as f:
+            sources[key] = json.load(f)
+    return sources
+
+
+def old_report(integration, base):
+    """Отчёт AIAnalyst по-старому: загрузка, качество, инсайты, качество для предупреждений"""
+    sources = old_all_sources(base)
+    integration.validate_data_quality(old_all_sources(base))
+    integration.get_cross_app_insights(old_all_sources(base))
+    integration.validate_data_quality(old_all_sources(base))
+    return len(sources) * 4
+
+
+def new_report(integration):
+    """Отчёт по снимку: одна загрузка, качество считается один раз"""
+    snapshot = integration.get_all_data_sources()
+    quality = integration.validate_data_quality(snapshot)
+    insights = integration.get_cross_app_insights(snapshot)
+    return snapshot, quality, insights
+
+
+def traced(fn):
+    """(мс, результат, чтений с диска, попаданий в снимок) по трассе utils.perf"""
+    begin_rerun("report")
+    t0 = time.perf_counter()
+    result = fn()
+    elapsed = (time.perf_counter() - t0) * 1000.0
+    end_rerun()
+    section = get_traces()[-1]["sections"].get(SNAPSHOT_SECTION, {})
+    return elapsed, result, section.get("misses", 0), section.get("hits", 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк источников данных ИИ-аналитика")
+    parser.add_argument("--products", type=int, default=300, help="товаров в данных 45")
+    parser.add_argument("--days", type=int, default=365, help="дней в данных 45")
+    parser.add_argument("--reports", type=int, default=5, help="отчётов подряд")
+    args = parser.parse_args()
+
+    set_perf_enabled(True)
+    with tempfile.TemporaryDirectory() as base:
+        rows = make_sources(base, args.products, args.days)
+        integration = DataIntegration(base)
+        invalidate()
+        print(f"Строк данных 45: {rows:,}; источников: {1 + len(JSON_SOURCES)}\n")
+
+        old_times = []
+        for _ in range(args.reports):
+            t0 = time.perf_counter()
+            old_loads = old_report(integration, base)
+            old_times.append((time.perf_counter() - t0) * 1000.0)
+        print(f"Прежний отчёт: {np.mean(old_times):8.1f} мс, чтений с диска на отчёт: {old_loads}")
+
+        for i in range(args.reports):
+            elapsed, (snapshot, quality, insights), misses, hits = traced(lambda: new_report(integration))
+            label = "первый (холодный)" if i == 0 else f"повторный #{i}"
+            print(f"Снимок, {label:18} {elapsed:8.1f} мс, чтений с диска: {misses}, из снимка: {hits}")
+
+        # Паритет: отчёт по снимку совпадает с отчётом по свежей загрузке
+        fresh = old_all_sources(base)
+        assert set(fresh) == set(snapshot)
+        assert fresh['wb_analysis'].equals(snapshot['wb_analysis'])
+        assert integration.validate_data_quality(fresh) == quality
+        assert integration.get_cross_app_insights(fresh) == insights
+
+        # Изменение одного файла перечитывает только его
+        path = os.path.join(base, JSON_SOURCES['seasonal_calculator'])
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'months': {}}, f)
+        os.utime(path, ns=(time.time_ns() + 10**9, time.time_ns() + 10**9))
+        elapsed, (snapshot, _, _), misses, hits = traced(lambda: new_report(integration))
+        assert misses == 1 and snapshot['seasonal_calculator'] == {'months': {}}
+        print(f"После изменения seasonal_data.json: {elapsed:8.1f} мс, чтений с диска: {misses}, из снимка: {hits}")
+    print("\nПаритет сводки качества и инсайтов со свежей загрузкой: OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк быстрого движка прогноза (utils.fast_forecast) против Prophet на отчётах Tovar.
+
+Для каждого артикула из папки Tovar последние --holdout дней откладываются,
+модели обучаются на остальной истории и сравниваются по MAE и WAPE на отложенном
+участке. Для ориентира добавлен сезонный наивный прогноз (повтор последней недели).
+
+Сценарии:
+  fast (матрица) — все ряды одной матричной операцией;
+  fast (по одному) — тот же движок в цикле по рядам;
+  разная история — ряды обрезаны с разных дат: матрица (ряды группируются по окну
+                   истории) против цикла по рядам, прогнозы должны совпасть;
+  prophet — по одному ряду (если Prophet установлен).
+
+Запуск из корня проекта:
+    python scripts/bench/bench_fast_forecast.py --holdout 28
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.fast_forecast import (  # noqa: E402
+    align_series, fit_forecast_matrix, matrix_forecast_frames, create_fast_forecast
+)
+from utils.forecast_batch import build_series_from_reports, DEFAULT_CONFIG  # noqa: E402
+from utils.prophet_forecast import PROPHET_AVAILABLE, create_prophet_forecast  # noqa: E402
+from utils.reports import find_and_load_reports_from_tovar  # noqa: E402
+from utils.wb_utils import extract_sku_from_filename  # noqa: E402
+
+
+def load_series(tovar_folder, metric):
+    skus = tuple(sorted({s for s in (extract_sku_from_filename(f) for f in os.listdir(tovar_folder)) if s}))
+    reports = find_and_load_reports_from_tovar(skus, tovar_folder)
+    return build_series_from_reports(reports, metric=metric)
+
+
+def metrics(actual, predicted):
+    actual = np.asarray(actual, dtype="float64")
+    predicted = np.clip(np.asarray(predicted, dtype="float64"), 0, None)
+    mae = np.abs(actual - predicted).mean()
+    wape = np.abs(actual - predicted).sum() / max(np.abs(actual).sum(), 1e-9)
+    return mae, wape
+
+
+def report_line(name, elapsed_ms, scores):
+    mae = np.mean([s[0] for s in scores])
+    wape = np.mean([s[1] for s in scores])
+    print(f"{name:<18} {elapsed_ms:10.1f} мс   MAE {mae:8.2f}   WAPE {wape:6.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк быстрого движка прогноза")
+    parser.add_argument("--tovar", default=os.path.join(PROJECT_ROOT, "Tovar"), help="папка с отчетами")
+    parser.add_argument("--metric", default="Заказы", help="метрика отчета")
+    parser.add_argument("--holdout", type=int, default=28, help="дней на проверку")
+    parser.add_argument("--no-prophet", action="store_true", help="не запускать Prophet")
+    parser.add_argument("--require-prophet", action="store_true",
+                        help="завершиться с ошибкой, если Prophet не установлен (сравнение точности обязательно)")
+    args = parser.parse_args()
+    if args.require_prophet and not PROPHET_AVAILABLE:
+        raise SystemExit("Prophet не установлен: сравнение точности с Prophet невозможно")
+
+    series = {k: v for k, v in load_series(args.tovar, args.metric).items() if len(v) > args.holdout + 60}
+    if not series:
+        print("Нет рядов для сравнения")
+        return
+    ids = list(series)
+    train = [series[k].iloc[:-args.holdout].reset_index(drop=True) for k in ids]
+    test = [series[k]["y"].values[-args.holdout:] for k in ids]
+    config = dict(DEFAULT_CONFIG, periods=args.holdout)
+    print(f"Рядов: {len(ids)}, длина истории: {len(train[0])} дн., проверка: {args.holdout} дн.\n")
+
+    # Сезонный наивный прогноз
+    naive = [metrics(t, np.resize(tr["y"].values[-7:], args.holdout)) for tr, t in zip(train, test)]
+    report_line("naive (неделя)", 0.0, naive)
+
+    t0 = time.perf_counter()
+    Y, start = align_series(train)
+    result = fit_forecast_matrix(Y, start, args.holdout, config)
+    frames = matrix_forecast_frames(result, args.holdout)
+    elapsed = (time.perf_counter() - t0) * 1000.0
+    report_line("fast (матрица)", elapsed, [metrics(t, f["yhat"].values) for f, t in zip(frames, test)])
+
+    t0 = time.perf_counter()
+    fast_scores = []
+    for tr, t in zip(train, test):
+        _, forecast, _ = create_fast_forecast(tr, args.holdout)
+        fast_scores.append(metrics(t, forecast["yhat"].values[-args.holdout:]))
+    report_line("fast (по одному)", (time.perf_counter() - t0) * 1000.0, fast_scores)
+
+    # Ряды с разной длиной истории: у каждого свои тренд, точки излома и годовая сезонность
+    trimmed = [tr.iloc[(i * 17) % max(len(tr) - 60, 1):].reset_index(drop=True) for i, tr in enumerate(train)]
+    t0 = time.perf_counter()
+    Y, start = align_series(trimmed)
+    frames = matrix_forecast_frames(fit_forecast_matrix(Y, start, args.holdout, config), args.holdout)
+    matrix_ms = (time.perf_counter() - t0) * 1000.0
+    t0 = time.perf_counter()
+    single = [create_fast_forecast(tr, args.holdout)[1]["yhat"].values[-args.holdout:] for tr in trimmed]
+    single_ms = (time.perf_counter() - t0) * 1000.0
+    diff = max(np.abs(f["yhat"].values - y).max() for f, y in zip(frames, single))
+    print(f"\nразная история: матрица {matrix_ms:.1f} мс, по одному {single_ms:.1f} мс, "
+          f"макс. расхождение прогнозов {diff:.2e}")
+    assert diff < 1e-6
+
+    if PROPHET_AVAILABLE and not args.no_prophet:
+        t0 = time.perf_counter()
+        scores = []
+        wins = 0
+        for tr, t, fast in zip(train, test, fast_scores):
+            _, forecast, _ = create_prophet_forecast(tr, periods=args.holdout)
+            if forecast is not None:
+                scores.append(metrics(t, forecast["yhat"].values[-args.holdout:]))
+                wins += fast[1] <= scores[-1][1]
+        report_line("prophet", (time.perf_counter() - t0) * 1000.0, scores)
+        print(f"\nfast не хуже Prophet по WAPE: {wins} из {len(scores)} рядов")
+    else:
+        print("prophet: не установлен, сравнение пропущено")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк векторной симуляции остатков (utils.inventory_sim) против прежних циклов.
+
+Сценарии:
+  калькулятор — помесячный цикл inventory_calculator_advanced.calculate_inventory_needs
+                (продажи не больше остатка, лимит недостатка, возвраты в том же месяце);
+  дашборд     — расчет заказа вкладки «📦 Расчет заказа»: дневной цикл с возвратами через
+                7 дней и бинарный поиск минимального заказа, для каждого артикула × плана × % выкупа,
+                против одного вызова sensitivity_sweep.
+Проверяет совпадение полей по периодам и рекомендуемого заказа.
+
+Запуск из корня проекта:
+    python scripts/bench/bench_inventory_sim.py --skus 30 --days 60
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.inventory_sim import simulate_inventory, sensitivity_sweep  # noqa: E402
+
+
+def old_calculator(orders, buyback_rate, warehouse_stock, limits):
+    """Как было в calculate_inventory_needs: (продано, недостаток, возвраты, остаток) по месяцам"""
+    rows = []
+    for period_orders, limit in zip(orders, limits):
+        if warehouse_stock >= period_orders:
+            sold, shortage = period_orders, 0
+        else:
+            sold, shortage = warehouse_stock, period_orders - warehouse_stock
+        shortage = min(shortage, period_orders * limit)
+        returns = sold * (1 - buyback_rate)
+        warehouse_stock = warehouse_stock - sold + returns
+        rows.append((sold, shortage, returns, warehouse_stock))
+    return np.array(rows)
+
+
+def old_order(plan_values, current_stock, buyout_k, min_end_pct, safety_pct, return_days=7):
+    """Как было в дашборде: simulate_period + бинарный поиск + запас"""
+    def simulate_period(order_amount):
+        stock = current_stock + order_amount
+        used = [0] * len(plan_values)
+        for day_idx, day_orders in enumerate(plan_values):
+            if day_orders <= 0:
+                continue
+            if day_idx >= return_days:
+                stock += used[day_idx - return_days] * (1 - buyout_k)
+            used[day_idx] = day_orders
+            stock -= day_orders
+        return stock
+
+    total = sum(plan_values)
+    min_end = total * (min_end_pct / 100.0)
+    low, high = 0, int(total * 1.5)
+    optimal = high
+    while low <= high:
+        test = (low + high) // 2
+        if simulate_period(test) >= min_end:
+            optimal, high = test, test - 1
+        else:
+            low = test + 1
+    return max(0, int(np.ceil(optimal * (1 + safety_pct / 100.0))))
+
+
+def timed(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - t0) * 1000.0 / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк симуляции остатков")
+    parser.add_argument("--skus", type=int, default=30, help="артикулов в комбинации")
+    parser.add_argument("--days", type=int, default=60, help="дней в периоде расчета")
+    parser.add_argument("--repeat", type=int, default=3, help="повторов замера")
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    # Калькулятор: 12 месяцев, случайные параметры
+    for _ in range(500):
+        orders = rng.integers(0, 500, 12).astype(float)
+        buyback, stock, limits = rng.uniform(0.1, 1.0), rng.uniform(0, 3000), rng.uniform(0, 0.5, 12)
+        sim = simulate_inventory(orders, buyback, stock, shortage_limit=limits)
+        new = np.stack([sim['sold_from_warehouse'], sim['shortage'], sim['returns_this_month'], sim['warehouse_stock']], axis=1)
+        assert np.allclose(old_calculator(orders, buyback, stock, limits), new)
+    print("паритет калькулятора (500 наборов по 12 месяцев): OK")
+
+    # Дашборд: артикулы × планы × проценты выкупа (дни без заказов не генерируются —
+    # прежний цикл пропускал возвраты в такие дни)
+    scales = {'low': 0.6, 'mid': 1.0, 'high': 1.5}
+    base = rng.uniform(0.5, 20, (args.skus, args.days))
+    orders = {(sku, name): base[sku] * scale for sku in range(args.skus) for name, scale in scales.items()}
+    rates = list(range(10, 95, 5))
+    params = dict(initial_stock=20.0, min_end_stock_pct=5.0, safety_stock_pct=5.0, return_lag=7)
+
+    old_ms, old = timed(lambda: [
+        old_order(list(values), 20.0, rate / 100, 5.0, 5.0) for values in orders.values() for rate in rates
+    ], args.repeat)
+    new_ms, sweep = timed(lambda: sensitivity_sweep(orders, rates, **params), args.repeat)
+    assert old == sweep['Рекомендуемый заказ, шт'].tolist()
+    print(f"\nРасчетов заказа: {len(sweep):,} ({args.skus} артикулов × 3 плана × {len(rates)} % выкупа, {args.days} дней)")
+    print(f"цикл + бинарный поиск:  {old_ms:9.1f} мс")
+    print(f"sensitivity_sweep:      {new_ms:9.1f} мс")
+    print("\nпаритет рекомендуемого заказа: OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк хранилища недель анализатора логистики (OTCHET/logistics_store.py).
+
+Прежний путь wb_logistics_analyzer.py (повторён здесь без Streamlit): на каждом
+перезапуске скрипта файл отчёта читается заново, process_data приводит даты и суммы,
+calculate_metrics считает итоги по всем строкам.
+Новый путь: отчёт загружается в SQLite один раз, страница читает metrics() и load_weeks().
+Фикстура — история недель, нарезанная на пересекающиеся еженедельные отчёты (CSV),
+загружаемые в случайном порядке, плюс исправленный отчёт с изменёнными суммами недели.
+Паритет: недели, нарастающие итоги, скользящие средние и изменения после каждой загрузки
+совпадают с полным пересчётом pandas; metrics() — с calculate_metrics по неделям без дублей.
+Excel не проверяется (pd.read_excel требует openpyxl); путь файла — через CSV.
+
+Запуск из корня проекта:
+    python scripts/bench/bench_logistics_store.py --weeks 260
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "OTCHET"))
+
+import logistics_store as store  # noqa: E402
+
+
+def old_process(df):
+    """Как process_data + calculate_metrics прежнего анализатора (без вывода в Streamlit)"""
+    df_clean = df.copy()
+    df_clean['Дата начала'] = pd.to_datetime(df_clean['Дата начала'], errors='coerce')
+    df_clean['Дата конца'] = pd.to_datetime(df_clean['Дата конца'], errors='coerce')
+    df_clean = df_clean.dropna(subset=['Дата начала', 'Дата конца'])
+    for col in ['Стоимость логистики', 'Прочие удержания']:
+        df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce').fillna(0)
+    return df_clean, old_metrics(df_clean)
+
+
+def old_metrics(df):
+    metrics = {}
+    for col in ['Стоимость логистики', 'Прочие удержания']:
+        metrics[col] = {
+            'total': float(df[col].sum()),
+            'average': float(df[col].mean()),
+            'max': float(df[col].max()),
+            'min': float(df[col].min()),
+            'count': int(len(df)),
+        }
+    metrics['total_all'] = metrics['Стоимость логистики']['total'] + metrics['Прочие удержания']['total']
+    metrics['period'] = f"{df['Дата начала'].min().strftime('%d.%m.%Y')} - {df['Дата конца'].max().strftime('%d.%m.%Y')}"
+    metrics['total_periods'] = len(df)
+    return metrics
+
+
+def history(weeks, seed=0):
+    """Недели подряд с понедельника: логистика и удержания (копейки)"""
+    rng = np.random.default_rng(seed)
+    start = pd.date_range('2021-01-04', periods=weeks, freq='7D')
+    return pd.DataFrame({
+        store.START_COLUMN: start,
+        store.END_COLUMN: start + pd.Timedelta(days=6),
+        store.LOGISTICS_COLUMN: rng.uniform(5000, 40000, weeks).round(2),
+        store.DEDUCTIONS_COLUMN: rng.uniform(0, 15000, weeks).round(2),
+    })
+
+
+def reports(full, size, overlap, seed=0):
+    """Еженедельные отчёты: окна по size недель, соседние пересекаются на overlap; порядок случайный"""
+    rng = np.random.default_rng(seed)
+    step = max(1, size - overlap)
+    chunks = [full.iloc[i:i + size] for i in range(0, len(full), step)]
+    return [chunks[i] for i in rng.permutation(len(chunks))]
+
+
+def csv_bytes(df):
+    frame = df.copy()
+    frame[store.START_COLUMN] = frame[store.START_COLUMN].dt.strftime('%d.%m.%Y')
+    frame[store.END_COLUMN] = frame[store.END_COLUMN].dt.strftime('%d.%m.%Y')
+    return frame.to_csv(index=False, sep=';').encode('utf-8')
+
+
+def expected(full):
+    """Полный пересчёт накопленных агрегатов по неделям без дублей"""
+    frame = full.sort_values(store.START_COLUMN).reset_index(drop=True)
+    result = pd.DataFrame({
+        'start': frame[store.START_COLUMN], 'end': frame[store.END_COLUMN],
+        'logistics': frame[store.LOGISTICS_COLUMN], 'deductions': frame[store.DEDUCTIONS_COLUMN],
+    })
+    result['total'] = result['logistics'] + result['deductions']
+    for field in ['logistics', 'deductions', 'total']:
+        result[f'cum_{field}'] = result[field].cumsum()
+        result[f'avg_{field}'] = result[field].rolling(store.ROLLING_WEEKS, min_periods=1).mean()
+        result[f'delta_{field}'] = result[field].diff()
+    return result
+
+
+def check_weeks(truth):
+    weeks = store.load_weeks()
+    assert len(weeks) == len(truth), (len(weeks), len(truth))
+    assert (weeks['start'].values == truth['start'].values).all()
+    assert (weeks['end'].values == truth['end'].values).all()
+    for field in ['logistics', 'deductions'] + store.STAT_FIELDS:
+        assert np.allclose(weeks[field].to_numpy(dtype=float), truth[field].to_numpy(dtype=float),
+                           rtol=1e-9, atol=1e-6, equal_nan=True), field
+
+
+def check_metrics(truth):
+    old = old_metrics(truth.rename(columns={
+        'start': store.START_COLUMN, 'end': store.END_COLUMN,
+        'logistics': store.LOGISTICS_COLUMN, 'deductions': store.DEDUCTIONS_COLUMN,
+    }))
+    new = store.metrics()
+    assert old['period'] == new['period'] and old['total_periods'] == new['total_periods']
+    assert np.isclose(old['total_all'], new['total_all'], rtol=1e-12)
+    for column in [store.LOGISTICS_COLUMN, store.DEDUCTIONS_COLUMN]:
+        for key, value in old[column].items():
+            assert np.isclose(value, new[column][key], rtol=1e-12), (column, key)
+
+
+def timed(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - t0) * 1000.0 / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк хранилища недель логистики")
+    parser.add_argument("--weeks", type=int, default=260, help="недель истории")
+    parser.add_argument("--report-weeks", type=int, default=8, help="недель в одном отчёте")
+    parser.add_argument("--overlap", type=int, default=3, help="пересечение соседних отчётов, недель")
+    parser.add_argument("--repeat", type=int, default=20, help="повторов замера открытия страницы")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store.configure(os.path.join(tmp, "logistics_weeks.db"))
+        full = history(args.weeks)
+        seen = pd.DataFrame(columns=full.columns)
+        ingest_ms = []
+
+        # Загрузка отчётов в случайном порядке: после каждой — паритет с полным пересчётом
+        for i, report in enumerate(reports(full, args.report_weeks, args.overlap)):
+            content = csv_bytes(report)
+            ms, result = timed(lambda: store.ingest_file(content, f"report_{i}.csv"), 1)
+            ingest_ms.append(ms)
+            assert result['status'] == 'ingested' and not result['issues'], result
+            assert store.ingest_file(content, f"report_{i}.csv")['status'] == 'skipped'
+            seen = pd.concat([seen, report]).drop_duplicates(store.START_COLUMN)
+            check_weeks(expected(seen))
+
+        # Исправленный отчёт: суммы одной старой недели изменились
+        corrected = full.iloc[[args.weeks // 3]].copy()
+        corrected[store.LOGISTICS_COLUMN] += 1234.5
+        result = store.ingest_file(csv_bytes(corrected), "corrected.csv")
+        assert result['updated'] == 1 and result['added'] == 0, result
+        full.loc[corrected.index, store.LOGISTICS_COLUMN] = corrected[store.LOGISTICS_COLUMN]
+        truth = expected(full)
+        check_weeks(truth)
+        check_metrics(truth)
+
+        store.rebuild_stats()
+        check_weeks(truth)
+
+        # Открытие страницы: разбор файла и метрики на каждом перезапуске против чтения хранилища
+        content = csv_bytes(full)
+
+        def old_page():
+            df = pd.read_csv(io.BytesIO(content), sep=None, engine='python')
+            return old_process(df)
+
+        def new_page():
+            return store.metrics(), store.load_weeks()
+
+        old_ms, _ = timed(old_page, args.repeat)
+        new_ms, _ = timed(new_page, args.repeat)
+
+    print(f"Недель: {args.weeks}, отчётов: {len(ingest_ms)} по {args.report_weeks} недель")
+    print(f"  загрузка отчёта (в среднем):         {np.mean(ingest_ms):8.2f} мс")
+    print(f"  открытие страницы, разбор отчёта:    {old_ms:8.2f} мс")
+    print(f"  открытие страницы, хранилище:        {new_ms:8.2f} мс   x{old_ms / new_ms:.1f}")
+    print("Паритет с полным пересчётом и calculate_metrics: OK")
+
+
+if __name__ == "__main__":
+    main()
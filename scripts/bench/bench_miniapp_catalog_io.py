@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк потокового импорта и экспорта каталога мини-приложения (miniapp/catalog_io.py).
+
+Прежний путь: файл читается целиком, строки режутся split(","), весь каталог
+собирается списком и записывается разом (как прежний import_products в JSON);
+экспорт склеивает весь CSV строкой в памяти.
+Новый путь: csv.DictReader по потоку, проверка строк, upsert пачками по 1000 в SQLite;
+экспорт — генератор кусков CSV прямо из курсора.
+Для каждого размера каталога печатает время, время на 1000 строк и пиковую память
+(tracemalloc, отдельным прогоном), проверяет, что импорт → экспорт → импорт сохраняет товары.
+
+Запуск из корня проекта:
+    python scripts/bench/bench_miniapp_catalog_io.py --skus 50000 100000 200000
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "miniapp"))
+
+import catalog_io  # noqa: E402
+import storage  # noqa: E402
+
+
+def make_csv(count):
+    lines = [",".join(catalog_io.PRODUCT_FIELDS)]
+    for i in range(count):
+        price = "abc" if i % 997 == 0 else str(1000 + i % 5000)
+        lines.append(f"p{i},Букет {i},{price},Розы,Сеты|Высокие,Описание букета {i},1,Завтра,/assets/p{i % 5}.jpg")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def old_import(content, out_file):
+    """Как было: весь файл в память, split(","), весь каталог одним json.dump"""
+    lines = [line for line in content.decode("utf-8").splitlines() if line.strip()]
+    header = [h.strip() for h in lines[0].split(",")]
+    products = []
+    for row in lines[1:]:
+        data = dict(zip(header, [c.strip() for c in row.split(",")]))
+        try:
+            price = int(float(data.get("price", 0) or 0))
+        except ValueError:
+            continue
+        products.append({
+            "id": data.get("id") or f"p{len(products) + 1}",
+            "name": data.get("name", ""),
+            "price": price,
+            "category": data.get("category", ""),
+            "tags": [t.strip() for t in data.get("tags", "").split("|") if t.strip()],
+            "description": data.get("description", ""),
+            "min_qty": int(float(data.get("min_qty", 1) or 1)),
+            "delivery_label": data.get("delivery_label", ""),
+            "image": data.get("image", ""),
+        })
+    with open(out_file, "w", encoding="utf-8") as file:
+        json.dump(products, file, ensure_ascii=False, indent=2)
+    return len(products)
+
+
+def old_export(json_file):
+    """Как было: весь каталог из JSON и весь CSV одной строкой"""
+    with open(json_file, encoding="utf-8") as file:
+        products = json.load(file)
+    lines = [",".join(catalog_io.PRODUCT_FIELDS)]
+    for product in products:
+        lines.append(",".join(str(product.get(f, "")).replace(",", " ") for f in catalog_io.PRODUCT_FIELDS))
+    return "\n".join(lines)
+
+
+def new_import(content):
+    return catalog_io.import_products(catalog_io.iter_csv_rows(io.BytesIO(content)), replace=True)
+
+
+def new_export():
+    return sum(len(chunk) for chunk in catalog_io.export_csv(storage.iter_products()))
+
+
+def timed(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - t0) * 1000.0 / repeat, result
+
+
+def peak_mb(fn):
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк импорта и экспорта каталога")
+    parser.add_argument("--skus", type=int, nargs="+", default=[50_000, 100_000, 200_000], help="размеры каталога")
+    parser.add_argument("--repeat", type=int, default=1, help="повторов замера")
+    args = parser.parse_args()
+
+    print(f"{'товаров':>9} | {'путь':8} | {'импорт, мс':>10} | {'мс/1000':>8} | {'пик импорта, МБ':>15} | "
+          f"{'экспорт, мс':>11} | {'пик экспорта, МБ':>16}")
+    for count in args.skus:
+        content = make_csv(count)
+        with tempfile.TemporaryDirectory() as tmp:
+            storage.configure(Path(tmp) / "miniapp.db")
+            json_file = Path(tmp) / "products.json"
+
+            old_ms, old_count = timed(lambda: old_import(content, json_file), args.repeat)
+            old_mem = peak_mb(lambda: old_import(content, json_file))
+            old_export_ms, _ = timed(lambda: old_export(json_file), args.repeat)
+            old_export_mem = peak_mb(lambda: old_export(json_file))
+
+            new_ms, report = timed(lambda: new_import(content), args.repeat)
+            new_mem = peak_mb(lambda: new_import(content))
+            new_export_ms, _ = timed(new_export, args.repeat)
+            new_export_mem = peak_mb(new_export)
+
+            assert report["imported"] == old_count == count - report["errors_total"]
+            # Экспорт → импорт (dry-run): все товары обновляются, ошибок нет
+            exported = "".join(catalog_io.export_csv(storage.iter_products())).encode("utf-8")
+            again = catalog_io.import_products(catalog_io.iter_csv_rows(io.BytesIO(exported)), dry_run=True)
+            assert again["updated"] == report["imported"] and not again["errors_total"]
+
+            for name, ms, mem, export_ms, export_mem in (
+                ("прежний", old_ms, old_mem, old_export_ms, old_export_mem),
+                ("поток", new_ms, new_mem, new_export_ms, new_export_mem),
+            ):
+                print(f"{count:>9,} | {name:8} | {ms:10.0f} | {ms / count * 1000:8.1f} | {mem:15.1f} | "
+                      f"{export_ms:11.0f} | {export_mem:16.1f}")
+            print(f"{'':>9} | ошибок в строках: {report['errors_total']} (в отчёте {len(report['errors'])})")
+
+    print("\nимпорт → экспорт → импорт без потерь: OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Нагрузочный тест хранилища мини-приложения (miniapp/storage.py) против прежних JSON-файлов.
+
+Один «запрос» повторяет работу обработчика с данными (без HTTP и Flask):
+  заказ   — create_order: новый заказ + обновление покупателя;
+  статус  — update_order_status: чтение и запись одного заказа;
+  история — get_orders?user_id=...: заказы одного покупателя;
+  клиенты — list_customers: страница из 50 покупателей по сумме заказов (агрегаты
+            customer_stats против прежнего сбора заказов по всем покупателям).
+Прежний путь читает и переписывает весь orders.json / customers.json (indent=2) под общим
+замком; SQLite — WAL, отдельные строки, несколько потоков одновременно.
+Для истории больше --json-max заказов прежний путь не замеряется (минуты на запрос).
+
+Запуск из корня проекта:
+    python scripts/bench/bench_miniapp_storage.py --orders 10000 100000 1000000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "miniapp"))
+
+import storage  # noqa: E402
+
+USERS = 5000
+
+
+def make_order(order_id, rng):
+    qty = rng.randint(1, 5)
+    return {
+        "id": order_id,
+        "user_id": f"@user{rng.randrange(USERS)}",
+        "phone": f"+7985{rng.randrange(10**7):07d}",
+        "name": "Иван",
+        "address": f"Дыбенко {rng.randint(1, 50)}",
+        "items": [{"id": "p4", "name": "Хризантемы микс", "price": 2400, "qty": qty}],
+        "promo_code": None,
+        "subtotal": 2400 * qty,
+        "total": 2400 * qty,
+        "status": "не обработан",
+        "created_at": "2026-01-29 14:06",
+    }
+
+
+def seed_sqlite(path, count):
+    storage.configure(path)
+    rng = random.Random(0)
+    with storage.transaction():
+        for start in range(0, count, 50_000):
+            batch = [make_order(i, rng) for i in range(start + 1, min(start + 50_000, count) + 1)]
+            storage.connect().executemany(
+                "INSERT INTO orders (id, user_id, status, created_at, data, username) VALUES (?, ?, ?, ?, ?, ?)",
+                [storage._order_row(order) for order in batch],
+            )
+        storage.save_customers({f"@user{u}": {"addresses": [], "orders": [], "bonus_balance": 500} for u in range(USERS)})
+
+
+def sqlite_request(kind, rng):
+    user_id = f"@user{rng.randrange(USERS)}"
+    if kind == "заказ":
+        with storage.transaction():
+            order = make_order(0, rng)
+            del order["id"]
+            order_id = storage.insert_order(order)
+            customer = storage.get_customer(user_id) or {"addresses": [], "orders": []}
+            customer["orders"].append(order_id)
+            storage.save_customer(user_id, customer)
+    elif kind == "статус":
+        with storage.transaction():
+            (last_id,) = storage.connect().execute("SELECT MAX(id) FROM orders").fetchone()
+            order = storage.get_order(rng.randint(1, last_id))
+            if order:
+                order["status"] = "собран"
+                storage.save_order(order)
+    elif kind == "клиенты":
+        storage.list_customers("total_spent", descending=True, limit=50)
+    else:
+        storage.load_orders(user_id)
+
+
+def json_request(kind, rng, data_dir, lock):
+    orders_file, customers_file = data_dir / "orders.json", data_dir / "customers.json"
+    user_id = f"@user{rng.randrange(USERS)}"
+    with lock:
+        with orders_file.open("r", encoding="utf-8") as file:
+            orders = json.load(file)
+        if kind == "история":
+            return [o for o in orders if str(o.get("user_id")) == user_id]
+        if kind == "клиенты":
+            with customers_file.open("r", encoding="utf-8") as file:
+                customers = json.load(file)
+            orders_by_user = {}
+            for order in orders:
+                orders_by_user.setdefault(str(order.get("user_id")), []).append(order)
+            return [dict(customer, order_details=orders_by_user.get(uid, [])) for uid, customer in customers.items()]
+        if kind == "заказ":
+            order = make_order(orders[-1]["id"] + 1, rng)
+            orders.append(order)
+        else:
+            orders[rng.randrange(len(orders))]["status"] = "собран"
+        with orders_file.open("w", encoding="utf-8") as file:
+            json.dump(orders, file, ensure_ascii=False, indent=2)
+        if kind == "заказ":
+            with customers_file.open("r", encoding="utf-8") as file:
+                customers = json.load(file)
+            customers.setdefault(user_id, {"orders": []})["orders"].append(order["id"])
+            with customers_file.open("w", encoding="utf-8") as file:
+                json.dump(customers, file, ensure_ascii=False, indent=2)
+
+
+def throughput(fn, requests, threads):
+    """Запросов в секунду при threads одновременных потоках"""
+    counter = iter(range(requests))
+    counter_lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        while True:
+            with counter_lock:
+                if next(counter, None) is None:
+                    return
+            fn(rng)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(worker, range(threads)))
+    return requests / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест хранилища мини-приложения")
+    parser.add_argument("--orders", type=int, nargs="+", default=[10_000, 100_000, 1_000_000], help="размеры истории заказов")
+    parser.add_argument("--requests", type=int, default=500, help="запросов каждого вида")
+    parser.add_argument("--threads", type=int, default=8, help="одновременных потоков")
+    parser.add_argument("--json-max", type=int, default=100_000, help="наибольшая история для замера JSON")
+    args = parser.parse_args()
+    kinds = ["заказ", "статус", "история", "клиенты"]
+
+    for count in args.orders:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            t0 = time.perf_counter()
+            seed_sqlite(tmp / "miniapp.db", count)
+            seed_s = time.perf_counter() - t0
+            print(f"\nЗаказов: {count:,} (заполнение SQLite {seed_s:.1f} с)")
+
+            for kind in kinds:
+                rps = throughput(lambda rng, kind=kind: sqlite_request(kind, rng), args.requests, args.threads)
+                print(f"  SQLite {kind:8s} {rps:10,.0f} запросов/с")
+
+            if count > args.json_max:
+                print("  JSON: пропущено (--json-max)")
+                continue
+            storage.configure(tmp / "miniapp.db")
+            with (tmp / "orders.json").open("w", encoding="utf-8") as file:
+                json.dump(storage.load_orders(), file, ensure_ascii=False, indent=2)
+            with (tmp / "customers.json").open("w", encoding="utf-8") as file:
+                json.dump(storage.load_customers(), file, ensure_ascii=False, indent=2)
+            lock = threading.Lock()
+            json_requests = max(5, min(args.requests, 2_000_000 // count))
+            for kind in kinds:
+                rps = throughput(lambda rng, kind=kind: json_request(kind, rng, tmp, lock), json_requests, args.threads)
+                print(f"  JSON   {kind:8s} {rps:10,.1f} запросов/с")
+
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк сохранения правок параметров: полный снимок JSON против журнала правок.
+
+Для проектов разного размера (SKU × параметры) замеряет стоимость одной правки:
+  snapshot — как было: весь param_values/param_options пишется в JSON (indent=2);
+  journal  — как стало: одна строка в param_journal_<ключ>.jsonl.
+Дополнительно проверяет, что снимок + хвост журнала после загрузки и после
+сворачивания совпадают с состоянием в памяти.
+
+Запуск из корня проекта:
+    python scripts/bench/bench_param_journal.py --edits 200
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.param_journal import (  # noqa: E402
+    append_param_edit, compact_param_journal, load_param_data, write_param_snapshot
+)
+
+SIZES = [(500, 10), (2000, 30), (5000, 50)]
+FILE_NAME = "bench_project.xlsx"
+
+
+def make_project(skus, params):
+    values = {}
+    options = {}
+    for p in range(params):
+        name = f"Параметр {p}"
+        variants = [f"вариант {v}" for v in range(8)]
+        options[name] = variants
+        values[name] = {str(100000 + s): variants[(s + p) % 8] for s in range(skus)}
+    return {"file_name": FILE_NAME, "param_values": values, "param_options": options,
+            "deleted_params": [], "timestamp": ""}
+
+
+def bench(skus, params, edits):
+    data = make_project(skus, params)
+    write_param_snapshot(FILE_NAME, data)
+    rnd = random.Random(42)
+    edit_list = [(f"Параметр {rnd.randrange(params)}", str(100000 + rnd.randrange(skus)),
+                  f"вариант {rnd.randrange(8)}") for _ in range(edits)]
+
+    t0 = time.perf_counter()
+    for param, sku, value in edit_list:
+        data["param_values"][param][sku] = value
+        write_param_snapshot(FILE_NAME, data)
+    snapshot_ms = (time.perf_counter() - t0) * 1000.0 / edits
+
+    t0 = time.perf_counter()
+    for param, sku, value in edit_list:
+        data["param_values"][param][sku] = value
+        append_param_edit(FILE_NAME, param, sku, value)
+    journal_ms = (time.perf_counter() - t0) * 1000.0 / edits
+
+    _, loaded = load_param_data(FILE_NAME)
+    assert loaded["param_values"] == data["param_values"], "снимок + журнал не совпадает"
+    compact_param_journal(FILE_NAME)
+    _, loaded = load_param_data(FILE_NAME)
+    assert loaded["param_values"] == data["param_values"], "после сворачивания не совпадает"
+    return snapshot_ms, journal_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк журнала правок параметров")
+    parser.add_argument("--edits", type=int, default=200, help="число правок на размер проекта")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        for skus, params in SIZES:
+            snapshot_ms, journal_ms = bench(skus, params, args.edits)
+            print(f"{skus:>5} SKU × {params:>2} парам.: снимок {snapshot_ms:8.2f} мс/правка, "
+                  f"журнал {journal_ms:6.3f} мс/правка (×{snapshot_ms / journal_ms:.0f})")
+    print("паритет снимок+журнал и сворачивания: OK")
+
+
+if __name__ == "__main__":
+    main()
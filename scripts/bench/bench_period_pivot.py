@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк сводной таблицы плана продаж (utils.period_pivot) против прежнего пути Plan_prodazh.
+
+Прежний путь: строковые подписи Неделя_Год / Месяц_Год, два groupby по строкам,
+три регулярных выражения для сортировки и транспонирование.
+Новый путь: один groupby по целочисленным ключам (год, месяц, неделя ISO),
+месяцы — из недельных частичных сумм, подписи — только в конце.
+Проверяет паритет недельных и месячных значений (включая средние для процентов)
+и строки плана (недели из словаря, месяцы — сумма по неделям).
+
+Запуск из корня проекта:
+    python scripts/bench/bench_period_pivot.py --rows 200000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.period_pivot import (  # noqa: E402
+    build_period_pivot, label_columns, month_week_columns, overlay_plan
+)
+
+AGG = {'Заказали, шт': 'sum', 'Выкупили, шт': 'sum', 'Заказали на сумму, ₽': 'sum', 'Конверсия в корзину, %': 'mean'}
+
+
+def synthetic(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Дата': pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 1000, rows), unit='D'),
+        'Заказали, шт': rng.integers(0, 50, rows),
+        'Выкупили, шт': rng.integers(0, 40, rows),
+        'Заказали на сумму, ₽': rng.random(rows) * 10_000,
+        'Конверсия в корзину, %': rng.random(rows) * 100,
+    })
+    df.loc[::17, 'Конверсия в корзину, %'] = np.nan
+    return df
+
+
+def old_path(df):
+    """Как было: строковые подписи, сортировка регулярными выражениями"""
+    df = df.copy()
+    df['Неделя'] = df['Дата'].dt.isocalendar().week
+    df['Год'] = df['Дата'].dt.year
+    df['Месяц'] = df['Дата'].dt.month
+    df['Неделя_Год'] = (
+        df['Год'].astype(int).astype(str) + '.' + df['Месяц'].astype(int).astype(str)
+        + ' (нед. ' + df['Неделя'].astype(int).astype(str) + ')'
+    )
+    df['Месяц_Год'] = df['Год'].astype(int).astype(str) + '.' + df['Месяц'].astype(int).astype(str).str.zfill(2)
+    weekly = df.groupby('Неделя_Год').agg(AGG).reset_index()
+    weekly['year'] = weekly['Неделя_Год'].str.extract(r'(\d{4})').astype(int)
+    weekly['month'] = weekly['Неделя_Год'].str.extract(r'(\d{4})\.(\d+)')[1].astype(int)
+    weekly['week'] = weekly['Неделя_Год'].str.extract(r'нед\. (\d+)').astype(int)
+    weekly = weekly.sort_values(['year', 'month', 'week']).drop(['year', 'month', 'week'], axis=1)
+    monthly = df.groupby('Месяц_Год').agg(AGG).reset_index()
+    pivot = weekly.set_index('Неделя_Год').T
+    for col in monthly.set_index('Месяц_Год').T.columns:
+        pivot[col] = monthly.set_index('Месяц_Год').T[col]
+    return pivot
+
+
+def new_path(df):
+    return label_columns(build_period_pivot(df, 'Дата', AGG))
+
+
+def timed(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - t0) * 1000.0 / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк сводной таблицы плана продаж")
+    parser.add_argument("--rows", type=int, default=200_000, help="строк исходных данных")
+    parser.add_argument("--repeat", type=int, default=3, help="повторов замера")
+    args = parser.parse_args()
+
+    df = synthetic(args.rows)
+    old_ms, old = timed(lambda: old_path(df), args.repeat)
+    new_ms, new = timed(lambda: new_path(df), args.repeat)
+    for col in old.columns:
+        assert np.allclose(old[col].values.astype(float), new[col].values, equal_nan=True), col
+    print(f"Строк: {len(df):,}, столбцов таблицы: {new.shape[1]}\n")
+    print(f"строковые подписи:   {old_ms:8.1f} мс")
+    print(f"целочисленные ключи: {new_ms:8.1f} мс")
+
+    # Строка плана: недели из словаря, месяцы — сумма по неделям (оба формата подписи месяца)
+    plan = {col: float(i % 7) for i, col in enumerate(new.columns)}
+    weeks_map = month_week_columns(new.columns)
+    old_plan_ms, _ = timed(lambda: [
+        sum(plan.get(w, 0.0) for w in new.columns if w.split(' (')[0].split('.')[0] + '.'
+            + w.split(' (')[0].split('.')[1].zfill(2) == col and '(' in w)
+        for col in weeks_map
+    ], args.repeat)
+    plan_ms, row = timed(lambda: overlay_plan(new.columns, plan), args.repeat)
+    for i, col in enumerate(new.columns):
+        if col in weeks_map:
+            assert np.isclose(row[i], sum(plan[w] for w in weeks_map[col])), col
+    print(f"строка плана (цикл):   {old_plan_ms:8.1f} мс")
+    print(f"строка плана (ключи):  {plan_ms:8.1f} мс")
+    print("\nпаритет недель, месяцев и строки плана: OK")
+
+
+if __name__ == "__main__":
+    main()
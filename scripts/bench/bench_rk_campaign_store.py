@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк колоночного хранилища кампаний RK (RK/campaign_store.py) против функций RK/calc.py.
+
+Прежний путь на каждое изменение виджета: filter_days_by_period, цикл целевого CPL
+по дням, evaluate_day, aggregate_daily_kpis и aggregate_by_type — по каждой кампании отдельно.
+Новый путь: filter_period, breakeven_targets, evaluate, group_kpis и by_type
+над одним DataFrame всех кампаний (разбивка по типам — за все кампании сразу, как в приложении).
+Паритет: те же дни в периоде, те же поля оценки дня, KPI и разбивка по типам
+(суммы — с точностью округления порядка суммирования).
+Для одной кампании app_rk.py по-прежнему считает функциями calc.py — хранилище
+выигрывает только на нескольких кампаниях.
+
+Запуск из корня проекта:
+    python scripts/bench/bench_rk_campaign_store.py --campaigns 50 --days 365
+"""
+import argparse
+import math
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "RK"))
+
+from calc import (  # noqa: E402
+    aggregate_by_type,
+    aggregate_daily_kpis,
+    breakeven_cpl,
+    evaluate_day,
+    filter_days_by_period,
+)
+from campaign_store import (  # noqa: E402
+    CampaignStore,
+    breakeven_targets,
+    evaluate,
+    filter_period,
+    group_kpis,
+    kpis,
+    records,
+)
+
+TYPES = ["поиск", "полки", "каталог", "поиск|авто"]
+PERIODS = [("all", None, None), ("last7", None, None), ("last14", None, None), ("last30", None, None),
+           ("custom", "2024-03-01", "2024-04-15"), ("custom", "2024-13-01", "2024-04-15")]
+TARGET_CPL, PROFIT, PURCHASE_RATE = 500, 600, 20
+PARAMS = dict(cart_to_order=30, ad_carts_share=50, ad_share=50)
+
+
+def campaign(days_count, rng):
+    """Дни и детализация в формате parse_excel (часть дней без рекламы и заказов)"""
+    days, details = [], {}
+    start = date(2024, 1, 1)
+    for i in range(days_count):
+        date_str = (start + timedelta(days=i)).strftime("%d.%m.%Y")
+        active = rng.random() > 0.1
+        shows = float(rng.integers(1000, 50000)) if active else 0.0
+        transitions = float(rng.integers(0, shows // 20 + 1)) if active else 0.0
+        carts_rk = float(rng.integers(0, 30)) if active else 0.0
+        carts_total = carts_rk + float(rng.integers(0, 40))
+        orders_rk = float(rng.integers(0, carts_rk + 1))
+        orders = orders_rk + float(rng.integers(0, 10))
+        cost = round(float(rng.uniform(100, 20000)), 2) if active else 0.0
+        days.append({
+            "date": date_str, "shows": shows, "totalShows": shows + float(rng.integers(0, 80000)),
+            "cpm": round(cost / shows * 1000, 2) if shows else 0.0,
+            "cpc": round(cost / transitions, 2) if transitions else 0.0,
+            "cost": cost, "carts_rk": carts_rk, "carts_total": carts_total, "orders_rk": orders_rk,
+            "orders": orders, "cpl_rk": round(cost / carts_rk, 2) if carts_rk else 0.0,
+            "transitions": transitions, "totalTransitions": transitions + float(rng.integers(0, 3000)),
+            "drr_rk": round(float(rng.uniform(0, 40)), 1), "drr1": round(float(rng.uniform(0, 40)), 1),
+            "drr2": round(float(rng.uniform(0, 40)), 1),
+        })
+        if active:
+            details[date_str] = [{
+                "type": typ, "share": int(rng.integers(0, 100)), "shows": float(rng.integers(0, 20000)),
+                "cpm": 0.0, "transitions": float(rng.integers(0, 500)), "ctr": 0.0, "cpc": 0.0,
+                "cost": round(float(rng.uniform(0, 8000)), 2), "carts": float(rng.integers(0, 15)),
+                "cpl": 0.0, "orders": 0.0, "cpo": 0.0,
+            } for typ in TYPES[:int(rng.integers(1, len(TYPES) + 1))]]
+    return days, details
+
+
+def old_targets(days, today):
+    """Цикл целевого CPL по дням, как в app_rk.py"""
+    targets = []
+    for d in days:
+        parts = d["date"].split(".")
+        dt_day = date(int(parts[2]), int(parts[1]), int(parts[0]))
+        use_params = (today - dt_day).days <= 7
+        carts_total, orders = d.get("carts_total") or 0, d.get("orders") or 0
+        if use_params:
+            targets.append(breakeven_cpl(PROFIT, PARAMS["cart_to_order"], PURCHASE_RATE,
+                                         PARAMS["ad_carts_share"], PARAMS["ad_share"]) if carts_total > 0 else TARGET_CPL)
+        elif carts_total > 0 and orders > 0:
+            targets.append(breakeven_cpl(PROFIT, orders / carts_total * 100, PURCHASE_RATE,
+                                         (d.get("carts_rk") or 0) / carts_total * 100,
+                                         (d.get("orders_rk") or 0) / orders * 100))
+        else:
+            targets.append(TARGET_CPL)
+    return targets
+
+
+def old_path(data, period, start_date, end_date, today):
+    result = {}
+    for name, (days, details) in data.items():
+        filtered = filter_days_by_period(days, period=period, start_date=start_date, end_date=end_date)
+        targets = old_targets(filtered, today)
+        evaluated = [evaluate_day(d, t) for d, t in zip(filtered, targets)]
+        avg_target = sum(targets) / len(targets) if targets else TARGET_CPL
+        result[name] = (evaluated, aggregate_daily_kpis(evaluated, avg_target),
+                        aggregate_by_type(details, [d["date"] for d in evaluated]))
+    return result
+
+
+def new_path(store, period, start_date, end_date, today):
+    frame = filter_period(store.days, period, start_date, end_date, by="campaign")
+    use_params = (np.datetime64(today) - frame["dt"].to_numpy().astype("datetime64[D]")).astype(int) <= 7
+    evaluated = evaluate(frame, breakeven_targets(frame, TARGET_CPL, PROFIT, PURCHASE_RATE, use_params, **PARAMS))
+    by_campaign = group_kpis(evaluated, by="campaign")
+    by_type = store.by_type(evaluated["date"].unique())
+    return evaluated, by_campaign, by_type
+
+
+def same(a, b):
+    if isinstance(a, str) or isinstance(b, str):
+        return a == b
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+
+
+def timed(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - t0) * 1000.0 / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк хранилища кампаний RK")
+    parser.add_argument("--campaigns", type=int, default=50, help="кампаний (файлов отчёта)")
+    parser.add_argument("--days", type=int, default=365, help="дней в кампании")
+    parser.add_argument("--repeat", type=int, default=3, help="повторов замера")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    data = {f"campaign_{i}.xlsx": campaign(args.days, rng) for i in range(args.campaigns)}
+    today = date(2024, 1, 1) + timedelta(days=args.days - 3)
+    store = CampaignStore()
+    t0 = time.perf_counter()
+    for name, (days, details) in data.items():
+        store.add(name, days, details)
+    store.details  # таблицы строятся лениво, при первом обращении — включаем это в сборку
+    build_ms = (time.perf_counter() - t0) * 1000.0
+
+    print(f"Кампаний: {args.campaigns}, дней в кампании: {args.days}; хранилище собрано за {build_ms:.0f} мс\n")
+    for period, start_date, end_date in PERIODS:
+        old_ms, old = timed(lambda: old_path(data, period, start_date, end_date, today), args.repeat)
+        new_ms, new = timed(lambda: new_path(store, period, start_date, end_date, today), args.repeat)
+        evaluated, by_campaign, _ = new
+        for name, (old_days, old_kpis, old_types) in old.items():
+            part = evaluated[evaluated["campaign"] == name]
+            new_days = records(part)
+            assert [d["date"] for d in old_days] == [d["date"] for d in new_days], (period, name)
+            for o, n in zip(old_days, new_days):
+                assert list(o) == list(n) and all(same(o[k], n[k]) for k in o), (period, name, o["date"])
+            single = kpis(part) if len(part) else {}
+            assert list(old_kpis) == list(single) and all(same(old_kpis[k], single[k]) for k in old_kpis), (period, name)
+            if len(part):
+                row = by_campaign.loc[name]
+                assert all(same(old_kpis[k], row[k]) for k in old_kpis), (period, name)
+            new_types = store.by_type(part["date"], [name])
+            assert list(old_types) == list(new_types), (period, name)
+            for key, t in old_types.items():
+                assert list(t) == list(new_types[key]) and all(same(t[k], new_types[key][k]) for k in t), (period, name, key)
+        label = period if period != "custom" else f"custom {start_date}..{end_date}"
+        print(f"{label:32} calc: {old_ms:8.1f} мс   хранилище: {new_ms:7.1f} мс   x{old_ms / max(new_ms, 1e-9):5.1f}")
+
+    # Общая сводка по всем кампаниям сразу (объединение по дате)
+    combined_ms, combined = timed(lambda: kpis(evaluate(store.daily(), TARGET_CPL)), args.repeat)
+    total_cost = sum(d["cost"] for days, _ in data.values() for d in days)
+    assert same(combined["totalCost"], total_cost)
+    print(f"\nKPI по всем кампаниям (объединение по дате): {combined_ms:.1f} мс")
+    print("Паритет с calc.py: OK")
+
+
+if __name__ == "__main__":
+    main()
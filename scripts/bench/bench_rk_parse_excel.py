@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк разбора отчёта WB «По дням» (RK/calc.py): parse_excel с кешем по SHA-1 содержимого.
+
+Разбор листа — прежний построчный обход; кеш избавляет от повторного чтения Excel
+и разбора при каждом перезапуске скрипта Streamlit. Фикстуры: сгенерированные листы
+(год и больше дней, детализация поиск/полки/каталог, числа текстом с запятой и
+пробелами, пустые ячейки, служебные строки). Проверяет, что результат из кеша совпадает
+с первым разбором и не портится правками вызывающего кода. Движок Excel (openpyxl)
+не нужен — pd.read_excel подменяется и отдаёт сгенерированный лист, поэтому время
+чтения .xlsx в первый вызов не входит и реальный выигрыш кеша больше.
+
+Запуск из корня проекта:
+    python scripts/bench/bench_rk_parse_excel.py --days 365
+"""
+import argparse
+import io
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "RK"))
+
+import calc  # noqa: E402
+
+WIDTH = 24
+
+
+def _cell(rng, value, text_share):
+    """Число как есть или текстом (с запятой и пробелами), иногда пустая ячейка"""
+    roll = rng.random()
+    if roll < 0.05:
+        return np.nan
+    if roll < 0.05 + text_share:
+        return f"{value:,.2f}".replace(",", " ").replace(".", ",")
+    return value
+
+
+def fixture(days_count, seed=0, text_share=0.0):
+    """
+    Лист отчёта как после pd.read_excel(header=None).
+    text_share — доля числовых ячеек, записанных текстом (openpyxl обычно отдаёт числа числами).
+    """
+    rng = np.random.default_rng(seed)
+    rows = [["Отчёт по кампании"] + [np.nan] * (WIDTH - 1), ["За период"] + list(rng.uniform(0, 1000, WIDTH - 1)),
+            ["Графики"] + [np.nan] * (WIDTH - 1), ["По дням"] + [np.nan] * (WIDTH - 1),
+            ["Дата"] + [f"col{k}" for k in range(1, WIDTH)]]
+    start = date(2024, 1, 1)
+    for i in range(days_count):
+        day = start + timedelta(days=i)
+        label = day.strftime("%d.%m.%Y") if i % 3 else f"{day.day}.{day.month}.{day.year % 100} / пн"
+        rows.append([label] + [_cell(rng, float(rng.integers(0, 50000)) / 4, text_share) for _ in range(WIDTH - 1)])
+        for typ in ("поиск", "полки | 30%", "каталог |12%", "автореклама")[:int(rng.integers(0, 5))]:
+            rows.append([typ] + [_cell(rng, float(rng.integers(0, 9000)) / 4, text_share) for _ in range(WIDTH - 1)])
+    rows.append(["Итого"] + [np.nan] * (WIDTH - 1))
+    return pd.DataFrame(rows, dtype=object)
+
+
+def timed(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - t0) * 1000.0 / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк разбора отчёта RK")
+    parser.add_argument("--days", type=int, default=365, help="дней в отчёте")
+    parser.add_argument("--repeat", type=int, default=5, help="повторов замера")
+    args = parser.parse_args()
+
+    for text_share, label in ((0.0, "числа в ячейках"), (0.2, "20% чисел текстом")):
+        df_raw = fixture(args.days, text_share=text_share)
+        data = df_raw.to_csv(header=False, index=False).encode("utf-8")
+        read_excel = pd.read_excel
+        pd.read_excel = lambda *_args, **_kwargs: df_raw.copy()
+        try:
+            parse_ms, _ = timed(lambda: (calc.clear_parse_cache(), calc.parse_excel(io.BytesIO(data))), args.repeat)
+            first = calc.parse_excel(io.BytesIO(data))
+            cached_ms, cached = timed(lambda: calc.parse_excel(io.BytesIO(data)), args.repeat * 20)
+        finally:
+            pd.read_excel = read_excel
+        assert first == cached
+        # Правка результата вызывающим кодом не меняет кеш
+        cached[0][0]["cost"] = -1.0
+        assert calc.parse_excel(io.BytesIO(data)) == first
+        print(f"{label}: дней {len(first[0])}, строк детализации {sum(len(v) for v in first[1].values())}, строк листа {len(df_raw)}")
+        print(f"  разбор (без кеша):           {parse_ms:8.2f} мс")
+        print(f"  из кеша (повторный запуск):  {cached_ms:8.2f} мс   x{parse_ms / cached_ms:.1f}")
+    calc.clear_parse_cache()
+    print("Результат из кеша совпадает с разбором: OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк куба агрегатов (utils.rollup_cube) для анализа «Год vs Год».
+
+Сравнивает прежний путь графиков app_45_simple — groupby по годам на полном
+data_cache.csv при каждом перезапуске — со срезами заранее собранного куба
+(полного и уровня «по дням без артикулов», который используется без выбора товара):
+  недели × месяцы × годы, месяцы × годы, периоды (Grouper D/W/M), дни месяца × годы.
+Проверяет паритет результатов и то, что инкрементальное обновление куба
+(замена периода загрузки) совпадает с полной пересборкой.
+
+Запуск из корня проекта:
+    python scripts/bench/bench_rollup_cube.py --repeat 20
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.rollup_cube import (  # noqa: E402
+    build_cube, update_cube, slice_cube, day_level, rollup, rollup_by_period, pivot_by_year, cube_years
+)
+
+MEASURES = ['Заказали, шт', 'Выкупили, шт']
+
+
+def load_source(path, scale):
+    df = pd.read_csv(path)
+    df['Дата'] = pd.to_datetime(df['Дата'])
+    df = df.drop_duplicates(subset=['Дата', 'Артикул WB', 'Артикул продавца'], keep='last')
+    if scale > 1:
+        # Синтетическое увеличение: копии артикулов с другими номерами
+        copies = []
+        for i in range(scale):
+            part = df.copy()
+            part['Артикул WB'] = part['Артикул WB'] + i * 10_000_000
+            copies.append(part)
+        df = pd.concat(copies, ignore_index=True)
+    df['Год'] = df['Дата'].dt.year
+    df['Месяц'] = df['Дата'].dt.month
+    df['Неделя'] = df['Дата'].dt.isocalendar().week.astype(int)
+    df['День_месяца'] = df['Дата'].dt.day
+    return df
+
+
+def old_path(df):
+    """Как было: groupby по каждому году на полных данных"""
+    out = {}
+    for year in sorted(df['Год'].unique()):
+        data = df[df['Год'] == year]
+        out[('week', year)] = data.groupby('Неделя')[MEASURES].sum()
+        out[('month', year)] = data.groupby('Месяц')[MEASURES].sum()
+        out[('period', year)] = data.groupby(pd.Grouper(key='Дата', freq='W'))[MEASURES].sum()
+        out[('day', year)] = data.groupby('День_месяца')[MEASURES].sum()
+    return out
+
+
+def cube_path(cube):
+    """Как стало: срезы куба"""
+    out = {}
+    weekly = rollup(cube, ['Год', 'Неделя'], MEASURES)
+    monthly = rollup(cube, ['Год', 'Месяц'], MEASURES)
+    daily = rollup(cube.assign(День_месяца=cube['Дата'].dt.day), ['Год', 'День_месяца'], MEASURES)
+    for year in cube_years(cube):
+        out[('week', year)] = weekly[weekly['Год'] == year].set_index('Неделя')[MEASURES]
+        out[('month', year)] = monthly[monthly['Год'] == year].set_index('Месяц')[MEASURES]
+        out[('period', year)] = rollup_by_period(slice_cube(cube, years=[year]), 'W', MEASURES).set_index('Дата')
+        out[('day', year)] = daily[daily['Год'] == year].set_index('День_месяца')[MEASURES]
+    return out
+
+
+def assert_parity(old, new):
+    assert old.keys() == new.keys(), "разный набор срезов"
+    for key in old:
+        a = old[key].sort_index()
+        b = new[key].sort_index()
+        assert np.array_equal(a.index.values, b.index.values), f"индекс {key}"
+        assert np.allclose(a.values.astype(float), b.values.astype(float)), f"значения {key}"
+
+
+def timed(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - t0) * 1000.0 / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк куба агрегатов")
+    parser.add_argument("--cache", default=os.path.join(PROJECT_ROOT, "data_cache.csv"), help="кеш данных")
+    parser.add_argument("--scale", type=int, default=20, help="во сколько раз размножить артикулы")
+    parser.add_argument("--repeat", type=int, default=10, help="повторов замера")
+    args = parser.parse_args()
+
+    df = load_source(args.cache, args.scale)
+    print(f"Строк: {len(df):,}, годы: {sorted(df['Год'].unique())}\n")
+
+    build_ms, cube = timed(lambda: build_cube(df), 1)
+    old_ms, old = timed(lambda: old_path(df), args.repeat)
+    new_ms, new = timed(lambda: cube_path(cube), args.repeat)
+    assert_parity(old, new)
+    _, level = timed(lambda: day_level(build_cube(df)), 1)
+    day_ms, day = timed(lambda: cube_path(level), args.repeat)
+    assert_parity(old, day)
+    print(f"сборка куба:         {build_ms:8.1f} мс (один раз, {len(cube):,} строк; по дням — {len(level):,})")
+    print(f"groupby по годам:    {old_ms:8.1f} мс на перезапуск")
+    print(f"срезы куба:          {new_ms:8.1f} мс на перезапуск (с артикулами)")
+    print(f"срезы куба по дням:  {day_ms:8.1f} мс на перезапуск (без выбора товара)")
+
+    pivot_ms, _ = timed(lambda: pivot_by_year(cube, ['Неделя', 'Месяц'], MEASURES), args.repeat)
+    print(f"недели × годы:       {pivot_ms:8.1f} мс (вместо iterrows)")
+
+    # Инкрементальное обновление: последние 30 дней «загружаются заново»
+    date_to = df['Дата'].max()
+    date_from = date_to - pd.Timedelta(days=29)
+    upload = df[df['Дата'] >= date_from].copy()
+    upload['Заказали, шт'] = upload['Заказали, шт'] + 1
+    base = build_cube(df[df['Дата'] < date_from])
+    inc_ms, incremental = timed(lambda: update_cube(base, upload, date_from, date_to), 1)
+    full = build_cube(pd.concat([df[df['Дата'] < date_from], upload], ignore_index=True))
+    pd.testing.assert_frame_equal(
+        incremental.reset_index(drop=True), full.reset_index(drop=True), check_dtype=False
+    )
+    print(f"обновление (30 дн.): {inc_ms:8.1f} мс")
+    print("\nпаритет срезов и инкрементального обновления: OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк генератора сезонного плана (utils.seasonal_plan) против прежнего цикла Plan_prodazh.
+
+Прежний путь: цикл по неделям с if/elif по позиции недели в месяце и random.uniform,
+план меняется при каждой генерации.
+Новый путь: одна векторная кривая по всем неделям, колебания — из seed.
+Проверяет совпадение кривой с прежней формулой без колебаний, воспроизводимость
+при одном seed и замеряет пересчет плана «как при движении ползунков месяцев».
+
+Запуск из корня проекта:
+    python scripts/bench/bench_seasonal_plan.py --years 3 --repeat 50
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.period_pivot import week_label  # noqa: E402
+from utils.seasonal_plan import ORDERS_SEASONALITY, build_seasonal_plan, seasonal_curve  # noqa: E402
+
+
+def old_orders_percentage(month, week_num, monthly_percentages, noise=True):
+    """Как было в generate_seasonal_orders_plan (без исправления недель 39, 40, 45, 49)"""
+    base = monthly_percentages.get(month, 100.0)
+    week_in_month = ((week_num - 1) % 5) + 1
+    variation = math.sin((week_in_month - 1) * math.pi / 2) * 0.03
+    prev_pct = monthly_percentages.get(month - 1 if month > 1 else 12, 100.0)
+    next_pct = monthly_percentages.get(month + 1 if month < 12 else 1, 100.0)
+    if week_in_month == 1:
+        transition = (prev_pct - base) * 0.2
+    elif week_in_month == 5:
+        transition = (next_pct - base) * 0.2
+    elif week_in_month == 2:
+        transition = (prev_pct - base) * 0.1
+    elif week_in_month == 4:
+        transition = (next_pct - base) * 0.1
+    else:
+        transition = ((prev_pct + next_pct) / 2 - base) * 0.05
+    percentage = base + transition + base * variation
+    seasonal = 1.0
+    if month in [12, 1]:
+        seasonal += 0.15
+    elif month in [6, 7, 8]:
+        seasonal -= 0.1
+    elif month in [3, 4]:
+        seasonal += 0.08
+    return percentage * seasonal * (random.uniform(0.98, 1.02) if noise else 1.0)
+
+
+def week_columns(years):
+    columns, keys = [], []
+    for year in range(2025 - years + 1, 2026):
+        for week in range(1, 53):
+            month = min(12, (week - 1) * 12 // 52 + 1)
+            columns.append(week_label(year, month, week))
+            keys.append((month, week))
+    return columns, keys
+
+
+def timed(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - t0) * 1000.0 / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк генератора сезонного плана")
+    parser.add_argument("--years", type=int, default=3, help="лет недельных столбцов")
+    parser.add_argument("--repeat", type=int, default=50, help="повторов замера")
+    args = parser.parse_args()
+
+    columns, keys = week_columns(args.years)
+    monthly = {month: 70.0 + 7.5 * month for month in range(1, 13)}
+    months = np.array([m for m, _ in keys])
+    weeks = np.array([w for _, w in keys])
+
+    curve = seasonal_curve(months, weeks, monthly, 0.03, ORDERS_SEASONALITY)
+    expected = [old_orders_percentage(m, w, monthly, noise=False) for m, w in keys]
+    assert np.allclose(curve, expected), "кривая без колебаний не совпадает с прежней формулой"
+
+    first = build_seasonal_plan(columns, monthly, monthly, seed=42)
+    again = build_seasonal_plan(columns, monthly, monthly, seed=42)
+    other = build_seasonal_plan(columns, monthly, monthly, seed=43)
+    assert first.equals(again), "один seed дал разные планы"
+    assert not first.equals(other)
+    print(f"Недель: {len(columns)}\n")
+
+    old_ms, _ = timed(lambda: [50 * old_orders_percentage(m, w, monthly) / 100 for m, w in keys], args.repeat)
+    new_ms, _ = timed(lambda: build_seasonal_plan(columns, monthly, monthly, seed=42), args.repeat)
+    curve_ms, _ = timed(lambda: seasonal_curve(months, weeks, monthly, 0.03, ORDERS_SEASONALITY, 0.02, 42), args.repeat)
+    print(f"цикл по неделям (только заказы):        {old_ms:7.2f} мс")
+    print(f"векторная кривая (только заказы):       {curve_ms:7.2f} мс")
+    print(f"build_seasonal_plan (заказы, продажи, рентабельность): {new_ms:7.2f} мс")
+    print("\nпаритет кривой и воспроизводимость по seed: OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк пакетного анализа сезонности (utils/seasonality_engine.py).
+
+Прежний путь seasonality_analysis.py (повторён здесь): analyze_product_seasonality
+фильтрует df по каждому товару, автокорреляция — np.correlate 'full' (O(n²)) с поиском
+пиков циклом, сезонные индексы и прогноз — поэлементными циклами.
+Новый путь: analyze_seasonality — одна матрица товары × месяцы, автокорреляция через БПФ,
+индексы через reshape, прогноз всех товаров за проход.
+Паритет: период, сила сезонности, помесячные данные, индексы и прогноз каждого товара
+(целые и дробные значения, короткие ряды, пропущенные месяцы, общий анализ без товаров).
+
+Запуск из корня проекта:
+    python scripts/bench/bench_seasonality_engine.py --products 10000 --months 48
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.seasonality_engine import analyze_seasonality  # noqa: E402
+
+
+def old_detect(data, period=12):
+    if len(data) < period * 2:
+        return None, None
+    autocorr = np.correlate(data, data, mode='full')
+    autocorr = autocorr[len(autocorr)//2:]
+    peaks = []
+    for i in range(1, len(autocorr)-1):
+        if autocorr[i] > autocorr[i-1] and autocorr[i] > autocorr[i+1]:
+            peaks.append(i)
+    if peaks:
+        main_period = peaks[0]
+        seasonality_strength = autocorr[main_period] / autocorr[0]
+    else:
+        main_period = period
+        seasonality_strength = 0
+    return main_period, seasonality_strength
+
+
+def old_indexes(data, period=12):
+    if len(data) < period:
+        return None
+    seasonal_data = [[] for _ in range(period)]
+    for i, value in enumerate(data):
+        seasonal_data[i % period].append(value)
+    seasonal_means = [np.mean(group) if group else 0 for group in seasonal_data]
+    overall_mean = np.mean(seasonal_means)
+    return [mean / overall_mean if overall_mean > 0 else 1 for mean in seasonal_means]
+
+
+def old_forecast(historical_data, periods_ahead=12, seasonality_period=12):
+    if len(historical_data) < seasonality_period:
+        return None
+    seasonal_indexes = old_indexes(historical_data, seasonality_period)
+    if not seasonal_indexes:
+        return None
+    x = np.arange(len(historical_data))
+    trend_coeffs = np.polyfit(x, historical_data, 1)
+    future_x = np.arange(len(historical_data), len(historical_data) + periods_ahead)
+    future_trend = np.polyval(trend_coeffs, future_x)
+    forecasts = []
+    for i, trend_val in enumerate(future_trend):
+        seasonal_pos = (len(historical_data) + i) % seasonality_period
+        forecasts.append(max(0, trend_val * seasonal_indexes[seasonal_pos]))
+    return forecasts
+
+
+def old_analyze(df, date_column, value_column, product_column=None):
+    """Как было в analyze_product_seasonality: отдельный проход на каждый товар"""
+    results = {}
+    groups = [(p, df[df[product_column] == p]) for p in df[product_column].unique()] if product_column \
+        else [('overall', df)]
+    for product, product_data in groups:
+        product_data = product_data.sort_values(date_column).copy()
+        product_data['month'] = product_data[date_column].dt.to_period('M')
+        monthly_data = product_data.groupby('month')[value_column].sum().reset_index()
+        monthly_data['month'] = monthly_data['month'].astype(str)
+        values = monthly_data[value_column].values
+        period, strength = old_detect(values)
+        results[product] = {
+            'monthly_data': monthly_data,
+            'values': values,
+            'seasonality_period': period,
+            'seasonality_strength': strength,
+            'seasonal_indexes': old_indexes(values, period or 12),
+            'forecast': old_forecast(values, 12, period or 12),
+        }
+    return results
+
+
+def fixture(products, months, seed=0, integer=True):
+    """Продажи по дням: сезонная волна × тренд × шум, разная длина истории, пропуски месяцев"""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2020-01-01')
+    frames = []
+    for chunk in np.array_split(np.arange(products), max(1, products // 2000)):
+        k = len(chunk)
+        lengths = rng.integers(1, months + 1, k)
+        offsets = rng.integers(0, months - lengths + 1)
+        rows = np.repeat(np.arange(k), lengths * 2)
+        month = np.concatenate([np.repeat(np.arange(o, o + n), 2) for o, n in zip(offsets, lengths)])
+        day = rng.integers(0, 28, len(rows))
+        season = 1 + rng.uniform(0, 0.8, k)[rows] * np.sin(2 * np.pi * (month + rng.integers(0, 12, k)[rows]) / 12)
+        value = rng.uniform(0, 50, k)[rows] * season * (1 + 0.02 * month) * rng.uniform(0.5, 1.5, len(rows))
+        keep = rng.random(len(rows)) > 0.03
+        frames.append(pd.DataFrame({
+            'Дата': (start + pd.to_timedelta(month * 31 + day, unit='D'))[keep],
+            'Артикул': (chunk[rows] + 100000)[keep],
+            'Заказы': (np.round(value) if integer else value.round(2))[keep],
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def close(a, b):
+    if a is None or b is None:
+        return a is None and b is None
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    return a.shape == b.shape and np.allclose(a, b, rtol=1e-9, atol=1e-6)
+
+
+def check(old, new):
+    assert list(old) == list(new)
+    for product, o in old.items():
+        n = new[product]
+        assert o['seasonality_period'] == n['seasonality_period'], product
+        assert (o['seasonality_strength'] is None) == (n['seasonality_strength'] is None), product
+        if o['seasonality_strength'] is not None:
+            assert math.isclose(o['seasonality_strength'], n['seasonality_strength'], rel_tol=1e-9, abs_tol=1e-12), product
+        assert o['monthly_data']['month'].tolist() == n['monthly_data']['month'].tolist(), product
+        assert close(o['values'], n['values']), product
+        assert close(o['seasonal_indexes'], n['seasonal_indexes']), product
+        assert close(o['forecast'], n['forecast']), product
+
+
+def timed(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - t0) * 1000.0 / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк пакетного анализа сезонности")
+    parser.add_argument("--products", type=int, default=10000, help="товаров")
+    parser.add_argument("--months", type=int, default=48, help="месяцев истории (максимум)")
+    parser.add_argument("--parity-products", type=int, default=1500, help="товаров в проверке паритета")
+    parser.add_argument("--repeat", type=int, default=1, help="повторов замера")
+    args = parser.parse_args()
+
+    # Паритет: целые и дробные значения, длинная история (сильные пики), общий анализ
+    for seed, integer, months in ((1, True, args.months), (2, False, args.months), (3, True, 120)):
+        df = fixture(args.parity_products, months, seed, integer)
+        check(old_analyze(df, 'Дата', 'Заказы', 'Артикул'), analyze_seasonality(df, 'Дата', 'Заказы', 'Артикул'))
+        check(old_analyze(df, 'Дата', 'Заказы'), analyze_seasonality(df, 'Дата', 'Заказы'))
+
+    df = fixture(args.products, args.months)
+    print(f"Товаров: {df['Артикул'].nunique():,}, строк: {len(df):,}, месяцев: до {args.months}")
+    new_ms, new = timed(lambda: analyze_seasonality(df, 'Дата', 'Заказы', 'Артикул'), args.repeat)
+    sample = df[df['Артикул'].isin(df['Артикул'].unique()[:500])]
+    old_sample_ms, _ = timed(lambda: old_analyze(sample, 'Дата', 'Заказы', 'Артикул'), 1)
+    old_ms = old_sample_ms * len(new) / 500
+    print(f"  по товару (оценка по 500 товарам): {old_ms / 1000:8.2f} с")
+    print(f"  analyze_seasonality:               {new_ms / 1000:8.2f} с   x{old_ms / new_ms:.0f}")
+
+    # Автокорреляция длинного ряда: np.correlate 'full' против БПФ
+    from utils.seasonality_engine import autocorrelation
+    series = np.random.default_rng(0).integers(0, 1000, 20000).astype(float)
+    direct_ms, direct = timed(lambda: np.correlate(series, series, mode='full')[len(series) - 1:], 1)
+    fft_ms, fast = timed(lambda: autocorrelation(series[None])[0], 3)
+    assert np.array_equal(direct, fast)
+    print(f"\nАвтокорреляция ряда из {len(series):,}: np.correlate {direct_ms:.1f} мс, БПФ {fft_ms:.1f} мс")
+    print("Паритет с прежним расчётом по одному товару: OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Паритет и скорость векторного ядра юнит-экономики (utils.unit_economics).
+
+Прежние скалярные формулы приложений воспроизведены здесь дословно и сравниваются
+с ядром на случайных параметрах:
+  calculations  — utils.calculations.calculate_unit_economics (налог от выручки);
+  voronka       — Plan_prodazh.calculate_unit_economics (логистика тарифом, налог 7% от цены);
+  voronka_avg   — Plan_prodazh.calculate_complex_rentability / calculate_profit_per_unit;
+  unit          — UNIT/unit_economics_products_table_FINAL.calculate_unit_economics.
+Замеряется цикл скалярных вызовов против одного векторного вызова, сетка «цена × реклама»
+и повторные вызовы через LRU-память unit_economics_memo (как на перерисовках Plan_prodazh).
+
+Запуск из корня проекта:
+    python scripts/bench/bench_unit_economics.py --rows 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.calculations import calculate_unit_economics  # noqa: E402
+from utils.unit_economics import unit_economics, unit_economics_memo, unit_economics_scalar, what_if_grid  # noqa: E402
+
+
+def ref_calculations(cost, price, comm, log, adv, buy, storage=0, tax_rate=7.0):
+    commission = price * (comm / 100)
+    advertising = price * (adv / 100)
+    if buy > 0:
+        logistics = ((buy / 100) * log + (1 - buy / 100) * (log + 50)) * 100 / buy
+    else:
+        logistics = log
+    revenue = price - commission - logistics - advertising
+    tax = (revenue if revenue > 0 else 0) * (tax_rate / 100)
+    profit = revenue - cost - tax
+    return {
+        'Выручка с ед.': revenue,
+        'Налог, руб': tax,
+        'Прибыль с ед.': profit,
+        'Маржинальность, %': (profit / price * 100) if price > 0 else 0,
+        'Рентабельность, %': (profit / cost * 100) if cost > 0 else 0,
+    }
+
+
+def ref_voronka(cost, retail, disc, comm, log, adv, buy, storage=0):
+    price = retail * (1 - disc / 100)
+    commission = price * (comm / 100)
+    advertising = price * (adv / 100)
+    tax = price * 0.07
+    profit = price - cost - commission - advertising - log - tax - storage
+    return {
+        'Выручка с ед.': price - commission - advertising - log - tax - storage,
+        'Прибыль с ед.': profit,
+        'Рентабельность, %': (profit / cost) * 100 if cost > 0 else 0,
+    }
+
+
+def ref_voronka_avg(avg_price, cost, comm, log, adv, buy, storage=0):
+    commission = avg_price * (comm / 100)
+    advertising = avg_price * (adv / 100)
+    delivery = (buy / 100 * log + (1 - buy / 100) * (log + 50)) * 100 / buy
+    profit = avg_price - cost - commission - advertising - delivery - avg_price * 0.07 - storage
+    return {'Прибыль с ед.': profit, 'Рентабельность, %': (profit / cost) * 100 if cost > 0 else 0}
+
+
+def ref_unit(cost, retail, disc, comm, log, adv, buy, storage=0):
+    price = retail * (1 - disc / 100)
+    commission = price * (comm / 100)
+    advertising = price * (adv / 100)
+    delivery = (buy / 100 * log + (1 - buy / 100) * (log + 50)) * 100 / buy
+    revenue = price - commission - delivery - advertising - storage
+    profit = revenue - cost - price * 0.07
+    return {
+        'Выручка с ед.': revenue,
+        'Прибыль с ед.': profit,
+        'Прибыль с учетом выкупа': profit * (buy / 100),
+        'Маржинальность, %': (profit / price) * 100 if price > 0 else 0,
+    }
+
+
+def random_params(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        'cost': rng.uniform(0, 1500, rows),
+        'price': rng.uniform(50, 5000, rows),
+        'disc': rng.uniform(0, 60, rows),
+        'comm': rng.uniform(5, 30, rows),
+        'log': rng.uniform(30, 150, rows),
+        'adv': rng.uniform(0, 30, rows),
+        'buy': rng.uniform(5, 100, rows),
+        'storage': rng.uniform(0, 40, rows),
+        'tax': rng.choice([0.0, 6.0, 7.0, 15.0], rows),
+    }
+
+
+def check(name, ref_rows, kernel, keys):
+    for key in keys:
+        expected = np.array([row[key] for row in ref_rows])
+        assert np.allclose(expected, kernel[key][:len(expected)], rtol=1e-12, atol=1e-9), f"{name}: {key}"
+    print(f"паритет {name:<13} OK ({len(ref_rows):,} наборов)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Паритет и скорость ядра юнит-экономики")
+    parser.add_argument("--rows", type=int, default=100_000, help="наборов параметров для замера")
+    parser.add_argument("--check", type=int, default=5_000, help="наборов для проверки паритета")
+    args = parser.parse_args()
+
+    p = random_params(args.rows)
+    n = min(args.check, args.rows)
+    zipped = list(zip(*(p[k][:n] for k in ('cost', 'price', 'disc', 'comm', 'log', 'adv', 'buy', 'storage', 'tax'))))
+
+    ref = [ref_calculations(c, pr, cm, lg, ad, b, tax_rate=t) for c, pr, _, cm, lg, ad, b, _, t in zipped]
+    kernel = unit_economics(p['price'], p['cost'], p['comm'], p['log'], p['adv'], p['buy'], tax_rate=p['tax'])
+    check('calculations', ref, kernel, ['Выручка с ед.', 'Налог, руб', 'Прибыль с ед.', 'Маржинальность, %', 'Рентабельность, %'])
+    wrapped = [calculate_unit_economics(c, pr, cm, lg, ad, b, tax_rate=t) for c, pr, _, cm, lg, ad, b, _, t in zipped[:500]]
+    check('calculations*', wrapped, kernel, ['Выручка с ед.', 'Налог, руб', 'Прибыль с ед.', 'Рентабельность, %'])
+
+    ref = [ref_voronka(c, pr, d, cm, lg, ad, b, s) for c, pr, d, cm, lg, ad, b, s, _ in zipped]
+    kernel = unit_economics(p['price'], p['cost'], p['comm'], p['log'], p['adv'], p['buy'], p['storage'], 7.0,
+                            p['disc'], logistics='flat', tax_base='price')
+    kernel['Выручка с ед.'] = kernel['Выручка с ед.'] - kernel['Налог, руб']
+    check('voronka', ref, kernel, ['Выручка с ед.', 'Прибыль с ед.', 'Рентабельность, %'])
+
+    ref = [ref_voronka_avg(pr, c, cm, lg, ad, b, s) for c, pr, _, cm, lg, ad, b, s, _ in zipped]
+    kernel = unit_economics(p['price'], p['cost'], p['comm'], p['log'], p['adv'], p['buy'], p['storage'], 7.0,
+                            tax_base='price')
+    check('voronka_avg', ref, kernel, ['Прибыль с ед.', 'Рентабельность, %'])
+
+    ref = [ref_unit(c, pr, d, cm, lg, ad, b, s) for c, pr, d, cm, lg, ad, b, s, _ in zipped]
+    kernel = unit_economics(p['price'], p['cost'], p['comm'], p['log'], p['adv'], p['buy'], p['storage'], 7.0,
+                            p['disc'], tax_base='price')
+    check('unit', ref, kernel, ['Выручка с ед.', 'Прибыль с ед.', 'Прибыль с учетом выкупа', 'Маржинальность, %'])
+
+    # Скорость: цикл скалярных вызовов против одного векторного
+    t0 = time.perf_counter()
+    for c, pr, _, cm, lg, ad, b, _, t in zip(*(p[k] for k in ('cost', 'price', 'disc', 'comm', 'log', 'adv', 'buy', 'storage', 'tax'))):
+        ref_calculations(c, pr, cm, lg, ad, b, tax_rate=t)
+    loop_ms = (time.perf_counter() - t0) * 1000.0
+    t0 = time.perf_counter()
+    unit_economics(p['price'], p['cost'], p['comm'], p['log'], p['adv'], p['buy'], tax_rate=p['tax'])
+    vec_ms = (time.perf_counter() - t0) * 1000.0
+    print(f"\n{args.rows:,} наборов: цикл {loop_ms:8.1f} мс, ядро {vec_ms:8.1f} мс")
+
+    # Сетка сценариев: 200 цен × 31 доля рекламы
+    t0 = time.perf_counter()
+    grid = what_if_grid(np.linspace(500, 3000, 200), np.arange(0, 31), cost_price=400, commission_rate=20,
+                        logistics_cost=70, buyout_percent=75, tax_rate=7.0)
+    grid_ms = (time.perf_counter() - t0) * 1000.0
+    best_price, best_adv = np.unravel_index(np.argmax(grid.values), grid.shape)
+    print(f"сетка цена × реклама {grid.shape}: {grid_ms:6.1f} мс, "
+          f"максимум прибыли {grid.values.max():,.0f} ₽ при цене {grid.index[best_price]:,.0f} и рекламе {grid.columns[best_adv]}%")
+
+    # Перерисовки: одни и те же недели плана 20 раз подряд, без памяти и с LRU-памятью
+    weeks = [tuple(float(p[k][i]) for k in ('price', 'cost', 'comm', 'log', 'adv', 'buy', 'storage')) for i in range(min(52, args.rows))]
+    t0 = time.perf_counter()
+    for _ in range(20):
+        plain = [unit_economics_scalar(*w, 7.0, logistics='buyout', tax_base='price') for w in weeks]
+    plain_ms = (time.perf_counter() - t0) * 1000.0
+    unit_economics_memo.cache_clear()
+    t0 = time.perf_counter()
+    for _ in range(20):
+        memo = [unit_economics_memo(*w, 7.0, logistics='buyout', tax_base='price') for w in weeks]
+    memo_ms = (time.perf_counter() - t0) * 1000.0
+    assert plain == memo
+    info = unit_economics_memo.cache_info()
+    print(f"{len(weeks)} недель × 20 перерисовок: без памяти {plain_ms:6.1f} мс, "
+          f"LRU {memo_ms:6.1f} мс (промахов {info.misses}, попаданий {info.hits})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк XIRR (utils.financial_math) против прежнего calculate_xirr из 3/weekly_expenses_analyzer.py.
+
+Прежний путь: NPV суммой-генератором Python и метод Ньютона с перебором 9 начальных
+приближений (здесь Ньютон повторён без scipy, с теми же проверками результата).
+Новый путь: xirr — сетка ставок + Брент + шаг Ньютона; xirr_batch — все сценарии одним вызовом.
+Проверяет, что найденные ставки обнуляют NPV и совпадают между xirr и xirr_batch,
+и считает сценарии, где прежний путь подменял XIRR простым ROI.
+
+Запуск из корня проекта:
+    python scripts/bench/bench_xirr.py --scenarios 2000
+"""
+import argparse
+import datetime as dt
+import os
+import sys
+import time
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.financial_math import xirr, xirr_batch, xnpv, year_fractions  # noqa: E402
+
+
+def old_xirr(cashflows, dates):
+    """Как было: Ньютон по 9 начальным приближениям, затем простой ROI; (ставка %, подмена ROI)"""
+    first = min(dates)
+    days = [(d - first).days for d in dates]
+
+    def npv(rate):
+        return sum(cf / ((1 + rate) ** (day / 365.25)) for cf, day in zip(cashflows, days))
+
+    def npv_derivative(rate):
+        return sum(-cf * day / 365.25 / ((1 + rate) ** (day / 365.25 + 1)) for cf, day in zip(cashflows, days))
+
+    total_investments = sum(cf for cf in cashflows if cf < 0)
+    total_returns = sum(cf for cf in cashflows if cf > 0)
+    if abs(total_investments + total_returns) < 1:
+        return 0.0, False
+    if total_investments == 0 or total_returns == 0:
+        return None, False
+    for guess in [0.1, 0.05, 0.2, -0.1, 0.01, 0.5, -0.5, 1.0, -0.9]:
+        try:
+            rate = guess
+            for _ in range(2000):
+                step = npv(rate) / npv_derivative(rate)
+                rate -= step
+                if abs(step) < 1e-6:
+                    break
+            else:
+                continue
+            if isinstance(rate, complex):
+                continue
+            if -0.99 < rate < 10 and abs(npv(rate)) < 1000:
+                return rate * 100, False
+        except (ZeroDivisionError, OverflowError, ValueError, TypeError):
+            continue
+    simple_roi = (total_returns + total_investments) / abs(total_investments)
+    return (simple_roi * 100, True) if simple_roi > 0 else (None, False)
+
+
+def scenarios(count, seed=0):
+    rng = np.random.default_rng(seed)
+    base = dt.date(2024, 1, 1)
+    result = []
+    for _ in range(count):
+        n = int(rng.integers(2, 12))
+        days = np.sort(rng.integers(0, 600, n))
+        days[0] = 0
+        cashflows = -rng.uniform(10_000, 500_000, n)
+        cashflows[-1] = -cashflows[:-1].sum() * rng.uniform(0.2, 3.0)
+        result.append((cashflows, [base + dt.timedelta(days=int(d)) for d in days]))
+    return result
+
+
+def timed(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - t0) * 1000.0 / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк XIRR")
+    parser.add_argument("--scenarios", type=int, default=2000, help="сценариев денежных потоков")
+    parser.add_argument("--repeat", type=int, default=1, help="повторов замера")
+    args = parser.parse_args()
+
+    data = scenarios(args.scenarios)
+    width = max(len(cf) for cf, _ in data)
+    matrix = np.zeros((len(data), width))
+    years = np.zeros((len(data), width))
+    for i, (cf, dates) in enumerate(data):
+        matrix[i, :len(cf)] = cf
+        years[i, :len(cf)] = year_fractions(dates)
+
+    with np.errstate(all='ignore'):
+        old_ms, old = timed(lambda: [old_xirr(list(cf), dates) for cf, dates in data], args.repeat)
+    new_ms, new = timed(lambda: [xirr(cf, dates) for cf, dates in data], args.repeat)
+    batch_ms, batch = timed(lambda: xirr_batch(matrix, years), args.repeat)
+
+    single = np.array([np.nan if r is None else r for r in new])
+    assert np.allclose(single, batch, equal_nan=True, atol=1e-9)
+    for (cf, dates), rate in zip(data, new):
+        if rate is not None:
+            assert abs(xnpv(rate, cf, year_fractions(dates))) < 1e-6 * np.abs(cf).sum()
+    roi_substituted = sum(flag for _, flag in old)
+    same = [abs(o - n * 100) < 1e-3 for (o, flag), n in zip(old, new) if o is not None and not flag and n is not None]
+
+    print(f"Сценариев: {len(data):,}\n")
+    print(f"Ньютон, 9 приближений: {old_ms:9.1f} мс (подмена ROI: {roi_substituted})")
+    print(f"xirr (Брент):          {new_ms:9.1f} мс (нет решения: {int(np.isnan(single).sum())})")
+    print(f"xirr_batch:            {batch_ms:9.1f} мс")
+    print(f"\nсовпадение с прежним XIRR, где он найден: {sum(same)}/{len(same)}")
+    print("NPV в найденных ставках ≈ 0, xirr = xirr_batch: OK")
+
+
+if __name__ == "__main__":
+    main()
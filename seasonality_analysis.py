@@ -15,6 +15,13 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import requests
 
+from utils.seasonality_engine import (
+    analyze_seasonality,
+    detect_seasonality,
+    forecast_seasonal,
+    seasonal_indexes,
+)
+
 try:
     from PIL import Image
 except Exception:
@@ -29,131 +36,32 @@ st.set_page_config(
 # ================= ФУНКЦИИ ДЛЯ АНАЛИЗА СЕЗОННОСТИ =================
 
 def detect_seasonality_pattern(data, period=12):
-    """Определяет сезонный паттерн в данных"""
+    """Определяет сезонный паттерн в данных (автокорреляция через БПФ)"""
     if len(data) < period * 2:
         return None, None
     
-    # Автокорреляция для определения сезонности
-    autocorr = np.correlate(data, data, mode='full')
-    autocorr = autocorr[len(autocorr)//2:]
-    
-    # Ищем пики в автокорреляции
-    peaks = []
-    for i in range(1, len(autocorr)-1):
-        if autocorr[i] > autocorr[i-1] and autocorr[i] > autocorr[i+1]:
-            peaks.append(i)
-    
-    # Определяем основной период сезонности
-    if peaks:
-        main_period = peaks[0]
-        seasonality_strength = autocorr[main_period] / autocorr[0]
-    else:
-        main_period = period
-        seasonality_strength = 0
-    
-    return main_period, seasonality_strength
+    periods, strengths = detect_seasonality(np.asarray(data, dtype=float)[None], [len(data)], period)
+    return int(periods[0]), float(strengths[0])
 
 def calculate_seasonal_indexes(data, period=12):
     """Вычисляет сезонные индексы"""
     if len(data) < period:
         return None
     
-    # Группируем данные по позиции в периоде
-    seasonal_data = []
-    for i in range(period):
-        seasonal_data.append([])
-    
-    for i, value in enumerate(data):
-        pos = i % period
-        seasonal_data[pos].append(value)
-    
-    # Вычисляем средние значения для каждой позиции
-    seasonal_means = [np.mean(group) if group else 0 for group in seasonal_data]
-    overall_mean = np.mean(seasonal_means)
-    
-    # Вычисляем сезонные индексы
-    seasonal_indexes = [mean / overall_mean if overall_mean > 0 else 1 for mean in seasonal_means]
-    
-    return seasonal_indexes
+    return seasonal_indexes(np.asarray(data, dtype=float)[None], [len(data)], period)[0].tolist()
 
 def forecast_seasonal_values(historical_data, periods_ahead=12, seasonality_period=12):
-    """Прогнозирует значения с учетом сезонности"""
+    """Прогнозирует значения с учетом сезонности (тренд + сезонность)"""
     if len(historical_data) < seasonality_period:
         return None
     
-    # Вычисляем сезонные индексы
-    seasonal_indexes = calculate_seasonal_indexes(historical_data, seasonality_period)
-    if not seasonal_indexes:
-        return None
-    
-    # Простая модель: тренд + сезонность
-    x = np.arange(len(historical_data))
-    trend_coeffs = np.polyfit(x, historical_data, 1)
-    trend_line = np.polyval(trend_coeffs, x)
-    
-    # Прогнозируем тренд
-    future_x = np.arange(len(historical_data), len(historical_data) + periods_ahead)
-    future_trend = np.polyval(trend_coeffs, future_x)
-    
-    # Применяем сезонность
-    forecasts = []
-    for i, trend_val in enumerate(future_trend):
-        seasonal_pos = (len(historical_data) + i) % seasonality_period
-        seasonal_factor = seasonal_indexes[seasonal_pos]
-        forecast = trend_val * seasonal_factor
-        forecasts.append(max(0, forecast))
-    
-    return forecasts
+    forecasts = forecast_seasonal(np.asarray(historical_data, dtype=float)[None], [len(historical_data)],
+                                  seasonality_period, periods_ahead=periods_ahead)
+    return forecasts[0].tolist()
 
 def analyze_product_seasonality(df, date_column, value_column, product_column=None):
-    """Анализирует сезонность для товаров"""
-    results = {}
-    
-    if product_column:
-        # Анализ по отдельным товарам
-        for product in df[product_column].unique():
-            product_data = df[df[product_column] == product].copy()
-            product_data = product_data.sort_values(date_column)
-            
-            # Группируем по месяцам
-            product_data['month'] = product_data[date_column].dt.to_period('M')
-            monthly_data = product_data.groupby('month')[value_column].sum().reset_index()
-            monthly_data['month'] = monthly_data['month'].astype(str)
-            
-            # Анализируем сезонность
-            values = monthly_data[value_column].values
-            period, strength = detect_seasonality_pattern(values)
-            seasonal_indexes = calculate_seasonal_indexes(values, period or 12)
-            
-            results[product] = {
-                'monthly_data': monthly_data,
-                'values': values,
-                'seasonality_period': period,
-                'seasonality_strength': strength,
-                'seasonal_indexes': seasonal_indexes,
-                'forecast': forecast_seasonal_values(values, 12, period or 12)
-            }
-    else:
-        # Общий анализ
-        df_sorted = df.sort_values(date_column)
-        df_sorted['month'] = df_sorted[date_column].dt.to_period('M')
-        monthly_data = df_sorted.groupby('month')[value_column].sum().reset_index()
-        monthly_data['month'] = monthly_data['month'].astype(str)
-        
-        values = monthly_data[value_column].values
-        period, strength = detect_seasonality_pattern(values)
-        seasonal_indexes = calculate_seasonal_indexes(values, period or 12)
-        
-        results['overall'] = {
-            'monthly_data': monthly_data,
-            'values': values,
-            'seasonality_period': period,
-            'seasonality_strength': strength,
-            'seasonal_indexes': seasonal_indexes,
-            'forecast': forecast_seasonal_values(values, 12, period or 12)
-        }
-    
-    return results
+    """Анализирует сезонность для товаров (все товары одной матрицей товары × месяцы)"""
+    return analyze_seasonality(df, date_column, value_column, product_column)
 
 # ================= ФУНКЦИИ ДЛЯ РАБОТЫ С ДАННЫМИ =================
 
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Проверка колоночного кеша (utils/columnar_cache.py): колонки со смешанными
+значениями хранятся без pickle, а сбой до записи _meta.json оставляет кеш
+в прежнем согласованном состоянии.
+
+Запуск: python -m pytest -q test_columnar_cache.py
+"""
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from utils import columnar_cache
+
+
+def rows(dates, articles, names, first_wb=1):
+    return pd.DataFrame({
+        'Дата': pd.to_datetime(dates),
+        'Артикул WB': range(first_wb, first_wb + len(dates)),
+        'Артикул продавца': articles,
+        'Название': names,
+        'Заказы': np.arange(len(dates), dtype=float),
+    })
+
+
+def test_mixed_column_without_pickle():
+    df = rows(['2024-08-01', '2024-08-02', '2024-08-03'], ['A-1', 5, np.nan], ['x', None, 'y'])
+    with tempfile.TemporaryDirectory() as root:
+        cache_dir = os.path.join(root, 'data_cache')
+        columnar_cache.save_cache(df, cache_dir)
+        info = columnar_cache.read_manifest(cache_dir)['partitions']['2024-08']
+        with np.load(os.path.join(cache_dir, info['file']), allow_pickle=False) as npz:
+            assert all(npz[key].dtype != object for key in npz.files)
+            # Строки — коды и общий словарь подписей, а не массив фиксированной ширины
+            assert 'str' not in npz.files and 'labels' in npz.files
+        loaded = columnar_cache.load_cache(cache_dir)
+    assert loaded['Артикул продавца'].tolist()[:2] == ['A-1', 5]
+    assert pd.isna(loaded['Артикул продавца'].iloc[2])
+    assert loaded['Название'].isna().tolist() == [False, True, False]
+    assert loaded['Название'].iloc[2] == 'y'
+
+
+def test_failed_manifest_write_keeps_old_cache():
+    df = rows(['2024-08-01', '2024-09-01'], ['A-1', 'B-2'], ['x', 'y'])
+    update = rows(['2024-09-01'], ['B-2'], ['новое'], first_wb=2)
+    with tempfile.TemporaryDirectory() as root:
+        cache_dir = os.path.join(root, 'data_cache')
+        columnar_cache.save_cache(df, cache_dir)
+        write_manifest = columnar_cache._write_manifest
+
+        def crash(*args, **kwargs):
+            raise OSError("сбой до записи футера")
+
+        columnar_cache._write_manifest = crash
+        try:
+            columnar_cache.upsert_rows(update, cache_dir)
+        except OSError:
+            pass
+        finally:
+            columnar_cache._write_manifest = write_manifest
+        assert columnar_cache.load_cache(cache_dir)['Название'].tolist() == ['x', 'y']
+
+        columnar_cache.upsert_rows(update, cache_dir)
+        assert columnar_cache.load_cache(cache_dir)['Название'].tolist() == ['x', 'новое']
+        live = {info['file'] for info in columnar_cache.read_manifest(cache_dir)['partitions'].values()}
+        assert live <= set(os.listdir(cache_dir))
+
+
+if __name__ == "__main__":
+    test_mixed_column_without_pickle()
+    test_failed_manifest_write_keeps_old_cache()
+    print("✅ utils.columnar_cache: OK")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Проверка скомпилированных шаблонов генератора договоров
+(apps/contract_generator/document_templates.py): договор и акт из шаблона дают
+тот же текст, что прямое построение python-docx, — для разных рекламодателей,
+в том числе без части полей и со спецсимволами. Без python-docx (и остальных
+зависимостей приложения) тест пропускается.
+
+Запуск: python -m pytest -q test_contract_templates.py
+"""
+import io
+import os
+import sys
+
+import pytest
+
+for _module in ("docx", "streamlit", "reportlab", "PIL"):
+    pytest.importorskip(_module)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "apps", "contract_generator"))
+
+from docx import Document  # noqa: E402
+
+import contract_generator_app as app  # noqa: E402
+
+ADVERTISERS = [
+    {
+        "company_name": "ООО «Ромашка»", "ogrn": "1234567890123", "director": "Генерального директора Иванова И.И.",
+        "email": "info@romashka.ru", "inn": "7701234567", "legal_address": "г. Москва, ул. Ленина, д. 1",
+        "actual_address": "г. Москва, ул. Ленина, д. 2", "account": "40702810000000000001", "bank": "ПАО Сбербанк",
+        "corr_account": "30101810400000000225", "bank_bik": "044525225", "brand_name": "Romashka",
+        "contract_amount": "120 000", "contract_amount_words": "сто двадцать тысяч",
+        "start_date": "01.03.2025", "end_date": "05.04.2025", "document_date": "28.02.2025",
+        "contract_number": "28/02/25-К",
+    },
+    # Только название: остальные поля — значения по умолчанию
+    {"company_name": "ИП Петров"},
+    # Ни одного поля
+    {},
+    # Спецсимволы XML, перевод строки и пробелы по краям
+    {
+        "company_name": "ООО \"Рога & Копыта\" <опт>", "director": "  директора Сидорова  ",
+        "legal_address": "г. Казань,\nул. Баумана, д. 5", "service_description": "Пост\tи сторис",
+    },
+]
+
+
+def document_text(data):
+    """Текст абзацев и ячеек таблиц документа DOCX"""
+    doc = Document(io.BytesIO(data))
+    lines = [p.text for p in doc.paragraphs]
+    for table in doc.tables:
+        for row in table.rows:
+            lines.extend(cell.text for cell in row.cells)
+    return lines
+
+
+@pytest.mark.parametrize("contract_type", ["basic", "signed"])
+def test_contract_template_matches_direct_build(contract_type):
+    for advertiser in ADVERTISERS:
+        direct = app.document_bytes(app.create_contract_document(advertiser, contract_type))
+        assert document_text(app.render_contract_docx(advertiser, contract_type)) == document_text(direct), advertiser
+
+
+def test_act_template_matches_direct_build():
+    for advertiser in ADVERTISERS:
+        number = app.contract_number_for(advertiser)
+        direct = app.document_bytes(app.create_act_document(advertiser, number))
+        assert document_text(app.render_act_docx(advertiser, number)) == document_text(direct), advertiser
+
+
+if __name__ == "__main__":
+    for contract_type in ("basic", "signed"):
+        test_contract_template_matches_direct_build(contract_type)
+    test_act_template_matches_direct_build()
+    print("✅ Шаблоны договоров: OK")
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Проверка быстрого прогноза (utils/fast_forecast.py): в матрице рядов с разной
+длиной истории каждый ряд получает свои тренд, точки излома и годовую сезонность —
+прогноз совпадает с обучением ряда отдельно.
+
+Запуск: python -m pytest -q test_fast_forecast.py
+"""
+import numpy as np
+import pandas as pd
+
+from utils.fast_forecast import align_series, create_fast_forecast, fit_forecast_matrix, matrix_forecast_frames
+
+
+def series(start, days, rng):
+    t = np.arange(days)
+    y = 50 + 0.05 * t + 10 * np.sin(2 * np.pi * t / 7) + 8 * np.sin(2 * np.pi * t / 365.25) + rng.normal(0, 3, days)
+    y[rng.random(days) < 0.05] = np.nan
+    return pd.DataFrame({"ds": pd.date_range(start, periods=days, freq="D"), "y": y})
+
+
+def test_matrix_matches_single_series():
+    rng = np.random.default_rng(0)
+    history = [series("2022-01-01", 900, rng), series("2024-03-01", 200, rng), series("2023-05-01", 420, rng)]
+    Y, start = align_series(history)
+    result = fit_forecast_matrix(Y, start, 30)
+    frames = matrix_forecast_frames(result, 30)
+    for frame, matrix in zip(history, frames):
+        _, single, _ = create_fast_forecast(frame, 30)
+        assert np.allclose(single["yhat"].to_numpy()[-30:], matrix["yhat"].to_numpy(), atol=1e-6)
+    # Годовая сезонность — только у ряда с историей от двух лет
+    assert np.abs(result["yearly"][0]).max() > 0
+    assert not result["yearly"][1:].any()
+
+
+if __name__ == "__main__":
+    test_matrix_matches_single_series()
+    print("✅ fast_forecast: OK")
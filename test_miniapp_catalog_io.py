@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Проверка импорта каталога мини-приложения (miniapp/catalog_io.py): при замене
+каталога (mode=replace) товары из строк с ошибками не удаляются.
+
+Запуск: python -m pytest -q test_miniapp_catalog_io.py
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "miniapp"))
+
+import catalog_io  # noqa: E402
+import storage  # noqa: E402
+
+CATALOG = [
+    {"id": "a", "name": "Товар A", "price": 100},
+    {"id": "b", "name": "Товар B", "price": 200},
+    {"id": "c", "name": "Товар C", "price": 300},
+    {"id": "p3", "name": "Товар без id", "price": 400},
+]
+ROWS = [
+    {"id": "a", "name": "Товар A", "price": "150"},
+    {"id": "b", "name": "Товар B", "price": "2o"},
+    {"id": "", "name": "Товар без id", "price": "-1"},
+]
+
+
+def test_replace_keeps_rejected_rows():
+    with tempfile.TemporaryDirectory() as root:
+        storage.configure(os.path.join(root, "miniapp.db"))
+        try:
+            storage.save_products(CATALOG)
+            dry = catalog_io.import_products(iter(ROWS), dry_run=True, replace=True)
+            report = catalog_io.import_products(iter(ROWS), replace=True)
+            products = {p["id"]: p for p in storage.load_products()}
+        finally:
+            storage.connect().close()
+            storage._local.connections.clear()
+    assert report["imported"] == 1 and report["errors_total"] == 2
+    assert dry["deleted"] == report["deleted"] == 1
+    assert sorted(products) == ["a", "b", "p3"]
+    assert products["a"]["price"] == 150
+    assert products["b"]["price"] == 200
+    assert products["p3"]["price"] == 400
+
+
+if __name__ == "__main__":
+    test_replace_keeps_rejected_rows()
+    print("✅ miniapp.catalog_io: OK")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Проверка хранилища мини-приложения (miniapp/storage.py): заказы старых покупателей,
+записанных под @username, находятся по индексу orders.username — и в новой базе,
+и в базе из версии без этой колонки.
+
+Запуск: python -m pytest -q test_miniapp_storage.py
+"""
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "miniapp"))
+
+import storage  # noqa: E402
+
+ORDERS = [
+    {"id": 1, "user_id": 123, "username": " ivan ", "status": "новый", "total": 1000},
+    {"id": 2, "user_id": 456, "username": "olga", "status": "новый", "total": 500},
+    {"id": 3, "user_id": 123, "username": "ivan", "status": "отменен", "total": 700},
+    {"id": 4, "user_id": "guest", "status": "новый", "total": 300},
+]
+
+
+def test_orders_by_username():
+    with tempfile.TemporaryDirectory() as root:
+        storage.configure(os.path.join(root, "miniapp.db"))
+        storage.save_orders(ORDERS[:2])
+        storage.insert_order({"user_id": 123, "username": "ivan", "status": "новый", "total": 200})
+        assert [order["id"] for order in storage.load_orders_by_username("@ivan")] == [1, 3]
+        assert [order["id"] for order in storage.load_orders_by_username("@olga")] == [2]
+        assert storage.load_orders_by_username("@nobody") == []
+        plan = storage.connect().execute(
+            "EXPLAIN QUERY PLAN SELECT data FROM orders WHERE username = ?", ("@ivan",)
+        ).fetchall()
+        assert any("idx_orders_username" in row[-1] for row in plan)
+        storage.connect().close()
+        storage._local.connections.clear()
+
+
+def test_old_database_gets_username_column():
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "miniapp.db")
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "CREATE TABLE orders (id INTEGER PRIMARY KEY, user_id TEXT, status TEXT, created_at TEXT, data TEXT NOT NULL)"
+        )
+        conn.executemany(
+            "INSERT INTO orders (id, user_id, status, data) VALUES (?, ?, ?, ?)",
+            [(o["id"], str(o["user_id"]), o["status"], json.dumps(o, ensure_ascii=False)) for o in ORDERS],
+        )
+        conn.commit()
+        conn.close()
+
+        storage.configure(path)
+        assert [order["id"] for order in storage.load_orders_by_username("@ivan")] == [1, 3]
+        assert storage.get_customer_stats("123")["order_count"] == 1
+        storage.connect().close()
+        storage._local.connections.clear()
+
+
+if __name__ == "__main__":
+    test_orders_by_username()
+    test_old_database_gets_username_column()
+    print("✅ miniapp.storage: OK")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Проверка журнала правок параметров (utils/param_journal.py): правки значений,
+переименование, варианты и удаление параметра переживают перезагрузку проекта —
+и из хвоста журнала, и после сворачивания в снимок.
+
+Запуск: python -m pytest -q test_param_journal.py
+"""
+import os
+import tempfile
+
+from utils.boot_state import invalidate
+from utils.param_journal import (
+    append_param_delete, append_param_edit, append_param_options, append_param_rename,
+    compact_param_journal, load_param_data, write_param_snapshot
+)
+
+FILE_NAME = "Рашгард мужской.xlsx"
+
+
+def snapshot():
+    return {
+        "file_name": FILE_NAME,
+        "param_values": {"Цвет": {"1": "Синий", "2": "Красный"}, "Рукав": {"1": "Длинный"}},
+        "param_options": {"Цвет": ["Синий", "Красный"], "Рукав": ["Длинный"]},
+        "deleted_params": ["Принт"],
+        "timestamp": "2025-01-01 10:00:00",
+    }
+
+
+def reload():
+    """Перезагрузка проекта, как после перезапуска: без кеша снимков процесса"""
+    invalidate()
+    return load_param_data(FILE_NAME)[1]
+
+
+def check_edits(data):
+    assert "Цвет" not in data["param_values"] and "Цвет" not in data["param_options"]
+    assert data["param_values"]["Основной цвет"] == {"1": "Синий", "2": "Зелёный"}
+    assert data["param_options"]["Основной цвет"] == ["Синий", "Красный", "Зелёный"]
+    assert "Рукав" not in data["param_values"] and "Рукав" not in data["param_options"]
+    assert data["param_options"]["Принт"] == ["Полоска"]
+    assert sorted(data["deleted_params"]) == ["Рукав"]
+
+
+def test_rename_options_delete_survive_reload():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as root:
+        os.chdir(root)
+        try:
+            write_param_snapshot(FILE_NAME, snapshot())
+            assert append_param_rename(FILE_NAME, "Цвет", "Основной цвет")
+            assert append_param_edit(FILE_NAME, "Основной цвет", "2", "Зелёный")
+            assert append_param_delete(FILE_NAME, "Рукав")
+            assert append_param_edit(FILE_NAME, "Рукав", "2", "Короткий")  # удалён — пропускается
+            assert append_param_options(FILE_NAME, "Принт", ["Полоска"])  # снова добавлен
+
+            check_edits(reload())
+            assert compact_param_journal(FILE_NAME) == 5
+            check_edits(reload())
+        finally:
+            os.chdir(cwd)
+            invalidate()
+
+
+if __name__ == "__main__":
+    test_rename_options_delete_survive_reload()
+    print("✅ utils.param_journal: OK")
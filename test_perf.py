@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Проверка профилировщика перезапусков (utils/perf.py): трассы и переключатель
+каждой сессии не смешиваются при параллельных rerun-ах в разных потоках.
+
+Запуск: python -m pytest -q test_perf.py
+"""
+import threading
+
+from utils import perf
+
+
+class FakeStreamlit:
+    """Минимальная замена модуля st: только session_state"""
+
+    def __init__(self, enabled):
+        self.session_state = {perf.TOGGLE_KEY: enabled}
+
+
+def test_sessions_do_not_mix_traces():
+    perf.clear_traces()
+    barrier = threading.Barrier(3)
+    sessions = {}
+
+    def session(name, enabled):
+        st = FakeStreamlit(enabled)
+        sessions[name] = perf.session_id(st)
+        for _ in range(5):
+            barrier.wait()
+            perf.begin_rerun(name, st=st)
+            with perf.perf_section(f"{name}_section"):
+                barrier.wait()
+            perf.end_rerun()
+
+    threads = [threading.Thread(target=session, args=args) for args in (("a", True), ("b", False), ("c", True))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for name, expected in (("a", 5), ("b", 0), ("c", 5)):
+        traces = perf.get_traces(sessions[name])
+        assert len(traces) == expected, name
+        for trace in traces:
+            assert trace["label"] == name
+            assert list(trace["sections"]) == [f"{name}_section"]
+
+    perf.clear_traces(sessions["a"])
+    assert not perf.get_traces(sessions["a"])
+    assert len(perf.get_traces(sessions["c"])) == 5
+
+
+def test_toggle_is_per_thread():
+    perf.set_perf_enabled(True)
+    seen = []
+    worker = threading.Thread(target=lambda: seen.append(perf.is_perf_enabled()))
+    worker.start()
+    worker.join()
+    assert perf.is_perf_enabled() is True
+    assert seen == [perf._DEFAULT_ENABLED]
+    perf.set_perf_enabled(False)
+
+
+if __name__ == "__main__":
+    test_sessions_do_not_mix_traces()
+    test_toggle_is_per_thread()
+    print("✅ utils.perf: OK")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Проверка миграции файлов параметров на стабильные ключи (utils/project_keys.py):
+удаление параметра в старой версии не должно скрывать его, если он добавлен заново.
+
+Запуск: python -m pytest -q test_project_keys.py
+"""
+import json
+import os
+import tempfile
+
+from utils.project_keys import migrate_project_files, param_values_path
+
+FILE_NAME = "Рашгард мужской.xlsx"
+
+
+def write_version(root, suffix, timestamp, param_values, deleted_params, param_options=None):
+    data = {
+        "file_name": FILE_NAME,
+        "param_values": param_values,
+        "param_options": param_options or {},
+        "deleted_params": deleted_params,
+        "timestamp": timestamp,
+    }
+    with open(os.path.join(root, f"param_values_{suffix}.json"), "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def migrated(root):
+    migrate_project_files(root, apply=True, delete=True)
+    with open(param_values_path(FILE_NAME, root), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_readded_param_is_not_deleted():
+    with tempfile.TemporaryDirectory() as root:
+        write_version(root, "111", "2025-01-01 10:00:00", {"Цвет": {"1": "Синий"}}, [])
+        write_version(root, "222", "2025-02-01 10:00:00", {}, ["Цвет"])
+        write_version(root, "333", "2025-03-01 10:00:00", {"Цвет": {"2": "Красный"}}, [],
+                      {"Цвет": ["Красный"]})
+        data = migrated(root)
+    # Значения до удаления не возвращаются, новые — сохраняются
+    assert data["param_values"] == {"Цвет": {"2": "Красный"}}
+    assert data["param_options"] == {"Цвет": ["Красный"]}
+    assert data["deleted_params"] == []
+
+
+def test_param_deleted_in_newest_version_stays_deleted():
+    with tempfile.TemporaryDirectory() as root:
+        write_version(root, "111", "2025-01-01 10:00:00", {"Цвет": {"1": "Синий"}, "Рукав": {"1": "Длинный"}}, [],
+                      {"Цвет": ["Синий"]})
+        write_version(root, "222", "2025-02-01 10:00:00", {"Рукав": {"2": "Короткий"}}, ["Цвет"])
+        data = migrated(root)
+    assert data["param_values"] == {"Рукав": {"1": "Длинный", "2": "Короткий"}}
+    assert data["param_options"] == {}
+    assert data["deleted_params"] == ["Цвет"]
+
+
+def test_deleted_param_in_old_version_is_not_revived_without_new_values():
+    with tempfile.TemporaryDirectory() as root:
+        write_version(root, "111", "2025-01-01 10:00:00", {"Цвет": {"1": "Синий"}}, [])
+        write_version(root, "222", "2025-02-01 10:00:00", {}, ["Цвет"])
+        write_version(root, "333", "2025-03-01 10:00:00", {"Рукав": {"1": "Длинный"}}, [])
+        data = migrated(root)
+    assert data["param_values"] == {"Рукав": {"1": "Длинный"}}
+    assert data["deleted_params"] == ["Цвет"]
+
+
+if __name__ == "__main__":
+    test_readded_param_is_not_deleted()
+    test_param_deleted_in_newest_version_stays_deleted()
+    test_deleted_param_in_old_version_is_not_revived_without_new_values()
+    print("✅ utils.project_keys: OK")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Проверка хранилища кампаний RK (RK/campaign_store.py): те же дни периода,
+оценка дней, KPI и разбивка по типам рекламы, что у функций RK/calc.py.
+
+Запуск: python -m pytest -q test_rk_campaign_store.py
+"""
+import math
+import os
+import sys
+from datetime import date, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "RK"))
+
+import campaign_store  # noqa: E402
+from calc import aggregate_by_type, aggregate_daily_kpis, evaluate_day, filter_days_by_period  # noqa: E402
+from campaign_store import CampaignStore, evaluate, filter_period, group_kpis, kpis, records  # noqa: E402
+
+TYPES = ["поиск", "полки", "каталог", "поиск|авто"]
+PERIODS = [("all", None, None), ("last7", None, None), ("last30", None, None),
+           ("custom", "2024-01-10", "2024-02-05"), ("custom", "2024-13-01", "2024-02-05")]
+TARGET_CPL = 500
+
+
+def campaign(days_count, rng):
+    """Дни и детализация в формате parse_excel (часть дней без рекламы)"""
+    days, details = [], {}
+    for i in range(days_count):
+        date_str = (date(2024, 1, 1) + timedelta(days=i)).strftime("%d.%m.%Y")
+        active = rng.random() > 0.2
+        shows = float(rng.integers(1000, 50000)) if active else 0.0
+        transitions = float(rng.integers(0, shows // 20 + 1)) if active else 0.0
+        carts_rk = float(rng.integers(0, 30)) if active else 0.0
+        orders_rk = float(rng.integers(0, carts_rk + 1))
+        cost = round(float(rng.uniform(100, 20000)), 2) if active else 0.0
+        days.append({
+            "date": date_str, "shows": shows, "totalShows": shows + float(rng.integers(0, 80000)),
+            "cpm": round(cost / shows * 1000, 2) if shows else 0.0,
+            "cpc": round(cost / transitions, 2) if transitions else 0.0,
+            "cost": cost, "carts_rk": carts_rk, "carts_total": carts_rk + float(rng.integers(0, 40)),
+            "orders_rk": orders_rk, "orders": orders_rk + float(rng.integers(0, 10)),
+            "cpl_rk": round(cost / carts_rk, 2) if carts_rk else 0.0,
+            "transitions": transitions, "totalTransitions": transitions + float(rng.integers(0, 3000)),
+            "drr_rk": round(float(rng.uniform(0, 40)), 1), "drr1": round(float(rng.uniform(0, 40)), 1),
+            "drr2": round(float(rng.uniform(0, 40)), 1),
+        })
+        if active:
+            details[date_str] = [{
+                "type": typ, "share": 50, "shows": float(rng.integers(0, 20000)), "cpm": 0.0,
+                "transitions": float(rng.integers(0, 500)), "ctr": 0.0, "cpc": 0.0,
+                "cost": round(float(rng.uniform(0, 8000)), 2), "carts": float(rng.integers(0, 15)),
+                "cpl": 0.0, "orders": 0.0, "cpo": 0.0,
+            } for typ in TYPES[:int(rng.integers(1, len(TYPES) + 1))]]
+    return days, details
+
+
+def same(a, b):
+    if isinstance(a, str) or isinstance(b, str):
+        return a == b
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+
+
+def same_dict(a, b):
+    return list(a) == list(b) and all(same(a[k], b[k]) for k in a)
+
+
+def check_store_matches_calc():
+    rng = np.random.default_rng(0)
+    data = {f"campaign_{i}.xlsx": campaign(45, rng) for i in range(3)}
+    store = CampaignStore()
+    for name, (days, details) in data.items():
+        store.add(name, days, details)
+
+    for period, start_date, end_date in PERIODS:
+        evaluated = evaluate(filter_period(store.days, period, start_date, end_date, by="campaign"), TARGET_CPL)
+        by_campaign = group_kpis(evaluated, by="campaign")
+        for name, (days, details) in data.items():
+            old_days = [evaluate_day(d, TARGET_CPL)
+                        for d in filter_days_by_period(days, period=period, start_date=start_date, end_date=end_date)]
+            part = evaluated[evaluated["campaign"] == name]
+            new_days = records(part)
+            assert len(old_days) == len(new_days), (period, name)
+            assert all(same_dict(o, n) for o, n in zip(old_days, new_days)), (period, name)
+
+            old_kpis = aggregate_daily_kpis(old_days, TARGET_CPL)
+            assert same_dict(old_kpis, kpis(part)), (period, name)
+            assert all(same(old_kpis[k], by_campaign.loc[name, k]) for k in old_kpis), (period, name)
+
+            old_types = aggregate_by_type(details, [d["date"] for d in old_days])
+            new_types = store.by_type(part["date"], [name])
+            assert list(old_types) == list(new_types), (period, name)
+            assert all(same_dict(old_types[k], new_types[k]) for k in old_types), (period, name)
+
+
+def test_store_matches_calc():
+    # Прямой проход по строкам (небольшие выборки) и групповые агрегаты pandas
+    direct_max_rows = campaign_store.DIRECT_MAX_ROWS
+    try:
+        for campaign_store.DIRECT_MAX_ROWS in (direct_max_rows, 0):
+            check_store_matches_calc()
+    finally:
+        campaign_store.DIRECT_MAX_ROWS = direct_max_rows
+
+
+def test_replace_and_merge_campaigns():
+    rng = np.random.default_rng(1)
+    first, second = campaign(10, rng), campaign(10, rng)
+    store = CampaignStore()
+    store.add("a.xlsx", *first)
+    store.add("b.xlsx", *second)
+    store.add("a.xlsx", *second)  # повторная загрузка заменяет кампанию
+    assert store.campaigns == ["b.xlsx", "a.xlsx"]
+    merged = store.daily()
+    assert len(merged) == 10
+    assert np.allclose(merged["cost"], [2 * d["cost"] for d in second[0]])
+
+
+if __name__ == "__main__":
+    test_store_matches_calc()
+    test_replace_and_merge_campaigns()
+    print("✅ RK.campaign_store: OK")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Проверка генератора сезонного плана (utils/seasonal_plan.py): кривая без колебаний
+совпадает с прежним циклом Plan_prodazh, один seed всегда даёт один и тот же план.
+
+Запуск: python -m pytest -q test_seasonal_plan.py
+"""
+import math
+
+import numpy as np
+
+from utils.period_pivot import week_label
+from utils.seasonal_plan import ORDERS_SEASONALITY, build_seasonal_plan, seasonal_curve
+
+MONTHLY = {month: 70.0 + 7.5 * month for month in range(1, 13)}
+
+
+def old_orders_percentage(month, week_num, monthly_percentages):
+    """Как было в generate_seasonal_orders_plan, без random.uniform"""
+    base = monthly_percentages.get(month, 100.0)
+    week_in_month = ((week_num - 1) % 5) + 1
+    variation = math.sin((week_in_month - 1) * math.pi / 2) * 0.03
+    prev_pct = monthly_percentages.get(month - 1 if month > 1 else 12, 100.0)
+    next_pct = monthly_percentages.get(month + 1 if month < 12 else 1, 100.0)
+    if week_in_month == 1:
+        transition = (prev_pct - base) * 0.2
+    elif week_in_month == 5:
+        transition = (next_pct - base) * 0.2
+    elif week_in_month == 2:
+        transition = (prev_pct - base) * 0.1
+    elif week_in_month == 4:
+        transition = (next_pct - base) * 0.1
+    else:
+        transition = ((prev_pct + next_pct) / 2 - base) * 0.05
+    seasonal = 1.0
+    if month in [12, 1]:
+        seasonal += 0.15
+    elif month in [6, 7, 8]:
+        seasonal -= 0.1
+    elif month in [3, 4]:
+        seasonal += 0.08
+    return (base + transition + base * variation) * seasonal
+
+
+def week_columns(years=(2024, 2025)):
+    keys = [(year, min(12, (week - 1) * 12 // 52 + 1), week) for year in years for week in range(1, 53)]
+    return [week_label(*key) for key in keys], keys
+
+
+def test_curve_matches_old_loop():
+    _, keys = week_columns()
+    months = np.array([month for _, month, _ in keys])
+    weeks = np.array([week for _, _, week in keys])
+    expected = [old_orders_percentage(month, week, MONTHLY) for _, month, week in keys]
+    assert np.allclose(seasonal_curve(months, weeks, MONTHLY, 0.03, ORDERS_SEASONALITY), expected)
+
+
+def test_same_seed_same_plan():
+    columns, _ = week_columns()
+    first = build_seasonal_plan(columns, MONTHLY, MONTHLY, seed=42)
+    assert first.equals(build_seasonal_plan(list(reversed(columns)), MONTHLY, MONTHLY, seed=42))
+    assert not first.equals(build_seasonal_plan(columns, MONTHLY, MONTHLY, seed=43))
+    # Без seed колебаний нет: план воспроизводим и совпадает с кривой
+    assert build_seasonal_plan(columns, MONTHLY, MONTHLY).equals(build_seasonal_plan(columns, MONTHLY, MONTHLY))
+    assert list(first.columns) == ['Заказ план', 'Продажа план', 'Рентабельность план']
+    assert len(first) == len(columns)
+
+
+def test_orders_plan_does_not_depend_on_rentability_settings():
+    columns, _ = week_columns()
+    plan = build_seasonal_plan(columns, MONTHLY, MONTHLY, seed=7)
+    other = build_seasonal_plan(columns, MONTHLY, {month: 100.0 for month in range(1, 13)}, seed=7)
+    assert plan['Заказ план'].equals(other['Заказ план'])
+
+
+if __name__ == "__main__":
+    test_curve_matches_old_loop()
+    test_same_seed_same_plan()
+    test_orders_plan_does_not_depend_on_rentability_settings()
+    print("✅ utils.seasonal_plan: OK")
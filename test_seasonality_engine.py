@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Проверка пакетного анализа сезонности (utils/seasonality_engine.py): период, сила
+сезонности, индексы и прогноз совпадают с прежним расчётом по одному товару.
+
+Запуск: python -m pytest -q test_seasonality_engine.py
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+from utils.seasonality_engine import analyze_seasonality, autocorrelation
+
+
+def old_detect(data, period=12):
+    """Как было в detect_seasonality_pattern: np.correlate 'full' и поиск пика циклом"""
+    if len(data) < period * 2:
+        return None, None
+    autocorr = np.correlate(data, data, mode='full')
+    autocorr = autocorr[len(autocorr)//2:]
+    peaks = [i for i in range(1, len(autocorr)-1) if autocorr[i] > autocorr[i-1] and autocorr[i] > autocorr[i+1]]
+    if peaks:
+        return peaks[0], autocorr[peaks[0]] / autocorr[0]
+    return period, 0
+
+
+def old_indexes(data, period=12):
+    if len(data) < period:
+        return None
+    seasonal_data = [[] for _ in range(period)]
+    for i, value in enumerate(data):
+        seasonal_data[i % period].append(value)
+    means = [np.mean(group) if group else 0 for group in seasonal_data]
+    overall = np.mean(means)
+    return [mean / overall if overall > 0 else 1 for mean in means]
+
+
+def old_forecast(data, period=12):
+    indexes = old_indexes(data, period)
+    if not indexes:
+        return None
+    trend = np.polyval(np.polyfit(np.arange(len(data)), data, 1), np.arange(len(data), len(data) + 12))
+    return [max(0, value * indexes[(len(data) + i) % period]) for i, value in enumerate(trend)]
+
+
+def sales(integer=True):
+    """Три товара: длинный сезонный ряд, короткий ряд и ряд с пропущенными месяцами"""
+    rng = np.random.default_rng(0)
+    rows = []
+    for product, months in ((101, range(40)), (102, range(5)), (103, [m for m in range(30) if m % 7 != 3])):
+        for month in months:
+            value = 20 * (1 + 0.6 * np.sin(2 * np.pi * month / 12)) * rng.uniform(0.7, 1.3)
+            for day in (3, 17):
+                rows.append((pd.Timestamp('2021-01-01') + pd.DateOffset(months=month, days=day), product,
+                             round(value) if integer else round(value, 2)))
+    return pd.DataFrame(rows, columns=['Дата', 'Артикул', 'Заказы'])
+
+
+def close(a, b):
+    if a is None or b is None:
+        return a is None and b is None
+    return np.allclose(np.asarray(a, dtype=float), np.asarray(b, dtype=float), rtol=1e-9, atol=1e-6)
+
+
+def check(df, product_column):
+    result = analyze_seasonality(df, 'Дата', 'Заказы', product_column)
+    groups = [(p, df[df[product_column] == p]) for p in df[product_column].unique()] if product_column \
+        else [('overall', df)]
+    assert list(result) == [product for product, _ in groups]
+    for product, data in groups:
+        monthly = data.sort_values('Дата').groupby(data['Дата'].dt.to_period('M'))['Заказы'].sum()
+        values = monthly.values
+        period, strength = old_detect(values)
+        new = result[product]
+        assert new['monthly_data']['month'].tolist() == monthly.index.astype(str).tolist()
+        assert new['seasonality_period'] == period, product
+        assert (strength is None) == (new['seasonality_strength'] is None), product
+        if strength is not None:
+            assert math.isclose(strength, new['seasonality_strength'], rel_tol=1e-9, abs_tol=1e-12), product
+        assert close(old_indexes(values, period or 12), new['seasonal_indexes']), product
+        assert close(old_forecast(values, period or 12), new['forecast']), product
+
+
+def test_matches_per_product_analysis():
+    for integer in (True, False):
+        df = sales(integer)
+        check(df, 'Артикул')
+        check(df, None)
+
+
+def test_fft_autocorrelation_is_exact_for_integers():
+    series = np.random.default_rng(1).integers(0, 1000, 500).astype(float)
+    assert np.array_equal(np.correlate(series, series, mode='full')[len(series) - 1:], autocorrelation(series[None])[0])
+
+
+if __name__ == "__main__":
+    test_matches_per_product_analysis()
+    test_fft_autocorrelation_is_exact_for_integers()
+    print("✅ utils.seasonality_engine: OK")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Проверка ядра юнит-экономики (utils/unit_economics.py): паритет с прежними
+скалярными формулами calculations, voronka (Plan_prodazh) и UNIT.
+
+Запуск: python -m pytest -q test_unit_economics.py
+"""
+import numpy as np
+
+from utils.calculations import calculate_unit_economics
+from utils.unit_economics import unit_economics, what_if_grid
+
+KEYS = ('cost', 'price', 'disc', 'comm', 'log', 'adv', 'buy', 'storage', 'tax')
+
+
+def ref_calculations(cost, price, comm, log, adv, buy, tax_rate=7.0):
+    """Как было в utils.calculations.calculate_unit_economics"""
+    commission = price * (comm / 100)
+    advertising = price * (adv / 100)
+    if buy > 0:
+        logistics = ((buy / 100) * log + (1 - buy / 100) * (log + 50)) * 100 / buy
+    else:
+        logistics = log
+    revenue = price - commission - logistics - advertising
+    tax = (revenue if revenue > 0 else 0) * (tax_rate / 100)
+    profit = revenue - cost - tax
+    return {
+        'Налог, руб': tax,
+        'Прибыль с ед.': profit,
+        'Рентабельность, %': (profit / cost * 100) if cost > 0 else 0,
+    }
+
+
+def ref_voronka(cost, retail, disc, comm, log, adv, storage):
+    """Как было в Plan_prodazh.calculate_unit_economics"""
+    price = retail * (1 - disc / 100)
+    profit = price - cost - price * (comm / 100) - price * (adv / 100) - log - price * 0.07 - storage
+    return {'Прибыль с ед.': profit, 'Рентабельность, %': (profit / cost) * 100 if cost > 0 else 0}
+
+
+def ref_unit(cost, retail, disc, comm, log, adv, buy, storage):
+    """Как было в UNIT/unit_economics_products_table_FINAL.calculate_unit_economics"""
+    price = retail * (1 - disc / 100)
+    delivery = (buy / 100 * log + (1 - buy / 100) * (log + 50)) * 100 / buy
+    profit = price - price * (comm / 100) - delivery - price * (adv / 100) - storage - cost - price * 0.07
+    return {
+        'Прибыль с ед.': profit,
+        'Прибыль с учетом выкупа': profit * (buy / 100),
+        'Маржинальность, %': (profit / price) * 100 if price > 0 else 0,
+    }
+
+
+def params(rows=500, seed=0):
+    rng = np.random.default_rng(seed)
+    p = {
+        'cost': rng.uniform(0, 1500, rows), 'price': rng.uniform(50, 5000, rows),
+        'disc': rng.uniform(0, 60, rows), 'comm': rng.uniform(5, 30, rows),
+        'log': rng.uniform(30, 150, rows), 'adv': rng.uniform(0, 30, rows),
+        'buy': rng.uniform(5, 100, rows), 'storage': rng.uniform(0, 40, rows),
+        'tax': rng.choice([0.0, 6.0, 7.0, 15.0], rows),
+    }
+    p['cost'][:5] = 0.0  # рентабельность при нулевой себестоимости — 0
+    return p, list(zip(*(p[k] for k in KEYS)))
+
+
+def assert_parity(ref_rows, kernel):
+    for key in ref_rows[0]:
+        expected = np.array([row[key] for row in ref_rows])
+        assert np.allclose(expected, kernel[key], rtol=1e-12, atol=1e-9), key
+
+
+def test_calculations_variant():
+    p, rows = params()
+    kernel = unit_economics(p['price'], p['cost'], p['comm'], p['log'], p['adv'], p['buy'], tax_rate=p['tax'])
+    assert_parity([ref_calculations(c, pr, cm, lg, ad, b, t) for c, pr, _, cm, lg, ad, b, _, t in rows], kernel)
+    wrapped = [calculate_unit_economics(c, pr, cm, lg, ad, b, tax_rate=t) for c, pr, _, cm, lg, ad, b, _, t in rows]
+    assert_parity([{k: row[k] for k in ('Налог, руб', 'Прибыль с ед.')} for row in wrapped], kernel)
+
+
+def test_voronka_and_unit_variants():
+    p, rows = params(seed=1)
+    flat = unit_economics(p['price'], p['cost'], p['comm'], p['log'], p['adv'], p['buy'], p['storage'], 7.0,
+                          p['disc'], logistics='flat', tax_base='price')
+    assert_parity([ref_voronka(c, pr, d, cm, lg, ad, s) for c, pr, d, cm, lg, ad, _, s, _ in rows], flat)
+    buyout = unit_economics(p['price'], p['cost'], p['comm'], p['log'], p['adv'], p['buy'], p['storage'], 7.0,
+                            p['disc'], tax_base='price')
+    assert_parity([ref_unit(c, pr, d, cm, lg, ad, b, s) for c, pr, d, cm, lg, ad, b, s, _ in rows], buyout)
+
+
+def test_what_if_grid_matches_kernel():
+    prices, ads = np.array([500.0, 1200.0, 3000.0]), np.array([0.0, 10.0, 25.0])
+    grid = what_if_grid(prices, ads, cost_price=400, commission_rate=20, logistics_cost=70,
+                        buyout_percent=75, tax_rate=7.0)
+    for i, price in enumerate(prices):
+        for j, adv in enumerate(ads):
+            expected = ref_calculations(400, price, 20, 70, adv, 75)['Прибыль с ед.']
+            assert np.isclose(grid.values[i, j], expected)
+
+
+if __name__ == "__main__":
+    test_calculations_variant()
+    test_voronka_and_unit_variants()
+    test_what_if_grid_matches_kernel()
+    print("✅ utils.unit_economics: OK")
@@ -3,45 +3,176 @@
 Utils package для WB Dashboard
 """
 
-from .calculations import calculate_unit_economics, calculate_daily_profit
-from .formatters import (
-    format_thousands, format_thousands_with_spaces,
-    fmt_rub, fmt_units, fmt_rub_kpi, fmt_units_kpi,
-    fmt_date, parse_thousands_input, sort_df
-)
-from .prophet_forecast import (
-    PROPHET_AVAILABLE, prepare_data_for_prophet,
-    create_prophet_forecast, plot_prophet_forecast, plot_prophet_components
-)
-from .wb_utils import build_wb_product_url, extract_sku_from_url, extract_sku_from_filename
-from .image_cache import (
-    load_url_cache, save_url_cache, get_url_cache_with_state,
-    get_cached_image_path, ensure_image_cached, get_cache_status,
-    load_image_bytes, img_data_uri, get_cached_images_for_sku, img_path_for
-)
-from .image_analysis import (
-    extract_dominant_colors_from_image, get_color_name_russian, analyze_style_from_image
-)
-from .wb_api_images import (
-    get_product_image_urls_from_wb_api, get_product_name_from_wb, build_screenshot_url
-)
-from .file_cache import (
-    save_file_cache, load_file_cache, get_file_cache_info,
-    get_all_cached_files, save_file_to_cache
-)
-from .reports import (
-    load_report_from_tovar_folder, find_and_load_reports_from_tovar
-)
-from .wgsn_reader import read_wgsn_files
-from .data_processing import (
-    read_table as read_table_base, get_file_statistics, get_analysis_period
-)
-from .ai_analysis import (
-    analyze_combination_products_with_ai_core,
-    analyze_wgsn_trends_with_ai_core,
-    analyze_image_with_ai_core,
-    OPENAI_AVAILABLE as OPENAI_AVAILABLE_UTILS
-)
+import importlib
+
+# Подмодули загружаются лениво (PEP 562): `from utils import fmt_rub` импортирует
+# только utils.formatters, а не prophet/openai/PIL и остальные тяжёлые зависимости.
+# Имя атрибута -> (подмодуль, имя в подмодуле)
+_LAZY_ATTRS = {
+    # Unit economics
+    'calculate_unit_economics': ('.calculations', 'calculate_unit_economics'),
+    'calculate_daily_profit': ('.calculations', 'calculate_daily_profit'),
+    # Formatters
+    'format_thousands': ('.formatters', 'format_thousands'),
+    'format_thousands_with_spaces': ('.formatters', 'format_thousands_with_spaces'),
+    'fmt_rub': ('.formatters', 'fmt_rub'),
+    'fmt_units': ('.formatters', 'fmt_units'),
+    'fmt_rub_kpi': ('.formatters', 'fmt_rub_kpi'),
+    'fmt_units_kpi': ('.formatters', 'fmt_units_kpi'),
+    'fmt_date': ('.formatters', 'fmt_date'),
+    'parse_thousands_input': ('.formatters', 'parse_thousands_input'),
+    'sort_df': ('.formatters', 'sort_df'),
+    # Prophet
+    'PROPHET_AVAILABLE': ('.prophet_forecast', 'PROPHET_AVAILABLE'),
+    'prepare_data_for_prophet': ('.prophet_forecast', 'prepare_data_for_prophet'),
+    'create_prophet_forecast': ('.prophet_forecast', 'create_prophet_forecast'),
+    'plot_prophet_forecast': ('.prophet_forecast', 'plot_prophet_forecast'),
+    'plot_prophet_components': ('.prophet_forecast', 'plot_prophet_components'),
+    # WB Utils
+    'build_wb_product_url': ('.wb_utils', 'build_wb_product_url'),
+    'extract_sku_from_url': ('.wb_utils', 'extract_sku_from_url'),
+    'extract_sku_from_filename': ('.wb_utils', 'extract_sku_from_filename'),
+    # Image Cache
+    'load_url_cache': ('.image_cache', 'load_url_cache'),
+    'save_url_cache': ('.image_cache', 'save_url_cache'),
+    'get_url_cache_with_state': ('.image_cache', 'get_url_cache_with_state'),
+    'get_cached_image_path': ('.image_cache', 'get_cached_image_path'),
+    'ensure_image_cached': ('.image_cache', 'ensure_image_cached'),
+    'get_cache_status': ('.image_cache', 'get_cache_status'),
+    'load_image_bytes': ('.image_cache', 'load_image_bytes'),
+    'img_data_uri': ('.image_cache', 'img_data_uri'),
+    'get_cached_images_for_sku': ('.image_cache', 'get_cached_images_for_sku'),
+    'img_path_for': ('.image_cache', 'img_path_for'),
+    # Image Analysis
+    'extract_dominant_colors_from_image': ('.image_analysis', 'extract_dominant_colors_from_image'),
+    'get_color_name_russian': ('.image_analysis', 'get_color_name_russian'),
+    'analyze_style_from_image': ('.image_analysis', 'analyze_style_from_image'),
+    # WB API Images
+    'get_product_image_urls_from_wb_api': ('.wb_api_images', 'get_product_image_urls_from_wb_api'),
+    'get_product_name_from_wb': ('.wb_api_images', 'get_product_name_from_wb'),
+    'build_screenshot_url': ('.wb_api_images', 'build_screenshot_url'),
+    # File Cache
+    'save_file_cache': ('.file_cache', 'save_file_cache'),
+    'load_file_cache': ('.file_cache', 'load_file_cache'),
+    'get_file_cache_info': ('.file_cache', 'get_file_cache_info'),
+    'get_all_cached_files': ('.file_cache', 'get_all_cached_files'),
+    'save_file_to_cache': ('.file_cache', 'save_file_to_cache'),
+    # Reports
+    'load_report_from_tovar_folder': ('.reports', 'load_report_from_tovar_folder'),
+    'find_and_load_reports_from_tovar': ('.reports', 'find_and_load_reports_from_tovar'),
+    # WGSN Reader
+    'read_wgsn_files': ('.wgsn_reader', 'read_wgsn_files'),
+    # Data Processing
+    'read_table_base': ('.data_processing', 'read_table'),
+    'get_file_statistics': ('.data_processing', 'get_file_statistics'),
+    'get_analysis_period': ('.data_processing', 'get_analysis_period'),
+    # AI Analysis
+    'analyze_combination_products_with_ai_core': ('.ai_analysis', 'analyze_combination_products_with_ai_core'),
+    'analyze_wgsn_trends_with_ai_core': ('.ai_analysis', 'analyze_wgsn_trends_with_ai_core'),
+    'analyze_image_with_ai_core': ('.ai_analysis', 'analyze_image_with_ai_core'),
+    'OPENAI_AVAILABLE_UTILS': ('.ai_analysis', 'OPENAI_AVAILABLE'),
+    # Perf
+    'begin_rerun': ('.perf', 'begin_rerun'),
+    'end_rerun': ('.perf', 'end_rerun'),
+    'perf_section': ('.perf', 'perf_section'),
+    'perf_timed': ('.perf', 'perf_timed'),
+    'perf_checkpoint': ('.perf', 'perf_checkpoint'),
+    'record_cache': ('.perf', 'record_cache'),
+    'record_rows': ('.perf', 'record_rows'),
+    'get_slowest_sections': ('.perf', 'get_slowest_sections'),
+    'export_traces_jsonl': ('.perf', 'export_traces_jsonl'),
+    'render_perf_sidebar': ('.perf', 'render_perf_sidebar'),
+    # Boot state
+    'get_boot_state': ('.boot_state', 'get_boot_state'),
+    'read_json_snapshot': ('.boot_state', 'read_json_snapshot'),
+    'read_json_copy': ('.boot_state', 'read_json_copy'),
+    'read_bytes_snapshot': ('.boot_state', 'read_bytes_snapshot'),
+    'read_snapshot': ('.boot_state', 'read_snapshot'),
+    'thaw': ('.boot_state', 'thaw'),
+    # Project keys
+    'project_key': ('.project_keys', 'project_key'),
+    'param_values_path': ('.project_keys', 'param_values_path'),
+    'param_history_path': ('.project_keys', 'param_history_path'),
+    'main_page_settings_path': ('.project_keys', 'main_page_settings_path'),
+    'resolve_param_values_file': ('.project_keys', 'resolve_param_values_file'),
+    'resolve_main_page_settings_file': ('.project_keys', 'resolve_main_page_settings_file'),
+    'migrate_project_files': ('.project_keys', 'migrate_project_files'),
+    'param_journal_path': ('.project_keys', 'param_journal_path'),
+    # Param journal
+    'append_param_edit': ('.param_journal', 'append_param_edit'),
+    'append_param_rename': ('.param_journal', 'append_param_rename'),
+    'append_param_options': ('.param_journal', 'append_param_options'),
+    'append_param_delete': ('.param_journal', 'append_param_delete'),
+    'load_param_data': ('.param_journal', 'load_param_data'),
+    'write_param_snapshot': ('.param_journal', 'write_param_snapshot'),
+    'compact_param_journal': ('.param_journal', 'compact_param_journal'),
+    'start_param_compactor': ('.param_journal', 'start_param_compactor'),
+    # Batch forecast
+    'run_batch_forecast': ('.forecast_batch', 'run_batch_forecast'),
+    'build_series_from_reports': ('.forecast_batch', 'build_series_from_reports'),
+    'load_forecast_table': ('.forecast_batch', 'load_forecast_table'),
+    'get_forecast': ('.forecast_batch', 'get_forecast'),
+    # Fast forecast
+    'create_fast_forecast': ('.fast_forecast', 'create_fast_forecast'),
+    'fit_forecast_matrix': ('.fast_forecast', 'fit_forecast_matrix'),
+    # Rollup cube
+    'build_cube': ('.rollup_cube', 'build_cube'),
+    'update_cube': ('.rollup_cube', 'update_cube'),
+    'get_cube': ('.rollup_cube', 'get_cube'),
+    'slice_cube': ('.rollup_cube', 'slice_cube'),
+    'rollup': ('.rollup_cube', 'rollup'),
+    'pivot_by_year': ('.rollup_cube', 'pivot_by_year'),
+    # Columnar cache
+    'save_cache': ('.columnar_cache', 'save_cache'),
+    'load_cache': ('.columnar_cache', 'load_cache'),
+    'replace_period': ('.columnar_cache', 'replace_period'),
+    'upsert_rows': ('.columnar_cache', 'upsert_rows'),
+    'cache_info': ('.columnar_cache', 'cache_info'),
+    'clear_cache': ('.columnar_cache', 'clear_cache'),
+    # Period pivot
+    'build_period_pivot': ('.period_pivot', 'build_period_pivot'),
+    'label_columns': ('.period_pivot', 'label_columns'),
+    'parse_period_label': ('.period_pivot', 'parse_period_label'),
+    'overlay_plan': ('.period_pivot', 'overlay_plan'),
+    # Unit economics kernel
+    'unit_economics': ('.unit_economics', 'unit_economics'),
+    'unit_economics_frame': ('.unit_economics', 'unit_economics_frame'),
+    'unit_economics_memo': ('.unit_economics', 'unit_economics_memo'),
+    'what_if_grid': ('.unit_economics', 'what_if_grid'),
+    # Seasonal plan
+    'seasonal_curve': ('.seasonal_plan', 'seasonal_curve'),
+    'build_seasonal_plan': ('.seasonal_plan', 'build_seasonal_plan'),
+    # Inventory simulation
+    'simulate_inventory': ('.inventory_sim', 'simulate_inventory'),
+    'required_purchase': ('.inventory_sim', 'required_purchase'),
+    'sensitivity_sweep': ('.inventory_sim', 'sensitivity_sweep'),
+    # Financial math
+    'xnpv': ('.financial_math', 'xnpv'),
+    'xirr': ('.financial_math', 'xirr'),
+    'xirr_batch': ('.financial_math', 'xirr_batch'),
+    # Seasonality engine
+    'analyze_seasonality': ('.seasonality_engine', 'analyze_seasonality'),
+    'detect_seasonality': ('.seasonality_engine', 'detect_seasonality'),
+    'seasonal_indexes': ('.seasonality_engine', 'seasonal_indexes'),
+    'forecast_seasonal': ('.seasonality_engine', 'forecast_seasonal'),
+}
+
+
+def __getattr__(name):
+    """Ленивая загрузка атрибутов пакета (PEP 562)"""
+    target = _LAZY_ATTRS.get(name)
+    if target is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attr_name = target
+    module = importlib.import_module(module_name, __name__)
+    value = getattr(module, attr_name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
+
 
 __all__ = [
     # Unit economics
@@ -106,6 +237,90 @@ __all__ = [
     'analyze_wgsn_trends_with_ai_core',
     'analyze_image_with_ai_core',
     'OPENAI_AVAILABLE_UTILS',
+    # Perf
+    'begin_rerun',
+    'end_rerun',
+    'perf_section',
+    'perf_timed',
+    'perf_checkpoint',
+    'record_cache',
+    'record_rows',
+    'get_slowest_sections',
+    'export_traces_jsonl',
+    'render_perf_sidebar',
+    # Boot state
+    'get_boot_state',
+    'read_json_snapshot',
+    'read_json_copy',
+    'read_bytes_snapshot',
+    'read_snapshot',
+    'thaw',
+    # Project keys
+    'project_key',
+    'param_values_path',
+    'param_history_path',
+    'main_page_settings_path',
+    'resolve_param_values_file',
+    'resolve_main_page_settings_file',
+    'migrate_project_files',
+    'param_journal_path',
+    # Param journal
+    'append_param_edit',
+    'append_param_rename',
+    'append_param_options',
+    'append_param_delete',
+    'load_param_data',
+    'write_param_snapshot',
+    'compact_param_journal',
+    'start_param_compactor',
+    # Batch forecast
+    'run_batch_forecast',
+    'build_series_from_reports',
+    'load_forecast_table',
+    'get_forecast',
+    # Fast forecast
+    'create_fast_forecast',
+    'fit_forecast_matrix',
+    # Rollup cube
+    'build_cube',
+    'update_cube',
+    'get_cube',
+    'slice_cube',
+    'rollup',
+    'pivot_by_year',
+    # Columnar cache
+    'save_cache',
+    'load_cache',
+    'replace_period',
+    'upsert_rows',
+    'cache_info',
+    'clear_cache',
+    # Period pivot
+    'build_period_pivot',
+    'label_columns',
+    'parse_period_label',
+    'overlay_plan',
+    # Unit economics kernel
+    'unit_economics',
+    'unit_economics_frame',
+    'unit_economics_memo',
+    'what_if_grid',
+    # Seasonal plan
+    'seasonal_curve',
+    'build_seasonal_plan',
+    # Inventory simulation
+    'simulate_inventory',
+    'required_purchase',
+    'sensitivity_sweep',
+    # Financial math
+    'xnpv',
+    'xirr',
+    'xirr_batch',
+    # Seasonality engine
+    'analyze_seasonality',
+    'detect_seasonality',
+    'seasonal_indexes',
+    'forecast_seasonal',
 ]
 
 
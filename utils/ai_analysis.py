@@ -10,13 +10,10 @@ import base64
 import re
 import time
 
-# Проверка наличия библиотеки OpenAI
-try:
-    import openai
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-    openai = None
+# Проверка наличия библиотеки OpenAI (сам импорт откладывается до первого запроса)
+from utils.lazy import LazyModule, module_available
+OPENAI_AVAILABLE = module_available("openai")
+openai = LazyModule("openai") if OPENAI_AVAILABLE else None
 
 from utils.image_cache import get_cached_image_path
 from utils.wb_api_images import get_product_name_from_wb
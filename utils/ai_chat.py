@@ -5,13 +5,10 @@
 import os
 import json
 
-# Проверка наличия библиотеки OpenAI
-try:
-    import openai
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-    openai = None
+# Проверка наличия библиотеки OpenAI (сам импорт откладывается до первого запроса)
+from .lazy import LazyModule, module_available
+OPENAI_AVAILABLE = module_available("openai")
+openai = LazyModule("openai") if OPENAI_AVAILABLE else None
 
 from .mc_reader import read_mc_files
 from .wgsn_reader import read_wgsn_files
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Модуль загрузки стартового состояния дашборда
+
+Стартовые JSON-файлы (file_cache_meta.json, table_cache.json, hierarchy_config.json,
+excluded_params_settings.json, deleted_params.json, mass_analysis_results.json,
+file_params_registry.json, param_values_*.json) и байты кешированного файла
+читаются один раз на процесс и переиспользуются всеми сессиями.
+
+Каждое обращение сверяет mtime и размер файла (os.stat), поэтому после записи
+файла следующая сессия получит свежие данные. Снимки общие для всех сессий и
+считаются неизменяемыми: перед изменением берите копию через thaw()
+или read_json_copy().
+"""
+import os
+import json
+import threading
+from types import MappingProxyType
+
+from utils.perf import record_cache
+
+FILE_CACHE_META = "file_cache_meta.json"
+FILE_CACHE_DIR = "file_cache"
+TABLE_CACHE = "table_cache.json"
+HIERARCHY_CONFIG = "hierarchy_config.json"
+EXCLUDED_PARAMS_SETTINGS = "excluded_params_settings.json"
+DELETED_PARAMS = "deleted_params.json"
+MASS_ANALYSIS_RESULTS = "mass_analysis_results.json"
+FILE_PARAMS_REGISTRY = "file_params_registry.json"
+
+# Абсолютный путь -> (подпись файла, значение)
+_SNAPSHOTS = {}
+_LOCK = threading.Lock()
+
+_MISSING = object()
+
+
+def _signature(path):
+    """Подпись файла для проверки актуальности: (mtime_ns, size) или None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _read_snapshot(path, reader, name="boot_state"):
+    key = os.path.abspath(path)
+    signature = _signature(key)
+    if signature is None:
+        with _LOCK:
+            _SNAPSHOTS.pop(key, None)
+        return _MISSING
+
+    cached = _SNAPSHOTS.get(key)
+    if cached is not None and cached[0] == signature:
+        record_cache(name, True)
+        return cached[1]
+
+    record_cache(name, False)
+    try:
+        value = reader(key)
+    except Exception:
+        return _MISSING
+    with _LOCK:
+        _SNAPSHOTS[key] = (signature, value)
+    return value
+
+
+def _read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def read_json_snapshot(path, default=None):
+    """
+    Возвращает разобранный JSON из общего кеша процесса.
+    Результат нельзя изменять — для изменения используйте read_json_copy().
+    """
+    value = _read_snapshot(path, _read_json)
+    return default if value is _MISSING else value
+
+
+def read_json_copy(path, default=None):
+    """Возвращает собственную (изменяемую) копию разобранного JSON"""
+    value = _read_snapshot(path, _read_json)
+    return default if value is _MISSING else thaw(value)
+
+
+def read_bytes_snapshot(path):
+    """Возвращает байты файла из общего кеша процесса (bytes неизменяемы) или None"""
+    value = _read_snapshot(path, _read_bytes)
+    return None if value is _MISSING else value
+
+
+def read_snapshot(path, reader, default=None, name="boot_state"):
+    """
+    Снимок файла, прочитанного reader(абсолютный путь), из общего кеша процесса:
+    reader вызывается заново только при изменении mtime/размера файла.
+    default — если файла нет или reader упал. name — секция попаданий/промахов в utils.perf.
+    Результат общий для всех вызовов, изменять его нельзя.
+    """
+    value = _read_snapshot(path, reader, name)
+    return default if value is _MISSING else value
+
+
+def thaw(value):
+    """
+    Копия JSON-структуры для изменения в сессии (copy-on-write).
+    Быстрее copy.deepcopy: копирует только dict и list, строки и числа разделяются.
+    """
+    if isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [thaw(v) for v in value]
+    return value
+
+
+def invalidate(path=None):
+    """Сбрасывает снимок файла (или все снимки, если path не указан)"""
+    with _LOCK:
+        if path is None:
+            _SNAPSHOTS.clear()
+        else:
+            _SNAPSHOTS.pop(os.path.abspath(path), None)
+
+
+def get_param_data_for_file(file_name):
+    """
+    Возвращает (param_file, param_data) для файла проекта: по стабильному ключу,
+    для файлов до миграции — через file_params_registry.json; с применённым
+    хвостом журнала правок (utils.param_journal).
+    param_data может быть общим снимком, изменять только после thaw().
+    """
+    # Импорт здесь: param_journal сам читает снимки через этот модуль
+    from utils.param_journal import load_param_data
+    return load_param_data(file_name)
+
+
+def get_boot_state():
+    """
+    Собирает стартовое состояние дашборда из общих снимков.
+    Возвращает неизменяемый словарь (MappingProxyType); вложенные значения
+    общие для всех сессий — перед записью в session_state используйте thaw().
+    """
+    file_cache_meta = read_json_snapshot(FILE_CACHE_META)
+    cached_file_name = None
+    cached_file_bytes = None
+    if isinstance(file_cache_meta, dict):
+        cached_file_name = file_cache_meta.get("filename")
+        if cached_file_name:
+            cached_file_bytes = read_bytes_snapshot(os.path.join(FILE_CACHE_DIR, cached_file_name))
+
+    param_file, param_data = get_param_data_for_file(cached_file_name)
+
+    return MappingProxyType({
+        "file_cache_meta": file_cache_meta,
+        "cached_file_name": cached_file_name,
+        "cached_file_bytes": cached_file_bytes,
+        "table_cache": read_json_snapshot(TABLE_CACHE),
+        "hierarchy_config": read_json_snapshot(HIERARCHY_CONFIG),
+        "excluded_params_settings": read_json_snapshot(EXCLUDED_PARAMS_SETTINGS),
+        "deleted_params": read_json_snapshot(DELETED_PARAMS),
+        "mass_analysis_results": read_json_snapshot(MASS_ANALYSIS_RESULTS),
+        "param_file": param_file,
+        "param_data": param_data,
+    })
@@ -0,0 +1,513 @@
+# -*- coding: utf-8 -*-
+"""
+Модуль колоночного кеша данных анализа 45.xlsx (замена data_cache.csv)
+
+Кеш — папка data_cache/ с разделами по месяцам:
+    data_cache/2024-08.npz, data_cache/2024-09.npz, ...
+    data_cache/_meta.json — «футер»: схема (колонки и типы) и по каждому
+                           разделу число строк и min/max даты.
+
+Каждый раздел — сжатый .npz, колонки лежат блоками по типам, поэтому:
+  - типы сохраняются (даты — datetime64, Неделя — целое), при чтении ничего
+    не парсится и не приводится;
+  - строки уже без дублей по (Дата, Артикул WB, Артикул продавца) и отсортированы;
+  - можно читать только нужные колонки и только разделы нужного периода;
+  - информация о кеше (записи, период, годы) берётся из _meta.json без чтения данных.
+
+Строковые колонки и колонки со смешанными значениями (артикул то числом, то строкой)
+хранятся кодами категорий и одним словарём подписей на раздел; pickle не используется,
+разделы читаются с allow_pickle=False. Разделы прежних версий (строки массивами
+фиксированной ширины, словарь на каждую колонку) читаются как есть.
+
+Запись заменяет разделы целиком и атомарно: каждая версия раздела — новый файл
+(data_cache/2024-08.<версия>.npz), он пишется во временный файл и переносится
+os.replace; затем тем же способом заменяется _meta.json, и только после этого
+удаляются файлы, на которые футер больше не ссылается. Сбой на любом шаге оставляет
+согласованный кеш: старый футер со старыми разделами или новый с новыми.
+replace_period — как merge_uploaded_files_to_cache: строки за период загрузки
+заменяются новыми; upsert_rows — новые строки заменяют строки с теми же ключами.
+Старый data_cache.csv при первом чтении импортируется автоматически.
+"""
+import os
+import json
+import uuid
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = "data_cache"
+MANIFEST_FILE = "_meta.json"
+LEGACY_CSV = "data_cache.csv"
+FORMAT_VERSION = 2
+
+KEY_COLUMNS = ['Дата', 'Артикул WB', 'Артикул продавца']
+
+# Префикс строкового типа в футере
+_STRING_PREFIX = "string:"
+
+# Виды значений в категориях колонок со смешанными значениями
+_KIND_STR, _KIND_INT, _KIND_FLOAT, _KIND_BOOL, _KIND_DATETIME = range(5)
+
+
+def manifest_path(cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, MANIFEST_FILE)
+
+
+def _partition_name(year, month):
+    return f"{int(year):04d}-{int(month):02d}"
+
+
+def _partition_file(cache_dir, name, info=None):
+    """Файл раздела: из футера (формат 2) или прежнее имя <раздел>.npz"""
+    file_name = (info or {}).get("file") or f"{name}.npz"
+    return os.path.join(cache_dir, file_name)
+
+
+def _replace_file(tmp_path, path):
+    """Сбрасывает временный файл на диск и атомарно ставит его на место path"""
+    with open(tmp_path, "rb+") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _legacy_csv(cache_dir):
+    return os.path.join(os.path.dirname(os.path.abspath(cache_dir)), LEGACY_CSV)
+
+
+def read_manifest(cache_dir=CACHE_DIR):
+    """Футер кеша (схема и разделы) или None, если кеша нет"""
+    try:
+        with open(manifest_path(cache_dir), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def _write_manifest(cache_dir, manifest):
+    manifest["format"] = FORMAT_VERSION
+    manifest["updated"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    path = manifest_path(cache_dir)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    _replace_file(tmp_path, path)
+
+
+def _normalize_rows(df):
+    """Типы и порядок строк, которые кеш гарантирует читателям"""
+    df = df.copy()
+    df['Дата'] = pd.to_datetime(df['Дата'])
+    if all(col in df.columns for col in KEY_COLUMNS):
+        df = df.drop_duplicates(subset=KEY_COLUMNS, keep='last')
+    # Неделя — целое число, иначе 8 и 8.0 дают две группы и завышенные суммы
+    if 'Неделя' in df.columns:
+        df['Неделя'] = pd.to_numeric(df['Неделя'], errors='coerce').fillna(0).astype('int64')
+    return df.sort_values('Дата', kind='mergesort').reset_index(drop=True)
+
+
+def _encode_column(series):
+    """Колонка -> (массив значений, маска пропусков или None, тип для футера)"""
+    dtype = str(series.dtype)
+    if pd.api.types.is_datetime64_any_dtype(series) or pd.api.types.is_bool_dtype(series) and not series.isna().any():
+        return series.to_numpy(), None, dtype
+    if pd.api.types.is_numeric_dtype(series):
+        if isinstance(series.dtype, np.dtype):
+            return series.to_numpy(), None, dtype
+        # Nullable-типы pandas (Int64, UInt32 из isocalendar): значения + маска пропусков
+        mask = series.isna().to_numpy()
+        values = series.to_numpy(dtype="float64", na_value=np.nan) if mask.any() \
+            else series.to_numpy(dtype=series.dtype.numpy_dtype)
+        return values, mask, dtype
+    mask = series.isna().to_numpy()
+    values = series.to_numpy(dtype=object)
+    if series[~mask].map(lambda v: isinstance(v, str)).all():
+        # Строки тоже кодами категорий: повторяющиеся названия хранятся один раз
+        return values, None, _STRING_PREFIX + dtype
+    # Смешанные значения (например, артикул то числом, то строкой) — коды категорий
+    return values, None, "object"
+
+
+def _encode_categories(values):
+    """Смешанные значения -> (коды int32, -1 — пропуск; категории строками; виды категорий)"""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+    labels = []
+    kinds = []
+    for value in uniques:
+        if isinstance(value, (bool, np.bool_)):
+            kind, label = _KIND_BOOL, str(bool(value))
+        elif isinstance(value, (int, np.integer)):
+            kind, label = _KIND_INT, str(int(value))
+        elif isinstance(value, (float, np.floating)):
+            kind, label = _KIND_FLOAT, repr(float(value))
+        elif isinstance(value, (datetime, np.datetime64)):
+            kind, label = _KIND_DATETIME, pd.Timestamp(value).isoformat()
+        else:
+            kind, label = _KIND_STR, str(value)
+        kinds.append(kind)
+        labels.append(label)
+    return codes.astype("int32"), np.array(labels, dtype=str), np.array(kinds, dtype="int8")
+
+
+def _decode_categories(codes, labels, kinds):
+    """Коды категорий -> массив object с исходными значениями (пропуски — NaN)"""
+    parse = {
+        _KIND_STR: str,
+        _KIND_INT: int,
+        _KIND_FLOAT: float,
+        _KIND_BOOL: lambda v: v == "True",
+        _KIND_DATETIME: pd.Timestamp,
+    }
+    categories = np.empty(len(labels) + 1, dtype=object)
+    for i, (label, kind) in enumerate(zip(labels.tolist(), kinds.tolist())):
+        categories[i] = parse[kind](label)
+    categories[-1] = np.nan
+    return categories[codes]
+
+
+def _decode_column(values, mask, dtype):
+    """Массив (+ маска пропусков) -> колонка исходного типа"""
+    if dtype.startswith(_STRING_PREFIX):
+        series = pd.Series(values, dtype=object)
+        if mask is not None and mask.any():
+            series[mask] = np.nan
+        target = dtype[len(_STRING_PREFIX):]
+        return series if target == "object" else series.astype(target)
+    series = pd.Series(values, copy=False)
+    if mask is not None and mask.any():
+        series = series.astype("float64")
+        series[mask] = np.nan
+    if str(series.dtype) == dtype:
+        return series
+    try:
+        return series.astype(dtype)
+    except (TypeError, ValueError):
+        return series
+
+
+def _write_partition(cache_dir, name, part):
+    """
+    Пишет новую версию раздела в новый файл (атомарно); возвращает его запись для футера.
+    Старый файл раздела не трогается — его удаляет _commit после записи футера.
+    Колонки одного типа хранятся одним двумерным блоком (строки блока — колонки):
+    чтение раздела — несколько массивов, а не по массиву на колонку. Строковые колонки
+    и колонки со смешанными значениями — кодами в блоке int32; подписи категорий всех
+    колонок лежат подряд в одном массиве labels (виды значений — в kinds), в футере —
+    диапазон [начало, конец) каждой колонки. Файл сжат (np.savez_compressed).
+    """
+    blocks = {}
+    masks = []
+    columns = {}
+    layout = {}
+    categories = {}
+    labels_all, kinds_all = [], []
+    arrays = {}
+    for col in part.columns:
+        values, mask, dtype = _encode_column(part[col])
+        columns[col] = dtype
+        if values.dtype == object:
+            values, labels, kinds = _encode_categories(values)
+            start = sum(len(m) for m in labels_all)
+            categories[col] = [start, start + len(labels)]
+            labels_all.append(labels)
+            kinds_all.append(kinds)
+        key = "str" if values.dtype.kind == "U" else str(values.dtype)
+        members = blocks.setdefault(key, [])
+        layout[col] = [key, len(members)]
+        members.append(values)
+        if mask is not None:
+            layout[col].append(len(masks))
+            masks.append(mask)
+    for key, members in blocks.items():
+        if key == "str":
+            width = max(max((m.dtype.itemsize // 4 for m in members), default=1), 1)
+            members = [m.astype(f"<U{width}") for m in members]
+        arrays[key] = np.stack(members)
+    if masks:
+        arrays["mask"] = np.stack(masks)
+    if labels_all:
+        arrays["labels"] = np.concatenate(labels_all)
+        arrays["kinds"] = np.concatenate(kinds_all)
+    file_name = f"{name}.{uuid.uuid4().hex[:12]}.npz"
+    path = os.path.join(cache_dir, file_name)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    _replace_file(tmp_path, path)
+    return {
+        "file": file_name,
+        "rows": int(len(part)),
+        "min_date": part['Дата'].min().strftime('%Y-%m-%d'),
+        "max_date": part['Дата'].max().strftime('%Y-%m-%d'),
+        "columns": columns,
+        "layout": layout,
+        "categories": categories,
+    }
+
+
+def _read_partition(cache_dir, name, info, columns=None):
+    """Сырые массивы раздела: колонка -> (значения, маска пропусков или None)"""
+    wanted = [col for col in info["columns"] if columns is None or col in columns]
+    layout = info["layout"]
+    categories = info.get("categories", {})
+    needed = {layout[col][0] for col in wanted}
+    for col in wanted:
+        if col in categories:
+            # Прежние разделы формата 2: подписи и виды каждой колонки — отдельными массивами cat<N>, kind<N>
+            n = categories[col]
+            needed.update(("labels", "kinds") if isinstance(n, list) else (f"cat{n}", f"kind{n}"))
+    raw = {}
+    # Блоки obj* — только в разделах формата 1 (до upgrade_cache), их нельзя прочитать без pickle
+    legacy = any(key.startswith("obj") for key in needed)
+    with np.load(_partition_file(cache_dir, name, info), allow_pickle=legacy) as npz:
+        blocks = {key: npz[key] for key in needed}
+        mask_block = npz["mask"] if any(len(layout[col]) > 2 for col in wanted) else None
+    for col in wanted:
+        entry = layout[col]
+        mask = mask_block[entry[2]] if len(entry) > 2 else None
+        values = blocks[entry[0]][entry[1]]
+        if col in categories:
+            n = categories[col]
+            if isinstance(n, list):
+                labels, kinds = blocks["labels"][n[0]:n[1]], blocks["kinds"][n[0]:n[1]]
+            else:
+                labels, kinds = blocks[f"cat{n}"], blocks[f"kind{n}"]
+            values = _decode_categories(values, labels, kinds)
+        raw[col] = (values, mask)
+    return raw
+
+
+def _to_frame(raws, infos, order):
+    """Склеивает сырые массивы разделов по колонкам и один раз восстанавливает типы"""
+    data = {}
+    for col in order:
+        present = [(raw[col], info["columns"][col]) for raw, info in zip(raws, infos) if col in raw]
+        if not present:
+            continue
+        dtypes = {dtype for _, dtype in present}
+        if len(dtypes) == 1 and len(present) == len(raws):
+            values = np.concatenate([v for (v, _), _ in present])
+            masks = [m for (_, m), _ in present]
+            mask = None if all(m is None for m in masks) else np.concatenate(
+                [m if m is not None else np.zeros(len(v), dtype=bool) for (v, m), _ in present]
+            )
+            data[col] = _decode_column(values, mask, dtypes.pop())
+        else:
+            # Тип колонки менялся между разделами (или колонка есть не везде)
+            pieces = []
+            for raw, info in zip(raws, infos):
+                length = len(next(iter(raw.values()))[0]) if raw else 0
+                if col in raw:
+                    pieces.append(_decode_column(raw[col][0], raw[col][1], info["columns"][col]))
+                else:
+                    pieces.append(pd.Series([np.nan] * length, dtype=object))
+            data[col] = pd.concat(pieces, ignore_index=True)
+    return pd.DataFrame(data)
+
+
+def _read_partition_frame(cache_dir, name, info):
+    return _to_frame([_read_partition(cache_dir, name, info)], [info], list(info["columns"]))
+
+
+def _split_by_month(df):
+    months = df['Дата'].dt.year * 100 + df['Дата'].dt.month
+    for key, part in df.groupby(months, sort=True):
+        yield _partition_name(key // 100, key % 100), part.reset_index(drop=True)
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _commit(cache_dir, manifest, old_partitions):
+    """
+    Записывает футер, затем удаляет файлы разделов, на которые он больше не ссылается.
+    Новые файлы разделов к этому моменту уже записаны, поэтому до замены футера
+    читатели видят прежнюю версию кеша целиком, после — новую.
+    """
+    _write_manifest(cache_dir, manifest)
+    live = {_partition_file(cache_dir, name, info) for name, info in manifest.get("partitions", {}).items()}
+    for name, info in old_partitions.items():
+        path = _partition_file(cache_dir, name, info)
+        if path not in live:
+            _remove_file(path)
+
+
+def _overlapping(partitions, date_from, date_to):
+    """Разделы, в которых есть даты из периода [date_from, date_to]"""
+    lo = pd.Timestamp(date_from).strftime('%Y-%m-%d') if date_from is not None else ""
+    hi = pd.Timestamp(date_to).strftime('%Y-%m-%d') if date_to is not None else "9999-12-31"
+    return [name for name, info in partitions.items() if info["min_date"] <= hi and info["max_date"] >= lo]
+
+
+def save_cache(df, cache_dir=CACHE_DIR):
+    """Полностью перезаписывает кеш данными df. Возвращает True при успехе"""
+    os.makedirs(cache_dir, exist_ok=True)
+    df = _normalize_rows(df)
+    old = read_manifest(cache_dir) or {}
+    manifest = {"columns": list(df.columns), "partitions": {}}
+    for name, part in _split_by_month(df):
+        manifest["partitions"][name] = _write_partition(cache_dir, name, part)
+    _commit(cache_dir, manifest, old.get("partitions", {}))
+    return True
+
+
+def _rewrite_partitions(cache_dir, new_rows, drop, extra=()):
+    """
+    Переписывает только разделы новых строк (и разделы extra):
+    из раздела удаляются строки drop(part, new_part), добавляются новые строки.
+    """
+    manifest = read_manifest(cache_dir)
+    if manifest is None:
+        return save_cache(new_rows, cache_dir)
+    new_rows = _normalize_rows(new_rows)
+    partitions = manifest.setdefault("partitions", {})
+    old_partitions = dict(partitions)
+    touched = dict(_split_by_month(new_rows))
+    for name in sorted(set(touched) | set(extra)):
+        new_part = touched.get(name)
+        part = new_part
+        if name in partitions:
+            part = _read_partition_frame(cache_dir, name, partitions[name])
+            part = part.loc[~drop(part, new_part)]
+            if new_part is not None:
+                part = pd.concat([part, new_part], ignore_index=True)
+            part = _normalize_rows(part)
+        if part is None or part.empty:
+            partitions.pop(name, None)
+            continue
+        partitions[name] = _write_partition(cache_dir, name, part)
+    columns = manifest.setdefault("columns", [])
+    columns.extend(col for col in new_rows.columns if col not in columns)
+    _commit(cache_dir, manifest, old_partitions)
+    return True
+
+
+def replace_period(new_rows, date_from=None, date_to=None, cache_dir=CACHE_DIR):
+    """
+    Заменяет в кеше все строки за период [date_from, date_to] строками new_rows
+    (по умолчанию период — min/max даты new_rows). Переписываются только разделы
+    этого периода.
+    """
+    if new_rows is None or new_rows.empty:
+        return False
+    dates = pd.to_datetime(new_rows['Дата'])
+    date_from = pd.Timestamp(dates.min() if date_from is None else date_from)
+    date_to = pd.Timestamp(dates.max() if date_to is None else date_to)
+
+    def drop(part, new_part):
+        return (part['Дата'] >= date_from) & (part['Дата'] <= date_to)
+
+    manifest = read_manifest(cache_dir) or {}
+    extra = _overlapping(manifest.get("partitions", {}), date_from, date_to)
+    return _rewrite_partitions(cache_dir, new_rows, drop, extra)
+
+
+def upsert_rows(new_rows, cache_dir=CACHE_DIR):
+    """Новые строки заменяют строки с теми же (Дата, Артикул WB, Артикул продавца), остальные добавляются"""
+    if new_rows is None or new_rows.empty:
+        return False
+
+    def drop(part, new_part):
+        if new_part is None or not all(col in part.columns for col in KEY_COLUMNS):
+            return pd.Series(False, index=part.index)
+        return pd.MultiIndex.from_frame(part[KEY_COLUMNS]).isin(
+            pd.MultiIndex.from_frame(new_part[KEY_COLUMNS])
+        )
+
+    return _rewrite_partitions(cache_dir, new_rows, drop)
+
+
+def upgrade_cache(cache_dir=CACHE_DIR):
+    """
+    Переводит кеш формата 1 на формат 2: разделы с колонками object (сохранёнными
+    через pickle) переписываются кодами категорий. Разделы читаются с pickle один раз —
+    это файлы, записанные самим кешем. Возвращает число переписанных разделов
+    """
+    manifest = read_manifest(cache_dir)
+    if manifest is None or manifest.get("format", 1) >= FORMAT_VERSION:
+        return 0
+    partitions = manifest.setdefault("partitions", {})
+    old_partitions = dict(partitions)
+    upgraded = 0
+    for name, info in old_partitions.items():
+        if any(entry[0].startswith("obj") for entry in info["layout"].values()):
+            partitions[name] = _write_partition(cache_dir, name, _read_partition_frame(cache_dir, name, info))
+            upgraded += 1
+    _commit(cache_dir, manifest, old_partitions)
+    return upgraded
+
+
+def migrate_csv_cache(csv_path=None, cache_dir=CACHE_DIR):
+    """Импортирует старый data_cache.csv в колоночный кеш. Возвращает число строк или 0"""
+    csv_path = csv_path or _legacy_csv(cache_dir)
+    if not os.path.exists(csv_path):
+        return 0
+    df = pd.read_csv(csv_path)
+    save_cache(df, cache_dir)
+    return len(df)
+
+
+def load_cache(cache_dir=CACHE_DIR, columns=None, date_from=None, date_to=None):
+    """
+    Читает кеш (None, если его нет). columns — только эти колонки (Дата читается всегда),
+    date_from/date_to — только разделы и строки этого периода.
+    """
+    manifest = read_manifest(cache_dir)
+    if manifest is None:
+        if not migrate_csv_cache(cache_dir=cache_dir):
+            return None
+        manifest = read_manifest(cache_dir)
+    if manifest.get("format", 1) < FORMAT_VERSION:
+        upgrade_cache(cache_dir)
+        manifest = read_manifest(cache_dir)
+    partitions = manifest.get("partitions", {})
+    if columns is not None:
+        columns = set(columns) | {'Дата'}
+    names = sorted(partitions)
+    if date_from is not None or date_to is not None:
+        names = sorted(_overlapping(partitions, date_from, date_to))
+    order = [col for col in manifest.get("columns", []) if columns is None or col in columns]
+    if not names:
+        return pd.DataFrame(columns=order)
+    raws = [_read_partition(cache_dir, name, partitions[name], columns) for name in names]
+    df = _to_frame(raws, [partitions[name] for name in names], order)
+    if date_from is not None:
+        df = df[df['Дата'] >= pd.Timestamp(date_from)]
+    if date_to is not None:
+        df = df[df['Дата'] <= pd.Timestamp(date_to)]
+    return df.reset_index(drop=True)
+
+
+def cache_info(cache_dir=CACHE_DIR):
+    """Информация о кеше по футеру, без чтения данных (формат get_cache_info)"""
+    manifest = read_manifest(cache_dir)
+    if manifest is None and os.path.exists(_legacy_csv(cache_dir)):
+        migrate_csv_cache(cache_dir=cache_dir)
+        manifest = read_manifest(cache_dir)
+    partitions = (manifest or {}).get("partitions", {})
+    if not partitions:
+        return {'exists': False}
+    return {
+        'exists': True,
+        'records': sum(info["rows"] for info in partitions.values()),
+        'start_date': pd.Timestamp(min(info["min_date"] for info in partitions.values())).strftime('%d.%m.%Y'),
+        'end_date': pd.Timestamp(max(info["max_date"] for info in partitions.values())).strftime('%d.%m.%Y'),
+        'years': sorted({int(name[:4]) for name in partitions}),
+        'partitions': len(partitions),
+    }
+
+
+def clear_cache(cache_dir=CACHE_DIR):
+    """Удаляет кеш (разделы и футер); старый data_cache.csv тоже, чтобы он не импортировался снова"""
+    manifest = read_manifest(cache_dir) or {}
+    # Сначала футер: без него кеш считается пустым, даже если удаление разделов прервётся
+    for path in (manifest_path(cache_dir), _legacy_csv(cache_dir)):
+        if os.path.exists(path):
+            os.remove(path)
+    for name, info in manifest.get("partitions", {}).items():
+        _remove_file(_partition_file(cache_dir, name, info))
+    return True
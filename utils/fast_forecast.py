@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+Модуль быстрого векторизованного прогноза (альтернатива Prophet)
+
+Модель по смыслу повторяет аддитивный Prophet:
+    y(t) = тренд (кусочно-линейный, точки излома с L2-штрафом)
+         + недельная сезонность (ряд Фурье, порядок 3)
+         + годовая сезонность (ряд Фурье, порядок 10; только при истории от 2 лет)
+и обучается взвешенным МНК с гребневой регуляризацией сразу для матрицы рядов
+(ряды × дни): ряды с одинаковым окном истории получают общую матрицу признаков,
+нормальные уравнения решаются пакетно через np.linalg.solve. Пропуски имеют нулевой вес.
+
+Мультипликативный режим — та же модель на log1p(y) с обратным expm1.
+Интервалы: yhat ± z·σ остатков (interval_width=0.8, как у Prophet по умолчанию).
+"""
+import numpy as np
+import pandas as pd
+
+WEEKLY_ORDER = 3
+YEARLY_ORDER = 10
+YEARLY_MIN_DAYS = 730
+N_CHANGEPOINTS = 25
+CHANGEPOINT_RANGE = 0.8
+INTERVAL_Z = 1.2816  # двусторонний 80% интервал
+
+# Гребневые штрафы (в долях от числа наблюдений ряда)
+SEASONAL_PENALTY = 1e-3
+TREND_PENALTY = 1e-6
+
+
+def _fourier(t_days, period, order):
+    """Признаки Фурье для сезонности с периодом period (дни)"""
+    angles = 2.0 * np.pi * np.outer(t_days, np.arange(1, order + 1)) / period
+    return np.hstack([np.sin(angles), np.cos(angles)])
+
+
+def build_design(t_days, span_days, changepoints, config):
+    """
+    Матрица признаков (дни × признаки) и группы признаков.
+    t_days — дни от начала сетки; span_days — длина истории (для масштаба тренда).
+    """
+    scale = max(float(span_days), 1.0)
+    t = t_days / scale
+    blocks = [np.ones((len(t_days), 1)), t[:, None]]
+    groups = ["intercept", "trend"]
+    if len(changepoints):
+        blocks.append(np.maximum(0.0, t[:, None] - changepoints[None, :] / scale))
+        groups += ["changepoint"] * len(changepoints)
+    if config.get("weekly_seasonality", True):
+        blocks.append(_fourier(t_days, 7.0, WEEKLY_ORDER))
+        groups += ["weekly"] * (2 * WEEKLY_ORDER)
+    if config.get("yearly_seasonality", True) and span_days >= YEARLY_MIN_DAYS:
+        blocks.append(_fourier(t_days, 365.25, YEARLY_ORDER))
+        groups += ["yearly"] * (2 * YEARLY_ORDER)
+    return np.hstack(blocks), np.array(groups)
+
+
+def _penalties(groups, n_obs, changepoint_prior_scale):
+    """Диагональ гребневого штрафа для каждого ряда: (ряды × признаки)"""
+    base = np.zeros(len(groups))
+    base[groups == "trend"] = TREND_PENALTY
+    base[(groups == "weekly") | (groups == "yearly")] = SEASONAL_PENALTY
+    # Чем меньше changepoint_prior_scale, тем жёстче тренд (как у Prophet)
+    base[groups == "changepoint"] = 0.5e-3 / max(changepoint_prior_scale, 1e-6)
+    return np.outer(np.maximum(n_obs, 1.0), base)
+
+
+def _fit_window(Yw, W, first_obs, last_obs, grid_days, config):
+    """
+    Обучение рядов с общим окном истории [first_obs, last_obs]: масштаб тренда,
+    точки излома и годовая сезонность — по этому окну. Возвращает
+    (coef, fitted, trend, weekly, yearly, sigma) для строк Yw/W.
+    """
+    span = last_obs - first_obs + 1
+    changepoints = np.array([])
+    if span > 2 * N_CHANGEPOINTS:
+        changepoints = np.linspace(first_obs, first_obs + CHANGEPOINT_RANGE * span, N_CHANGEPOINTS + 1)[1:]
+    X_full, groups = build_design(grid_days, span, changepoints, config)
+    window = slice(first_obs, last_obs + 1)
+    X, W, Yw = X_full[window], W[:, window], Yw[:, window]
+
+    # Пакетные нормальные уравнения: (X' W X + λ) β = X' W y для каждого ряда.
+    # X' W X для всех рядов — одно матричное умножение (ряды × дни) @ (дни × признаки²)
+    n_days, n_features = X.shape
+    XX = (X[:, :, None] * X[:, None, :]).reshape(n_days, n_features * n_features)
+    XtWX = (W @ XX).reshape(len(W), n_features, n_features)
+    XtWy = (W * Yw) @ X
+    n_obs = W.sum(axis=1)
+    penalty = _penalties(groups, n_obs, config.get("changepoint_prior_scale", 0.05))
+    idx = np.arange(n_features)
+    XtWX[:, idx, idx] += penalty + 1e-9
+    coef = np.linalg.solve(XtWX, XtWy[:, :, None])[:, :, 0]
+
+    fitted = coef @ X_full.T
+    residuals = (Yw - fitted[:, window]) * W
+    dof = np.maximum(n_obs - 1.0, 1.0)
+    sigma = np.sqrt((residuals ** 2).sum(axis=1) / dof)
+
+    def component(*names):
+        mask = np.isin(groups, names)
+        return coef[:, mask] @ X_full[:, mask].T
+
+    return (coef, fitted, component("intercept", "trend", "changepoint"),
+            component("weekly"), component("yearly"), sigma)
+
+
+def fit_forecast_matrix(Y, start, periods=30, config=None):
+    """
+    Обучает модель сразу для матрицы рядов и строит прогноз.
+
+    Y — массив (ряды × дни) на общей дневной сетке, начинающейся с даты start;
+        NaN — нет наблюдения (до начала/после конца ряда или пропуск).
+    Прогноз каждого ряда — periods дней после его последнего наблюдения.
+    Масштаб тренда, точки излома и годовая сезонность берутся по истории самого ряда:
+    ряды с одинаковым окном истории обучаются одной матрицей, результат каждого ряда
+    совпадает с обучением его отдельно.
+
+    Возвращает словарь массивов:
+        grid (даты сетки с запасом на горизонт), fitted (ряды × сетка),
+        trend/weekly/yearly (компоненты), sigma (ряды), coef (по ряду — массив
+        коэффициентов, число признаков зависит от истории), last_index (индекс
+        последнего наблюдения каждого ряда).
+    """
+    config = config or {}
+    Y = np.asarray(Y, dtype="float64")
+    if Y.ndim == 1:
+        Y = Y[None, :]
+    n_series, n_days = Y.shape
+    multiplicative = config.get("seasonality_mode") == "multiplicative"
+
+    W = np.isfinite(Y).astype("float64")
+    Yw = np.where(W > 0, Y, 0.0)
+    if multiplicative:
+        Yw = np.log1p(np.maximum(Yw, 0.0))
+
+    observed = W > 0
+    has_obs = observed.any(axis=1)
+    first_obs = np.argmax(observed, axis=1)
+    last_index = np.where(has_obs, n_days - 1 - np.argmax(observed[:, ::-1], axis=1), -1)
+
+    grid_days = np.arange(n_days + int(periods), dtype="float64")
+    fitted = np.zeros((n_series, len(grid_days)))
+    trend, weekly, yearly = np.zeros_like(fitted), np.zeros_like(fitted), np.zeros_like(fitted)
+    sigma = np.zeros(n_series)
+    coef = [np.zeros(0)] * n_series
+
+    windows = {}
+    for row in np.flatnonzero(has_obs):
+        windows.setdefault((int(first_obs[row]), int(last_index[row])), []).append(row)
+    for (first, last), rows in windows.items():
+        rows = np.array(rows)
+        part = _fit_window(Yw[rows], W[rows], first, last, grid_days, config)
+        fitted[rows], trend[rows], weekly[rows], yearly[rows], sigma[rows] = part[1:]
+        for row, values in zip(rows, part[0]):
+            coef[row] = values
+
+    return {
+        "grid": pd.date_range(pd.Timestamp(start), periods=len(grid_days), freq="D"),
+        "fitted": fitted,
+        "trend": trend,
+        "weekly": weekly,
+        "yearly": yearly,
+        "sigma": sigma,
+        "coef": coef,
+        "last_index": last_index,
+        "multiplicative": multiplicative,
+    }
+
+
+def _to_scale(values, multiplicative):
+    return np.expm1(values) if multiplicative else values
+
+
+def matrix_forecast_frames(result, periods, include_history=False):
+    """
+    Разворачивает результат fit_forecast_matrix в DataFrame-ы прогноза по рядам
+    (колонки ds, yhat, yhat_lower, yhat_upper, trend, weekly, yearly).
+    """
+    frames = []
+    multiplicative = result["multiplicative"]
+    for i, last in enumerate(result["last_index"]):
+        if last < 0:
+            frames.append(None)
+            continue
+        stop = last + 1 + int(periods)
+        start = 0 if include_history else last + 1
+        center = result["fitted"][i, start:stop]
+        band = INTERVAL_Z * result["sigma"][i]
+        frames.append(pd.DataFrame({
+            "ds": result["grid"][start:stop],
+            "yhat": _to_scale(center, multiplicative),
+            "yhat_lower": _to_scale(center - band, multiplicative),
+            "yhat_upper": _to_scale(center + band, multiplicative),
+            "trend": _to_scale(result["trend"][i, start:stop], multiplicative),
+            "weekly": result["weekly"][i, start:stop],
+            "yearly": result["yearly"][i, start:stop],
+        }))
+    return frames
+
+
+def align_series(series_list):
+    """
+    Выравнивает ряды DataFrame(ds, y) на общую дневную сетку.
+    Возвращает (Y: ряды × дни с NaN вне истории, дата начала сетки).
+    """
+    starts = [pd.Timestamp(frame["ds"].min()) for frame in series_list]
+    ends = [pd.Timestamp(frame["ds"].max()) for frame in series_list]
+    start = min(starts)
+    n_days = (max(ends) - start).days + 1
+    Y = np.full((len(series_list), n_days), np.nan)
+    for i, frame in enumerate(series_list):
+        offsets = (pd.to_datetime(frame["ds"]) - start).dt.days.values
+        Y[i, offsets] = pd.to_numeric(frame["y"], errors="coerce").values
+    return Y, start
+
+
+class FastForecastModel:
+    """
+    Обученная быстрая модель одного ряда — аналог объекта Prophet для графиков.
+    history — исходный DataFrame(ds, y).
+    """
+
+    def __init__(self, history, result, config):
+        self.history = history
+        self.result = result
+        self.config = config
+
+    def __repr__(self):
+        return f"<FastForecastModel {len(self.history)} дней>"
+
+
+def create_fast_forecast(df_prophet, periods=30, seasonality_mode="additive", config=None):
+    """
+    Быстрый прогноз одного ряда в интерфейсе create_prophet_forecast:
+    возвращает (model, forecast, future). forecast включает историю, как у Prophet.
+    """
+    if df_prophet is None or len(df_prophet) < 2:
+        return None, None, None
+    config = dict(config or {})
+    config["seasonality_mode"] = seasonality_mode
+    Y, start = align_series([df_prophet])
+    result = fit_forecast_matrix(Y, start, periods, config)
+    forecast = matrix_forecast_frames(result, periods, include_history=True)[0]
+    if forecast is None:
+        return None, None, None
+    future = forecast[["ds"]].copy()
+    return FastForecastModel(df_prophet, result, config), forecast, future
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+Финансовая математика: NPV и XIRR для денежных потоков с датами
+
+NPV и его производная считаются NumPy по всем потокам сразу (и по массиву ставок).
+XIRR ищется на отрезке ставок [RATE_MIN, RATE_MAX]: корень сначала отделяется
+по сетке ставок, затем уточняется методом Брента и полируется шагом Ньютона.
+Если на отрезке нет смены знака NPV, решение явно отсутствует — xirr возвращает
+None (xirr_batch — NaN), без подмены другим показателем.
+
+xirr_batch решает много сценариев потоков (периоды, фильтры вложений) за один вызов.
+"""
+import numpy as np
+import pandas as pd
+
+DAYS_IN_YEAR = 365.25
+
+# Допустимый диапазон годовой ставки: от -99% до 1000%
+RATE_MIN = -0.99
+RATE_MAX = 10.0
+
+# Сетка ставок для отделения корня: гуще около нуля, реже на больших ставках
+_RATE_GRID = np.unique(np.concatenate([
+    np.linspace(RATE_MIN, 1.0, 200),
+    np.geomspace(1.0, RATE_MAX, 60),
+]))
+# Ставка, корень около которой предпочтителен при нескольких корнях
+_PREFERRED_RATE = 0.1
+
+
+def year_fractions(dates):
+    """Доли года (дни / 365.25) от самой ранней даты"""
+    days = pd.to_datetime(pd.Series(list(dates))).dt.normalize()
+    return ((days - days.min()).dt.days / DAYS_IN_YEAR).to_numpy(dtype='float64')
+
+
+def xnpv(rate, cashflows, years):
+    """
+    NPV потоков cashflows (..., n) в моменты years (доли года) при ставке rate.
+    rate — число или массив формы (...), результат — форма rate с учётом broadcasting.
+    """
+    rate = np.asarray(rate, dtype='float64')[..., None]
+    return np.sum(np.asarray(cashflows, dtype='float64') / (1 + rate) ** years, axis=-1)
+
+
+def xnpv_derivative(rate, cashflows, years):
+    """Производная NPV по ставке"""
+    rate = np.asarray(rate, dtype='float64')[..., None]
+    years = np.asarray(years, dtype='float64')
+    return np.sum(-np.asarray(cashflows, dtype='float64') * years / (1 + rate) ** (years + 1), axis=-1)
+
+
+def brent(f, a, b, tol=1e-12, maxiter=100):
+    """
+    Корень f на отрезке [a, b] методом Брента (f(a) и f(b) разных знаков).
+    Возвращает None, если отрезок не содержит смены знака.
+    """
+    fa, fb = f(a), f(b)
+    if fa == 0:
+        return a
+    if fb == 0:
+        return b
+    if fa * fb > 0:
+        return None
+    if abs(fa) < abs(fb):
+        a, b, fa, fb = b, a, fb, fa
+    c, fc = a, fa
+    d = e = b - a
+    for _ in range(maxiter):
+        if fb == 0:
+            return b
+        if fa * fb > 0:
+            a, fa = c, fc
+            d = e = b - c
+        if abs(fa) < abs(fb):
+            c, fc = b, fb
+            b, fb = a, fa
+            a, fa = c, fc
+        tol1 = 2 * np.finfo(float).eps * abs(b) + 0.5 * tol
+        m = 0.5 * (a - b)
+        if abs(m) <= tol1:
+            return b
+        if abs(e) >= tol1 and abs(fc) > abs(fb):
+            # Интерполяция: секущая или обратная квадратичная
+            s = fb / fc
+            if c == a:
+                p, q = 2 * m * s, 1 - s
+            else:
+                q, r = fc / fa, fb / fa
+                p = s * (2 * m * q * (q - r) - (b - c) * (r - 1))
+                q = (q - 1) * (r - 1) * (s - 1)
+            if p > 0:
+                q = -q
+            else:
+                p = -p
+            if 2 * p < min(3 * m * q - abs(tol1 * q), abs(e * q)):
+                e, d = d, p / q
+            else:
+                d = e = m
+        else:
+            d = e = m
+        c, fc = b, fb
+        b += d if abs(d) > tol1 else (tol1 if m > 0 else -tol1)
+        fb = f(b)
+    return b
+
+
+def _bracket(values):
+    """
+    Индекс узла сетки, после которого NPV меняет знак (или равен нулю), ближайший к _PREFERRED_RATE.
+    values — NPV на _RATE_GRID формы (..., узлы); -1, если смены знака нет.
+    """
+    sign = np.sign(values)
+    change = (sign[..., :-1] * sign[..., 1:] <= 0) & np.isfinite(values[..., :-1]) & np.isfinite(values[..., 1:])
+    distance = np.abs((_RATE_GRID[:-1] + _RATE_GRID[1:]) / 2 - _PREFERRED_RATE)
+    distance = np.where(change, distance, np.inf)
+    index = np.argmin(distance, axis=-1)
+    return np.where(np.isfinite(np.take_along_axis(distance, index[..., None], axis=-1)[..., 0]), index, -1)
+
+
+def _has_both_signs(cashflows):
+    cashflows = np.asarray(cashflows, dtype='float64')
+    return (cashflows < 0).any(axis=-1) & (cashflows > 0).any(axis=-1)
+
+
+def xirr(cashflows, dates, tol=1e-12):
+    """
+    XIRR (годовая ставка, 0.15 = 15%) для потоков cashflows в даты dates
+    (отрицательные — вложения, положительные — доходы).
+    Возвращает None, если решения в диапазоне [RATE_MIN, RATE_MAX] нет.
+    """
+    cashflows = np.asarray(cashflows, dtype='float64')
+    if len(cashflows) < 2 or not _has_both_signs(cashflows):
+        return None
+    years = year_fractions(dates)
+
+    with np.errstate(over='ignore', divide='ignore', invalid='ignore'):
+        index = int(_bracket(xnpv(_RATE_GRID, cashflows, years)))
+        if index < 0:
+            return None
+        lo, hi = _RATE_GRID[index], _RATE_GRID[index + 1]
+        rate = brent(lambda r: float(xnpv(r, cashflows, years)), lo, hi, tol=tol)
+        if rate is None:
+            return None
+        # Полировка Ньютоном, если шаг не выводит из отрезка
+        derivative = float(xnpv_derivative(rate, cashflows, years))
+        if derivative != 0 and np.isfinite(derivative):
+            polished = rate - float(xnpv(rate, cashflows, years)) / derivative
+            if lo <= polished <= hi:
+                rate = polished
+    return float(rate)
+
+
+def xirr_batch(cashflows, years, iterations=60, polish=3):
+    """
+    XIRR для многих сценариев сразу.
+    cashflows — (сценарии, n) (неиспользуемые позиции — 0), years — (n,) или (сценарии, n) доли года.
+    Возвращает массив ставок (сценарии,), NaN — решения нет.
+    """
+    cashflows = np.atleast_2d(np.asarray(cashflows, dtype='float64'))
+    years = np.broadcast_to(np.asarray(years, dtype='float64'), cashflows.shape)
+    result = np.full(len(cashflows), np.nan)
+    valid = _has_both_signs(cashflows)
+    if not valid.any():
+        return result
+    cf, yr = cashflows[valid], years[valid]
+
+    with np.errstate(over='ignore', divide='ignore', invalid='ignore'):
+        grid_values = xnpv(_RATE_GRID[None, :], cf[:, None, :], yr[:, None, :])
+        index = _bracket(grid_values)
+        found = index >= 0
+        index = np.where(found, index, 0)
+        lo, hi = _RATE_GRID[index], _RATE_GRID[index + 1]
+        f_lo = np.take_along_axis(grid_values, index[:, None], axis=1)[:, 0]
+
+        # Векторная бисекция по всем сценариям
+        for _ in range(iterations):
+            mid = (lo + hi) / 2
+            f_mid = xnpv(mid, cf, yr)
+            left = np.sign(f_mid) == np.sign(f_lo)
+            lo = np.where(left, mid, lo)
+            f_lo = np.where(left, f_mid, f_lo)
+            hi = np.where(left, hi, mid)
+        rate = (lo + hi) / 2
+
+        # Полировка Ньютоном в пределах отрезка сетки
+        bracket_lo, bracket_hi = _RATE_GRID[index], _RATE_GRID[index + 1]
+        for _ in range(polish):
+            derivative = xnpv_derivative(rate, cf, yr)
+            step = np.where(derivative != 0, xnpv(rate, cf, yr) / derivative, 0.0)
+            candidate = rate - step
+            rate = np.where((candidate >= bracket_lo) & (candidate <= bracket_hi), candidate, rate)
+
+    result[np.flatnonzero(valid)[found]] = rate[found]
+    return result
@@ -0,0 +1,413 @@
+# -*- coding: utf-8 -*-
+"""
+Модуль пакетного прогнозирования по артикулам и комбинациям
+
+Ряды (артикул или комбинация → дневной ряд метрики) обучаются в пуле процессов.
+Параметры обученных моделей кешируются по хешу ряда и конфигурации прогноза:
+  - ряд и конфигурация не изменились — прогноз берётся из таблицы без обучения;
+  - к ряду только добавились новые дни — модель дообучается с тёплого старта
+    (init = параметры прошлой модели);
+  - иначе — обучение с нуля.
+
+Результаты складываются в таблицу прогнозов forecast_table.csv
+(series_id, ds, yhat, yhat_lower, yhat_upper, ...), которую вкладки
+«План продаж» и «Расчет заказа» читают без обучения моделей.
+
+Движки прогноза регистрируются в FORECAST_ENGINES: engine(ds, y, config, init) ->
+(DataFrame будущих дат с колонками ds/yhat/yhat_lower/yhat_upper, параметры для тёплого старта).
+Быстрый движок "fast" (utils.fast_forecast) обучает все ряды одной матричной операцией
+в текущем процессе, без пула.
+"""
+import os
+import json
+import hashlib
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.prophet_forecast import PROPHET_AVAILABLE, prophet
+from utils.fast_forecast import (
+    align_series, fit_forecast_matrix, matrix_forecast_frames
+)
+
+FORECAST_TABLE = "forecast_table.csv"
+FORECAST_PARAMS_CACHE = "forecast_params_cache.json"
+
+FORECAST_COLUMNS = ["series_id", "ds", "yhat", "yhat_lower", "yhat_upper",
+                    "series_hash", "engine", "fitted_at"]
+
+DEFAULT_CONFIG = {
+    "engine": "prophet",
+    "periods": 90,
+    "seasonality_mode": "additive",
+    # Ряды дневные: внутридневная сезонность для них бессмысленна
+    "daily_seasonality": False,
+    "weekly_seasonality": True,
+    "yearly_seasonality": True,
+    "changepoint_prior_scale": 0.05,
+    # Заказы и продажи не бывают отрицательными
+    "clip_negative": True,
+}
+
+# Минимальная длина ряда для обучения
+MIN_SERIES_LENGTH = 14
+
+# Таблица прогнозов: (mtime_ns, size) -> DataFrame, общий для всех сессий
+_TABLE_CACHE = {}
+
+
+def sku_series_id(sku):
+    """Идентификатор ряда артикула в таблице прогнозов"""
+    return f"sku:{str(sku).replace('.0', '')}"
+
+
+def combo_series_id(combination):
+    """Идентификатор ряда комбинации в таблице прогнозов"""
+    return f"combo:{combination}"
+
+
+def make_config(**overrides):
+    """Конфигурация прогноза: DEFAULT_CONFIG с переопределёнными ключами"""
+    config = dict(DEFAULT_CONFIG)
+    config.update({k: v for k, v in overrides.items() if v is not None})
+    return config
+
+
+def config_key(config):
+    """Ключ конфигурации (без горизонта: горизонт не влияет на обучение)"""
+    fit_config = {k: v for k, v in config.items() if k != "periods"}
+    return hashlib.sha1(json.dumps(fit_config, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def series_hash(ds, y):
+    """Хеш дневного ряда (даты + значения)"""
+    h = hashlib.sha1()
+    h.update(np.asarray(pd.to_datetime(ds).values, dtype="datetime64[D]").astype("int64").tobytes())
+    h.update(np.asarray(y, dtype="float64").tobytes())
+    return h.hexdigest()[:16]
+
+
+def _prepare_series(df, date_column="Дата", metric="Заказы"):
+    """Дневной ряд без пропусков по датам: DataFrame(ds, y)"""
+    if df is None or df.empty or date_column not in df.columns or metric not in df.columns:
+        return None
+    series = pd.DataFrame({
+        "ds": pd.to_datetime(df[date_column], errors="coerce"),
+        "y": pd.to_numeric(df[metric], errors="coerce"),
+    }).dropna(subset=["ds"])
+    if series.empty:
+        return None
+    series = series.groupby("ds", as_index=True)["y"].sum()
+    full_index = pd.date_range(series.index.min(), series.index.max(), freq="D")
+    series = series.reindex(full_index, fill_value=0.0).fillna(0.0)
+    return pd.DataFrame({"ds": series.index, "y": series.values.astype("float64")})
+
+
+def build_series_from_reports(reports, combinations=None, metric="Заказы"):
+    """
+    Собирает ряды из отчётов Tovar.
+
+    reports — результат find_and_load_reports_from_tovar: {артикул: {'data': DataFrame}}
+    combinations — {комбинация: [артикулы]}; ряд комбинации = сумма рядов её артикулов.
+    Возвращает {series_id: DataFrame(ds, y)}.
+    """
+    series = {}
+    sku_frames = {}
+    for sku, report_info in (reports or {}).items():
+        data = report_info.get("data") if isinstance(report_info, dict) else report_info
+        prepared = _prepare_series(data, metric=metric)
+        if prepared is not None:
+            sku_key = str(sku).replace(".0", "")
+            sku_frames[sku_key] = prepared
+            series[sku_series_id(sku_key)] = prepared
+
+    for combination, skus in (combinations or {}).items():
+        frames = [sku_frames[s] for s in (str(x).replace(".0", "") for x in skus) if s in sku_frames]
+        if not frames:
+            continue
+        combined = pd.concat(frames).groupby("ds", as_index=False)["y"].sum()
+        full_index = pd.date_range(combined["ds"].min(), combined["ds"].max(), freq="D")
+        combined = combined.set_index("ds")["y"].reindex(full_index, fill_value=0.0)
+        series[combo_series_id(combination)] = pd.DataFrame({"ds": combined.index, "y": combined.values})
+    return series
+
+
+# ---------------------------------------------------------------------------
+# Движки
+# ---------------------------------------------------------------------------
+
+def _prophet_init_params(model):
+    """Параметры обученной модели Prophet в виде init для тёплого старта (JSON-совместимо)"""
+    params = {}
+    for name in ("k", "m", "sigma_obs"):
+        params[name] = float(model.params[name][0][0])
+    for name in ("delta", "beta"):
+        params[name] = [float(v) for v in model.params[name][0]]
+    return params
+
+
+def _fit_prophet(ds, y, config, init=None):
+    """Движок Prophet: обучение (с тёплого старта, если передан init) и прогноз"""
+    if not PROPHET_AVAILABLE:
+        raise RuntimeError("Prophet не установлен")
+
+    def new_model():
+        return prophet.Prophet(
+            seasonality_mode=config["seasonality_mode"],
+            daily_seasonality=config["daily_seasonality"],
+            weekly_seasonality=config["weekly_seasonality"],
+            yearly_seasonality=config["yearly_seasonality"],
+            changepoint_prior_scale=config["changepoint_prior_scale"],
+        )
+
+    history = pd.DataFrame({"ds": pd.to_datetime(ds), "y": y})
+    model = new_model()
+    try:
+        if init:
+            model.fit(history, init=init)
+        else:
+            model.fit(history)
+    except Exception:
+        if not init:
+            raise
+        # Размерности init не подошли (другая длина ряда/сезонности) — учимся с нуля
+        model = new_model()
+        model.fit(history)
+
+    future = model.make_future_dataframe(periods=int(config["periods"]), include_history=False)
+    forecast = model.predict(future)
+    return forecast[["ds", "yhat", "yhat_lower", "yhat_upper"]], _prophet_init_params(model)
+
+
+def _fit_fast(ds, y, config, init=None):
+    """Быстрый движок для одного ряда (тёплый старт не нужен: решение в замкнутой форме)"""
+    return _fit_fast_matrix([(None, ds, y, config, init)], config)[0][1:3]
+
+
+def _fit_fast_matrix(tasks, config):
+    """
+    Быстрый движок для всех рядов сразу (тренд и сезонности — по истории каждого ряда,
+    см. fit_forecast_matrix). Возвращает список (series_id, forecast, params, ошибка)
+    в порядке tasks.
+    """
+    frames = [pd.DataFrame({"ds": pd.to_datetime(ds), "y": y}) for _, ds, y, _, _ in tasks]
+    Y, start = align_series(frames)
+    result = fit_forecast_matrix(Y, start, config["periods"], config)
+    forecasts = matrix_forecast_frames(result, config["periods"])
+    results = []
+    for row, (series_id, _, _, _, _) in enumerate(tasks):
+        forecast = forecasts[row]
+        if forecast is None:
+            results.append((series_id, None, None, "Пустой ряд"))
+            continue
+        params = {"coef": [float(v) for v in result["coef"][row]], "sigma": float(result["sigma"][row])}
+        results.append((series_id, forecast[["ds", "yhat", "yhat_lower", "yhat_upper"]], params, None))
+    return results
+
+
+FORECAST_ENGINES = {
+    "prophet": _fit_prophet,
+    "fast": _fit_fast,
+}
+
+
+def available_engines():
+    """Движки, доступные в текущем окружении (быстрый — первым)"""
+    engines = [name for name in FORECAST_ENGINES if name != "prophet" or PROPHET_AVAILABLE]
+    return sorted(engines, key=lambda name: name != "fast")
+
+
+def _clip_forecast(forecast, config):
+    if config.get("clip_negative"):
+        forecast = forecast.copy()
+        for column in ("yhat", "yhat_lower", "yhat_upper"):
+            forecast[column] = forecast[column].clip(lower=0)
+    return forecast
+
+
+def _fit_task(task):
+    """Обучение одного ряда в процессе пула. Возвращает (series_id, forecast, params, ошибка)"""
+    series_id, ds, y, config, init = task
+    try:
+        engine = FORECAST_ENGINES[config["engine"]]
+        forecast, params = engine(ds, y, config, init)
+        return series_id, _clip_forecast(forecast, config), params, None
+    except Exception as e:
+        return series_id, None, None, f"{type(e).__name__}: {e}"
+
+
+# ---------------------------------------------------------------------------
+# Кеш параметров и таблица прогнозов
+# ---------------------------------------------------------------------------
+
+def _load_params_cache(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def _save_json(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_forecast_table(path=FORECAST_TABLE):
+    """
+    Таблица прогнозов (общая для всех сессий, перечитывается только после записи файла).
+    Результат нельзя изменять — при необходимости берите .copy().
+    """
+    try:
+        st_ = os.stat(path)
+    except OSError:
+        return pd.DataFrame(columns=FORECAST_COLUMNS)
+    signature = (st_.st_mtime_ns, st_.st_size)
+    cached = _TABLE_CACHE.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    try:
+        table = pd.read_csv(path, parse_dates=["ds"], dtype={"series_id": str, "series_hash": str})
+    except Exception:
+        return pd.DataFrame(columns=FORECAST_COLUMNS)
+    _TABLE_CACHE[path] = (signature, table)
+    return table
+
+
+def get_forecast(series_id, start=None, end=None, path=FORECAST_TABLE):
+    """Прогноз одного ряда из таблицы прогнозов (пустой DataFrame, если его нет)"""
+    table = load_forecast_table(path)
+    if table.empty:
+        return table
+    mask = table["series_id"] == series_id
+    if start is not None:
+        mask &= table["ds"] >= pd.Timestamp(start)
+    if end is not None:
+        mask &= table["ds"] <= pd.Timestamp(end)
+    return table.loc[mask, ["ds", "yhat", "yhat_lower", "yhat_upper", "engine", "fitted_at"]].reset_index(drop=True)
+
+
+def _plan_tasks(series, config, params_cache, table):
+    """Разбивает ряды на переиспользуемые, дообучаемые с тёплого старта и обучаемые с нуля"""
+    key = config_key(config)
+    known = set(table["series_id"].unique()) if not table.empty else set()
+    tasks, reused, warm = [], [], []
+    hashes = {}
+    for series_id, frame in series.items():
+        if frame is None or len(frame) < MIN_SERIES_LENGTH:
+            continue
+        ds = frame["ds"].values
+        y = frame["y"].values.astype("float64")
+        full_hash = series_hash(ds, y)
+        hashes[series_id] = full_hash
+
+        entry = params_cache.get(series_id)
+        init = None
+        if isinstance(entry, dict) and entry.get("config_key") == key:
+            n = int(entry.get("n", 0))
+            if entry.get("series_hash") == full_hash and entry.get("periods") == config["periods"] \
+                    and series_id in known:
+                reused.append(series_id)
+                continue
+            # Прежний ряд — префикс нового: пришли только новые дни
+            if 0 < n <= len(frame) and series_hash(ds[:n], y[:n]) == entry.get("series_hash"):
+                init = entry.get("params")
+                if init:
+                    warm.append(series_id)
+        tasks.append((series_id, ds, y, config, init))
+    return tasks, reused, warm, hashes
+
+
+def run_batch_forecast(series, config=None, max_workers=None, progress=None,
+                       table_path=FORECAST_TABLE, cache_path=FORECAST_PARAMS_CACHE):
+    """
+    Строит прогнозы для набора рядов {series_id: DataFrame(ds, y)} и обновляет таблицу прогнозов.
+
+    max_workers — число процессов пула (1 — последовательно в текущем процессе).
+    progress(done, total) — необязательный колбэк прогресса.
+    Возвращает отчёт: fitted, warm, reused, skipped, failed {series_id: ошибка}.
+    """
+    config = make_config(**(config or {}))
+    if config["engine"] not in FORECAST_ENGINES:
+        raise ValueError(f"Неизвестный движок прогноза: {config['engine']}")
+
+    params_cache = _load_params_cache(cache_path)
+    table = load_forecast_table(table_path)
+    tasks, reused, warm, hashes = _plan_tasks(series, config, params_cache, table)
+    report = {
+        "fitted": [], "warm": warm, "reused": reused,
+        "skipped": [s for s in series if s not in hashes], "failed": {},
+    }
+
+    results = []
+    total = len(tasks)
+    if total and config["engine"] == "fast":
+        try:
+            results = [
+                (series_id, _clip_forecast(forecast, config) if forecast is not None else None, params, error)
+                for series_id, forecast, params, error in _fit_fast_matrix(tasks, config)
+            ]
+        except Exception as e:
+            results = [(task[0], None, None, f"{type(e).__name__}: {e}") for task in tasks]
+        if progress:
+            progress(total, total)
+    elif total:
+        workers = max_workers if max_workers is not None else min(total, os.cpu_count() or 1)
+        if workers > 1 and total > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    for done, result in enumerate(pool.map(_fit_task, tasks), 1):
+                        results.append(result)
+                        if progress:
+                            progress(done, total)
+            except Exception:
+                # Пул недоступен (ограничения окружения) — считаем в текущем процессе
+                results = []
+        if not results:
+            for done, task in enumerate(tasks, 1):
+                results.append(_fit_task(task))
+                if progress:
+                    progress(done, total)
+
+    fitted_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    key = config_key(config)
+    new_frames = []
+    lengths = {task[0]: len(task[1]) for task in tasks}
+    for series_id, forecast, params, error in results:
+        if error is not None:
+            report["failed"][series_id] = error
+            continue
+        frame = forecast.copy()
+        frame.insert(0, "series_id", series_id)
+        frame["series_hash"] = hashes[series_id]
+        frame["engine"] = config["engine"]
+        frame["fitted_at"] = fitted_at
+        new_frames.append(frame[FORECAST_COLUMNS])
+        params_cache[series_id] = {
+            "config_key": key,
+            "series_hash": hashes[series_id],
+            "n": lengths[series_id],
+            "periods": config["periods"],
+            "engine": config["engine"],
+            "params": params,
+            "fitted_at": fitted_at,
+        }
+        report["fitted"].append(series_id)
+    report["warm"] = [s for s in warm if s in report["fitted"]]
+
+    if new_frames:
+        refreshed = {frame["series_id"].iloc[0] for frame in new_frames}
+        kept = table[~table["series_id"].isin(refreshed)] if not table.empty else None
+        parts = ([kept] if kept is not None and not kept.empty else []) + new_frames
+        updated = pd.concat(parts, ignore_index=True)
+        tmp_path = f"{table_path}.tmp"
+        updated.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, table_path)
+        _save_json(cache_path, params_cache)
+
+    return report
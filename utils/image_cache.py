@@ -8,10 +8,10 @@ import base64
 import requests
 from io import BytesIO
 
-try:
-    from PIL import Image
-except Exception:
-    Image = None
+from utils.lazy import LazyModule, module_available
+
+# PIL импортируется при первом ресайзе изображения
+Image = LazyModule("PIL.Image") if module_available("PIL") else None
 
 
 def _cache_root():
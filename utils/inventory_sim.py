@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Векторная симуляция остатков товара (артикулы × сценарии × периоды)
+
+Общий движок для inventory_calculator_advanced.py и вкладки «📦 Расчет заказа»
+дашборда. Заказы задаются массивом формы (..., периоды): ведущие оси — артикулы,
+сценарии (низкий / средний / высокий план), проценты выкупа и т.п.; процент выкупа
+и начальный остаток транслируются (broadcasting) на ведущие оси. Цикл идёт только
+по периодам, все артикулы и сценарии считаются за один проход.
+
+Невыкупленный товар возвращается на склад через return_lag периодов (0 — в том же
+периоде). backorder=True — заказы выполняются полностью, остаток может уйти в минус
+(как в расчёте заказа дашборда); иначе продаётся не больше, чем есть на складе.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _arr(value):
+    return np.asarray(value, dtype='float64')
+
+
+def simulate_inventory(orders, buyback_rate, initial_stock=0.0, return_lag=0,
+                       backorder=False, shortage_limit=None):
+    """
+    Остатки по периодам. buyback_rate — доля выкупа (0.85 = 85%),
+    shortage_limit — допустимый недостаток как доля заказов периода (None — без ограничения).
+    Возвращает словарь массивов формы (..., периоды) с полями inventory_calculator_advanced:
+    orders, opening_stock, sold_from_warehouse, shortage, returns_this_month,
+    returns_to_warehouse, buyback_quantity, warehouse_stock, utilization_rate, return_rate.
+    """
+    orders = _arr(orders)
+    buyback_rate = _arr(buyback_rate)
+    initial_stock = _arr(initial_stock)
+    periods = orders.shape[-1]
+    lead = np.broadcast_shapes(orders.shape[:-1], buyback_rate.shape, initial_stock.shape)
+    orders = np.broadcast_to(orders, lead + (periods,))
+    buyback_rate = np.broadcast_to(buyback_rate, lead)
+    if shortage_limit is not None:
+        shortage_limit = np.broadcast_to(_arr(shortage_limit), lead + (periods,))
+
+    fields = ('opening_stock', 'sold_from_warehouse', 'shortage', 'returns_this_month',
+              'returns_to_warehouse', 'warehouse_stock')
+    out = {name: np.zeros(lead + (periods,)) for name in fields}
+    stock = np.broadcast_to(initial_stock, lead).copy()
+
+    for t in range(periods):
+        out['opening_stock'][..., t] = stock
+        if return_lag > 0 and t >= return_lag:
+            arrivals = out['returns_this_month'][..., t - return_lag]
+            out['returns_to_warehouse'][..., t] = arrivals
+            stock = stock + arrivals
+
+        period_orders = orders[..., t]
+        sold = period_orders if backorder else np.minimum(stock, period_orders)
+        shortage = period_orders - sold
+        if shortage_limit is not None:
+            shortage = np.minimum(shortage, period_orders * shortage_limit[..., t])
+        returns = sold * (1 - buyback_rate)
+
+        out['sold_from_warehouse'][..., t] = sold
+        out['shortage'][..., t] = shortage
+        out['returns_this_month'][..., t] = returns
+        if return_lag > 0:
+            stock = stock - sold
+        else:
+            out['returns_to_warehouse'][..., t] = returns
+            stock = stock - sold + returns
+        out['warehouse_stock'][..., t] = stock
+
+    sold = out['sold_from_warehouse']
+    out['orders'] = np.array(orders)
+    out['buyback_quantity'] = sold * buyback_rate[..., None]
+    has_sales = sold > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out['utilization_rate'] = np.where(has_sales, out['buyback_quantity'] / sold * 100, 0.0)
+        out['return_rate'] = np.where(has_sales, out['returns_this_month'] / sold * 100, 0.0)
+    return out
+
+
+def required_purchase(orders, buyback_rate, min_end_stock=0.0, initial_stock=0.0,
+                      return_lag=0, max_purchase=None):
+    """
+    Минимальная целая закупка, при которой остаток на конец периода не ниже min_end_stock
+    (заказы выполняются полностью, backorder=True). При таком режиме остаток на конец
+    линейно зависит от закупки, поэтому ответ считается без перебора.
+    Если нужно больше max_purchase, возвращается max_purchase.
+    """
+    if _arr(orders).shape[-1] == 0:
+        return np.maximum(np.ceil(_arr(min_end_stock) - _arr(initial_stock)), 0.0)
+    end_stock = simulate_inventory(orders, buyback_rate, initial_stock, return_lag, backorder=True)['warehouse_stock'][..., -1]
+    purchase = np.maximum(np.ceil(_arr(min_end_stock) - end_stock), 0.0)
+    if max_purchase is not None:
+        purchase = np.where(purchase > max_purchase, max_purchase, purchase)
+    return purchase
+
+
+def sensitivity_sweep(orders, buyback_rates, initial_stock=0.0, min_end_stock_pct=0.0,
+                      safety_stock_pct=0.0, return_lag=0):
+    """
+    Рекомендуемый заказ для каждого сценария и процента выкупа.
+    orders — {сценарий: заказы по периодам} (например, артикул или план low / mid / high),
+    buyback_rates — проценты выкупа (25 = 25%). Верхняя граница заказа — 1.5 × сумма заказов.
+    Возвращает DataFrame: Сценарий, Выкуп, %, Заказы, шт, Возвраты в периоде, шт,
+    Базовый заказ, шт, Рекомендуемый заказ, шт, Остаток на конец, шт.
+    """
+    labels = list(orders)
+    matrix = np.vstack([_arr(orders[label]) for label in labels])[:, None, :]
+    rates = _arr(buyback_rates)
+    buyback = (rates / 100)[None, :]
+
+    totals = matrix.sum(axis=-1)
+    base_order = required_purchase(
+        matrix, buyback, totals * (min_end_stock_pct / 100.0), initial_stock, return_lag,
+        max_purchase=np.floor(totals * 1.5)
+    )
+    final_order = np.ceil(base_order * (1 + safety_stock_pct / 100.0))
+    sim = simulate_inventory(matrix, buyback, initial_stock + base_order, return_lag, backorder=True)
+
+    shape = (len(labels), len(rates))
+    scenario = np.empty(len(labels), dtype=object)
+    scenario[:] = labels  # метки могут быть кортежами (артикул, план)
+    return pd.DataFrame({
+        'Сценарий': np.repeat(scenario, len(rates)),
+        'Выкуп, %': np.tile(rates, len(labels)),
+        'Заказы, шт': np.broadcast_to(totals, shape).ravel(),
+        'Возвраты в периоде, шт': sim['returns_to_warehouse'].sum(axis=-1).ravel(),
+        'Базовый заказ, шт': base_order.ravel(),
+        'Рекомендуемый заказ, шт': final_order.ravel().astype('int64'),
+        'Остаток на конец, шт': sim['warehouse_stock'][..., -1].ravel(),
+    })
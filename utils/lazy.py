@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+Модуль для ленивого импорта тяжёлых зависимостей (prophet, openai, PIL, docx, bs4)
+"""
+import importlib
+import importlib.util
+
+
+def module_available(name: str) -> bool:
+    """Проверяет, установлен ли модуль, не импортируя его"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class LazyModule:
+    """
+    Заместитель модуля: реальный импорт происходит при первом обращении к атрибуту.
+    Подходит для кода вида `openai.OpenAI(...)` и `except openai.RateLimitError`.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "загружен" if self._module is not None else "не загружен"
+        return f"<LazyModule {self._name} ({state})>"
@@ -5,19 +5,14 @@
 import os
 import re
 
-try:
-    from docx import Document
-    DOCX_AVAILABLE = True
-except ImportError:
-    DOCX_AVAILABLE = False
-    Document = None
+from .lazy import LazyModule, module_available
 
-try:
-    from bs4 import BeautifulSoup
-    BS4_AVAILABLE = True
-except ImportError:
-    BS4_AVAILABLE = False
-    BeautifulSoup = None
+# python-docx и BeautifulSoup импортируются при первом чтении соответствующего файла
+DOCX_AVAILABLE = module_available("docx")
+docx = LazyModule("docx") if DOCX_AVAILABLE else None
+
+BS4_AVAILABLE = module_available("bs4")
+bs4 = LazyModule("bs4") if BS4_AVAILABLE else None
 
 
 def read_mc_files(mc_dir: str = None) -> dict:
@@ -62,7 +57,7 @@ def read_mc_files(mc_dir: str = None) -> dict:
                         mc_data[filename] = "Ошибка: библиотека python-docx не установлена"
                         continue
                     
-                    doc = Document(file_path)
+                    doc = docx.Document(file_path)
                     # Извлекаем весь текст из документа
                     full_text = []
                     for paragraph in doc.paragraphs:
@@ -89,7 +84,7 @@ def read_mc_files(mc_dir: str = None) -> dict:
                         
                         if BS4_AVAILABLE:
                             # Используем BeautifulSoup для парсинга HTML
-                            soup = BeautifulSoup(html_content, 'html.parser')
+                            soup = bs4.BeautifulSoup(html_content, 'html.parser')
                             
                             # Удаляем скрипты и стили
                             for script in soup(["script", "style"]):
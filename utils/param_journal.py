@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+Модуль журнала правок параметров товаров
+
+Каждая правка дописывает одну короткую JSON-строку в журнал проекта
+param_journal_<ключ>.jsonl — стоимость записи не зависит от размера проекта.
+Операции: set (значение товара, save_param_value), rename (переименование параметра),
+options (список вариантов параметра), delete (удаление параметра из проекта).
+Фоновый компактор периодически сворачивает журнал в снимок param_values_<ключ>.json.
+Загрузка читает снимок и применяет к нему «хвост» журнала.
+
+Порядок сворачивания: журнал переименовывается в .compacting (новые правки сразу
+пишутся в новый журнал), затем .compacting применяется к снимку, снимок
+записывается атомарно и .compacting удаляется. Если процесс упал посередине,
+.compacting будет применён при следующей загрузке или сворачивании.
+"""
+import os
+import json
+import time
+import threading
+from datetime import datetime
+
+from utils.boot_state import read_json_snapshot, thaw
+from utils.project_keys import param_values_path, param_journal_path, resolve_param_values_file
+
+COMPACT_INTERVAL = 30.0  # секунд между проходами фонового компактора
+COMPACT_SUFFIX = ".compacting"
+
+# _SNAPSHOT_LOCK — снимок и файл .compacting, _APPEND_LOCK — текущий журнал.
+# Правки берут только _APPEND_LOCK и не ждут сворачивания снимка.
+_SNAPSHOT_LOCK = threading.Lock()
+_APPEND_LOCK = threading.Lock()
+
+# Проекты с несвёрнутыми правками (имя файла проекта -> число записей)
+_PENDING = {}
+
+_COMPACTOR = None
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _append_record(file_name, record):
+    """Дописывает запись в журнал проекта. Возвращает True при успешной записи"""
+    if not file_name:
+        return False
+    record["ts"] = _now()
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    try:
+        with _APPEND_LOCK:
+            with open(param_journal_path(file_name), "a", encoding="utf-8") as f:
+                f.write(line)
+            _PENDING[file_name] = _PENDING.get(file_name, 0) + 1
+        return True
+    except Exception:
+        return False
+
+
+def append_param_edit(file_name, param, sku, value):
+    """
+    Дописывает правку param_values[param][sku] = value в журнал проекта.
+    Возвращает True при успешной записи.
+    """
+    return _append_record(file_name, {"op": "set", "param": param, "sku": str(sku), "value": value})
+
+
+def append_param_rename(file_name, param, new_name):
+    """Дописывает переименование параметра (значения и варианты переходят к new_name)"""
+    return _append_record(file_name, {"op": "rename", "param": param, "new_name": new_name})
+
+
+def append_param_options(file_name, param, options):
+    """Дописывает новый список вариантов параметра (заменяет прежний)"""
+    return _append_record(file_name, {"op": "options", "param": param, "options": [str(o) for o in options]})
+
+
+def append_param_delete(file_name, param):
+    """Дописывает удаление параметра из проекта (значения, варианты, запись в deleted_params)"""
+    return _append_record(file_name, {"op": "delete", "param": param})
+
+
+def _read_journal(path):
+    """Читает записи журнала; оборванная последняя строка пропускается"""
+    records = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    except OSError:
+        pass
+    return records
+
+
+def _apply_records(param_data, records):
+    """Применяет записи журнала к (изменяемой) копии снимка"""
+    param_values = param_data.setdefault("param_values", {})
+    param_options = param_data.setdefault("param_options", {})
+    deleted = list(param_data.get("deleted_params") or [])
+    for record in records:
+        op = record.get("op")
+        param = record.get("param")
+        if not param:
+            continue
+        if op == "set":
+            if param in deleted:
+                continue
+            value = record.get("value")
+            param_values.setdefault(param, {})[record.get("sku")] = value
+            # Как и в редакторе: новое значение попадает в варианты параметра
+            if value and param in param_options and str(value) not in param_options[param]:
+                param_options[param].append(str(value))
+        elif op == "rename":
+            new_name = record.get("new_name")
+            if not new_name or new_name == param:
+                continue
+            if param in param_values:
+                param_values.setdefault(new_name, {}).update(param_values.pop(param))
+            if param in param_options:
+                param_options[new_name] = param_options.pop(param)
+            if new_name in deleted:
+                deleted.remove(new_name)
+        elif op == "options":
+            param_options[param] = list(record.get("options") or [])
+            if param in deleted:
+                deleted.remove(param)
+        elif op == "delete":
+            param_values.pop(param, None)
+            param_options.pop(param, None)
+            if param not in deleted:
+                deleted.append(param)
+    param_data["deleted_params"] = deleted
+    return param_data
+
+
+def _tail_records(file_name):
+    journal = param_journal_path(file_name)
+    return _read_journal(journal + COMPACT_SUFFIX) + _read_journal(journal)
+
+
+def load_param_data(file_name):
+    """
+    Возвращает (param_file, param_data): снимок проекта с применённым хвостом журнала.
+    Без хвоста param_data — общий снимок процесса (изменять только после thaw()).
+    """
+    if not file_name:
+        return None, None
+    with _SNAPSHOT_LOCK:
+        param_file = resolve_param_values_file(file_name)
+        snapshot = read_json_snapshot(param_file) if param_file else None
+        records = _tail_records(file_name)
+    if not records:
+        return param_file, snapshot
+    param_data = thaw(snapshot) if isinstance(snapshot, dict) else {"file_name": file_name}
+    _apply_records(param_data, records)
+    return param_file or param_values_path(file_name), param_data
+
+
+def _write_snapshot(path, param_data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(param_data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def write_param_snapshot(file_name, param_data, keep_journal=False):
+    """
+    Записывает полный снимок параметров проекта (явное сохранение).
+    Снимок содержит всё состояние сессии, поэтому журнал очищается;
+    keep_journal=True оставляет журнал (частичное изменение снимка).
+    Возвращает путь к файлу снимка.
+    """
+    path = param_values_path(file_name)
+    with _SNAPSHOT_LOCK:
+        if keep_journal:
+            _write_snapshot(path, param_data)
+            return path
+        with _APPEND_LOCK:
+            _write_snapshot(path, param_data)
+            journal = param_journal_path(file_name)
+            for stale in (journal, journal + COMPACT_SUFFIX):
+                if os.path.exists(stale):
+                    os.remove(stale)
+            _PENDING.pop(file_name, None)
+    return path
+
+
+def compact_param_journal(file_name):
+    """
+    Сворачивает журнал проекта в снимок. Возвращает число свёрнутых записей.
+    """
+    journal = param_journal_path(file_name)
+    compacting = journal + COMPACT_SUFFIX
+    with _SNAPSHOT_LOCK:
+        with _APPEND_LOCK:
+            _PENDING.pop(file_name, None)
+            if os.path.exists(journal):
+                if os.path.exists(compacting):
+                    # Остаток прерванного сворачивания: дописываем к нему новый журнал
+                    with open(compacting, "a", encoding="utf-8") as dst, open(journal, "r", encoding="utf-8") as src:
+                        dst.write(src.read())
+                    os.remove(journal)
+                else:
+                    os.replace(journal, compacting)
+
+        records = _read_journal(compacting)
+        if not records:
+            if os.path.exists(compacting):
+                os.remove(compacting)
+            return 0
+
+        param_file = resolve_param_values_file(file_name)
+        snapshot = read_json_snapshot(param_file) if param_file else None
+        param_data = thaw(snapshot) if isinstance(snapshot, dict) else {"file_name": file_name}
+        _apply_records(param_data, records)
+        param_data["file_name"] = file_name
+        param_data["timestamp"] = _now()
+        _write_snapshot(param_values_path(file_name), param_data)
+        os.remove(compacting)
+    return len(records)
+
+
+def pending_param_edits(file_name=None):
+    """Число несвёрнутых правок проекта (или всех проектов) в этом процессе"""
+    if file_name is None:
+        return sum(_PENDING.values())
+    return _PENDING.get(file_name, 0)
+
+
+def compact_all_pending():
+    """Сворачивает журналы всех проектов с несвёрнутыми правками"""
+    total = 0
+    for file_name in list(_PENDING):
+        try:
+            total += compact_param_journal(file_name)
+        except Exception:
+            continue
+    return total
+
+
+def _compactor_loop(interval):
+    while True:
+        time.sleep(interval)
+        compact_all_pending()
+
+
+def start_param_compactor(interval=COMPACT_INTERVAL):
+    """Запускает фоновый компактор журналов (один поток на процесс, повторный вызов ничего не делает)"""
+    global _COMPACTOR
+    with _APPEND_LOCK:
+        if _COMPACTOR is not None and _COMPACTOR.is_alive():
+            return _COMPACTOR
+        _COMPACTOR = threading.Thread(
+            target=_compactor_loop, args=(interval,), name="param-journal-compactor", daemon=True
+        )
+        _COMPACTOR.start()
+    return _COMPACTOR
@@ -0,0 +1,379 @@
+# -*- coding: utf-8 -*-
+"""
+Модуль профилирования перезапусков Streamlit-скрипта
+
+Каждый rerun дашборда оформляется как трасса: набор именованных секций
+с временем выполнения, попаданиями/промахами кеша и числом обработанных строк.
+Трассы складываются в кольцевой буфер на уровне процесса и доступны
+в боковой панели «⏱ Производительность» и в виде JSONL-выгрузки.
+
+Streamlit выполняет сессии параллельно в разных потоках, поэтому текущая
+трасса и флаг включения хранятся в threading.local (один rerun — один поток),
+а каждая трасса помечена ключом сессии: боковая панель показывает и очищает
+только трассы своей сессии, переключатель действует только на неё.
+
+Когда профилирование выключено, perf_section() возвращает общий
+заглушечный объект и почти ничего не стоит.
+"""
+import os
+import json
+import time
+import uuid
+import functools
+import threading
+from collections import deque
+from datetime import datetime
+
+# Значение по умолчанию для новых сессий: переменная окружения WB_PERF=1
+_DEFAULT_ENABLED = os.environ.get("WB_PERF", "").strip().lower() in ("1", "true", "yes", "on")
+
+# Кольцевой буфер завершённых трасс (по одной на rerun), общий для процесса
+MAX_TRACES = 50
+_TRACES = deque(maxlen=MAX_TRACES)
+_TRACES_LOCK = threading.Lock()
+
+# Состояние текущего потока: enabled (None — по умолчанию), current — незавершённая трасса
+_local = threading.local()
+
+# Ключи st.session_state: переключатель боковой панели и идентификатор сессии для трасс
+TOGGLE_KEY = "perf_enabled_toggle"
+SESSION_KEY = "_perf_session_id"
+
+
+class _NullSection:
+    """Пустая секция, используется при выключенном профилировании"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def hit(self, count=1):
+        pass
+
+    def miss(self, count=1):
+        pass
+
+    def rows(self, count):
+        pass
+
+
+_NULL_SECTION = _NullSection()
+
+
+class _Section:
+    """Замер одной именованной секции внутри текущей трассы"""
+
+    __slots__ = ("name", "start", "hits", "misses", "row_count")
+
+    def __init__(self, name):
+        self.name = name
+        self.start = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.row_count = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed_ms = (time.perf_counter() - self.start) * 1000.0
+        _add_to_current(self.name, elapsed_ms, self.hits, self.misses, self.row_count)
+        return False
+
+    def hit(self, count=1):
+        """Отмечает попадание в кеш"""
+        self.hits += count
+
+    def miss(self, count=1):
+        """Отмечает промах кеша"""
+        self.misses += count
+
+    def rows(self, count):
+        """Добавляет число обработанных строк"""
+        try:
+            self.row_count += int(count)
+        except (TypeError, ValueError):
+            pass
+
+
+def _current():
+    return getattr(_local, "current", None)
+
+
+def is_perf_enabled():
+    """Возвращает True, если профилирование включено в текущем потоке (rerun сессии)"""
+    enabled = getattr(_local, "enabled", None)
+    return _DEFAULT_ENABLED if enabled is None else enabled
+
+
+def set_perf_enabled(enabled):
+    """Включает или выключает профилирование в текущем потоке; другие сессии не затрагиваются"""
+    _local.enabled = bool(enabled)
+    if not _local.enabled:
+        _local.current = None
+
+
+def session_id(st):
+    """Ключ сессии Streamlit для пометки трасс (создаётся при первом обращении)"""
+    if SESSION_KEY not in st.session_state:
+        st.session_state[SESSION_KEY] = uuid.uuid4().hex[:12]
+    return st.session_state[SESSION_KEY]
+
+
+def _new_trace(label, session=None):
+    return {
+        "label": label,
+        "session": session,
+        "started_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "_t0": time.perf_counter(),
+        "_mark": None,
+        "total_ms": 0.0,
+        "sections": {},
+    }
+
+
+def _add_to_current(name, elapsed_ms, hits=0, misses=0, rows=0):
+    """Добавляет замер в текущую трассу (создаёт её при необходимости)"""
+    current = _current()
+    if current is None:
+        current = _local.current = _new_trace("rerun")
+    sections = current["sections"]
+    stat = sections.get(name)
+    if stat is None:
+        stat = {"calls": 0, "total_ms": 0.0, "max_ms": 0.0, "hits": 0, "misses": 0, "rows": 0}
+        sections[name] = stat
+    stat["calls"] += 1
+    stat["total_ms"] += elapsed_ms
+    if elapsed_ms > stat["max_ms"]:
+        stat["max_ms"] = elapsed_ms
+    stat["hits"] += hits
+    stat["misses"] += misses
+    stat["rows"] += rows
+
+
+def begin_rerun(label="rerun", st=None):
+    """
+    Начинает новую трассу. Вызывается в самом начале скрипта.
+    С модулем st флаг включения берётся из переключателя этой сессии
+    (по умолчанию — WB_PERF), а трасса помечается ключом сессии.
+    Если предыдущая трасса потока не была закрыта (st.stop(), исключение),
+    она закрывается и попадает в буфер.
+    """
+    session = None
+    if st is not None:
+        _local.enabled = bool(st.session_state.get(TOGGLE_KEY, _DEFAULT_ENABLED))
+        session = session_id(st)
+    if not is_perf_enabled():
+        _local.current = None
+        return
+    if _current() is not None:
+        end_rerun()
+    _local.current = _new_trace(label, session)
+
+
+def end_rerun():
+    """Завершает текущую трассу и кладёт её в кольцевой буфер"""
+    trace = _current()
+    if not is_perf_enabled() or trace is None:
+        return
+    _close_checkpoint(time.perf_counter())
+    _local.current = None
+    trace.pop("_mark", None)
+    trace["total_ms"] = (time.perf_counter() - trace.pop("_t0")) * 1000.0
+    with _TRACES_LOCK:
+        _TRACES.append(trace)
+
+
+def perf_section(name):
+    """
+    Контекстный менеджер для замера именованной секции.
+
+    with perf_section("load_hierarchy_config") as sec:
+        ...
+        sec.rows(len(df))
+        sec.hit()  # или sec.miss()
+    """
+    if not is_perf_enabled():
+        return _NULL_SECTION
+    return _Section(name)
+
+
+def _close_checkpoint(now):
+    """Закрывает открытый участок между контрольными точками"""
+    current = _current()
+    if current is None:
+        return
+    mark = current.get("_mark")
+    if mark is not None:
+        current["_mark"] = None
+        _add_to_current(mark[0], (now - mark[1]) * 1000.0)
+
+
+def perf_checkpoint(name):
+    """
+    Контрольная точка: закрывает предыдущий участок и открывает новый с именем name.
+    Удобна для линейного кода скрипта и тел вкладок, которые неудобно
+    оборачивать в with без переформатирования.
+    """
+    if not is_perf_enabled():
+        return
+    now = time.perf_counter()
+    if _current() is None:
+        _local.current = _new_trace("rerun")
+    _close_checkpoint(now)
+    _local.current["_mark"] = (name, now)
+
+
+def perf_timed(name=None):
+    """Декоратор: замеряет каждый вызов функции как секцию"""
+    def decorator(func):
+        section_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not is_perf_enabled():
+                return func(*args, **kwargs)
+            with _Section(section_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_cache(name, hit):
+    """Отмечает попадание/промах кеша без замера времени"""
+    if not is_perf_enabled():
+        return
+    if hit:
+        _add_to_current(name, 0.0, hits=1)
+    else:
+        _add_to_current(name, 0.0, misses=1)
+
+
+def record_rows(name, count):
+    """Отмечает число обработанных строк без замера времени"""
+    if not is_perf_enabled():
+        return
+    try:
+        _add_to_current(name, 0.0, rows=int(count))
+    except (TypeError, ValueError):
+        pass
+
+
+def get_traces(session=None):
+    """Возвращает список завершённых трасс (от старых к новым); session — только трассы этой сессии"""
+    with _TRACES_LOCK:
+        traces = list(_TRACES)
+    if session is not None:
+        traces = [trace for trace in traces if trace.get("session") == session]
+    return traces
+
+
+def clear_traces(session=None):
+    """Очищает кольцевой буфер трасс (session — только трассы этой сессии)"""
+    with _TRACES_LOCK:
+        if session is None:
+            _TRACES.clear()
+            return
+        kept = [trace for trace in _TRACES if trace.get("session") != session]
+        _TRACES.clear()
+        _TRACES.extend(kept)
+
+
+def get_slowest_sections(limit=10, last_n=None, session=None):
+    """
+    Возвращает самые медленные секции по буферу трасс (session — только трассы этой сессии).
+    Каждый элемент: имя, число rerun-ов, вызовы, среднее и максимальное время на rerun,
+    попадания/промахи кеша и строки.
+    """
+    traces = get_traces(session)
+    if last_n:
+        traces = traces[-last_n:]
+
+    summary = {}
+    for trace in traces:
+        for name, stat in trace["sections"].items():
+            agg = summary.get(name)
+            if agg is None:
+                agg = {"section": name, "reruns": 0, "calls": 0, "total_ms": 0.0,
+                       "max_ms": 0.0, "hits": 0, "misses": 0, "rows": 0}
+                summary[name] = agg
+            agg["reruns"] += 1
+            agg["calls"] += stat["calls"]
+            agg["total_ms"] += stat["total_ms"]
+            agg["max_ms"] = max(agg["max_ms"], stat["total_ms"])
+            agg["hits"] += stat["hits"]
+            agg["misses"] += stat["misses"]
+            agg["rows"] += stat["rows"]
+
+    result = []
+    for agg in summary.values():
+        agg["avg_ms"] = agg["total_ms"] / agg["reruns"] if agg["reruns"] else 0.0
+        result.append(agg)
+    result.sort(key=lambda x: x["avg_ms"], reverse=True)
+    return result[:limit] if limit else result
+
+
+def export_traces_jsonl(path=None, session=None):
+    """
+    Выгружает трассы в формате JSONL (одна трасса на строку).
+    Если указан path — дописывает в файл, иначе возвращает строку.
+    """
+    lines = [json.dumps(trace, ensure_ascii=False) for trace in get_traces(session)]
+    content = "\n".join(lines) + ("\n" if lines else "")
+    if path:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(content)
+    return content
+
+
+def render_perf_sidebar(st, limit=10):
+    """Отрисовывает в боковой панели блок «⏱ Производительность» (трассы и переключатель текущей сессии)"""
+    session = session_id(st)
+    with st.sidebar.expander("⏱ Производительность", expanded=False):
+        # Значение переключателя хранится в st.session_state[TOGGLE_KEY] и читается в begin_rerun(st=st)
+        enabled = st.checkbox("Профилирование перезапусков", value=is_perf_enabled(), key=TOGGLE_KEY)
+        if enabled != is_perf_enabled():
+            set_perf_enabled(enabled)
+
+        traces = get_traces(session)
+        if not traces:
+            st.caption("Трасс пока нет. Включите профилирование и взаимодействуйте с дашбордом.")
+            return
+
+        last = traces[-1]
+        avg_total = sum(t["total_ms"] for t in traces) / len(traces)
+        st.caption(
+            f"Трасс в буфере: {len(traces)}/{MAX_TRACES} · "
+            f"последний rerun: {last['total_ms']:.0f} мс · в среднем: {avg_total:.0f} мс"
+        )
+
+        rows = []
+        for item in get_slowest_sections(limit=limit, session=session):
+            rows.append({
+                "Секция": item["section"],
+                "Среднее, мс": round(item["avg_ms"], 1),
+                "Макс, мс": round(item["max_ms"], 1),
+                "Вызовы": item["calls"],
+                "Кеш +/-": f"{item['hits']}/{item['misses']}",
+                "Строки": item["rows"],
+            })
+        if rows:
+            st.dataframe(rows, hide_index=True, use_container_width=True)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                "📥 JSONL",
+                data=export_traces_jsonl(session=session),
+                file_name=f"perf_traces_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl",
+                mime="application/json",
+                key="perf_export_jsonl",
+            )
+        with col2:
+            if st.button("🗑️ Очистить", key="perf_clear_traces"):
+                clear_traces(session)
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Модуль сводной таблицы по периодам для плана продаж (apps/voronka/Plan_prodazh.py)
+
+Столбцы сводной таблицы внутри модуля — целочисленные ключи (год, месяц, неделя ISO);
+месячный столбец имеет неделю 0 и стоит после недель своего месяца. Недельные и
+месячные агрегаты считаются одним groupby по ключам: для средних хранятся сумма и
+число значений, поэтому среднее за месяц равно среднему по исходным строкам месяца.
+
+Подписи столбцов ("2025.9 (нед. 39)", "2025.09") строятся только для отображения —
+label_columns; обратный разбор подписи — parse_period_label (с кешем).
+"""
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Неделя 0 в ключе — месячный столбец
+MONTH_WEEK = 0
+
+_LABEL_RE = re.compile(r'^\s*(\d{4})\.(\d{1,2})(?:\s*\(нед\.\s*(\d{1,2})\))?\s*$')
+
+
+def week_label(year, month, week):
+    """Подпись недельного столбца (как Неделя_Год): "2025.9 (нед. 39)" """
+    return f"{int(year)}.{int(month)} (нед. {int(week)})"
+
+
+def month_label(year, month):
+    """Подпись месячного столбца (как Месяц_Год): "2025.09" """
+    return f"{int(year)}.{int(month):02d}"
+
+
+def period_label(key):
+    """Подпись столбца по ключу (год, месяц, неделя); неделя 0 — месяц"""
+    year, month, week = key
+    if week == MONTH_WEEK:
+        return month_label(year, month)
+    return week_label(year, month, week)
+
+
+@lru_cache(maxsize=4096)
+def parse_period_label(label):
+    """
+    Ключ (год, месяц, неделя) по подписи столбца или None для прочих столбцов.
+    Понимает оба формата месяца ("2025.9" и "2025.09") и недели ("нед. 5" и "нед. 05").
+    """
+    match = _LABEL_RE.match(str(label))
+    if not match:
+        return None
+    year, month, week = match.groups()
+    return int(year), int(month), int(week) if week else MONTH_WEEK
+
+
+def _column_order(key):
+    # Недели месяца по возрастанию, затем месячный столбец
+    year, month, week = key
+    return year, month, week if week != MONTH_WEEK else 99
+
+
+def build_period_pivot(df, date_col, agg):
+    """
+    Сводная таблица: строки — показатели agg ({столбец: 'sum' | 'mean'}),
+    столбцы — ключи (год, месяц, неделя) в порядке «недели месяца, затем месяц».
+    Строки без корректной даты не попадают в таблицу.
+    """
+    columns = list(agg)
+    dates = pd.to_datetime(df[date_col], errors='coerce')
+    valid = dates.notna().to_numpy()
+    dates = dates[valid]
+    keys = [
+        dates.dt.year.to_numpy(dtype='int64'),
+        dates.dt.month.to_numpy(dtype='int64'),
+        dates.dt.isocalendar().week.to_numpy(dtype='int64'),
+    ]
+    values = df.loc[valid, columns].astype('float64')
+
+    grouped = values.groupby(keys, sort=False)
+    sums = grouped.sum()
+    counts = grouped.count()
+    month_sums = sums.groupby(level=[0, 1], sort=False).sum()
+    month_counts = counts.groupby(level=[0, 1], sort=False).sum()
+
+    mean_cols = [col for col in columns if agg[col] == 'mean']
+    weekly = sums.copy()
+    monthly = month_sums.copy()
+    if mean_cols:
+        weekly[mean_cols] = sums[mean_cols] / counts[mean_cols]
+        monthly[mean_cols] = month_sums[mean_cols] / month_counts[mean_cols]
+    monthly.index = pd.MultiIndex.from_arrays([
+        monthly.index.get_level_values(0),
+        monthly.index.get_level_values(1),
+        np.full(len(monthly), MONTH_WEEK, dtype='int64'),
+    ])
+
+    table = pd.concat([weekly, monthly])
+    table.index = [tuple(int(v) for v in key) for key in table.index]
+    order = sorted(table.index, key=_column_order)
+    return table.loc[order].T
+
+
+def add_period_columns(pivot, keys, fill=0.0):
+    """
+    Добавляет недостающие столбцы-ключи (например, будущие недели плана без данных)
+    и восстанавливает порядок «недели месяца, затем месяц».
+    """
+    present = set(pivot.columns)
+    missing = [tuple(key) for key in keys if tuple(key) not in present]
+    if not missing:
+        return pivot
+    extended = pd.concat([pivot, pd.DataFrame(fill, index=pivot.index, columns=missing)], axis=1)
+    return extended[sorted(extended.columns, key=_column_order)]
+
+
+def label_columns(pivot):
+    """Копия таблицы с подписями вместо ключей (столбцы без ключа остаются как есть)"""
+    labeled = pivot.copy()
+    labeled.columns = [period_label(col) if isinstance(col, tuple) else col for col in pivot.columns]
+    return labeled
+
+
+def month_week_columns(columns):
+    """
+    {месячный столбец: [недельные столбцы того же (год, месяц)]} по подписям столбцов.
+    Формат подписи месяца ("2025.9" или "2025.09") не важен — сравниваются ключи.
+    """
+    weeks_by_month = {}
+    months = []
+    for col in columns:
+        key = parse_period_label(col)
+        if key is None:
+            continue
+        if key[2] == MONTH_WEEK:
+            months.append((col, key[:2]))
+        else:
+            weeks_by_month.setdefault(key[:2], []).append(col)
+    return {col: weeks_by_month.get(month, []) for col, month in months}
+
+
+def overlay_plan(columns, week_values, how='sum', default=0.0):
+    """
+    Строка плана для столбцов таблицы: недели — из week_values ({подпись недели: значение}),
+    месяцы — сумма ('sum') или среднее ('mean') по своим неделям,
+    прочие столбцы (например, «Общие по месяцам») — 0.0.
+    """
+    columns = list(columns)
+    keys = [parse_period_label(col) for col in columns]
+    is_week = np.array([key is not None and key[2] != MONTH_WEEK for key in keys])
+    values = np.zeros(len(columns), dtype='float64')
+    values[is_week] = [float(week_values.get(col, default)) for col, flag in zip(columns, is_week) if flag]
+
+    if is_week.any():
+        week_months = pd.MultiIndex.from_tuples([keys[i][:2] for i in np.flatnonzero(is_week)])
+        week_series = pd.Series(values[is_week], index=week_months)
+        by_month = week_series.groupby(level=[0, 1]).agg(how)
+        for i, key in enumerate(keys):
+            if key is not None and key[2] == MONTH_WEEK:
+                values[i] = float(by_month.get(key[:2], 0.0))
+    return values
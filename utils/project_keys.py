@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+"""
+Модуль стабильных ключей проектов для файлов параметров, истории и настроек
+
+Раньше имена файлов строились как hash(current_file) % 1000000. Хеш строк в Python
+рандомизирован для каждого процесса, поэтому после перезапуска создавался новый
+param_values_<n>.json, а старый становился «сиротой».
+
+Ключ проекта — первые 12 hex-символов SHA-1 от имени файла (нормализация NFC),
+он одинаков во всех процессах. Путь к файлу проекта вычисляется напрямую,
+без перебора файлов и реестра.
+
+migrate_project_files() объединяет старые файлы с числовыми суффиксами
+в файлы со стабильными ключами и убирает сирот.
+"""
+import os
+import re
+import json
+import glob
+import shutil
+import hashlib
+import unicodedata
+from datetime import datetime
+
+PROJECT_KEY_LENGTH = 12
+
+FILE_PARAMS_REGISTRY = "file_params_registry.json"
+FILE_SETTINGS_REGISTRY = "file_settings_registry.json"
+LEGACY_BACKUP_DIR = os.path.join("backups", "legacy_project_files")
+
+PARAM_VALUES_PREFIX = "param_values_"
+PARAM_HISTORY_PREFIX = "param_history_"
+PARAM_JOURNAL_PREFIX = "param_journal_"
+MAIN_PAGE_SETTINGS_PREFIX = "main_page_settings_"
+
+# Старые имена: префикс + hash(...) % 1000000 (неотрицательное число до 6 цифр)
+_LEGACY_SUFFIX = re.compile(r"^\d{1,6}$")
+
+
+def project_key(file_name):
+    """Стабильный ключ проекта по имени файла (одинаков во всех процессах)"""
+    normalized = unicodedata.normalize("NFC", str(file_name)).strip()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:PROJECT_KEY_LENGTH]
+
+
+def _project_path(prefix, file_name, root):
+    name = f"{prefix}{project_key(file_name)}.json"
+    return os.path.join(root, name) if root else name
+
+
+def param_values_path(file_name, root=None):
+    """Путь к файлу параметров проекта"""
+    return _project_path(PARAM_VALUES_PREFIX, file_name, root)
+
+
+def param_history_path(file_name, root=None):
+    """Путь к файлу истории изменений параметров проекта"""
+    return _project_path(PARAM_HISTORY_PREFIX, file_name, root)
+
+
+def param_journal_path(file_name, root=None):
+    """Путь к журналу правок параметров проекта (JSONL, см. utils.param_journal)"""
+    name = f"{PARAM_JOURNAL_PREFIX}{project_key(file_name)}.jsonl"
+    return os.path.join(root, name) if root else name
+
+
+def main_page_settings_path(file_name, root=None):
+    """Путь к файлу настроек главной страницы проекта"""
+    return _project_path(MAIN_PAGE_SETTINGS_PREFIX, file_name, root)
+
+
+def _resolve(file_name, stable_path, registry_file, registry_field, root):
+    """Стабильный файл, если он есть; иначе запись реестра (файлы до миграции)"""
+    if os.path.exists(stable_path):
+        return stable_path
+    # Импорт здесь: ключи используются и скриптами, которым кеш снимков не нужен
+    from utils.boot_state import read_json_snapshot
+    registry = read_json_snapshot(os.path.join(root or "", registry_file), {})
+    entry = registry.get(file_name) if isinstance(registry, dict) else None
+    if isinstance(entry, dict) and entry.get(registry_field):
+        legacy_path = os.path.join(root or "", entry[registry_field])
+        if os.path.exists(legacy_path):
+            return legacy_path
+    return None
+
+
+def resolve_param_values_file(file_name, root=None):
+    """Путь к существующему файлу параметров проекта или None"""
+    if not file_name:
+        return None
+    return _resolve(file_name, param_values_path(file_name, root),
+                    FILE_PARAMS_REGISTRY, "param_file", root)
+
+
+def resolve_main_page_settings_file(file_name, root=None):
+    """Путь к существующему файлу настроек главной страницы проекта или None"""
+    if not file_name:
+        return None
+    return _resolve(file_name, main_page_settings_path(file_name, root),
+                    FILE_SETTINGS_REGISTRY, "settings_file", root)
+
+
+def is_legacy_project_file(path, prefix):
+    """True, если файл назван по старой схеме prefix<hash % 1000000>.json"""
+    name = os.path.basename(path)
+    if not (name.startswith(prefix) and name.endswith(".json")):
+        return False
+    return bool(_LEGACY_SUFFIX.match(name[len(prefix):-len(".json")]))
+
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def _write_json(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _sort_key(data, stamp_field, path):
+    """Порядок версий: по метке времени в файле, затем по mtime"""
+    stamp = str(data.get(stamp_field) or "")
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = 0
+    return (stamp, mtime)
+
+
+def _merge_unique(target, items):
+    for item in items or []:
+        if item not in target:
+            target.append(item)
+    return target
+
+
+def _merge_param_values(versions):
+    """
+    Объединяет версии param_values_*.json одного проекта (от старой к новой).
+    Значения параметров: более новая версия перекрывает старую по каждому SKU.
+    Варианты параметров объединяются.
+    Удаления применяются по порядку версий: удалённый параметр теряет значения
+    и варианты из более старых версий, а если более новая версия снова содержит
+    его значения или варианты, он считается добавленным заново и из deleted_params
+    убирается. Внутри одной версии удаление сильнее.
+    """
+    merged_values = {}
+    merged_options = {}
+    deleted = []
+    timestamp = ""
+    for data in versions:
+        version_deleted = set(data.get("deleted_params") or [])
+        for param_name, sku_values in (data.get("param_values") or {}).items():
+            if isinstance(sku_values, dict) and param_name not in version_deleted:
+                merged_values.setdefault(param_name, {}).update(sku_values)
+                if param_name in deleted:
+                    deleted.remove(param_name)
+        for param_name, options in (data.get("param_options") or {}).items():
+            if isinstance(options, list) and param_name not in version_deleted:
+                _merge_unique(merged_options.setdefault(param_name, []), options)
+                if param_name in deleted:
+                    deleted.remove(param_name)
+        # Удалённые в этой версии параметры не должны «воскресать» из старых
+        for param_name in data.get("deleted_params") or []:
+            merged_values.pop(param_name, None)
+            merged_options.pop(param_name, None)
+        _merge_unique(deleted, data.get("deleted_params"))
+        timestamp = max(timestamp, str(data.get("timestamp") or ""))
+
+    return {
+        "param_values": merged_values,
+        "param_options": merged_options,
+        "deleted_params": deleted,
+        "timestamp": timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def _merge_param_history(versions):
+    """Объединяет истории изменений без дублей, новые записи сверху"""
+    seen = set()
+    history = []
+    last_updated = ""
+    for data in versions:
+        for item in data.get("history") or []:
+            if not isinstance(item, dict):
+                continue
+            key = json.dumps(item, ensure_ascii=False, sort_keys=True)
+            if key in seen:
+                continue
+            seen.add(key)
+            history.append(item)
+        last_updated = max(last_updated, str(data.get("last_updated") or ""))
+    history.sort(key=lambda x: str(x.get("timestamp", "")), reverse=True)
+    return {
+        "history": history,
+        "last_updated": last_updated or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def _merge_settings(versions):
+    """Настройки главной страницы: берётся последняя версия"""
+    latest = versions[-1]
+    return {
+        "settings": latest.get("settings", {}),
+        "timestamp": latest.get("timestamp") or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+# prefix -> (поле метки времени, функция объединения, стабильный путь, реестр, поле реестра)
+_KINDS = {
+    PARAM_VALUES_PREFIX: ("timestamp", _merge_param_values, param_values_path,
+                          FILE_PARAMS_REGISTRY, "param_file"),
+    PARAM_HISTORY_PREFIX: ("last_updated", _merge_param_history, param_history_path,
+                           None, None),
+    MAIN_PAGE_SETTINGS_PREFIX: ("timestamp", _merge_settings, main_page_settings_path,
+                                FILE_SETTINGS_REGISTRY, "settings_file"),
+}
+
+
+def find_legacy_project_files(root="."):
+    """
+    Находит файлы старой схемы и группирует их по проекту.
+    Возвращает {prefix: {file_name: [пути]}} и список нечитаемых/безымянных файлов.
+    """
+    groups = {prefix: {} for prefix in _KINDS}
+    unreadable = []
+    for prefix in _KINDS:
+        for path in glob.glob(os.path.join(root, f"{prefix}*.json")):
+            if not is_legacy_project_file(path, prefix):
+                continue
+            data = _read_json(path)
+            file_name = data.get("file_name") if isinstance(data, dict) else None
+            if not file_name:
+                unreadable.append(path)
+                continue
+            groups[prefix].setdefault(file_name, []).append(path)
+    return groups, unreadable
+
+
+def migrate_project_files(root=".", apply=False, delete=False, backup_dir=None):
+    """
+    Переводит файлы проектов на стабильные ключи и собирает мусор.
+
+    Для каждого проекта все версии (старые файлы и уже существующий стабильный файл)
+    объединяются и записываются в файл со стабильным ключом, реестры
+    file_params_registry.json и file_settings_registry.json указывают на новые файлы.
+    Старые файлы переносятся в backups/legacy_project_files (или удаляются при delete=True).
+
+    Записи реестров, указывающие на несуществующие файлы, удаляются.
+
+    При apply=False ничего не меняет и только возвращает план.
+    Возвращает словарь-отчёт: projects, written, removed, pruned, unreadable.
+    """
+    if backup_dir is None:
+        backup_dir = os.path.join(root, LEGACY_BACKUP_DIR)
+
+    groups, unreadable = find_legacy_project_files(root)
+    report = {"projects": {}, "written": [], "removed": [], "pruned": [], "unreadable": unreadable}
+
+    registries = {}
+    for registry_file in (FILE_PARAMS_REGISTRY, FILE_SETTINGS_REGISTRY):
+        registry = _read_json(os.path.join(root, registry_file))
+        registries[registry_file] = registry if isinstance(registry, dict) else {}
+
+    for prefix, projects in groups.items():
+        stamp_field, merge, stable_path, registry_file, registry_field = _KINDS[prefix]
+        for file_name, paths in projects.items():
+            target = stable_path(file_name, root)
+            sources = list(paths)
+            if os.path.exists(target):
+                sources.append(target)
+
+            versions = []
+            for path in sources:
+                data = _read_json(path)
+                if isinstance(data, dict):
+                    versions.append((_sort_key(data, stamp_field, path), data))
+            versions.sort(key=lambda x: x[0])
+
+            report["projects"].setdefault(file_name, {})[prefix] = {
+                "target": os.path.basename(target),
+                "legacy_files": sorted(os.path.basename(p) for p in paths),
+            }
+            if not apply or not versions:
+                continue
+
+            merged = {"file_name": file_name}
+            merged.update(merge([data for _, data in versions]))
+            _write_json(target, merged)
+            report["written"].append(target)
+
+            if registry_file:
+                registries[registry_file][file_name] = {
+                    registry_field: os.path.basename(target),
+                    "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                }
+
+            for path in paths:
+                if delete:
+                    os.remove(path)
+                else:
+                    os.makedirs(backup_dir, exist_ok=True)
+                    shutil.move(path, os.path.join(backup_dir, os.path.basename(path)))
+                report["removed"].append(path)
+
+    # Висячие записи реестров (файл удалён или перенесён)
+    registry_fields = {FILE_PARAMS_REGISTRY: "param_file", FILE_SETTINGS_REGISTRY: "settings_file"}
+    for registry_file, registry in registries.items():
+        field = registry_fields[registry_file]
+        for file_name, entry in list(registry.items()):
+            target = entry.get(field) if isinstance(entry, dict) else None
+            if target and os.path.exists(os.path.join(root, target)):
+                continue
+            report["pruned"].append((registry_file, file_name))
+            if apply:
+                del registry[file_name]
+        if apply and os.path.exists(os.path.join(root, registry_file)):
+            _write_json(os.path.join(root, registry_file), registry)
+
+    return report
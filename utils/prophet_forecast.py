@@ -1,24 +1,38 @@
 # -*- coding: utf-8 -*-
 """
 Модуль для прогнозирования с помощью Prophet
+
+Кроме Prophet доступен быстрый векторизованный движок (utils.fast_forecast):
+create_prophet_forecast(..., engine="fast").
 """
 import pandas as pd
 from datetime import datetime, timedelta
 
-# Импорт Prophet с обработкой ошибок
-try:
-    from prophet import Prophet
-    from prophet.plot import plot_plotly, plot_components_plotly
-    PROPHET_AVAILABLE = True
-except ImportError:
-    PROPHET_AVAILABLE = False
+from utils.lazy import LazyModule, module_available
+from utils.fast_forecast import FastForecastModel, create_fast_forecast
+
+# Prophet (и Stan-бэкенд) тяжёлый: проверяем наличие без импорта,
+# сам модуль загружается при первом построении прогноза
+PROPHET_AVAILABLE = module_available("prophet")
+prophet = LazyModule("prophet")
+prophet_plot = LazyModule("prophet.plot")
+go = LazyModule("plotly.graph_objects")
+plotly_subplots = LazyModule("plotly.subplots")
+
+# Движки прогноза: ключ -> название для интерфейса
+FORECAST_ENGINE_NAMES = {
+    "prophet": "Prophet",
+    "fast": "Быстрый (NumPy)",
+}
+
+
+def available_forecast_engines():
+    """Движки, доступные в текущем окружении"""
+    return [name for name in FORECAST_ENGINE_NAMES if name != "prophet" or PROPHET_AVAILABLE]
 
 
 def prepare_data_for_prophet(df, metric_column, date_column=None):
-    """Подготавливает данные для Prophet"""
-    if not PROPHET_AVAILABLE:
-        return None
-    
+    """Подготавливает данные для Prophet (и быстрого движка)"""
     # Если нет колонки с датами, создаем искусственную временную последовательность
     if date_column is None or date_column not in df.columns:
         # Создаем даты на основе индекса
@@ -41,14 +55,22 @@ def prepare_data_for_prophet(df, metric_column, date_column=None):
     return df_prophet
 
 
-def create_prophet_forecast(df_prophet, periods=30, seasonality_mode='additive'):
-    """Создает прогноз с помощью Prophet"""
+def create_prophet_forecast(df_prophet, periods=30, seasonality_mode='additive', engine='prophet'):
+    """
+    Создает прогноз с помощью Prophet или быстрого движка (engine='fast').
+    Ошибки быстрого движка не глотаются: вызывающий код показывает их пользователю.
+    """
+    if engine == 'fast':
+        if df_prophet is None or len(df_prophet) < 2:
+            return None, None, None
+        return create_fast_forecast(df_prophet, periods=periods, seasonality_mode=seasonality_mode)
+
     if not PROPHET_AVAILABLE or df_prophet is None or len(df_prophet) < 2:
         return None, None, None
     
     try:
         # Создаем модель Prophet
-        model = Prophet(
+        model = prophet.Prophet(
             seasonality_mode=seasonality_mode,
             daily_seasonality=True,
             weekly_seasonality=True,
@@ -73,12 +95,14 @@ def create_prophet_forecast(df_prophet, periods=30, seasonality_mode='additive')
 
 def plot_prophet_forecast(model, forecast, title="Прогноз Prophet"):
     """Создает график прогноза с помощью plotly"""
+    if isinstance(model, FastForecastModel):
+        return _plot_fast_forecast(model, forecast, title)
     if not PROPHET_AVAILABLE or model is None or forecast is None:
         return None
     
     try:
         # Создаем график с помощью Prophet
-        fig = plot_plotly(model, forecast)
+        fig = prophet_plot.plot_plotly(model, forecast)
         
         # Обновляем заголовок
         fig.update_layout(
@@ -97,12 +121,14 @@ def plot_prophet_forecast(model, forecast, title="Прогноз Prophet"):
 
 def plot_prophet_components(model, forecast, title="Компоненты прогноза"):
     """Создает график компонентов прогноза"""
+    if isinstance(model, FastForecastModel):
+        return _plot_fast_components(model, forecast, title)
     if not PROPHET_AVAILABLE or model is None or forecast is None:
         return None
     
     try:
         # Создаем график компонентов
-        fig = plot_components_plotly(model, forecast)
+        fig = prophet_plot.plot_components_plotly(model, forecast)
         
         # Обновляем заголовок
         fig.update_layout(title=title)
@@ -113,28 +139,61 @@ def plot_prophet_components(model, forecast, title="Компоненты про
         return None
 
 
+def _plot_fast_forecast(model, forecast, title):
+    """График прогноза быстрого движка в стиле plot_plotly"""
+    try:
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(
+            x=forecast['ds'], y=forecast['yhat_upper'], mode='lines',
+            line=dict(width=0), showlegend=False, hoverinfo='skip'
+        ))
+        fig.add_trace(go.Scatter(
+            x=forecast['ds'], y=forecast['yhat_lower'], mode='lines', line=dict(width=0),
+            fill='tonexty', fillcolor='rgba(0, 114, 178, 0.2)', name='Интервал'
+        ))
+        fig.add_trace(go.Scatter(
+            x=forecast['ds'], y=forecast['yhat'], mode='lines',
+            line=dict(color='#0072B2', width=2), name='Прогноз'
+        ))
+        fig.add_trace(go.Scatter(
+            x=model.history['ds'], y=model.history['y'], mode='markers',
+            marker=dict(color='black', size=4), name='Факт'
+        ))
+        fig.update_layout(
+            title=title,
+            xaxis_title="Дата",
+            yaxis_title="Значение",
+            width=1000,
+            height=600
+        )
+        return fig
+    except Exception as e:
+        return None
 
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+def _plot_fast_components(model, forecast, title):
+    """График компонентов быстрого движка: тренд, недельная и годовая сезонность"""
+    try:
+        components = [("trend", "Тренд")]
+        if forecast['weekly'].abs().sum() > 0:
+            components.append(("weekly", "Недельная сезонность"))
+        if forecast['yearly'].abs().sum() > 0:
+            components.append(("yearly", "Годовая сезонность"))
+
+        fig = plotly_subplots.make_subplots(
+            rows=len(components), cols=1, subplot_titles=[name for _, name in components]
+        )
+        for row, (column, name) in enumerate(components, 1):
+            if column == "weekly":
+                # Одна неделя: среднее значение компоненты по дням недели
+                weekly = forecast.groupby(forecast['ds'].dt.dayofweek)['weekly'].mean()
+                days = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]
+                fig.add_trace(go.Scatter(x=[days[d] for d in weekly.index], y=weekly.values,
+                                         mode='lines+markers', name=name), row=row, col=1)
+            else:
+                fig.add_trace(go.Scatter(x=forecast['ds'], y=forecast[column],
+                                         mode='lines', name=name), row=row, col=1)
+        fig.update_layout(title=title, showlegend=False, height=300 * len(components))
+        return fig
+    except Exception as e:
+        return None
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+Модуль куба агрегатов для анализа «Год vs Год» (apps/analytics_45)
+
+Куб — заранее свёрнутые продажи с ключом
+    (Год, Месяц, Неделя ISO, Дата, Артикул продавца, Артикул WB)
+и только аддитивными мерами (штуки, суммы, переходы, корзина), поэтому любой
+срез графиков (по годам, месяцам, неделям, дням, периоду Grouper) получается
+суммированием строк куба без обращения к полному кешу данных.
+
+Куб хранится рядом с кешем данных (data_cube.csv) вместе с подписью кеша,
+из которого он собран (data_cube.json: mtime_ns и размер манифеста
+data_cache/_meta.json, который переписывается при каждом изменении кеша).
+При загрузке новых отчётов куб не пересобирается целиком: строки за период
+загрузки (или с теми же ключами) заменяются свёрткой новых строк — update_cube.
+
+Годы нигде не перечисляются: срезы и сводные таблицы строятся по годам,
+которые есть в кубе.
+"""
+import os
+import json
+
+import pandas as pd
+
+from utils.columnar_cache import manifest_path
+
+CUBE_FILE = "data_cube.csv"
+CUBE_META_FILE = "data_cube.json"
+
+CUBE_KEYS = ['Год', 'Месяц', 'Неделя', 'Дата', 'Артикул продавца', 'Артикул WB']
+CUBE_MEASURES = [
+    'Заказали, шт',
+    'Выкупили, шт',
+    'Заказали на сумму, ₽',
+    'Выкупили на сумму, ₽',
+    'Переходы в карточку',
+    'Положили в корзину',
+]
+
+# Ключ строки исходных данных (как в кеше данных)
+ROW_KEYS = ['Дата', 'Артикул WB', 'Артикул продавца']
+
+# Куб в памяти процесса: путь -> ((mtime_ns, size), DataFrame), общий для всех сессий
+_CUBE_CACHE = {}
+
+# Подпись кеша данных берётся по его манифесту
+SOURCE_FILE = manifest_path()
+
+# Уровень «по дням без артикулов» для последнего запрошенного куба: (куб, свёртка)
+_DAY_LEVEL = [None, None]
+
+
+def month_label(month):
+    """Название месяца в том же виде, что и Месяц_название (strftime('%B'))"""
+    return pd.Timestamp(2000, int(month), 1).strftime('%B')
+
+
+def _file_signature(path):
+    try:
+        st_ = os.stat(path)
+    except OSError:
+        return None
+    return [st_.st_mtime_ns, st_.st_size]
+
+
+def _meta_path(cube_file):
+    if cube_file == CUBE_FILE:
+        return CUBE_META_FILE
+    return os.path.splitext(cube_file)[0] + ".json"
+
+
+def _normalize(cube):
+    """Типы ключей: целые год/месяц/неделя (8 и 8.0 иначе дают две группы), дата — datetime"""
+    cube['Дата'] = pd.to_datetime(cube['Дата'])
+    for col in ('Год', 'Месяц', 'Неделя'):
+        cube[col] = pd.to_numeric(cube[col], errors='coerce').fillna(0).astype('int32')
+    for col in CUBE_MEASURES:
+        if col in cube.columns:
+            cube[col] = pd.to_numeric(cube[col], errors='coerce').fillna(0)
+    return cube
+
+
+def build_cube(df):
+    """
+    Сворачивает исходные строки (Дата, артикулы, меры) в куб.
+    Дубли по (Дата, Артикул WB, Артикул продавца) отбрасываются (keep='last'), как в кеше.
+    """
+    if df is None or df.empty:
+        return pd.DataFrame(columns=CUBE_KEYS + CUBE_MEASURES)
+    measures = [col for col in CUBE_MEASURES if col in df.columns]
+    rows = df[[col for col in ROW_KEYS if col in df.columns] + measures].copy()
+    if all(col in rows.columns for col in ROW_KEYS):
+        rows = rows.drop_duplicates(subset=ROW_KEYS, keep='last')
+    rows['Дата'] = pd.to_datetime(rows['Дата']).dt.normalize()
+    rows['Год'] = rows['Дата'].dt.year
+    rows['Месяц'] = rows['Дата'].dt.month
+    rows['Неделя'] = rows['Дата'].dt.isocalendar().week.astype('int32')
+    for col in measures:
+        rows[col] = pd.to_numeric(rows[col], errors='coerce').fillna(0)
+    cube = rows.groupby(CUBE_KEYS, sort=True, observed=True)[measures].sum().reset_index()
+    return _normalize(cube)
+
+
+def update_cube(cube, new_rows, date_from=None, date_to=None):
+    """
+    Инкрементально обновляет куб новыми строками.
+    date_from/date_to заданы — строки куба за этот период заменяются целиком
+    (как в merge_uploaded_files_to_cache); иначе заменяются только строки
+    с теми же (Дата, Артикул WB, Артикул продавца), что и в new_rows.
+    """
+    fresh = build_cube(new_rows)
+    if cube is None or cube.empty:
+        return fresh
+    if fresh.empty and date_from is None:
+        return cube
+    if date_from is not None or date_to is not None:
+        keep = pd.Series(True, index=cube.index)
+        if date_from is not None and date_to is not None:
+            keep = (cube['Дата'] < pd.Timestamp(date_from)) | (cube['Дата'] > pd.Timestamp(date_to))
+        elif date_from is not None:
+            keep = cube['Дата'] < pd.Timestamp(date_from)
+        else:
+            keep = cube['Дата'] > pd.Timestamp(date_to)
+    else:
+        cube_keys = pd.MultiIndex.from_frame(cube[ROW_KEYS])
+        fresh_keys = pd.MultiIndex.from_frame(fresh[ROW_KEYS])
+        keep = ~cube_keys.isin(fresh_keys)
+    updated = pd.concat([cube.loc[keep], fresh], ignore_index=True)
+    return updated.sort_values(CUBE_KEYS, kind='mergesort').reset_index(drop=True)
+
+
+def save_cube(cube, cache_file=SOURCE_FILE, cube_file=CUBE_FILE):
+    """Сохраняет куб и подпись кеша данных, из которого он собран"""
+    try:
+        cube.to_csv(cube_file, index=False, encoding='utf-8-sig')
+        with open(_meta_path(cube_file), "w", encoding="utf-8") as f:
+            json.dump({"source": _file_signature(cache_file), "rows": int(len(cube))}, f)
+        _CUBE_CACHE.pop(cube_file, None)
+        return True
+    except Exception:
+        return False
+
+
+def load_cube(cache_file=SOURCE_FILE, cube_file=CUBE_FILE):
+    """
+    Куб, собранный из текущего кеша данных, или None (куба нет или кеш с тех пор менялся).
+    Результат общий для всех сессий — не изменять, при необходимости брать .copy().
+    """
+    try:
+        with open(_meta_path(cube_file), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except Exception:
+        return None
+    if meta.get("source") != _file_signature(cache_file):
+        return None
+    signature = _file_signature(cube_file)
+    if signature is None:
+        return None
+    cached = _CUBE_CACHE.get(cube_file)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    try:
+        cube = _normalize(pd.read_csv(cube_file, encoding='utf-8-sig'))
+    except Exception:
+        return None
+    _CUBE_CACHE[cube_file] = (signature, cube)
+    return cube
+
+
+def get_cube(df, cache_file=SOURCE_FILE, cube_file=CUBE_FILE):
+    """Куб для текущего кеша: с диска, если он актуален, иначе собирается из df и сохраняется"""
+    cube = load_cube(cache_file, cube_file)
+    if cube is not None:
+        return cube
+    cube = build_cube(df)
+    if save_cube(cube, cache_file, cube_file):
+        _CUBE_CACHE[cube_file] = (_file_signature(cube_file), cube)
+    return cube
+
+
+def day_level(cube):
+    """
+    Куб без артикулов: (Год, Месяц, Неделя, Дата) и меры — в число артикулов раз меньше.
+    Для графиков без выбора товара. Считается один раз на объект куба.
+    """
+    if _DAY_LEVEL[0] is cube:
+        return _DAY_LEVEL[1]
+    level = rollup(cube, CUBE_KEYS[:4])
+    _DAY_LEVEL[0], _DAY_LEVEL[1] = cube, level
+    return level
+
+
+def slice_cube(cube, date_from=None, date_to=None, wb_article=None, years=None, months=None):
+    """Срез куба по диапазону дат, артикулу WB, годам и месяцам"""
+    mask = pd.Series(True, index=cube.index)
+    if date_from is not None:
+        mask &= cube['Дата'] >= pd.Timestamp(date_from)
+    if date_to is not None:
+        mask &= cube['Дата'] <= pd.Timestamp(date_to)
+    if wb_article is not None:
+        if 'Артикул WB' not in cube.columns:
+            raise ValueError("срез по артикулу недоступен для куба без артикулов (day_level)")
+        mask &= cube['Артикул WB'] == wb_article
+    if years is not None:
+        mask &= cube['Год'].isin(list(years))
+    if months is not None:
+        mask &= cube['Месяц'].isin(list(months))
+    return cube.loc[mask]
+
+
+def cube_years(cube):
+    """Годы, которые есть в кубе (по возрастанию)"""
+    return sorted(int(y) for y in cube['Год'].unique())
+
+
+def _measures(cube, measures):
+    if measures is None:
+        return [col for col in CUBE_MEASURES if col in cube.columns]
+    return [col for col in measures if col in cube.columns]
+
+
+def rollup(cube, by, measures=None):
+    """Сумма мер по измерениям by (список колонок куба)"""
+    by = [by] if isinstance(by, str) else list(by)
+    measures = _measures(cube, measures)
+    return cube.groupby(by, sort=True, observed=True)[measures].sum().reset_index()
+
+
+def rollup_by_period(cube, freq, measures=None):
+    """Сумма мер по периодам pd.Grouper(key='Дата', freq=freq): сначала по дням, затем по периодам"""
+    daily = rollup(cube, 'Дата', measures)
+    measures = _measures(cube, measures)
+    return daily.groupby(pd.Grouper(key='Дата', freq=freq))[measures].sum().reset_index()
+
+
+def pivot_by_year(cube, index, measures=None):
+    """
+    Сводная таблица «измерение × год»: строки — значения index, колонки — (мера, год).
+    Отсутствующие сочетания заполняются нулями.
+    """
+    index = [index] if isinstance(index, str) else list(index)
+    measures = _measures(cube, measures)
+    grouped = rollup(cube, index + ['Год'], measures)
+    wide = grouped.pivot_table(index=index, columns='Год', values=measures, aggfunc='sum', fill_value=0)
+    return wide.sort_index()
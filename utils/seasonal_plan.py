@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Генератор сезонного плана по неделям для плана продаж (apps/voronka/Plan_prodazh.py)
+
+Недельная кривая строится из процентов по месяцам ({месяц: %}) одним векторным
+расчётом: процент месяца, плавный переход к соседним месяцам по позиции недели
+в месяце (1–5), синусоидальная вариация внутри месяца и сезонный коэффициент.
+Случайные колебания добавляются только при заданном seed и воспроизводимы,
+поэтому одинаковые настройки всегда дают одинаковый план.
+
+build_seasonal_plan за один вызов возвращает «Заказ план», «Продажа план»
+(заказы × % выкупа) и «Рентабельность план» для недельных столбцов таблицы.
+"""
+import numpy as np
+import pandas as pd
+
+from .period_pivot import MONTH_WEEK, parse_period_label
+
+# Сезонные коэффициенты по месяцам (прочие месяцы — 1.0)
+ORDERS_SEASONALITY = {12: 1.15, 1: 1.15, 6: 0.9, 7: 0.9, 8: 0.9, 3: 1.08, 4: 1.08}
+RENTABILITY_SEASONALITY = {12: 0.95, 1: 0.95, 6: 1.05, 7: 1.05, 8: 1.05, 2: 1.02, 3: 1.02}
+
+# Недели, значение которых заменяется средним соседних недель (провалы на стыке месяцев)
+SMOOTHED_WEEKS = (39, 40, 45, 49)
+
+# Доля влияния предыдущего и следующего месяца по позиции недели в месяце (1–5)
+_PREV_WEIGHT = np.array([0.2, 0.1, 0.025, 0.0, 0.0])
+_NEXT_WEIGHT = np.array([0.0, 0.0, 0.025, 0.1, 0.2])
+
+
+def _month_table(values, default=1.0):
+    """Массив длины 13: table[месяц] = values.get(месяц, default)"""
+    values = values or {}
+    return np.array([default] + [float(values.get(month, default)) for month in range(1, 13)])
+
+
+def seasonal_curve(months, weeks, monthly_percentages, variation=0.03, seasonality=None,
+                   noise=0.0, seed=None):
+    """
+    Итоговый процент от базового значения для каждой недели.
+    months, weeks — массивы номеров месяца и недели ISO; monthly_percentages — {месяц: %}, по умолчанию 100.
+    variation — амплитуда вариации внутри месяца, seasonality — {месяц: коэффициент},
+    noise — амплитуда случайных колебаний (±noise), применяется только при заданном seed.
+    """
+    months = np.asarray(months, dtype='int64')
+    weeks = np.asarray(weeks, dtype='int64')
+    percentages = _month_table(monthly_percentages, 100.0)
+
+    base = percentages[months]
+    prev = percentages[(months - 2) % 12 + 1]
+    nxt = percentages[months % 12 + 1]
+    position = (weeks - 1) % 5
+
+    transition = _PREV_WEIGHT[position] * (prev - base) + _NEXT_WEIGHT[position] * (nxt - base)
+    curve = base + transition + base * np.sin(position * np.pi / 2) * variation
+    curve = curve * _month_table(seasonality)[months]
+
+    if seed is not None and noise:
+        rng = np.random.default_rng(seed)
+        curve = curve * rng.uniform(1 - noise, 1 + noise, len(curve))
+    return curve
+
+
+def smooth_weeks(values, years, weeks, smoothed=SMOOTHED_WEEKS, edge_factor=0.95):
+    """
+    Значения недель smoothed заменяются средним соседних недель того же года,
+    при одном соседе — его значением × edge_factor. Соседи берутся из исходных values.
+    """
+    values = np.asarray(values, dtype='float64')
+    result = values.copy()
+    target = np.isin(weeks, smoothed)
+    if not target.any():
+        return result
+
+    index = pd.MultiIndex.from_arrays([np.asarray(years), np.asarray(weeks)])
+    first = ~index.duplicated()
+    lookup = pd.Series(values[first], index=index[first])
+    years_t = np.asarray(years)[target]
+    weeks_t = np.asarray(weeks)[target]
+    prev = lookup.reindex(pd.MultiIndex.from_arrays([years_t, weeks_t - 1])).to_numpy()
+    nxt = lookup.reindex(pd.MultiIndex.from_arrays([years_t, weeks_t + 1])).to_numpy()
+
+    own = result[target]
+    both = ~np.isnan(prev) & ~np.isnan(nxt)
+    own = np.where(both, (prev + nxt) / 2, own)
+    own = np.where(~np.isnan(prev) & np.isnan(nxt), prev * edge_factor, own)
+    own = np.where(np.isnan(prev) & ~np.isnan(nxt), nxt * edge_factor, own)
+    result[target] = own
+    return result
+
+
+def build_seasonal_plan(columns, monthly_percentages=None, monthly_rentability_percentages=None,
+                        base_orders=50.0, base_rentability=15.0, buyout_percent=85.0,
+                        seed=None, orders_noise=0.02, rentability_noise=0.01, year=None):
+    """
+    План по недельным столбцам таблицы (подписи вида "2025.9 (нед. 39)"; прочие столбцы пропускаются).
+    Возвращает DataFrame с индексом-подписями недель в порядке (год, месяц, неделя)
+    и столбцами «Заказ план», «Продажа план», «Рентабельность план» (округление до 0.1).
+    year — только недели этого года; seed — воспроизводимые колебания (None — без колебаний).
+    """
+    keyed = []
+    for col in columns:
+        key = parse_period_label(col)
+        if key is None or key[2] == MONTH_WEEK or (year is not None and key[0] != year):
+            continue
+        keyed.append((key, col))
+    keyed.sort(key=lambda item: item[0])
+    labels = [col for _, col in keyed]
+    if not keyed:
+        return pd.DataFrame(columns=['Заказ план', 'Продажа план', 'Рентабельность план'], dtype='float64')
+
+    keys = np.array([key for key, _ in keyed], dtype='int64')
+    years, months, weeks = keys[:, 0], keys[:, 1], keys[:, 2]
+
+    # Отдельные потоки для заказов и рентабельности: план заказов не зависит от настроек рентабельности
+    orders_seed, rentability_seed = (None, None) if seed is None else np.random.SeedSequence(seed).spawn(2)
+    orders = base_orders * seasonal_curve(
+        months, weeks, monthly_percentages, 0.03, ORDERS_SEASONALITY, orders_noise, orders_seed
+    ) / 100
+    rentability = base_rentability * seasonal_curve(
+        months, weeks, monthly_rentability_percentages, 0.02, RENTABILITY_SEASONALITY, rentability_noise, rentability_seed
+    ) / 100
+    orders = np.round(smooth_weeks(orders, years, weeks), 1)
+    rentability = np.round(smooth_weeks(rentability, years, weeks), 1)
+
+    return pd.DataFrame({
+        'Заказ план': orders,
+        'Продажа план': np.round(orders * buyout_percent / 100, 1),
+        'Рентабельность план': rentability,
+    }, index=pd.Index(labels, name='Неделя'))
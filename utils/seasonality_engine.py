@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Пакетный анализ сезонности товаров (seasonality_analysis.py)
+
+Помесячные суммы всех товаров собираются одним groupby в матрицу товары × месяцы:
+строка — ряд товара по месяцам, в которых у него есть данные (пропущенные месяцы
+не вставляются, как и прежде), выровненный влево и дополненный нулями; длина ряда
+хранится отдельно. Дополнение нулями справа не меняет автокорреляцию на лагах
+внутри ряда, поэтому все расчёты идут по матрице сразу:
+
+- автокорреляция — через БПФ (O(n log n) вместо O(n²) у np.correlate 'full'),
+  поиск первого пика — векторным сравнением с соседними лагами;
+- сезонные индексы — средние по позициям в периоде через reshape (товары
+  группируются по найденному периоду, различных периодов обычно единицы);
+- прогноз — линейный тренд по МНК в замкнутой форме × сезонный индекс.
+
+Результаты совпадают с прежним расчётом по одному товару
+(scripts/bench/bench_seasonality_engine.py).
+"""
+import numpy as np
+import pandas as pd
+
+# Значения до 2**53 складываются без потерь: автокорреляция целых рядов округляется до точной
+_EXACT_LIMIT = 2.0 ** 53
+
+
+def autocorrelation(matrix):
+    """
+    Автокорреляция строк матрицы на лагах 0..n-1 (как np.correlate(x, x, 'full')[n-1:])
+    через БПФ. Для целочисленных рядов результат округляется и совпадает с прямым расчётом.
+    """
+    matrix = np.asarray(matrix, dtype='float64')
+    n = matrix.shape[-1]
+    if n == 0:
+        return matrix.copy()
+    size = 1 << (2 * n - 1).bit_length()
+    spectrum = np.fft.rfft(matrix, size, axis=-1)
+    result = np.fft.irfft(spectrum.real ** 2 + spectrum.imag ** 2, size, axis=-1)[..., :n]
+    scale = np.abs(matrix).max(initial=0.0)
+    if np.array_equal(matrix, np.round(matrix)) and scale * scale * n < _EXACT_LIMIT:
+        result = np.round(result)
+    return result
+
+
+def detect_seasonality(matrix, lengths, period=12):
+    """
+    Период и сила сезонности каждой строки (как detect_seasonality_pattern).
+    Возвращает (periods, strengths): periods — первый пик автокорреляции, period при
+    отсутствии пиков и 0 для рядов короче period * 2; strengths — доля автокорреляции
+    пика от нулевого лага (0 без пиков, NaN для коротких рядов).
+    """
+    matrix = np.asarray(matrix, dtype='float64')
+    lengths = np.asarray(lengths, dtype='int64')
+    count, width = matrix.shape
+    periods = np.zeros(count, dtype='int64')
+    strengths = np.full(count, np.nan)
+    enough = lengths >= period * 2
+    if not enough.any() or width < 3:
+        return periods, strengths
+
+    ac = autocorrelation(matrix[enough])
+    lag = np.arange(1, width - 1)
+    peaks = (ac[:, 1:-1] > ac[:, :-2]) & (ac[:, 1:-1] > ac[:, 2:])
+    peaks &= lag <= (lengths[enough, None] - 2)
+    has_peak = peaks.any(axis=1)
+    first = peaks.argmax(axis=1) + 1
+
+    rows = np.arange(len(ac))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        strength = ac[rows, first] / ac[:, 0]
+    periods[enough] = np.where(has_peak, first, period)
+    strengths[enough] = np.where(has_peak, strength, 0.0)
+    return periods, strengths
+
+
+def _period_groups(lengths, periods):
+    """{период: индексы строк}, для которых ряд не короче периода"""
+    groups = {}
+    for p in np.unique(periods):
+        rows = np.flatnonzero((periods == p) & (lengths >= p) & (p > 0))
+        if len(rows):
+            groups[int(p)] = rows
+    return groups
+
+
+def seasonal_indexes(matrix, lengths, periods):
+    """
+    Сезонные индексы каждой строки по её периоду (как calculate_seasonal_indexes):
+    среднее по позиции в периоде / среднее этих средних (1, если общее среднее ≤ 0).
+    Возвращает список массивов (None для рядов короче периода).
+    """
+    matrix = np.asarray(matrix, dtype='float64')
+    lengths = np.asarray(lengths, dtype='int64')
+    periods = np.broadcast_to(np.asarray(periods, dtype='int64'), lengths.shape)
+    result = [None] * len(lengths)
+    for p, rows in _period_groups(lengths, periods).items():
+        width = -(-max(matrix.shape[1], p) // p) * p
+        block = np.zeros((len(rows), width))
+        block[:, :matrix.shape[1]] = matrix[rows]
+        sums = block.reshape(len(rows), -1, p).sum(axis=1)
+        counts = (lengths[rows, None] - np.arange(p) + p - 1) // p
+        means = sums / counts
+        overall = means.mean(axis=1, keepdims=True)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            indexes = np.where(overall > 0, means / overall, 1.0)
+        for row, values in zip(rows, indexes):
+            result[row] = values
+    return result
+
+
+def forecast_seasonal(matrix, lengths, periods, indexes=None, periods_ahead=12):
+    """
+    Прогноз на periods_ahead шагов: линейный тренд (МНК) × сезонный индекс позиции,
+    не ниже 0 (как forecast_seasonal_values). indexes — результат seasonal_indexes
+    (считается, если не передан). Возвращает список массивов (None для рядов короче периода).
+    """
+    matrix = np.asarray(matrix, dtype='float64')
+    lengths = np.asarray(lengths, dtype='int64')
+    periods = np.broadcast_to(np.asarray(periods, dtype='int64'), lengths.shape)
+    if indexes is None:
+        indexes = seasonal_indexes(matrix, lengths, periods)
+
+    # Тренд в замкнутой форме: наклон = Σ(x - x̄)·y / Σ(x - x̄)²; за длиной ряда y = 0 и в сумму не входит
+    n = lengths.astype('float64')
+    x = np.arange(matrix.shape[1], dtype='float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_mean = (n - 1) / 2
+        y_mean = matrix.sum(axis=1) / n
+        sxy = ((x - x_mean[:, None]) * matrix).sum(axis=1)
+        slope = sxy / (n * (n * n - 1) / 12)
+        intercept = y_mean - slope * x_mean
+
+    result = [None] * len(lengths)
+    steps = np.arange(periods_ahead)
+    for p, rows in _period_groups(lengths, periods).items():
+        future = lengths[rows, None] + steps
+        trend = intercept[rows, None] + slope[rows, None] * future
+        factors = np.array([indexes[row] for row in rows])
+        values = np.maximum(0, trend * np.take_along_axis(factors, future % p, axis=1))
+        for row, forecast in zip(rows, values):
+            result[row] = forecast
+    return result
+
+
+def monthly_matrix(df, date_column, value_column, product_column=None):
+    """
+    Помесячные суммы товаров одним groupby.
+    Возвращает (products, monthly, matrix, lengths): products — товары в порядке
+    появления в df, monthly — таблица [товар, month, value_column] по товарам и месяцам,
+    matrix — ряды, выровненные влево и дополненные нулями, lengths — длины рядов.
+    """
+    key = product_column if product_column else '_all'
+    frame = df[[date_column, value_column] + ([product_column] if product_column else [])]
+    frame = frame.sort_values(date_column)
+    if not product_column:
+        frame = frame.assign(_all='overall')
+    products = pd.unique(df[product_column]) if product_column else np.array(['overall'], dtype=object)
+
+    months = frame[date_column].dt.to_period('M')
+    monthly = frame.groupby([frame[key], months.rename('month')], sort=False)[value_column].sum().reset_index()
+    # Данные отсортированы по дате, поэтому месяцы товара идут по возрастанию;
+    # порядок товаров — как в df (товары без данных, например NaN, получают пустой ряд)
+    order = pd.Index(products).get_indexer(monthly[key])
+    monthly = monthly.iloc[np.argsort(order, kind='stable')].reset_index(drop=True)
+    order = np.sort(order)
+
+    lengths = np.bincount(order, minlength=len(products))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    matrix = np.zeros((len(products), max(int(lengths.max(initial=0)), 1)))
+    matrix[order, np.arange(len(order)) - starts[order]] = monthly[value_column].to_numpy(dtype='float64')
+    monthly['month'] = monthly['month'].astype(str)
+    return products, monthly, matrix, lengths
+
+
+def analyze_seasonality(df, date_column, value_column, product_column=None,
+                        period=12, periods_ahead=12):
+    """
+    Сезонность всех товаров за один проход (формат analyze_product_seasonality):
+    {товар | 'overall': {monthly_data, values, seasonality_period, seasonality_strength,
+    seasonal_indexes, forecast}}.
+    """
+    products, monthly, matrix, lengths = monthly_matrix(df, date_column, value_column, product_column)
+    found, strengths = detect_seasonality(matrix, lengths, period)
+    periods = np.where(found > 0, found, period)
+    indexes = seasonal_indexes(matrix, lengths, periods)
+    forecasts = forecast_seasonal(matrix, lengths, periods, indexes, periods_ahead)
+
+    results = {}
+    monthly = monthly[['month', value_column]]
+    end = np.cumsum(lengths)
+    for i, product in enumerate(products):
+        monthly_data = monthly.iloc[end[i] - lengths[i]:end[i]]
+        monthly_data.index = pd.RangeIndex(lengths[i])
+        results[product] = {
+            'monthly_data': monthly_data,
+            'values': monthly_data[value_column].values,
+            'seasonality_period': int(found[i]) if found[i] else None,
+            'seasonality_strength': float(strengths[i]) if found[i] else None,
+            'seasonal_indexes': None if indexes[i] is None else indexes[i].tolist(),
+            'forecast': None if forecasts[i] is None else forecasts[i].tolist(),
+        }
+    return results
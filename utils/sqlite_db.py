@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Общие помощники для SQLite-хранилищ приложений.
+
+Каждый поток работает через своё соединение (WAL, synchronous=NORMAL, схема
+создаётся при первом открытии). Изменения «прочитать — поменять — записать»
+выполняются в write_transaction() (BEGIN IMMEDIATE), поэтому записи сериализуются
+самой базой, а вложенный вызов работает внутри внешней транзакции.
+"""
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+
+
+def thread_connection(local, path, schema, on_open=None):
+    """
+    Соединение текущего потока с базой path. local — threading.local() хранилища:
+    соединения кешируются по пути, поэтому после смены файла открываются заново.
+    on_open(conn) вызывается один раз после открытия (миграции старых баз);
+    соединение уже в кеше, поэтому on_open может снова вызывать connect() хранилища.
+    """
+    path = Path(path)
+    connections = local.__dict__.setdefault("connections", {})
+    conn = connections.get(path)
+    if conn is None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(path), timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(schema)
+        connections[path] = conn
+        if on_open is not None:
+            try:
+                on_open(conn)
+            except BaseException:
+                # Недомигрированное соединение не оставляем в кеше
+                del connections[path]
+                conn.close()
+                raise
+    return conn
+
+
+@contextmanager
+def write_transaction(conn):
+    """Транзакция на запись в conn; вложенный вызов работает внутри внешней транзакции"""
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Векторизованное ядро юнит-экономики
+
+Одна формула для всех приложений (utils.calculations, voronka/Plan_prodazh,
+UNIT/unit_economics_products_table_FINAL, дашборд): параметры — числа или массивы
+NumPy любой совместимой формы, результат — словарь массивов той же формы,
+поэтому недели, дни плана или сетка «цена × реклама» считаются одним вызовом.
+
+Варианты формул приложений задаются параметрами:
+    logistics='buyout' — логистика с учётом выкупа (невыкупы везут обратно за +50 ₽),
+    logistics='flat'   — логистика тарифом без учёта выкупа;
+    tax_base='revenue' — налог от выручки после комиссии, логистики, рекламы (не ниже 0),
+    tax_base='price'   — налог от цены продажи.
+"""
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Доплата за обратную логистику невыкупленного товара, ₽
+RETURN_LOGISTICS = 50.0
+
+# Сколько наборов параметров помнит unit_economics_memo (LRU)
+MEMO_SIZE = 4096
+
+
+def _arr(value):
+    return np.asarray(value, dtype='float64')
+
+
+def logistics_with_buyout(logistics_cost, buyout_percent):
+    """Логистика на выкупленную единицу: (b × L + (1 - b) × (L + 50)) / b, при b = 0 — тариф L"""
+    logistics_cost = _arr(logistics_cost)
+    buyout_percent = _arr(buyout_percent)
+    ratio = buyout_percent / 100
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cost = (ratio * logistics_cost + (1 - ratio) * (logistics_cost + RETURN_LOGISTICS)) * 100 / buyout_percent
+    return np.where(buyout_percent > 0, cost, logistics_cost)
+
+
+def unit_economics(
+    price, cost_price, commission_rate, logistics_cost, advertising_percent,
+    buyout_percent, storage_cost=0.0, tax_rate=7.0, discount_percent=0.0,
+    logistics='buyout', tax_base='revenue'
+):
+    """
+    Юнит-экономика на единицу товара для массивов параметров (с broadcasting).
+    price — цена до скидки discount_percent; все проценты — в процентах (15 = 15%).
+    """
+    price = _arr(price) * (1 - _arr(discount_percent) / 100)
+    cost_price = _arr(cost_price)
+    commission = price * (_arr(commission_rate) / 100)
+    advertising = price * (_arr(advertising_percent) / 100)
+    storage = _arr(storage_cost)
+    if logistics == 'flat':
+        delivery = _arr(logistics_cost) + np.zeros_like(price)
+    else:
+        delivery = logistics_with_buyout(logistics_cost, buyout_percent)
+
+    revenue = price - commission - delivery - advertising - storage
+    if tax_base == 'price':
+        tax = price * (_arr(tax_rate) / 100)
+    else:
+        tax = np.maximum(revenue, 0) * (_arr(tax_rate) / 100)
+    profit = revenue - cost_price - tax
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        margin = np.where(price > 0, profit / price * 100, 0.0)
+        profitability = np.where(cost_price > 0, profit / cost_price * 100, 0.0)
+
+    return {
+        'Цена продажи': price,
+        'Себестоимость': cost_price + np.zeros_like(price),
+        'Комиссия, руб': commission,
+        'Логистика с учетом выкупа': delivery,
+        'Реклама, руб': advertising,
+        'Хранение, руб': storage + np.zeros_like(price),
+        'Налог, руб': tax,
+        'Выручка с ед.': revenue,
+        'Прибыль с ед.': profit,
+        'Прибыль с учетом выкупа': profit * (_arr(buyout_percent) / 100),
+        'Маржинальность, %': margin,
+        'Рентабельность, %': profitability,
+    }
+
+
+def unit_economics_scalar(*args, **kwargs):
+    """unit_economics для чисел: словарь float вместо массивов"""
+    return {key: float(value) for key, value in unit_economics(*args, **kwargs).items()}
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def unit_economics_memo(
+    price, cost_price, commission_rate, logistics_cost, advertising_percent,
+    buyout_percent, storage_cost=0.0, tax_rate=7.0, discount_percent=0.0,
+    logistics='buyout', tax_base='revenue'
+):
+    """
+    unit_economics_scalar с памятью последних MEMO_SIZE наборов параметров (ключ — кортеж чисел).
+    Результат выводится из аргументов, поэтому память не сохраняется на диск и общая для всех сессий.
+    Возвращаемый словарь общий — не изменять. Статистика и очистка: cache_info() / cache_clear().
+    """
+    return unit_economics_scalar(
+        price, cost_price, commission_rate, logistics_cost, advertising_percent,
+        buyout_percent, storage_cost, tax_rate, discount_percent, logistics, tax_base
+    )
+
+
+def unit_economics_frame(params, **defaults):
+    """
+    Юнит-экономика для таблицы параметров (DataFrame со столбцами-аргументами unit_economics).
+    Недостающие аргументы берутся из defaults. Возвращает DataFrame метрик с тем же индексом.
+    """
+    names = (
+        'price', 'cost_price', 'commission_rate', 'logistics_cost', 'advertising_percent',
+        'buyout_percent', 'storage_cost', 'tax_rate', 'discount_percent',
+    )
+    kwargs = dict(defaults)
+    for name in names:
+        if name in params.columns:
+            kwargs[name] = params[name].to_numpy(dtype='float64')
+    result = unit_economics(**kwargs)
+    return pd.DataFrame({key: np.broadcast_to(value, (len(params),)) for key, value in result.items()}, index=params.index)
+
+
+def what_if_grid(prices, advertising_percents, metric='Прибыль с ед.', **params):
+    """
+    Сценарии «цена × доля рекламы»: таблица metric, строки — цены, столбцы — % рекламы.
+    Остальные параметры unit_economics передаются в params (числа или массивы формы (1,)).
+    """
+    prices = _arr(prices)
+    advertising_percents = _arr(advertising_percents)
+    result = unit_economics(price=prices[:, None], advertising_percent=advertising_percents[None, :], **params)
+    grid = np.broadcast_to(result[metric], (len(prices), len(advertising_percents)))
+    return pd.DataFrame(grid, index=pd.Index(prices, name='Цена'), columns=pd.Index(advertising_percents, name='Реклама, %'))
+
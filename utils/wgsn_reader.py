@@ -4,12 +4,11 @@
 """
 import os
 
-try:
-    from docx import Document
-    DOCX_AVAILABLE = True
-except ImportError:
-    DOCX_AVAILABLE = False
-    Document = None
+from .lazy import LazyModule, module_available
+
+# python-docx импортируется при первом чтении файла
+DOCX_AVAILABLE = module_available("docx")
+docx = LazyModule("docx") if DOCX_AVAILABLE else None
 
 
 def read_wgsn_files(wgsn_dir: str = None) -> dict:
@@ -46,7 +45,7 @@ def read_wgsn_files(wgsn_dir: str = None) -> dict:
             if filename.endswith('.docx'):
                 file_path = os.path.join(wgsn_dir, filename)
                 try:
-                    doc = Document(file_path)
+                    doc = docx.Document(file_path)
                     # Извлекаем весь текст из документа
                     full_text = []
                     for paragraph in doc.paragraphs: